@@ -98,6 +98,7 @@
 #include "rangeobject.h"
 #include "stringobject.h"
 #include "memoryobject.h"
+#include "picklebufobject.h"
 #include "bufferobject.h"
 #include "bytesobject.h"
 #include "bytearrayobject.h"
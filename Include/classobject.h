@@ -19,6 +19,7 @@ typedef struct {
     PyObject	*cl_setattr;
     PyObject	*cl_delattr;
     PyObject    *cl_weakreflist; /* List of weak references */
+    PyDictKeysObject *cl_cached_keys; /* Shared by the instance dicts */
 } PyClassObject;
 
 typedef struct {
@@ -6,6 +6,32 @@
 extern "C" {
 #endif
 
+/* Inline caches for the opcodes of a code object, see Python/ceval.c */
+typedef struct {
+    PyObject *ptr;              /* cached value (borrowed reference) */
+    PY_UINT64_T globals_ver;    /* ma_version_tag of the globals dict */
+    PY_UINT64_T builtins_ver;   /* ma_version_tag of the builtins dict */
+} _PyOpcache_LoadGlobal;
+
+typedef struct {
+    PyTypeObject *type;         /* type of the owner (borrowed) */
+    unsigned int tp_version_tag;
+    int kind;                   /* see the _PyOpcache_LOAD_ATTR_* values */
+    Py_ssize_t hint;            /* index of the entry in the instance dict */
+    PyObject *descr;            /* data descriptor (borrowed) */
+} _PyOpcache_LoadAttr;
+
+#define _PyOpcache_LOAD_ATTR_DICT   1
+#define _PyOpcache_LOAD_ATTR_DESCR  2
+
+typedef struct {
+    union {
+        _PyOpcache_LoadGlobal lg;
+        _PyOpcache_LoadAttr la;
+    } u;
+    int optimized;  /* remaining (re)fills; the cache is unused at 0 */
+} _PyOpcache;
+
 /* Bytecode object */
 typedef struct {
     PyObject_HEAD
@@ -28,6 +54,15 @@ typedef struct {
     void *co_zombieframe;     /* for optimization only (see frameobject.c) */
     PyObject *co_weakreflist;   /* to support weakrefs to code objects */
     int co_kwonlyargcount;      /* #keyword only arguments */
+
+    /* Per opcode just-in-time caches, created after the code object has
+       been run _PyCode_OPCACHE_MIN_RUNS times.  co_opcache_map maps the
+       offset just past an instruction to a 1-based index into
+       co_opcache, or to 0 if the instruction has no cache. */
+    unsigned short *co_opcache_map;
+    _PyOpcache *co_opcache;
+    int co_opcache_flag;        /* number of runs so far */
+    int co_opcache_size;        /* length of co_opcache */
 } PyCodeObject;
 
 /* Masks for co_flags above */
@@ -120,6 +155,12 @@ PyAPI_FUNC(int) _PyCode_CheckLineNumber(PyCodeObject* co,
  * compare bytes and unicode which can raise a BytesWarning exception. */
 PyAPI_FUNC(PyObject*) _PyCode_ConstantKey(PyObject *obj);
 
+/* Number of runs of a code object before its opcode caches are created */
+#define _PyCode_OPCACHE_MIN_RUNS 1024
+
+/* Create the opcode caches of a code object; for internal use only */
+PyAPI_FUNC(int) _PyCode_InitOpcache(PyCodeObject *co);
+
 PyAPI_FUNC(PyObject*) PyCode_Optimize(PyObject *code, PyObject* consts,
                                       PyObject *names, PyObject *lineno_obj);
 
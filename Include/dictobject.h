@@ -13,37 +13,11 @@ extern "C" {
    tuning dictionaries, and several ideas for possible optimizations.
 */
 
-/*
-There are three kinds of slots in the table:
-
-1. Unused.  me_key == me_value == NULL
-   Does not hold an active (key, value) pair now and never did.  Unused can
-   transition to Active upon key insertion.  This is the only case in which
-   me_key is NULL, and is each slot's initial state.
-
-2. Active.  me_key != NULL and me_key != dummy and me_value != NULL
-   Holds an active (key, value) pair.  Active can transition to Dummy upon
-   key deletion.  This is the only case in which me_value != NULL.
-
-3. Dummy.  me_key == dummy and me_value == NULL
-   Previously held an active (key, value) pair, but that was deleted and an
-   active pair has not yet overwritten the slot.  Dummy can transition to
-   Active upon key insertion.  Dummy slots cannot be made Unused again
-   (cannot have me_key set to NULL), else the probe sequence in case of
-   collision would have no way to know they were once active.
-
-Note: .popitem() abuses the me_hash field of an Unused or Dummy slot to
-hold a search finger.  The me_hash field of Unused or Dummy slots has no
-meaning otherwise.
-*/
-
-/* PyDict_MINSIZE is the minimum size of a dictionary.  This many slots are
- * allocated directly in the dict object (in the ma_smalltable member).
- * It must be a power of 2, and at least 4.  8 allows dicts with no more
- * than 5 active entries to live in ma_smalltable (and so avoid an
- * additional malloc); instrumentation suggested this suffices for the
- * majority of dicts (consisting mostly of usually-small instance dicts and
- * usually-small dicts created to pass keyword arguments).
+/* PyDict_MINSIZE is the minimum size of a dictionary.  It must be a power
+ * of 2, and at least 4.  8 allows dicts with no more than 5 active entries
+ * to live in a single small keys table; instrumentation suggested this
+ * suffices for the majority of dicts (consisting mostly of usually-small
+ * instance dicts and usually-small dicts created to pass keyword arguments).
  */
 #define PyDict_MINSIZE 8
 
@@ -54,40 +28,40 @@ typedef struct {
      */
     Py_ssize_t me_hash;
     PyObject *me_key;
-    PyObject *me_value;
+    PyObject *me_value; /* This field is only meaningful for combined tables */
 } PyDictEntry;
 
-/*
-To ensure the lookup algorithm terminates, there must be at least one Unused
-slot (NULL key) in the table.
-The value ma_fill is the number of non-NULL keys (sum of Active and Dummy);
-ma_used is the number of non-NULL, non-dummy keys (== the number of non-NULL
-values == the number of Active items).
-To avoid slowing down lookups on a near-full table, we resize the table when
-it's two-thirds full.
-*/
+/* The keys and hashes of a dictionary live in a separate object, which is
+ * shared between the instance dictionaries of a class ("split tables",
+ * PEP 412).  Its layout is private to Objects/dictobject.c.
+ */
+typedef struct _dictkeysobject PyDictKeysObject;
+
+/* The ma_values pointer is NULL for a combined table
+ * or points to an array of PyObject* for a split table
+ */
 typedef struct _dictobject PyDictObject;
 struct _dictobject {
     PyObject_HEAD
-    Py_ssize_t ma_fill;  /* # Active + # Dummy */
     Py_ssize_t ma_used;  /* # Active */
 
-    /* The table contains ma_mask + 1 slots, and that's a power of 2.
-     * We store the mask instead of the size because the mask is more
-     * frequently needed.
-     */
-    Py_ssize_t ma_mask;
+    /* Dictionary version: globally unique, value change each time
+       the dictionary is modified.  Lets the interpreter cache lookups
+       (see the LOAD_GLOBAL opcode cache in ceval.c) and check them
+       without hashing. */
+    PY_UINT64_T ma_version_tag;
 
-    /* ma_table points to ma_smalltable for small tables, else to
-     * additional malloc'ed memory.  ma_table is never NULL!  This rule
-     * saves repeated runtime null-tests in the workhorse getitem and
-     * setitem calls.
-     */
-    PyDictEntry *ma_table;
-    PyDictEntry *(*ma_lookup)(PyDictObject *mp, PyObject *key, long hash);
-    PyDictEntry ma_smalltable[PyDict_MINSIZE];
+    PyDictKeysObject *ma_keys;
+    PyObject **ma_values;
 };
 
+/* Layout of the dict views (keys, values and items).  The C OrderedDict
+   derives its views from them. */
+typedef struct {
+    PyObject_HEAD
+    PyDictObject *dv_dict;
+} _PyDictViewObject;
+
 PyAPI_DATA(PyTypeObject) PyDict_Type;
 PyAPI_DATA(PyTypeObject) PyDictIterKey_Type;
 PyAPI_DATA(PyTypeObject) PyDictIterValue_Type;
@@ -99,9 +73,9 @@ PyAPI_DATA(PyTypeObject) PyDictValues_Type;
 #define PyDict_Check(op) \
                  PyType_FastSubclass(Py_TYPE(op), Py_TPFLAGS_DICT_SUBCLASS)
 #define PyDict_CheckExact(op) (Py_TYPE(op) == &PyDict_Type)
-#define PyDictKeys_Check(op) (Py_TYPE(op) == &PyDictKeys_Type)
-#define PyDictItems_Check(op) (Py_TYPE(op) == &PyDictItems_Type)
-#define PyDictValues_Check(op) (Py_TYPE(op) == &PyDictValues_Type)
+#define PyDictKeys_Check(op) PyObject_TypeCheck(op, &PyDictKeys_Type)
+#define PyDictItems_Check(op) PyObject_TypeCheck(op, &PyDictItems_Type)
+#define PyDictValues_Check(op) PyObject_TypeCheck(op, &PyDictValues_Type)
 /* This excludes Values, since they are not sets. */
 # define PyDictViewSet_Check(op) \
     (PyDictKeys_Check(op) || PyDictItems_Check(op))
@@ -109,8 +83,16 @@ PyAPI_DATA(PyTypeObject) PyDictValues_Type;
 PyAPI_FUNC(PyObject *) PyDict_New(void);
 PyAPI_FUNC(PyObject *) PyDict_GetItem(PyObject *mp, PyObject *key);
 PyAPI_FUNC(PyObject *) _PyDict_GetItemWithError(PyObject *mp, PyObject *key);
+PyAPI_FUNC(PyObject *) _PyDict_GetItem_KnownHash(PyObject *mp, PyObject *key,
+                                                 long hash);
 PyAPI_FUNC(int) PyDict_SetItem(PyObject *mp, PyObject *key, PyObject *item);
+PyAPI_FUNC(int) _PyDict_SetItem_KnownHash(PyObject *mp, PyObject *key,
+                                          PyObject *item, long hash);
 PyAPI_FUNC(int) PyDict_DelItem(PyObject *mp, PyObject *key);
+PyAPI_FUNC(int) _PyDict_DelItem_KnownHash(PyObject *mp, PyObject *key,
+                                          long hash);
+PyAPI_FUNC(PyObject *) _PyDict_Pop_KnownHash(PyObject *mp, PyObject *key,
+                                             long hash, PyObject *deflt);
 PyAPI_FUNC(int) _PyDict_DelItemIf(PyObject *mp, PyObject *key,
                                   int (*predicate)(PyObject *value));
 
@@ -128,6 +110,29 @@ PyAPI_FUNC(int) PyDict_Contains(PyObject *mp, PyObject *key);
 PyAPI_FUNC(int) _PyDict_Contains(PyObject *mp, PyObject *key, long hash);
 PyAPI_FUNC(PyObject *) _PyDict_NewPresized(Py_ssize_t minused);
 PyAPI_FUNC(void) _PyDict_MaybeUntrack(PyObject *mp);
+PyAPI_FUNC(PyObject *) _PyDict_LoadGlobal(PyDictObject *globals,
+                                          PyDictObject *builtins,
+                                          PyObject *key);
+PyAPI_FUNC(Py_ssize_t) _PyDict_GetItemHint(PyDictObject *mp, PyObject *key,
+                                           Py_ssize_t hint, PyObject **value);
+PyAPI_FUNC(Py_ssize_t) _PyDict_GetEntryIndex(PyDictObject *mp, PyObject *key,
+                                             long hash);
+PyAPI_FUNC(Py_ssize_t) _PyDict_EntriesSize(PyDictObject *mp);
+PyAPI_FUNC(Py_ssize_t) _PyDict_SizeOf(PyDictObject *mp);
+PyAPI_FUNC(PyObject *) _PyDictView_New(PyObject *dict, PyTypeObject *type);
+
+#define _PyDict_HasSplitTable(d) ((d)->ma_values != NULL)
+
+/* Support for key-sharing instance dictionaries.  A class owns a reference
+   to its cached keys object; _PyObjectDict_SetItem() creates the instance
+   dict from it and keeps the cache up to date as the dict grows. */
+PyAPI_FUNC(PyDictKeysObject *) _PyDict_NewKeysForClass(void);
+PyAPI_FUNC(void) _PyDictKeys_DecRef(PyDictKeysObject *keys);
+PyAPI_FUNC(Py_ssize_t) _PyDict_KeysSize(PyDictKeysObject *keys);
+PyAPI_FUNC(PyObject *) _PyObjectDict_New(PyDictKeysObject *cached);
+PyAPI_FUNC(int) _PyObjectDict_SetItem(PyDictKeysObject **cachedptr,
+                                      PyObject **dictptr,
+                                      PyObject *key, PyObject *value);
 
 /* PyDict_Update(mp, other) is equivalent to PyDict_Merge(mp, other, 1). */
 PyAPI_FUNC(int) PyDict_Update(PyObject *mp, PyObject *other);
@@ -65,8 +65,16 @@ typedef struct {
     PyObject_HEAD
     PyObject *base;
     Py_buffer view;
+    Py_ssize_t exports;         /* number of buffers exported by the view */
+    long hash;                  /* cached hash or -1 */
+    int flags;                  /* state flags */
+    Py_ssize_t *ob_array;       /* shape, strides, suboffsets if ndim > 1 */
 } PyMemoryViewObject;
 
+/* memoryview state flags */
+#define _Py_MEMORYVIEW_RELEASED 0x001  /* release() has been called */
+#define _Py_MEMORYVIEW_COPY     0x002  /* the memory is a copy owned by base */
+
 
 #ifdef __cplusplus
 }
@@ -19,6 +19,9 @@ typedef PyObject *(*PyCFunction)(PyObject *, PyObject *);
 typedef PyObject *(*PyCFunctionWithKeywords)(PyObject *, PyObject *,
 					     PyObject *);
 typedef PyObject *(*PyNoArgsFunction)(PyObject *);
+typedef PyObject *(*_PyCFunctionFast)(PyObject *, PyObject **, Py_ssize_t);
+typedef PyObject *(*_PyCFunctionFastWithKeywords)(PyObject *, PyObject **,
+                                                  Py_ssize_t, PyObject *);
 
 PyAPI_FUNC(PyCFunction) PyCFunction_GetFunction(PyObject *);
 PyAPI_FUNC(PyObject *) PyCFunction_GetSelf(PyObject *);
@@ -70,6 +73,12 @@ PyAPI_FUNC(PyObject *) PyCFunction_NewEx(PyMethodDef *, PyObject *,
 
 #define METH_COEXIST   0x0040
 
+/* METH_FASTCALL passes the positional arguments as a C array and their
+   number instead of a tuple.  Combined with METH_KEYWORDS, the values of
+   the keyword arguments follow the positional ones in the array and their
+   names are passed as a tuple, or NULL if there are none. */
+#define METH_FASTCALL  0x0080
+
 typedef struct PyMethodChain {
     PyMethodDef *methods;		/* Methods of this type */
     struct PyMethodChain *link;	/* NULL or base type */
@@ -87,6 +96,12 @@ typedef struct {
 
 PyAPI_FUNC(int) PyCFunction_ClearFreeList(void);
 
+PyAPI_FUNC(PyObject *) _PyMethodDef_RawFastCallKeywords(PyMethodDef *,
+                                                        PyObject *,
+                                                        PyObject **,
+                                                        Py_ssize_t,
+                                                        PyObject *);
+
 #ifdef __cplusplus
 }
 #endif
@@ -19,6 +19,8 @@ extern "C" {
 #define PyArg_VaParseTupleAndKeywords	_PyArg_VaParseTupleAndKeywords_SizeT
 #define Py_BuildValue			_Py_BuildValue_SizeT
 #define Py_VaBuildValue			_Py_VaBuildValue_SizeT
+#define _PyArg_ParseStack		_PyArg_ParseStack_SizeT
+#define _PyArg_ParseStackAndKeywords	_PyArg_ParseStackAndKeywords_SizeT
 #else
 PyAPI_FUNC(PyObject *) _Py_VaBuildValue_SizeT(const char *, va_list);
 #endif
@@ -32,6 +34,29 @@ PyAPI_FUNC(PyObject *) Py_BuildValue(const char *, ...);
 PyAPI_FUNC(PyObject *) _Py_BuildValue_SizeT(const char *, ...);
 PyAPI_FUNC(int) _PyArg_NoKeywords(const char *funcname, PyObject *kw);
 
+/* Argument parsing for METH_FASTCALL functions.  A static _PyArg_Parser
+   holds the format and the NULL-terminated list of keywords; the other
+   fields are filled in on first use. */
+typedef struct _PyArg_Parser {
+    const char *format;
+    const char * const *keywords;
+    const char *fname;
+    const char *custom_msg;
+    PyObject *kwtuple;  /* tuple of interned keyword strings */
+    struct _PyArg_Parser *next;
+} _PyArg_Parser;
+
+PyAPI_FUNC(int) _PyArg_ParseStack(PyObject **args, Py_ssize_t nargs,
+                                  const char *, ...);
+PyAPI_FUNC(int) _PyArg_ParseStackAndKeywords(PyObject **args,
+                                             Py_ssize_t nargs,
+                                             PyObject *kwnames,
+                                             struct _PyArg_Parser *, ...);
+PyAPI_FUNC(int) _PyArg_UnpackStack(PyObject **args, Py_ssize_t nargs,
+                                   const char *name,
+                                   Py_ssize_t min, Py_ssize_t max, ...);
+PyAPI_FUNC(void) _PyArg_Fini(void);
+
 PyAPI_FUNC(int) PyArg_VaParse(PyObject *, const char *, va_list);
 PyAPI_FUNC(int) PyArg_VaParseTupleAndKeywords(PyObject *, PyObject *,
                                                   const char *, char **, va_list);
@@ -438,6 +438,7 @@ typedef struct _heaptypeobject {
                                       see add_operators() in typeobject.c . */
     PyBufferProcs as_buffer;
     PyObject *ht_name, *ht_slots;
+    struct _dictkeysobject *ht_cached_keys;
     /* here are optional user slots, followed by the members. */
 } PyHeapTypeObject;
 
@@ -513,6 +514,10 @@ _PyObject_GenericGetAttrWithDict(PyObject *, PyObject *, PyObject *);
 PyAPI_FUNC(int)
 _PyObject_GenericSetAttrWithDict(PyObject *, PyObject *,
                                  PyObject *, PyObject *);
+/* Look up an attribute for a method call.  Return 1 and store the unbound
+   method in *method if it can be called with the object as its first
+   argument; otherwise store the attribute (or NULL on error) and return 0. */
+PyAPI_FUNC(int) _PyObject_GetMethod(PyObject *, PyObject *, PyObject **);
 
 
 /* PyObject_Dir(obj) acts like Python __builtin__.dir(obj), returning a
@@ -721,7 +726,6 @@ environment the global variable trick is not safe.)
 PyAPI_DATA(Py_ssize_t) _Py_RefTotal;
 PyAPI_FUNC(void) _Py_NegativeRefcount(const char *fname,
                                             int lineno, PyObject *op);
-PyAPI_FUNC(PyObject *) _PyDict_Dummy(void);
 PyAPI_FUNC(PyObject *) _PySet_Dummy(void);
 PyAPI_FUNC(Py_ssize_t) _Py_GetRefTotal(void);
 #define _Py_INC_REFTOTAL        _Py_RefTotal++
@@ -778,18 +782,61 @@ PyAPI_FUNC(void) _Py_AddToAllObjects(PyObject *, int force);
     (*Py_TYPE(op)->tp_dealloc)((PyObject *)(op)))
 #endif /* !Py_TRACE_REFS */
 
-#define Py_INCREF(op) (                         \
-    _Py_INC_REFTOTAL  _Py_REF_DEBUG_COMMA       \
-    ((PyObject*)(op))->ob_refcnt++)
-
-#define Py_DECREF(op)                                   \
-    do {                                                \
-        if (_Py_DEC_REFTOTAL  _Py_REF_DEBUG_COMMA       \
-        --((PyObject*)(op))->ob_refcnt != 0)            \
-            _Py_CHECK_REFCNT(op)                        \
-        else                                            \
-        _Py_Dealloc((PyObject *)(op));                  \
-    } while (0)
+#ifdef Py_IMMORTAL_OBJECTS
+/* Immortal objects are never deallocated, and Py_INCREF and Py_DECREF don't
+ * write to them, so that pages holding them stay shared between processes
+ * forked from a common parent.  Their reference count is set far above any
+ * real one; extensions built against headers without this check still
+ * change it, which is harmless as long as it stays above the threshold.
+ * See _Py_SetImmortal() and sys._immortalize_heap().
+ *
+ * The check costs a branch on every reference count change, so it is only
+ * compiled in when configured --with-immortal-objects.
+ */
+#define _Py_IMMORTAL_REFCNT     (PY_SSIZE_T_MAX / 4 * 3)
+#define _Py_IsImmortal(op)      (Py_REFCNT(op) > PY_SSIZE_T_MAX / 2)
+
+PyAPI_FUNC(void) _Py_SetImmortal(PyObject *);
+#endif /* Py_IMMORTAL_OBJECTS */
+
+/* Py_INCREF and Py_DECREF evaluate their argument only once.  The file name
+ * and line number passed to _Py_DecRef() are only used in Py_REF_DEBUG
+ * builds, to report negative reference counts; otherwise the compiler drops
+ * them when it inlines the call.
+ */
+_Py_STATIC_INLINE(void)
+_Py_IncRef(PyObject *op)
+{
+#ifdef Py_IMMORTAL_OBJECTS
+    if (_Py_IsImmortal(op))
+        return;
+#endif
+    _Py_INC_REFTOTAL;
+    op->ob_refcnt++;
+}
+
+_Py_STATIC_INLINE(void)
+_Py_DecRef(const char *filename, int lineno, PyObject *op)
+{
+    (void)filename;
+    (void)lineno;
+#ifdef Py_IMMORTAL_OBJECTS
+    if (_Py_IsImmortal(op))
+        return;
+#endif
+    _Py_DEC_REFTOTAL;
+    if (--op->ob_refcnt != 0) {
+#ifdef Py_REF_DEBUG
+        if (op->ob_refcnt < 0)
+            _Py_NegativeRefcount(filename, lineno, op);
+#endif
+    }
+    else
+        _Py_Dealloc(op);
+}
+
+#define Py_INCREF(op) _Py_IncRef((PyObject *)(op))
+#define Py_DECREF(op) _Py_DecRef(__FILE__, __LINE__, (PyObject *)(op))
 
 /* Safely decref `op` and set `op` to NULL, especially useful in tp_clear
  * and tp_dealloc implementations.
@@ -234,6 +234,11 @@ PyAPI_FUNC(PyVarObject *) _PyObject_NewVar(PyTypeObject *, Py_ssize_t);
 /* C equivalent of gc.collect(). */
 PyAPI_FUNC(Py_ssize_t) PyGC_Collect(void);
 
+#ifdef Py_IMMORTAL_OBJECTS
+/* Freeze and immortalize every object reachable from the GC lists. */
+PyAPI_FUNC(Py_ssize_t) _PyGC_ImmortalizeHeap(void);
+#endif
+
 /* Test if a type has a GC head */
 #define PyType_IS_GC(t) PyType_HasFeature((t), Py_TPFLAGS_HAVE_GC)
 
@@ -171,6 +171,9 @@ extern "C" {
 #define MAP_ADD         147
 #define SETUP_ASYNC_WITH 154
 
+#define LOAD_METHOD     160     /* Index in name list */
+#define CALL_METHOD     161     /* #args + (#kwargs<<8) */
+
 
 enum cmp_op {PyCmp_LT=Py_LT, PyCmp_LE=Py_LE, PyCmp_EQ=Py_EQ, PyCmp_NE=Py_NE, PyCmp_GT=Py_GT, PyCmp_GE=Py_GE,
 	     PyCmp_IN, PyCmp_NOT_IN, PyCmp_IS, PyCmp_IS_NOT, PyCmp_EXC_MATCH, PyCmp_BAD};
@@ -295,6 +295,22 @@ typedef Py_intptr_t     Py_ssize_t;
 #define Py_LOCAL_INLINE(type) static type
 #endif
 
+/* _Py_STATIC_INLINE is for small functions defined in headers, such as the
+ * reference counting helpers in object.h.  Unlike Py_LOCAL_INLINE it always
+ * asks for inlining, and it keeps the default calling convention so that
+ * extensions see the same code.
+ */
+#if defined(_MSC_VER)
+#define _Py_STATIC_INLINE(type) static __inline type
+#elif defined(__GNUC__)
+#define _Py_STATIC_INLINE(type) static __inline__ type
+#elif defined(__cplusplus) || \
+      (defined(__STDC_VERSION__) && __STDC_VERSION__ >= 199901L)
+#define _Py_STATIC_INLINE(type) static inline type
+#else
+#define _Py_STATIC_INLINE(type) static type
+#endif
+
 /* Py_MEMCPY can be used instead of memcpy in cases where the copied blocks
  * are often very short.  While most platforms have highly optimized code for
  * large transfers, the setup costs for memcpy are often quite high.  MEMCPY
@@ -83,6 +83,9 @@ PyAPI_FUNC(void) PyString_InternInPlace(PyObject **);
 PyAPI_FUNC(void) PyString_InternImmortal(PyObject **);
 PyAPI_FUNC(PyObject *) PyString_InternFromString(const char *);
 PyAPI_FUNC(void) _Py_ReleaseInternedStrings(void);
+#ifdef Py_IMMORTAL_OBJECTS
+PyAPI_FUNC(Py_ssize_t) _PyString_ImmortalizeInterned(void);
+#endif
 
 /* Use only if you know it's a string */
 #define PyString_CHECK_INTERNED(op) (((PyStringObject *)(op))->ob_sstate)
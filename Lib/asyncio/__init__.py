@@ -0,0 +1,24 @@
+"""The asyncio package, tracking PEP 3156."""
+
+# This relies on each of the submodules having an __all__ variable.
+from .base_events import *
+from .coroutines import *
+from .events import *
+from .futures import *
+from .protocols import *
+from .runners import *
+from .selector_events import *
+from .streams import *
+from .tasks import *
+from .transports import *
+
+__all__ = (base_events.__all__ +
+           coroutines.__all__ +
+           events.__all__ +
+           futures.__all__ +
+           protocols.__all__ +
+           runners.__all__ +
+           selector_events.__all__ +
+           streams.__all__ +
+           tasks.__all__ +
+           transports.__all__)
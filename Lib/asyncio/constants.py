@@ -0,0 +1,11 @@
+"""Constants."""
+
+# After the connection is lost, log warnings after this many write()s.
+LOG_THRESHOLD_FOR_CONNLOST_WRITES = 5
+
+# Seconds to wait before retrying accept().
+ACCEPT_RETRY_DELAY = 1
+
+# The largest timeout passed to the selector, in seconds.  Longer timeouts
+# are rejected by some selector implementations.
+MAXIMUM_SELECT_TIMEOUT = 24 * 3600
@@ -0,0 +1,40 @@
+"""Helpers to tell coroutines apart from other objects."""
+
+__all__ = ['coroutine', 'iscoroutinefunction', 'iscoroutine']
+
+import collections
+import inspect
+import types
+
+
+def coroutine(func):
+    """Decorator to mark generator-based coroutines.
+
+    Native coroutines defined with "async def" don't need it; generator
+    functions decorated with it can be awaited from native coroutines.
+    """
+    if inspect.iscoroutinefunction(func):
+        return func
+    wrapper = types.coroutine(func)
+    wrapper._is_coroutine = _is_coroutine
+    return wrapper
+
+
+# A marker for iscoroutinefunction.
+_is_coroutine = object()
+
+
+def iscoroutinefunction(func):
+    """Return True if func is a decorated coroutine function."""
+    return (getattr(func, '_is_coroutine', None) is _is_coroutine or
+            inspect.iscoroutinefunction(func))
+
+
+# Generators are accepted too, for coroutines written with "yield from".
+_COROUTINE_TYPES = (types.CoroutineType, types.GeneratorType,
+                    collections.Coroutine)
+
+
+def iscoroutine(obj):
+    """Return True if obj is a coroutine object."""
+    return isinstance(obj, _COROUTINE_TYPES)
@@ -18,7 +18,8 @@ from _abcoll import *
 import _abcoll
 __all__ += _abcoll.__all__
 
-from _collections import deque, defaultdict
+from _collections import deque, defaultdict, _tuplegetter, _tuplemaker
+from types import CodeType as _CodeType, FunctionType as _FunctionType
 from operator import itemgetter as _itemgetter, eq as _eq
 from keyword import iskeyword as _iskeyword
 import sys as _sys
@@ -113,6 +114,29 @@ class OrderedDict(dict):
         self.__map.clear()
         dict.clear(self)
 
+    def move_to_end(self, key, last=True):
+        '''Move an existing element to the end (or beginning if last==False).
+
+        Raises KeyError if the element does not exist.
+        When last=True, acts like a fast version of self[key]=self.pop(key).
+
+        '''
+        link = self.__map[key]
+        link_prev, link_next, _ = link
+        link_prev[1] = link_next                        # update link_prev[NEXT]
+        link_next[0] = link_prev                        # update link_next[PREV]
+        root = self.__root
+        if last:
+            last = root[0]
+            link[0] = last
+            link[1] = root
+            last[1] = root[0] = link
+        else:
+            first = root[1]
+            link[0] = root
+            link[1] = first
+            root[1] = first[0] = link
+
     # -- the following methods do not depend on the internal structure --
 
     def keys(self):
@@ -244,11 +268,19 @@ class OrderedDict(dict):
         "od.viewitems() -> a set-like object providing a view on od's items"
         return ItemsView(self)
 
+try:
+    from _collections import OrderedDict
+except ImportError:
+    # Leave the pure Python version in place.
+    pass
+
 
 ################################################################################
 ### namedtuple
 ################################################################################
 
+# The classes are built with type() from the pieces below.  This template is
+# only shown by namedtuple(verbose=True), as an equivalent class definition.
 _class_template = '''\
 class {typename}(tuple):
     '{typename}({arg_list})'
@@ -303,6 +335,32 @@ _field_template = '''\
     {name} = _property(_itemgetter({index:d}), doc='Alias for field number {index:d}')
 '''
 
+# Code objects of __new__ methods that pass their arguments on to a
+# _tuplemaker, by number of fields.  The code is exec'd the first time a
+# number of fields is seen; each class gets a copy renamed to its field
+# names, so that __new__ has the usual signature without compiling code for
+# every class.
+_new_code_cache = {}
+
+def _new_function(typename, field_names, make):
+    num_fields = len(field_names)
+    code = _new_code_cache.get(num_fields)
+    if code is None:
+        # A tuple display rather than a call: calls take at most 255 arguments
+        args = ''.join('_%d, ' % index for index in range(num_fields))
+        namespace = {}
+        exec ('def __new__(_cls, %s):\n'
+              '    return _make(_cls, (%s))\n' % (args, args)) in namespace
+        code = _new_code_cache[num_fields] = namespace['__new__'].__code__
+    code = _CodeType(code.co_argcount, code.co_nlocals, code.co_stacksize,
+                     code.co_flags, code.co_code, code.co_consts,
+                     code.co_names, ('_cls',) + field_names,
+                     code.co_filename, code.co_name, code.co_firstlineno,
+                     code.co_lnotab, code.co_freevars, code.co_cellvars,
+                     code.co_kwonlyargcount)
+    func_globals = {'__name__': 'namedtuple_%s' % typename, '_make': make}
+    return _FunctionType(code, func_globals, '__new__')
+
 def namedtuple(typename, field_names, verbose=False, rename=False):
     """Returns a new subclass of tuple with named fields.
 
@@ -365,29 +423,70 @@ def namedtuple(typename, field_names, verbose=False, rename=False):
             raise ValueError('Encountered duplicate field name: %r' % name)
         seen.add(name)
 
-    # Fill-in the class template
-    class_definition = _class_template.format(
-        typename = typename,
-        field_names = tuple(field_names),
-        num_fields = len(field_names),
-        arg_list = repr(tuple(field_names)).replace("'", "")[1:-1],
-        repr_fmt = ', '.join(_repr_template.format(name=name)
-                             for name in field_names),
-        field_defs = '\n'.join(_field_template.format(index=index, name=name)
-                               for index, name in enumerate(field_names))
-    )
+    field_names = tuple(field_names)
+    arg_list = repr(field_names).replace("'", "")[1:-1]
+    repr_fmt = ', '.join(_repr_template.format(name=name)
+                         for name in field_names)
     if verbose:
-        print class_definition
+        print _class_template.format(
+            typename = typename,
+            field_names = field_names,
+            num_fields = len(field_names),
+            arg_list = arg_list,
+            repr_fmt = repr_fmt,
+            field_defs = '\n'.join(_field_template.format(index=index, name=name)
+                                   for index, name in enumerate(field_names))
+        )
+
+    # Build the class without an exec per class: _make and the fields are
+    # implemented in C, __new__ passes its arguments straight on to C, and
+    # the other methods close over the field names.
+    repr_fmt = '%s(%s)' % (typename, repr_fmt)
 
-    # Execute the template string in a temporary namespace and support
-    # tracing utilities by setting a value for frame.f_globals['__name__']
-    namespace = dict(_itemgetter=_itemgetter, __name__='namedtuple_%s' % typename,
-                     OrderedDict=OrderedDict, _property=property, _tuple=tuple)
-    try:
-        exec class_definition in namespace
-    except SyntaxError as e:
-        raise SyntaxError(e.message + ':\n' + class_definition)
-    result = namespace[typename]
+    def __repr__(self):
+        'Return a nicely formatted representation string'
+        return repr_fmt % self
+
+    def _asdict(self):
+        'Return a new OrderedDict which maps field names to their values'
+        return OrderedDict(zip(self._fields, self))
+
+    def _replace(_self, **kwds):
+        result = _self._make(map(kwds.pop, field_names, _self))
+        if kwds:
+            raise ValueError('Got unexpected field names: %r' % kwds.keys())
+        return result
+
+    def __getnewargs__(self):
+        'Return self as a plain tuple.  Used by copy and pickle.'
+        return tuple(self)
+
+    def __getstate__(self):
+        'Exclude the OrderedDict from pickling'
+        pass
+
+    _replace.__doc__ = ('Return a new %s object replacing specified fields '
+                        'with new values' % typename)
+    _make = _tuplemaker(len(field_names))._make
+    __new__ = _new_function(typename, field_names, _make)
+    __new__.__doc__ = 'Create new instance of %s(%s)' % (typename, arg_list)
+    namespace = {
+        '__doc__': '%s(%s)' % (typename, arg_list),
+        '__slots__': (),
+        '_fields': field_names,
+        '__new__': __new__,
+        '_make': classmethod(_make),
+        '__repr__': __repr__,
+        '_asdict': _asdict,
+        '_replace': _replace,
+        '__getnewargs__': __getnewargs__,
+        '__dict__': property(_asdict),
+        '__getstate__': __getstate__,
+    }
+    for index, name in enumerate(field_names):
+        namespace[name] = _tuplegetter(index,
+                                       'Alias for field number %d' % index)
+    result = type(typename, (tuple,), namespace)
 
     # For pickling to work, the __module__ variable needs to be set to the frame
     # where the named tuple is created.  Bypass this step in environments where
@@ -4,9 +4,11 @@
 __author__ = 'Brian Quinlan (brian@sweetapp.com)'
 
 import collections
+import itertools
 import logging
 import threading
 import time
+import weakref
 
 FIRST_COMPLETED = 'FIRST_COMPLETED'
 FIRST_EXCEPTION = 'FIRST_EXCEPTION'
@@ -54,6 +56,11 @@ class TimeoutError(Error):
     """The operation exceeded the given deadline."""
     pass
 
+class BrokenExecutor(RuntimeError):
+    """
+    Raised when a executor has become non-functional after a severe failure.
+    """
+
 class _Waiter(object):
     """Provides the event that wait() and as_completed() block on."""
     def __init__(self):
@@ -507,6 +514,16 @@ class Future(object):
             self._condition.notify_all()
         self._invoke_callbacks()
 
+def _result_or_cancel(fut, timeout=None):
+    try:
+        try:
+            return fut.result(timeout)
+        finally:
+            fut.cancel()
+    finally:
+        # Break a reference cycle with the exception in self._exception
+        del fut
+
 class Executor(object):
     """This is an abstract base class for concrete asynchronous executors."""
 
@@ -521,7 +538,7 @@ class Executor(object):
         """
         raise NotImplementedError()
 
-    def map(self, fn, *iterables, timeout=None, chunksize=1):
+    def map(self, fn, *iterables, timeout=None, chunksize=1, buffersize=None):
         """Returns an iterator equivalent to map(fn, iter).
 
         Args:
@@ -533,6 +550,11 @@ class Executor(object):
                 before being passed to a child process. This argument is only
                 used by ProcessPoolExecutor; it is ignored by
                 ThreadPoolExecutor.
+            buffersize: The number of submitted tasks whose results have not
+                yet been yielded. If the buffer is full, iteration over the
+                iterables pauses until a result is yielded from the buffer.
+                If None, all input elements are eagerly collected, and a task
+                is submitted for each.
 
         Returns:
             An iterator equivalent to: map(func, *iterables) but the calls may
@@ -543,20 +565,45 @@ class Executor(object):
                 before the given timeout.
             Exception: If fn(*args) raises for any values.
         """
+        if buffersize is not None:
+            if not isinstance(buffersize, (int, long)):
+                raise TypeError("buffersize must be an integer or None")
+            if buffersize < 1:
+                raise ValueError("buffersize must be None or > 0")
+
         if timeout is not None:
             end_time = timeout + time.time()
 
-        fs = [self.submit(fn, *args) for args in zip(*iterables)]
+        zipped_iterables = itertools.izip(*iterables)
+        if buffersize is not None:
+            fs = collections.deque(
+                self.submit(fn, *args)
+                for args in itertools.islice(zipped_iterables, buffersize))
+        else:
+            fs = collections.deque(
+                self.submit(fn, *args) for args in zipped_iterables)
+
+        # Only a weak reference is kept so that the executor can be garbage
+        # collected independently of a partially consumed result iterator.
+        executor_reference = weakref.ref(self)
 
         # Yield must be hidden in closure so that the futures are submitted
         # before the first iterator value is required.
         def result_iterator():
             try:
-                for future in fs:
+                while fs:
+                    if buffersize is not None:
+                        executor = executor_reference()
+                        if executor is not None:
+                            for args in itertools.islice(zipped_iterables, 1):
+                                fs.append(executor.submit(fn, *args))
+                        del executor
+                    # Careful not to keep a reference to the popped future
                     if timeout is None:
-                        yield future.result()
+                        yield _result_or_cancel(fs.popleft())
                     else:
-                        yield future.result(end_time - time.time())
+                        yield _result_or_cancel(fs.popleft(),
+                                                end_time - time.time())
             finally:
                 for future in fs:
                     future.cancel()
@@ -32,22 +32,27 @@ Local worker thread:
 - reads work ids from the "Work Ids" queue and looks up the corresponding
   WorkItem from the "Work Items" dict: if the work item has been cancelled then
   it is simply removed from the dict, otherwise it is repackaged as a
-  _CallItem and put in the "Call Q". New _CallItems are put in the "Call Q"
-  until "Call Q" is full. NOTE: the size of the "Call Q" is kept small because
-  calls placed in the "Call Q" can no longer be cancelled with Future.cancel().
-- reads _ResultItems from "Result Q", updates the future stored in the
-  "Work Items" dict and deletes the dict entry
+  _CallItem and put in the "Call Q". When many work ids are waiting, several
+  _CallItems are put in the "Call Q" as a single batch so that they are
+  pickled and written to the pipe in one go. New batches are put in the
+  "Call Q" until "Call Q" is full. NOTE: the size of the "Call Q" is kept
+  small because calls placed in the "Call Q" can no longer be cancelled with
+  Future.cancel().
+- reads batches of _ResultItems from "Result Q", updates the futures stored
+  in the "Work Items" dict and deletes the dict entries
 
 Process #1..n:
-- reads _CallItems from "Call Q", executes the calls, and puts the resulting
-  _ResultItems in "Result Q"
+- reads batches of _CallItems from "Call Q", executes the calls, and puts the
+  resulting _ResultItems in "Result Q", also in batches
 """
 
 __author__ = 'Brian Quinlan (brian@sweetapp.com)'
 
 import atexit
 import os
+import signal
 import sys
+import time
 from concurrent.futures import _base
 import Queue as queue
 from Queue import Full
@@ -92,6 +97,16 @@ def _python_exit():
 # (Futures in the call queue cannot be cancelled).
 EXTRA_QUEUED_CALLS = 1
 
+# Controls how many calls are sent to a worker process in a single batch. The
+# batch size grows with the number of pending calls, up to this limit, so that
+# small tasks don't pay for one pipe write each while long tasks still get
+# spread evenly between the worker processes.
+MAX_CALL_BATCH_SIZE = 32
+
+# The maximum number of seconds a worker process holds on to finished results
+# of a batch before sending them back to the parent process.
+RESULT_FLUSH_INTERVAL = 0.1
+
 class _WorkItem(object):
     def __init__(self, future, fn, args, kwargs):
         self.future = future
@@ -132,36 +147,161 @@ def _process_chunk(fn, chunk):
     """
     return [fn(*args) for args in chunk]
 
-def _process_worker(call_queue, result_queue):
+def _sendback_results(result_queue, result_items):
+    """Safely send back the given results to the parent process."""
+    try:
+        result_queue.put(result_items)
+    except BaseException:
+        # Some result could not be pickled: send the items one at a time so
+        # that only the futures whose result can't be sent fail.
+        for result_item in result_items:
+            try:
+                result_queue.put([result_item])
+            except BaseException as e:
+                result_queue.put([_ResultItem(result_item.work_id,
+                                              exception=e)])
+
+def _process_worker(call_queue, result_queue, initializer, initargs,
+                    max_tasks=None):
     """Evaluates calls from call_queue and places the results in result_queue.
 
     This worker is run in a separate process.
 
     Args:
-        call_queue: A multiprocessing.Queue of _CallItems that will be read and
-            evaluated by the worker.
-        result_queue: A multiprocessing.Queue of _ResultItems that will written
-            to by the worker.
-        shutdown: A multiprocessing.Event that will be set as a signal to the
-            worker that it should exit when call_queue is empty.
+        call_queue: A multiprocessing.Queue of lists of _CallItems that will be
+            read and evaluated by the worker.
+        result_queue: A multiprocessing.Queue of lists of _ResultItems that
+            will written to by the worker.
+        initializer: A callable initializer, or None
+        initargs: A tuple of args for the initializer
+        max_tasks: The number of calls after which the worker exits, or None
+            if the worker never exits on its own.
     """
+    if initializer is not None:
+        try:
+            initializer(*initargs)
+        except BaseException:
+            _base.LOGGER.critical('Exception in initializer:', exc_info=True)
+            # The parent will notice that the process stopped and
+            # mark the pool broken. A _WorkerSpawner needs the exit code
+            # to tell this from a worker that exited after max_tasks calls.
+            sys.exit(1)
+    num_tasks = 0
     while True:
-        call_item = call_queue.get(block=True)
-        if call_item is None:
+        call_items = call_queue.get(block=True)
+        if call_items is None:
             # Wake up queue management thread
             result_queue.put(os.getpid())
             return
+        result_items = []
+        last_flush = time.time()
+        for call_item in call_items:
+            try:
+                r = call_item.fn(*call_item.args, **call_item.kwargs)
+            except BaseException as e:
+                result_items.append(_ResultItem(call_item.work_id,
+                                                exception=e))
+            else:
+                result_items.append(_ResultItem(call_item.work_id,
+                                                result=r))
+            # Delete references to object. See issue16284
+            del call_item
+            now = time.time()
+            if now - last_flush >= RESULT_FLUSH_INTERVAL:
+                _sendback_results(result_queue, result_items)
+                result_items = []
+                last_flush = now
+        if result_items:
+            _sendback_results(result_queue, result_items)
+        num_tasks += len(call_items)
+        del call_items, result_items
+        if max_tasks is not None and num_tasks >= max_tasks:
+            # Let the queue management thread know that this worker is gone
+            result_queue.put(os.getpid())
+            return
+
+def _start_process(call_queue, result_queue, initializer, initargs,
+                   max_tasks):
+    """Starts a worker process running _process_worker and returns it."""
+    p = multiprocessing.Process(
+            target=_process_worker,
+            args=(call_queue,
+                  result_queue,
+                  initializer,
+                  initargs,
+                  max_tasks))
+    p.start()
+    return p
+
+class _WorkerSpawner(multiprocessing.Process):
+    """Keeps max_workers worker processes running when they are recycled.
+
+    Workers exit after max_tasks_per_child calls. Forking their replacements
+    from the queue management thread could deadlock the child, if another
+    thread held a lock (of the logging module, say) at the time of the fork.
+    So this single-threaded process, forked once by submit(), starts the
+    workers instead: a replacement only after a worker has exited, so that no
+    more than max_workers are alive at once.
+
+    The spawner and its workers form a process group. If a worker terminates
+    abruptly the spawner kills the whole group, and the parent sees the
+    spawner exit as it would see a plain worker die.
+    """
+
+    def __init__(self, max_workers, start_process):
+        multiprocessing.Process.__init__(self)
+        self.max_workers = max_workers
+        self._start_worker = start_process
+        self._stop_reader, self._stop_writer = multiprocessing.Pipe(
+            duplex=False)
+
+    def start(self):
+        multiprocessing.Process.start(self)
+        self._stop_reader.close()
+
+    def stop(self):
+        """Tells the spawner not to replace the workers anymore."""
         try:
-            r = call_item.fn(*call_item.args, **call_item.kwargs)
-        except BaseException as e:
-            result_queue.put(_ResultItem(call_item.work_id, exception=e))
-        else:
-            result_queue.put(_ResultItem(call_item.work_id,
-                                         result=r))
+            self._stop_writer.send(None)
+        except (IOError, OSError):
+            # The spawner is gone already
+            pass
+
+    def terminate(self):
+        try:
+            os.killpg(self.pid, signal.SIGTERM)
+        except OSError:
+            # The process group doesn't exist yet
+            multiprocessing.Process.terminate(self)
+
+    def run(self):
+        os.setpgrp()
+        self._stop_writer.close()
+        workers = {}
+        stopping = False
+        while True:
+            while not stopping and len(workers) < self.max_workers:
+                p = self._start_worker()
+                workers[p.sentinel] = p
+            if not workers:
+                return
+            waitables = list(workers)
+            if not stopping:
+                # Also ready when the parent process is gone
+                waitables.append(self._stop_reader)
+            for ready in wait(waitables):
+                if ready is self._stop_reader:
+                    stopping = True
+                    continue
+                p = workers.pop(ready)
+                p.join()
+                if p.exitcode:
+                    os.killpg(0, signal.SIGTERM)
 
 def _add_call_item_to_queue(pending_work_items,
                             work_ids,
-                            call_queue):
+                            call_queue,
+                            batch_size=1):
     """Fills call_queue with _WorkItems from pending_work_items.
 
     This function never blocks.
@@ -173,35 +313,40 @@ def _add_call_item_to_queue(pending_work_items,
             are consumed and the corresponding _WorkItems from
             pending_work_items are transformed into _CallItems and put in
             call_queue.
-        call_queue: A multiprocessing.Queue that will be filled with _CallItems
-            derived from _WorkItems.
+        call_queue: A multiprocessing.Queue that will be filled with lists of
+            _CallItems derived from _WorkItems.
+        batch_size: The maximum number of _CallItems put in call_queue at
+            once. Fewer are put when few work ids are waiting.
     """
     while True:
         if call_queue.full():
             return
-        try:
-            work_id = work_ids.get(block=False)
-        except queue.Empty:
-            return
-        else:
+        call_items = []
+        while len(call_items) < batch_size:
+            try:
+                work_id = work_ids.get(block=False)
+            except queue.Empty:
+                break
             work_item = pending_work_items[work_id]
 
             if work_item.future.set_running_or_notify_cancel():
-                call_queue.put(_CallItem(work_id,
-                                         work_item.fn,
-                                         work_item.args,
-                                         work_item.kwargs),
-                               block=True)
+                call_items.append(_CallItem(work_id,
+                                            work_item.fn,
+                                            work_item.args,
+                                            work_item.kwargs))
             else:
                 del pending_work_items[work_id]
-                continue
+        if not call_items:
+            return
+        call_queue.put(call_items, block=True)
 
 def _queue_management_worker(executor_reference,
                              processes,
                              pending_work_items,
                              work_ids_queue,
                              call_queue,
-                             result_queue):
+                             result_queue,
+                             max_batch_size=MAX_CALL_BATCH_SIZE):
     """Manages the communication between this process and the worker processes.
 
     This function is run in a local thread.
@@ -219,6 +364,8 @@ def _queue_management_worker(executor_reference,
             derived from _WorkItems for processing by the process workers.
         result_queue: A multiprocessing.Queue of _ResultItems generated by the
             process workers.
+        max_batch_size: The maximum number of _CallItems sent to a process
+            worker at once.
     """
     executor = None
 
@@ -227,7 +374,16 @@ def _queue_management_worker(executor_reference,
 
     def shutdown_worker():
         # This is an upper bound
-        nb_children_alive = sum(p.is_alive() for p in processes.values())
+        nb_children_alive = 0
+        for p in processes.values():
+            if not p.is_alive():
+                continue
+            if isinstance(p, _WorkerSpawner):
+                # Each of its workers gets a sentinel below
+                p.stop()
+                nb_children_alive += p.max_workers
+            else:
+                nb_children_alive += 1
         for i in range(0, nb_children_alive):
             call_queue.put_nowait(None)
         # Release the queue's resources as soon as possible.
@@ -240,9 +396,13 @@ def _queue_management_worker(executor_reference,
     reader = result_queue._reader
 
     while True:
+        # Share the waiting calls between the workers
+        batch_size = work_ids_queue.qsize() // max(len(processes), 1)
+        batch_size = max(1, min(batch_size, max_batch_size))
         _add_call_item_to_queue(pending_work_items,
                                 work_ids_queue,
-                                call_queue)
+                                call_queue,
+                                batch_size)
 
         sentinels = [p.sentinel for p in processes.values()]
         assert sentinels
@@ -274,24 +434,30 @@ def _queue_management_worker(executor_reference,
             shutdown_worker()
             return
         if isinstance(result_item, int):
-            # Clean shutdown of a worker using its PID
-            # (avoids marking the executor broken)
-            assert shutting_down()
-            p = processes.pop(result_item)
-            p.join()
-            if not processes:
+            # Clean shutdown of a worker using its PID, on shutdown or after
+            # max_tasks_per_child calls (avoids marking the executor broken).
+            # The workers of a _WorkerSpawner are not in processes.
+            p = processes.pop(result_item, None)
+            if p is not None:
+                p.join()
+                del p
+            executor = executor_reference()
+            if shutting_down() and not processes:
                 shutdown_worker()
                 return
+            executor = None
         elif result_item is not None:
-            work_item = pending_work_items.pop(result_item.work_id, None)
-            # work_item can be None if another process terminated (see above)
-            if work_item is not None:
-                if result_item.exception:
-                    work_item.future.set_exception(result_item.exception)
-                else:
-                    work_item.future.set_result(result_item.result)
-                # Delete references to object. See issue16284
-                del work_item
+            for item in result_item:
+                work_item = pending_work_items.pop(item.work_id, None)
+                # work_item can be None if another process terminated
+                # (see above)
+                if work_item is not None:
+                    if item.exception:
+                        work_item.future.set_exception(item.exception)
+                    else:
+                        work_item.future.set_result(item.result)
+                    # Delete references to object. See issue16284
+                    del work_item
         # Check whether we should start shutting down.
         executor = executor_reference()
         # No more work items can be added if:
@@ -336,7 +502,7 @@ def _check_system_limits():
     raise NotImplementedError(_system_limited)
 
 
-class BrokenProcessPool(RuntimeError):
+class BrokenProcessPool(_base.BrokenExecutor):
     """
     Raised when a process in a ProcessPoolExecutor terminated abruptly
     while a future was in the running state.
@@ -344,13 +510,20 @@ class BrokenProcessPool(RuntimeError):
 
 
 class ProcessPoolExecutor(_base.Executor):
-    def __init__(self, max_workers=None):
+    def __init__(self, max_workers=None, initializer=None, initargs=(),
+                 max_tasks_per_child=None):
         """Initializes a new ProcessPoolExecutor instance.
 
         Args:
             max_workers: The maximum number of processes that can be used to
                 execute the given calls. If None or not given then as many
                 worker processes will be created as the machine has processors.
+            initializer: A callable used to initialize worker processes.
+            initargs: A tuple of arguments to pass to the initializer.
+            max_tasks_per_child: The maximum number of calls a worker process
+                can make before it will exit and be replaced with a fresh
+                worker process. The default of None means worker process will
+                live as long as the executor.
         """
         _check_system_limits()
 
@@ -362,6 +535,22 @@ class ProcessPoolExecutor(_base.Executor):
 
             self._max_workers = max_workers
 
+        if initializer is not None and not callable(initializer):
+            raise TypeError("initializer must be a callable")
+
+        if max_tasks_per_child is not None:
+            if not isinstance(max_tasks_per_child, (int, long)):
+                raise TypeError("max_tasks_per_child must be an integer")
+            elif max_tasks_per_child <= 0:
+                raise ValueError("max_tasks_per_child must be >= 1")
+        self._max_tasks_per_child = max_tasks_per_child
+        # Calls are not batched when worker processes are recycled, so that
+        # no worker makes more calls than allowed.
+        if max_tasks_per_child is None:
+            self._max_batch_size = MAX_CALL_BATCH_SIZE
+        else:
+            self._max_batch_size = 1
+
         # Make the call queue slightly larger than the number of processes to
         # prevent the worker processes from idling. But don't make it too big
         # because futures in the call queue cannot be cancelled.
@@ -373,6 +562,12 @@ class ProcessPoolExecutor(_base.Executor):
         self._call_queue._ignore_epipe = True
         self._result_queue = SimpleQueue()
         self._work_ids = queue.Queue()
+        self._start_process = partial(_start_process,
+                                      self._call_queue,
+                                      self._result_queue,
+                                      initializer,
+                                      initargs,
+                                      max_tasks_per_child)
         self._queue_management_thread = None
         # Map of pids to processes
         self._processes = {}
@@ -399,17 +594,20 @@ class ProcessPoolExecutor(_base.Executor):
                           self._pending_work_items,
                           self._work_ids,
                           self._call_queue,
-                          self._result_queue))
+                          self._result_queue,
+                          self._max_batch_size))
             self._queue_management_thread.daemon = True
             self._queue_management_thread.start()
             _threads_queues[self._queue_management_thread] = self._result_queue
 
     def _adjust_process_count(self):
-        for _ in range(len(self._processes), self._max_workers):
-            p = multiprocessing.Process(
-                    target=_process_worker,
-                    args=(self._call_queue,
-                          self._result_queue))
+        if self._max_tasks_per_child is None:
+            for _ in range(len(self._processes), self._max_workers):
+                p = self._start_process()
+                self._processes[p.pid] = p
+        elif not self._processes:
+            # The workers are recycled: start them from a _WorkerSpawner
+            p = _WorkerSpawner(self._max_workers, self._start_process)
             p.start()
             self._processes[p.pid] = p
 
@@ -434,7 +632,7 @@ class ProcessPoolExecutor(_base.Executor):
             return f
     submit.__doc__ = _base.Executor.submit.__doc__
 
-    def map(self, fn, *iterables, timeout=None, chunksize=1):
+    def map(self, fn, *iterables, timeout=None, chunksize=1, buffersize=None):
         """Returns an iterator equivalent to map(fn, iter).
 
         Args:
@@ -445,6 +643,11 @@ class ProcessPoolExecutor(_base.Executor):
             chunksize: If greater than one, the iterables will be chopped into
                 chunks of size chunksize and submitted to the process pool.
                 If set to one, the items in the list will be sent one at a time.
+            buffersize: The number of submitted chunks whose results have not
+                yet been yielded. If the buffer is full, iteration over the
+                iterables pauses until a result is yielded from the buffer.
+                If None, all input elements are eagerly collected, and a task
+                is submitted for each chunk.
 
         Returns:
             An iterator equivalent to: map(func, *iterables) but the calls may
@@ -460,7 +663,8 @@ class ProcessPoolExecutor(_base.Executor):
 
         results = super(ProcessPoolExecutor, self).map(partial(_process_chunk, fn),
                               _get_chunks(*iterables, chunksize=chunksize),
-                              timeout=timeout)
+                              timeout=timeout,
+                              buffersize=buffersize)
         return itertools.chain.from_iterable(results)
 
     def shutdown(self, wait=True):
@@ -477,6 +681,7 @@ class ProcessPoolExecutor(_base.Executor):
         self._call_queue = None
         self._result_queue = None
         self._processes = None
+        self._start_process = None
     shutdown.__doc__ = _base.Executor.shutdown.__doc__
 
 atexit.register(_python_exit)
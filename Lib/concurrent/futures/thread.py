@@ -7,6 +7,7 @@ __author__ = 'Brian Quinlan (brian@sweetapp.com)'
 
 import atexit
 from concurrent.futures import _base
+import itertools
 import Queue as queue
 import threading
 import weakref
@@ -58,14 +59,40 @@ class _WorkItem(object):
         else:
             self.future.set_result(result)
 
-def _worker(executor_reference, work_queue):
+def _worker(executor_reference, work_queue, initializer, initargs,
+            idle_timeout):
+    if initializer is not None:
+        try:
+            initializer(*initargs)
+        except BaseException:
+            _base.LOGGER.critical('Exception in initializer:', exc_info=True)
+            executor = executor_reference()
+            if executor is not None:
+                executor._initializer_failed()
+            return
     try:
         while True:
-            work_item = work_queue.get(block=True)
+            try:
+                work_item = work_queue.get(block=True, timeout=idle_timeout)
+            except queue.Empty:
+                # The worker has been idle for idle_timeout seconds: let it
+                # exit, unless the executor still needs it.
+                executor = executor_reference()
+                if executor is None or executor._retire_idle_worker():
+                    return
+                del executor
+                continue
             if work_item is not None:
                 work_item.run()
                 # Delete references to object. See issue16284
                 del work_item
+
+                # The worker is idle again: allow submit() to reuse it
+                # instead of starting a new thread.
+                executor = executor_reference()
+                if executor is not None:
+                    executor._idle_semaphore.release()
+                del executor
                 continue
             executor = executor_reference()
             # Exit if:
@@ -73,6 +100,10 @@ def _worker(executor_reference, work_queue):
             #   - The executor that owns the worker has been collected OR
             #   - The executor that owns the worker has been shutdown.
             if _shutdown or executor is None or executor._shutdown:
+                # Flag the executor as shutting down as early as possible if
+                # it is not gc-ed yet.
+                if executor is not None:
+                    executor._shutdown = True
                 # Notice other workers
                 work_queue.put(None)
                 return
@@ -80,31 +111,68 @@ def _worker(executor_reference, work_queue):
     except BaseException:
         _base.LOGGER.critical('Exception in worker', exc_info=True)
 
+class BrokenThreadPool(_base.BrokenExecutor):
+    """
+    Raised when a worker thread in a ThreadPoolExecutor failed initializing.
+    """
+
 class ThreadPoolExecutor(_base.Executor):
-    def __init__(self, max_workers=None):
+
+    # Used to assign unique thread names when thread_name_prefix is not supplied.
+    _counter = itertools.count().next
+
+    def __init__(self, max_workers=None, thread_name_prefix='',
+                 initializer=None, initargs=(), idle_timeout=None):
         """Initializes a new ThreadPoolExecutor instance.
 
         Args:
             max_workers: The maximum number of threads that can be used to
                 execute the given calls.
+            thread_name_prefix: An optional name prefix to give our threads.
+            initializer: A callable used to initialize worker threads.
+            initargs: A tuple of arguments to pass to the initializer.
+            idle_timeout: The number of seconds after which a worker thread
+                that has had no work to do exits, shrinking the pool.  If
+                None, workers live until the executor is shut down.
         """
         if max_workers is None:
-            # Use this number because ThreadPoolExecutor is often
-            # used to overlap I/O instead of CPU work.
-            max_workers = (cpu_count() or 1) * 5
+            # ThreadPoolExecutor is often used to overlap I/O instead of CPU
+            # work, so allow more threads than CPUs, but cap the default: a
+            # large pool of threads just contends for the interpreter lock.
+            max_workers = min(32, (cpu_count() or 1) + 4)
         if max_workers <= 0:
             raise ValueError("max_workers must be greater than 0")
 
+        if initializer is not None and not callable(initializer):
+            raise TypeError("initializer must be a callable")
+
+        if idle_timeout is not None and idle_timeout <= 0:
+            raise ValueError("idle_timeout must be greater than 0")
+
         self._max_workers = max_workers
         self._work_queue = queue.Queue()
+        self._idle_semaphore = threading.Semaphore(0)
         self._threads = set()
+        self._thread_counter = itertools.count()
+        self._broken = False
         self._shutdown = False
         self._shutdown_lock = threading.Lock()
+        self._thread_name_prefix = (thread_name_prefix or
+                                    ("ThreadPoolExecutor-%d" % self._counter()))
+        self._initializer = initializer
+        self._initargs = initargs
+        self._idle_timeout = idle_timeout
 
     def submit(self, fn, *args, **kwargs):
         with self._shutdown_lock:
+            if self._broken:
+                raise BrokenThreadPool(self._broken)
+
             if self._shutdown:
                 raise RuntimeError('cannot schedule new futures after shutdown')
+            if _shutdown:
+                raise RuntimeError('cannot schedule new futures after '
+                                   'interpreter shutdown')
 
             f = _base.Future()
             w = _WorkItem(f, fn, args, kwargs)
@@ -115,26 +183,64 @@ class ThreadPoolExecutor(_base.Executor):
     submit.__doc__ = _base.Executor.submit.__doc__
 
     def _adjust_thread_count(self):
+        # If an idle thread is available, it will pick up the work item.
+        if self._idle_semaphore.acquire(False):
+            return
+
         # When the executor gets lost, the weakref callback will wake up
         # the worker threads.
         def weakref_cb(_, q=self._work_queue):
             q.put(None)
-        # TODO(bquinlan): Should avoid creating new threads if there are more
-        # idle threads than items in the work queue.
+
         if len(self._threads) < self._max_workers:
-            t = threading.Thread(target=_worker,
+            # Idle workers retire, so len(self._threads) could give a new
+            # thread the name of a live one.
+            thread_name = '%s_%d' % (self._thread_name_prefix,
+                                     next(self._thread_counter))
+            t = threading.Thread(name=thread_name, target=_worker,
                                  args=(weakref.ref(self, weakref_cb),
-                                       self._work_queue))
+                                       self._work_queue,
+                                       self._initializer,
+                                       self._initargs,
+                                       self._idle_timeout))
             t.daemon = True
             t.start()
             self._threads.add(t)
             _threads_queues[t] = self._work_queue
 
+    def _retire_idle_worker(self):
+        # Called by a worker whose idle_timeout expired.  Holding the
+        # shutdown lock keeps submit() from counting on this worker while
+        # it leaves; it may only leave if no work is queued and it can take
+        # back an idle token.  Return True if the worker should exit.
+        with self._shutdown_lock:
+            if self._shutdown or not self._work_queue.empty():
+                return False
+            if not self._idle_semaphore.acquire(False):
+                return False
+            t = threading.current_thread()
+            self._threads.discard(t)
+            _threads_queues.pop(t, None)
+            return True
+
+    def _initializer_failed(self):
+        with self._shutdown_lock:
+            self._broken = ('A thread initializer failed, the thread pool '
+                            'is not usable anymore')
+            # Drain work queue and mark pending futures failed
+            while True:
+                try:
+                    work_item = self._work_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if work_item is not None:
+                    work_item.future.set_exception(BrokenThreadPool(self._broken))
+
     def shutdown(self, wait=True):
         with self._shutdown_lock:
             self._shutdown = True
             self._work_queue.put(None)
         if wait:
-            for t in self._threads:
+            for t in list(self._threads):
                 t.join()
     shutdown.__doc__ = _base.Executor.shutdown.__doc__
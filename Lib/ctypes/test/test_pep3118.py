@@ -17,6 +17,15 @@ def normalize(format):
     format = format.replace(OTHER_ENDIAN, THIS_ENDIAN)
     return re.sub(r"\s", "", format)
 
+def c_strides(shape, itemsize):
+    if shape is None:
+        return None
+    strides = []
+    for dim in reversed(shape):
+        strides.insert(0, itemsize)
+        itemsize *= dim
+    return tuple(strides)
+
 class Test(unittest.TestCase):
 
     def test_native_types(self):
@@ -31,8 +40,9 @@ class Test(unittest.TestCase):
                     self.assertEqual(len(v) * sizeof(itemtp), sizeof(ob))
                 self.assertEqual(v.itemsize, sizeof(itemtp))
                 self.assertEqual(v.shape, shape)
-                # ctypes object always have a non-strided memory block
-                self.assertEqual(v.strides, None)
+                # ctypes object always have a non-strided memory block, for
+                # which memoryview reconstructs C-contiguous strides
+                self.assertEqual(v.strides, c_strides(v.shape, v.itemsize))
                 # they are always read/write
                 self.assertFalse(v.readonly)
 
@@ -58,8 +68,9 @@ class Test(unittest.TestCase):
                     self.assertEqual(len(v) * sizeof(itemtp), sizeof(ob))
                 self.assertEqual(v.itemsize, sizeof(itemtp))
                 self.assertEqual(v.shape, shape)
-                # ctypes object always have a non-strided memory block
-                self.assertEqual(v.strides, None)
+                # ctypes object always have a non-strided memory block, for
+                # which memoryview reconstructs C-contiguous strides
+                self.assertEqual(v.strides, c_strides(v.shape, v.itemsize))
                 # they are always read/write
                 self.assertFalse(v.readonly)
 
@@ -375,6 +375,9 @@ class Underflow(Inexact, Rounded, Subnormal):
 _signals = [Clamped, DivisionByZero, Inexact, Overflow, Rounded,
            Underflow, InvalidOperation, Subnormal]
 
+# Signals whose handle() does nothing beyond the flag being set
+_flag_only_signals = frozenset([Clamped, Inexact, Rounded, Subnormal])
+
 # Map conditions (per the spec) to signals
 _condition_map = {ConversionSyntax:InvalidOperation,
                   DivisionImpossible:InvalidOperation,
@@ -813,13 +816,15 @@ class Decimal(object):
                 return 1
 
         # check for zeros;  Decimal('0') == Decimal('-0')
-        if not self:
-            if not other:
+        self_int = self._int
+        other_int = other._int
+        if self_int == '0':
+            if other_int == '0':
                 return 0
             else:
-                return -((-1)**other._sign)
-        if not other:
-            return (-1)**self._sign
+                return 1 if other._sign else -1
+        if other_int == '0':
+            return -1 if self._sign else 1
 
         # If different signs, neg one is less
         if other._sign < self._sign:
@@ -827,21 +832,21 @@ class Decimal(object):
         if self._sign < other._sign:
             return 1
 
-        self_adjusted = self.adjusted()
-        other_adjusted = other.adjusted()
+        # same sign; compare the magnitudes, then flip for negatives
+        self_exp = self._exp
+        other_exp = other._exp
+        self_adjusted = self_exp + len(self_int)
+        other_adjusted = other_exp + len(other_int)
         if self_adjusted == other_adjusted:
-            self_padded = self._int + '0'*(self._exp - other._exp)
-            other_padded = other._int + '0'*(other._exp - self._exp)
-            if self_padded == other_padded:
+            if self_exp != other_exp:
+                self_int = self_int + '0'*(self_exp - other_exp)
+                other_int = other_int + '0'*(other_exp - self_exp)
+            if self_int == other_int:
                 return 0
-            elif self_padded < other_padded:
-                return -(-1)**self._sign
-            else:
-                return (-1)**self._sign
-        elif self_adjusted > other_adjusted:
-            return (-1)**self._sign
-        else: # self_adjusted < other_adjusted
-            return -((-1)**self._sign)
+            result = -1 if self_int < other_int else 1
+        else:
+            result = 1 if self_adjusted > other_adjusted else -1
+        return -result if self._sign else result
 
     # Note: The Decimal standard doesn't cover rich comparisons for
     # Decimals.  In particular, the specification is silent on the
@@ -864,7 +869,8 @@ class Decimal(object):
         other = _convert_other(other, allow_float=True)
         if other is NotImplemented:
             return other
-        if self._check_nans(other, context):
+        if ((self._is_special or other._is_special) and
+            self._check_nans(other, context)):
             return False
         return self._cmp(other) == 0
 
@@ -872,7 +878,8 @@ class Decimal(object):
         other = _convert_other(other, allow_float=True)
         if other is NotImplemented:
             return other
-        if self._check_nans(other, context):
+        if ((self._is_special or other._is_special) and
+            self._check_nans(other, context)):
             return True
         return self._cmp(other) != 0
 
@@ -880,8 +887,8 @@ class Decimal(object):
         other = _convert_other(other, allow_float=True)
         if other is NotImplemented:
             return other
-        ans = self._compare_check_nans(other, context)
-        if ans:
+        if ((self._is_special or other._is_special) and
+            self._compare_check_nans(other, context)):
             return False
         return self._cmp(other) < 0
 
@@ -889,8 +896,8 @@ class Decimal(object):
         other = _convert_other(other, allow_float=True)
         if other is NotImplemented:
             return other
-        ans = self._compare_check_nans(other, context)
-        if ans:
+        if ((self._is_special or other._is_special) and
+            self._compare_check_nans(other, context)):
             return False
         return self._cmp(other) <= 0
 
@@ -898,8 +905,8 @@ class Decimal(object):
         other = _convert_other(other, allow_float=True)
         if other is NotImplemented:
             return other
-        ans = self._compare_check_nans(other, context)
-        if ans:
+        if ((self._is_special or other._is_special) and
+            self._compare_check_nans(other, context)):
             return False
         return self._cmp(other) > 0
 
@@ -907,8 +914,8 @@ class Decimal(object):
         other = _convert_other(other, allow_float=True)
         if other is NotImplemented:
             return other
-        ans = self._compare_check_nans(other, context)
-        if ans:
+        if ((self._is_special or other._is_special) and
+            self._compare_check_nans(other, context)):
             return False
         return self._cmp(other) >= 0
 
@@ -958,23 +965,34 @@ class Decimal(object):
                 else:
                     return 314159
 
-        # In Python 2.7, we're allowing comparisons (but not
-        # arithmetic operations) between floats and Decimals;  so if
-        # a Decimal instance is exactly representable as a float then
-        # its hash should match that of the float.
-        self_as_float = float(self)
-        if Decimal.from_float(self_as_float) == self:
-            return hash(self_as_float)
-
         if self._isinteger():
-            op = _WorkRep(self.to_integral_value())
             # to make computation feasible for Decimals with large
             # exponent, we use the fact that hash(n) == hash(m) for
             # any two nonzero integers n and m such that (i) n and m
             # have the same sign, and (ii) n is congruent to m modulo
             # 2**64-1.  So we can replace hash((-1)**s*c*10**e) with
-            # hash((-1)**s*c*pow(10, e, 2**64-1).
-            return hash((-1)**op.sign*op.int*pow(10, op.exp, 2**64-1))
+            # hash((-1)**s*c*pow(10, e, 2**64-1).  An integral float
+            # hashes like the equal integer, so no float check is needed.
+            exp = self._exp
+            if exp >= 0:
+                n = int(self._int)*pow(10, exp, 2**64-1)
+            else:
+                n = int(self._int[:exp] or '0')
+            return hash(-n if self._sign else n)
+
+        # In Python 2.7, we're allowing comparisons (but not
+        # arithmetic operations) between floats and Decimals;  so if
+        # a Decimal instance is exactly representable as a float then
+        # its hash should match that of the float.  That is only
+        # possible for c*10**-k if 5**k divides c, which rules out most
+        # Decimals without the float round trip; c < 10**len(c) bounds
+        # the size of 5**k we ever need to build.
+        k = -self._exp
+        if 2*k <= 3*len(self._int) and not int(self._int) % 5**k:
+            self_as_float = float(self)
+            if Decimal.from_float(self_as_float) == self:
+                return hash(self_as_float)
+
         # The value of a nonzero nonspecial Decimal instance is
         # faithfully represented by the triple consisting of its sign,
         # its adjusted exponent, and its coefficient with trailing
@@ -1170,40 +1188,40 @@ class Decimal(object):
             ans = ans._fix(context)
             return ans
 
-        op1 = _WorkRep(self)
-        op2 = _WorkRep(other)
-        op1, op2 = _normalize(op1, op2, context.prec)
-
-        result = _WorkRep()
-        if op1.sign != op2.sign:
-            # Equal and opposite
-            if op1.int == op2.int:
-                ans = _dec_from_triple(negativezero, '0', exp)
-                ans = ans._fix(context)
-                return ans
-            if op1.int < op2.int:
-                op1, op2 = op2, op1
-                # OK, now abs(op1) > abs(op2)
-            if op1.sign == 1:
-                result.sign = 1
-                op1.sign, op2.sign = op2.sign, op1.sign
-            else:
-                result.sign = 0
-                # So we know the sign, and op1 > 0.
-        elif op1.sign == 1:
-            result.sign = 1
-            op1.sign, op2.sign = (0, 0)
+        # Align the coefficients of tmp (the operand with the larger
+        # exponent) and other as signed integers and add them directly.
+        if self._exp < other._exp:
+            tmp, other = other, self
         else:
-            result.sign = 0
-        # Now, op1 > abs(op2) > 0
-
-        if op2.sign == 0:
-            result.int = op1.int + op2.int
+            tmp = self
+
+        # Let exp_min = min(tmp.exp - 1, tmp.adjusted() - precision - 1).
+        # Then adding 10**exp_min to tmp has the same effect (after
+        # rounding) as adding any positive quantity smaller than
+        # 10**exp_min; similarly for subtraction.  So if other is smaller
+        # than 10**exp_min we replace it with 10**exp_min.  This avoids
+        # tmp.exp - other.exp getting too large.
+        tmp_int = int(tmp._int)
+        other_int = int(other._int)
+        other_exp = other._exp
+        exp_min = tmp._exp + min(-1, len(tmp._int) - context.prec - 2)
+        if len(other._int) + other_exp - 1 < exp_min:
+            other_int = 1
+            other_exp = exp_min
+        tmp_int *= 10 ** (tmp._exp - other_exp)
+        if tmp._sign:
+            tmp_int = -tmp_int
+        if other._sign:
+            other_int = -other_int
+
+        result = tmp_int + other_int
+        if not result:
+            # Equal and opposite
+            ans = _dec_from_triple(negativezero, '0', exp)
+        elif result < 0:
+            ans = _dec_from_triple(1, str(-result), other_exp)
         else:
-            result.int = op1.int - op2.int
-
-        result.exp = op1.exp
-        ans = Decimal(result)
+            ans = _dec_from_triple(0, str(result), other_exp)
         ans = ans._fix(context)
         return ans
 
@@ -1263,7 +1281,7 @@ class Decimal(object):
         resultexp = self._exp + other._exp
 
         # Special case for multiplying by zero
-        if not self or not other:
+        if self._int == '0' or other._int == '0':
             ans = _dec_from_triple(resultsign, '0', resultexp)
             # Fixing in case the exponent is out of bounds
             ans = ans._fix(context)
@@ -1279,10 +1297,8 @@ class Decimal(object):
             ans = ans._fix(context)
             return ans
 
-        op1 = _WorkRep(self)
-        op2 = _WorkRep(other)
-
-        ans = _dec_from_triple(resultsign, str(op1.int * op2.int), resultexp)
+        ans = _dec_from_triple(resultsign, str(int(self._int) * int(other._int)),
+                               resultexp)
         ans = ans._fix(context)
 
         return ans
@@ -1315,24 +1331,24 @@ class Decimal(object):
                 return _dec_from_triple(sign, '0', context.Etiny())
 
         # Special cases for zeroes
-        if not other:
-            if not self:
+        if other._int == '0':
+            if self._int == '0':
                 return context._raise_error(DivisionUndefined, '0 / 0')
             return context._raise_error(DivisionByZero, 'x / 0', sign)
 
-        if not self:
+        if self._int == '0':
             exp = self._exp - other._exp
             coeff = 0
         else:
             # OK, so neither = 0, INF or NaN
             shift = len(other._int) - len(self._int) + context.prec + 1
             exp = self._exp - other._exp - shift
-            op1 = _WorkRep(self)
-            op2 = _WorkRep(other)
             if shift >= 0:
-                coeff, remainder = divmod(op1.int * 10**shift, op2.int)
+                coeff, remainder = divmod(int(self._int) * 10**shift,
+                                          int(other._int))
             else:
-                coeff, remainder = divmod(op1.int, op2.int * 10**-shift)
+                coeff, remainder = divmod(int(self._int),
+                                          int(other._int) * 10**-shift)
             if remainder:
                 # result is not exact; adjust to ensure correct rounding
                 if coeff % 5 == 0:
@@ -1653,10 +1669,23 @@ class Decimal(object):
                 # self is +/-Infinity; return unaltered
                 return Decimal(self)
 
+        # Fast path for the common case of a nonzero result that is
+        # representable as it stands: no rounding, no subnormal, no
+        # overflow and, if _clamp == 1, no fold down.  Decimals are
+        # immutable, so a Decimal needn't be copied.
+        prec = context.prec
+        exp = self._exp
+        exp_min = len(self._int) + exp - prec
+        Etop = context.Emax - prec + 1
+        if (context.Emin - prec < exp_min <= exp and exp_min <= Etop and
+                self._int != '0' and not (context._clamp and exp > Etop)):
+            if type(self) is Decimal:
+                return self
+            return Decimal(self)
+
         # if self is zero then exponent should be between Etiny and
         # Emax if _clamp==0, and between Etiny and Etop if _clamp==1.
-        Etiny = context.Etiny()
-        Etop = context.Etop()
+        Etiny = context.Emin - prec + 1
         if not self:
             exp_max = [context.Emax, Etop][context._clamp]
             new_exp = min(max(self._exp, Etiny), exp_max)
@@ -1668,7 +1697,6 @@ class Decimal(object):
 
         # exp_min is the smallest allowable exponent of the result,
         # equal to max(self.adjusted()-context.prec+1, Etiny)
-        exp_min = len(self._int) + self._exp - context.prec
         if exp_min > Etop:
             # overflow: exp_min > Etop iff self.adjusted() > Emax
             ans = context._raise_error(Overflow, 'above Emax', self._sign)
@@ -2455,11 +2483,11 @@ class Decimal(object):
             return context._raise_error(InvalidOperation,
                    'target exponent out of bounds in quantize')
 
-        if not self:
+        if self._int == '0':
             ans = _dec_from_triple(self._sign, '0', exp._exp)
             return ans._fix(context)
 
-        self_adjusted = self.adjusted()
+        self_adjusted = self._exp + len(self._int) - 1
         if self_adjusted > context.Emax:
             return context._raise_error(InvalidOperation,
                                         'exponent of quantize result too large for current context')
@@ -2468,7 +2496,8 @@ class Decimal(object):
                                         'quantize result has too many digits for current context')
 
         ans = self._rescale(exp._exp, rounding)
-        if ans.adjusted() > context.Emax:
+        ans_adjusted = ans._exp + len(ans._int) - 1
+        if ans_adjusted > context.Emax:
             return context._raise_error(InvalidOperation,
                                         'exponent of quantize result too large for current context')
         if len(ans._int) > context.prec:
@@ -2476,10 +2505,10 @@ class Decimal(object):
                                         'quantize result has too many digits for current context')
 
         # raise appropriate flags
-        if ans and ans.adjusted() < context.Emin:
+        if ans._int != '0' and ans_adjusted < context.Emin:
             context._raise_error(Subnormal)
         if ans._exp > self._exp:
-            if ans != self:
+            if ans._cmp(self):
                 context._raise_error(Inexact)
             context._raise_error(Rounded)
 
@@ -3864,7 +3893,10 @@ class Context(object):
 
         self.flags[error] = 1
         if not self.traps[error]:
-            # The errors define how to handle themselves.
+            # The errors define how to handle themselves; the ones that
+            # only set a flag don't need to be instantiated for that.
+            if condition in _flag_only_signals:
+                return None
             return condition().handle(self, *args)
 
         # Errors should only be risked on copies of the context
@@ -5463,34 +5495,6 @@ class _WorkRep(object):
 
 
 
-def _normalize(op1, op2, prec = 0):
-    """Normalizes op1, op2 to have the same exp and length of coefficient.
-
-    Done during addition.
-    """
-    if op1.exp < op2.exp:
-        tmp = op2
-        other = op1
-    else:
-        tmp = op1
-        other = op2
-
-    # Let exp = min(tmp.exp - 1, tmp.adjusted() - precision - 1).
-    # Then adding 10**exp to tmp has the same effect (after rounding)
-    # as adding any positive quantity smaller than 10**exp; similarly
-    # for subtraction.  So if other is smaller than 10**exp we replace
-    # it with 10**exp.  This avoids tmp.exp - other.exp getting too large.
-    tmp_len = len(str(tmp.int))
-    other_len = len(str(other.int))
-    exp = tmp.exp + min(-1, tmp_len - prec - 2)
-    if other_len + other.exp - 1 < exp:
-        other.int = 1
-        other.exp = exp
-
-    tmp.int *= 10 ** (tmp.exp - other.exp)
-    tmp.exp = other.exp
-    return op1, op2
-
 ##### Integer arithmetic functions used by ln, log10, exp and __pow__ #####
 
 # This function from Tim Peters was taken from here:
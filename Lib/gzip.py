@@ -16,22 +16,91 @@ FTEXT, FHCRC, FEXTRA, FNAME, FCOMMENT = 1, 2, 4, 8, 16
 
 READ, WRITE = 1, 2
 
+READ_BUFFER_SIZE = 128 * 1024
+
 def write32u(output, value):
     # The L format writes the bit pattern correctly whether signed
     # or unsigned.
     output.write(struct.pack("<L", value))
 
 def read32(input):
-    return struct.unpack("<I", input.read(4))[0]
-
-def open(filename, mode="rb", compresslevel=9):
-    """Shorthand for GzipFile(filename, mode, compresslevel).
-
-    The filename argument is required; mode defaults to 'rb'
-    and compresslevel defaults to 9.
+    return struct.unpack("<I", _read_exact(input, 4))[0]
+
+def _read_exact(fp, n):
+    '''Read exactly *n* bytes from `fp`
+
+    This method is required because fp may be unbuffered,
+    i.e. return short reads.
+    '''
+    data = fp.read(n)
+    while len(data) < n:
+        b = fp.read(n - len(data))
+        if not b:
+            raise IOError("Compressed file ended before the "
+                          "end-of-stream marker was reached")
+        data += b
+    return data
+
+def _compress_block(level, data, zdict, last):
+    # Compress one block of a parallel compressed member into raw deflate
+    # data which can be concatenated with that of the other blocks.  The
+    # block is primed with the end of the previous one, so little
+    # compression is lost, and ends on a byte boundary thanks to the sync
+    # flush.  Only the last block carries the final block marker.
+    args = [level, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, 0]
+    if zdict:
+        args.append(zdict)
+    compress = zlib.compressobj(*args)
+    return compress.compress(data) + compress.flush(
+        zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+def open(filename, mode="rb", compresslevel=9, threads=1):
+    """Shorthand for GzipFile(filename, mode, compresslevel, threads=threads).
+
+    The filename argument is required; mode defaults to 'rb',
+    compresslevel defaults to 9 and threads defaults to 1.
 
     """
-    return GzipFile(filename, mode, compresslevel)
+    return GzipFile(filename, mode, compresslevel, threads=threads)
+
+class _PaddedFile(object):
+    """Minimal read-only file object that prepends a string to the contents
+    of an actual file. Shouldn't be used outside of gzip.py, as it lacks
+    essential functionality."""
+
+    def __init__(self, f, prepend=''):
+        self._buffer = prepend
+        self._length = len(prepend)
+        self.file = f
+        self._read = 0
+
+    def read(self, size):
+        if self._read is None:
+            return self.file.read(size)
+        if self._read + size <= self._length:
+            read = self._read
+            self._read += size
+            return self._buffer[read:self._read]
+        else:
+            read = self._read
+            self._read = None
+            return self._buffer[read:] + \
+                   self.file.read(size-self._length+read)
+
+    def prepend(self, prepend=''):
+        # The prepended data is always the end of what was last read.
+        if self._read is None:
+            self._buffer = prepend
+        else:  # Assume data was read since the last prepend() call
+            self._read -= len(prepend)
+            return
+        self._length = len(self._buffer)
+        self._read = 0
+
+    def seek(self, off):
+        self._read = None
+        self._buffer = None
+        return self.file.seek(off)
 
 class GzipFile(io.BufferedIOBase):
     """The GzipFile class simulates most of the methods of a file object with
@@ -41,9 +110,10 @@ class GzipFile(io.BufferedIOBase):
 
     myfileobj = None
     max_read_chunk = 10 * 1024 * 1024   # 10Mb
+    parallel_block_size = 128 * 1024   # 128Kb
 
     def __init__(self, filename=None, mode=None,
-                 compresslevel=9, fileobj=None, mtime=None):
+                 compresslevel=9, fileobj=None, mtime=None, threads=1):
         """Constructor for the GzipFile class.
 
         At least one of fileobj and filename must be given a
@@ -80,6 +150,12 @@ class GzipFile(io.BufferedIOBase):
         return value of time.time() and of the st_mtime member of the
         object returned by os.stat().
 
+        When writing, threads can be set to a number greater than 1 to
+        compress the data in blocks of parallel_block_size bytes on that
+        many threads at the same time, like pigz does.  The result is an
+        ordinary gzip file, marginally larger than a serially compressed
+        one.
+
         """
 
         # Make sure we don't inadvertently enable universal newlines on the
@@ -115,6 +191,9 @@ class GzipFile(io.BufferedIOBase):
             self.name = filename
             # Starts small, scales exponentially
             self.min_readsize = 100
+            # Data which was read past the end of a member is pushed back
+            # here, so the underlying file never needs to be seekable.
+            self._fp = _PaddedFile(fileobj)
 
         elif mode[0:1] == 'w' or mode[0:1] == 'a':
             self.mode = WRITE
@@ -124,6 +203,15 @@ class GzipFile(io.BufferedIOBase):
                                              -zlib.MAX_WBITS,
                                              zlib.DEF_MEM_LEVEL,
                                              0)
+            self._compresslevel = compresslevel
+            self._pool = None
+            if threads > 1:
+                from concurrent.futures import ThreadPoolExecutor
+                import collections
+                self._pool = ThreadPoolExecutor(threads)
+                self._max_blocks = 2 * threads
+                self._blocks = collections.deque()
+                self._zdict = ''
         else:
             raise IOError, "Mode " + mode + " not supported"
 
@@ -191,37 +279,38 @@ class GzipFile(io.BufferedIOBase):
         self.size = 0
 
     def _read_gzip_header(self):
-        magic = self.fileobj.read(2)
+        # Returns False at the end of the file, where another member
+        # could have started.
+        fp = self._fp
+        magic = fp.read(2)
+        if magic == '':
+            return False
         if magic != '\037\213':
             raise IOError, 'Not a gzipped file'
-        method = ord( self.fileobj.read(1) )
+        method, flag, self.mtime = struct.unpack("<BBIxx",
+                                                 _read_exact(fp, 8))
         if method != 8:
             raise IOError, 'Unknown compression method'
-        flag = ord( self.fileobj.read(1) )
-        self.mtime = read32(self.fileobj)
-        # extraflag = self.fileobj.read(1)
-        # os = self.fileobj.read(1)
-        self.fileobj.read(2)
 
         if flag & FEXTRA:
             # Read & discard the extra field, if present
-            xlen = ord(self.fileobj.read(1))
-            xlen = xlen + 256*ord(self.fileobj.read(1))
-            self.fileobj.read(xlen)
+            xlen, = struct.unpack("<H", _read_exact(fp, 2))
+            _read_exact(fp, xlen)
         if flag & FNAME:
             # Read and discard a null-terminated string containing the filename
             while True:
-                s = self.fileobj.read(1)
+                s = fp.read(1)
                 if not s or s=='\000':
                     break
         if flag & FCOMMENT:
             # Read and discard a null-terminated string containing a comment
             while True:
-                s = self.fileobj.read(1)
+                s = fp.read(1)
                 if not s or s=='\000':
                     break
         if flag & FHCRC:
-            self.fileobj.read(2)     # Read & discard the 16-bit header CRC
+            _read_exact(fp, 2)     # Read & discard the 16-bit header CRC
+        return True
 
     def write(self,data):
         self._check_closed()
@@ -237,13 +326,54 @@ class GzipFile(io.BufferedIOBase):
             data = data.tobytes()
 
         if len(data) > 0:
-            self.fileobj.write(self.compress.compress(data))
+            if self._pool is None:
+                self.fileobj.write(self.compress.compress(data))
+            else:
+                self._write_parallel(data)
             self.size += len(data)
             self.crc = zlib.crc32(data, self.crc) & 0xffffffffL
             self.offset += len(data)
 
         return len(data)
 
+    def _write_parallel(self, data):
+        # Collect data until there is a whole block to hand to the pool.
+        self.writebuf.append(data)
+        self.bufsize += len(data)
+        if self.bufsize >= self.parallel_block_size:
+            data = ''.join(self.writebuf)
+            blocksize = self.parallel_block_size
+            end = len(data) - len(data) % blocksize
+            for start in xrange(0, end, blocksize):
+                self._submit_block(data[start:start + blocksize], False)
+            self.writebuf = [data[end:]]
+            self.bufsize = len(data) - end
+        # Write out the blocks which are ready, waiting for the oldest if
+        # too many are pending.
+        blocks = self._blocks
+        while blocks and (blocks[0].done() or
+                          len(blocks) > self._max_blocks):
+            self.fileobj.write(blocks.popleft().result())
+
+    def _submit_block(self, block, last):
+        self._blocks.append(self._pool.submit(_compress_block,
+                                              self._compresslevel, block,
+                                              self._zdict, last))
+        # Prime the next block with the end of this one, as deflate looks
+        # back at most 32Kb.
+        self._zdict = block[-32768:]
+
+    def _flush_parallel(self, fileobj, last):
+        # Compress whatever is left in the buffer and write out all the
+        # pending blocks in order.
+        if self.bufsize or last:
+            self._submit_block(''.join(self.writebuf), last)
+            self.writebuf = []
+            self.bufsize = 0
+        blocks = self._blocks
+        while blocks:
+            fileobj.write(blocks.popleft().result())
+
     def read(self, size=-1):
         self._check_closed()
         if self.mode != READ:
@@ -253,7 +383,7 @@ class GzipFile(io.BufferedIOBase):
         if self.extrasize <= 0 and self.fileobj is None:
             return ''
 
-        readsize = 1024
+        readsize = READ_BUFFER_SIZE
         if size < 0:        # get the whole thing
             try:
                 while True:
@@ -281,36 +411,32 @@ class GzipFile(io.BufferedIOBase):
         self.extrasize = len(buf) + self.extrasize
         self.offset -= len(buf)
 
-    def _read(self, size=1024):
+    def _read(self, size=READ_BUFFER_SIZE):
         if self.fileobj is None:
             raise EOFError, "Reached EOF"
 
         if self._new_member:
             # If the _new_member flag is set, we have to
             # jump to the next member, if there is one.
-            #
-            # First, check if we're at the end of the file;
-            # if so, it's time to stop; no more members to read.
-            pos = self.fileobj.tell()   # Save current position
-            self.fileobj.seek(0, 2)     # Seek to end of file
-            if pos == self.fileobj.tell():
-                raise EOFError, "Reached EOF"
-            else:
-                self.fileobj.seek( pos ) # Return to original position
-
+            # If there is no header, we're at the end of the file and
+            # it's time to stop; no more members to read.
             self._init_read()
-            self._read_gzip_header()
+            if not self._read_gzip_header():
+                raise EOFError, "Reached EOF"
             self.decompress = zlib.decompressobj(-zlib.MAX_WBITS)
             self._new_member = False
 
         # Read a chunk of data from the file
-        buf = self.fileobj.read(size)
+        buf = self._fp.read(size)
 
         # If the EOF has been reached, flush the decompression object
         # and mark this object as finished.
 
         if buf == "":
             uncompress = self.decompress.flush()
+            # Prepend the already read bytes to the fileobj so they can be
+            # seen by _read_eof()
+            self._fp.prepend(self.decompress.unused_data)
             self._read_eof()
             self._add_read_data( uncompress )
             raise EOFError, 'Reached EOF'
@@ -320,11 +446,10 @@ class GzipFile(io.BufferedIOBase):
 
         if self.decompress.unused_data != "":
             # Ending case: we've come to the end of a member in the file,
-            # so seek back to the start of the unused data, finish up
-            # this member, and read a new gzip header.
-            # (The number of bytes to seek back is the length of the unused
-            # data, minus 8 because _read_eof() will rewind a further 8 bytes)
-            self.fileobj.seek( -len(self.decompress.unused_data)+8, 1)
+            # so finish up this member, and read a new gzip header.
+            # Prepend the already read bytes to the fileobj so they can be
+            # seen by _read_eof() and _read_gzip_header()
+            self._fp.prepend(self.decompress.unused_data)
 
             # Check the CRC and file size, and set the flag so we read
             # a new member on the next call
@@ -340,14 +465,12 @@ class GzipFile(io.BufferedIOBase):
         self.size = self.size + len(data)
 
     def _read_eof(self):
-        # We've read to the end of the file, so we have to rewind in order
-        # to reread the 8 bytes containing the CRC and the file size.
+        # We've read to the end of the member, so read the 8 bytes
+        # containing the CRC and the file size.
         # We check the that the computed CRC and size of the
         # uncompressed data matches the stored values.  Note that the size
         # stored is the true file size mod 2**32.
-        self.fileobj.seek(-8, 1)
-        crc32 = read32(self.fileobj)
-        isize = read32(self.fileobj)  # may exceed 2GB
+        crc32, isize = struct.unpack("<II", _read_exact(self._fp, 8))
         if crc32 != self.crc:
             raise IOError("CRC check failed %s != %s" % (hex(crc32),
                                                          hex(self.crc)))
@@ -359,9 +482,9 @@ class GzipFile(io.BufferedIOBase):
         # non-zero byte. See http://www.gzip.org/#faq8
         c = "\x00"
         while c == "\x00":
-            c = self.fileobj.read(1)
+            c = self._fp.read(1)
         if c:
-            self.fileobj.seek(-1, 1)
+            self._fp.prepend(c)
 
     @property
     def closed(self):
@@ -374,7 +497,13 @@ class GzipFile(io.BufferedIOBase):
         self.fileobj = None
         try:
             if self.mode == WRITE:
-                fileobj.write(self.compress.flush())
+                if self._pool is None:
+                    fileobj.write(self.compress.flush())
+                else:
+                    try:
+                        self._flush_parallel(fileobj, True)
+                    finally:
+                        self._pool.shutdown()
                 write32u(fileobj, self.crc)
                 # self.size may exceed 2GB, or even 4GB
                 write32u(fileobj, self.size & 0xffffffffL)
@@ -388,7 +517,11 @@ class GzipFile(io.BufferedIOBase):
         self._check_closed()
         if self.mode == WRITE:
             # Ensure the compressor's buffer is flushed
-            self.fileobj.write(self.compress.flush(zlib_mode))
+            if self._pool is None:
+                self.fileobj.write(self.compress.flush(zlib_mode))
+            else:
+                # Every block already ends with a sync flush
+                self._flush_parallel(self.fileobj, False)
             self.fileobj.flush()
 
     def fileno(self):
@@ -404,7 +537,7 @@ class GzipFile(io.BufferedIOBase):
         beginning of the file'''
         if self.mode != READ:
             raise IOError("Can't rewind in write mode")
-        self.fileobj.seek(0)
+        self._fp.seek(0)
         self._new_member = True
         self.extrabuf = ""
         self.extrasize = 0
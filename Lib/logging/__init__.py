@@ -222,6 +222,9 @@ def _releaseLock():
 #   The logging record
 #---------------------------------------------------------------------------
 
+# Types of single logging arguments which are known not to be mappings
+_scalarTypes = (basestring, int, long, float)
+
 class LogRecord(object):
     """
     A LogRecord instance represents an event being logged.
@@ -260,19 +263,18 @@ class LogRecord(object):
         # formatting still seem to suggest a mapping object is required.
         # Thus, while not removing the isinstance check, it does now look
         # for collections.Mapping rather than, as before, dict.
-        if (args and len(args) == 1 and isinstance(args[0], collections.Mapping)
+        # The common cases of a dict or a plain scalar are checked first, as
+        # the check against the Mapping ABC is comparatively slow.
+        if (args and len(args) == 1 and
+            (isinstance(args[0], dict) or
+             (not isinstance(args[0], _scalarTypes) and
+              isinstance(args[0], collections.Mapping)))
             and args[0]):
             args = args[0]
         self.args = args
         self.levelname = getLevelName(level)
         self.levelno = level
         self.pathname = pathname
-        try:
-            self.filename = os.path.basename(pathname)
-            self.module = os.path.splitext(self.filename)[0]
-        except (TypeError, ValueError, AttributeError):
-            self.filename = pathname
-            self.module = "Unknown module"
         self.exc_info = exc_info
         self.exc_text = None      # used to cache the traceback text
         self.lineno = lineno
@@ -286,20 +288,6 @@ class LogRecord(object):
         else:
             self.thread = None
             self.threadName = None
-        if not logMultiprocessing:
-            self.processName = None
-        else:
-            self.processName = 'MainProcess'
-            mp = sys.modules.get('multiprocessing')
-            if mp is not None:
-                # Errors may occur if multiprocessing has not finished loading
-                # yet - e.g. if a custom import hook causes third-party code
-                # to run when multiprocessing calls import. See issue 8200
-                # for an example
-                try:
-                    self.processName = mp.current_process().name
-                except StandardError:
-                    pass
         if logProcesses and hasattr(os, 'getpid'):
             self.process = os.getpid()
         else:
@@ -309,6 +297,45 @@ class LogRecord(object):
         return '<LogRecord: %s, %s, %s, %s, "%s">'%(self.name, self.levelno,
             self.pathname, self.lineno, self.msg)
 
+    # These attributes are only worked out the first time they are looked
+    # up, as most formats never use them.
+    _lazyAttributes = ('filename', 'module', 'processName')
+
+    def __getattr__(self, name):
+        if name == 'filename' or name == 'module':
+            pathname = self.pathname
+            try:
+                self.filename = os.path.basename(pathname)
+                self.module = os.path.splitext(self.filename)[0]
+            except (TypeError, ValueError, AttributeError):
+                self.filename = pathname
+                self.module = "Unknown module"
+            return self.__dict__[name]
+        if name == 'processName':
+            self.processName = None
+            if logMultiprocessing:
+                self.processName = 'MainProcess'
+                mp = sys.modules.get('multiprocessing')
+                if mp is not None:
+                    # Errors may occur if multiprocessing has not finished
+                    # loading yet - e.g. if a custom import hook causes
+                    # third-party code to run when multiprocessing calls
+                    # import. See issue 8200 for an example
+                    try:
+                        self.processName = mp.current_process().name
+                    except StandardError:
+                        pass
+            return self.processName
+        raise AttributeError(name)
+
+    def __getstate__(self):
+        """
+        Return the attribute dictionary, with all attributes filled in.
+        """
+        for name in self._lazyAttributes:
+            getattr(self, name)
+        return self.__dict__
+
     def getMessage(self):
         """
         Return the message for this LogRecord.
@@ -465,6 +492,10 @@ class Formatter(object):
         record.message = record.getMessage()
         if self.usesTime():
             record.asctime = self.formatTime(record, self.datefmt)
+        fmt = self._fmt
+        for name in LogRecord._lazyAttributes:
+            if "%%(%s)" % name in fmt:
+                getattr(record, name)
         try:
             s = self._fmt % record.__dict__
         except UnicodeDecodeError as e:
@@ -831,6 +862,10 @@ class StreamHandler(Handler):
     sys.stdout or sys.stderr may be used.
     """
 
+    # Set by a QueueListener while it writes out a batch of records, so that
+    # the stream is flushed once per batch rather than once per record.
+    _defer_flush = False
+
     def __init__(self, stream=None):
         """
         Initialize the handler.
@@ -889,7 +924,8 @@ class StreamHandler(Handler):
                         stream.write(fs % msg)
                 except UnicodeError:
                     stream.write(fs % msg.encode("UTF-8"))
-            self.flush()
+            if not self._defer_flush:
+                self.flush()
         except (KeyboardInterrupt, SystemExit):
             raise
         except:
@@ -1112,6 +1148,20 @@ class Manager(object):
                 alogger.parent = c.parent
                 c.parent = alogger
 
+    def _clear_cache(self):
+        """
+        Clear the isEnabledFor() cache of all loggers. This is called
+        whenever a level changes.
+        """
+        _acquireLock()
+        try:
+            for logger in self.loggerDict.values():
+                if isinstance(logger, Logger):
+                    logger._cache.clear()
+            self.root._cache.clear()
+        finally:
+            _releaseLock()
+
 #---------------------------------------------------------------------------
 #   Logger classes and functions
 #---------------------------------------------------------------------------
@@ -1142,12 +1192,15 @@ class Logger(Filterer):
         self.propagate = 1
         self.handlers = []
         self.disabled = 0
+        self._cache = {}
 
     def setLevel(self, level):
         """
         Set the logging level of this logger.
         """
         self.level = _checkLevel(level)
+        self._cache.clear()
+        self.manager._clear_cache()
 
     def debug(self, msg, *args, **kwargs):
         """
@@ -1250,8 +1303,8 @@ class Logger(Filterer):
         rv = "(unknown file)", 0, "(unknown function)"
         while hasattr(f, "f_code"):
             co = f.f_code
-            filename = os.path.normcase(co.co_filename)
-            if filename == _srcfile:
+            filename = co.co_filename
+            if filename == _srcfile or os.path.normcase(filename) == _srcfile:
                 f = f.f_back
                 continue
             rv = (co.co_filename, f.f_lineno, co.co_name)
@@ -1266,7 +1319,8 @@ class Logger(Filterer):
         rv = LogRecord(name, level, fn, lno, msg, args, exc_info, func)
         if extra is not None:
             for key in extra:
-                if (key in ["message", "asctime"]) or (key in rv.__dict__):
+                if ((key in ["message", "asctime"]) or (key in rv.__dict__) or
+                    (key in LogRecord._lazyAttributes)):
                     raise KeyError("Attempt to overwrite %r in LogRecord" % key)
                 rv.__dict__[key] = extra[key]
         return rv
@@ -1367,10 +1421,23 @@ class Logger(Filterer):
     def isEnabledFor(self, level):
         """
         Is this logger enabled for level 'level'?
+
+        The answer is cached per level until a level in the hierarchy is
+        changed with setLevel() or disable().
         """
-        if self.manager.disable >= level:
-            return 0
-        return level >= self.getEffectiveLevel()
+        try:
+            return self._cache[level]
+        except KeyError:
+            _acquireLock()
+            try:
+                if self.manager.disable >= level:
+                    is_enabled = self._cache[level] = False
+                else:
+                    is_enabled = self._cache[level] = (
+                        level >= self.getEffectiveLevel())
+            finally:
+                _releaseLock()
+            return is_enabled
 
     def getChild(self, suffix):
         """
@@ -1656,6 +1723,7 @@ def disable(level):
     Disable all logging calls of severity 'level' and below.
     """
     root.manager.disable = level
+    root.manager._clear_cache()
 
 def shutdown(handlerList=_handlerList):
     """
@@ -269,6 +269,7 @@ def _install_loggers(cp, handlers, disable_existing_loggers):
             logger.propagate = 1
         else:
             logger.disabled = disable_existing_loggers
+    root.manager._clear_cache()
 
 
 
@@ -639,6 +640,7 @@ class DictConfigurator(BaseConfigurator):
                         logger.propagate = True
                     elif disable_existing:
                         logger.disabled = True
+                root.manager._clear_cache()
 
                 # And finally, do the root logger
                 root = config.get('root', None)
@@ -25,6 +25,11 @@ To use, simply 'import logging.handlers' and log away!
 
 import errno, logging, socket, os, cPickle, struct, time, re
 from stat import ST_DEV, ST_INO, ST_MTIME
+import Queue
+try:
+    import threading
+except ImportError: #pragma: no cover
+    threading = None
 
 try:
     import codecs
@@ -542,7 +547,7 @@ class SocketHandler(logging.Handler):
         # See issue #14436: If msg or args are objects, they may not be
         # available on the receiving end. So we convert the msg % args
         # to a string, save it as msg and zap the args.
-        d = dict(record.__dict__)
+        d = dict(record.__getstate__())
         d['msg'] = record.getMessage()
         d['args'] = None
         s = cPickle.dumps(d, 1)
@@ -1086,7 +1091,7 @@ class HTTPHandler(logging.Handler):
         that is sent as the CGI data. Overwrite in your class.
         Contributed by Franz Glasner.
         """
-        return record.__dict__
+        return record.__getstate__()
 
     def emit(self, record):
         """
@@ -1240,3 +1245,230 @@ class MemoryHandler(BufferingHandler):
                 BufferingHandler.close(self)
             finally:
                 self.release()
+
+
+class QueueHandler(logging.Handler):
+    """
+    This handler sends events to a queue. Typically, it would be used together
+    with a QueueListener, so that logging calls only put a record on the
+    queue and the slow work of formatting it and writing it out is done on
+    another thread.
+
+    The implementation is based on Queue.Queue, but any object with a
+    put_nowait() method will do.
+    """
+
+    def __init__(self, queue):
+        """
+        Initialise an instance, using the passed queue.
+        """
+        logging.Handler.__init__(self)
+        self.queue = queue
+
+    def enqueue(self, record):
+        """
+        Enqueue a record.
+
+        The base implementation uses put_nowait. You may want to override
+        this method if you want to use blocking, timeouts or custom queue
+        implementations.
+        """
+        self.queue.put_nowait(record)
+
+    def prepare(self, record):
+        """
+        Prepares a record for queuing. The object returned by this method is
+        enqueued.
+
+        The base implementation formats the record to merge the message
+        and arguments, and removes unpickleable items from the record
+        in-place. The arguments are merged now because they may be mutated
+        by the time the record is handled on another thread.
+
+        You might want to override this method if you want to convert
+        the record to a dict or JSON string, or send a modified copy
+        of the record while leaving the original intact.
+        """
+        # The format operation gets traceback text into record.exc_text
+        # (if there's exception data), and also puts the message into
+        # record.message. We can then use this to replace the original
+        # msg + args, as these might be unpickleable. We also zap the
+        # exc_info attribute, as it's no longer needed and, if not None,
+        # will typically not be pickleable.
+        self.format(record)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def emit(self, record):
+        """
+        Emit a record.
+
+        Writes the LogRecord to the queue, preparing it for pickling first.
+        """
+        try:
+            self.enqueue(self.prepare(record))
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except:
+            self.handleError(record)
+
+if threading:
+    class QueueListener(object):
+        """
+        This class implements an internal threaded listener which watches for
+        LogRecords being added to a queue, removes them and passes them to a
+        list of handlers for processing.
+
+        Records already waiting on the queue when the listener wakes up are
+        handled together, up to batch_size of them, and each stream handler
+        is flushed once per batch instead of once per record.
+        """
+        _sentinel = None
+
+        def __init__(self, queue, *handlers, respect_handler_level=False,
+                     batch_size=100):
+            """
+            Initialise an instance with the specified queue and
+            handlers.
+            """
+            if batch_size < 1:
+                raise ValueError("batch_size must be at least 1")
+            self.queue = queue
+            self.handlers = handlers
+            self._thread = None
+            self.respect_handler_level = respect_handler_level
+            self.batch_size = batch_size
+
+        def dequeue(self, block):
+            """
+            Dequeue a record and return it, optionally blocking.
+
+            The base implementation uses get. You may want to override this
+            method if you want to use timeouts or work with custom queue
+            implementations.
+            """
+            return self.queue.get(block)
+
+        def start(self):
+            """
+            Start the listener.
+
+            This starts up a background thread to monitor the queue for
+            LogRecords to process.
+            """
+            self._thread = t = threading.Thread(target=self._monitor)
+            t.daemon = True
+            t.start()
+
+        def prepare(self, record):
+            """
+            Prepare a record for handling.
+
+            This method just returns the passed-in record. You may want to
+            override this method if you need to do any custom marshalling or
+            manipulation of the record before passing it to the handlers.
+            """
+            return record
+
+        def handle(self, record):
+            """
+            Handle a record.
+
+            This just loops through the handlers offering them the record
+            to handle.
+            """
+            self.handle_batch([record])
+
+        def handle_batch(self, records):
+            """
+            Handle a list of records.
+
+            Each handler is offered all of the records in turn while its lock
+            is held, and stream handlers are flushed once at the end.
+            """
+            records = [self.prepare(record) for record in records]
+            for handler in self.handlers:
+                if self.respect_handler_level:
+                    todo = [r for r in records if r.levelno >= handler.level]
+                else:
+                    todo = records
+                if not todo:
+                    continue
+                handler.acquire()
+                try:
+                    defer = (len(todo) > 1 and
+                             isinstance(handler, logging.StreamHandler))
+                    if defer:
+                        handler._defer_flush = True
+                    try:
+                        for record in todo:
+                            handler.handle(record)
+                    finally:
+                        if defer:
+                            del handler._defer_flush
+                            handler.flush()
+                finally:
+                    handler.release()
+
+        def _monitor(self):
+            """
+            Monitor the queue for records, and ask the handlers
+            to deal with them.
+
+            This method runs on a separate, internal thread.
+            The thread will terminate if it sees a sentinel object in the
+            queue.
+            """
+            q = self.queue
+            has_task_done = hasattr(q, 'task_done')
+            done = False
+            while not done:
+                record = self.dequeue(True)
+                records = []
+                dequeued = 0
+                try:
+                    while True:
+                        dequeued += 1
+                        if record is self._sentinel:
+                            done = True
+                        else:
+                            records.append(record)
+                        if done or len(records) >= self.batch_size:
+                            break
+                        try:
+                            record = self.dequeue(False)
+                        except Queue.Empty:
+                            break
+                    if records:
+                        self.handle_batch(records)
+                finally:
+                    # Only mark the records done once they have been
+                    # handled, so that queue.join() waits for them.
+                    if has_task_done:
+                        for i in range(dequeued):
+                            q.task_done()
+
+        def enqueue_sentinel(self):
+            """
+            This is used to enqueue the sentinel record.
+
+            The base implementation uses put_nowait. You may want to override
+            this method if you want to use timeouts or work with custom queue
+            implementations.
+            """
+            self.queue.put_nowait(self._sentinel)
+
+        def stop(self):
+            """
+            Stop the listener.
+
+            This asks the thread to terminate, and then waits for it to do so.
+            Note that if you don't call this before your application exits,
+            there may be some records still left on the queue, which won't
+            be processed.
+            """
+            self.enqueue_sentinel()
+            self._thread.join()
+            self._thread = None
@@ -203,4 +203,7 @@ def_op('MAP_ADD', 147)
 
 jrel_op('SETUP_ASYNC_WITH', 154)
 
+name_op('LOAD_METHOD', 160)     # Index in name list
+def_op('CALL_METHOD', 161)      # #args + (#kwargs << 8)
+
 del def_op, name_op, jrel_op, jabs_op
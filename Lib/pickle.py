@@ -16,6 +16,10 @@ Functions:
     load(file) -> object
     loads(string) -> object
 
+Misc classes:
+
+    PickleBuffer
+
 Misc variables:
 
     __version__
@@ -29,6 +33,7 @@ __version__ = "$Revision: 72223 $"       # Code version
 from types import *
 from copy_reg import dispatch_table
 from copy_reg import _extension_registry, _inverted_registry, _extension_cache
+from itertools import islice
 import marshal
 import sys
 import struct
@@ -37,18 +42,28 @@ import re
 __all__ = ["PickleError", "PicklingError", "UnpicklingError", "Pickler",
            "Unpickler", "dump", "dumps", "load", "loads"]
 
+try:
+    from cPickle import PickleBuffer
+    __all__.append("PickleBuffer")
+    _HAVE_PICKLE_BUFFER = True
+except ImportError:
+    _HAVE_PICKLE_BUFFER = False
+
 # These are purely informational; no code uses these.
-format_version = "2.0"                  # File format version we write
+format_version = "5.0"                  # File format version we write
 compatible_formats = ["1.0",            # Original protocol 0
                       "1.1",            # Protocol 0 with INST added
                       "1.2",            # Original protocol 1
                       "1.3",            # Protocol 1 with BINFLOAT added
                       "2.0",            # Protocol 2
+                      "3.0",            # Protocol 3
+                      "4.0",            # Protocol 4
+                      "5.0",            # Protocol 5
                       ]                 # Old format versions we can read
 
 # Keep in synch with cPickle.  This is the highest protocol number we
 # know how to read.
-HIGHEST_PROTOCOL = 2
+HIGHEST_PROTOCOL = 5
 
 # Why use struct.pack() for pickling but marshal.loads() for
 # unpickling?  struct.pack() is 40% faster than marshal.dumps(), but
@@ -161,20 +176,130 @@ LONG4           = '\x8b'  # push really big long
 
 _tuplesize2code = [EMPTY_TUPLE, TUPLE1, TUPLE2, TUPLE3]
 
+# Protocol 3 (Python 3.0)
+
+BINBYTES        = 'B'   # push bytes; counted binary string argument
+SHORT_BINBYTES  = 'C'   #  "     "   ;    "      "       "      " < 256 bytes
+
+# Protocol 4
+
+SHORT_BINUNICODE = '\x8c'  # push short string; UTF-8 length < 256 bytes
+BINUNICODE8      = '\x8d'  # push very long string
+BINBYTES8        = '\x8e'  # push very long bytes string
+EMPTY_SET        = '\x8f'  # push empty set on the stack
+ADDITEMS         = '\x90'  # modify set by adding topmost stack items
+FROZENSET        = '\x91'  # build frozenset from topmost stack items
+NEWOBJ_EX        = '\x92'  # like NEWOBJ but work with keyword only arguments
+STACK_GLOBAL     = '\x93'  # same as GLOBAL but using names on the stacks
+MEMOIZE          = '\x94'  # store top of the stack in memo
+FRAME            = '\x95'  # indicate the beginning of a new frame
+
+# Protocol 5
+
+BYTEARRAY8       = '\x96'  # push bytearray
+NEXT_BUFFER      = '\x97'  # push next out-of-band buffer
+READONLY_BUFFER  = '\x98'  # make top of stack readonly
 
 __all__.extend([x for x in dir() if re.match("[A-Z][A-Z0-9_]+$",x)])
 del x
 
 
+class _Framer:
+
+    # Keep in synch with cPickle.
+    _FRAME_SIZE_MIN = 4
+    _FRAME_SIZE_TARGET = 64 * 1024
+
+    def __init__(self, file_write):
+        self.file_write = file_write
+        self.current_frame = None
+
+    def start_framing(self):
+        self.current_frame = StringIO()
+
+    def end_framing(self):
+        if self.current_frame is not None and self.current_frame.tell() > 0:
+            self.commit_frame(force=True)
+        self.current_frame = None
+
+    def commit_frame(self, force=False):
+        if self.current_frame is not None:
+            f = self.current_frame
+            if f.tell() >= self._FRAME_SIZE_TARGET or force:
+                data = f.getvalue()
+                write = self.file_write
+                if len(data) >= self._FRAME_SIZE_MIN:
+                    write(FRAME + struct.pack("<Q", len(data)))
+                # A separate write() spares concatenating the frame to
+                # its header.
+                write(data)
+                self.current_frame = StringIO()
+
+    def write(self, data):
+        if self.current_frame is not None:
+            return self.current_frame.write(data)
+        else:
+            return self.file_write(data)
+
+    def write_large_bytes(self, header, payload):
+        # End the current frame and write the header and the payload
+        # directly, without concatenating them: the payload is large.
+        if self.current_frame is not None:
+            self.commit_frame(force=True)
+        write = self.file_write
+        write(header)
+        write(payload)
+
+
+class _Unframer:
+
+    def __init__(self, file_read, file_readline):
+        self.file_read = file_read
+        self.file_readline = file_readline
+        self.current_frame = None
+
+    def read(self, n):
+        if self.current_frame is not None:
+            data = self.current_frame.read(n)
+            if not data and n != 0:
+                self.current_frame = None
+                return self.file_read(n)
+            if len(data) < n:
+                raise UnpicklingError(
+                    "pickle exhausted before end of frame")
+            return data
+        else:
+            return self.file_read(n)
+
+    def readline(self):
+        if self.current_frame is not None:
+            data = self.current_frame.readline()
+            if not data:
+                self.current_frame = None
+                return self.file_readline()
+            if data[-1] != '\n':
+                raise UnpicklingError(
+                    "pickle exhausted before end of frame")
+            return data
+        else:
+            return self.file_readline()
+
+    def load_frame(self, frame_size):
+        if self.current_frame is not None and self.current_frame.read():
+            raise UnpicklingError(
+                "beginning of a new frame before end of current frame")
+        self.current_frame = StringIO(self.file_read(frame_size))
+
+
 # Pickling machinery
 
 class Pickler:
 
-    def __init__(self, file, protocol=None):
+    def __init__(self, file, protocol=None, buffer_callback=None):
         """This takes a file-like object for writing a pickle data stream.
 
         The optional protocol argument tells the pickler to use the
-        given protocol; supported protocols are 0, 1, 2.  The default
+        given protocol; supported protocols are 0 to 5.  The default
         protocol is 0, to be backwards compatible.  (Protocol 0 is the
         only protocol that can be written to a file opened in text
         mode and read back successfully.  When using a protocol higher
@@ -182,7 +307,10 @@ class Pickler:
         pickling and unpickling.)
 
         Protocol 1 is more efficient than protocol 0; protocol 2 is
-        more efficient than protocol 1.
+        more efficient than protocol 1.  Protocol 4 groups the output
+        in frames, for fewer and larger writes, and supports very large
+        objects.  Protocol 5 adds out-of-band data for PickleBuffer
+        objects.
 
         Specifying a negative protocol version selects the highest
         protocol version supported.  The higher the protocol used, the
@@ -193,6 +321,11 @@ class Pickler:
         string argument.  It can thus be an open file object, a StringIO
         object, or any other custom object that meets this interface.
 
+        If buffer_callback is not None (protocol 5 only), it is called
+        with each PickleBuffer being pickled.  When it returns a false
+        value, the buffer's data is left out of the pickle stream: it has
+        to be passed to the Unpickler's buffers argument by other means.
+
         """
         if protocol is None:
             protocol = 0
@@ -200,7 +333,15 @@ class Pickler:
             protocol = HIGHEST_PROTOCOL
         elif not 0 <= protocol <= HIGHEST_PROTOCOL:
             raise ValueError("pickle protocol must be <= %d" % HIGHEST_PROTOCOL)
-        self.write = file.write
+        if buffer_callback is not None and protocol < 5:
+            raise ValueError("buffer_callback needs protocol >= 5")
+        self._buffer_callback = buffer_callback
+        self.framer = _Framer(file.write)
+        self._write_large_bytes = self.framer.write_large_bytes
+        if protocol >= 4:
+            self.write = self.framer.write
+        else:
+            self.write = file.write
         self.memo = {}
         self.proto = int(protocol)
         self.bin = protocol >= 1
@@ -221,8 +362,11 @@ class Pickler:
         """Write a pickled representation of obj to the open file."""
         if self.proto >= 2:
             self.write(PROTO + chr(self.proto))
+        if self.proto >= 4:
+            self.framer.start_framing()
         self.save(obj)
         self.write(STOP)
+        self.framer.end_framing()
 
     def memoize(self, obj):
         """Store an object in the memo."""
@@ -243,12 +387,19 @@ class Pickler:
             return
         assert id(obj) not in self.memo
         memo_len = len(self.memo)
+        if self.proto >= 4 and id(self.memo) in self.memo:
+            # MEMOIZE relies on the memo lengths matching, and the
+            # Unpickler has nothing like _keep_alive()'s entry.
+            memo_len -= 1
         self.write(self.put(memo_len))
         self.memo[id(obj)] = memo_len, obj
 
-    # Return a PUT (BINPUT, LONG_BINPUT) opcode string, with argument i.
+    # Return a PUT (BINPUT, LONG_BINPUT) opcode string, with argument i,
+    # or MEMOIZE, which takes the memo length as implicit argument.
     def put(self, i, pack=struct.pack):
-        if self.bin:
+        if self.proto >= 4:
+            return MEMOIZE
+        elif self.bin:
             if i < 256:
                 return BINPUT + chr(i)
             else:
@@ -267,6 +418,8 @@ class Pickler:
         return GET + repr(i) + '\n'
 
     def save(self, obj):
+        self.framer.commit_frame()
+
         # Check for persistent id (defined by a subclass)
         pid = self.persistent_id(obj)
         if pid is not None:
@@ -357,8 +510,24 @@ class Pickler:
         save = self.save
         write = self.write
 
+        func_name = getattr(func, "__name__", "")
+        # Protocol 4 special case: if func's name is __newobj_ex__, use
+        # NEWOBJ_EX, which also passes keyword arguments to __new__.
+        # Older protocols pickle a reference to copy_reg.__newobj_ex__.
+        if self.proto >= 4 and func_name == "__newobj_ex__":
+            cls, args, kwargs = args
+            if not hasattr(cls, "__new__"):
+                raise PicklingError(
+                    "args[0] from __newobj_ex__ args has no __new__")
+            if obj is not None and cls is not obj.__class__:
+                raise PicklingError(
+                    "args[0] from __newobj_ex__ args has the wrong class")
+            save(cls)
+            save(args)
+            save(kwargs)
+            write(NEWOBJ_EX)
         # Protocol 2 special case: if func's name is __newobj__, use NEWOBJ
-        if self.proto >= 2 and getattr(func, "__name__", "") == "__newobj__":
+        elif self.proto >= 2 and func_name == "__newobj__":
             # A __reduce__ implementation can direct protocol 2 to
             # use the more efficient NEWOBJ opcode, while still
             # allowing protocol 0 and 1 to work normally.  For this to
@@ -488,6 +657,10 @@ class Pickler:
             n = len(obj)
             if n < 256:
                 self.write(SHORT_BINSTRING + chr(n) + obj)
+            elif n > 0x7fffffff and self.proto >= 4:
+                self._write_large_bytes(BINBYTES8 + pack("<Q", n), obj)
+            elif n >= self.framer._FRAME_SIZE_TARGET:
+                self._write_large_bytes(BINSTRING + pack("<i", n), obj)
             else:
                 self.write(BINSTRING + pack("<i", n) + obj)
         else:
@@ -499,7 +672,16 @@ class Pickler:
         if self.bin:
             encoding = obj.encode('utf-8')
             n = len(encoding)
-            self.write(BINUNICODE + pack("<i", n) + encoding)
+            if n < 256 and self.proto >= 4:
+                self.write(SHORT_BINUNICODE + chr(n) + encoding)
+            elif n > 0x7fffffff and self.proto >= 4:
+                self._write_large_bytes(BINUNICODE8 + pack("<Q", n),
+                                        encoding)
+            elif n >= self.framer._FRAME_SIZE_TARGET:
+                self._write_large_bytes(BINUNICODE + pack("<i", n),
+                                        encoding)
+            else:
+                self.write(BINUNICODE + pack("<i", n) + encoding)
         else:
             obj = obj.replace("\\", "\\u005c")
             obj = obj.replace("\n", "\\u000a")
@@ -658,6 +840,103 @@ class Pickler:
     if not PyStringMap is None:
         dispatch[PyStringMap] = save_dict
 
+    def save_set(self, obj):
+        save = self.save
+        write = self.write
+
+        if self.proto < 4:
+            self.save_reduce(set, (list(obj),), obj=obj)
+            return
+
+        write(EMPTY_SET)
+        self.memoize(obj)
+
+        it = iter(obj)
+        while True:
+            batch = list(islice(it, self._BATCHSIZE))
+            n = len(batch)
+            if n > 0:
+                write(MARK)
+                for item in batch:
+                    save(item)
+                write(ADDITEMS)
+            if n < self._BATCHSIZE:
+                return
+    dispatch[set] = save_set
+
+    def save_frozenset(self, obj):
+        save = self.save
+        write = self.write
+
+        if self.proto < 4:
+            self.save_reduce(frozenset, (list(obj),), obj=obj)
+            return
+
+        write(MARK)
+        for item in obj:
+            save(item)
+
+        if id(obj) in self.memo:
+            # If the object is already in the memo, this means it is
+            # recursive. In this case, throw away everything we put on the
+            # stack, and fetch the object back from the memo.
+            write(POP_MARK + self.get(self.memo[id(obj)][0]))
+            return
+
+        write(FROZENSET)
+        self.memoize(obj)
+    dispatch[frozenset] = save_frozenset
+
+    def save_bytearray(self, obj, pack=struct.pack):
+        if self.proto < 5:
+            # No opcode for bytearrays before protocol 5
+            self.save_reduce(obj=obj, *obj.__reduce_ex__(self.proto))
+            return
+        n = len(obj)
+        if n >= self.framer._FRAME_SIZE_TARGET:
+            self._write_large_bytes(BYTEARRAY8 + pack("<Q", n), str(obj))
+        else:
+            self.write(BYTEARRAY8 + pack("<Q", n) + str(obj))
+        self.memoize(obj)
+    dispatch[bytearray] = save_bytearray
+
+    if _HAVE_PICKLE_BUFFER:
+        def save_picklebuffer(self, obj, pack=struct.pack):
+            if self.proto < 5:
+                raise PicklingError("PickleBuffer can only be pickled with "
+                                    "protocol >= 5")
+            try:
+                m = obj.raw()
+            except BufferError:
+                raise PicklingError("PickleBuffer can not be pickled when "
+                                    "pointing to a non-contiguous buffer")
+            in_band = True
+            if self._buffer_callback is not None:
+                in_band = bool(self._buffer_callback(obj))
+            if in_band:
+                # Write data in-band, straight from the buffer
+                n = len(m)
+                if not m.readonly:
+                    header = BYTEARRAY8 + pack("<Q", n)
+                elif n < 256:
+                    header = SHORT_BINSTRING + chr(n)
+                elif n > 0x7fffffff:
+                    header = BINBYTES8 + pack("<Q", n)
+                else:
+                    header = BINSTRING + pack("<i", n)
+                if n >= self.framer._FRAME_SIZE_TARGET:
+                    self._write_large_bytes(header, m)
+                else:
+                    self.write(header)
+                    self.write(m)
+                self.memoize(obj)
+            else:
+                # Write data out-of-band
+                self.write(NEXT_BUFFER)
+                if m.readonly:
+                    self.write(READONLY_BUFFER)
+        dispatch[PickleBuffer] = save_picklebuffer
+
     def _batch_setitems(self, items):
         # Helper to batch up SETITEMS sequences; proto >= 1 only
         save = self.save
@@ -770,7 +1049,12 @@ class Pickler:
                     write(EXT4 + pack("<i", code))
                 return
 
-        write(GLOBAL + module + '\n' + name + '\n')
+        if self.proto >= 4:
+            self.save(module)
+            self.save(name)
+            write(STACK_GLOBAL)
+        else:
+            write(GLOBAL + module + '\n' + name + '\n')
         self.memoize(obj)
 
     dispatch[ClassType] = save_global
@@ -832,7 +1116,7 @@ def whichmodule(func, funcname):
 
 class Unpickler:
 
-    def __init__(self, file):
+    def __init__(self, file, buffers=None):
         """This takes a file-like object for reading a pickle data stream.
 
         The protocol version of the pickle is detected automatically, so no
@@ -843,9 +1127,14 @@ class Unpickler:
         arguments.  Both methods should return a string.  Thus file-like
         object can be a file object opened for reading, a StringIO object,
         or any other custom object that meets this interface.
+
+        If buffers is not None, it should be an iterable of buffer-enabled
+        objects that is consumed each time the pickle stream references
+        an out-of-band buffer (see the Pickler's buffer_callback).
         """
-        self.readline = file.readline
-        self.read = file.read
+        self._buffers = iter(buffers) if buffers is not None else None
+        self._file_readline = file.readline
+        self._file_read = file.read
         self.memo = {}
 
     def load(self):
@@ -853,6 +1142,9 @@ class Unpickler:
 
         Return the reconstituted object hierarchy specified in the file.
         """
+        self._unframer = _Unframer(self._file_read, self._file_readline)
+        self.read = self._unframer.read
+        self.readline = self._unframer.readline
         self.mark = object() # any new unique object
         self.stack = []
         self.append = self.stack.append
@@ -888,10 +1180,17 @@ class Unpickler:
 
     def load_proto(self):
         proto = ord(self.read(1))
-        if not 0 <= proto <= 2:
+        if not 0 <= proto <= HIGHEST_PROTOCOL:
             raise ValueError, "unsupported pickle protocol: %d" % proto
     dispatch[PROTO] = load_proto
 
+    def load_frame(self, unpack=struct.unpack):
+        frame_size, = unpack('<Q', self.read(8))
+        if frame_size > sys.maxsize:
+            raise ValueError("frame size > sys.maxsize: %d" % frame_size)
+        self._unframer.load_frame(frame_size)
+    dispatch[FRAME] = load_frame
+
     def load_persid(self):
         pid = self.readline()[:-1]
         self.append(self.persistent_load(pid))
@@ -996,6 +1295,67 @@ class Unpickler:
         self.append(self.read(len))
     dispatch[SHORT_BINSTRING] = load_short_binstring
 
+    # Python 3 bytes load as str.
+    def load_binbytes(self, unpack=struct.unpack):
+        len, = unpack('<I', self.read(4))
+        if len > sys.maxsize:
+            raise UnpicklingError("BINBYTES exceeds system's maximum size "
+                                  "of %d bytes" % sys.maxsize)
+        self.append(self.read(len))
+    dispatch[BINBYTES] = load_binbytes
+
+    def load_short_binbytes(self):
+        len = ord(self.read(1))
+        self.append(self.read(len))
+    dispatch[SHORT_BINBYTES] = load_short_binbytes
+
+    def load_binbytes8(self, unpack=struct.unpack):
+        len, = unpack('<Q', self.read(8))
+        if len > sys.maxsize:
+            raise UnpicklingError("BINBYTES8 exceeds system's maximum size "
+                                  "of %d bytes" % sys.maxsize)
+        self.append(self.read(len))
+    dispatch[BINBYTES8] = load_binbytes8
+
+    def load_bytearray8(self, unpack=struct.unpack):
+        len, = unpack('<Q', self.read(8))
+        if len > sys.maxsize:
+            raise UnpicklingError("BYTEARRAY8 exceeds system's maximum size "
+                                  "of %d bytes" % sys.maxsize)
+        self.append(bytearray(self.read(len)))
+    dispatch[BYTEARRAY8] = load_bytearray8
+
+    def load_next_buffer(self):
+        if self._buffers is None:
+            raise UnpicklingError("pickle stream refers to out-of-band data "
+                                  "but no *buffers* argument was given")
+        try:
+            buf = next(self._buffers)
+        except StopIteration:
+            raise UnpicklingError("not enough out-of-band buffers")
+        self.append(buf)
+    dispatch[NEXT_BUFFER] = load_next_buffer
+
+    def load_readonly_buffer(self):
+        buf = self.stack[-1]
+        m = memoryview(buf)
+        if not m.readonly:
+            self.stack[-1] = m.toreadonly()
+    dispatch[READONLY_BUFFER] = load_readonly_buffer
+
+    def load_short_binunicode(self):
+        len = ord(self.read(1))
+        self.append(unicode(self.read(len), 'utf-8'))
+    dispatch[SHORT_BINUNICODE] = load_short_binunicode
+
+    def load_binunicode8(self, unpack=struct.unpack):
+        len, = unpack('<Q', self.read(8))
+        if len > sys.maxsize:
+            raise UnpicklingError("BINUNICODE8 exceeds system's maximum size "
+                                  "of %d bytes" % sys.maxsize)
+        self.append(unicode(self.read(len), 'utf-8'))
+    dispatch[BINUNICODE8] = load_binunicode8
+
     def load_tuple(self):
         k = self.marker()
         self.stack[k:] = [tuple(self.stack[k+1:])]
@@ -1025,6 +1385,15 @@ class Unpickler:
         self.stack.append({})
     dispatch[EMPTY_DICT] = load_empty_dictionary
 
+    def load_empty_set(self):
+        self.stack.append(set())
+    dispatch[EMPTY_SET] = load_empty_set
+
+    def load_frozenset(self):
+        k = self.marker()
+        self.stack[k:] = [frozenset(self.stack[k+1:])]
+    dispatch[FROZENSET] = load_frozenset
+
     def load_list(self):
         k = self.marker()
         self.stack[k:] = [self.stack[k+1:]]
@@ -1090,6 +1459,14 @@ class Unpickler:
         self.stack[-1] = obj
     dispatch[NEWOBJ] = load_newobj
 
+    def load_newobj_ex(self):
+        kwargs = self.stack.pop()
+        args = self.stack.pop()
+        cls = self.stack[-1]
+        obj = cls.__new__(cls, *args, **kwargs)
+        self.stack[-1] = obj
+    dispatch[NEWOBJ_EX] = load_newobj_ex
+
     def load_global(self):
         module = self.readline()[:-1]
         name = self.readline()[:-1]
@@ -1097,6 +1474,19 @@ class Unpickler:
         self.append(klass)
     dispatch[GLOBAL] = load_global
 
+    def load_stack_global(self):
+        name = self.stack.pop()
+        module = self.stack.pop()
+        # Python 3 pickles the names as unicode strings.
+        if type(name) is UnicodeType:
+            name = name.encode('utf-8')
+        if type(module) is UnicodeType:
+            module = module.encode('utf-8')
+        if type(name) is not StringType or type(module) is not StringType:
+            raise UnpicklingError("STACK_GLOBAL requires str")
+        self.append(self.find_class(module, name))
+    dispatch[STACK_GLOBAL] = load_stack_global
+
     def load_ext1(self):
         code = ord(self.read(1))
         self.get_extension(code)
@@ -1181,6 +1571,11 @@ class Unpickler:
         self.memo[repr(i)] = self.stack[-1]
     dispatch[LONG_BINPUT] = load_long_binput
 
+    def load_memoize(self):
+        memo = self.memo
+        memo[repr(len(memo))] = self.stack[-1]
+    dispatch[MEMOIZE] = load_memoize
+
     def load_append(self):
         stack = self.stack
         value = stack.pop()
@@ -1214,6 +1609,20 @@ class Unpickler:
         del stack[mark:]
     dispatch[SETITEMS] = load_setitems
 
+    def load_additems(self):
+        stack = self.stack
+        mark = self.marker()
+        set_obj = stack[mark - 1]
+        items = stack[mark + 1:]
+        if isinstance(set_obj, set):
+            set_obj.update(items)
+        else:
+            add = set_obj.add
+            for item in items:
+                add(item)
+        del stack[mark:]
+    dispatch[ADDITEMS] = load_additems
+
     def load_build(self):
         stack = self.stack
         state = stack.pop()
@@ -1372,20 +1781,20 @@ try:
 except ImportError:
     from StringIO import StringIO
 
-def dump(obj, file, protocol=None):
-    Pickler(file, protocol).dump(obj)
+def dump(obj, file, protocol=None, buffer_callback=None):
+    Pickler(file, protocol, buffer_callback=buffer_callback).dump(obj)
 
-def dumps(obj, protocol=None):
+def dumps(obj, protocol=None, buffer_callback=None):
     file = StringIO()
-    Pickler(file, protocol).dump(obj)
+    Pickler(file, protocol, buffer_callback=buffer_callback).dump(obj)
     return file.getvalue()
 
-def load(file):
-    return Unpickler(file).load()
+def load(file, buffers=None):
+    return Unpickler(file, buffers=buffers).load()
 
-def loads(str):
+def loads(str, buffers=None):
     file = StringIO(str)
-    return Unpickler(file).load()
+    return Unpickler(file, buffers=buffers).load()
 
 # Doctest
 
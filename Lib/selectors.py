@@ -153,6 +153,30 @@ class BaseSelector(object):
         self.unregister(fileobj)
         return self.register(fileobj, events, data)
 
+    def register_many(self, registrations):
+        """Register several file objects at once.
+
+        Parameters:
+        registrations -- iterable of argument tuples for register(), i.e.
+                         (fileobj, events) or (fileobj, events, data)
+
+        Returns:
+        list of SelectorKey instances, in registration order
+
+        Raises:
+        Anything that register() raises; the file objects registered by
+        this call before the failure are unregistered again
+        """
+        keys = []
+        try:
+            for args in registrations:
+                keys.append(self.register(*args))
+        except:
+            for key in keys:
+                self.unregister(key.fileobj)
+            raise
+        return keys
+
     @abstractmethod
     def select(self, timeout=None):
         """Perform the actual selection, until some monitored file objects are
@@ -398,27 +422,85 @@ if hasattr(select, 'poll'):
 if hasattr(select, 'epoll'):
 
     class EpollSelector(_BaseSelectorImpl):
-        """Epoll-based selector."""
+        """Epoll-based selector.
+
+        register() and modify() also accept a `flags` argument, a bitwise
+        mask of select.EPOLLET and select.EPOLLONESHOT.  A one-shot file
+        object stops being reported after its first event until it is
+        re-armed with modify().
+        """
+
+        _FLAGS = select.EPOLLET | getattr(select, 'EPOLLONESHOT', 0)
 
         def __init__(self):
             super(EpollSelector, self).__init__()
             self._epoll = select.epoll()
+            # this maps file descriptors to their EPOLLET/EPOLLONESHOT flags
+            self._fd_to_flags = {}
 
         def fileno(self):
             return self._epoll.fileno()
 
-        def register(self, fileobj, events, data=None):
-            key = super(EpollSelector, self).register(fileobj, events, data)
-            epoll_events = 0
+        def _check_flags(self, flags):
+            if flags & ~self._FLAGS:
+                raise ValueError("Invalid flags: {!r}".format(flags))
+
+        @staticmethod
+        def _epoll_events(events, flags):
+            epoll_events = flags
             if events & EVENT_READ:
                 epoll_events |= select.EPOLLIN
             if events & EVENT_WRITE:
                 epoll_events |= select.EPOLLOUT
-            self._epoll.register(key.fd, epoll_events)
+            return epoll_events
+
+        def register(self, fileobj, events, data=None, flags=0):
+            self._check_flags(flags)
+            key = super(EpollSelector, self).register(fileobj, events, data)
+            try:
+                self._epoll.register(key.fd, self._epoll_events(events, flags))
+            except:
+                super(EpollSelector, self).unregister(fileobj)
+                raise
+            if flags:
+                self._fd_to_flags[key.fd] = flags
             return key
 
+        def register_many(self, registrations):
+            # Same as register() in a loop, with the per-call overhead
+            # hoisted out; epoll_ctl() itself has no batched form.
+            fd_to_key = self._fd_to_key
+            fd_to_flags = self._fd_to_flags
+            epoll_register = self._epoll.register
+            epoll_events = self._epoll_events
+            keys = []
+            try:
+                for args in registrations:
+                    fileobj, events = args[:2]
+                    data = args[2] if len(args) > 2 else None
+                    flags = args[3] if len(args) > 3 else 0
+                    if (not events) or (events & ~(EVENT_READ | EVENT_WRITE)):
+                        raise ValueError("Invalid events: {!r}".format(events))
+                    self._check_flags(flags)
+                    key = SelectorKey(fileobj, self._fileobj_lookup(fileobj),
+                                      events, data)
+                    if key.fd in fd_to_key:
+                        raise KeyError("{!r} (FD {}) is already registered"
+                                       .format(fileobj, key.fd))
+                    epoll_register(key.fd, epoll_events(events, flags))
+                    fd_to_key[key.fd] = key
+                    if flags:
+                        fd_to_flags[key.fd] = flags
+                    keys.append(key)
+            except:
+                for key in keys:
+                    self.unregister(key.fd)
+                raise
+            return keys
+
         def unregister(self, fileobj):
             key = super(EpollSelector, self).unregister(fileobj)
+            self._fd_to_flags.pop(key.fd, None)
             try:
                 self._epoll.unregister(key.fd)
             except EnvironmentError:
@@ -427,6 +509,32 @@ if hasattr(select, 'epoll'):
                 pass
             return key
 
+        def modify(self, fileobj, events, data=None, flags=None):
+            try:
+                key = self._fd_to_key[self._fileobj_lookup(fileobj)]
+            except KeyError:
+                raise KeyError("{!r} is not registered".format(fileobj))
+            if (not events) or (events & ~(EVENT_READ | EVENT_WRITE)):
+                raise ValueError("Invalid events: {!r}".format(events))
+            old_flags = self._fd_to_flags.get(key.fd, 0)
+            if flags is None:
+                flags = old_flags
+            else:
+                self._check_flags(flags)
+            # A one-shot registration is disabled after each event, so it
+            # has to be rearmed even if nothing changed.
+            if (events != key.events or flags != old_flags or
+                    flags & select.EPOLLONESHOT):
+                self._epoll.modify(key.fd, self._epoll_events(events, flags))
+                if flags:
+                    self._fd_to_flags[key.fd] = flags
+                else:
+                    self._fd_to_flags.pop(key.fd, None)
+            if events != key.events or data != key.data:
+                key = key._replace(events=events, data=data)
+                self._fd_to_key[key.fd] = key
+            return key
+
         def select(self, timeout=None):
             if timeout is None:
                 timeout = -1
@@ -443,26 +551,19 @@ if hasattr(select, 'epoll'):
             max_ev = max(len(self._fd_to_key), 1)
 
             ready = []
-            fd_event_list = []
             try:
-                fd_event_list = self._epoll.poll(timeout, max_ev)
+                # Translating the events and looking up the keys is done
+                # in C, which matters with many ready file objects.
+                ready = self._epoll._poll_keys(self._fd_to_key, timeout,
+                                               max_ev)
             except (EnvironmentError, select.error) as e:
                 if e.args[0] == errno.EINTR:
                     return ready
-            for fd, event in fd_event_list:
-                events = 0
-                if event & ~select.EPOLLIN:
-                    events |= EVENT_WRITE
-                if event & ~select.EPOLLOUT:
-                    events |= EVENT_READ
-
-                key = self._key_from_fd(fd)
-                if key:
-                    ready.append((key, events & key.events))
             return ready
 
         def close(self):
             self._epoll.close()
+            self._fd_to_flags.clear()
             super(EpollSelector, self).close()
 
 
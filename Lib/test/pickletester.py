@@ -21,9 +21,12 @@ except ImportError:
 # Tests that try a number of pickle protocols should have a
 #     for proto in protocols:
 # kind of outer loop.
-assert pickle.HIGHEST_PROTOCOL == cPickle.HIGHEST_PROTOCOL == 2
+assert pickle.HIGHEST_PROTOCOL == cPickle.HIGHEST_PROTOCOL == 5
 protocols = range(pickle.HIGHEST_PROTOCOL + 1)
 
+# Keep in synch with pickle.py and cPickle.
+FRAME_SIZE_TARGET = 64 * 1024
+
 # Copy of test.test_support.run_with_locale. This is needed to support Python
 # 2.4, which didn't include it. This is all to support test_xpickle, which
 # bounces pickled objects through older Python versions to test backwards
@@ -865,6 +868,10 @@ class AbstractPickleTests(unittest.TestCase):
 
     _testdata = AbstractUnpickleTests._testdata
 
+    # cPickle's list-based picklers (no file given) neither frame their
+    # output nor use MEMOIZE.
+    file_based = True
+
     def setUp(self):
         pass
 
@@ -1218,7 +1225,8 @@ class AbstractPickleTests(unittest.TestCase):
                 s = self.dumps(x, proto)
                 y = self.loads(s)
                 self.assertEqual(x, y, (proto, x, s, y))
-                expected = expected_opcode[proto, len(x)]
+                # Protocols above 2 spell short tuples like protocol 2.
+                expected = expected_opcode[min(proto, 2), len(x)]
                 self.assertEqual(opcode_in_pickle(expected, s), True)
 
     def test_singletons(self):
@@ -1240,7 +1248,7 @@ class AbstractPickleTests(unittest.TestCase):
                 s = self.dumps(x, proto)
                 y = self.loads(s)
                 self.assertTrue(x is y, (proto, x, s, y))
-                expected = expected_opcode[proto, x]
+                expected = expected_opcode[min(proto, 2), x]
                 self.assertEqual(opcode_in_pickle(expected, s), True)
 
     def test_newobj_tuple(self):
@@ -1566,6 +1574,122 @@ class AbstractPickleTests(unittest.TestCase):
             else:
                 self._check_pickling_with_opcode(obj, pickle.SETITEMS, proto)
 
+    # Tests for protocols 4 and 5
+
+    def test_sets(self):
+        for proto in protocols:
+            for x in set(), set([1, 'abc']), set(range(2500)):
+                s = self.dumps(x, proto)
+                y = self.loads(s)
+                self.assertEqual(x, y)
+                self.assertEqual(type(y), set)
+                self.assertEqual(opcode_in_pickle(pickle.EMPTY_SET, s),
+                                 proto >= 4)
+            for x in frozenset(), frozenset([1, 'abc']):
+                s = self.dumps(x, proto)
+                y = self.loads(s)
+                self.assertEqual(x, y)
+                self.assertEqual(type(y), frozenset)
+                self.assertEqual(opcode_in_pickle(pickle.FROZENSET, s),
+                                 proto >= 4)
+
+    def test_bytearray(self):
+        for proto in protocols:
+            for x in bytearray(), bytearray('xyz'), bytearray('x' * 100000):
+                s = self.dumps(x, proto)
+                y = self.loads(s)
+                self.assertEqual(x, y)
+                self.assertEqual(type(y), bytearray)
+                self.assertEqual(opcode_in_pickle(pickle.BYTEARRAY8, s),
+                                 proto >= 5)
+
+    def test_memoize(self):
+        shared = [1, 2]
+        x = [shared, shared, (shared,), 'abc']
+        for proto in protocols:
+            s = self.dumps(x, proto)
+            y = self.loads(s)
+            self.assertEqual(x, y)
+            self.assertIs(y[0], y[1])
+            self.assertIs(y[0], y[2][0])
+            self.assertEqual(opcode_in_pickle(pickle.MEMOIZE, s),
+                             proto >= 4 and self.file_based)
+            if proto >= 4 and self.file_based:
+                self.assertFalse(opcode_in_pickle(pickle.BINPUT, s))
+                self.assertFalse(opcode_in_pickle(pickle.LONG_BINPUT, s))
+
+    def test_stack_global(self):
+        for proto in protocols:
+            s = self.dumps(len, proto)
+            self.assertIs(self.loads(s), len)
+            self.assertEqual(opcode_in_pickle(pickle.STACK_GLOBAL, s),
+                             proto >= 4)
+            self.assertEqual(opcode_in_pickle(pickle.GLOBAL, s), proto < 4)
+
+    def test_newobj_ex(self):
+        x = REX_newobj_ex.__new__(REX_newobj_ex, 42, tag='spam')
+        for proto in protocols:
+            s = self.dumps(x, proto)
+            y = self.loads(s)
+            self.assertEqual(type(y), REX_newobj_ex)
+            self.assertEqual(y.value, 42)
+            self.assertEqual(y.tag, 'spam')
+            self.assertEqual(opcode_in_pickle(pickle.NEWOBJ_EX, s),
+                             proto >= 4)
+
+    def test_framing_many_objects(self):
+        obj = range(10**5)
+        for proto in protocols:
+            s = self.dumps(obj, proto)
+            self.assertEqual(self.loads(s), obj)
+            frames = [arg for op, arg, pos in pickletools.genops(s)
+                      if op.name == 'FRAME']
+            if proto < 4 or not self.file_based:
+                self.assertEqual(frames, [])
+                continue
+            self.assertGreater(len(frames), 1)
+            # Frames are committed once they reach the target size, so all
+            # but the last one are at least that large, and not by much.
+            for size in frames[:-1]:
+                self.assertGreaterEqual(size, FRAME_SIZE_TARGET)
+                self.assertLess(size, 2 * FRAME_SIZE_TARGET)
+
+    def test_framing_large_objects(self):
+        # Large strings are written outside of any frame.
+        big = 'x' * (4 * FRAME_SIZE_TARGET)
+        obj = [1, big, 'abc', big + 'y', u'z' * (2 * FRAME_SIZE_TARGET)]
+        if not self.file_based:
+            return
+        for proto in protocols[4:]:
+            s = self.dumps(obj, proto)
+            self.assertEqual(self.loads(s), obj)
+            frames = [arg for op, arg, pos in pickletools.genops(s)
+                      if op.name == 'FRAME']
+            self.assertTrue(frames)
+            self.assertLess(max(frames), FRAME_SIZE_TARGET)
+
+    def test_framing_unframed_input(self):
+        # Frames are optional, an unpickler must accept pickles without.
+        obj = [1, 'abc', (2, 3)]
+        for proto in protocols[4:]:
+            s = self.dumps(obj, proto)
+            stripped = s
+            for op, arg, pos in pickletools.genops(s):
+                if op.name == 'FRAME':
+                    stripped = s[:pos] + s[pos + 9:]
+                    break
+            self.assertEqual(self.loads(stripped), obj)
+
+    def test_frame_truncated(self):
+        if not self.file_based:
+            return
+        for proto in protocols[4:]:
+            s = self.dumps([1, 2, 3], proto)
+            self.assertTrue(opcode_in_pickle(pickle.FRAME, s))
+            self.assertRaises((pickle.UnpicklingError,
+                               cPickle.UnpicklingError, EOFError),
+                              self.loads, s[:-2])
+
 
 # Test classes for reduce_ex
 
@@ -1642,6 +1766,17 @@ class REX_seven(object):
 
 # Test classes for newobj
 
+class REX_newobj_ex(object):
+    """Calling __new__ requires keyword arguments"""
+    def __new__(cls, value, tag=None):
+        self = object.__new__(cls)
+        self.value = value
+        self.tag = tag
+        return self
+    def __reduce_ex__(self, proto):
+        return (copy_reg.__newobj_ex__,
+                (type(self), (self.value,), {'tag': self.tag}))
+
 class MyInt(int):
     sample = 1
 
@@ -1724,7 +1859,7 @@ class AbstractPickleModuleTests(unittest.TestCase):
 
     def test_highest_protocol(self):
         # Of course this needs to be changed when HIGHEST_PROTOCOL changes.
-        self.assertEqual(self.module.HIGHEST_PROTOCOL, 2)
+        self.assertEqual(self.module.HIGHEST_PROTOCOL, 5)
 
     def test_callapi(self):
         f = cStringIO.StringIO()
@@ -1754,6 +1889,80 @@ class AbstractPickleModuleTests(unittest.TestCase):
         s = '\x58\0\0\0\x54'
         self.assertRaises(EOFError, self.module.loads, s)
 
+    def test_buffer_callback_needs_protocol_5(self):
+        f = cStringIO.StringIO()
+        for proto in range(5):
+            self.assertRaises(ValueError, self.module.dumps, 1, proto,
+                              buffer_callback=[].append)
+            self.assertRaises(ValueError, self.module.Pickler, f, proto,
+                              buffer_callback=[].append)
+
+    def test_picklebuffer_needs_protocol_5(self):
+        pb = pickle.PickleBuffer(bytearray('abc'))
+        for proto in range(5):
+            self.assertRaises(self.module.PicklingError,
+                              self.module.dumps, pb, proto)
+
+    def test_in_band_buffers(self):
+        for obj, expected in ((bytearray('abc'), bytearray('abc')),
+                              ('def', 'def')):
+            pb = pickle.PickleBuffer(obj)
+            s = self.module.dumps(pb, 5)
+            y = self.module.loads(s)
+            self.assertEqual(type(y), type(expected))
+            self.assertEqual(y, expected)
+            self.assertFalse(opcode_in_pickle(pickle.NEXT_BUFFER, s))
+            # A true value from buffer_callback keeps the data in-band
+            s = self.module.dumps(pb, 5, buffer_callback=lambda buf: True)
+            self.assertEqual(self.module.loads(s), expected)
+
+    def test_in_band_buffer_sizes(self):
+        for n in (0, 255, 256, 100000):
+            for obj in (bytearray('x' * n), 'x' * n):
+                pb = pickle.PickleBuffer(obj)
+                y = self.module.loads(self.module.dumps([pb, pb], 5))
+                self.assertEqual(type(y[0]), type(obj))
+                self.assertEqual(y[0], obj)
+                self.assertIs(y[1], y[0])
+
+    def test_out_of_band_buffers(self):
+        b = bytearray('x' * 1000)
+        obj = [1, pickle.PickleBuffer(b), 'abc']
+        buffers = []
+        s = self.module.dumps(obj, 5, buffer_callback=buffers.append)
+        self.assertLess(len(s), 100)
+        self.assertEqual(len(buffers), 1)
+        self.assertIs(buffers[0], obj[1])
+        self.assertTrue(opcode_in_pickle(pickle.NEXT_BUFFER, s))
+        self.assertFalse(opcode_in_pickle(pickle.READONLY_BUFFER, s))
+        # The buffers are handed back as they are, without a copy
+        y = self.module.loads(s, buffers=[b])
+        self.assertEqual(y, [1, b, 'abc'])
+        self.assertIs(y[1], b)
+        # Missing buffers
+        self.assertRaises(self.module.UnpicklingError,
+                          self.module.loads, s)
+        self.assertRaises(self.module.UnpicklingError,
+                          self.module.loads, s, buffers=[])
+        f = cStringIO.StringIO(s)
+        y = self.module.Unpickler(f, buffers=iter([b])).load()
+        self.assertIs(y[1], b)
+
+    def test_out_of_band_readonly_buffers(self):
+        pb = pickle.PickleBuffer('abc')
+        buffers = []
+        s = self.module.dumps(pb, 5, buffer_callback=buffers.append)
+        self.assertTrue(opcode_in_pickle(pickle.READONLY_BUFFER, s))
+        # A read-only buffer is returned unchanged
+        y = self.module.loads(s, buffers=['abc'])
+        self.assertEqual(y, 'abc')
+        # A writable buffer is wrapped in a read-only view
+        b = bytearray('abc')
+        y = self.module.loads(s, buffers=[b])
+        self.assertIsInstance(y, memoryview)
+        self.assertTrue(y.readonly)
+        self.assertEqual(y.tobytes(), 'abc')
+
 
 class AbstractPersistentPicklerTests(unittest.TestCase):
 
@@ -6,7 +6,7 @@ import unittest
 import warnings
 from test import test_support
 from weakref import proxy
-import array, cStringIO
+import array, cStringIO, operator
 from cPickle import loads, dumps, HIGHEST_PROTOCOL
 import sys
 
@@ -788,6 +788,39 @@ class BaseTest(unittest.TestCase):
             b = buffer(a)
         self.assertEqual(b[0], a.tostring()[0])
 
+    def test_memoryview(self):
+        a = array.array(self.typecode, self.example)
+        m = memoryview(a)
+        self.assertIs(m.obj, a)
+        self.assertEqual(m.format, self.typecode)
+        self.assertEqual(m.itemsize, a.itemsize)
+        self.assertEqual(m.shape, (len(a),))
+        self.assertEqual(m.tobytes(), a.tostring())
+        if self.typecode != 'u':
+            self.assertEqual(m.tolist(), a.tolist())
+        # The array can't change size while the memory is exported
+        self.assertRaises(BufferError, a.append, a[0])
+        self.assertRaises(BufferError, a.extend, a[0:1])
+        self.assertRaises(BufferError, a.insert, 0, a[0])
+        self.assertRaises(BufferError, a.pop)
+        self.assertRaises(BufferError, a.remove, a[0])
+        self.assertRaises(BufferError, a.fromlist, a.tolist())
+        self.assertRaises(BufferError, a.fromstring, a.tostring())
+        self.assertRaises(BufferError, operator.delitem, a, 0)
+        self.assertRaises(BufferError, operator.delitem, a, slice(0, 1))
+        self.assertRaises(BufferError, operator.iadd, a, a)
+        self.assertRaises(BufferError, operator.imul, a, 2)
+        # but its items can be changed through either object
+        a[0] = a[1]
+        self.assertEqual(m[0], m[1])
+        m[1:2] = m[2:3]
+        self.assertEqual(a[1], a[2])
+        with self.assertRaises((TypeError, ValueError)):
+            m[1] = b"x" * (a.itemsize + 1)
+        m.release()
+        a.append(a[0])
+        self.assertEqual(len(a), len(self.example) + 1)
+
     def test_weakref(self):
         s = array.array(self.typecode, self.example)
         p = proxy(s)
@@ -811,6 +844,38 @@ class BaseTest(unittest.TestCase):
             warnings.filterwarnings("ignore", '', DeprecationWarning)
             ArraySubclassWithKwargs('b', newarg=1)
 
+    def test_take(self):
+        a = array.array(self.typecode, self.example)
+        self.assertEqual(a.take([]), array.array(self.typecode))
+        self.assertEqual(a.take([2, 0, -1, 2]),
+            array.array(self.typecode, [a[2], a[0], a[-1], a[2]]))
+        self.assertEqual(a.take(array.array('b', [1, 3])), a[1:4:2])
+        self.assertEqual(a.take(array.array('L', [1, 3])), a[1:4:2])
+        self.assertEqual(a.take(xrange(len(a))), a)
+        self.assertRaises(IndexError, a.take, [0, len(a)])
+        self.assertRaises(IndexError, a.take, [-len(a)-1])
+        self.assertRaises(TypeError, a.take, 42)
+        self.assertRaises(TypeError, a.take, [1.0])
+
+    def test_put(self):
+        a = array.array(self.typecode, self.example)
+        b = array.array(self.typecode, self.example)
+        a.put([0, -1], self.outside)
+        b[0] = b[-1] = self.outside
+        self.assertEqual(a, b)
+        a.put(array.array('l', [1, 2]), a[2:4])
+        b[1:3] = b[2:4]
+        self.assertEqual(a, b)
+        a.put([], self.outside)
+        self.assertEqual(a, b)
+        # nothing is changed on errors
+        self.assertRaises(IndexError, a.put, [0, len(a)], self.outside)
+        self.assertRaises(ValueError, a.put, [0, 1], a[:1])
+        other = 'd' if self.typecode != 'd' else 'f'
+        self.assertRaises(TypeError, a.put, [0], array.array(other, [1]))
+        self.assertEqual(a, b)
+        self.assertRaises(TypeError, a.put, [0])
+
 
 class StringTest(BaseTest):
 
@@ -819,6 +884,13 @@ class StringTest(BaseTest):
         a = array.array(self.typecode, self.example)
         self.assertRaises(TypeError, a.__setitem__, 0, self.example[:2])
 
+    def test_numeric_operations(self):
+        a = array.array(self.typecode, self.example)
+        self.assertRaises(TypeError, a.add, a)
+        self.assertRaises(TypeError, a.sum)
+        self.assertRaises(TypeError, a.max)
+        self.assertRaises(TypeError, a.compare, '<', a)
+
 class CharacterTest(StringTest):
     typecode = 'c'
     example = '\x01azAZ\x00\xfe'
@@ -950,6 +1022,69 @@ class NumberTest(BaseTest):
         self.assertEqual(a[-1] in a, True)
         self.assertEqual(b[0] not in a, True)
 
+    def test_arithmetic(self):
+        a = array.array(self.typecode, [0, 1, 42, 3])
+        b = array.array(self.typecode, [2, 1, 0, 0])
+        self.assertEqual(a.add(2), array.array(self.typecode, [2, 3, 44, 5]))
+        self.assertEqual(a.add(b), array.array(self.typecode, [2, 2, 42, 3]))
+        self.assertEqual(a.sub(b.mul(0)), a)
+        self.assertEqual(a.sub(a), array.array(self.typecode, [0]*4))
+        self.assertEqual(a.mul(3), array.array(self.typecode, [0, 3, 126, 9]))
+        self.assertEqual(a.mul(b), array.array(self.typecode, [0, 1, 0, 0]))
+        self.assertEqual(a, array.array(self.typecode, [0, 1, 42, 3]))
+        self.assertIs(type(ArraySubclass(self.typecode, a).add(1)),
+                      array.array)
+        empty = array.array(self.typecode)
+        self.assertEqual(empty.add(1), empty)
+        self.assertEqual(empty.mul(empty), empty)
+        self.assertRaises(ValueError, a.add, b[:2])
+        other = 'd' if self.typecode != 'd' else 'f'
+        self.assertRaises(TypeError, a.add, array.array(other, [1, 2, 3, 4]))
+        self.assertRaises(TypeError, a.add, 'x')
+        self.assertRaises(TypeError, a.mul)
+
+    def test_sum_dot(self):
+        a = array.array(self.typecode, [0, 1, 42, 3])
+        self.assertEqual(a.sum(), 46)
+        self.assertEqual(a.dot(a), 0 + 1 + 42*42 + 9)
+        self.assertEqual(a.dot(a.mul(0)), 0)
+        self.assertEqual(array.array(self.typecode).sum(), 0)
+        self.assertEqual(array.array(self.typecode).dot(
+            array.array(self.typecode)), 0)
+        self.assertRaises(TypeError, a.dot, 2)
+        self.assertRaises(TypeError, a.dot, [0, 1, 42, 3])
+        self.assertRaises(ValueError, a.dot, a[1:])
+
+    def test_min_max(self):
+        for values in [42], [3, 1, 4, 1, 5, 9, 2, 6], range(10, 0, -1):
+            a = array.array(self.typecode, values)
+            self.assertEqual(a.min(), min(values))
+            self.assertEqual(a.max(), max(values))
+            self.assertEqual(type(a.min()), type(a[0]))
+        self.assertRaises(ValueError, array.array(self.typecode).min)
+        self.assertRaises(ValueError, array.array(self.typecode).max)
+
+    def test_compare(self):
+        values = [3, 1, 4, 1, 5, 9, 2, 6]
+        a = array.array(self.typecode, values)
+        b = array.array(self.typecode, [1]*len(values))
+        for op, func in [('<', operator.lt), ('<=', operator.le),
+                         ('==', operator.eq), ('!=', operator.ne),
+                         ('>', operator.gt), ('>=', operator.ge)]:
+            result = a.compare(op, 4)
+            self.assertEqual(result.typecode, 'l')
+            self.assertEqual(result.tolist(),
+                [i for i, x in enumerate(values) if func(x, 4)])
+            self.assertEqual(a.compare(op, b).tolist(),
+                [i for i, x in enumerate(values) if func(x, 1)])
+        self.assertEqual(a.take(a.compare('>', 2)),
+                         array.array(self.typecode, [3, 4, 5, 9, 6]))
+        self.assertEqual(array.array(self.typecode).compare('<', 1),
+                         array.array('l'))
+        self.assertRaises(ValueError, a.compare, '<>', 1)
+        self.assertRaises(ValueError, a.compare, '<', b[1:])
+        self.assertRaises(TypeError, a.compare, '<')
+
     def check_overflow(self, lower, upper):
         # method to be used by subclasses
 
@@ -997,6 +1132,29 @@ class SignedNumberTest(NumberTest):
         upper = long(pow(2, a.itemsize * 8 - 1)) - 1L
         self.check_overflow(lower, upper)
 
+    def test_arithmetic_overflow(self):
+        a = array.array(self.typecode)
+        lower = -1 * long(pow(2, a.itemsize * 8 - 1))
+        upper = long(pow(2, a.itemsize * 8 - 1)) - 1L
+        a = array.array(self.typecode, [lower, -1, 0, 1, upper])
+        self.assertEqual(a.add(a.mul(0)), a)
+        self.assertEqual(a[1:].mul(-1), array.array(self.typecode,
+                                                    [1, 0, -1, -upper]))
+        self.assertRaises(OverflowError, a.add, 1)
+        self.assertRaises(OverflowError, a.sub, 1)
+        self.assertRaises(OverflowError, a.mul, 2)
+        self.assertRaises(OverflowError, a.mul, -1)
+        self.assertRaises(OverflowError, a.add, upper + 1)
+        self.assertRaises(OverflowError, a.sub,
+                          array.array(self.typecode, [1, 0, 0, 0, 0]))
+        big = array.array(self.typecode, [upper, lower, upper])
+        self.assertEqual(big.sum(), upper + lower + upper)
+        self.assertEqual(array.array(self.typecode, [upper]*3).sum(),
+                         3*upper)
+        self.assertEqual(array.array(self.typecode, [lower]*3).sum(),
+                         3*lower)
+        self.assertEqual(big.dot(big), upper*upper + lower*lower + upper*upper)
+
 class UnsignedNumberTest(NumberTest):
     example = [0, 1, 17, 23, 42, 0xff]
     smallerexample = [0, 1, 17, 23, 42, 0xfe]
@@ -1009,17 +1167,31 @@ class UnsignedNumberTest(NumberTest):
         upper = long(pow(2, a.itemsize * 8)) - 1L
         self.check_overflow(lower, upper)
 
+    def test_arithmetic_overflow(self):
+        a = array.array(self.typecode)
+        upper = long(pow(2, a.itemsize * 8)) - 1L
+        a = array.array(self.typecode, [0, 1, upper])
+        self.assertEqual(a.sub(a), array.array(self.typecode, [0, 0, 0]))
+        self.assertEqual(a.mul(1), a)
+        self.assertRaises(OverflowError, a.add, 1)
+        self.assertRaises(OverflowError, a.sub, 1)
+        self.assertRaises(OverflowError, a.mul, 2)
+        self.assertRaises(OverflowError, a.add, -1)
+        big = array.array(self.typecode, [upper]*3)
+        self.assertEqual(big.sum(), 3*upper)
+        self.assertEqual(big.dot(big), 3*upper*upper)
+
     @test_support.cpython_only
     def test_sizeof_with_buffer(self):
         a = array.array(self.typecode, self.example)
-        basesize = test_support.calcvobjsize('4P')
+        basesize = test_support.calcvobjsize('5P')
         buffer_size = a.buffer_info()[1] * a.itemsize
         test_support.check_sizeof(self, a, basesize + buffer_size)
 
     @test_support.cpython_only
     def test_sizeof_without_buffer(self):
         a = array.array(self.typecode)
-        basesize = test_support.calcvobjsize('4P')
+        basesize = test_support.calcvobjsize('5P')
         test_support.check_sizeof(self, a, basesize)
 
 
@@ -1099,6 +1271,19 @@ class FPTest(NumberTest):
             b.byteswap()
             self.assertEqual(a, b)
 
+    def test_float_arithmetic(self):
+        a = array.array(self.typecode, [0.5, -1.5, 1e30])
+        self.assertEqual(a.mul(0.5).tolist(), [0.25, -0.75, a[2]*0.5])
+        self.assertEqual(a.add(0.25).tolist(), [0.75, -1.25, a[2]])
+        self.assertEqual(a.sum(), 0.5 - 1.5 + a[2])
+        self.assertEqual(a[:2].dot(a[:2]), 2.5)
+        self.assertIsInstance(array.array(self.typecode).sum(), float)
+        nan = array.array(self.typecode, [float('nan'), 1.0, float('nan')])
+        self.assertEqual(nan.compare('==', nan).tolist(), [1])
+        self.assertEqual(nan.compare('!=', 1.0).tolist(), [0, 2])
+        self.assertEqual(nan[1:].min(), 1.0)
+        self.assertRaises(TypeError, a.add, 'x')
+
 class FloatTest(FPTest):
     typecode = 'f'
     minitemsize = 4
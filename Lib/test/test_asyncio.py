@@ -0,0 +1,422 @@
+import concurrent.futures
+import socket
+import threading
+import time
+import unittest
+from test import test_support
+
+import asyncio
+
+
+class LoopTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(None)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_loop(self, coro):
+        return self.loop.run_until_complete(coro)
+
+
+class EventLoopTests(LoopTestCase):
+
+    def test_call_soon_order(self):
+        calls = []
+        for i in range(5):
+            self.loop.call_soon(calls.append, i)
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        self.assertEqual(calls, [0, 1, 2, 3, 4])
+
+    def test_call_later(self):
+        calls = []
+        self.loop.call_later(0.05, calls.append, 'late')
+        self.loop.call_later(0.01, calls.append, 'early')
+        self.loop.call_later(0.1, self.loop.stop)
+        t0 = time.time()
+        self.loop.run_forever()
+        self.assertGreaterEqual(time.time() - t0, 0.09)
+        self.assertEqual(calls, ['early', 'late'])
+
+    def test_call_later_cancel(self):
+        calls = []
+        handle = self.loop.call_later(0.01, calls.append, 1)
+        handle.cancel()
+        self.assertTrue(handle.cancelled())
+        self.loop.call_later(0.05, self.loop.stop)
+        self.loop.run_forever()
+        self.assertEqual(calls, [])
+
+    def test_cancelled_timers_are_purged(self):
+        handles = [self.loop.call_later(60, lambda: None)
+                   for i in range(200)]
+        for handle in handles:
+            handle.cancel()
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        self.assertEqual(len(self.loop._scheduled), 0)
+
+    def test_call_soon_threadsafe(self):
+        calls = []
+
+        def worker():
+            self.loop.call_soon_threadsafe(calls.append, 'thread')
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        self.loop.run_forever()
+        t.join()
+        self.assertEqual(calls, ['thread'])
+
+    def test_run_until_complete(self):
+        async def coro():
+            await asyncio.sleep(0, loop=self.loop)
+            return 42
+        self.assertEqual(self.run_loop(coro()), 42)
+        self.assertFalse(self.loop.is_running())
+
+    def test_run_until_complete_nested(self):
+        async def coro():
+            self.loop.run_until_complete(asyncio.sleep(0, loop=self.loop))
+        with self.assertRaises(RuntimeError):
+            self.run_loop(coro())
+
+    def test_closed_loop(self):
+        self.loop.close()
+        self.assertTrue(self.loop.is_closed())
+        self.assertRaises(RuntimeError, self.loop.call_soon, lambda: None)
+
+    def test_run_in_executor(self):
+        def func(a, b):
+            return threading.current_thread(), a + b
+        thread, res = self.run_loop(
+            self.loop.run_in_executor(None, func, 1, 2))
+        self.assertEqual(res, 3)
+        self.assertIsNot(thread, threading.current_thread())
+
+    def test_run_in_custom_executor(self):
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            res = self.run_loop(self.loop.run_in_executor(executor, pow, 2, 8))
+        self.assertEqual(res, 256)
+
+    def test_exception_handler(self):
+        contexts = []
+        self.loop.set_exception_handler(
+            lambda loop, context: contexts.append(context))
+
+        def boom():
+            raise ZeroDivisionError
+
+        self.loop.call_soon(boom)
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        self.assertEqual(len(contexts), 1)
+        self.assertIsInstance(contexts[0]['exception'], ZeroDivisionError)
+
+    def test_get_running_loop(self):
+        self.assertRaises(RuntimeError, asyncio.get_running_loop)
+
+        async def coro():
+            return asyncio.get_running_loop()
+        self.assertIs(self.run_loop(coro()), self.loop)
+
+
+class TaskTests(LoopTestCase):
+
+    def test_task_result(self):
+        async def coro():
+            return 'done'
+        task = self.loop.create_task(coro())
+        self.assertIsInstance(task, asyncio.Task)
+        self.run_loop(task)
+        self.assertEqual(task.result(), 'done')
+
+    def test_task_cancel(self):
+        async def coro():
+            await asyncio.sleep(10, loop=self.loop)
+        task = self.loop.create_task(coro())
+        self.loop.call_later(0.01, task.cancel)
+        self.assertRaises(asyncio.CancelledError, self.run_loop, task)
+        self.assertTrue(task.cancelled())
+
+    def test_sleep_result(self):
+        res = self.run_loop(asyncio.sleep(0.01, 'x', loop=self.loop))
+        self.assertEqual(res, 'x')
+
+    def test_wait_for_timeout(self):
+        async def coro():
+            await asyncio.wait_for(asyncio.sleep(10, loop=self.loop), 0.01,
+                                   loop=self.loop)
+        self.assertRaises(asyncio.TimeoutError, self.run_loop, coro())
+
+    def test_wait(self):
+        async def coro():
+            fs = [asyncio.sleep(d, d, loop=self.loop) for d in (0.01, 0.5)]
+            done, pending = await asyncio.wait(
+                fs, loop=self.loop, return_when=asyncio.FIRST_COMPLETED)
+            for f in pending:
+                f.cancel()
+            return [f.result() for f in done]
+        self.assertEqual(self.run_loop(coro()), [0.01])
+
+    def test_gather(self):
+        async def double(x):
+            await asyncio.sleep(0, loop=self.loop)
+            return x * 2
+        res = self.run_loop(asyncio.gather(*[double(i) for i in range(10)],
+                                           loop=self.loop))
+        self.assertEqual(res, [i * 2 for i in range(10)])
+
+    def test_gather_return_exceptions(self):
+        async def fail():
+            raise ValueError
+        res = self.run_loop(asyncio.gather(fail(), asyncio.sleep(0, 1),
+                                           loop=self.loop,
+                                           return_exceptions=True))
+        self.assertIsInstance(res[0], ValueError)
+        self.assertEqual(res[1], 1)
+
+    def test_shield(self):
+        inner = self.loop.create_future()
+        outer = asyncio.shield(inner, loop=self.loop)
+        outer.cancel()
+        self.assertRaises(asyncio.CancelledError, self.run_loop, outer)
+        self.assertFalse(inner.cancelled())
+        inner.set_result(1)
+
+    def test_wrap_future(self):
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            cf = executor.submit(pow, 3, 3)
+            fut = asyncio.wrap_future(cf, loop=self.loop)
+            self.assertEqual(self.run_loop(fut), 27)
+
+    def test_run_coroutine_threadsafe(self):
+        async def add(a, b):
+            await asyncio.sleep(0, loop=self.loop)
+            return a + b
+
+        results = []
+
+        def worker():
+            cf = asyncio.run_coroutine_threadsafe(add(1, 2), self.loop)
+            results.append(cf.result(5))
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        self.loop.run_forever()
+        t.join()
+        self.assertEqual(results, [3])
+
+    def test_current_task(self):
+        async def coro():
+            return asyncio.Task.current_task(loop=self.loop)
+        task = self.loop.create_task(coro())
+        self.assertIs(self.run_loop(task), task)
+
+
+class SocketTests(LoopTestCase):
+
+    def test_sock_ops(self):
+        rsock, wsock = socket.socketpair()
+        rsock.setblocking(False)
+        wsock.setblocking(False)
+        payload = b'x' * (1024 * 1024)
+
+        async def reader():
+            chunks = []
+            size = 0
+            while size < len(payload):
+                data = await self.loop.sock_recv(rsock, 65536)
+                chunks.append(data)
+                size += len(data)
+            return b''.join(chunks)
+
+        try:
+            res = self.run_loop(asyncio.gather(
+                reader(), self.loop.sock_sendall(wsock, payload),
+                loop=self.loop))
+        finally:
+            rsock.close()
+            wsock.close()
+        self.assertEqual(res[0], payload)
+
+    def test_sock_accept_connect(self):
+        listener = socket.socket()
+        listener.bind((test_support.HOST, 0))
+        listener.listen(5)
+        listener.setblocking(False)
+        client = socket.socket()
+        client.setblocking(False)
+
+        async def main():
+            accept = self.loop.create_task(self.loop.sock_accept(listener))
+            await self.loop.sock_connect(client, listener.getsockname())
+            conn, addr = await accept
+            conn.close()
+            return addr
+
+        try:
+            addr = self.run_loop(main())
+            self.assertEqual(addr, client.getsockname())
+        finally:
+            client.close()
+            listener.close()
+
+
+class StreamTests(LoopTestCase):
+
+    def test_readline_readexactly(self):
+        reader = asyncio.StreamReader(loop=self.loop)
+        reader.feed_data(b'line1\nline2\nabc')
+        reader.feed_eof()
+
+        async def main():
+            return (await reader.readline(), await reader.readline(),
+                    await reader.readexactly(2), await reader.read())
+        self.assertEqual(self.run_loop(main()),
+                         (b'line1\n', b'line2\n', b'ab', b'c'))
+
+    def test_readexactly_incomplete(self):
+        reader = asyncio.StreamReader(loop=self.loop)
+        reader.feed_data(b'abc')
+        reader.feed_eof()
+        with self.assertRaises(asyncio.IncompleteReadError) as cm:
+            self.run_loop(reader.readexactly(5))
+        self.assertEqual(cm.exception.partial, b'abc')
+        self.assertEqual(cm.exception.expected, 5)
+
+    def test_readline_limit(self):
+        reader = asyncio.StreamReader(limit=4, loop=self.loop)
+        reader.feed_data(b'toolongline\nok\n')
+        self.assertRaises(ValueError, self.run_loop, reader.readline())
+        self.assertEqual(self.run_loop(reader.readline()), b'ok\n')
+
+    def test_echo_server(self):
+        nclients = 50
+
+        async def handle(reader, writer):
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(line)
+                await writer.drain()
+            writer.close()
+
+        async def client(i):
+            reader, writer = await asyncio.open_connection(
+                host, port, loop=self.loop)
+            msgs = []
+            for j in range(10):
+                writer.write(('%d-%d\n' % (i, j)).encode('ascii'))
+                await writer.drain()
+                msgs.append(await reader.readline())
+            writer.close()
+            return msgs
+
+        server = self.run_loop(asyncio.start_server(
+            handle, test_support.HOST, 0, loop=self.loop))
+        host, port = server.sockets[0].getsockname()[:2]
+        try:
+            res = self.run_loop(asyncio.gather(
+                *[client(i) for i in range(nclients)], loop=self.loop))
+        finally:
+            server.close()
+            self.run_loop(server.wait_closed())
+        for i, msgs in enumerate(res):
+            self.assertEqual(msgs, [('%d-%d\n' % (i, j)).encode('ascii')
+                                    for j in range(10)])
+
+    def test_large_write(self):
+        data = b'y' * (4 * 1024 * 1024)
+
+        async def handle(reader, writer):
+            writer.write(data)
+            await writer.drain()
+            writer.close()
+
+        async def main():
+            server = await asyncio.start_server(
+                handle, test_support.HOST, 0, loop=self.loop)
+            host, port = server.sockets[0].getsockname()[:2]
+            reader, writer = await asyncio.open_connection(
+                host, port, loop=self.loop)
+            res = await reader.read()
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return res
+
+        self.assertEqual(self.run_loop(main()), data)
+
+
+class RunTests(unittest.TestCase):
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+
+    def test_run(self):
+        async def main():
+            await asyncio.sleep(0)
+            return 'ok'
+        self.assertEqual(asyncio.run(main()), 'ok')
+
+    def test_run_cancels_leftover_tasks(self):
+        leftovers = []
+
+        async def forever():
+            await asyncio.sleep(3600)
+
+        async def main():
+            leftovers.append(asyncio.ensure_future(forever()))
+            await asyncio.sleep(0)
+
+        asyncio.run(main())
+        self.assertTrue(leftovers[0].cancelled())
+
+    def test_run_rejects_non_coroutine(self):
+        self.assertRaises(ValueError, asyncio.run, 123)
+
+    def test_run_inside_loop(self):
+        async def main():
+            coro = asyncio.sleep(0)
+            try:
+                asyncio.run(coro)
+            finally:
+                coro.close()
+        self.assertRaises(RuntimeError, asyncio.run, main())
+
+
+class CoroutineTests(unittest.TestCase):
+
+    def test_iscoroutinefunction(self):
+        def gen():
+            yield
+
+        def func():
+            return iter(())
+
+        async def native():
+            pass
+
+        self.assertFalse(asyncio.iscoroutinefunction(gen))
+        self.assertTrue(asyncio.iscoroutinefunction(asyncio.coroutine(gen)))
+        self.assertTrue(asyncio.iscoroutinefunction(asyncio.coroutine(func)))
+        self.assertTrue(asyncio.iscoroutinefunction(native))
+        self.assertIs(asyncio.coroutine(native), native)
+        self.assertFalse(asyncio.iscoroutinefunction(lambda: None))
+
+
+def test_main():
+    test_support.run_unittest(EventLoopTests, TaskTests, SocketTests,
+                              StreamTests, RunTests, CoroutineTests)
+
+
+if __name__ == "__main__":
+    test_main()
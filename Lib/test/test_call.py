@@ -1,3 +1,4 @@
+import sys
 import unittest
 from test import test_support
 
@@ -126,8 +127,195 @@ class CFunctionCalls(unittest.TestCase):
         self.assertRaises(TypeError, [].count, x=2, y=2)
 
 
+class MethodCalls(unittest.TestCase):
+    # obj.meth(...) compiles to LOAD_METHOD/CALL_METHOD; these check that
+    # it still behaves like getattr(obj, 'meth')(...).
+
+    def test_python_method(self):
+        class A(object):
+            def f(self, *args, **kwargs):
+                return self, args, kwargs
+        a = A()
+        self.assertEqual(a.f(), (a, (), {}))
+        self.assertEqual(a.f(1, 2, x=3), (a, (1, 2), {'x': 3}))
+
+    def test_instance_dict_shadows_method(self):
+        class A(object):
+            def f(self):
+                return 'method'
+        a = A()
+        a.f = lambda: 'instance'
+        self.assertEqual(a.f(), 'instance')
+        del a.f
+        self.assertEqual(a.f(), 'method')
+
+    def test_descriptors(self):
+        class A(object):
+            @staticmethod
+            def s(x):
+                return x
+            @classmethod
+            def c(cls, x):
+                return cls, x
+            @property
+            def p(self):
+                return lambda x: (self, x)
+        a = A()
+        self.assertEqual(a.s(1), 1)
+        self.assertEqual(a.c(1), (A, 1))
+        self.assertEqual(a.p(1), (a, 1))
+        self.assertEqual(A.s(2), 2)
+        self.assertEqual(A.c(2), (A, 2))
+
+    def test_getattr_hooks(self):
+        class A(object):
+            def __getattr__(self, name):
+                return lambda: name
+        class B(object):
+            def f(self):
+                return 'f'
+            def __getattribute__(self, name):
+                return lambda: name
+        class Classic:
+            def f(self, x):
+                return x
+        self.assertEqual(A().f(), 'f')
+        self.assertEqual(B().f(), 'f')
+        self.assertEqual(Classic().f(3), 3)
+
+    def test_builtin_methods(self):
+        l = [3, 1, 2]
+        l.sort(reverse=True)
+        self.assertEqual(l, [3, 2, 1])
+        l.append(0)
+        self.assertEqual(l.pop(), 0)
+        self.assertEqual('a,b'.split(','), ['a', 'b'])
+        self.assertEqual(str.upper('a'), 'A')
+        self.assertEqual({'a': 1}.get('a'), 1)
+        self.assertRaises(TypeError, lambda: l.append())
+        self.assertRaises(TypeError, lambda: l.append(1, 2))
+        self.assertRaises(TypeError, lambda: l.append(x=1))
+        self.assertRaises(TypeError, lambda: l.sort(bogus=1))
+        self.assertRaises(TypeError, lambda: str.upper(1))
+
+    def test_missing_method(self):
+        with self.assertRaises(AttributeError):
+            object().missing()
+
+    def test_error_while_evaluating_arguments(self):
+        class A(object):
+            def f(self, x):
+                return x
+        def fail():
+            raise ValueError
+        with self.assertRaises(ValueError):
+            A().f(fail())
+        with self.assertRaises(ValueError):
+            [].append(fail())
+
+    def test_yield_in_arguments(self):
+        def gen(l):
+            l.append((yield))
+            yield l
+        g = gen([])
+        next(g)
+        self.assertEqual(g.send(5), [5])
+        g = gen([])
+        next(g)
+        g.close()
+
+    def test_profiler_sees_builtin_methods(self):
+        events = []
+        def profile(frame, event, arg):
+            if event == 'c_call':
+                events.append(arg.__name__)
+        l = []
+        sys.setprofile(profile)
+        try:
+            l.append(1)
+            l.sort(reverse=True)
+        finally:
+            sys.setprofile(None)
+        self.assertEqual(events[:2], ['append', 'sort'])
+
+
+class FastCalls(unittest.TestCase):
+    # These builtins use METH_FASTCALL, so their arguments come straight
+    # from the value stack, from a tuple, or from a tuple and a dict,
+    # depending on how they are called.
+
+    def test_positional(self):
+        d = {'a': 1}
+        self.assertEqual(d.get('a'), 1)
+        self.assertEqual(d.get('b', 2), 2)
+        self.assertEqual(d.get(*('b', 2)), 2)
+        self.assertEqual(dict.get(d, 'a'), 1)
+        self.assertEqual(apply(d.get, ('b',)), None)
+        self.assertEqual(getattr(d, 'missing', 3), 3)
+        self.assertTrue(isinstance(*(1, int)))
+        self.assertEqual('a b c'.split(None, 1), ['a', 'b c'])
+        self.assertEqual(str.split('a b'), ['a', 'b'])
+        self.assertTrue(u'abc'.endswith(u'c', 1, None))
+        self.assertEqual(bytearray('abc').find('c'), 2)
+
+    def test_positional_errors(self):
+        self.assertRaises(TypeError, {}.get)
+        self.assertRaises(TypeError, {}.get, 1, 2, 3)
+        self.assertRaises(TypeError, [].insert, 0)
+        self.assertRaises(TypeError, 'abc'.startswith)
+        self.assertRaises(TypeError, dict.get, {})
+        self.assertRaises(TypeError, {}.get, 'a', default=1)
+        self.assertRaises(TypeError, {}.get, *('a',), **{'default': 1})
+
+    def test_keywords(self):
+        l = [2, 3, 1]
+        l.sort(reverse=True)
+        self.assertEqual(l, [3, 2, 1])
+        l.sort(key=lambda x: x)
+        self.assertEqual(l, [1, 2, 3])
+        l.sort(None, **{'reverse': True})
+        self.assertEqual(l, [3, 2, 1])
+        list.sort(l, key=lambda x: x, reverse=False)
+        self.assertEqual(l, [1, 2, 3])
+        self.assertEqual(sorted(l, reverse=True), [3, 2, 1])
+        self.assertEqual(round(number=2.5), 3.0)
+        self.assertEqual(round(1.25, ndigits=1), 1.3)
+        self.assertEqual(round(**{u'number': 0.5}), 1.0)
+
+    def test_keyword_errors(self):
+        with self.assertRaises(TypeError):
+            [].sort(foo=1)
+        with self.assertRaises(TypeError):
+            [].sort(None, cmp=None)
+        with self.assertRaises(TypeError):
+            [].sort(None, None, False, None)
+        with self.assertRaises(TypeError):
+            round()
+        with self.assertRaises(TypeError):
+            round(ndigits=1)
+        with self.assertRaises(TypeError):
+            round(1.0, a=1, b=2, c=3, d=4, e=5, f=6, g=7, h=8, i=9)
+        with self.assertRaises(TypeError):
+            round(**{1: 2})
+
+    def test_profiler_sees_fastcall_functions(self):
+        events = []
+        def profile(frame, event, arg):
+            if event == 'c_call':
+                events.append(arg.__name__)
+        l = []
+        sys.setprofile(profile)
+        try:
+            isinstance(l, list)
+            l.sort(reverse=True)
+            round(1.0, ndigits=1)
+        finally:
+            sys.setprofile(None)
+        self.assertEqual(events[:3], ['isinstance', 'sort', 'round'])
+
+
 def test_main():
-    test_support.run_unittest(CFunctionCalls)
+    test_support.run_unittest(CFunctionCalls, MethodCalls, FastCalls)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import collections
 import copy
 import doctest
+import inspect
 import keyword
 import operator
 import pickle
@@ -147,6 +148,44 @@ class TestNamedTuple(unittest.TestCase):
         p = Point(x=11, y=22)
         self.assertEqual(repr(p), 'Point(x=11, y=22)')
 
+    def test_field_descriptors(self):
+        Point = namedtuple('Point', 'x y')
+        p = Point(11, 22)
+        self.assertEqual(Point.x.__doc__, 'Alias for field number 0')
+        self.assertEqual(Point.y.__get__(p, Point), 22)
+        self.assertIs(Point.x.__get__(None, Point), Point.x)
+        with self.assertRaises(AttributeError):
+            p.x = 33
+        with self.assertRaises(AttributeError):
+            del p.y
+        self.assertRaises(TypeError, Point.x.__get__, 42)
+        self.assertRaises(IndexError, Point.y.__get__, (1,))
+        self.assertEqual(copy.copy(Point.y).__get__(p), 22)
+
+    def test_new(self):
+        Point = namedtuple('Point', 'x y')
+        self.assertEqual(Point.__new__(Point, 1, 2), (1, 2))
+        self.assertRaises(TypeError, Point.__new__, int, 1, 2)
+        self.assertRaises(TypeError, Point, 1, x=1)
+        self.assertRaises(TypeError, Point._make, 1)
+        self.assertEqual(Point.__new__.__defaults__, None)
+        Point.__new__.__defaults__ = (22,)
+        self.assertEqual(Point(11), (11, 22))
+        self.assertEqual(Point(y=2, x=1), (1, 2))
+        self.assertRaises(TypeError, Point)
+
+        self.assertEqual(inspect.getargspec(Point.__new__),
+                         (['_cls', 'x', 'y'], None, None, (22,)))
+        self.assertEqual(Point.__new__.__doc__,
+                         'Create new instance of Point(x, y)')
+
+        class SubPoint(Point):
+            __slots__ = ()
+            def __new__(cls, x):
+                return super(SubPoint, cls).__new__(cls, x, -x)
+        self.assertEqual(SubPoint(3), (3, -3))
+        self.assertIs(type(SubPoint._make([1, 2])), SubPoint)
+
     def test_tupleness(self):
         Point = namedtuple('Point', 'x y')
         p = Point(11, 22)
@@ -13,6 +13,8 @@ test_support.import_module('threading')
 
 from test.script_helper import assert_python_ok
 
+import itertools
+import logging
 import os
 import sys
 import threading
@@ -133,10 +135,15 @@ class ThreadPoolShutdownTest(ThreadPoolMixin, ExecutorShutdownTest, unittest.Tes
         pass
 
     def test_threads_terminate(self):
-        self.executor.submit(mul, 21, 2)
-        self.executor.submit(mul, 6, 7)
-        self.executor.submit(mul, 3, 14)
+        def acquire_lock(lock):
+            lock.acquire()
+
+        sem = threading.Semaphore(0)
+        for i in range(3):
+            self.executor.submit(acquire_lock, sem)
         self.assertEqual(len(self.executor._threads), 3)
+        for i in range(3):
+            sem.release()
         self.executor.shutdown()
         for t in self.executor._threads:
             t.join()
@@ -160,6 +167,97 @@ class ThreadPoolShutdownTest(ThreadPoolMixin, ExecutorShutdownTest, unittest.Tes
             t.join()
 
 
+INITIALIZER_STATUS = 'uninitialized'
+
+def init(x):
+    global INITIALIZER_STATUS
+    INITIALIZER_STATUS = x
+
+def get_init_status():
+    return INITIALIZER_STATUS
+
+def init_fail():
+    raise ValueError('error in initializer')
+
+
+def return_lambda():
+    return lambda: 42
+
+
+class InitializerTest:
+    def setUp(self):
+        global INITIALIZER_STATUS
+        INITIALIZER_STATUS = 'uninitialized'
+        self.t1 = time.time()
+        self.executor = self.executor_type(max_workers=self.worker_count,
+                                           initializer=init,
+                                           initargs=('initialized',))
+        self._prime_executor()
+
+    def test_initializer(self):
+        futures = [self.executor.submit(get_init_status)
+                   for _ in range(self.worker_count)]
+
+        for f in futures:
+            self.assertEqual(f.result(), 'initialized')
+
+    def test_initializer_not_callable(self):
+        self.assertRaises(TypeError, self.executor_type, initializer=42)
+
+
+class ThreadPoolInitializerTest(InitializerTest, ThreadPoolMixin,
+                                unittest.TestCase):
+    pass
+
+
+class ProcessPoolInitializerTest(InitializerTest, ProcessPoolMixin,
+                                 unittest.TestCase):
+    pass
+
+
+class FailingInitializerTest:
+    def setUp(self):
+        self.t1 = time.time()
+        self.executor = self.executor_type(max_workers=self.worker_count,
+                                           initializer=init_fail)
+        self._prime_executor()
+
+    def _prime_executor(self):
+        pass
+
+    def test_initializer(self):
+        logger = logging.getLogger('concurrent.futures')
+        old_level = logger.level
+        logger.setLevel(logging.CRITICAL + 1)
+        try:
+            future = self.executor.submit(get_init_status)
+            # Perhaps the executor is already broken
+            with self.assertRaises(futures.BrokenExecutor):
+                future.result()
+            # At some point, the executor should break
+            t1 = time.time()
+            while not self.executor._broken:
+                if time.time() - t1 > 5:
+                    self.fail("executor not broken after 5 s.")
+                time.sleep(0.01)
+            # ... and from this point submit() is guaranteed to fail
+            with self.assertRaises(futures.BrokenExecutor):
+                self.executor.submit(get_init_status)
+        finally:
+            logger.setLevel(old_level)
+
+
+class ThreadPoolFailingInitializerTest(FailingInitializerTest, ThreadPoolMixin,
+                                       unittest.TestCase):
+    pass
+
+
+class ProcessPoolFailingInitializerTest(FailingInitializerTest,
+                                        ProcessPoolMixin,
+                                        unittest.TestCase):
+    pass
+
+
 class ProcessPoolShutdownTest(ProcessPoolMixin, ExecutorShutdownTest, unittest.TestCase):
     def _prime_executor(self):
         pass
@@ -305,14 +403,14 @@ class ThreadPoolWaitTests(ThreadPoolMixin, WaitTests, unittest.TestCase):
         event = threading.Event()
         def future_func():
             event.wait()
-        oldcheckinterval = sys.getcheckinterval()
-        sys.setcheckinterval(1)
+        oldswitchinterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
         try:
             fs = {self.executor.submit(future_func) for i in range(100)}
             event.set()
             futures.wait(fs, return_when=futures.ALL_COMPLETED)
         finally:
-            sys.setcheckinterval(oldcheckinterval)
+            sys.setswitchinterval(oldswitchinterval)
 
 
 class ProcessPoolWaitTests(ProcessPoolMixin, WaitTests, unittest.TestCase):
@@ -408,6 +506,22 @@ class ExecutorTest:
 
         self.assertEqual([None, None], results)
 
+    def test_map_buffersize(self):
+        results = self.executor.map(mul, itertools.count(), itertools.count(),
+                                    buffersize=2)
+        self.assertEqual([next(results) for _ in range(10)],
+                         [x * x for x in range(10)])
+        self.assertEqual(
+            list(self.executor.map(pow, range(10), range(10), buffersize=3)),
+            list(map(pow, range(10), range(10))))
+
+    def test_map_buffersize_invalid(self):
+        self.assertRaises(TypeError, self.executor.map, abs, range(10),
+                          buffersize=2.0)
+        for buffersize in (0, -1):
+            self.assertRaises(ValueError, self.executor.map, abs, range(10),
+                              buffersize=buffersize)
+
     def test_shutdown_race_issue12456(self):
         # Issue #12456: race condition at shutdown where trying to post a
         # sentinel in the call queue blocks (the queue is full while processes
@@ -454,7 +568,63 @@ class ThreadPoolExecutorTest(ThreadPoolMixin, ExecutorTest, unittest.TestCase):
     def test_default_workers(self):
         executor = self.executor_type()
         self.assertEqual(executor._max_workers,
-                         (multiprocessing.cpu_count() or 1) * 5)
+                         min(32, (multiprocessing.cpu_count() or 1) + 4))
+        executor.shutdown()
+
+    def test_idle_thread_reuse(self):
+        executor = self.executor_type()
+        executor.submit(mul, 21, 2).result()
+        executor.submit(mul, 6, 7).result()
+        executor.submit(mul, 3, 14).result()
+        self.assertEqual(len(executor._threads), 1)
+        executor.shutdown(wait=True)
+
+    def test_thread_names_assigned(self):
+        executor = self.executor_type(
+            max_workers=5, thread_name_prefix='SpecialPool')
+        executor.map(abs, range(-5, 5))
+        threads = executor._threads
+        del executor
+        test_support.gc_collect()
+
+        for t in threads:
+            self.assertRegexpMatches(t.name, r'^SpecialPool_[0-4]$')
+            t.join()
+
+    def test_thread_names_default(self):
+        executor = self.executor_type(max_workers=5)
+        executor.map(abs, range(-5, 5))
+        threads = executor._threads
+        del executor
+        test_support.gc_collect()
+
+        for t in threads:
+            # Ensure that our default name is reasonably sane and unique when
+            # no thread_name_prefix was supplied.
+            self.assertRegexpMatches(t.name, r'ThreadPoolExecutor-\d+_[0-4]$')
+            t.join()
+
+    def test_idle_timeout(self):
+        executor = self.executor_type(max_workers=5, idle_timeout=0.05)
+        self.assertEqual(list(executor.map(mul, range(10), range(10))),
+                         [x * x for x in range(10)])
+        threads = list(executor._threads)
+        self.assertTrue(threads)
+        for t in threads:
+            t.join(10)
+            self.assertFalse(t.is_alive())
+        self.assertEqual(len(executor._threads), 0)
+        # The pool grows again on demand.
+        self.assertEqual(executor.submit(mul, 6, 7).result(), 42)
+        self.assertEqual(len(executor._threads), 1)
+        # New threads don't reuse the names of the retired ones.
+        t, = executor._threads
+        self.assertNotIn(t.name, [old.name for old in threads])
+        executor.shutdown(wait=True)
+
+    def test_idle_timeout_negative(self):
+        self.assertRaises(ValueError, self.executor_type, idle_timeout=0)
+        self.assertRaises(ValueError, self.executor_type, idle_timeout=-1)
 
 
 class ProcessPoolExecutorTest(ProcessPoolMixin, ExecutorTest, unittest.TestCase):
@@ -486,6 +656,77 @@ class ProcessPoolExecutorTest(ProcessPoolMixin, ExecutorTest, unittest.TestCase)
             ref)
         self.assertRaises(ValueError, bad_map)
 
+    def test_map_many_small_tasks(self):
+        self.assertEqual(list(self.executor.map(abs, range(-2000, 2000))),
+                         [abs(x) for x in range(-2000, 2000)])
+
+    def test_map_chunksize_buffersize(self):
+        results = self.executor.map(mul, itertools.count(), itertools.count(),
+                                    chunksize=4, buffersize=2)
+        self.assertEqual([next(results) for _ in range(20)],
+                         [x * x for x in range(20)])
+
+    def test_unpicklable_result_in_batch(self):
+        fs = [self.executor.submit(abs, -i) for i in range(50)]
+        fs.append(self.executor.submit(return_lambda))
+        fs.extend(self.executor.submit(abs, -i) for i in range(51, 100))
+        for i, f in enumerate(fs):
+            if i == 50:
+                self.assertRaises(Exception, f.result)
+            else:
+                self.assertEqual(f.result(), i)
+        self.assertFalse(self.executor._broken)
+
+    def test_max_tasks_per_child(self):
+        executor = self.executor_type(1, max_tasks_per_child=3)
+        pids = [executor.submit(os.getpid).result() for _ in range(6)]
+        self.assertEqual(len(set(pids[:3])), 1)
+        self.assertEqual(len(set(pids[3:])), 1)
+        self.assertNotEqual(pids[0], pids[3])
+        executor.shutdown(wait=True)
+
+    def test_max_tasks_per_child_without_further_submits(self):
+        # The workers are still replaced once the submitting is done.
+        executor = self.executor_type(2, max_tasks_per_child=1)
+        fs = [executor.submit(os.getpid) for _ in range(8)]
+        pids = [f.result() for f in fs]
+        self.assertEqual(len(set(pids)), 8)
+        executor.shutdown(wait=True)
+
+    @unittest.skipUnless(os.path.isdir('/proc/self'), 'requires /proc')
+    def test_max_tasks_per_child_live_workers(self):
+        def live_workers(spawner_pid):
+            count = 0
+            for name in os.listdir('/proc'):
+                try:
+                    with open('/proc/%s/stat' % name) as f:
+                        fields = f.read().rsplit(')', 1)[1].split()
+                except (IOError, OSError):
+                    # Not a process, or it has exited meanwhile
+                    continue
+                # Don't count the workers that are waiting to be joined
+                if int(fields[1]) == spawner_pid and fields[0] != 'Z':
+                    count += 1
+            return count
+
+        executor = self.executor_type(2, max_tasks_per_child=1)
+        fs = [executor.submit(time.sleep, 0.01) for _ in range(40)]
+        spawner_pid, = executor._processes
+        counts = []
+        while not all(f.done() for f in fs):
+            counts.append(live_workers(spawner_pid))
+        self.assertLessEqual(max(counts), 2)
+        for f in fs:
+            f.result()
+        executor.shutdown(wait=True)
+
+    def test_max_tasks_per_child_invalid(self):
+        self.assertRaises(TypeError, self.executor_type, 1,
+                          max_tasks_per_child=1.5)
+        for max_tasks in (0, -1):
+            self.assertRaises(ValueError, self.executor_type, 1,
+                              max_tasks_per_child=max_tasks)
+
     def test_traceback(self):
         future = self.executor.submit(_test_traceback)
         with self.assertRaises(Exception) as cm:
@@ -1,4 +1,5 @@
 import cPickle
+import pickle
 import cStringIO
 import io
 import functools
@@ -7,7 +8,8 @@ from test.pickletester import (AbstractUnpickleTests,
                                AbstractPickleTests,
                                AbstractPickleModuleTests,
                                AbstractPicklerUnpicklerObjectTests,
-                               BigmemPickleTests)
+                               BigmemPickleTests,
+                               protocols, opcode_in_pickle)
 from test import test_support
 
 class cStringIOMixin:
@@ -114,6 +116,8 @@ class FileIOCPicklerTests(FileIOMixin, cPicklePicklerTests):
 
 class cPickleListPicklerTests(AbstractPickleTests):
 
+    file_based = False
+
     def dumps(self, arg, proto=0):
         p = cPickle.Pickler(proto)
         p.dump(arg)
@@ -171,6 +175,16 @@ class cPickleFastPicklerTests(AbstractPickleTests):
         b = self.loads(self.dumps(a))
         self.assertEqual(a, b)
 
+    def test_memoize(self):
+        # Fast mode never memoizes, shared objects are pickled twice
+        shared = [1, 2]
+        for proto in protocols:
+            s = self.dumps([shared, shared], proto)
+            y = self.loads(s)
+            self.assertEqual(y, [shared, shared])
+            self.assertIsNot(y[0], y[1])
+            self.assertFalse(opcode_in_pickle(pickle.MEMOIZE, s))
+
 for name in dir(AbstractPickleTests):
     if name.startswith('test_recursive_'):
         func = getattr(AbstractPickleTests, name)
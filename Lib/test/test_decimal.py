@@ -1392,6 +1392,11 @@ class DecimalUsabilityTest(unittest.TestCase):
         for value in test_values:
             self.assertEqual(hash(value), hash(int(value)))
 
+        # noninteger values that aren't exactly representable as floats
+        # hash the same regardless of their representation
+        self.assertEqual(hash(Decimal('0.1')), hash(Decimal('0.100')))
+        self.assertEqual(hash(Decimal('-12.3E-7')), hash(Decimal('-123E-8')))
+
         #the same hash that to an int
         self.assertEqual(hash(Decimal(23)), hash(23))
         self.assertRaises(TypeError, hash, Decimal('sNaN'))
@@ -1401,7 +1406,8 @@ class DecimalUsabilityTest(unittest.TestCase):
         # check that the hashes of a Decimal float match when they
         # represent exactly the same values
         test_strings = ['inf', '-Inf', '0.0', '-.0e1',
-                        '34.0', '2.5', '112390.625', '-0.515625']
+                        '34.0', '2.5', '112390.625', '-0.515625',
+                        '0.7500', '-1.25E-1', '6.103515625E-05']
         for s in test_strings:
             f = float(s)
             d = Decimal(s)
@@ -787,6 +787,154 @@ class DictTest(unittest.TestCase):
 
         self.assertRaises(RuntimeError, iter_and_mutate)
 
+    def check_shared_keys(self, cls):
+        a, b = cls(), cls()
+        a.x, a.y = 1, 2
+        b.y, b.x = 3, 4
+        self.assertEqual(a.__dict__, {'x': 1, 'y': 2})
+        self.assertEqual(b.__dict__, {'x': 4, 'y': 3})
+        # Items of a dict stay consistent with each other
+        self.assertEqual(zip(b.__dict__.keys(), b.__dict__.values()),
+                         b.__dict__.items())
+        # Keys set on one instance don't show up in the other
+        a.z = 5
+        self.assertNotIn('z', b.__dict__)
+        self.assertEqual(len(b.__dict__), 2)
+        self.assertRaises(AttributeError, getattr, b, 'z')
+        del a.x
+        self.assertEqual(a.__dict__, {'y': 2, 'z': 5})
+        self.assertEqual(b.x, 4)
+        self.assertRaises(AttributeError, delattr, a, 'x')
+        a.x = 6
+        self.assertEqual(a.x, 6)
+        # Outgrowing the shared keys
+        for i in range(20):
+            setattr(b, 'attr%d' % i, i)
+        self.assertEqual(len(b.__dict__), 22)
+        self.assertEqual(b.attr19, 19)
+        c = cls()
+        c.attr0 = 0
+        self.assertEqual(c.__dict__, {'attr0': 0})
+        # Non-string keys
+        a.__dict__[1] = 'one'
+        self.assertEqual(a.__dict__[1], 'one')
+        self.assertEqual(a.__dict__, {'x': 6, 'y': 2, 'z': 5, 1: 'one'})
+        self.assertEqual(c.__dict__, {'attr0': 0})
+        # Copies are independent
+        d = c.__dict__.copy()
+        d['attr1'] = 1
+        c.attr0 = 'zero'
+        self.assertEqual(d, {'attr0': 0, 'attr1': 1})
+        self.assertEqual(c.__dict__, {'attr0': 'zero'})
+        # popitem() and clear()
+        e = cls()
+        e.x = 1
+        self.assertEqual(e.__dict__.popitem(), ('x', 1))
+        self.assertEqual(e.__dict__, {})
+        e.x = e.y = 2
+        e.__dict__.clear()
+        self.assertEqual(e.__dict__, {})
+        e.y = 3
+        self.assertEqual(e.__dict__, {'y': 3})
+        # Replacing __dict__
+        e.__dict__ = {'w': 7}
+        e.x = 8
+        self.assertEqual(e.__dict__, {'w': 7, 'x': 8})
+
+    def test_shared_keys_newstyle(self):
+        class C(object):
+            pass
+        self.check_shared_keys(C)
+
+    def test_shared_keys_classic(self):
+        class C:
+            pass
+        self.check_shared_keys(C)
+
+    def test_shared_keys_size(self):
+        class C(object):
+            def __init__(self):
+                self.a = self.b = self.c = 1
+        x, y = C(), C()
+        self.assertEqual(sys.getsizeof(x.__dict__), sys.getsizeof(y.__dict__))
+        self.assertLess(sys.getsizeof(x.__dict__),
+                        sys.getsizeof(dict(x.__dict__)))
+
+    def test_shared_keys_gc(self):
+        class C(object):
+            pass
+        a = C()
+        a.attr = a
+        wr = weakref.ref(C)
+        del a, C
+        gc.collect()
+        self.assertIsNone(wr())
+
+    def test_insertion_order(self):
+        keys = [repr(i) for i in range(100)] + range(100, 0, -1)
+        d = {}
+        for k in keys:
+            d[k] = k
+        self.assertEqual(d.keys(), keys)
+        self.assertEqual(d.values(), keys)
+        self.assertEqual(list(d), keys)
+        self.assertEqual(d.items(), zip(keys, keys))
+        self.assertEqual(dict(zip(keys, keys)).keys(), keys)
+        self.assertEqual(dict.fromkeys(keys).keys(), keys)
+
+    def test_insertion_order_after_deletion(self):
+        d = dict.fromkeys('abcdef')
+        del d['b']
+        d.pop('d')
+        self.assertEqual(d.keys(), list('acef'))
+        d['b'] = None
+        d['a'] = 1
+        self.assertEqual(d.keys(), list('acefb'))
+        # Growing the table compacts the entries without reordering them
+        for i in range(100):
+            d[i] = i
+        for i in range(0, 100, 2):
+            del d[i]
+        self.assertEqual(d.keys(), list('acefb') + range(1, 100, 2))
+
+    def test_popitem_order(self):
+        d = dict.fromkeys('abcde')
+        d['a'] = 1
+        del d['c']
+        self.assertEqual(d.popitem(), ('e', None))
+        self.assertEqual(d.popitem(), ('d', None))
+        d['f'] = 2
+        self.assertEqual(d.popitem(), ('f', 2))
+        self.assertEqual(d.keys(), list('ab'))
+
+    def test_copy_update_order(self):
+        d = dict.fromkeys('zyxwvu')
+        del d['x']
+        self.assertEqual(d.copy().keys(), list('zywvu'))
+        e = dict.fromkeys('ab')
+        e.update(d)
+        self.assertEqual(e.keys(), list('abzywvu'))
+        self.assertEqual(dict(d, t=1).keys(), list('zywvut'))
+
+    def test_shared_keys_order(self):
+        class C(object):
+            pass
+        a, b = C(), C()
+        a.x = a.y = a.z = 1
+        b.z = b.y = b.x = 1
+        self.assertEqual(a.__dict__.keys(), ['x', 'y', 'z'])
+        self.assertEqual(b.__dict__.keys(), ['z', 'y', 'x'])
+        del a.x
+        a.x = 2
+        self.assertEqual(a.__dict__.keys(), ['y', 'z', 'x'])
+        self.assertEqual(vars(C()).keys(), [])
+        c = C()
+        c.x = c.y = 1
+        del c.y
+        c.z = 1
+        self.assertEqual(c.__dict__.keys(), ['x', 'z'])
+        self.assertEqual(c.__dict__.copy().keys(), ['x', 'z'])
+
 
 from test import mapping_tests
 
@@ -5,6 +5,7 @@ import unittest
 from test import test_support
 from weakref import proxy
 import pickle
+import random
 
 @staticmethod
 def PythonPartial(func, *args, **keywords):
@@ -705,6 +706,302 @@ class TestTotalOrdering(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             A(1) != A(1)
 
+@functools.lru_cache()
+def cached_func(x, y):
+    return 3 * x + y
+
+class TestLRU(unittest.TestCase):
+
+    def test_lru(self):
+        def orig(x, y):
+            return 3 * x + y
+        f = functools.lru_cache(maxsize=20)(orig)
+        hits, misses, maxsize, currsize = f.cache_info()
+        self.assertEqual(maxsize, 20)
+        self.assertEqual(currsize, 0)
+        self.assertEqual(hits, 0)
+        self.assertEqual(misses, 0)
+
+        domain = range(5)
+        for i in range(1000):
+            x, y = random.choice(domain), random.choice(domain)
+            actual = f(x, y)
+            expected = orig(x, y)
+            self.assertEqual(actual, expected)
+        hits, misses, maxsize, currsize = f.cache_info()
+        self.assertTrue(hits > misses)
+        self.assertEqual(hits + misses, 1000)
+        self.assertEqual(currsize, 20)
+
+        f.cache_clear()   # test clearing
+        hits, misses, maxsize, currsize = f.cache_info()
+        self.assertEqual(hits, 0)
+        self.assertEqual(misses, 0)
+        self.assertEqual(currsize, 0)
+        f(x, y)
+        hits, misses, maxsize, currsize = f.cache_info()
+        self.assertEqual(hits, 0)
+        self.assertEqual(misses, 1)
+        self.assertEqual(currsize, 1)
+
+        # Test bypassing the cache
+        self.assertIs(f.__wrapped__, orig)
+        f.__wrapped__(x, y)
+        hits, misses, maxsize, currsize = f.cache_info()
+        self.assertEqual(hits, 0)
+        self.assertEqual(misses, 1)
+        self.assertEqual(currsize, 1)
+
+        # test size zero (which means "never-cache")
+        calls = [0]
+        @functools.lru_cache(0)
+        def f():
+            calls[0] += 1
+            return 20
+        self.assertEqual(f.cache_info().maxsize, 0)
+        for i in range(5):
+            self.assertEqual(f(), 20)
+        self.assertEqual(calls[0], 5)
+        self.assertEqual(f.cache_info(), (0, 5, 0, 0))
+
+        # test size one
+        calls[0] = 0
+        @functools.lru_cache(1)
+        def f():
+            calls[0] += 1
+            return 20
+        self.assertEqual(f.cache_info().maxsize, 1)
+        for i in range(5):
+            self.assertEqual(f(), 20)
+        self.assertEqual(calls[0], 1)
+        self.assertEqual(f.cache_info(), (4, 1, 1, 1))
+
+        # test size two
+        @functools.lru_cache(2)
+        def f(x):
+            calls[0] += 1
+            return x*10
+        self.assertEqual(f.cache_info().maxsize, 2)
+        calls[0] = 0
+        for x in 0, 1, 1, 1, 1, 1, 0, 0, 0, 0, 2, 0, 1, 0, 1:
+            #    *  *              *                          *
+            self.assertEqual(f(x), x*10)
+        self.assertEqual(calls[0], 4)
+        self.assertEqual(f.cache_info(), (11, 4, 2, 2))
+
+    def test_lru_eviction_order(self):
+        @functools.lru_cache(maxsize=3)
+        def f(x):
+            return x
+        for x in 1, 2, 3, 1, 4:
+            f(x)
+        # 2 was the least recently used entry when 4 was added
+        self.assertEqual(f.cache_info().currsize, 3)
+        f(1); f(3); f(4)
+        self.assertEqual(f.cache_info(), (4, 4, 3, 3))
+        f(2)
+        self.assertEqual(f.cache_info(), (4, 5, 3, 3))
+
+    def test_lru_no_args(self):
+        @functools.lru_cache
+        def square(x):
+            return x ** 2
+
+        self.assertEqual(list(map(square, [10, 20, 10])), [100, 400, 100])
+        self.assertEqual(square.cache_info(), (1, 2, 128, 2))
+        self.assertEqual(square.__name__, 'square')
+
+    def test_lru_with_maxsize_none(self):
+        @functools.lru_cache(maxsize=None)
+        def fib(n):
+            if n < 2:
+                return n
+            return fib(n-1) + fib(n-2)
+        self.assertEqual([fib(n) for n in range(16)],
+            [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610])
+        self.assertEqual(fib.cache_info(), (28, 16, None, 16))
+        fib.cache_clear()
+        self.assertEqual(fib.cache_info(), (0, 0, None, 0))
+
+    def test_lru_with_maxsize_negative(self):
+        @functools.lru_cache(maxsize=-10)
+        def eq(n):
+            return n
+        for i in (0, 1):
+            self.assertEqual([eq(n) for n in range(150)], list(range(150)))
+        self.assertEqual(eq.cache_info(), (0, 300, 0, 0))
+
+    def test_lru_bad_maxsize(self):
+        self.assertRaises(TypeError, functools.lru_cache, 'spam')
+        self.assertRaises(TypeError, functools.lru_cache, 1.5)
+
+    def test_lru_with_exceptions(self):
+        # Verify that user_function exceptions get passed through without
+        # creating a hard-to-read chained exception.
+        for maxsize in (None, 128):
+            @functools.lru_cache(maxsize)
+            def func(i):
+                return 'abc'[i]
+            self.assertEqual(func(0), 'a')
+            with self.assertRaises(IndexError):
+                func(15)
+            # Verify that the previous exception did not result in a cached entry
+            with self.assertRaises(IndexError):
+                func(15)
+
+    def test_lru_with_types(self):
+        for maxsize in (None, 128):
+            @functools.lru_cache(maxsize=maxsize, typed=True)
+            def square(x):
+                return x * x
+            self.assertEqual(square(3), 9)
+            self.assertEqual(type(square(3)), type(9))
+            self.assertEqual(square(3.0), 9.0)
+            self.assertEqual(type(square(3.0)), type(9.0))
+            self.assertEqual(square(x=3), 9)
+            self.assertEqual(type(square(x=3)), type(9))
+            self.assertEqual(square(x=3.0), 9.0)
+            self.assertEqual(type(square(x=3.0)), type(9.0))
+            self.assertEqual(square.cache_info().hits, 4)
+            self.assertEqual(square.cache_info().misses, 4)
+
+    def test_lru_with_keyword_args(self):
+        @functools.lru_cache()
+        def fib(n):
+            if n < 2:
+                return n
+            return fib(n=n-1) + fib(n=n-2)
+        self.assertEqual(
+            [fib(n=number) for number in range(16)],
+            [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610]
+        )
+        self.assertEqual(fib.cache_info(), (28, 16, 128, 16))
+
+    def test_lru_keyword_order(self):
+        @functools.lru_cache()
+        def f(a, b):
+            return a, b
+        self.assertEqual(f(a=1, b=2), (1, 2))
+        self.assertEqual(f(b=2, a=1), (1, 2))
+        self.assertEqual(f.cache_info().hits, 1)
+
+    def test_lru_unhashable(self):
+        @functools.lru_cache()
+        def f(x):
+            return x
+        self.assertRaises(TypeError, f, [])
+        self.assertEqual(f.cache_info(), (0, 0, 128, 0))
+
+    def test_lru_cache_threaded(self):
+        threading = test_support.import_module('threading')
+
+        @functools.lru_cache(maxsize=20)
+        def orig(x, y):
+            return 3 * x + y
+
+        def full(f, *args):
+            for _ in range(10):
+                f(*args)
+
+        def clear(f):
+            for _ in range(10):
+                f.cache_clear()
+
+        threads = [threading.Thread(target=full, args=(orig, k, k))
+                   for k in range(40)]
+        threads.append(threading.Thread(target=clear, args=(orig,)))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        hits, misses, maxsize, currsize = orig.cache_info()
+        self.assertLessEqual(currsize, 20)
+
+    def test_lru_reentrancy_with_len(self):
+        # Test to make sure the LRU cache code isn't thrown-off by
+        # caching the built-in len() function.
+        builtin_len = functools.lru_cache(4)(len)
+        for i in [0, 0, 1, 2, 3, 3, 4, 5, 6, 1, 7, 2, 1]:
+            self.assertEqual(builtin_len('abcdefghijklmn'[:i]), i)
+
+    def test_lru_method(self):
+        class X(int):
+            f_cnt = 0
+            @functools.lru_cache(2)
+            def f(self, x):
+                self.f_cnt += 1
+                return x*10+self
+        a = X(5)
+        b = X(5)
+        c = X(7)
+        self.assertEqual(X.f.cache_info(), (0, 0, 2, 0))
+
+        for x in 1, 2, 2, 3, 1, 1, 1, 2, 3, 3:
+            self.assertEqual(a.f(x), x*10 + 5)
+        self.assertEqual((a.f_cnt, b.f_cnt, c.f_cnt), (6, 0, 0))
+        self.assertEqual(X.f.cache_info(), (4, 6, 2, 2))
+
+        for x in 1, 2, 1, 1, 1, 1, 3, 2, 2, 2:
+            self.assertEqual(b.f(x), x*10 + 5)
+        self.assertEqual((a.f_cnt, b.f_cnt, c.f_cnt), (6, 4, 0))
+        self.assertEqual(X.f.cache_info(), (10, 10, 2, 2))
+
+        for x in 2, 1, 1, 1, 1, 2, 1, 3, 2, 1:
+            self.assertEqual(c.f(x), x*10 + 7)
+        self.assertEqual((a.f_cnt, b.f_cnt, c.f_cnt), (6, 4, 5))
+        self.assertEqual(X.f.cache_info(), (15, 15, 2, 2))
+
+        self.assertEqual(a.f.cache_info(), X.f.cache_info())
+        self.assertEqual(b.f.cache_info(), X.f.cache_info())
+        self.assertEqual(c.f.cache_info(), X.f.cache_info())
+
+    def test_copy(self):
+        def orig(x, y):
+            return 3 * x + y
+        f = functools.lru_cache(2)(orig)
+        self.assertIs(copy.copy(f), f)
+        self.assertIs(copy.deepcopy(f), f)
+
+    def test_pickle(self):
+        import cPickle
+        for module in pickle, cPickle:
+            for proto in range(pickle.HIGHEST_PROTOCOL + 1):
+                f_copy = module.loads(module.dumps(cached_func, proto))
+                self.assertIs(f_copy, cached_func)
+
+    def test_bool_maxsize(self):
+        def orig(x):
+            return x
+        f = functools.lru_cache(maxsize=True)(orig)
+        self.assertEqual(f.cache_info().maxsize, 1)
+        f(1)
+        f(2)
+        f(2)
+        self.assertEqual(f.cache_info(), (1, 2, 1, 1))
+
+    def test_garbage_collection(self):
+        gc = test_support.import_module('gc')
+        class X(object):
+            pass
+        @functools.lru_cache()
+        def f(x):
+            return x
+        x = X()
+        x.f = f
+        f(x)
+        ref = proxy(x)
+        del x, f
+        gc.collect()
+        self.assertRaises(ReferenceError, getattr, ref, 'f')
+
+    def test_tp_cache_uses_lru(self):
+        import typing
+        self.assertTrue(any(getattr(clear, '__self__', None) is not None and
+                            isinstance(clear.__self__,
+                                       functools._lru_cache_wrapper)
+                            for clear in typing._cleanups))
+
+
 def test_main(verbose=None):
     test_classes = (
         TestPartial,
@@ -714,6 +1011,7 @@ def test_main(verbose=None):
         TestTotalOrdering,
         TestWraps,
         TestReduce,
+        TestLRU,
     )
     test_support.run_unittest(*test_classes)
 
@@ -513,6 +513,31 @@ class GCTests(unittest.TestCase):
         self.assertTrue(gc.is_tracked([]))
         self.assertTrue(gc.is_tracked(set()))
 
+    def test_freeze(self):
+        gc.freeze()
+        self.assertGreater(gc.get_freeze_count(), 0)
+        gc.unfreeze()
+        self.assertEqual(gc.get_freeze_count(), 0)
+
+    def test_freeze_ignores_frozen_cycles(self):
+        gc.collect()
+        class A(object):
+            pass
+        a = A()
+        a.a = a
+        wr = weakref.ref(a)
+        gc.freeze()
+        try:
+            del a
+            gc.collect()
+            # The cycle was frozen, so the collector didn't look at it.
+            self.assertIsNot(wr(), None)
+            self.assertFalse(any(o is wr() for o in gc.get_objects()))
+        finally:
+            gc.unfreeze()
+        gc.collect()
+        self.assertIs(wr(), None)
+
     def test_bug1055820b(self):
         # Corresponds to temp2b.py in the bug report.
 
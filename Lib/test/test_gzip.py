@@ -8,6 +8,7 @@ import io
 import struct
 import tempfile
 gzip = test_support.import_module('gzip')
+import zlib
 
 data1 = """  int length=DEFAULTALLOC, err = Z_OK;
   PyObject *RetVal;
@@ -374,6 +375,60 @@ class TestGzip(unittest.TestCase):
                 archive.write(b'data')
                 self.assertEqual(archive.name, '')
 
+    def test_parallel_write(self):
+        data = ''.join(str(i) + data1 for i in range(2000))
+        with gzip.GzipFile(self.filename, "wb", threads=3) as f:
+            f.parallel_block_size = 1000
+            for i in range(0, len(data), 700):
+                f.write(data[i:i+700])
+            f.flush()
+            f.write(data2)
+        with open(self.filename, "rb") as f:
+            gzdata = f.read()
+        self.assertEqual(zlib.decompress(gzdata, 16 + zlib.MAX_WBITS),
+                         data + data2)
+        with gzip.GzipFile(self.filename, "rb") as f:
+            self.assertEqual(f.read(), data + data2)
+
+        with gzip.open(self.filename, "ab", threads=2) as f:
+            f.write(data2)
+        with gzip.open(self.filename, "rb") as f:
+            self.assertEqual(f.read(), data + data2 + data2)
+
+    def test_parallel_write_empty(self):
+        gzip.GzipFile(self.filename, "wb", threads=2).close()
+        with gzip.GzipFile(self.filename, "rb") as f:
+            self.assertEqual(f.read(), "")
+
+    def test_non_seekable_file(self):
+        class Unseekable(object):
+            def __init__(self, data):
+                self.f = io.BytesIO(data)
+            def read(self, n=-1):
+                # Short reads, like a pipe or a socket
+                return self.f.read(min(n, 17))
+        with gzip.GzipFile(self.filename, "wb") as f:
+            f.write(data1 * 50)
+        with gzip.GzipFile(self.filename, "ab") as f:
+            f.write(data2 * 15)
+        with open(self.filename, "ab") as f:
+            f.write("\x00" * 20)
+        with open(self.filename, "rb") as f:
+            gzdata = f.read()
+        with gzip.GzipFile(fileobj=Unseekable(gzdata)) as f:
+            self.assertEqual(f.read(), data1 * 50 + data2 * 15)
+        with gzip.GzipFile(fileobj=Unseekable(gzdata)) as f:
+            self.assertEqual(f.readline(), data1.splitlines(True)[0])
+
+    def test_truncated_file(self):
+        with gzip.GzipFile(self.filename, "wb") as f:
+            f.write(data1 * 50)
+        with open(self.filename, "rb") as f:
+            gzdata = f.read()
+        for size in (5, len(gzdata) - 4, len(gzdata) - 20):
+            with gzip.GzipFile(fileobj=io.BytesIO(gzdata[:size])) as f:
+                self.assertRaises(IOError, f.read)
+
 def test_main(verbose=None):
     test_support.run_unittest(TestGzip)
 
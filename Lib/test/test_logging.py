@@ -29,6 +29,7 @@ import cStringIO
 import gc
 import json
 import os
+import Queue
 import random
 import re
 import select
@@ -494,6 +495,143 @@ class MemoryHandlerTest(BaseTest):
         self.assert_log_lines(lines)
 
 
+class RecordingHandler(logging.Handler):
+    """A handler which keeps the records it handles."""
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def matches(self, **kwargs):
+        for record in self.records:
+            if all(getattr(record, k) == v for k, v in kwargs.items()):
+                return True
+        return False
+
+
+class QueueHandlerTest(BaseTest):
+    # Do not bother with a logger name group.
+    expected_log_pat = r"^[\w.]+ -> ([\w]+): ([\d]+)$"
+
+    def setUp(self):
+        BaseTest.setUp(self)
+        self.queue = Queue.Queue(-1)
+        self.que_hdlr = logging.handlers.QueueHandler(self.queue)
+        self.que_logger = logging.getLogger('que')
+        self.que_logger.propagate = False
+        self.que_logger.setLevel(logging.WARNING)
+        self.que_logger.addHandler(self.que_hdlr)
+
+    def tearDown(self):
+        self.que_hdlr.close()
+        BaseTest.tearDown(self)
+
+    def test_queue_handler(self):
+        self.que_logger.debug(self.next_message())
+        self.assertRaises(Queue.Empty, self.queue.get_nowait)
+        self.que_logger.info(self.next_message())
+        self.assertRaises(Queue.Empty, self.queue.get_nowait)
+        msg = self.next_message()
+        self.que_logger.warning(msg)
+        data = self.queue.get_nowait()
+        self.assertTrue(isinstance(data, logging.LogRecord))
+        self.assertEqual(data.name, self.que_logger.name)
+        self.assertEqual((data.msg, data.args), (msg, None))
+
+    def test_args_merged(self):
+        arg = ['mutable']
+        self.que_logger.warning('%s', arg)
+        arg.append('changed')
+        data = self.queue.get_nowait()
+        self.assertEqual(data.msg, "['mutable']")
+        self.assertIsNone(data.args)
+        self.assertIsNone(data.exc_info)
+
+    @unittest.skipUnless(threading, 'Threading required for this test.')
+    def test_queue_listener(self):
+        handler = RecordingHandler()
+        listener = logging.handlers.QueueListener(self.queue, handler)
+        listener.start()
+        try:
+            self.que_logger.warning(self.next_message())
+            self.que_logger.error(self.next_message())
+            self.que_logger.critical(self.next_message())
+        finally:
+            listener.stop()
+        self.assertTrue(handler.matches(levelno=logging.WARNING, msg='1'))
+        self.assertTrue(handler.matches(levelno=logging.ERROR, msg='2'))
+        self.assertTrue(handler.matches(levelno=logging.CRITICAL, msg='3'))
+        handler.close()
+
+        # Now test with respect_handler_level set
+        handler = RecordingHandler()
+        handler.setLevel(logging.CRITICAL)
+        listener = logging.handlers.QueueListener(self.queue, handler,
+                                                  respect_handler_level=True)
+        listener.start()
+        try:
+            self.que_logger.warning(self.next_message())
+            self.que_logger.error(self.next_message())
+            self.que_logger.critical(self.next_message())
+        finally:
+            listener.stop()
+        self.assertFalse(handler.matches(levelno=logging.WARNING, msg='4'))
+        self.assertFalse(handler.matches(levelno=logging.ERROR, msg='5'))
+        self.assertTrue(handler.matches(levelno=logging.CRITICAL, msg='6'))
+        handler.close()
+
+    @unittest.skipUnless(threading, 'Threading required for this test.')
+    def test_queue_listener_batches_flushes(self):
+        class CountingStream(object):
+            def __init__(self):
+                self.data = []
+                self.flushes = 0
+            def write(self, data):
+                self.data.append(data)
+            def flush(self):
+                self.flushes += 1
+
+        stream = CountingStream()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(self.log_format))
+        # Queue everything up before the listener starts, so that it all
+        # ends up in a single batch.
+        for i in range(10):
+            self.que_logger.error(self.next_message())
+        listener = logging.handlers.QueueListener(self.queue, handler)
+        listener.start()
+        listener.stop()
+        self.assertEqual(stream.data,
+                         ['que -> ERROR: %d\n' % i for i in range(1, 11)])
+        self.assertEqual(stream.flushes, 1)
+        self.assertFalse(handler._defer_flush)
+        handler.close()
+
+        self.assertRaises(ValueError, logging.handlers.QueueListener,
+                          self.queue, handler, batch_size=0)
+
+    @unittest.skipUnless(threading, 'Threading required for this test.')
+    def test_queue_listener_join_waits_for_handling(self):
+        class SlowHandler(RecordingHandler):
+            def emit(self, record):
+                time.sleep(0.05)
+                RecordingHandler.emit(self, record)
+
+        handler = SlowHandler()
+        listener = logging.handlers.QueueListener(self.queue, handler)
+        listener.start()
+        try:
+            for i in range(3):
+                self.que_logger.error(self.next_message())
+            self.queue.join()
+            self.assertEqual(len(handler.records), 3)
+        finally:
+            listener.stop()
+        handler.close()
+
+
 class ExceptionFormatter(logging.Formatter):
     """A special exception formatter."""
     def formatException(self, ei):
@@ -1938,6 +2076,79 @@ class ManagerTest(BaseTest):
         self.assertEqual(logged, ['should appear in logged'])
 
 
+class CachingTest(BaseTest):
+    def test_is_enabled_for_cache(self):
+        parent = logging.getLogger('cached')
+        child = logging.getLogger('cached.child.grandchild')
+        parent.setLevel(logging.INFO)
+        self.assertFalse(child.isEnabledFor(logging.DEBUG))
+        self.assertTrue(child.isEnabledFor(logging.INFO))
+        self.assertEqual(child._cache, {logging.DEBUG: False,
+                                        logging.INFO: True})
+        # Changing the level anywhere up the hierarchy invalidates the cache
+        parent.setLevel(logging.WARNING)
+        self.assertEqual(child._cache, {})
+        self.assertFalse(child.isEnabledFor(logging.INFO))
+        self.root_logger.setLevel(logging.DEBUG)
+        parent.setLevel(logging.NOTSET)
+        self.assertTrue(child.isEnabledFor(logging.DEBUG))
+        # ... and so does disable()
+        logging.disable(logging.INFO)
+        try:
+            self.assertFalse(child.isEnabledFor(logging.INFO))
+            self.assertTrue(child.isEnabledFor(logging.WARNING))
+        finally:
+            logging.disable(0)
+        self.assertTrue(child.isEnabledFor(logging.INFO))
+
+    def test_lazy_record_attributes(self):
+        record = logging.LogRecord('name', logging.INFO, '/path/to/mod.py',
+                                   1, 'msg', None, None)
+        for name in ('filename', 'module', 'processName'):
+            self.assertNotIn(name, record.__dict__)
+        self.assertEqual(record.filename, 'mod.py')
+        self.assertEqual(record.module, 'mod')
+        self.assertEqual(record.processName, 'MainProcess')
+        self.assertRaises(AttributeError, getattr, record, 'spam')
+
+        record = logging.LogRecord('name', logging.INFO, '/path/to/mod.py',
+                                   1, 'msg', None, None)
+        fmt = logging.Formatter('%(module)s:%(filename)s %(message)s')
+        self.assertEqual(fmt.format(record), 'mod:mod.py msg')
+
+        record = logging.LogRecord('name', logging.INFO, '/path/to/mod.py',
+                                   1, 'msg', None, None)
+        new = cPickle.loads(cPickle.dumps(record, 2))
+        self.assertEqual(new.__dict__['filename'], 'mod.py')
+        self.assertEqual(new.__dict__['processName'], 'MainProcess')
+
+    def test_lazy_attributes_sent_by_handlers(self):
+        def make_record():
+            return logging.LogRecord('name', logging.INFO, '/path/to/mod.py',
+                                     1, 'msg', None, None)
+        h = logging.handlers.SocketHandler('localhost', 0)
+        try:
+            data = h.makePickle(make_record())
+        finally:
+            h.close()
+        d = cPickle.loads(data[4:])
+        h = logging.handlers.HTTPHandler('localhost', '/log')
+        for d in (d, h.mapLogRecord(make_record())):
+            self.assertEqual(d['filename'], 'mod.py')
+            self.assertEqual(d['module'], 'mod')
+            self.assertEqual(d['processName'], 'MainProcess')
+
+    def test_lazy_attributes_in_extra(self):
+        logger = logging.getLogger('cached')
+        self.assertRaises(KeyError, logger.makeRecord, 'name', logging.INFO,
+                          'fn', 1, 'msg', None, None, extra={'module': 'x'})
+
+    def test_mapping_argument(self):
+        self.root_logger.info('%(a)s', {'a': self.next_message()})
+        self.root_logger.info('%s', self.next_message())
+        self.assert_log_lines([('root', 'INFO', '1'), ('root', 'INFO', '2')])
+
+
 class ChildLoggerTest(BaseTest):
     def test_child_loggers(self):
         r = logging.getLogger()
@@ -2003,9 +2214,10 @@ class HandlerTest(BaseTest):
 def test_main():
     run_unittest(BuiltinLevelsTest, BasicFilterTest,
                  CustomLevelsAndFiltersTest, MemoryHandlerTest,
+                 QueueHandlerTest,
                  ConfigFileTest, SocketHandlerTest, MemoryTest,
                  EncodingTest, WarningsTest, ConfigDictTest, ManagerTest,
-                 ChildLoggerTest, HandlerTest)
+                 ChildLoggerTest, CachingTest, HandlerTest)
 
 if __name__ == "__main__":
     test_main()
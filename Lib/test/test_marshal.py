@@ -290,6 +290,71 @@ class BugsTestCase(unittest.TestCase):
         invalid_string = 'l\x02\x00\x00\x00\x00\x00\x00\x00'
         self.assertRaises(ValueError, marshal.loads, invalid_string)
 
+class SharingTestCase(unittest.TestCase):
+    # Versions 3 and up write objects referenced more than once only once.
+
+    def test_versions(self):
+        obj = ('spam', u'eggs', u'\u20ac', 2**70, 1.5, [None, 'x' * 300],
+               {'k': frozenset([1, 2])},
+               ExceptionTestCase.test_exceptions.func_code)
+        for v in range(marshal.version + 1):
+            self.assertEqual(marshal.loads(marshal.dumps(obj, v)), obj)
+
+    def test_shared_objects(self):
+        lst = [1.5]
+        t = ('x', u'y')
+        new = marshal.loads(marshal.dumps([lst, lst, t, t], 3))
+        self.assertEqual(new, [lst, lst, t, t])
+        self.assertIs(new[0], new[1])
+        self.assertIs(new[2], new[3])
+        old = marshal.loads(marshal.dumps([lst, lst], 2))
+        self.assertIsNot(old[0], old[1])
+
+    def test_recursive_containers(self):
+        lst = [1]
+        lst.append(lst)
+        new = marshal.loads(marshal.dumps(lst))
+        self.assertEqual(new[0], 1)
+        self.assertIs(new[1], new)
+        d = {}
+        d['self'] = d
+        new = marshal.loads(marshal.dumps(d))
+        self.assertIs(new['self'], new)
+
+    def test_smaller_output(self):
+        obj = ['repeated string'] * 100
+        self.assertLess(len(marshal.dumps(obj, 4)), len(marshal.dumps(obj, 2)))
+        co = ContainerTestCase.test_dict.func_code
+        self.assertLess(len(marshal.dumps(co, 4)), len(marshal.dumps(co, 2)))
+
+    def test_short_forms(self):
+        def code(obj, version):
+            # The type code, ignoring the reference flag
+            return chr(ord(marshal.dumps(obj, version)[0]) & 0x7f)
+        for obj, short, long in [('a b', 'z', 's'), ('a' * 256, 's', 's'),
+                                 (u'a b', 'A', 'u'), (u'a' * 256, 'a', 'u'),
+                                 (u'\xe9', 'u', 'u'),
+                                 ((None,), ')', '('), ((None,) * 256, '(', '(')]:
+            self.assertEqual(code(obj, 4), short)
+            self.assertEqual(code(obj, 3), long)
+            self.assertEqual(marshal.loads(marshal.dumps(obj, 4)), obj)
+        self.assertEqual(marshal.loads('A\x02ab'), u'ab')
+        self.assertEqual(marshal.loads('a\x02\x00\x00\x00ab'), u'ab')
+        self.assertRaises(ValueError, marshal.loads, 'A\x01\xe9')
+
+    def test_filename_shared(self):
+        co = compile('def f(): pass\ndef g(): pass\n', 'somefile.py', 'exec')
+        new = marshal.loads(marshal.dumps(co))
+        f, g = [c for c in new.co_consts if hasattr(c, 'co_code')]
+        self.assertIs(f.co_filename, g.co_filename)
+
+    def test_invalid_reference(self):
+        # A reference to an object that was never read
+        self.assertRaises(ValueError, marshal.loads, 'r\x00\x00\x00\x00')
+        # A reference to a tuple from inside itself
+        self.assertRaises(ValueError, marshal.loads,
+                          '\xa9\x01r\x00\x00\x00\x00')
+
 LARGE_SIZE = 2**31
 character_size = 4 if sys.maxunicode > 0xFFFF else 2
 pointer_size = 8 if sys.maxsize > 0xFFFFFFFF else 4
@@ -405,6 +470,7 @@ def test_main():
                               ContainerTestCase,
                               ExceptionTestCase,
                               BugsTestCase,
+                              SharingTestCase,
                               LargeValuesTestCase,
                               CAPI_TestCase,
                              )
@@ -360,9 +360,6 @@ class MemoryTestMixin:
 
     def test_pickling(self):
         buf = self.buftype("1234567890")
-        memio = self.ioclass(buf)
-        memio.foo = 42
-        memio.seek(2)
 
         class PickleTestMemIO(self.ioclass):
             def __init__(me, initvalue, foo):
@@ -379,12 +376,16 @@ class MemoryTestMixin:
         PickleTestMemIO.__module__ = '__main__'
         PickleTestMemIO.__qualname__ = PickleTestMemIO.__name__
         __main__.PickleTestMemIO = PickleTestMemIO
-        submemio = PickleTestMemIO(buf, 80)
-        submemio.seek(2)
 
         # We only support pickle protocol 2 and onward since we use extended
         # __reduce__ API of PEP 307 to provide pickling support.
         for proto in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            # The objects are closed below, so make new ones every time.
+            memio = self.ioclass(buf)
+            memio.foo = 42
+            memio.seek(2)
+            submemio = PickleTestMemIO(buf, 80)
+            submemio.seek(2)
             for obj in (memio, submemio):
                 obj2 = pickle.loads(pickle.dumps(obj, protocol=proto))
                 self.assertEqual(obj.getvalue(), obj2.getvalue())
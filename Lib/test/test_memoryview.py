@@ -245,9 +245,23 @@ class AbstractMemoryTests:
         i = io.BytesIO(b'ZZZZ')
         self.assertRaises(TypeError, i.readinto, m)
 
+    def test_toreadonly(self):
+        for tp in self._types:
+            b = tp(self._source)
+            m = self._view(b)
+            mm = m.toreadonly()
+            self.assertTrue(mm.readonly)
+            self.assertEqual(mm.tobytes(), m.tobytes())
+            def setitem(value):
+                mm[0] = value
+            self.assertRaises(TypeError, setitem, b"a")
+            i = io.BytesIO(b'ZZZZ')
+            self.assertRaises(TypeError, i.readinto, mm)
+            # The original view is unaffected
+            self.assertEqual(m.readonly, tp is self.ro_type)
+
 # Variations on source objects for the buffer: bytes-like objects, then arrays
 # with itemsize > 1.
-# NOTE: support for multi-dimensional objects is unimplemented.
 
 class BaseBytesMemoryTests(AbstractMemoryTests):
     ro_type = bytes
@@ -256,22 +270,12 @@ class BaseBytesMemoryTests(AbstractMemoryTests):
     itemsize = 1
     format = 'B'
 
-# Disabled: array.array() does not support the new buffer API in 2.x
-
-#class BaseArrayMemoryTests(AbstractMemoryTests):
-    #ro_type = None
-    #rw_type = lambda self, b: array.array('i', map(ord, b))
-    #getitem_type = lambda self, b: array.array('i', map(ord, b)).tostring()
-    #itemsize = array.array('i').itemsize
-    #format = 'i'
-
-    #def test_getbuffer(self):
-        ## XXX Test should be adapted for non-byte buffers
-        #pass
-
-    #def test_tolist(self):
-        ## XXX NotImplementedError: tolist() only supports byte views
-        #pass
+class BaseArrayMemoryTests(AbstractMemoryTests):
+    ro_type = None
+    rw_type = lambda self, b: array.array('i', map(ord, b))
+    getitem_type = lambda self, b: array.array('i', map(ord, b)).tostring()
+    itemsize = array.array('i').itemsize
+    format = 'i'
 
 
 # Variations on indirection levels: memoryview, slice of memoryview,
@@ -328,33 +332,53 @@ class BytesMemoryviewTest(unittest.TestCase,
             self.assertRaises(TypeError, memoryview, argument=ob)
             self.assertRaises(TypeError, memoryview, ob, argument=True)
 
-#class ArrayMemoryviewTest(unittest.TestCase,
-    #BaseMemoryviewTests, BaseArrayMemoryTests):
-
-    #def test_array_assign(self):
-        ## Issue #4569: segfault when mutating a memoryview with itemsize != 1
-        #a = array.array('i', range(10))
-        #m = memoryview(a)
-        #new_a = array.array('i', range(9, -1, -1))
-        #m[:] = new_a
-        #self.assertEqual(a, new_a)
+class ArrayMemoryviewTest(unittest.TestCase,
+    BaseMemoryviewTests, BaseArrayMemoryTests):
+
+    def test_array_assign(self):
+        # Issue #4569: segfault when mutating a memoryview with itemsize != 1
+        a = array.array('i', range(10))
+        m = memoryview(a)
+        new_a = array.array('i', range(9, -1, -1))
+        m[:] = new_a
+        self.assertEqual(a, new_a)
+
+    def test_array_exports(self):
+        a = array.array('i', range(10))
+        m = memoryview(a)
+        self.assertIs(m.obj, a)
+        self.assertRaises(BufferError, a.append, 10)
+        self.assertRaises(BufferError, a.extend, [10])
+        self.assertRaises(BufferError, a.pop)
+        s = m[::2]
+        self.assertIs(s.obj, a)
+        m.release()
+        # The slice holds an export of its own
+        self.assertRaises(BufferError, a.append, 10)
+        s.release()
+        a.append(10)
+        self.assertEqual(len(a), 11)
+        # The old buffer interface still accepts arrays
+        b = array.array('c', b"ab")
+        b.fromstring(array.array('c', b"cd"))
+        self.assertEqual(b.tostring(), b"abcd")
 
 
 class BytesMemorySliceTest(unittest.TestCase,
     BaseMemorySliceTests, BaseBytesMemoryTests):
     pass
 
-#class ArrayMemorySliceTest(unittest.TestCase,
-    #BaseMemorySliceTests, BaseArrayMemoryTests):
-    #pass
+class ArrayMemorySliceTest(unittest.TestCase,
+    BaseMemorySliceTests, BaseArrayMemoryTests):
+    pass
 
 class BytesMemorySliceSliceTest(unittest.TestCase,
     BaseMemorySliceSliceTests, BaseBytesMemoryTests):
     pass
 
-#class ArrayMemorySliceSliceTest(unittest.TestCase,
-    #BaseMemorySliceSliceTests, BaseArrayMemoryTests):
-    #pass
+class ArrayMemorySliceSliceTest(unittest.TestCase,
+    BaseMemorySliceSliceTests, BaseArrayMemoryTests):
+    pass
 
 
 class OtherTest(unittest.TestCase):
@@ -374,6 +398,114 @@ class OtherTest(unittest.TestCase):
                 (".*memoryview", DeprecationWarning)):
             pickle.dumps(m, 2)
 
+    def test_release(self):
+        b = bytearray(b"abc")
+        m = memoryview(b)
+        self.assertRaises(BufferError, b.append, 100)
+        m.release()
+        b.append(100)
+        m.release()
+        self.assertRaises(ValueError, m.tobytes)
+        self.assertRaises(ValueError, len, m)
+        self.assertRaises(ValueError, getattr, m, "format")
+        self.assertIn("released", repr(m))
+        self.assertEqual(m, m)
+        self.assertNotEqual(m, memoryview(b))
+
+    def test_release_exported(self):
+        m = memoryview(b"abc")
+        p = pickle.PickleBuffer(m)
+        self.assertRaises(BufferError, m.release)
+        p.release()
+        m.release()
+
+    def test_context_manager(self):
+        b = bytearray(b"abc")
+        with memoryview(b) as m:
+            self.assertEqual(m.tobytes(), b"abc")
+        self.assertRaises(ValueError, m.tobytes)
+        b.append(100)
+
+    def test_new_attributes(self):
+        b = bytearray(b"abcdefgh")
+        m = memoryview(b)
+        self.assertIs(m.obj, b)
+        self.assertEqual(m.nbytes, 8)
+        self.assertIs(type(m.nbytes), int)
+        self.assertTrue(m.c_contiguous)
+        self.assertTrue(m.f_contiguous)
+        self.assertTrue(m.contiguous)
+        s = m[::2]
+        self.assertIs(s.obj, b)
+        self.assertEqual(s.nbytes, 4)
+        self.assertFalse(s.c_contiguous)
+        self.assertFalse(s.contiguous)
+
+    def test_cast(self):
+        b = bytearray(b"abcdefgh")
+        m = memoryview(b)
+        c = m.cast('i')
+        self.assertEqual(c.format, 'i')
+        self.assertEqual(c.itemsize, 4)
+        self.assertEqual(c.nbytes, 8)
+        self.assertEqual(c.tolist(), array.array('i', b"abcdefgh").tolist())
+        self.assertEqual(c.cast('B').tolist(), map(ord, b"abcdefgh"))
+        # Casts are zero-copy
+        c[0] = array.array('i', [0])
+        self.assertEqual(b[:4], bytearray(4))
+
+        d = m.cast('c', (2, 4))
+        self.assertEqual(d.ndim, 2)
+        self.assertEqual(d.shape, (2, 4))
+        self.assertEqual(d.strides, (4, 1))
+        self.assertEqual(d[1, 2], b"g")
+        self.assertEqual(d.tolist(), [[b"\0"] * 4, list(b"efgh")])
+        self.assertRaises(NotImplementedError, d.__getitem__, 1)
+
+        self.assertRaises(TypeError, m.cast, 'i', (3,))
+        self.assertRaises(TypeError, m[::2].cast, 'i')
+        self.assertRaises(TypeError, c.cast, 'h')
+        self.assertRaises(ValueError, m.cast, 'X')
+
+    def test_strided_slices(self):
+        b = bytearray(b"abcdefgh")
+        m = memoryview(b)
+        s = m[::2]
+        self.assertEqual(s.tobytes(), b"aceg")
+        self.assertEqual(s.strides, (2,))
+        self.assertEqual(s, b"aceg")
+        self.assertEqual(m[::-1].tobytes(), b"hgfedcba")
+        self.assertEqual(m[6:1:-2].tobytes(), b"gec")
+        s[1] = b"X"
+        self.assertEqual(b, bytearray(b"abXdefgh"))
+        m[::-1] = b"12345678"
+        self.assertEqual(b, bytearray(b"87654321"))
+        m[1::2] = m[::2]
+        self.assertEqual(b, bytearray(b"88664422"))
+        with self.assertRaises(ValueError):
+            m[::2] = b"abc"
+
+    def test_hash(self):
+        m = memoryview(b"abcdef")
+        self.assertEqual(hash(m), hash(b"abcdef"))
+        self.assertEqual(hash(m[::2]), hash(b"ace"))
+        d = {m: 1}
+        self.assertEqual(d[b"abcdef"], 1)
+        self.assertRaises(ValueError, hash, memoryview(bytearray(b"abc")))
+        self.assertRaises(ValueError, hash, m.cast('h'))
+        m = memoryview(b"abc")
+        m.release()
+        self.assertRaises(ValueError, hash, m)
+
+    def test_tolist_formats(self):
+        for code, values in [('b', [-1, 2]), ('h', [-300, 300]),
+                             ('l', [-sys.maxint, sys.maxint]),
+                             ('d', [1.5, -2.25]), ('f', [0.5, 4.0])]:
+            a = array.array(code, values)
+            self.assertEqual(memoryview(a).tolist(), values)
+        self.assertEqual(memoryview(array.array('c', b"ab")).tolist(),
+                         [b"a", b"b"])
+
 
 
 def test_main():
@@ -673,6 +673,28 @@ class MmapTests(unittest.TestCase):
         with self.assertRaises(TypeError):
             m * 2
 
+    def test_memoryview(self):
+        m = mmap.mmap(-1, 16)
+        self.addCleanup(m.close)
+        v = memoryview(m)
+        v[:3] = b'abc'
+        self.assertEqual(m[:3], b'abc')
+        self.assertRaises(BufferError, m.close)
+        if os.name != 'nt':
+            self.assertRaises(BufferError, m.resize, 32)
+        del v
+        with open(TESTFN, "wb") as f:
+            f.write(b'xyz')
+        self.addCleanup(unlink, TESTFN)
+        with open(TESTFN, "rb") as f:
+            m2 = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        v = memoryview(m2)
+        self.assertTrue(v.readonly)
+        self.assertEqual(v[1:].tobytes(), b'yz')
+        del v
+        m2.close()
+        self.assertRaises(ValueError, memoryview, m2)
+
 
 class LargeMmapTests(unittest.TestCase):
 
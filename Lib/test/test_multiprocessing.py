@@ -2225,10 +2225,10 @@ class _TestFinalize(BaseTestCase):
                     exc.append(e)
                     d.clear()
 
-        old_interval = sys.getcheckinterval()
+        old_interval = sys.getswitchinterval()
         old_threshold = gc.get_threshold()
         try:
-            sys.setcheckinterval(10)
+            sys.setswitchinterval(1e-5)
             gc.set_threshold(5, 5, 5)
             threads = [threading.Thread(target=run_finalizers),
                        threading.Thread(target=make_finalizers)]
@@ -2238,7 +2238,7 @@ class _TestFinalize(BaseTestCase):
             if exc:
                 raise exc[0]
         finally:
-            sys.setcheckinterval(old_interval)
+            sys.setswitchinterval(old_interval)
             gc.set_threshold(*old_threshold)
             gc.collect()  # Collect remaining Foo's
 
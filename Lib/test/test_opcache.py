@@ -0,0 +1,229 @@
+"""
+Test the LOAD_GLOBAL and LOAD_ATTR opcode caches: a function's caches
+are only created once it has run many times, after which every cached
+result must still track changes to the namespaces and types involved.
+"""
+import types
+import unittest
+from test import test_support
+
+import __builtin__
+
+# More than _PyCode_OPCACHE_MIN_RUNS in Include/code.h
+WARMUP = 1100
+
+
+def warm(func, *args):
+    for i in xrange(WARMUP):
+        result = func(*args)
+    return result
+
+
+def get_global():
+    return opcache_global
+
+def get_builtin():
+    return len
+
+
+class Plain(object):
+    cls_attr = 'class'
+
+    def __init__(self):
+        self.attr = 1
+
+
+class Slotted(object):
+    __slots__ = ('attr',)
+
+
+class WithProperty(object):
+    def __init__(self):
+        self.calls = 0
+
+    @property
+    def attr(self):
+        self.calls += 1
+        return self.calls
+
+
+class Classic:
+    def __init__(self):
+        self.attr = 'classic'
+
+
+def get_attr(obj):
+    return obj.attr
+
+
+class LoadGlobalTests(unittest.TestCase):
+
+    def tearDown(self):
+        globals().pop('opcache_global', None)
+        globals().pop('len', None)
+
+    def test_global_changes(self):
+        global opcache_global
+        opcache_global = 1
+        self.assertEqual(warm(get_global), 1)
+        opcache_global = 2
+        self.assertEqual(get_global(), 2)
+        del opcache_global
+        self.assertRaises(NameError, get_global)
+        opcache_global = 3
+        self.assertEqual(get_global(), 3)
+
+    def test_shadowed_builtin(self):
+        self.assertIs(warm(get_builtin), len)
+        globals()['len'] = 'shadow'
+        self.assertEqual(get_builtin(), 'shadow')
+        del globals()['len']
+        self.assertIs(get_builtin(), len)
+
+    def test_builtin_changes(self):
+        code = compile('def f():\n    return opcache_builtin\n',
+                       '<test>', 'exec')
+        ns = {}
+        exec code in ns
+        __builtin__.opcache_builtin = 'old'
+        try:
+            self.assertEqual(warm(ns['f']), 'old')
+            __builtin__.opcache_builtin = 'new'
+            self.assertEqual(ns['f'](), 'new')
+        finally:
+            del __builtin__.opcache_builtin
+        self.assertRaises(NameError, ns['f'])
+
+    def test_same_code_other_globals(self):
+        global opcache_global
+        opcache_global = 'here'
+        self.assertEqual(warm(get_global), 'here')
+        other = types.FunctionType(get_global.__code__,
+                                   {'opcache_global': 'there'})
+        self.assertEqual(other(), 'there')
+        self.assertEqual(get_global(), 'here')
+
+    def test_value_freed(self):
+        global opcache_global
+        opcache_global = [1]
+        self.assertEqual(warm(get_global), [1])
+        # the cache holds a borrowed reference, which must not outlive
+        # the value once it's replaced
+        opcache_global = None
+        test_support.gc_collect()
+        self.assertIsNone(get_global())
+
+
+class LoadAttrTests(unittest.TestCase):
+
+    def test_instance_attr(self):
+        obj = Plain()
+        self.assertEqual(warm(get_attr, obj), 1)
+        obj.attr = 2
+        self.assertEqual(get_attr(obj), 2)
+        other = Plain()
+        other.attr = 'other'
+        self.assertEqual(get_attr(other), 'other')
+        del obj.attr
+        self.assertRaises(AttributeError, get_attr, obj)
+
+    def test_instance_dict_layout(self):
+        obj = Plain()
+        warm(get_attr, obj)
+        # same attribute in a different slot of the instance dict
+        other = Plain()
+        for i in range(20):
+            setattr(other, 'x%d' % i, i)
+        other.attr = 'moved'
+        self.assertEqual(get_attr(other), 'moved')
+        other.__dict__ = {'attr': 'new dict'}
+        self.assertEqual(get_attr(other), 'new dict')
+
+    def test_fallback_to_class(self):
+        obj = Plain()
+        warm(get_attr, obj)
+        del obj.attr
+        Plain.attr = 'class attr'
+        try:
+            self.assertEqual(get_attr(obj), 'class attr')
+        finally:
+            del Plain.attr
+
+    def test_data_descriptor_added(self):
+        class C(object):
+            pass
+        obj = C()
+        obj.attr = 'instance'
+        self.assertEqual(warm(get_attr, obj), 'instance')
+        C.attr = property(lambda self: 'property')
+        self.assertEqual(get_attr(obj), 'property')
+        del C.attr
+        self.assertEqual(get_attr(obj), 'instance')
+
+    def test_base_class_changes(self):
+        class Base(object):
+            pass
+        class Derived(Base):
+            pass
+        obj = Derived()
+        obj.attr = 'instance'
+        self.assertEqual(warm(get_attr, obj), 'instance')
+        Base.attr = property(lambda self: 'base property')
+        self.assertEqual(get_attr(obj), 'base property')
+
+    def test_class_assignment(self):
+        class A(object):
+            pass
+        class B(object):
+            attr = property(lambda self: 'B')
+        obj = A()
+        obj.attr = 'A'
+        self.assertEqual(warm(get_attr, obj), 'A')
+        obj.__class__ = B
+        self.assertEqual(get_attr(obj), 'B')
+
+    def test_slots(self):
+        obj = Slotted()
+        obj.attr = 1
+        self.assertEqual(warm(get_attr, obj), 1)
+        obj.attr = 2
+        self.assertEqual(get_attr(obj), 2)
+        del obj.attr
+        self.assertRaises(AttributeError, get_attr, obj)
+
+    def test_property(self):
+        obj = WithProperty()
+        self.assertEqual(warm(get_attr, obj), WARMUP)
+        self.assertEqual(get_attr(obj), WARMUP + 1)
+        WithProperty.attr = property(lambda self: 1 // 0)
+        try:
+            self.assertRaises(ZeroDivisionError, get_attr, obj)
+        finally:
+            del WithProperty.attr
+
+    def test_module_attr(self):
+        module = types.ModuleType('opcache_test')
+        module.attr = 'module'
+        self.assertEqual(warm(get_attr, module), 'module')
+        module.attr = 'changed'
+        self.assertEqual(get_attr(module), 'changed')
+
+    def test_polymorphic(self):
+        objs = [Plain(), Slotted(), WithProperty(), Classic(),
+                types.ModuleType('m')]
+        objs[1].attr = 'slot'
+        objs[4].attr = 'module'
+        for i in xrange(WARMUP // len(objs) + 100):
+            results = [get_attr(obj) for obj in objs]
+        self.assertEqual(results[0], 1)
+        self.assertEqual(results[1], 'slot')
+        self.assertEqual(results[3], 'classic')
+        self.assertEqual(results[4], 'module')
+
+
+def test_main():
+    test_support.run_unittest(LoadGlobalTests, LoadAttrTests)
+
+
+if __name__ == "__main__":
+    test_main()
@@ -1,93 +1,111 @@
 import copy
 import pickle
+import sys
+import types
 from random import shuffle
 import unittest
-from collections import OrderedDict
 from collections import MutableMapping
 from test import mapping_tests, test_support
 
 
-class TestOrderedDict(unittest.TestCase):
+def _import_collections(use_c):
+    """Import a fresh copy of collections with either OrderedDict."""
+    if use_c:
+        return test_support.import_fresh_module('collections')
+    # Hide the C OrderedDict, keeping the rest of _collections.
+    import _collections
+    stub = types.ModuleType('_collections')
+    for name, value in vars(_collections).items():
+        if name not in ('OrderedDict', '__name__'):
+            setattr(stub, name, value)
+    with test_support.swap_item(sys.modules, '_collections', stub):
+        return test_support.import_fresh_module('collections')
+
+py_coll = _import_collections(use_c=False)
+c_coll = _import_collections(use_c=True)
+
+
+class OrderedDictTests(object):
 
     def test_init(self):
         with self.assertRaises(TypeError):
-            OrderedDict([('a', 1), ('b', 2)], None)                                 # too many args
+            self.OrderedDict([('a', 1), ('b', 2)], None)                            # too many args
         pairs = [('a', 1), ('b', 2), ('c', 3), ('d', 4), ('e', 5)]
-        self.assertEqual(sorted(OrderedDict(dict(pairs)).items()), pairs)           # dict input
-        self.assertEqual(sorted(OrderedDict(**dict(pairs)).items()), pairs)         # kwds input
-        self.assertEqual(list(OrderedDict(pairs).items()), pairs)                   # pairs input
-        self.assertEqual(list(OrderedDict([('a', 1), ('b', 2), ('c', 9), ('d', 4)],
-                                          c=3, e=5).items()), pairs)                # mixed input
+        self.assertEqual(sorted(self.OrderedDict(dict(pairs)).items()), pairs)      # dict input
+        self.assertEqual(sorted(self.OrderedDict(**dict(pairs)).items()), pairs)    # kwds input
+        self.assertEqual(list(self.OrderedDict(pairs).items()), pairs)              # pairs input
+        self.assertEqual(list(self.OrderedDict([('a', 1), ('b', 2), ('c', 9), ('d', 4)],
+                                               c=3, e=5).items()), pairs)           # mixed input
 
         # make sure no positional args conflict with possible kwdargs
-        self.assertEqual(list(OrderedDict(self=42).items()), [('self', 42)])
-        self.assertEqual(list(OrderedDict(other=42).items()), [('other', 42)])
-        self.assertRaises(TypeError, OrderedDict, 42)
-        self.assertRaises(TypeError, OrderedDict, (), ())
-        self.assertRaises(TypeError, OrderedDict.__init__)
+        self.assertEqual(list(self.OrderedDict(self=42).items()), [('self', 42)])
+        self.assertEqual(list(self.OrderedDict(other=42).items()), [('other', 42)])
+        self.assertRaises(TypeError, self.OrderedDict, 42)
+        self.assertRaises(TypeError, self.OrderedDict, (), ())
+        self.assertRaises(TypeError, self.OrderedDict.__init__)
 
         # Make sure that direct calls to __init__ do not clear previous contents
-        d = OrderedDict([('a', 1), ('b', 2), ('c', 3), ('d', 44), ('e', 55)])
+        d = self.OrderedDict([('a', 1), ('b', 2), ('c', 3), ('d', 44), ('e', 55)])
         d.__init__([('e', 5), ('f', 6)], g=7, d=4)
         self.assertEqual(list(d.items()),
             [('a', 1), ('b', 2), ('c', 3), ('d', 4), ('e', 5), ('f', 6), ('g', 7)])
 
     def test_update(self):
         with self.assertRaises(TypeError):
-            OrderedDict().update([('a', 1), ('b', 2)], None)                        # too many args
+            self.OrderedDict().update([('a', 1), ('b', 2)], None)                   # too many args
         pairs = [('a', 1), ('b', 2), ('c', 3), ('d', 4), ('e', 5)]
-        od = OrderedDict()
+        od = self.OrderedDict()
         od.update(dict(pairs))
         self.assertEqual(sorted(od.items()), pairs)                                 # dict input
-        od = OrderedDict()
+        od = self.OrderedDict()
         od.update(**dict(pairs))
         self.assertEqual(sorted(od.items()), pairs)                                 # kwds input
-        od = OrderedDict()
+        od = self.OrderedDict()
         od.update(pairs)
         self.assertEqual(list(od.items()), pairs)                                   # pairs input
-        od = OrderedDict()
+        od = self.OrderedDict()
         od.update([('a', 1), ('b', 2), ('c', 9), ('d', 4)], c=3, e=5)
         self.assertEqual(list(od.items()), pairs)                                   # mixed input
 
         # Issue 9137: Named argument called 'other' or 'self'
         # shouldn't be treated specially.
-        od = OrderedDict()
+        od = self.OrderedDict()
         od.update(self=23)
         self.assertEqual(list(od.items()), [('self', 23)])
-        od = OrderedDict()
+        od = self.OrderedDict()
         od.update(other={})
         self.assertEqual(list(od.items()), [('other', {})])
-        od = OrderedDict()
+        od = self.OrderedDict()
         od.update(red=5, blue=6, other=7, self=8)
         self.assertEqual(sorted(list(od.items())),
                          [('blue', 6), ('other', 7), ('red', 5), ('self', 8)])
 
         # Make sure that direct calls to update do not clear previous contents
         # add that updates items are not moved to the end
-        d = OrderedDict([('a', 1), ('b', 2), ('c', 3), ('d', 44), ('e', 55)])
+        d = self.OrderedDict([('a', 1), ('b', 2), ('c', 3), ('d', 44), ('e', 55)])
         d.update([('e', 5), ('f', 6)], g=7, d=4)
         self.assertEqual(list(d.items()),
             [('a', 1), ('b', 2), ('c', 3), ('d', 4), ('e', 5), ('f', 6), ('g', 7)])
 
-        self.assertRaises(TypeError, OrderedDict().update, 42)
-        self.assertRaises(TypeError, OrderedDict().update, (), ())
-        self.assertRaises(TypeError, OrderedDict.update)
+        self.assertRaises(TypeError, self.OrderedDict().update, 42)
+        self.assertRaises(TypeError, self.OrderedDict().update, (), ())
+        self.assertRaises(TypeError, self.OrderedDict.update)
 
     def test_abc(self):
-        self.assertIsInstance(OrderedDict(), MutableMapping)
-        self.assertTrue(issubclass(OrderedDict, MutableMapping))
+        self.assertIsInstance(self.OrderedDict(), MutableMapping)
+        self.assertTrue(issubclass(self.OrderedDict, MutableMapping))
 
     def test_clear(self):
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
         shuffle(pairs)
-        od = OrderedDict(pairs)
+        od = self.OrderedDict(pairs)
         self.assertEqual(len(od), len(pairs))
         od.clear()
         self.assertEqual(len(od), 0)
 
     def test_delitem(self):
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
-        od = OrderedDict(pairs)
+        od = self.OrderedDict(pairs)
         del od['a']
         self.assertNotIn('a', od)
         with self.assertRaises(KeyError):
@@ -95,7 +113,7 @@ class TestOrderedDict(unittest.TestCase):
         self.assertEqual(list(od.items()), pairs[:2] + pairs[3:])
 
     def test_setitem(self):
-        od = OrderedDict([('d', 1), ('b', 2), ('c', 3), ('a', 4), ('e', 5)])
+        od = self.OrderedDict([('d', 1), ('b', 2), ('c', 3), ('a', 4), ('e', 5)])
         od['c'] = 10           # existing element
         od['f'] = 20           # new element
         self.assertEqual(list(od.items()),
@@ -104,7 +122,7 @@ class TestOrderedDict(unittest.TestCase):
     def test_iterators(self):
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
         shuffle(pairs)
-        od = OrderedDict(pairs)
+        od = self.OrderedDict(pairs)
         self.assertEqual(list(od), [t[0] for t in pairs])
         self.assertEqual(od.keys()[:], [t[0] for t in pairs])
         self.assertEqual(od.values()[:], [t[1] for t in pairs])
@@ -118,7 +136,7 @@ class TestOrderedDict(unittest.TestCase):
     def test_popitem(self):
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
         shuffle(pairs)
-        od = OrderedDict(pairs)
+        od = self.OrderedDict(pairs)
         while pairs:
             self.assertEqual(od.popitem(), pairs.pop())
         with self.assertRaises(KeyError):
@@ -128,7 +146,7 @@ class TestOrderedDict(unittest.TestCase):
     def test_pop(self):
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
         shuffle(pairs)
-        od = OrderedDict(pairs)
+        od = self.OrderedDict(pairs)
         shuffle(pairs)
         while pairs:
             k, v = pairs.pop()
@@ -139,7 +157,7 @@ class TestOrderedDict(unittest.TestCase):
         self.assertEqual(od.pop(k, 12345), 12345)
 
         # make sure pop still works when __missing__ is defined
-        class Missing(OrderedDict):
+        class Missing(self.OrderedDict):
             def __missing__(self, key):
                 return 0
         m = Missing(a=1)
@@ -152,37 +170,41 @@ class TestOrderedDict(unittest.TestCase):
     def test_equality(self):
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
         shuffle(pairs)
-        od1 = OrderedDict(pairs)
-        od2 = OrderedDict(pairs)
+        od1 = self.OrderedDict(pairs)
+        od2 = self.OrderedDict(pairs)
         self.assertEqual(od1, od2)          # same order implies equality
         pairs = pairs[2:] + pairs[:2]
-        od2 = OrderedDict(pairs)
+        od2 = self.OrderedDict(pairs)
         self.assertNotEqual(od1, od2)       # different order implies inequality
         # comparison to regular dict is not order sensitive
         self.assertEqual(od1, dict(od2))
         self.assertEqual(dict(od2), od1)
         # different length implied inequality
-        self.assertNotEqual(od1, OrderedDict(pairs[:-1]))
+        self.assertNotEqual(od1, self.OrderedDict(pairs[:-1]))
 
     def test_copying(self):
         # Check that ordered dicts are copyable, deepcopyable, picklable,
         # and have a repr/eval round-trip
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
-        od = OrderedDict(pairs)
-        update_test = OrderedDict()
+        od = self.OrderedDict(pairs)
+        update_test = self.OrderedDict()
         update_test.update(od)
-        for i, dup in enumerate([
-                    od.copy(),
-                    copy.copy(od),
-                    copy.deepcopy(od),
-                    pickle.loads(pickle.dumps(od, 0)),
-                    pickle.loads(pickle.dumps(od, 1)),
-                    pickle.loads(pickle.dumps(od, 2)),
-                    pickle.loads(pickle.dumps(od, -1)),
-                    eval(repr(od)),
-                    update_test,
-                    OrderedDict(od),
-                    ]):
+        collections = sys.modules['collections']
+        with test_support.swap_attr(collections, 'OrderedDict',
+                                    self.OrderedDict):
+            dups = [
+                od.copy(),
+                copy.copy(od),
+                copy.deepcopy(od),
+                pickle.loads(pickle.dumps(od, 0)),
+                pickle.loads(pickle.dumps(od, 1)),
+                pickle.loads(pickle.dumps(od, 2)),
+                pickle.loads(pickle.dumps(od, -1)),
+                eval(repr(od), {'OrderedDict': self.OrderedDict}),
+                update_test,
+                self.OrderedDict(od),
+                ]
+        for i, dup in enumerate(dups):
             self.assertTrue(dup is not od)
             self.assertEqual(dup, od)
             self.assertEqual(list(dup.items()), list(od.items()))
@@ -193,7 +215,7 @@ class TestOrderedDict(unittest.TestCase):
         # Verify that __reduce__ is setup in a way that supports PyYAML's dump() feature.
         # In yaml, lists are native but tuples are not.
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
-        od = OrderedDict(pairs)
+        od = self.OrderedDict(pairs)
         # yaml.dump(od) -->
         # '!!python/object/apply:__main__.OrderedDict\n- - [a, 1]\n  - [b, 2]\n'
         self.assertTrue(all(type(pair)==list for pair in od.__reduce__()[1]))
@@ -201,27 +223,27 @@ class TestOrderedDict(unittest.TestCase):
     def test_reduce_not_too_fat(self):
         # do not save instance dictionary if not needed
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
-        od = OrderedDict(pairs)
+        od = self.OrderedDict(pairs)
         self.assertEqual(len(od.__reduce__()), 2)
         od.x = 10
         self.assertEqual(len(od.__reduce__()), 3)
 
     def test_repr(self):
-        od = OrderedDict([('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)])
+        od = self.OrderedDict([('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)])
         self.assertEqual(repr(od),
             "OrderedDict([('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)])")
-        self.assertEqual(eval(repr(od)), od)
-        self.assertEqual(repr(OrderedDict()), "OrderedDict()")
+        self.assertEqual(eval(repr(od), {'OrderedDict': self.OrderedDict}), od)
+        self.assertEqual(repr(self.OrderedDict()), "OrderedDict()")
 
     def test_repr_recursive(self):
         # See issue #9826
-        od = OrderedDict.fromkeys('abc')
+        od = self.OrderedDict.fromkeys('abc')
         od['x'] = od
         self.assertEqual(repr(od),
             "OrderedDict([('a', None), ('b', None), ('c', None), ('x', ...)])")
 
     def test_repr_recursive_values(self):
-        od = OrderedDict()
+        od = self.OrderedDict()
         od[42] = od.viewvalues()
         r = repr(od)
         # Cannot perform a stronger test, as the contents of the repr
@@ -236,7 +258,7 @@ class TestOrderedDict(unittest.TestCase):
     def test_setdefault(self):
         pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
         shuffle(pairs)
-        od = OrderedDict(pairs)
+        od = self.OrderedDict(pairs)
         pair_order = list(od.items())
         self.assertEqual(od.setdefault('a', 10), 3)
         # make sure order didn't change
@@ -246,7 +268,7 @@ class TestOrderedDict(unittest.TestCase):
         self.assertEqual(list(od.items())[-1], ('x', 10))
 
         # make sure setdefault still works when __missing__ is defined
-        class Missing(OrderedDict):
+        class Missing(self.OrderedDict):
             def __missing__(self, key):
                 return 0
         self.assertEqual(Missing().setdefault(5, 9), 9)
@@ -254,7 +276,7 @@ class TestOrderedDict(unittest.TestCase):
     def test_reinsert(self):
         # Given insert a, insert b, delete a, re-insert a,
         # verify that a is now later than b.
-        od = OrderedDict()
+        od = self.OrderedDict()
         od['a'] = 1
         od['b'] = 2
         del od['a']
@@ -263,7 +285,7 @@ class TestOrderedDict(unittest.TestCase):
 
     def test_views(self):
         s = 'the quick brown fox jumped over a lazy dog yesterday before dawn'.split()
-        od = OrderedDict.fromkeys(s)
+        od = self.OrderedDict.fromkeys(s)
         self.assertEqual(list(od.viewkeys()),  s)
         self.assertEqual(list(od.viewvalues()),  [None for k in s])
         self.assertEqual(list(od.viewitems()),  [(k, None) for k in s])
@@ -274,33 +296,161 @@ class TestOrderedDict(unittest.TestCase):
 
     def test_override_update(self):
         # Verify that subclasses can override update() without breaking __init__()
-        class MyOD(OrderedDict):
+        class MyOD(self.OrderedDict):
             def update(self, *args, **kwds):
                 raise Exception()
         items = [('a', 1), ('c', 3), ('b', 2)]
         self.assertEqual(list(MyOD(items).items()), items)
 
     def test_free_after_iterating(self):
-        test_support.check_free_after_iterating(self, iter, OrderedDict)
-        test_support.check_free_after_iterating(self, lambda d: d.iterkeys(), OrderedDict)
-        test_support.check_free_after_iterating(self, lambda d: d.itervalues(), OrderedDict)
-        test_support.check_free_after_iterating(self, lambda d: d.iteritems(), OrderedDict)
-        test_support.check_free_after_iterating(self, lambda d: iter(d.viewkeys()), OrderedDict)
-        test_support.check_free_after_iterating(self, lambda d: iter(d.viewvalues()), OrderedDict)
-        test_support.check_free_after_iterating(self, lambda d: iter(d.viewitems()), OrderedDict)
+        test_support.check_free_after_iterating(self, iter, self.OrderedDict)
+        test_support.check_free_after_iterating(self, lambda d: d.iterkeys(), self.OrderedDict)
+        test_support.check_free_after_iterating(self, lambda d: d.itervalues(), self.OrderedDict)
+        test_support.check_free_after_iterating(self, lambda d: d.iteritems(), self.OrderedDict)
+        test_support.check_free_after_iterating(self, lambda d: iter(d.viewkeys()), self.OrderedDict)
+        test_support.check_free_after_iterating(self, lambda d: iter(d.viewvalues()), self.OrderedDict)
+        test_support.check_free_after_iterating(self, lambda d: iter(d.viewitems()), self.OrderedDict)
+
+    def test_move_to_end(self):
+        od = self.OrderedDict.fromkeys('abcde')
+        self.assertEqual(list(od), list('abcde'))
+        od.move_to_end('c')
+        self.assertEqual(list(od), list('abdec'))
+        od.move_to_end('c', 0)
+        self.assertEqual(list(od), list('cabde'))
+        od.move_to_end('c', 0)
+        self.assertEqual(list(od), list('cabde'))
+        od.move_to_end('e')
+        self.assertEqual(list(od), list('cabde'))
+        od.move_to_end('b', last=False)
+        self.assertEqual(list(od), list('bcade'))
+        with self.assertRaises(KeyError):
+            od.move_to_end('x')
+        with self.assertRaises(KeyError):
+            od.move_to_end('x', 0)
+        self.assertEqual(list(reversed(od)), list('edacb'))
 
-class GeneralMappingTests(mapping_tests.BasicTestMappingProtocol):
-    type2test = OrderedDict
+    def test_popitem_first(self):
+        pairs = [('c', 1), ('b', 2), ('a', 3), ('d', 4), ('e', 5), ('f', 6)]
+        shuffle(pairs)
+        od = self.OrderedDict(pairs)
+        while pairs:
+            self.assertEqual(od.popitem(last=False), pairs.pop(0))
+        with self.assertRaises(KeyError):
+            od.popitem(last=False)
+        self.assertEqual(len(od), 0)
+
+    def test_order_after_growing_and_shrinking(self):
+        # The underlying dict is resized several times along the way.
+        od = self.OrderedDict()
+        for i in range(1000):
+            od[i] = i
+        for i in range(0, 1000, 3):
+            del od[i]
+        od.move_to_end(1, last=False)
+        od.move_to_end(2)
+        expected = [i for i in range(1000) if i % 3 and i not in (1, 2)]
+        self.assertEqual(list(od), [1] + expected + [2])
+        self.assertEqual(list(reversed(od)), [2] + expected[::-1] + [1])
+        od.clear()
+        od.update([(i, None) for i in range(10, 0, -1)])
+        self.assertEqual(list(od), range(10, 0, -1))
+
+    def test_dict_update_keeps_order(self):
+        od = self.OrderedDict.fromkeys('abc')
+        od.update(od)
+        self.assertEqual(list(od), list('abc'))
+        od2 = self.OrderedDict()
+        od2.update(od)
+        self.assertEqual(list(od2), list('abc'))
+
+
+class PurePythonOrderedDictTests(OrderedDictTests, unittest.TestCase):
+
+    OrderedDict = py_coll.OrderedDict
+
+
+@unittest.skipUnless(c_coll.OrderedDict is not py_coll.OrderedDict,
+                     'requires the C OrderedDict')
+class CPythonOrderedDictTests(OrderedDictTests, unittest.TestCase):
+
+    OrderedDict = c_coll.OrderedDict
+
+    def test_key_change_during_iteration(self):
+        od = self.OrderedDict.fromkeys('abcde')
+        self.assertEqual(list(od), list('abcde'))
+        with self.assertRaises(RuntimeError):
+            for i, k in enumerate(od):
+                od.move_to_end(k)
+                self.assertLess(i, 5)
+        with self.assertRaises(RuntimeError):
+            for k in od:
+                od['f'] = None
+        with self.assertRaises(RuntimeError):
+            for k in od:
+                del od['c']
+        self.assertEqual(list(od), list('bdeaf'))
+
+    def test_views_reversed(self):
+        od = self.OrderedDict.fromkeys('abc')
+        od.move_to_end('a')
+        self.assertEqual(list(reversed(od.viewkeys())), list('acb'))
+        self.assertEqual(list(reversed(od.viewitems())),
+                         [('a', None), ('c', None), ('b', None)])
+
+    def test_dict_methods_do_not_crash(self):
+        # Bypassing the OrderedDict methods is not supported, but must not
+        # corrupt memory.
+        od = self.OrderedDict.fromkeys('abc')
+        dict.__delitem__(od, 'b')
+        dict.__setitem__(od, 'x', None)
+        self.assertEqual(len(od), 3)
+        self.assertRaises(KeyError, repr, od)
+        self.assertRaises(KeyError, list, od.viewvalues())
+        od['x'] = 1
+        del od['a']
+        for i in range(100):
+            od[i] = i
+        dict.popitem(od)
+        od['y'] = None
+        del od['y']
+        od.clear()
+        self.assertEqual(list(od), [])
+        self.assertEqual(len(od), 0)
+
+    def test_sizeof(self):
+        od = self.OrderedDict()
+        empty = sys.getsizeof(od)
+        self.assertGreaterEqual(empty, sys.getsizeof({}))
+        od.update((i, i) for i in range(100))
+        self.assertGreater(sys.getsizeof(od), sys.getsizeof(dict(od)))
+
+
+class PurePythonGeneralMappingTests(mapping_tests.BasicTestMappingProtocol):
+    type2test = py_coll.OrderedDict
 
     def test_popitem(self):
         d = self._empty_mapping()
         self.assertRaises(KeyError, d.popitem)
 
-class MyOrderedDict(OrderedDict):
-    pass
+class CPythonGeneralMappingTests(mapping_tests.BasicTestMappingProtocol):
+    type2test = c_coll.OrderedDict
+
+    def test_popitem(self):
+        d = self._empty_mapping()
+        self.assertRaises(KeyError, d.popitem)
+
+class PurePythonSubclassMappingTests(mapping_tests.BasicTestMappingProtocol):
+    class type2test(py_coll.OrderedDict):
+        pass
+
+    def test_popitem(self):
+        d = self._empty_mapping()
+        self.assertRaises(KeyError, d.popitem)
 
-class SubclassMappingTests(mapping_tests.BasicTestMappingProtocol):
-    type2test = MyOrderedDict
+class CPythonSubclassMappingTests(mapping_tests.BasicTestMappingProtocol):
+    class type2test(c_coll.OrderedDict):
+        pass
 
     def test_popitem(self):
         d = self._empty_mapping()
@@ -308,7 +458,10 @@ class SubclassMappingTests(mapping_tests.BasicTestMappingProtocol):
 
 
 def test_main(verbose=None):
-    test_classes = [TestOrderedDict, GeneralMappingTests, SubclassMappingTests]
+    test_classes = [PurePythonOrderedDictTests, CPythonOrderedDictTests,
+                    PurePythonGeneralMappingTests, CPythonGeneralMappingTests,
+                    PurePythonSubclassMappingTests,
+                    CPythonSubclassMappingTests]
     test_support.run_unittest(*test_classes)
 
 if __name__ == "__main__":
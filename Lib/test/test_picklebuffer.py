@@ -0,0 +1,94 @@
+"""Unit tests for the PickleBuffer object.
+
+Pickling tests themselves are in pickletester.py.
+"""
+
+import gc
+import weakref
+import unittest
+from pickle import PickleBuffer
+
+from test import test_support
+
+
+class B(bytearray):
+    pass
+
+
+class PickleBufferTest(unittest.TestCase):
+
+    def check_memoryview(self, pb, equiv):
+        m = memoryview(pb)
+        m_equiv = memoryview(equiv)
+        self.assertEqual(m.tobytes(), m_equiv.tobytes())
+        self.assertEqual(m.readonly, m_equiv.readonly)
+        self.assertEqual(m.itemsize, m_equiv.itemsize)
+        self.assertEqual(m.shape, m_equiv.shape)
+
+    def test_constructor_failure(self):
+        with self.assertRaises(TypeError):
+            PickleBuffer()
+        with self.assertRaises(TypeError):
+            PickleBuffer("foo", "bar")
+        with self.assertRaises(TypeError):
+            PickleBuffer(x="foo")
+        # Not a buffer
+        with self.assertRaises(TypeError):
+            PickleBuffer(None)
+        # Only the new-style buffer interface is supported
+        with self.assertRaises(TypeError):
+            PickleBuffer(u"foo")
+
+    def test_basics(self):
+        pb = PickleBuffer("foo")
+        self.check_memoryview(pb, "foo")
+        pb = PickleBuffer(bytearray("foo"))
+        self.check_memoryview(pb, bytearray("foo"))
+        pb = PickleBuffer(memoryview("foo"))
+        self.check_memoryview(pb, "foo")
+
+    def test_release(self):
+        pb = PickleBuffer("foo")
+        pb.release()
+        with self.assertRaises(ValueError):
+            memoryview(pb)
+        with self.assertRaises(ValueError):
+            pb.raw()
+        # Releasing twice is fine
+        pb.release()
+
+    def test_cycle(self):
+        b = B("foo")
+        pb = PickleBuffer(b)
+        b.cycle = pb
+        wpb = weakref.ref(pb)
+        del b, pb
+        gc.collect()
+        self.assertIsNone(wpb())
+
+    def check_raw(self, obj, equiv):
+        pb = PickleBuffer(obj)
+        m = pb.raw()
+        self.assertEqual(m.tobytes(), equiv)
+        self.assertEqual(m.format, 'B')
+        self.assertEqual(m.itemsize, 1)
+        self.assertEqual(m.ndim, 1)
+        self.assertEqual(m.shape, (len(equiv),))
+        return m
+
+    def test_raw(self):
+        m = self.check_raw("foo", "foo")
+        self.assertTrue(m.readonly)
+        b = bytearray("foo")
+        m = self.check_raw(b, "foo")
+        self.assertFalse(m.readonly)
+        # The raw view shares the original memory
+        m[0] = 'x'
+        self.assertEqual(b, bytearray("xoo"))
+
+
+def test_main():
+    test_support.run_unittest(PickleBufferTest)
+
+if __name__ == "__main__":
+    test_main()
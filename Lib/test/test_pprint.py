@@ -276,16 +276,16 @@ frozenset2([0,
  frozenset([1]): frozenset([frozenset([]),
                             frozenset([1, 2]),
                             frozenset([0, 1])]),
+ frozenset([0, 1]): frozenset([frozenset([0]),
+                               frozenset([1]),
+                               frozenset([0, 1, 2])]),
  frozenset([2]): frozenset([frozenset([]),
                             frozenset([1, 2]),
                             frozenset([0, 2])]),
- frozenset([1, 2]): frozenset([frozenset([2]),
-                               frozenset([1]),
-                               frozenset([0, 1, 2])]),
  frozenset([0, 2]): frozenset([frozenset([2]),
                                frozenset([0]),
                                frozenset([0, 1, 2])]),
- frozenset([0, 1]): frozenset([frozenset([0]),
+ frozenset([1, 2]): frozenset([frozenset([2]),
                                frozenset([1]),
                                frozenset([0, 1, 2])]),
  frozenset([0, 1, 2]): frozenset([frozenset([1, 2]),
@@ -294,7 +294,37 @@ frozenset2([0,
         cube = test.test_set.cube(3)
         self.assertEqual(pprint.pformat(cube), cube_repr_tgt)
         cubo_repr_tgt = """\
-{frozenset([frozenset([0, 2]), frozenset([0])]): frozenset([frozenset([frozenset([0,
+{frozenset([frozenset([2]), frozenset([])]): frozenset([frozenset([frozenset([2]),
+                                                                   frozenset([1,
+                                                                              2])]),
+                                                        frozenset([frozenset([]),
+                                                                   frozenset([0])]),
+                                                        frozenset([frozenset([]),
+                                                                   frozenset([1])]),
+                                                        frozenset([frozenset([2]),
+                                                                   frozenset([0,
+                                                                              2])])]),
+ frozenset([frozenset([]), frozenset([0])]): frozenset([frozenset([frozenset([0]),
+                                                                   frozenset([0,
+                                                                              1])]),
+                                                        frozenset([frozenset([0]),
+                                                                   frozenset([0,
+                                                                              2])]),
+                                                        frozenset([frozenset([]),
+                                                                   frozenset([1])]),
+                                                        frozenset([frozenset([]),
+                                                                   frozenset([2])])]),
+ frozenset([frozenset([]), frozenset([1])]): frozenset([frozenset([frozenset([]),
+                                                                   frozenset([0])]),
+                                                        frozenset([frozenset([1]),
+                                                                   frozenset([1,
+                                                                              2])]),
+                                                        frozenset([frozenset([]),
+                                                                   frozenset([2])]),
+                                                        frozenset([frozenset([1]),
+                                                                   frozenset([0,
+                                                                              1])])]),
+ frozenset([frozenset([0, 2]), frozenset([0])]): frozenset([frozenset([frozenset([0,
                                                                                   2]),
                                                                        frozenset([0,
                                                                                   1,
@@ -307,19 +337,19 @@ frozenset2([0,
                                                             frozenset([frozenset([2]),
                                                                        frozenset([0,
                                                                                   2])])]),
- frozenset([frozenset([0, 1]), frozenset([1])]): frozenset([frozenset([frozenset([0,
+ frozenset([frozenset([0]), frozenset([0, 1])]): frozenset([frozenset([frozenset([]),
+                                                                       frozenset([0])]),
+                                                            frozenset([frozenset([0,
                                                                                   1]),
                                                                        frozenset([0,
                                                                                   1,
                                                                                   2])]),
                                                             frozenset([frozenset([0]),
                                                                        frozenset([0,
-                                                                                  1])]),
-                                                            frozenset([frozenset([1]),
-                                                                       frozenset([1,
                                                                                   2])]),
-                                                            frozenset([frozenset([]),
-                                                                       frozenset([1])])]),
+                                                            frozenset([frozenset([1]),
+                                                                       frozenset([0,
+                                                                                  1])])]),
  frozenset([frozenset([1, 2]), frozenset([1])]): frozenset([frozenset([frozenset([1,
                                                                                   2]),
                                                                        frozenset([0,
@@ -333,49 +363,19 @@ frozenset2([0,
                                                             frozenset([frozenset([1]),
                                                                        frozenset([0,
                                                                                   1])])]),
- frozenset([frozenset([1, 2]), frozenset([2])]): frozenset([frozenset([frozenset([1,
-                                                                                  2]),
+ frozenset([frozenset([0, 1]), frozenset([1])]): frozenset([frozenset([frozenset([0,
+                                                                                  1]),
                                                                        frozenset([0,
                                                                                   1,
                                                                                   2])]),
+                                                            frozenset([frozenset([0]),
+                                                                       frozenset([0,
+                                                                                  1])]),
                                                             frozenset([frozenset([1]),
                                                                        frozenset([1,
                                                                                   2])]),
-                                                            frozenset([frozenset([2]),
-                                                                       frozenset([0,
-                                                                                  2])]),
                                                             frozenset([frozenset([]),
-                                                                       frozenset([2])])]),
- frozenset([frozenset([]), frozenset([0])]): frozenset([frozenset([frozenset([0]),
-                                                                   frozenset([0,
-                                                                              1])]),
-                                                        frozenset([frozenset([0]),
-                                                                   frozenset([0,
-                                                                              2])]),
-                                                        frozenset([frozenset([]),
-                                                                   frozenset([1])]),
-                                                        frozenset([frozenset([]),
-                                                                   frozenset([2])])]),
- frozenset([frozenset([]), frozenset([1])]): frozenset([frozenset([frozenset([]),
-                                                                   frozenset([0])]),
-                                                        frozenset([frozenset([1]),
-                                                                   frozenset([1,
-                                                                              2])]),
-                                                        frozenset([frozenset([]),
-                                                                   frozenset([2])]),
-                                                        frozenset([frozenset([1]),
-                                                                   frozenset([0,
-                                                                              1])])]),
- frozenset([frozenset([2]), frozenset([])]): frozenset([frozenset([frozenset([2]),
-                                                                   frozenset([1,
-                                                                              2])]),
-                                                        frozenset([frozenset([]),
-                                                                   frozenset([0])]),
-                                                        frozenset([frozenset([]),
-                                                                   frozenset([1])]),
-                                                        frozenset([frozenset([2]),
-                                                                   frozenset([0,
-                                                                              2])])]),
+                                                                       frozenset([1])])]),
  frozenset([frozenset([0, 1, 2]), frozenset([0, 1])]): frozenset([frozenset([frozenset([1,
                                                                                         2]),
                                                                              frozenset([0,
@@ -392,20 +392,20 @@ frozenset2([0,
                                                                   frozenset([frozenset([1]),
                                                                              frozenset([0,
                                                                                         1])])]),
- frozenset([frozenset([0]), frozenset([0, 1])]): frozenset([frozenset([frozenset([]),
-                                                                       frozenset([0])]),
-                                                            frozenset([frozenset([0,
-                                                                                  1]),
+ frozenset([frozenset([1, 2]), frozenset([2])]): frozenset([frozenset([frozenset([1,
+                                                                                  2]),
                                                                        frozenset([0,
                                                                                   1,
                                                                                   2])]),
-                                                            frozenset([frozenset([0]),
-                                                                       frozenset([0,
-                                                                                  2])]),
                                                             frozenset([frozenset([1]),
+                                                                       frozenset([1,
+                                                                                  2])]),
+                                                            frozenset([frozenset([2]),
                                                                        frozenset([0,
-                                                                                  1])])]),
- frozenset([frozenset([2]), frozenset([0, 2])]): frozenset([frozenset([frozenset([0,
+                                                                                  2])]),
+                                                            frozenset([frozenset([]),
+                                                                       frozenset([2])])]),
+ frozenset([frozenset([0, 2]), frozenset([2])]): frozenset([frozenset([frozenset([0,
                                                                                   2]),
                                                                        frozenset([0,
                                                                                   1,
@@ -179,6 +179,41 @@ class BaseSelectorTestCase(unittest.TestCase):
         self.assertFalse(s.register.called)
         self.assertFalse(s.unregister.called)
 
+    def test_register_many(self):
+        s = self.SELECTOR()
+        self.addCleanup(s.close)
+
+        rd, wr = self.make_socketpair()
+        data = object()
+
+        keys = s.register_many([(rd, selectors.EVENT_READ, data),
+                                (wr, selectors.EVENT_WRITE)])
+        self.assertEqual([key.fileobj for key in keys], [rd, wr])
+        self.assertEqual(keys[0], s.get_key(rd))
+        self.assertEqual(keys[1], s.get_key(wr))
+        self.assertIs(keys[0].data, data)
+        self.assertIsNone(keys[1].data)
+
+        result = s.select(0)
+        self.assertEqual(result, [(keys[1], selectors.EVENT_WRITE)])
+
+    def test_register_many_failure(self):
+        s = self.SELECTOR()
+        self.addCleanup(s.close)
+
+        rd, wr = self.make_socketpair()
+        s.register(wr, selectors.EVENT_WRITE)
+
+        # wr is already registered: rd must not stay registered either
+        self.assertRaises(KeyError, s.register_many,
+                          [(rd, selectors.EVENT_READ),
+                           (wr, selectors.EVENT_WRITE)])
+        self.assertRaises(KeyError, s.get_key, rd)
+        self.assertRaises(ValueError, s.register_many,
+                          [(rd, selectors.EVENT_READ), (wr, 0)])
+        self.assertRaises(KeyError, s.get_key, rd)
+        self.assertEqual(len(s.get_map()), 1)
+
     def test_close(self):
         s = self.SELECTOR()
         self.addCleanup(s.close)
@@ -488,6 +523,85 @@ class EpollSelectorTestCase(BaseSelectorTestCase, ScalableSelectorMixIn):
 
     SELECTOR = getattr(selectors, 'EpollSelector', None)
 
+    def test_edge_triggered(self):
+        s = self.SELECTOR()
+        self.addCleanup(s.close)
+
+        rd, wr = self.make_socketpair()
+        key = s.register(rd, selectors.EVENT_READ, flags=select.EPOLLET)
+
+        wr.send(b"x")
+        self.assertEqual(s.select(0), [(key, selectors.EVENT_READ)])
+        # the data is still unread, but no new data has arrived
+        self.assertEqual(s.select(0), [])
+        wr.send(b"y")
+        self.assertEqual(s.select(0), [(key, selectors.EVENT_READ)])
+
+        # changing the data keeps the flags
+        key = s.modify(rd, selectors.EVENT_READ, "data")
+        self.assertEqual(s.select(0), [])
+
+    @unittest.skipUnless(hasattr(select, 'EPOLLONESHOT'),
+                         "Test needs select.EPOLLONESHOT")
+    def test_oneshot(self):
+        s = self.SELECTOR()
+        self.addCleanup(s.close)
+
+        rd, wr = self.make_socketpair()
+        key = s.register(wr, selectors.EVENT_WRITE,
+                         flags=select.EPOLLONESHOT)
+        self.assertEqual(s.select(0), [(key, selectors.EVENT_WRITE)])
+        self.assertEqual(s.select(0), [])
+
+        # modify() rearms the file object
+        self.assertEqual(s.modify(wr, selectors.EVENT_WRITE), key)
+        self.assertEqual(s.select(0), [(key, selectors.EVENT_WRITE)])
+        self.assertEqual(s.select(0), [])
+
+        # dropping the flag makes it level-triggered again
+        s.modify(wr, selectors.EVENT_WRITE, flags=0)
+        self.assertEqual(s.select(0), [(key, selectors.EVENT_WRITE)])
+        self.assertEqual(s.select(0), [(key, selectors.EVENT_WRITE)])
+
+    def test_register_many_flags(self):
+        s = self.SELECTOR()
+        self.addCleanup(s.close)
+
+        rd, wr = self.make_socketpair()
+        key, = s.register_many([(wr, selectors.EVENT_WRITE, None,
+                                 select.EPOLLET)])
+        self.assertEqual(s.select(0), [(key, selectors.EVENT_WRITE)])
+        self.assertEqual(s.select(0), [])
+
+    def test_invalid_flags(self):
+        s = self.SELECTOR()
+        self.addCleanup(s.close)
+
+        rd, wr = self.make_socketpair()
+        self.assertRaises(ValueError, s.register, rd, selectors.EVENT_READ,
+                          flags=select.EPOLLIN)
+        self.assertRaises(KeyError, s.get_key, rd)
+        s.register(rd, selectors.EVENT_READ)
+        self.assertRaises(ValueError, s.modify, rd, selectors.EVENT_READ,
+                          flags=select.EPOLLPRI)
+
+    def test_select_many_ready(self):
+        s = self.SELECTOR()
+        self.addCleanup(s.close)
+
+        pairs = [self.make_socketpair() for i in range(64)]
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE
+        keys = s.register_many([(rd, events) for rd, wr in pairs])
+        for rd, wr in pairs[::2]:
+            wr.send(b"x")
+        ready = dict(s.select(0))
+        self.assertEqual(len(ready), 64)
+        for i, key in enumerate(keys):
+            expected = selectors.EVENT_WRITE
+            if i % 2 == 0:
+                expected |= selectors.EVENT_READ
+            self.assertEqual(ready[key], expected)
+
 
 @unittest.skipUnless(hasattr(selectors, 'KqueueSelector'),
                      "Test needs selectors.KqueueSelector)")
@@ -209,6 +209,51 @@ class SysModuleTest(unittest.TestCase):
             sys.setcheckinterval(n)
             self.assertEqual(sys.getcheckinterval(), n)
 
+    @unittest.skipUnless(hasattr(sys, 'setswitchinterval'),
+                         'Threading required for this test.')
+    def test_switchinterval(self):
+        self.assertRaises(TypeError, sys.setswitchinterval)
+        self.assertRaises(TypeError, sys.setswitchinterval, "a")
+        self.assertRaises(ValueError, sys.setswitchinterval, -1.0)
+        self.assertRaises(ValueError, sys.setswitchinterval, 0.0)
+        orig = sys.getswitchinterval()
+        # sanity check
+        self.assertTrue(orig < 0.5, orig)
+        try:
+            for n in 0.00001, 0.05, 3.0, orig:
+                sys.setswitchinterval(n)
+                self.assertAlmostEqual(sys.getswitchinterval(), n)
+        finally:
+            sys.setswitchinterval(orig)
+
+    @unittest.skipUnless(hasattr(sys, '_immortalize_heap'),
+                         'requires --with-immortal-objects')
+    def test_immortalize_heap(self):
+        self.assertFalse(sys._is_immortal([]))
+        # Run in a subprocess: immortal objects are never freed.
+        code = """if 1:
+            import gc, sys
+            class C(object):
+                pass
+            c = C()
+            c.attr = ([1.5], {'key': (2.5,)})
+            assert not sys._is_immortal(c)
+            n = sys._immortalize_heap()
+            assert n > 0, n
+            assert gc.get_freeze_count() > 0
+            for obj in (None, True, C, c, c.attr, c.attr[0], c.attr[0][0],
+                        c.attr[1]['key'][0], 'key'):
+                assert sys._is_immortal(obj), obj
+                refcnt = sys.getrefcount(obj)
+                ref = obj
+                assert sys.getrefcount(obj) == refcnt
+                del ref
+            assert not sys._is_immortal([])
+            del c
+            gc.collect()
+            """
+        assert_python_ok('-c', code)
+
     def test_recursionlimit(self):
         self.assertRaises(TypeError, sys.getrecursionlimit, 42)
         oldlimit = sys.getrecursionlimit()
@@ -568,7 +613,7 @@ class SizeofTest(unittest.TestCase):
         class class_oldstyle():
             def method():
                 pass
-        check(class_oldstyle, size('7P'))
+        check(class_oldstyle, size('8P'))
         # instance (old-style class)
         check(class_oldstyle(), size('3P'))
         # instancemethod (old-style class)
@@ -603,9 +648,15 @@ class SizeofTest(unittest.TestCase):
         # method-wrapper (descriptor object)
         check({}.__iter__, size('2P'))
         # dict
-        check({}, size('3P2P' + 8*'P2P'))
+        check({}, size('PQ2P') + struct.calcsize('5P' + 8*'b' + 5*'P2P'))
         x = {1:1, 2:2, 3:3, 4:4, 5:5, 6:6, 7:7, 8:8}
-        check(x, size('3P2P' + 8*'P2P') + 16*struct.calcsize('P2P'))
+        check(x, size('PQ2P') + struct.calcsize('5P' + 16*'b' + 10*'P2P'))
+        # instance dict sharing its keys with the class
+        class newstyleclass(object):
+            pass
+        x = newstyleclass()
+        x.attr = 1
+        check(x.__dict__, size('PQ2P') + 5*self.P)
         # dictionary-keyiterator
         check({}.iterkeys(), size('P2PPP'))
         # dictionary-valueiterator
@@ -744,7 +795,7 @@ class SizeofTest(unittest.TestCase):
                   '10P'                  # PyMappingMethods
                   '3P'                 # PySequenceMethods
                   '6P'                  # PyBufferProcs
-                  '3P')
+                  '4P')
         class newstyleclass(object):
             pass
         check(newstyleclass, s)
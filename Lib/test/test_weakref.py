@@ -75,8 +75,8 @@ def collect_in_thread(period=0.001):
             gc.collect()
 
     with test_support.disable_gc():
-        old_interval = sys.getcheckinterval()
-        sys.setcheckinterval(20)
+        old_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
         t = threading.Thread(target=collect)
         t.start()
         try:
@@ -84,7 +84,7 @@ def collect_in_thread(period=0.001):
         finally:
             please_stop = True
             t.join()
-            sys.setcheckinterval(old_interval)
+            sys.setswitchinterval(old_interval)
 
 
 class TestBase(unittest.TestCase):
@@ -477,6 +477,23 @@ class TestsWithSourceFile(unittest.TestCase):
         # remove the test file subdirectories
         rmtree(os.path.join(os.getcwd(), 'ziptest2dir'))
 
+    def test_extract_all_workers(self):
+        with zipfile.ZipFile(TESTFN2, "w", zipfile.ZIP_STORED) as zipfp:
+            for i in range(20):
+                for fpath, fdata in SMALL_TEST_DATA:
+                    zipfp.writestr('%d/%s' % (i, fpath), fdata * i)
+            zipfp.writestr('0/ziptest2dir/', '')
+
+        try:
+            with zipfile.ZipFile(TESTFN2, "r") as zipfp:
+                zipfp.extractall(TESTFNDIR, workers=4)
+            for i in range(20):
+                for fpath, fdata in SMALL_TEST_DATA:
+                    outfile = os.path.join(TESTFNDIR, str(i), fpath)
+                    self.check_file(outfile, fdata * i)
+        finally:
+            rmtree(TESTFNDIR)
+
     def check_file(self, filename, content):
         self.assertTrue(os.path.isfile(filename))
         with open(filename, 'rb') as f:
@@ -1580,6 +1597,62 @@ class TestsWithMultipleOpens(unittest.TestCase):
         with open(os.devnull) as f:
             self.assertLess(f.fileno(), 100)
 
+    def test_concurrent_reads(self):
+        # Members of an archive given as a file object can be read from
+        # several threads, each with a position of its own.
+        import threading
+        self.make_test_archive(TESTFN2)
+        with open(TESTFN2, "rb") as f, zipfile.ZipFile(f) as zipf:
+            results = []
+            def reader(name):
+                with zipf.open(name) as zopen:
+                    data = ''
+                    while True:
+                        chunk = zopen.read(97)
+                        if not chunk:
+                            break
+                        data += chunk
+                results.append((name, data))
+            threads = [threading.Thread(target=reader, args=(name,))
+                       for name in ['ones', 'twos'] * 4]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len(results), 8)
+        for name, data in results:
+            self.assertEqual(data, self.data1 if name == 'ones' else
+                                   self.data2)
+
+    def test_mmap(self):
+        with zipfile.ZipFile(TESTFN2, "w") as zipf:
+            zipf.writestr('ones', self.data1)
+            zipf.writestr('twos', self.data2, zipfile.ZIP_DEFLATED)
+        self.assertRaises(RuntimeError, zipfile.ZipFile, TESTFN2, "a",
+                          use_mmap=True)
+        with zipfile.ZipFile(TESTFN2, use_mmap=True) as zipf:
+            with zipf.open('ones') as zopen1, zipf.open('twos') as zopen2:
+                data1 = zopen1.read(500)
+                data2 = zopen2.read(500)
+                data1 += zopen1.read()
+                data2 += zopen2.read()
+            self.assertEqual(data1, self.data1)
+            self.assertEqual(data2, self.data2)
+            view1 = zipf.view('ones')
+            view2 = zipf.view(zipf.getinfo('twos'))
+            self.assertTrue(view1.readonly)
+            self.assertIsNone(zipf.testzip())
+        # The view of the stored member refers to the map, which outlives
+        # the archive.
+        self.assertEqual(view1.tobytes(), self.data1)
+        self.assertEqual(view2.tobytes(), self.data2)
+        self.assertRaises(RuntimeError, zipf.view, 'ones')
+
+    def test_view_without_mmap(self):
+        self.make_test_archive(TESTFN2)
+        with zipfile.ZipFile(TESTFN2) as zipf:
+            self.assertEqual(zipf.view('ones').tobytes(), self.data1)
+
     def tearDown(self):
         unlink(TESTFN2)
 
@@ -56,6 +56,15 @@ class ChecksumTestCase(unittest.TestCase):
         self.assertEqual(zlib.crc32("penguin"), zlib.crc32("penguin", 0))
         self.assertEqual(zlib.adler32("penguin"),zlib.adler32("penguin",1))
 
+    def test_buffers(self):
+        # Any object with the buffer interface is accepted without a copy
+        data = bytearray(b"penguin")
+        self.assertEqual(zlib.adler32(data), zlib.adler32("penguin"))
+        self.assertEqual(zlib.adler32(memoryview(data)),
+                         zlib.adler32("penguin"))
+        self.assertEqual(zlib.crc32(memoryview(data)[2:]),
+                         zlib.crc32("nguin"))
+
     def test_abcdefghijklmnop(self):
         """test issue1202 compliance: signed crc32, adler32 in 2.x"""
         foo = 'abcdefghijklmnop'
@@ -169,6 +178,13 @@ class CompressTestCase(BaseCompressTestCase, unittest.TestCase):
         x = zlib.compress(data)
         self.assertEqual(zlib.decompress(x), data)
 
+    def test_buffers(self):
+        data = HAMLET_SCENE * 8
+        x = zlib.compress(memoryview(data))
+        self.assertEqual(x, zlib.compress(data))
+        self.assertEqual(zlib.decompress(bytearray(x)), data)
+        self.assertEqual(zlib.decompress(memoryview(x)), data)
+
     def test_incomplete_stream(self):
         # A useful error message is given
         x = zlib.compress(HAMLET_SCENE)
@@ -224,6 +240,15 @@ class CompressObjectTestCase(BaseCompressTestCase, unittest.TestCase):
         y2 = dco.flush()
         self.assertEqual(data, y1 + y2)
 
+    def test_pair_buffers(self):
+        data = HAMLET_SCENE * 128
+        co = zlib.compressobj()
+        x = co.compress(memoryview(data)) + co.flush()
+        dco = zlib.decompressobj()
+        m = memoryview(x)
+        y = dco.decompress(m[:100]) + dco.decompress(m[100:]) + dco.flush()
+        self.assertEqual(data, y)
+
     def test_compressoptions(self):
         # specify lots of options to compressobj()
         level = 2
@@ -239,6 +264,29 @@ class CompressObjectTestCase(BaseCompressTestCase, unittest.TestCase):
         y2 = dco.flush()
         self.assertEqual(HAMLET_SCENE, y1 + y2)
 
+    def test_dictionary(self):
+        h = HAMLET_SCENE
+        # Build a simulated dictionary out of the words in HAMLET.
+        words = h.split()
+        random.shuffle(words)
+        zdict = b''.join(words)
+        # Use it to compress HAMLET.
+        co = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS,
+                              zlib.DEF_MEM_LEVEL, 0, zdict)
+        cd = co.compress(h) + co.flush()
+        # A raw stream which first outputs the dictionary leaves it in the
+        # window of the decompressor, so the data can follow it.
+        co = zlib.compressobj(0, zlib.DEFLATED, -zlib.MAX_WBITS)
+        prefix = co.compress(zdict) + co.flush(zlib.Z_SYNC_FLUSH)
+        dco = zlib.decompressobj(-zlib.MAX_WBITS)
+        self.assertEqual(dco.decompress(prefix + cd) + dco.flush(),
+                         zdict + h)
+        plain = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.assertLess(len(cd), len(plain.compress(h) + plain.flush()))
+        with self.assertRaises(TypeError):
+            zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS,
+                             zlib.DEF_MEM_LEVEL, 0, 42)
+
     def test_compressincremental(self):
         # compress object in steps, decompress object as one-shot
         data = HAMLET_SCENE * 128
@@ -30,12 +30,14 @@ from traceback import format_exc as _format_exc
 __all__ = ['activeCount', 'active_count', 'Condition', 'currentThread',
            'current_thread', 'enumerate', 'Event',
            'Lock', 'RLock', 'Semaphore', 'BoundedSemaphore', 'Thread',
-           'Timer', 'setprofile', 'settrace', 'local', 'stack_size']
+           'Timer', 'setprofile', 'settrace', 'local', 'stack_size',
+           'TIMEOUT_MAX']
 
 _start_new_thread = thread.start_new_thread
 _allocate_lock = thread.allocate_lock
 _get_ident = thread.get_ident
 ThreadError = thread.error
+TIMEOUT_MAX = thread.TIMEOUT_MAX
 del thread
 
 
@@ -144,7 +146,7 @@ class _RLock(_Verbose):
         return "<%s owner=%r count=%d>" % (
                 self.__class__.__name__, owner, self.__count)
 
-    def acquire(self, blocking=1):
+    def acquire(self, blocking=1, timeout=-1):
         """Acquire a lock, blocking or non-blocking.
 
         When invoked without arguments: if this thread already owns the lock,
@@ -164,6 +166,11 @@ class _RLock(_Verbose):
         otherwise, do the same thing as when called without arguments, and
         return true.
 
+        When invoked with the floating-point timeout argument set to a positive
+        value, block for at most the number of seconds specified by timeout
+        and as long as the lock cannot be acquired.  Return true if the lock
+        has been acquired, false if the timeout has elapsed.
+
         """
         me = _get_ident()
         if self.__owner == me:
@@ -171,7 +178,7 @@ class _RLock(_Verbose):
             if __debug__:
                 self._note("%s.acquire(%s): recursive success", self, blocking)
             return 1
-        rc = self.__block.acquire(blocking)
+        rc = self.__block.acquire(blocking, timeout)
         if rc:
             self.__owner = me
             self.__count = 1
@@ -341,22 +348,10 @@ class _Condition(_Verbose):
                 if __debug__:
                     self._note("%s.wait(): got it", self)
             else:
-                # Balancing act:  We can't afford a pure busy loop, so we
-                # have to sleep; but if we sleep the whole timeout time,
-                # we'll be unresponsive.  The scheme here sleeps very
-                # little at first, longer as time goes on, but never longer
-                # than 20 times per second (or the timeout time remaining).
-                endtime = _time() + timeout
-                delay = 0.0005 # 500 us -> initial delay of 1 ms
-                while True:
-                    gotit = waiter.acquire(0)
-                    if gotit:
-                        break
-                    remaining = endtime - _time()
-                    if remaining <= 0:
-                        break
-                    delay = min(delay * 2, remaining, .05)
-                    _sleep(delay)
+                if timeout > 0:
+                    gotit = waiter.acquire(True, min(timeout, TIMEOUT_MAX))
+                else:
+                    gotit = waiter.acquire(False)
                 if not gotit:
                     if __debug__:
                         self._note("%s.wait(%s): timed out", self, timeout)
@@ -437,7 +432,7 @@ class _Semaphore(_Verbose):
         self.__cond = Condition(Lock())
         self.__value = value
 
-    def acquire(self, blocking=1):
+    def acquire(self, blocking=1, timeout=None):
         """Acquire a semaphore, decrementing the internal counter by one.
 
         When invoked without arguments: if the internal counter is larger than
@@ -456,16 +451,30 @@ class _Semaphore(_Verbose):
         an argument would block, return false immediately; otherwise, do the
         same thing as when called without arguments, and return true.
 
+        When invoked with a timeout other than None, it will block for at
+        most timeout seconds.  If acquire does not complete successfully in
+        that interval, return false.  Return true otherwise.
+
         """
+        if not blocking and timeout is not None:
+            raise ValueError("can't specify timeout for non-blocking acquire")
         rc = False
+        endtime = None
         with self.__cond:
             while self.__value == 0:
                 if not blocking:
                     break
+                if timeout is not None:
+                    if endtime is None:
+                        endtime = _time() + timeout
+                    else:
+                        timeout = endtime - _time()
+                        if timeout <= 0:
+                            break
                 if __debug__:
                     self._note("%s.acquire(%s): blocked waiting, value=%s",
                             self, blocking, self.__value)
-                self.__cond.wait()
+                self.__cond.wait(timeout)
             else:
                 self.__value = self.__value - 1
                 if __debug__:
@@ -662,25 +662,16 @@ _cleanups = []
 
 
 def _tp_cache(func):
-    maxsize = 128
-    cache = {}
-    _cleanups.append(cache.clear)
+    cached = functools.lru_cache()(func)
+    _cleanups.append(cached.cache_clear)
 
     @functools.wraps(func)
     def inner(*args):
-        key = args
         try:
-            return cache[key]
+            return cached(*args)
         except TypeError:
-            # Assume it's an unhashable argument.
-            return func(*args)
-        except KeyError:
-            value = func(*args)
-            if len(cache) >= maxsize:
-                # If the cache grows too much, just start over.
-                cache.clear()
-            cache[key] = value
-            return value
+            pass  # All real errors (not unhashable args) are raised below.
+        return func(*args)
 
     return inner
 
@@ -7,6 +7,11 @@ import io
 import re
 import string
 
+try:
+    import threading
+except ImportError:
+    import dummy_threading as threading
+
 try:
     import zlib # We may need its compression method
     crc32 = zlib.crc32
@@ -521,6 +526,56 @@ compressor_names = {
 }
 
 
+class _SharedFile(object):
+    """Reader over a file object which is shared with other readers.
+
+    Every reader has a position of its own, and only seeks and reads the
+    file while holding the lock, so members can be read from several threads.
+    """
+
+    def __init__(self, file, pos, lock):
+        self._file = file
+        self._pos = pos
+        self._lock = lock
+
+    def tell(self):
+        return self._pos
+
+    def read(self, n=-1):
+        with self._lock:
+            self._file.seek(self._pos)
+            data = self._file.read(n)
+            self._pos = self._file.tell()
+        return data
+
+    def close(self):
+        pass
+
+
+class _MappedFile(object):
+    """Reader over the memory map of an archive, see ZipFile(use_mmap=True).
+    """
+
+    def __init__(self, map, pos):
+        self._map = map
+        self._pos = pos
+
+    def tell(self):
+        return self._pos
+
+    def read(self, n=-1):
+        start = self._pos
+        if n < 0:
+            data = self._map[start:]
+        else:
+            data = self._map[start:start + n]
+        self._pos = start + len(data)
+        return data
+
+    def close(self):
+        pass
+
+
 class ZipExtFile(io.BufferedIOBase):
     """File-like object for reading an archive member.
        Is returned by ZipFile.open().
@@ -732,7 +787,8 @@ class ZipExtFile(io.BufferedIOBase):
 class ZipFile(object):
     """ Class with methods to open, read, write, close, list zip files.
 
-    z = ZipFile(file, mode="r", compression=ZIP_STORED, allowZip64=False)
+    z = ZipFile(file, mode="r", compression=ZIP_STORED, allowZip64=False,
+                use_mmap=False)
 
     file: Either the path to the file, or a file-like object.
           If it is a path, the file will be opened and closed by ZipFile.
@@ -741,15 +797,23 @@ class ZipFile(object):
     allowZip64: if True ZipFile will create files with ZIP64 extensions when
                 needed, otherwise it will raise an exception when this would
                 be necessary.
+    use_mmap: if True the archive, which must be opened for reading, is
+              memory mapped, and members are read straight from the map.
+
+    Members can be read and extracted from several threads at the same time.
 
     """
 
     fp = None                   # Set here since __del__ checks it
+    _map = None
 
-    def __init__(self, file, mode="r", compression=ZIP_STORED, allowZip64=False):
+    def __init__(self, file, mode="r", compression=ZIP_STORED, allowZip64=False,
+                 use_mmap=False):
         """Open the ZIP file with mode read "r", write "w" or append "a"."""
         if mode not in ("r", "w", "a"):
             raise RuntimeError('ZipFile() requires mode "r", "w", or "a"')
+        if use_mmap and mode != "r":
+            raise RuntimeError('use_mmap requires mode "r"')
 
         if compression == ZIP_STORED:
             pass
@@ -769,6 +833,7 @@ class ZipFile(object):
         self.mode = key = mode.replace('b', '')[0]
         self.pwd = None
         self._comment = ''
+        self._lock = threading.Lock()
 
         # Check if we were passed a file-like object
         if isinstance(file, basestring):
@@ -791,6 +856,10 @@ class ZipFile(object):
         try:
             if key == 'r':
                 self._RealGetContents()
+                if use_mmap:
+                    import mmap
+                    self._map = mmap.mmap(self.fp.fileno(), 0,
+                                          access=mmap.ACCESS_READ)
             elif key == 'w':
                 # set the modified flag so central directory gets written
                 # even if no files are added to the archive
@@ -957,50 +1026,76 @@ class ZipFile(object):
         """Return file bytes (as a string) for name."""
         return self.open(name, "r", pwd).read()
 
+    def view(self, name, pwd=None):
+        """Return file bytes (as a memoryview) for name.
+
+        If the archive is memory mapped and the member is stored without
+        compression or encryption, the view refers to the map itself and
+        nothing is copied; the CRC of such members is not checked.  Other
+        members are read as by read().
+        """
+        zinfo = self._getinfo(name)
+        if (self._map is None or zinfo.compress_type != ZIP_STORED or
+            zinfo.flag_bits & 0x1):
+            return memoryview(self.read(zinfo, pwd))
+        zef_file = _MappedFile(self._map, zinfo.header_offset)
+        self._skip_file_header(zef_file, zinfo)
+        start = zef_file.tell()
+        return memoryview(self._map)[start:start + zinfo.compress_size]
+
+    def _getinfo(self, name):
+        # Make sure we have an info object
+        if not self.fp:
+            raise RuntimeError, \
+                  "Attempt to read ZIP archive that was already closed"
+        if isinstance(name, ZipInfo):
+            # 'name' is already an info object
+            return name
+        # Get info object for name
+        return self.getinfo(name)
+
+    def _skip_file_header(self, zef_file, zinfo):
+        # Skip the file header, leaving zef_file at the start of the data
+        fheader = zef_file.read(sizeFileHeader)
+        if len(fheader) != sizeFileHeader:
+            raise BadZipfile("Truncated file header")
+        fheader = struct.unpack(structFileHeader, fheader)
+        if fheader[_FH_SIGNATURE] != stringFileHeader:
+            raise BadZipfile("Bad magic number for file header")
+
+        fname = zef_file.read(fheader[_FH_FILENAME_LENGTH])
+        if fheader[_FH_EXTRA_FIELD_LENGTH]:
+            zef_file.read(fheader[_FH_EXTRA_FIELD_LENGTH])
+
+        if fname != zinfo.orig_filename:
+            raise BadZipfile, \
+                    'File name in directory "%s" and header "%s" differ.' % (
+                        zinfo.orig_filename, fname)
+
     def open(self, name, mode="r", pwd=None):
         """Return file-like object for 'name'."""
         if mode not in ("r", "U", "rU"):
             raise RuntimeError, 'open() requires mode "r", "U", or "rU"'
-        if not self.fp:
-            raise RuntimeError, \
-                  "Attempt to read ZIP archive that was already closed"
+        zinfo = self._getinfo(name)
 
         # Only open a new file for instances where we were not
-        # given a file object in the constructor
-        if self._filePassed:
-            zef_file = self.fp
+        # given a file object in the constructor or mapped the archive;
+        # either way every reader gets a position of its own.
+        if self._map is not None:
+            zef_file = _MappedFile(self._map, zinfo.header_offset)
+            should_close = False
+        elif self._filePassed:
+            zef_file = _SharedFile(self.fp, zinfo.header_offset, self._lock)
             should_close = False
         else:
             zef_file = open(self.filename, 'rb')
             should_close = True
 
         try:
-            # Make sure we have an info object
-            if isinstance(name, ZipInfo):
-                # 'name' is already an info object
-                zinfo = name
-            else:
-                # Get info object for name
-                zinfo = self.getinfo(name)
-
-            zef_file.seek(zinfo.header_offset, 0)
-
-            # Skip the file header:
-            fheader = zef_file.read(sizeFileHeader)
-            if len(fheader) != sizeFileHeader:
-                raise BadZipfile("Truncated file header")
-            fheader = struct.unpack(structFileHeader, fheader)
-            if fheader[_FH_SIGNATURE] != stringFileHeader:
-                raise BadZipfile("Bad magic number for file header")
-
-            fname = zef_file.read(fheader[_FH_FILENAME_LENGTH])
-            if fheader[_FH_EXTRA_FIELD_LENGTH]:
-                zef_file.read(fheader[_FH_EXTRA_FIELD_LENGTH])
+            if should_close:
+                zef_file.seek(zinfo.header_offset, 0)
 
-            if fname != zinfo.orig_filename:
-                raise BadZipfile, \
-                        'File name in directory "%s" and header "%s" differ.' % (
-                            zinfo.orig_filename, fname)
+            self._skip_file_header(zef_file, zinfo)
 
             # check for encrypted flag & handle password
             is_encrypted = zinfo.flag_bits & 0x1
@@ -1050,17 +1145,26 @@ class ZipFile(object):
 
         return self._extract_member(member, path, pwd)
 
-    def extractall(self, path=None, members=None, pwd=None):
+    def extractall(self, path=None, members=None, pwd=None, workers=1):
         """Extract all members from the archive to the current working
            directory. `path' specifies a different directory to extract to.
            `members' is optional and must be a subset of the list returned
-           by namelist().
+           by namelist(). `workers' is the number of threads extracting
+           members at the same time.
         """
         if members is None:
             members = self.namelist()
 
-        for zipinfo in members:
-            self.extract(zipinfo, path, pwd)
+        if workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(workers) as executor:
+                futures = [executor.submit(self.extract, zipinfo, path, pwd)
+                           for zipinfo in members]
+            for future in futures:
+                future.result()
+        else:
+            for zipinfo in members:
+                self.extract(zipinfo, path, pwd)
 
     def _extract_member(self, member, targetpath, pwd):
         """Extract the ZipInfo object 'member' to a physical
@@ -1092,14 +1196,23 @@ class ZipFile(object):
         targetpath = os.path.join(targetpath, arcname)
         targetpath = os.path.normpath(targetpath)
 
-        # Create all upper directories if necessary.
+        # Create all upper directories if necessary.  Another thread of
+        # extractall() may be creating them at the same time.
         upperdirs = os.path.dirname(targetpath)
         if upperdirs and not os.path.exists(upperdirs):
-            os.makedirs(upperdirs)
+            try:
+                os.makedirs(upperdirs)
+            except OSError:
+                if not os.path.isdir(upperdirs):
+                    raise
 
         if member.filename[-1] == '/':
             if not os.path.isdir(targetpath):
-                os.mkdir(targetpath)
+                try:
+                    os.mkdir(targetpath)
+                except OSError:
+                    if not os.path.isdir(targetpath):
+                        raise
             return targetpath
 
         with self.open(member, pwd=pwd) as source, \
@@ -1392,6 +1505,14 @@ class ZipFile(object):
         finally:
             fp = self.fp
             self.fp = None
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    # Views returned by view() still refer to the map,
+                    # which is unmapped once they are all released.
+                    pass
+                self._map = None
             if not self._filePassed:
                 fp.close()
 
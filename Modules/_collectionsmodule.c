@@ -1738,12 +1738,1677 @@ static PyTypeObject defdict_type = {
     PyObject_GC_Del,                    /* tp_free */
 };
 
+/* OrderedDict type *********************************************************/
+
+/* An OrderedDict is a dict subclass that remembers the order in which keys
+ * were first inserted, in a doubly-linked list with one node per key.  The
+ * list is not circular: the first node has prev==NULL and the last one has
+ * next==NULL, and both od_first and od_last are NULL when it is empty.  The
+ * dict holds the values; a node only holds (a reference to) its key and the
+ * key's hash.
+ *
+ * To find the node of a key in O(1), od_fast_nodes maps the index of the
+ * key's entry in the underlying dict (see _PyDict_GetEntryIndex()) to its
+ * node.  Entry indices only change when the dict replaces its keys object,
+ * on resize or clear, so od_resize_sentinel remembers the keys object the
+ * map was built for and the map is rebuilt whenever it no longer matches.
+ * Every change to the linked list bumps od_state, which lets iterators keep
+ * a pointer to their next node and detect mutation.
+ *
+ * Changing an OrderedDict behind its back, e.g. with
+ * dict.__setitem__(od, key, value), leaves the linked list out of sync with
+ * the dict.  That is not supported, but must not crash the interpreter.
+ */
+
+typedef struct _odictnode _ODictNode;
+
+struct _odictnode {
+    PyObject *key;
+    long hash;
+    _ODictNode *next;
+    _ODictNode *prev;
+};
+
+typedef struct {
+    PyDictObject od_dict;
+    _ODictNode *od_first;
+    _ODictNode *od_last;
+    _ODictNode **od_fast_nodes;
+    Py_ssize_t od_fast_nodes_size;
+    void *od_resize_sentinel;
+    size_t od_state;
+    PyObject *od_inst_dict;
+    PyObject *od_weakreflist;
+} odictobject;
+
+static PyTypeObject odict_type; /* Forward */
+static PyTypeObject odictiter_type; /* Forward */
+static PyTypeObject odictkeys_type; /* Forward */
+static PyTypeObject odictvalues_type; /* Forward */
+static PyTypeObject odictitems_type; /* Forward */
+
+#define odict_CheckExact(op) (Py_TYPE(op) == &odict_type)
+
+static void
+odict_key_error(PyObject *key)
+{
+    /* Wrap the key in a tuple, so that tuple keys are reported whole */
+    PyObject *tup = PyTuple_Pack(1, key);
+    if (tup == NULL)
+        return;
+    PyErr_SetObject(PyExc_KeyError, tup);
+    Py_DECREF(tup);
+}
+
+/* Rebuild od_fast_nodes for the current keys object of the dict. */
+static int
+odict_resize(odictobject *od)
+{
+    PyDictObject *mp = (PyDictObject *)od;
+    _ODictNode **fast_nodes, *node;
+    Py_ssize_t size, i;
+
+    size = _PyDict_EntriesSize(mp);
+    fast_nodes = PyMem_NEW(_ODictNode *, size);
+    if (fast_nodes == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    for (i = 0; i < size; i++)
+        fast_nodes[i] = NULL;
+    for (node = od->od_first; node != NULL; node = node->next) {
+        i = _PyDict_GetEntryIndex(mp, node->key, node->hash);
+        if (i == -2) {
+            PyMem_FREE(fast_nodes);
+            return -1;
+        }
+        /* A key missing from the dict keeps its node but gets no index */
+        if (i >= 0)
+            fast_nodes[i] = node;
+    }
+    PyMem_FREE(od->od_fast_nodes);
+    od->od_fast_nodes = fast_nodes;
+    od->od_fast_nodes_size = size;
+    od->od_resize_sentinel = mp->ma_keys;
+    return 0;
+}
+
+/* Return the entry index of key, -1 if it is not in the dict, or -2 with
+   an exception set. */
+static Py_ssize_t
+odict_get_index(odictobject *od, PyObject *key, long hash)
+{
+    PyDictObject *mp = (PyDictObject *)od;
+
+    if (od->od_resize_sentinel != (void *)mp->ma_keys ||
+        od->od_fast_nodes_size != _PyDict_EntriesSize(mp)) {
+        if (odict_resize(od) < 0)
+            return -2;
+    }
+    return _PyDict_GetEntryIndex(mp, key, hash);
+}
+
+/* Return the node of key, or NULL if there is none (with an exception set
+   if an error occurred). */
+static _ODictNode *
+odict_find_node(odictobject *od, PyObject *key, long hash)
+{
+    Py_ssize_t i = odict_get_index(od, key, hash);
+    if (i < 0)
+        return NULL;
+    return od->od_fast_nodes[i];
+}
+
+static void
+odict_link_last(odictobject *od, _ODictNode *node)
+{
+    node->next = NULL;
+    node->prev = od->od_last;
+    if (od->od_last == NULL)
+        od->od_first = node;
+    else
+        od->od_last->next = node;
+    od->od_last = node;
+    od->od_state++;
+}
+
+static void
+odict_link_first(odictobject *od, _ODictNode *node)
+{
+    node->prev = NULL;
+    node->next = od->od_first;
+    if (od->od_first == NULL)
+        od->od_last = node;
+    else
+        od->od_first->prev = node;
+    od->od_first = node;
+    od->od_state++;
+}
+
+static void
+odict_unlink(odictobject *od, _ODictNode *node)
+{
+    if (node->prev == NULL)
+        od->od_first = node->next;
+    else
+        node->prev->next = node->next;
+    if (node->next == NULL)
+        od->od_last = node->prev;
+    else
+        node->next->prev = node->prev;
+    node->prev = node->next = NULL;
+    od->od_state++;
+}
+
+/* Append a node for key, which has just been stored in the dict, unless
+   it already has one. */
+static int
+odict_add_new_node(odictobject *od, PyObject *key, long hash)
+{
+    Py_ssize_t i;
+    _ODictNode *node;
+
+    i = odict_get_index(od, key, hash);
+    if (i < 0) {
+        if (i == -1)
+            odict_key_error(key);
+        return -1;
+    }
+    if (od->od_fast_nodes[i] != NULL)
+        return 0;
+    node = PyMem_NEW(_ODictNode, 1);
+    if (node == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    Py_INCREF(key);
+    node->key = key;
+    node->hash = hash;
+    odict_link_last(od, node);
+    od->od_fast_nodes[i] = node;
+    return 0;
+}
+
+/* Drop the node of key, if any.  This must be called before key is
+   removed from the dict, while its entry can still be found. */
+static int
+odict_clear_node(odictobject *od, PyObject *key, long hash)
+{
+    Py_ssize_t i;
+    _ODictNode *node;
+
+    i = odict_get_index(od, key, hash);
+    if (i < 0)
+        return i == -1 ? 0 : -1;
+    node = od->od_fast_nodes[i];
+    if (node == NULL)
+        return 0;
+    od->od_fast_nodes[i] = NULL;
+    odict_unlink(od, node);
+    /* The dict still holds a reference to the key */
+    Py_DECREF(node->key);
+    PyMem_FREE(node);
+    return 0;
+}
+
+static void
+odict_clear_nodes(odictobject *od)
+{
+    _ODictNode *node, *next;
+
+    PyMem_FREE(od->od_fast_nodes);
+    od->od_fast_nodes = NULL;
+    od->od_fast_nodes_size = 0;
+    od->od_resize_sentinel = NULL;
+
+    node = od->od_first;
+    od->od_first = od->od_last = NULL;
+    od->od_state++;
+    while (node != NULL) {
+        next = node->next;
+        Py_DECREF(node->key);
+        PyMem_FREE(node);
+        node = next;
+    }
+}
+
+static int
+odict_setitem(odictobject *od, PyObject *key, PyObject *value)
+{
+    long hash;
+    int res;
+
+    hash = PyObject_Hash(key);
+    if (hash == -1)
+        return -1;
+    res = _PyDict_SetItem_KnownHash((PyObject *)od, key, value, hash);
+    if (res == 0) {
+        res = odict_add_new_node(od, key, hash);
+        if (res < 0) {
+            /* Revert setting the value on the dict */
+            PyObject *exc, *val, *tb;
+            PyErr_Fetch(&exc, &val, &tb);
+            (void)_PyDict_DelItem_KnownHash((PyObject *)od, key, hash);
+            PyErr_Restore(exc, val, tb);
+        }
+    }
+    return res;
+}
+
+static int
+odict_delitem(odictobject *od, PyObject *key)
+{
+    long hash;
+
+    hash = PyObject_Hash(key);
+    if (hash == -1)
+        return -1;
+    if (odict_clear_node(od, key, hash) < 0)
+        return -1;
+    return _PyDict_DelItem_KnownHash((PyObject *)od, key, hash);
+}
+
+static int
+odict_ass_sub(odictobject *od, PyObject *key, PyObject *value)
+{
+    if (value == NULL)
+        return odict_delitem(od, key);
+    return odict_setitem(od, key, value);
+}
+
+/* Remove key and return its value, or failobj if key is missing; raise
+   KeyError for a missing key if failobj is NULL. */
+static PyObject *
+odict_popkey(odictobject *od, PyObject *key, long hash, PyObject *failobj)
+{
+    PyObject *value;
+    int exists;
+
+    if (odict_CheckExact(od)) {
+        if (odict_clear_node(od, key, hash) < 0)
+            return NULL;
+        return _PyDict_Pop_KnownHash((PyObject *)od, key, hash, failobj);
+    }
+
+    /* Go through the subclass's __getitem__ and __delitem__ */
+    exists = PySequence_Contains((PyObject *)od, key);
+    if (exists < 0)
+        return NULL;
+    if (exists) {
+        value = PyObject_GetItem((PyObject *)od, key);
+        if (value != NULL && PyObject_DelItem((PyObject *)od, key) < 0)
+            Py_CLEAR(value);
+        return value;
+    }
+    if (failobj == NULL) {
+        odict_key_error(key);
+        return NULL;
+    }
+    Py_INCREF(failobj);
+    return failobj;
+}
+
+/* Like MutableMapping.update(), which OrderedDict.__init__ calls directly
+   so that subclasses can override update(). */
+
+static int
+odict_update_pairs(PyObject *self, PyObject *pairs)
+{
+    PyObject *iterator, *pair, *pair_iterator, *key, *value, *extra;
+    int res = 0;
+
+    iterator = PyObject_GetIter(pairs);
+    if (iterator == NULL)
+        return -1;
+    while ((pair = PyIter_Next(iterator)) != NULL) {
+        key = value = NULL;
+        res = -1;
+        pair_iterator = PyObject_GetIter(pair);
+        Py_DECREF(pair);
+        if (pair_iterator == NULL)
+            break;
+        key = PyIter_Next(pair_iterator);
+        if (key == NULL) {
+            if (!PyErr_Occurred())
+                PyErr_SetString(PyExc_ValueError,
+                                "need more than 0 values to unpack");
+            goto next;
+        }
+        value = PyIter_Next(pair_iterator);
+        if (value == NULL) {
+            if (!PyErr_Occurred())
+                PyErr_SetString(PyExc_ValueError,
+                                "need more than 1 value to unpack");
+            goto next;
+        }
+        extra = PyIter_Next(pair_iterator);
+        if (extra != NULL) {
+            Py_DECREF(extra);
+            PyErr_SetString(PyExc_ValueError,
+                            "too many values to unpack");
+            goto next;
+        }
+        if (PyErr_Occurred())
+            goto next;
+        res = PyObject_SetItem(self, key, value);
+    next:
+        Py_DECREF(pair_iterator);
+        Py_XDECREF(key);
+        Py_XDECREF(value);
+        if (res < 0)
+            break;
+    }
+    Py_DECREF(iterator);
+    if (res < 0 || PyErr_Occurred())
+        return -1;
+    return 0;
+}
+
+static int
+odict_update_common(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    Py_ssize_t len = PyTuple_GET_SIZE(args);
+    int res;
+
+    if (len > 1) {
+        PyErr_Format(PyExc_TypeError,
+                     "update expected at most 1 arguments, got %zd", len);
+        return -1;
+    }
+    if (len == 1) {
+        PyObject *other = PyTuple_GET_ITEM(args, 0);
+        PyObject *keys, *iterator, *key, *value;
+
+        if (PyDict_CheckExact(other)) {
+            PyObject *items = PyDict_Items(other);
+            if (items == NULL)
+                return -1;
+            res = odict_update_pairs(self, items);
+            Py_DECREF(items);
+            if (res < 0)
+                return -1;
+        }
+        else if (PyObject_HasAttrString(other, "keys")) {
+            keys = PyObject_CallMethod(other, "keys", NULL);
+            if (keys == NULL)
+                return -1;
+            iterator = PyObject_GetIter(keys);
+            Py_DECREF(keys);
+            if (iterator == NULL)
+                return -1;
+            res = 0;
+            while (res == 0 && (key = PyIter_Next(iterator)) != NULL) {
+                value = PyObject_GetItem(other, key);
+                if (value == NULL)
+                    res = -1;
+                else {
+                    res = PyObject_SetItem(self, key, value);
+                    Py_DECREF(value);
+                }
+                Py_DECREF(key);
+            }
+            Py_DECREF(iterator);
+            if (res < 0 || PyErr_Occurred())
+                return -1;
+        }
+        else if (odict_update_pairs(self, other) < 0)
+            return -1;
+    }
+    if (kwargs != NULL && PyDict_Size(kwargs) > 0) {
+        PyObject *items = PyDict_Items(kwargs);
+        if (items == NULL)
+            return -1;
+        res = odict_update_pairs(self, items);
+        Py_DECREF(items);
+        if (res < 0)
+            return -1;
+    }
+    return 0;
+}
+
+/* Methods */
+
+static PyObject *odictiter_new(odictobject *, int);
+
+#define ODICT_ITER_REVERSED 1
+#define ODICT_ITER_KEYS 2
+#define ODICT_ITER_VALUES 4
+#define ODICT_ITER_ITEMS (ODICT_ITER_KEYS|ODICT_ITER_VALUES)
+
+PyDoc_STRVAR(odict_update_doc,
+"od.update([E, ]**F) -> None.  Update od from mapping/iterable E and F.\n\
+If E present and has a .keys() method, does:     for k in E: od[k] = E[k]\n\
+If E present and lacks .keys() method, does:     for (k, v) in E: od[k] = v\n\
+In either case, this is followed by: for k, v in F.items(): od[k] = v");
+
+static PyObject *
+odict_update(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    if (odict_update_common(self, args, kwargs) < 0)
+        return NULL;
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(odict_setdefault_doc,
+"od.setdefault(k[,d]) -> od.get(k,d), also set od[k]=d if k not in od");
+
+static PyObject *
+odict_setdefault(odictobject *od, PyObject *args)
+{
+    PyObject *key, *failobj = Py_None, *value;
+    int exists;
+
+    if (!PyArg_UnpackTuple(args, "setdefault", 1, 2, &key, &failobj))
+        return NULL;
+
+    if (odict_CheckExact(od)) {
+        value = _PyDict_GetItemWithError((PyObject *)od, key);
+        if (value != NULL) {
+            Py_INCREF(value);
+            return value;
+        }
+        if (PyErr_Occurred() || odict_setitem(od, key, failobj) < 0)
+            return NULL;
+    }
+    else {
+        exists = PySequence_Contains((PyObject *)od, key);
+        if (exists < 0)
+            return NULL;
+        if (exists)
+            return PyObject_GetItem((PyObject *)od, key);
+        if (PyObject_SetItem((PyObject *)od, key, failobj) < 0)
+            return NULL;
+    }
+    Py_INCREF(failobj);
+    return failobj;
+}
+
+PyDoc_STRVAR(odict_pop_doc,
+"od.pop(k[,d]) -> v, remove specified key and return the corresponding\n\
+value.  If key is not found, d is returned if given, otherwise KeyError\n\
+is raised.");
+
+static PyObject *
+odict_pop(odictobject *od, PyObject *args)
+{
+    PyObject *key, *failobj = NULL;
+    long hash;
+
+    if (!PyArg_UnpackTuple(args, "pop", 1, 2, &key, &failobj))
+        return NULL;
+    hash = PyObject_Hash(key);
+    if (hash == -1)
+        return NULL;
+    return odict_popkey(od, key, hash, failobj);
+}
+
+PyDoc_STRVAR(odict_popitem_doc,
+"od.popitem(last=True) -> (k, v), return and remove a (key, value) pair.\n\
+Pairs are returned in LIFO order if last is true or FIFO order if false.");
+
+static PyObject *
+odict_popitem(odictobject *od, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"last", 0};
+    PyObject *last = Py_True, *key, *value, *item;
+    _ODictNode *node;
+    int pos;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|O:popitem", kwlist,
+                                     &last))
+        return NULL;
+    pos = PyObject_IsTrue(last);
+    if (pos < 0)
+        return NULL;
+    node = pos ? od->od_last : od->od_first;
+    if (node == NULL) {
+        PyErr_SetString(PyExc_KeyError, "dictionary is empty");
+        return NULL;
+    }
+    key = node->key;
+    Py_INCREF(key);
+    value = odict_popkey(od, key, node->hash, NULL);
+    if (value == NULL) {
+        Py_DECREF(key);
+        return NULL;
+    }
+    item = PyTuple_Pack(2, key, value);
+    Py_DECREF(key);
+    Py_DECREF(value);
+    return item;
+}
+
+PyDoc_STRVAR(odict_move_to_end_doc,
+"od.move_to_end(key, last=True) -> None.  Move an existing element to\n\
+the end (or beginning if last is false).  Raise KeyError if the element\n\
+does not exist.");
+
+static PyObject *
+odict_move_to_end(odictobject *od, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"key", "last", 0};
+    PyObject *key, *last = Py_True;
+    _ODictNode *node;
+    long hash;
+    int pos;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O:move_to_end", kwlist,
+                                     &key, &last))
+        return NULL;
+    pos = PyObject_IsTrue(last);
+    if (pos < 0)
+        return NULL;
+    hash = PyObject_Hash(key);
+    if (hash == -1)
+        return NULL;
+    node = odict_find_node(od, key, hash);
+    if (node == NULL) {
+        if (!PyErr_Occurred())
+            odict_key_error(key);
+        return NULL;
+    }
+    if (pos && node != od->od_last) {
+        odict_unlink(od, node);
+        odict_link_last(od, node);
+    }
+    else if (!pos && node != od->od_first) {
+        odict_unlink(od, node);
+        odict_link_first(od, node);
+    }
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(odict_clear_doc,
+"od.clear() -> None.  Remove all items from od.");
+
+static PyObject *
+odict_clear(odictobject *od)
+{
+    PyDict_Clear((PyObject *)od);
+    odict_clear_nodes(od);
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(odict_copy_doc, "od.copy() -> a shallow copy of od");
+
+static PyObject *
+odict_copy(odictobject *od)
+{
+    /* Like defaultdict.copy(), this relies on the constructor signature
+       of subclasses. */
+    return PyObject_CallFunctionObjArgs((PyObject *)Py_TYPE(od), od, NULL);
+}
+
+static PyObject *
+odict_reduce(odictobject *od)
+{
+    PyObject *items, *iterator, *key, *value, *pair, *result;
+
+    items = PyList_New(0);
+    if (items == NULL)
+        return NULL;
+    iterator = PyObject_GetIter((PyObject *)od);
+    if (iterator == NULL)
+        goto error;
+    /* Pickle pairs as lists, which YAML handles natively */
+    while ((key = PyIter_Next(iterator)) != NULL) {
+        value = PyObject_GetItem((PyObject *)od, key);
+        if (value == NULL) {
+            Py_DECREF(key);
+            break;
+        }
+        pair = PyList_New(2);
+        if (pair == NULL) {
+            Py_DECREF(key);
+            Py_DECREF(value);
+            break;
+        }
+        PyList_SET_ITEM(pair, 0, key);
+        PyList_SET_ITEM(pair, 1, value);
+        if (PyList_Append(items, pair) < 0) {
+            Py_DECREF(pair);
+            break;
+        }
+        Py_DECREF(pair);
+    }
+    Py_DECREF(iterator);
+    if (PyErr_Occurred())
+        goto error;
+
+    /* Only save the instance dictionary if it is needed */
+    if (od->od_inst_dict != NULL && PyDict_Size(od->od_inst_dict) > 0)
+        result = Py_BuildValue("O(N)O", Py_TYPE(od), items,
+                               od->od_inst_dict);
+    else
+        result = Py_BuildValue("O(N)", Py_TYPE(od), items);
+    return result;
+
+error:
+    Py_DECREF(items);
+    return NULL;
+}
+
+static PyObject *
+odict_sizeof(odictobject *od)
+{
+    Py_ssize_t res;
+
+    res = _PyDict_SizeOf((PyDictObject *)od);
+    res += od->od_fast_nodes_size * sizeof(_ODictNode *);
+    res += ((PyDictObject *)od)->ma_used * sizeof(_ODictNode);
+    return PyInt_FromSsize_t(res);
+}
+
+PyDoc_STRVAR(odict_keys_doc, "od.keys() -> list of keys in od");
+
+static PyObject *
+odict_keys(odictobject *od)
+{
+    PyObject *it, *result;
+
+    it = odictiter_new(od, ODICT_ITER_KEYS);
+    if (it == NULL)
+        return NULL;
+    result = PySequence_List(it);
+    Py_DECREF(it);
+    return result;
+}
+
+PyDoc_STRVAR(odict_values_doc, "od.values() -> list of values in od");
+
+static PyObject *
+odict_values(odictobject *od)
+{
+    PyObject *it, *result;
+
+    it = odictiter_new(od, ODICT_ITER_VALUES);
+    if (it == NULL)
+        return NULL;
+    result = PySequence_List(it);
+    Py_DECREF(it);
+    return result;
+}
+
+PyDoc_STRVAR(odict_items_doc,
+"od.items() -> list of (key, value) pairs in od");
+
+static PyObject *
+odict_items(odictobject *od)
+{
+    PyObject *it, *result;
+
+    it = odictiter_new(od, ODICT_ITER_ITEMS);
+    if (it == NULL)
+        return NULL;
+    result = PySequence_List(it);
+    Py_DECREF(it);
+    return result;
+}
+
+PyDoc_STRVAR(odict_iterkeys_doc,
+"od.iterkeys() -> an iterator over the keys in od");
+
+static PyObject *
+odict_iterkeys(odictobject *od)
+{
+    return odictiter_new(od, ODICT_ITER_KEYS);
+}
+
+PyDoc_STRVAR(odict_itervalues_doc,
+"od.itervalues() -> an iterator over the values in od");
+
+static PyObject *
+odict_itervalues(odictobject *od)
+{
+    return odictiter_new(od, ODICT_ITER_VALUES);
+}
+
+PyDoc_STRVAR(odict_iteritems_doc,
+"od.iteritems() -> an iterator over the (key, value) pairs in od");
+
+static PyObject *
+odict_iteritems(odictobject *od)
+{
+    return odictiter_new(od, ODICT_ITER_ITEMS);
+}
+
+PyDoc_STRVAR(odict_reversed_doc,
+"od.__reversed__() <==> reversed(od)");
+
+static PyObject *
+odict_reversed(odictobject *od)
+{
+    return odictiter_new(od, ODICT_ITER_KEYS|ODICT_ITER_REVERSED);
+}
+
+PyDoc_STRVAR(odict_viewkeys_doc,
+"od.viewkeys() -> a set-like object providing a view on od's keys");
+
+static PyObject *
+odict_viewkeys(odictobject *od)
+{
+    return _PyDictView_New((PyObject *)od, &odictkeys_type);
+}
+
+PyDoc_STRVAR(odict_viewvalues_doc,
+"od.viewvalues() -> an object providing a view on od's values");
+
+static PyObject *
+odict_viewvalues(odictobject *od)
+{
+    return _PyDictView_New((PyObject *)od, &odictvalues_type);
+}
+
+PyDoc_STRVAR(odict_viewitems_doc,
+"od.viewitems() -> a set-like object providing a view on od's items");
+
+static PyObject *
+odict_viewitems(odictobject *od)
+{
+    return _PyDictView_New((PyObject *)od, &odictitems_type);
+}
+
+PyDoc_STRVAR(odict_sizeof_doc,
+"od.__sizeof__() -> size of od in memory, in bytes");
+
+static PyMethodDef odict_methods[] = {
+    {"update", (PyCFunction)odict_update, METH_VARARGS | METH_KEYWORDS,
+     odict_update_doc},
+    {"setdefault", (PyCFunction)odict_setdefault, METH_VARARGS,
+     odict_setdefault_doc},
+    {"pop", (PyCFunction)odict_pop, METH_VARARGS,
+     odict_pop_doc},
+    {"popitem", (PyCFunction)odict_popitem, METH_VARARGS | METH_KEYWORDS,
+     odict_popitem_doc},
+    {"move_to_end", (PyCFunction)odict_move_to_end,
+     METH_VARARGS | METH_KEYWORDS, odict_move_to_end_doc},
+    {"clear", (PyCFunction)odict_clear, METH_NOARGS,
+     odict_clear_doc},
+    {"copy", (PyCFunction)odict_copy, METH_NOARGS,
+     odict_copy_doc},
+    {"__reduce__", (PyCFunction)odict_reduce, METH_NOARGS,
+     reduce_doc},
+    {"__sizeof__", (PyCFunction)odict_sizeof, METH_NOARGS,
+     odict_sizeof_doc},
+    {"keys", (PyCFunction)odict_keys, METH_NOARGS,
+     odict_keys_doc},
+    {"values", (PyCFunction)odict_values, METH_NOARGS,
+     odict_values_doc},
+    {"items", (PyCFunction)odict_items, METH_NOARGS,
+     odict_items_doc},
+    {"iterkeys", (PyCFunction)odict_iterkeys, METH_NOARGS,
+     odict_iterkeys_doc},
+    {"itervalues", (PyCFunction)odict_itervalues, METH_NOARGS,
+     odict_itervalues_doc},
+    {"iteritems", (PyCFunction)odict_iteritems, METH_NOARGS,
+     odict_iteritems_doc},
+    {"__reversed__", (PyCFunction)odict_reversed, METH_NOARGS,
+     odict_reversed_doc},
+    {"viewkeys", (PyCFunction)odict_viewkeys, METH_NOARGS,
+     odict_viewkeys_doc},
+    {"viewvalues", (PyCFunction)odict_viewvalues, METH_NOARGS,
+     odict_viewvalues_doc},
+    {"viewitems", (PyCFunction)odict_viewitems, METH_NOARGS,
+     odict_viewitems_doc},
+    {NULL}
+};
+
+static PyObject *
+odict_get_dict(odictobject *od, void *context)
+{
+    if (od->od_inst_dict == NULL) {
+        od->od_inst_dict = PyDict_New();
+        if (od->od_inst_dict == NULL)
+            return NULL;
+    }
+    Py_INCREF(od->od_inst_dict);
+    return od->od_inst_dict;
+}
+
+static int
+odict_set_dict(odictobject *od, PyObject *value, void *context)
+{
+    PyObject *tmp;
+
+    if (value == NULL || !PyDict_Check(value)) {
+        PyErr_SetString(PyExc_TypeError,
+                        "__dict__ must be set to a dictionary");
+        return -1;
+    }
+    tmp = od->od_inst_dict;
+    Py_INCREF(value);
+    od->od_inst_dict = value;
+    Py_XDECREF(tmp);
+    return 0;
+}
+
+static PyGetSetDef odict_getset[] = {
+    {"__dict__", (getter)odict_get_dict, (setter)odict_set_dict},
+    {NULL}
+};
+
+static void
+odict_dealloc(odictobject *od)
+{
+    PyThreadState *tstate = PyThreadState_GET();
+
+    PyObject_GC_UnTrack(od);
+    Py_TRASHCAN_SAFE_BEGIN(od)
+
+    Py_CLEAR(od->od_inst_dict);
+    if (od->od_weakreflist != NULL)
+        PyObject_ClearWeakRefs((PyObject *)od);
+    odict_clear_nodes(od);
+
+    /* The dict's own tp_dealloc uses the trashcan too.  Drop the nesting
+       level while calling it, so that the partially deallocated object is
+       not put on the to-be-deleted-later list. */
+    --tstate->trash_delete_nesting;
+    PyDict_Type.tp_dealloc((PyObject *)od);
+    ++tstate->trash_delete_nesting;
+
+    Py_TRASHCAN_SAFE_END(od)
+}
+
+static PyObject *
+odict_repr(odictobject *od)
+{
+    const char *classname;
+    PyObject *items, *itemsrepr, *result = NULL;
+    int status;
+
+    classname = strrchr(Py_TYPE(od)->tp_name, '.');
+    if (classname == NULL)
+        classname = Py_TYPE(od)->tp_name;
+    else
+        classname++;
+
+    if (PyDict_Size((PyObject *)od) == 0)
+        return PyString_FromFormat("%s()", classname);
+
+    status = Py_ReprEnter((PyObject *)od);
+    if (status != 0)
+        return status > 0 ? PyString_FromString("...") : NULL;
+
+    if (odict_CheckExact(od))
+        items = odict_items(od);
+    else
+        items = PyObject_CallMethod((PyObject *)od, "items", NULL);
+    if (items == NULL)
+        goto done;
+    itemsrepr = PyObject_Repr(items);
+    Py_DECREF(items);
+    if (itemsrepr == NULL)
+        goto done;
+    result = PyString_FromFormat("%s(%s)", classname,
+                                 PyString_AS_STRING(itemsrepr));
+    Py_DECREF(itemsrepr);
+done:
+    Py_ReprLeave((PyObject *)od);
+    return result;
+}
+
+static int
+odict_print(odictobject *od, FILE *fp, int flags)
+{
+    PyObject *repr;
+    int sts;
+
+    repr = odict_repr(od);
+    if (repr == NULL)
+        return -1;
+    sts = PyObject_Print(repr, fp, Py_PRINT_RAW);
+    Py_DECREF(repr);
+    return sts;
+}
+
+static int
+odict_traverse(odictobject *od, visitproc visit, void *arg)
+{
+    _ODictNode *node;
+
+    Py_VISIT(od->od_inst_dict);
+    for (node = od->od_first; node != NULL; node = node->next)
+        Py_VISIT(node->key);
+    return PyDict_Type.tp_traverse((PyObject *)od, visit, arg);
+}
+
+static int
+odict_tp_clear(odictobject *od)
+{
+    Py_CLEAR(od->od_inst_dict);
+    PyDict_Clear((PyObject *)od);
+    odict_clear_nodes(od);
+    return 0;
+}
+
+/* Return 1 if a and b hold equal keys in the same order, 0 if they don't,
+   or -1 on error. */
+static int
+odict_keys_equal(odictobject *a, odictobject *b)
+{
+    _ODictNode *node_a = a->od_first, *node_b = b->od_first;
+    size_t state_a = a->od_state, state_b = b->od_state;
+    PyObject *key_a, *key_b;
+    int res;
+
+    while (node_a != NULL && node_b != NULL) {
+        key_a = node_a->key;
+        key_b = node_b->key;
+        Py_INCREF(key_a);
+        Py_INCREF(key_b);
+        res = PyObject_RichCompareBool(key_a, key_b, Py_EQ);
+        Py_DECREF(key_a);
+        Py_DECREF(key_b);
+        if (res <= 0)
+            return res;
+        if (a->od_state != state_a || b->od_state != state_b) {
+            PyErr_SetString(PyExc_RuntimeError,
+                            "OrderedDict mutated during iteration");
+            return -1;
+        }
+        node_a = node_a->next;
+        node_b = node_b->next;
+    }
+    return node_a == NULL && node_b == NULL;
+}
+
+static PyObject *
+odict_richcompare(PyObject *v, PyObject *w, int op)
+{
+    PyObject *res;
+    int eq;
+
+    res = PyDict_Type.tp_richcompare(v, w, op);
+    if (res == NULL || (op != Py_EQ && op != Py_NE) ||
+        !PyObject_TypeCheck(v, &odict_type) ||
+        !PyObject_TypeCheck(w, &odict_type))
+        return res;
+
+    /* Comparison to another OrderedDict is order-sensitive */
+    if (res != (op == Py_EQ ? Py_True : Py_False))
+        return res;
+    Py_DECREF(res);
+    eq = odict_keys_equal((odictobject *)v, (odictobject *)w);
+    if (eq < 0)
+        return NULL;
+    res = (eq == (op == Py_EQ)) ? Py_True : Py_False;
+    Py_INCREF(res);
+    return res;
+}
+
+static PyObject *
+odict_iter(odictobject *od)
+{
+    return odictiter_new(od, ODICT_ITER_KEYS);
+}
+
+static int
+odict_init(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    return odict_update_common(self, args, kwds);
+}
+
+static PyMappingMethods odict_as_mapping = {
+    0,                                  /* mp_length */
+    0,                                  /* mp_subscript */
+    (objobjargproc)odict_ass_sub,       /* mp_ass_subscript */
+};
+
+PyDoc_STRVAR(odict_doc,
+"OrderedDict([items]) --> dict that remembers insertion order\n\
+\n\
+Keys are kept in the order in which they were first inserted; setting\n\
+the value of an existing key does not change its position.  Comparison\n\
+to another OrderedDict is order-sensitive.");
+
+static PyTypeObject odict_type = {
+    PyVarObject_HEAD_INIT(DEFERRED_ADDRESS(&PyType_Type), 0)
+    "collections.OrderedDict",          /* tp_name */
+    sizeof(odictobject),                /* tp_basicsize */
+    0,                                  /* tp_itemsize */
+    /* methods */
+    (destructor)odict_dealloc,          /* tp_dealloc */
+    (printfunc)odict_print,             /* tp_print */
+    0,                                  /* tp_getattr */
+    0,                                  /* tp_setattr */
+    0,                                  /* tp_compare */
+    (reprfunc)odict_repr,               /* tp_repr */
+    0,                                  /* tp_as_number */
+    0,                                  /* tp_as_sequence */
+    &odict_as_mapping,                  /* tp_as_mapping */
+    PyObject_HashNotImplemented,        /* tp_hash */
+    0,                                  /* tp_call */
+    0,                                  /* tp_str */
+    PyObject_GenericGetAttr,            /* tp_getattro */
+    PyObject_GenericSetAttr,            /* tp_setattro */
+    0,                                  /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC |
+        Py_TPFLAGS_HAVE_WEAKREFS,               /* tp_flags */
+    odict_doc,                          /* tp_doc */
+    (traverseproc)odict_traverse,       /* tp_traverse */
+    (inquiry)odict_tp_clear,            /* tp_clear */
+    odict_richcompare,                  /* tp_richcompare */
+    offsetof(odictobject, od_weakreflist), /* tp_weaklistoffset*/
+    (getiterfunc)odict_iter,            /* tp_iter */
+    0,                                  /* tp_iternext */
+    odict_methods,                      /* tp_methods */
+    0,                                  /* tp_members */
+    odict_getset,                       /* tp_getset */
+    DEFERRED_ADDRESS(&PyDict_Type),     /* tp_base */
+    0,                                  /* tp_dict */
+    0,                                  /* tp_descr_get */
+    0,                                  /* tp_descr_set */
+    offsetof(odictobject, od_inst_dict), /* tp_dictoffset */
+    odict_init,                         /* tp_init */
+    PyType_GenericAlloc,                /* tp_alloc */
+    0,                                  /* tp_new */
+    PyObject_GC_Del,                    /* tp_free */
+};
+
+/* OrderedDict iterators ****************************************************/
+
+typedef struct {
+    PyObject_HEAD
+    int kind;
+    odictobject *di_odict;
+    _ODictNode *di_current;
+    Py_ssize_t di_size;
+    size_t di_state;
+} odictiterobject;
+
+static PyObject *
+odictiter_new(odictobject *od, int kind)
+{
+    odictiterobject *di;
+
+    di = PyObject_GC_New(odictiterobject, &odictiter_type);
+    if (di == NULL)
+        return NULL;
+    di->kind = kind;
+    di->di_current = kind & ODICT_ITER_REVERSED ? od->od_last : od->od_first;
+    di->di_size = PyDict_Size((PyObject *)od);
+    di->di_state = od->od_state;
+    Py_INCREF(od);
+    di->di_odict = od;
+    _PyObject_GC_TRACK(di);
+    return (PyObject *)di;
+}
+
+static void
+odictiter_dealloc(odictiterobject *di)
+{
+    PyObject_GC_UnTrack(di);
+    Py_XDECREF(di->di_odict);
+    PyObject_GC_Del(di);
+}
+
+static int
+odictiter_traverse(odictiterobject *di, visitproc visit, void *arg)
+{
+    Py_VISIT(di->di_odict);
+    return 0;
+}
+
+static PyObject *
+odictiter_iternext(odictiterobject *di)
+{
+    odictobject *od = di->di_odict;
+    _ODictNode *node = di->di_current;
+    PyObject *key, *value, *result;
+
+    if (od == NULL)
+        return NULL;
+    if (node == NULL)
+        goto done;
+
+    /* The node is only valid as long as the linked list is unchanged */
+    if (od->od_state != di->di_state) {
+        PyErr_SetString(PyExc_RuntimeError,
+                        "OrderedDict mutated during iteration");
+        goto done;
+    }
+    if (di->di_size != PyDict_Size((PyObject *)od)) {
+        PyErr_SetString(PyExc_RuntimeError,
+                        "OrderedDict changed size during iteration");
+        di->di_size = -1; /* Make this state sticky */
+        return NULL;
+    }
+
+    key = node->key;
+    di->di_current = di->kind & ODICT_ITER_REVERSED ? node->prev : node->next;
+    if (!(di->kind & ODICT_ITER_VALUES)) {
+        Py_INCREF(key);
+        return key;
+    }
+
+    value = _PyDict_GetItem_KnownHash((PyObject *)od, key, node->hash);
+    if (value == NULL) {
+        if (!PyErr_Occurred())
+            odict_key_error(key);
+        goto done;
+    }
+    if (!(di->kind & ODICT_ITER_KEYS)) {
+        Py_INCREF(value);
+        return value;
+    }
+    result = PyTuple_Pack(2, key, value);
+    if (result == NULL)
+        goto done;
+    return result;
+
+done:
+    di->di_current = NULL;
+    Py_CLEAR(di->di_odict);
+    return NULL;
+}
+
+static PyObject *
+odictiter_len(odictiterobject *di)
+{
+    Py_ssize_t len = 0;
+    if (di->di_odict != NULL && di->di_current != NULL &&
+        di->di_size == PyDict_Size((PyObject *)di->di_odict))
+        len = di->di_size;
+    return PyInt_FromSize_t(len);
+}
+
+static PyMethodDef odictiter_methods[] = {
+    {"__length_hint__", (PyCFunction)odictiter_len, METH_NOARGS,
+     length_hint_doc},
+    {NULL,              NULL}           /* sentinel */
+};
+
+static PyTypeObject odictiter_type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "odict_iterator",                           /* tp_name */
+    sizeof(odictiterobject),                    /* tp_basicsize */
+    0,                                          /* tp_itemsize */
+    /* methods */
+    (destructor)odictiter_dealloc,              /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    PyObject_GenericGetAttr,                    /* tp_getattro */
+    0,                                          /* tp_setattro */
+    0,                                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,    /* tp_flags */
+    0,                                          /* tp_doc */
+    (traverseproc)odictiter_traverse,           /* tp_traverse */
+    0,                                          /* tp_clear */
+    0,                                          /* tp_richcompare */
+    0,                                          /* tp_weaklistoffset */
+    PyObject_SelfIter,                          /* tp_iter */
+    (iternextfunc)odictiter_iternext,           /* tp_iternext */
+    odictiter_methods,                          /* tp_methods */
+    0,
+};
+
+/* OrderedDict views ********************************************************/
+
+/* The views are the dict views with an iteration order of their own. */
+
+static PyObject *
+odictkeys_iter(_PyDictViewObject *dv)
+{
+    return odictiter_new((odictobject *)dv->dv_dict, ODICT_ITER_KEYS);
+}
+
+static PyObject *
+odictkeys_reversed(_PyDictViewObject *dv)
+{
+    return odictiter_new((odictobject *)dv->dv_dict,
+                         ODICT_ITER_KEYS|ODICT_ITER_REVERSED);
+}
+
+static PyObject *
+odictvalues_iter(_PyDictViewObject *dv)
+{
+    return odictiter_new((odictobject *)dv->dv_dict, ODICT_ITER_VALUES);
+}
+
+static PyObject *
+odictvalues_reversed(_PyDictViewObject *dv)
+{
+    return odictiter_new((odictobject *)dv->dv_dict,
+                         ODICT_ITER_VALUES|ODICT_ITER_REVERSED);
+}
+
+static PyObject *
+odictitems_iter(_PyDictViewObject *dv)
+{
+    return odictiter_new((odictobject *)dv->dv_dict, ODICT_ITER_ITEMS);
+}
+
+static PyObject *
+odictitems_reversed(_PyDictViewObject *dv)
+{
+    return odictiter_new((odictobject *)dv->dv_dict,
+                         ODICT_ITER_ITEMS|ODICT_ITER_REVERSED);
+}
+
+static PyMethodDef odictkeys_methods[] = {
+    {"__reversed__", (PyCFunction)odictkeys_reversed, METH_NOARGS, NULL},
+    {NULL,              NULL}           /* sentinel */
+};
+
+static PyMethodDef odictvalues_methods[] = {
+    {"__reversed__", (PyCFunction)odictvalues_reversed, METH_NOARGS, NULL},
+    {NULL,              NULL}           /* sentinel */
+};
+
+static PyMethodDef odictitems_methods[] = {
+    {"__reversed__", (PyCFunction)odictitems_reversed, METH_NOARGS, NULL},
+    {NULL,              NULL}           /* sentinel */
+};
+
+static PyTypeObject odictkeys_type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "odict_keys",                               /* tp_name */
+    0,                                          /* tp_basicsize */
+    0,                                          /* tp_itemsize */
+    0,                                          /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    0,                                          /* tp_getattro */
+    0,                                          /* tp_setattro */
+    0,                                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                         /* tp_flags */
+    0,                                          /* tp_doc */
+    0,                                          /* tp_traverse */
+    0,                                          /* tp_clear */
+    0,                                          /* tp_richcompare */
+    0,                                          /* tp_weaklistoffset */
+    (getiterfunc)odictkeys_iter,                /* tp_iter */
+    0,                                          /* tp_iternext */
+    odictkeys_methods,                          /* tp_methods */
+    0,                                          /* tp_members */
+    0,                                          /* tp_getset */
+    DEFERRED_ADDRESS(&PyDictKeys_Type),         /* tp_base */
+};
+
+static PyTypeObject odictvalues_type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "odict_values",                             /* tp_name */
+    0,                                          /* tp_basicsize */
+    0,                                          /* tp_itemsize */
+    0,                                          /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    0,                                          /* tp_getattro */
+    0,                                          /* tp_setattro */
+    0,                                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                         /* tp_flags */
+    0,                                          /* tp_doc */
+    0,                                          /* tp_traverse */
+    0,                                          /* tp_clear */
+    0,                                          /* tp_richcompare */
+    0,                                          /* tp_weaklistoffset */
+    (getiterfunc)odictvalues_iter,              /* tp_iter */
+    0,                                          /* tp_iternext */
+    odictvalues_methods,                        /* tp_methods */
+    0,                                          /* tp_members */
+    0,                                          /* tp_getset */
+    DEFERRED_ADDRESS(&PyDictValues_Type),       /* tp_base */
+};
+
+static PyTypeObject odictitems_type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "odict_items",                              /* tp_name */
+    0,                                          /* tp_basicsize */
+    0,                                          /* tp_itemsize */
+    0,                                          /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    0,                                          /* tp_getattro */
+    0,                                          /* tp_setattro */
+    0,                                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                         /* tp_flags */
+    0,                                          /* tp_doc */
+    0,                                          /* tp_traverse */
+    0,                                          /* tp_clear */
+    0,                                          /* tp_richcompare */
+    0,                                          /* tp_weaklistoffset */
+    (getiterfunc)odictitems_iter,               /* tp_iter */
+    0,                                          /* tp_iternext */
+    odictitems_methods,                         /* tp_methods */
+    0,                                          /* tp_members */
+    0,                                          /* tp_getset */
+    DEFERRED_ADDRESS(&PyDictItems_Type),        /* tp_base */
+};
+
+/* namedtuple support *******************************************************/
+
+/* collections.namedtuple() builds its classes with type() rather than by
+ * exec'ing a class definition.  The parts that run for every instance live
+ * here: a _tuplegetter is the descriptor of one field, and a _tuplemaker
+ * creates the instances of a class.
+ */
+
+static int
+tuple_subtype_check(PyObject *cls)
+{
+    if (!PyType_Check(cls) ||
+        !PyType_IsSubtype((PyTypeObject *)cls, &PyTuple_Type)) {
+        PyErr_Format(PyExc_TypeError,
+                     "%s is not a subtype of tuple",
+                     PyType_Check(cls) ? ((PyTypeObject *)cls)->tp_name :
+                                         Py_TYPE(cls)->tp_name);
+        return -1;
+    }
+    return 0;
+}
+
+typedef struct {
+    PyObject_HEAD
+    Py_ssize_t index;
+    PyObject *doc;
+} tuplegetterobject;
+
+static PyTypeObject tuplegetter_type; /* Forward */
+
+static PyObject *
+tuplegetter_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    tuplegetterobject *self;
+    Py_ssize_t index;
+    PyObject *doc;
+
+    if (!_PyArg_NoKeywords("_tuplegetter()", kwds))
+        return NULL;
+    if (!PyArg_ParseTuple(args, "nO:_tuplegetter", &index, &doc))
+        return NULL;
+    self = (tuplegetterobject *)type->tp_alloc(type, 0);
+    if (self == NULL)
+        return NULL;
+    self->index = index;
+    Py_INCREF(doc);
+    self->doc = doc;
+    return (PyObject *)self;
+}
+
+static PyObject *
+tuplegetter_descr_get(PyObject *self, PyObject *obj, PyObject *type)
+{
+    Py_ssize_t index = ((tuplegetterobject *)self)->index;
+    PyObject *result;
+
+    if (obj == NULL || obj == Py_None) {
+        Py_INCREF(self);
+        return self;
+    }
+    if (!PyTuple_Check(obj)) {
+        PyErr_Format(PyExc_TypeError,
+                     "descriptor for index '%zd' for tuple subclasses "
+                     "doesn't apply to '%s' object",
+                     index, Py_TYPE(obj)->tp_name);
+        return NULL;
+    }
+    if (index < 0 || index >= PyTuple_GET_SIZE(obj)) {
+        PyErr_SetString(PyExc_IndexError, "tuple index out of range");
+        return NULL;
+    }
+    result = PyTuple_GET_ITEM(obj, index);
+    Py_INCREF(result);
+    return result;
+}
+
+static int
+tuplegetter_descr_set(PyObject *self, PyObject *obj, PyObject *value)
+{
+    if (value == NULL)
+        PyErr_SetString(PyExc_AttributeError, "can't delete attribute");
+    else
+        PyErr_SetString(PyExc_AttributeError, "can't set attribute");
+    return -1;
+}
+
+static int
+tuplegetter_traverse(tuplegetterobject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->doc);
+    return 0;
+}
+
+static int
+tuplegetter_clear(tuplegetterobject *self)
+{
+    Py_CLEAR(self->doc);
+    return 0;
+}
+
+static void
+tuplegetter_dealloc(tuplegetterobject *self)
+{
+    PyObject_GC_UnTrack(self);
+    tuplegetter_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyObject *
+tuplegetter_reduce(tuplegetterobject *self)
+{
+    return Py_BuildValue("(O(nO))", (PyObject *)Py_TYPE(self),
+                         self->index, self->doc);
+}
+
+static PyMethodDef tuplegetter_methods[] = {
+    {"__reduce__", (PyCFunction)tuplegetter_reduce, METH_NOARGS, NULL},
+    {NULL},
+};
+
+static PyMemberDef tuplegetter_members[] = {
+    {"__doc__",  T_OBJECT, offsetof(tuplegetterobject, doc), 0},
+    {NULL}
+};
+
+static PyTypeObject tuplegetter_type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "_collections._tuplegetter",                /* tp_name */
+    sizeof(tuplegetterobject),                  /* tp_basicsize */
+    0,                                          /* tp_itemsize */
+    /* methods */
+    (destructor)tuplegetter_dealloc,            /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    PyObject_GenericGetAttr,                    /* tp_getattro */
+    0,                                          /* tp_setattro */
+    0,                                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,    /* tp_flags */
+    0,                                          /* tp_doc */
+    (traverseproc)tuplegetter_traverse,         /* tp_traverse */
+    (inquiry)tuplegetter_clear,                 /* tp_clear */
+    0,                                          /* tp_richcompare */
+    0,                                          /* tp_weaklistoffset */
+    0,                                          /* tp_iter */
+    0,                                          /* tp_iternext */
+    tuplegetter_methods,                        /* tp_methods */
+    tuplegetter_members,                        /* tp_members */
+    0,                                          /* tp_getset */
+    0,                                          /* tp_base */
+    0,                                          /* tp_dict */
+    tuplegetter_descr_get,                      /* tp_descr_get */
+    tuplegetter_descr_set,                      /* tp_descr_set */
+    0,                                          /* tp_dictoffset */
+    0,                                          /* tp_init */
+    PyType_GenericAlloc,                        /* tp_alloc */
+    tuplegetter_new,                            /* tp_new */
+    PyObject_GC_Del,                            /* tp_free */
+};
+
+/* The _make() method of a _tuplemaker builds the instances of a namedtuple
+ * class: it backs the _make classmethod, and the Python __new__ of the class
+ * passes its arguments on to it as a tuple.
+ */
+
+typedef struct {
+    PyObject_HEAD
+    Py_ssize_t nfields;
+} tuplemakerobject;
+
+static PyTypeObject tuplemaker_type; /* Forward */
+
+static PyObject *
+tuplemaker_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    tuplemakerobject *self;
+    Py_ssize_t nfields;
+
+    if (!_PyArg_NoKeywords("_tuplemaker()", kwds))
+        return NULL;
+    if (!PyArg_ParseTuple(args, "n:_tuplemaker", &nfields))
+        return NULL;
+    if (nfields < 0) {
+        PyErr_SetString(PyExc_ValueError,
+                        "number of fields must be non-negative");
+        return NULL;
+    }
+    self = (tuplemakerobject *)type->tp_alloc(type, 0);
+    if (self == NULL)
+        return NULL;
+    self->nfields = nfields;
+    return (PyObject *)self;
+}
+
+static PyObject *
+tuplemaker_make(tuplemakerobject *self, PyObject *args)
+{
+    Py_ssize_t i, n;
+    PyTypeObject *cls;
+    PyObject *iterable, *seq, *result, *value;
+
+    if (!PyArg_UnpackTuple(args, "_make", 2, 2, &cls, &iterable))
+        return NULL;
+    if (tuple_subtype_check((PyObject *)cls) < 0)
+        return NULL;
+    seq = PySequence_Fast(iterable, "_make() argument must be iterable");
+    if (seq == NULL)
+        return NULL;
+    n = PySequence_Fast_GET_SIZE(seq);
+    if (n != self->nfields) {
+        PyErr_Format(PyExc_TypeError, "Expected %zd arguments, got %zd",
+                     self->nfields, n);
+        Py_DECREF(seq);
+        return NULL;
+    }
+    result = cls->tp_alloc(cls, n);
+    if (result == NULL) {
+        Py_DECREF(seq);
+        return NULL;
+    }
+    for (i = 0; i < n; i++) {
+        value = PySequence_Fast_GET_ITEM(seq, i);
+        Py_INCREF(value);
+        PyTuple_SET_ITEM(result, i, value);
+    }
+    Py_DECREF(seq);
+    return result;
+}
+
+PyDoc_STRVAR(tuplemaker_make_doc,
+"_make(cls, iterable) -> new instance of cls from the items of iterable");
+
+static PyMethodDef tuplemaker_methods[] = {
+    {"_make", (PyCFunction)tuplemaker_make, METH_VARARGS,
+     tuplemaker_make_doc},
+    {NULL},
+};
+
+static PyTypeObject tuplemaker_type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "_collections._tuplemaker",                 /* tp_name */
+    sizeof(tuplemakerobject),                   /* tp_basicsize */
+    0,                                          /* tp_itemsize */
+    /* methods */
+    0,                                          /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    PyObject_GenericGetAttr,                    /* tp_getattro */
+    0,                                          /* tp_setattro */
+    0,                                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                         /* tp_flags */
+    0,                                          /* tp_doc */
+    0,                                          /* tp_traverse */
+    0,                                          /* tp_clear */
+    0,                                          /* tp_richcompare */
+    0,                                          /* tp_weaklistoffset */
+    0,                                          /* tp_iter */
+    0,                                          /* tp_iternext */
+    tuplemaker_methods,                         /* tp_methods */
+    0,                                          /* tp_members */
+    0,                                          /* tp_getset */
+    0,                                          /* tp_base */
+    0,                                          /* tp_dict */
+    0,                                          /* tp_descr_get */
+    0,                                          /* tp_descr_set */
+    0,                                          /* tp_dictoffset */
+    0,                                          /* tp_init */
+    PyType_GenericAlloc,                        /* tp_alloc */
+    tuplemaker_new,                             /* tp_new */
+    PyObject_Del,                               /* tp_free */
+};
+
 /* module level code ********************************************************/
 
 PyDoc_STRVAR(module_doc,
 "High performance data structures.\n\
 - deque:        ordered collection accessible from endpoints only\n\
 - defaultdict:  dict subclass with a default value factory\n\
+- OrderedDict:  dict subclass that remembers insertion order\n\
+- _tuplegetter, _tuplemaker:  building blocks of namedtuple classes\n\
 ");
 
 PyMODINIT_FUNC
@@ -1766,11 +3431,43 @@ init_collections(void)
     Py_INCREF(&defdict_type);
     PyModule_AddObject(m, "defaultdict", (PyObject *)&defdict_type);
 
+    odict_type.tp_base = &PyDict_Type;
+    odict_type.tp_compare = PyDict_Type.tp_compare;
+    if (PyType_Ready(&odict_type) < 0)
+        return;
+    Py_INCREF(&odict_type);
+    PyModule_AddObject(m, "OrderedDict", (PyObject *)&odict_type);
+
     if (PyType_Ready(&dequeiter_type) < 0)
         return;
 
     if (PyType_Ready(&dequereviter_type) < 0)
         return;
 
+    if (PyType_Ready(&odictiter_type) < 0)
+        return;
+
+    odictkeys_type.tp_base = &PyDictKeys_Type;
+    if (PyType_Ready(&odictkeys_type) < 0)
+        return;
+
+    odictvalues_type.tp_base = &PyDictValues_Type;
+    if (PyType_Ready(&odictvalues_type) < 0)
+        return;
+
+    odictitems_type.tp_base = &PyDictItems_Type;
+    if (PyType_Ready(&odictitems_type) < 0)
+        return;
+
+    if (PyType_Ready(&tuplegetter_type) < 0)
+        return;
+    Py_INCREF(&tuplegetter_type);
+    PyModule_AddObject(m, "_tuplegetter", (PyObject *)&tuplegetter_type);
+
+    if (PyType_Ready(&tuplemaker_type) < 0)
+        return;
+    Py_INCREF(&tuplemaker_type);
+    PyModule_AddObject(m, "_tuplemaker", (PyObject *)&tuplemaker_type);
+
     return;
 }
@@ -182,6 +182,18 @@ test_dict_iteration(PyObject* self)
     return Py_None;
 }
 
+static PyObject *
+dict_get_version(PyObject *self, PyObject *args)
+{
+    PyDictObject *dict;
+
+    if (!PyArg_ParseTuple(args, "O!:dict_get_version", &PyDict_Type, &dict))
+        return NULL;
+
+    return PyLong_FromUnsignedLongLong(
+        (unsigned PY_LONG_LONG)dict->ma_version_tag);
+}
+
 
 /* Issue #4701: Check that PyObject_Hash implicitly calls
  *   PyType_Ready if it hasn't already been called
@@ -2695,6 +2707,7 @@ static PyMethodDef TestMethods[] = {
 #endif
     {"test_list_api",           (PyCFunction)test_list_api,      METH_NOARGS},
     {"test_dict_iteration",     (PyCFunction)test_dict_iteration,METH_NOARGS},
+    {"dict_get_version",        dict_get_version,                METH_VARARGS},
     {"test_lazy_hash_inheritance",      (PyCFunction)test_lazy_hash_inheritance,METH_NOARGS},
     {"test_broken_memoryview",          (PyCFunction)test_broken_memoryview,METH_NOARGS},
     {"test_to_contiguous",      (PyCFunction)test_to_contiguous, METH_NOARGS},
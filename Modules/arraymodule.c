@@ -23,6 +23,7 @@ struct arraydescr {
     int itemsize;
     PyObject * (*getitem)(struct arrayobject *, Py_ssize_t);
     int (*setitem)(struct arrayobject *, Py_ssize_t, PyObject *);
+    char *formats;
 };
 
 typedef struct arrayobject {
@@ -31,6 +32,7 @@ typedef struct arrayobject {
     Py_ssize_t allocated;
     struct arraydescr *ob_descr;
     PyObject *weakreflist; /* List of weak references */
+    Py_ssize_t ob_exports;  /* Number of exported buffers */
 } arrayobject;
 
 static PyTypeObject Arraytype;
@@ -38,12 +40,27 @@ static PyTypeObject Arraytype;
 #define array_Check(op) PyObject_TypeCheck(op, &Arraytype)
 #define array_CheckExact(op) (Py_TYPE(op) == &Arraytype)
 
+/* The item storage must not move while a Py_buffer points into it. */
+static int
+array_check_exports(arrayobject *self)
+{
+    if (self->ob_exports > 0) {
+        PyErr_SetString(PyExc_BufferError,
+                        "cannot resize an array that is exporting buffers");
+        return -1;
+    }
+    return 0;
+}
+
 static int
 array_resize(arrayobject *self, Py_ssize_t newsize)
 {
     char *items;
     size_t _new_size;
 
+    if (newsize != Py_SIZE(self) && array_check_exports(self) < 0)
+        return -1;
+
     /* Bypass realloc() when a previous overallocation is large enough
        to accommodate the newsize.  If the newsize is 16 smaller than the
        current size, then proceed with the realloc() to shrink the list.
@@ -388,21 +405,21 @@ d_setitem(arrayobject *ap, Py_ssize_t i, PyObject *v)
 
 /* Description of types */
 static struct arraydescr descriptors[] = {
-    {'c', sizeof(char), c_getitem, c_setitem},
-    {'b', sizeof(char), b_getitem, b_setitem},
-    {'B', sizeof(char), BB_getitem, BB_setitem},
+    {'c', sizeof(char), c_getitem, c_setitem, "c"},
+    {'b', sizeof(char), b_getitem, b_setitem, "b"},
+    {'B', sizeof(char), BB_getitem, BB_setitem, "B"},
 #ifdef Py_USING_UNICODE
-    {'u', sizeof(Py_UNICODE), u_getitem, u_setitem},
+    {'u', sizeof(Py_UNICODE), u_getitem, u_setitem, "u"},
 #endif
-    {'h', sizeof(short), h_getitem, h_setitem},
-    {'H', sizeof(short), HH_getitem, HH_setitem},
-    {'i', sizeof(int), i_getitem, i_setitem},
-    {'I', sizeof(int), II_getitem, II_setitem},
-    {'l', sizeof(long), l_getitem, l_setitem},
-    {'L', sizeof(long), LL_getitem, LL_setitem},
-    {'f', sizeof(float), f_getitem, f_setitem},
-    {'d', sizeof(double), d_getitem, d_setitem},
-    {'\0', 0, 0, 0} /* Sentinel */
+    {'h', sizeof(short), h_getitem, h_setitem, "h"},
+    {'H', sizeof(short), HH_getitem, HH_setitem, "H"},
+    {'i', sizeof(int), i_getitem, i_setitem, "i"},
+    {'I', sizeof(int), II_getitem, II_setitem, "I"},
+    {'l', sizeof(long), l_getitem, l_setitem, "l"},
+    {'L', sizeof(long), LL_getitem, LL_setitem, "L"},
+    {'f', sizeof(float), f_getitem, f_setitem, "f"},
+    {'d', sizeof(double), d_getitem, d_setitem, "d"},
+    {'\0', 0, 0, 0, 0} /* Sentinel */
 };
 
 /****************************************************************************
@@ -432,6 +449,7 @@ newarrayobject(PyTypeObject *type, Py_ssize_t size, struct arraydescr *descr)
     op->ob_descr = descr;
     op->allocated = size;
     op->weakreflist = NULL;
+    op->ob_exports = 0;
     Py_SIZE(op) = size;
     if (size <= 0) {
         op->ob_item = NULL;
@@ -742,6 +760,8 @@ array_ass_slice(arrayobject *a, Py_ssize_t ilow, Py_ssize_t ihigh, PyObject *v)
         ihigh = Py_SIZE(a);
     item = a->ob_item;
     d = n - (ihigh-ilow);
+    if (d != 0 && array_check_exports(a) < 0)
+        return -1;
     if (d < 0) { /* Delete -d items */
         memmove(item + (ihigh+d)*a->ob_descr->itemsize,
             item + ihigh*a->ob_descr->itemsize,
@@ -835,6 +855,8 @@ array_do_extend(arrayobject *self, PyObject *bb)
         PyErr_NoMemory();
         return -1;
     }
+    if (Py_SIZE(b) > 0 && array_check_exports(self) < 0)
+        return -1;
     size = Py_SIZE(self) + Py_SIZE(b);
     old_item = self->ob_item;
     PyMem_RESIZE(self->ob_item, char, size*self->ob_descr->itemsize);
@@ -878,6 +900,8 @@ array_inplace_repeat(arrayobject *self, Py_ssize_t n)
     if (Py_SIZE(self) > 0) {
         if (n < 0)
             n = 0;
+        if (n != 1 && array_check_exports(self) < 0)
+            return NULL;
         items = self->ob_item;
         if ((self->ob_descr->itemsize != 0) &&
             (Py_SIZE(self) > PY_SSIZE_T_MAX / self->ob_descr->itemsize)) {
@@ -1207,6 +1231,804 @@ PyDoc_STRVAR(reverse_doc,
 \n\
 Reverse the order of the items in the array.");
 
+/* Bulk numeric operations.
+ *
+ * The loops below are specialised per typecode, so that summing, scaling or
+ * comparing an array runs over the raw items without creating a Python
+ * object per element.  Integer results are computed in (unsigned)
+ * PY_LONG_LONG and checked against the range of the item type: a result
+ * that doesn't fit raises OverflowError, just like storing it with a[i] = x
+ * would.
+ */
+
+enum { ARRAY_ADD, ARRAY_SUB, ARRAY_MUL };
+
+struct arrayops {
+    int typecode;
+    /* r[i] = a[i] op b[i*bstep] for i in range(n); -1 on overflow */
+    int (*binop)(int op, const char *a, const char *b, Py_ssize_t bstep,
+                 char *r, Py_ssize_t n);
+    /* sum(a[i]*b[i]) if b is not NULL, else sum(a[i]) */
+    PyObject *(*sum)(const char *a, const char *b, Py_ssize_t n);
+    /* index of the first smallest (or largest) of n > 0 items */
+    Py_ssize_t (*argminmax)(const char *a, Py_ssize_t n, int want_max);
+    /* store the i for which a[i] op b[i*bstep] holds in r (unless r is
+       NULL) and return how many there are; op is one of Py_LT etc. */
+    Py_ssize_t (*compare)(int op, const char *a, const char *b,
+                          Py_ssize_t bstep, long *r, Py_ssize_t n);
+};
+
+Py_LOCAL_INLINE(int)
+sll_add(PY_LONG_LONG x, PY_LONG_LONG y, PY_LONG_LONG *z)
+{
+    if (y > 0 ? x > PY_LLONG_MAX - y : x < PY_LLONG_MIN - y)
+        return -1;
+    *z = x + y;
+    return 0;
+}
+
+Py_LOCAL_INLINE(int)
+sll_sub(PY_LONG_LONG x, PY_LONG_LONG y, PY_LONG_LONG *z)
+{
+    if (y < 0 ? x > PY_LLONG_MAX + y : x < PY_LLONG_MIN + y)
+        return -1;
+    *z = x - y;
+    return 0;
+}
+
+Py_LOCAL_INLINE(int)
+sll_mul(PY_LONG_LONG x, PY_LONG_LONG y, PY_LONG_LONG *z)
+{
+    if (x > 0) {
+        if (y > 0 ? x > PY_LLONG_MAX / y : y < PY_LLONG_MIN / x)
+            return -1;
+    }
+    else if (x < 0) {
+        if (y > 0 ? x < PY_LLONG_MIN / y : y != 0 && y < PY_LLONG_MAX / x)
+            return -1;
+    }
+    *z = x * y;
+    return 0;
+}
+
+Py_LOCAL_INLINE(int)
+ull_add(unsigned PY_LONG_LONG x, unsigned PY_LONG_LONG y,
+        unsigned PY_LONG_LONG *z)
+{
+    *z = x + y;
+    return *z < x ? -1 : 0;
+}
+
+Py_LOCAL_INLINE(int)
+ull_sub(unsigned PY_LONG_LONG x, unsigned PY_LONG_LONG y,
+        unsigned PY_LONG_LONG *z)
+{
+    if (x < y)
+        return -1;
+    *z = x - y;
+    return 0;
+}
+
+Py_LOCAL_INLINE(int)
+ull_mul(unsigned PY_LONG_LONG x, unsigned PY_LONG_LONG y,
+        unsigned PY_LONG_LONG *z)
+{
+    if (y != 0 && x > PY_ULLONG_MAX / y)
+        return -1;
+    *z = x * y;
+    return 0;
+}
+
+static PyObject *
+sll_to_int(PY_LONG_LONG x)
+{
+    if (x >= LONG_MIN && x <= LONG_MAX)
+        return PyInt_FromLong((long)x);
+    return PyLong_FromLongLong(x);
+}
+
+static PyObject *
+ull_to_int(unsigned PY_LONG_LONG x)
+{
+    if (x <= LONG_MAX)
+        return PyInt_FromLong((long)x);
+    return PyLong_FromUnsignedLongLong(x);
+}
+
+/* Exact product of two items whose product overflowed PY_LONG_LONG */
+static PyObject *
+int_product(PyObject *x, PyObject *y)
+{
+    PyObject *r = NULL;
+
+    if (x != NULL && y != NULL)
+        r = PyNumber_Multiply(x, y);
+    Py_XDECREF(x);
+    Py_XDECREF(y);
+    return r;
+}
+
+/* Add the new reference x to the running total *total, where NULL stands
+   for zero.  On failure *total is released and set to NULL. */
+static int
+add_to_total(PyObject **total, PyObject *x)
+{
+    PyObject *t;
+
+    if (x == NULL) {
+        Py_CLEAR(*total);
+        return -1;
+    }
+    if (*total == NULL) {
+        *total = x;
+        return 0;
+    }
+    t = PyNumber_Add(*total, x);
+    Py_DECREF(x);
+    Py_DECREF(*total);
+    *total = t;
+    return t == NULL ? -1 : 0;
+}
+
+#define ARRAY_OVERFLOW(TC)                                              \
+    PyErr_SetString(PyExc_OverflowError,                                \
+                    "result out of range for array typecode '" TC "'")
+
+/* Integer loops: results are accumulated in ACC with the overflow-checked
+   CHECKED##_add() etc.; TO_INT and FROM_ACC convert ACC values to Python
+   integers. */
+#define INTEGER_OPS(NAME, TC, T, TMIN, TMAX, ACC, CHECKED, TO_INT, FROM_ACC) \
+static int                                                              \
+NAME##_binop(int op, const char *ap, const char *bp, Py_ssize_t bstep,  \
+             char *rp, Py_ssize_t n)                                    \
+{                                                                       \
+    const T *a = (const T *)ap, *b = (const T *)bp;                     \
+    T *r = (T *)rp;                                                     \
+    ACC z;                                                              \
+    Py_ssize_t i;                                                       \
+                                                                        \
+    switch (op) {                                                       \
+    case ARRAY_ADD:                                                     \
+        for (i = 0; i < n; i++, b += bstep) {                           \
+            if (CHECKED##_add(a[i], *b, &z) < 0 || z < TMIN || z > TMAX) \
+                goto overflow;                                          \
+            r[i] = (T)z;                                                \
+        }                                                               \
+        break;                                                          \
+    case ARRAY_SUB:                                                     \
+        for (i = 0; i < n; i++, b += bstep) {                           \
+            if (CHECKED##_sub(a[i], *b, &z) < 0 || z < TMIN || z > TMAX) \
+                goto overflow;                                          \
+            r[i] = (T)z;                                                \
+        }                                                               \
+        break;                                                          \
+    case ARRAY_MUL:                                                     \
+        for (i = 0; i < n; i++, b += bstep) {                           \
+            /* the product of two items of up to 32 bits always fits */ \
+            if (sizeof(T) > 4) {                                        \
+                if (CHECKED##_mul(a[i], *b, &z) < 0)                    \
+                    goto overflow;                                      \
+            }                                                           \
+            else                                                        \
+                z = (ACC)a[i] * *b;                                     \
+            if (z < TMIN || z > TMAX)                                   \
+                goto overflow;                                          \
+            r[i] = (T)z;                                                \
+        }                                                               \
+        break;                                                          \
+    }                                                                   \
+    return 0;                                                           \
+                                                                        \
+  overflow:                                                             \
+    ARRAY_OVERFLOW(TC);                                                 \
+    return -1;                                                          \
+}                                                                       \
+                                                                        \
+static PyObject *                                                       \
+NAME##_sum(const char *ap, const char *bp, Py_ssize_t n)                \
+{                                                                       \
+    const T *a = (const T *)ap, *b = (const T *)bp;                     \
+    PyObject *total = NULL;                                             \
+    ACC acc = 0, x, z;                                                  \
+    Py_ssize_t i;                                                       \
+                                                                        \
+    for (i = 0; i < n; i++) {                                           \
+        x = a[i];                                                       \
+        if (b != NULL) {                                                \
+            if (sizeof(T) <= 4)                                         \
+                x *= b[i];                                              \
+            else if (CHECKED##_mul(a[i], b[i], &x) < 0) {               \
+                if (add_to_total(&total,                                \
+                                 int_product(FROM_ACC(a[i]),            \
+                                             FROM_ACC(b[i]))) < 0)      \
+                    return NULL;                                        \
+                continue;                                               \
+            }                                                           \
+        }                                                               \
+        if (CHECKED##_add(acc, x, &z) < 0) {                            \
+            /* move the accumulator over to a Python long */            \
+            if (add_to_total(&total, TO_INT(acc)) < 0)                  \
+                return NULL;                                            \
+            z = x;                                                      \
+        }                                                               \
+        acc = z;                                                        \
+    }                                                                   \
+    if (add_to_total(&total, TO_INT(acc)) < 0)                          \
+        return NULL;                                                    \
+    return total;                                                       \
+}
+
+#define SIGNED_OPS(NAME, TC, T, TMIN, TMAX)                             \
+    INTEGER_OPS(NAME, TC, T, TMIN, TMAX, PY_LONG_LONG, sll,             \
+                sll_to_int, PyLong_FromLongLong)
+#define UNSIGNED_OPS(NAME, TC, T, TMAX)                                 \
+    INTEGER_OPS(NAME, TC, T, 0, TMAX, unsigned PY_LONG_LONG, ull,       \
+                ull_to_int, PyLong_FromUnsignedLongLong)
+
+/* Float loops work in double, like the equivalent Python code would. */
+#define FLOAT_OPS(NAME, T)                                              \
+static int                                                              \
+NAME##_binop(int op, const char *ap, const char *bp, Py_ssize_t bstep,  \
+             char *rp, Py_ssize_t n)                                    \
+{                                                                       \
+    const T *a = (const T *)ap, *b = (const T *)bp;                     \
+    T *r = (T *)rp;                                                     \
+    Py_ssize_t i;                                                       \
+                                                                        \
+    switch (op) {                                                       \
+    case ARRAY_ADD:                                                     \
+        for (i = 0; i < n; i++, b += bstep)                             \
+            r[i] = (T)((double)a[i] + (double)*b);                      \
+        break;                                                          \
+    case ARRAY_SUB:                                                     \
+        for (i = 0; i < n; i++, b += bstep)                             \
+            r[i] = (T)((double)a[i] - (double)*b);                      \
+        break;                                                          \
+    case ARRAY_MUL:                                                     \
+        for (i = 0; i < n; i++, b += bstep)                             \
+            r[i] = (T)((double)a[i] * (double)*b);                      \
+        break;                                                          \
+    }                                                                   \
+    return 0;                                                           \
+}                                                                       \
+                                                                        \
+static PyObject *                                                       \
+NAME##_sum(const char *ap, const char *bp, Py_ssize_t n)                \
+{                                                                       \
+    const T *a = (const T *)ap, *b = (const T *)bp;                     \
+    double acc = 0.0;                                                   \
+    Py_ssize_t i;                                                       \
+                                                                        \
+    if (b == NULL) {                                                    \
+        for (i = 0; i < n; i++)                                         \
+            acc += a[i];                                                \
+    }                                                                   \
+    else {                                                              \
+        for (i = 0; i < n; i++)                                         \
+            acc += (double)a[i] * (double)b[i];                         \
+    }                                                                   \
+    return PyFloat_FromDouble(acc);                                     \
+}
+
+#define COMPARE_LOOP(OP)                                                \
+    for (i = 0; i < n; i++, b += bstep) {                               \
+        if (a[i] OP *b) {                                               \
+            if (r != NULL)                                              \
+                r[count] = (long)i;                                     \
+            count++;                                                    \
+        }                                                               \
+    }                                                                   \
+    break;
+
+/* min(), max() and comparisons, shared by all numeric typecodes.  They
+   compare items the way min(list(a)) etc. would, NaNs included. */
+#define ORDER_OPS(NAME, T)                                              \
+static Py_ssize_t                                                       \
+NAME##_argminmax(const char *ap, Py_ssize_t n, int want_max)            \
+{                                                                       \
+    const T *a = (const T *)ap;                                         \
+    Py_ssize_t i, best = 0;                                             \
+                                                                        \
+    if (want_max) {                                                     \
+        for (i = 1; i < n; i++)                                         \
+            if (a[i] > a[best])                                         \
+                best = i;                                               \
+    }                                                                   \
+    else {                                                              \
+        for (i = 1; i < n; i++)                                         \
+            if (a[i] < a[best])                                         \
+                best = i;                                               \
+    }                                                                   \
+    return best;                                                        \
+}                                                                       \
+                                                                        \
+static Py_ssize_t                                                       \
+NAME##_compare(int op, const char *ap, const char *bp, Py_ssize_t bstep, \
+               long *r, Py_ssize_t n)                                   \
+{                                                                       \
+    const T *a = (const T *)ap, *b = (const T *)bp;                     \
+    Py_ssize_t i, count = 0;                                            \
+                                                                        \
+    switch (op) {                                                       \
+    case Py_LT: COMPARE_LOOP(<)                                         \
+    case Py_LE: COMPARE_LOOP(<=)                                        \
+    case Py_EQ: COMPARE_LOOP(==)                                        \
+    case Py_NE: COMPARE_LOOP(!=)                                        \
+    case Py_GT: COMPARE_LOOP(>)                                         \
+    case Py_GE: COMPARE_LOOP(>=)                                        \
+    }                                                                   \
+    return count;                                                       \
+}
+
+SIGNED_OPS(b, "b", signed char, SCHAR_MIN, SCHAR_MAX)
+UNSIGNED_OPS(BB, "B", unsigned char, UCHAR_MAX)
+SIGNED_OPS(h, "h", short, SHRT_MIN, SHRT_MAX)
+UNSIGNED_OPS(HH, "H", unsigned short, USHRT_MAX)
+SIGNED_OPS(i, "i", int, INT_MIN, INT_MAX)
+UNSIGNED_OPS(II, "I", unsigned int, UINT_MAX)
+SIGNED_OPS(l, "l", long, LONG_MIN, LONG_MAX)
+UNSIGNED_OPS(LL, "L", unsigned long, ULONG_MAX)
+FLOAT_OPS(f, float)
+FLOAT_OPS(d, double)
+
+ORDER_OPS(b, signed char)
+ORDER_OPS(BB, unsigned char)
+ORDER_OPS(h, short)
+ORDER_OPS(HH, unsigned short)
+ORDER_OPS(i, int)
+ORDER_OPS(II, unsigned int)
+ORDER_OPS(l, long)
+ORDER_OPS(LL, unsigned long)
+ORDER_OPS(f, float)
+ORDER_OPS(d, double)
+
+static struct arrayops arrayops[] = {
+    {'b', b_binop, b_sum, b_argminmax, b_compare},
+    {'B', BB_binop, BB_sum, BB_argminmax, BB_compare},
+    {'h', h_binop, h_sum, h_argminmax, h_compare},
+    {'H', HH_binop, HH_sum, HH_argminmax, HH_compare},
+    {'i', i_binop, i_sum, i_argminmax, i_compare},
+    {'I', II_binop, II_sum, II_argminmax, II_compare},
+    {'l', l_binop, l_sum, l_argminmax, l_compare},
+    {'L', LL_binop, LL_sum, LL_argminmax, LL_compare},
+    {'f', f_binop, f_sum, f_argminmax, f_compare},
+    {'d', d_binop, d_sum, d_argminmax, d_compare},
+    {'\0', 0, 0, 0, 0} /* Sentinel */
+};
+
+static struct arrayops *
+get_arrayops(arrayobject *a)
+{
+    struct arrayops *ops;
+
+    for (ops = arrayops; ops->typecode != '\0'; ops++) {
+        if (ops->typecode == a->ob_descr->typecode)
+            return ops;
+    }
+    PyErr_Format(PyExc_TypeError,
+                 "array typecode '%c' doesn't support numeric operations",
+                 a->ob_descr->typecode);
+    return NULL;
+}
+
+/* Return the array the second operand x of an operation on a stands for:
+   x itself if it's an array with a's typecode and n items, else a new
+   one-item array holding x converted to a's item type.  *bstep is set to
+   the step (1 or 0) to walk over its items with. */
+static arrayobject *
+array_operand(arrayobject *a, PyObject *x, Py_ssize_t n, Py_ssize_t *bstep)
+{
+    arrayobject *b;
+
+    if (array_Check(x)) {
+        b = (arrayobject *)x;
+        if (b->ob_descr != a->ob_descr) {
+            PyErr_SetString(PyExc_TypeError,
+                            "array operand must have the same typecode");
+            return NULL;
+        }
+        if (Py_SIZE(b) != n) {
+            PyErr_Format(PyExc_ValueError,
+                         "array operand has %zd items, expected %zd",
+                         Py_SIZE(b), n);
+            return NULL;
+        }
+        Py_INCREF(b);
+        *bstep = 1;
+        return b;
+    }
+    b = (arrayobject *)newarrayobject(&Arraytype, 1, a->ob_descr);
+    if (b == NULL)
+        return NULL;
+    if ((*b->ob_descr->setitem)(b, 0, x) < 0) {
+        Py_DECREF(b);
+        return NULL;
+    }
+    *bstep = 0;
+    return b;
+}
+
+static PyObject *
+array_arith(arrayobject *self, PyObject *x, int op)
+{
+    struct arrayops *ops;
+    arrayobject *b, *r;
+    Py_ssize_t bstep;
+
+    ops = get_arrayops(self);
+    if (ops == NULL)
+        return NULL;
+    b = array_operand(self, x, Py_SIZE(self), &bstep);
+    if (b == NULL)
+        return NULL;
+    r = (arrayobject *)newarrayobject(&Arraytype, Py_SIZE(self),
+                                      self->ob_descr);
+    if (r != NULL && (*ops->binop)(op, self->ob_item, b->ob_item, bstep,
+                                   r->ob_item, Py_SIZE(self)) < 0)
+        Py_CLEAR(r);
+    Py_DECREF(b);
+    return (PyObject *)r;
+}
+
+static PyObject *
+array_add(arrayobject *self, PyObject *x)
+{
+    return array_arith(self, x, ARRAY_ADD);
+}
+
+PyDoc_STRVAR(add_doc,
+"add(x) -> array\n\
+\n\
+Return a new array of the items plus x.  x is either a number or\n\
+an array of the same typecode and length, added item by item.");
+
+static PyObject *
+array_sub(arrayobject *self, PyObject *x)
+{
+    return array_arith(self, x, ARRAY_SUB);
+}
+
+PyDoc_STRVAR(sub_doc,
+"sub(x) -> array\n\
+\n\
+Return a new array of the items minus x.  x is either a number or\n\
+an array of the same typecode and length, subtracted item by item.");
+
+static PyObject *
+array_mul(arrayobject *self, PyObject *x)
+{
+    return array_arith(self, x, ARRAY_MUL);
+}
+
+PyDoc_STRVAR(mul_doc,
+"mul(x) -> array\n\
+\n\
+Return a new array of the items times x.  x is either a number or\n\
+an array of the same typecode and length, multiplied item by item.");
+
+static PyObject *
+array_sum(arrayobject *self, PyObject *unused)
+{
+    struct arrayops *ops = get_arrayops(self);
+
+    if (ops == NULL)
+        return NULL;
+    return (*ops->sum)(self->ob_item, NULL, Py_SIZE(self));
+}
+
+PyDoc_STRVAR(sum_doc,
+"sum() -> number\n\
+\n\
+Return the sum of the items.");
+
+static PyObject *
+array_dot(arrayobject *self, PyObject *other)
+{
+    struct arrayops *ops;
+    arrayobject *b;
+    Py_ssize_t bstep;
+    PyObject *r;
+
+    ops = get_arrayops(self);
+    if (ops == NULL)
+        return NULL;
+    if (!array_Check(other)) {
+        PyErr_Format(PyExc_TypeError,
+                     "dot() argument must be an array, not %.200s",
+                     Py_TYPE(other)->tp_name);
+        return NULL;
+    }
+    b = array_operand(self, other, Py_SIZE(self), &bstep);
+    if (b == NULL)
+        return NULL;
+    r = (*ops->sum)(self->ob_item, b->ob_item, Py_SIZE(self));
+    Py_DECREF(b);
+    return r;
+}
+
+PyDoc_STRVAR(dot_doc,
+"dot(other) -> number\n\
+\n\
+Return the sum of the products of the items of the array and of\n\
+other, an array of the same typecode and length.");
+
+static PyObject *
+array_minmax(arrayobject *self, int want_max)
+{
+    struct arrayops *ops = get_arrayops(self);
+
+    if (ops == NULL)
+        return NULL;
+    if (Py_SIZE(self) == 0) {
+        PyErr_Format(PyExc_ValueError, "%s() of an empty array",
+                     want_max ? "max" : "min");
+        return NULL;
+    }
+    return getarrayitem((PyObject *)self,
+                        (*ops->argminmax)(self->ob_item, Py_SIZE(self),
+                                          want_max));
+}
+
+static PyObject *
+array_min(arrayobject *self, PyObject *unused)
+{
+    return array_minmax(self, 0);
+}
+
+PyDoc_STRVAR(min_doc,
+"min() -> item\n\
+\n\
+Return the smallest item.  Raise ValueError if the array is empty.");
+
+static PyObject *
+array_max(arrayobject *self, PyObject *unused)
+{
+    return array_minmax(self, 1);
+}
+
+PyDoc_STRVAR(max_doc,
+"max() -> item\n\
+\n\
+Return the largest item.  Raise ValueError if the array is empty.");
+
+static struct arraydescr *
+get_descr(int typecode)
+{
+    struct arraydescr *descr;
+
+    for (descr = descriptors; descr->typecode != typecode; descr++)
+        ;
+    return descr;
+}
+
+static PyObject *
+array_compare(arrayobject *self, PyObject *args)
+{
+    static const char *opnames[] = {"<", "<=", "==", "!=", ">", ">="};
+    struct arrayops *ops;
+    arrayobject *b, *r;
+    Py_ssize_t bstep, count;
+    char *opname;
+    PyObject *x;
+    int op;
+
+    if (!PyArg_ParseTuple(args, "sO:compare", &opname, &x))
+        return NULL;
+    /* opnames is ordered like Py_LT ... Py_GE */
+    for (op = Py_LT; op <= Py_GE; op++) {
+        if (strcmp(opname, opnames[op]) == 0)
+            break;
+    }
+    if (op > Py_GE) {
+        PyErr_Format(PyExc_ValueError,
+                     "unknown comparison operator '%.20s'", opname);
+        return NULL;
+    }
+    ops = get_arrayops(self);
+    if (ops == NULL)
+        return NULL;
+    b = array_operand(self, x, Py_SIZE(self), &bstep);
+    if (b == NULL)
+        return NULL;
+    count = (*ops->compare)(op, self->ob_item, b->ob_item, bstep, NULL,
+                            Py_SIZE(self));
+    r = (arrayobject *)newarrayobject(&Arraytype, count, get_descr('l'));
+    if (r != NULL)
+        (*ops->compare)(op, self->ob_item, b->ob_item, bstep,
+                        (long *)r->ob_item, Py_SIZE(self));
+    Py_DECREF(b);
+    return (PyObject *)r;
+}
+
+PyDoc_STRVAR(compare_doc,
+"compare(op, x) -> array\n\
+\n\
+Return an array('l') of the indices i for which self[i] op x holds,\n\
+where op is one of '<', '<=', '==', '!=', '>' or '>='.  x is either\n\
+a number or an array of the same typecode and length, compared item\n\
+by item.");
+
+/* Return a PyMem-allocated copy of the integers in indices (an array or
+   any other iterable), storing their number in *pn.  The indices aren't
+   checked against the bounds of an array yet: see check_indices(). */
+static Py_ssize_t *
+array_indices(PyObject *indices, Py_ssize_t *pn)
+{
+    Py_ssize_t *idx, i, n;
+    PyObject *seq;
+
+#define READ_INDICES(T)                                                 \
+    for (i = 0; i < n; i++)                                             \
+        idx[i] = (Py_ssize_t)((T *)ind->ob_item)[i];                    \
+    break;
+
+    if (array_Check(indices)) {
+        arrayobject *ind = (arrayobject *)indices;
+
+        n = Py_SIZE(ind);
+        idx = PyMem_New(Py_ssize_t, n > 0 ? n : 1);
+        if (idx == NULL) {
+            PyErr_NoMemory();
+            return NULL;
+        }
+        switch (ind->ob_descr->typecode) {
+        /* items of the unsigned 'I' and 'L' typecodes may not fit in a
+           Py_ssize_t; they take the generic path below */
+        case 'b': READ_INDICES(signed char)
+        case 'B': READ_INDICES(unsigned char)
+        case 'h': READ_INDICES(short)
+        case 'H': READ_INDICES(unsigned short)
+        case 'i': READ_INDICES(int)
+        case 'l': READ_INDICES(long)
+        default:
+            PyMem_Free(idx);
+            idx = NULL;
+        }
+        if (idx != NULL) {
+            *pn = n;
+            return idx;
+        }
+    }
+#undef READ_INDICES
+
+    seq = PySequence_Fast(indices, "indices must be iterable");
+    if (seq == NULL)
+        return NULL;
+    n = PySequence_Fast_GET_SIZE(seq);
+    idx = PyMem_New(Py_ssize_t, n > 0 ? n : 1);
+    if (idx == NULL) {
+        Py_DECREF(seq);
+        PyErr_NoMemory();
+        return NULL;
+    }
+    for (i = 0; i < n; i++) {
+        idx[i] = PyNumber_AsSsize_t(PySequence_Fast_GET_ITEM(seq, i),
+                                    PyExc_IndexError);
+        if (idx[i] == -1 && PyErr_Occurred()) {
+            Py_DECREF(seq);
+            PyMem_Free(idx);
+            return NULL;
+        }
+    }
+    Py_DECREF(seq);
+    *pn = n;
+    return idx;
+}
+
+/* Make the n indices in idx relative to the start of an array of the
+   given size.  Called once no more Python code can run, so that the size
+   can't change under our feet. */
+static int
+check_indices(Py_ssize_t *idx, Py_ssize_t n, Py_ssize_t size)
+{
+    Py_ssize_t i;
+
+    for (i = 0; i < n; i++) {
+        if (idx[i] < 0)
+            idx[i] += size;
+        if (idx[i] < 0 || idx[i] >= size) {
+            PyErr_SetString(PyExc_IndexError, "array index out of range");
+            return -1;
+        }
+    }
+    return 0;
+}
+
+/* dst[i*dstep] = src[i*sstep] for n items of the given size, where didx
+   and sidx, if not NULL, replace i*dstep and i*sstep by their i-th item. */
+static void
+copy_items(char *dst, const Py_ssize_t *didx, Py_ssize_t dstep,
+           const char *src, const Py_ssize_t *sidx, Py_ssize_t sstep,
+           Py_ssize_t n, int itemsize)
+{
+    Py_ssize_t i, d, s;
+
+#define COPY_ITEMS(T)                                                   \
+    for (i = 0; i < n; i++) {                                           \
+        d = didx != NULL ? didx[i] : i * dstep;                         \
+        s = sidx != NULL ? sidx[i] : i * sstep;                         \
+        ((T *)dst)[d] = ((const T *)src)[s];                            \
+    }
+
+    if (itemsize == 1)
+        COPY_ITEMS(char)
+    else if (itemsize == sizeof(short))
+        COPY_ITEMS(short)
+    else if (itemsize == sizeof(int))
+        COPY_ITEMS(int)
+    else if (itemsize == sizeof(PY_LONG_LONG))
+        COPY_ITEMS(PY_LONG_LONG)
+    else {
+        for (i = 0; i < n; i++) {
+            d = didx != NULL ? didx[i] : i * dstep;
+            s = sidx != NULL ? sidx[i] : i * sstep;
+            memcpy(dst + d * itemsize, src + s * itemsize, itemsize);
+        }
+    }
+#undef COPY_ITEMS
+}
+
+static PyObject *
+array_take(arrayobject *self, PyObject *indices)
+{
+    Py_ssize_t *idx, n;
+    arrayobject *r = NULL;
+
+    idx = array_indices(indices, &n);
+    if (idx == NULL)
+        return NULL;
+    if (check_indices(idx, n, Py_SIZE(self)) == 0) {
+        r = (arrayobject *)newarrayobject(&Arraytype, n, self->ob_descr);
+        if (r != NULL)
+            copy_items(r->ob_item, NULL, 1, self->ob_item, idx, 0, n,
+                       self->ob_descr->itemsize);
+    }
+    PyMem_Free(idx);
+    return (PyObject *)r;
+}
+
+PyDoc_STRVAR(take_doc,
+"take(indices) -> array\n\
+\n\
+Return a new array of the items at the given indices, an iterable of\n\
+integers such as an array returned by compare().");
+
+static PyObject *
+array_put(arrayobject *self, PyObject *args)
+{
+    PyObject *indices, *x;
+    Py_ssize_t *idx, n, bstep;
+    arrayobject *b;
+
+    if (!PyArg_ParseTuple(args, "OO:put", &indices, &x))
+        return NULL;
+    idx = array_indices(indices, &n);
+    if (idx == NULL)
+        return NULL;
+    b = array_operand(self, x, n, &bstep);
+    if (b == NULL) {
+        PyMem_Free(idx);
+        return NULL;
+    }
+    if (check_indices(idx, n, Py_SIZE(self)) == 0)
+        copy_items(self->ob_item, idx, 0, b->ob_item, NULL, bstep, n,
+                   self->ob_descr->itemsize);
+    else
+        Py_CLEAR(b);
+    PyMem_Free(idx);
+    if (b == NULL)
+        return NULL;
+    Py_DECREF(b);
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(put_doc,
+"put(indices, x)\n\
+\n\
+Set the items at the given indices, an iterable of integers, to x.\n\
+x is either a value or an array of the same typecode holding one\n\
+item per index.  Nothing is changed if an index is out of range.");
+
 static PyObject *
 array_fromfile(arrayobject *self, PyObject *args)
 {
@@ -1220,6 +2042,8 @@ array_fromfile(arrayobject *self, PyObject *args)
         PyErr_SetString(PyExc_TypeError, "arg1 must be open file");
         return NULL;
     }
+    if (n > 0 && array_check_exports(self) < 0)
+        return NULL;
     if (n > 0) {
         char *item = self->ob_item;
         Py_ssize_t itemsize = self->ob_descr->itemsize;
@@ -1329,6 +2153,8 @@ array_fromlist(arrayobject *self, PyObject *list)
         return NULL;
     }
     n = PyList_Size(list);
+    if (n > 0 && array_check_exports(self) < 0)
+        return NULL;
     if (n > 0) {
         char *item = self->ob_item;
         Py_ssize_t i;
@@ -1423,6 +2249,8 @@ array_fromstring(arrayobject *self, PyObject *args)
         return NULL;
     }
     n = n / itemsize;
+    if (n > 0 && array_check_exports(self) < 0)
+        return NULL;
     if (n > 0) {
         char *item = self->ob_item;
         if ((n > PY_SSIZE_T_MAX - Py_SIZE(self)) ||
@@ -1485,6 +2313,8 @@ array_fromunicode(arrayobject *self, PyObject *args)
             "type 'u' arrays");
         return NULL;
     }
+    if (n > 0 && array_check_exports(self) < 0)
+        return NULL;
     if (n > 0) {
         Py_UNICODE *item = (Py_UNICODE *) self->ob_item;
         if (Py_SIZE(self) > PY_SSIZE_T_MAX - n) {
@@ -1604,18 +2434,24 @@ static PyGetSetDef array_getsets [] = {
 };
 
 static PyMethodDef array_methods[] = {
+    {"add",             (PyCFunction)array_add,         METH_O,
+     add_doc},
     {"append",          (PyCFunction)array_append,      METH_O,
      append_doc},
     {"buffer_info", (PyCFunction)array_buffer_info, METH_NOARGS,
      buffer_info_doc},
     {"byteswap",        (PyCFunction)array_byteswap,    METH_NOARGS,
      byteswap_doc},
+    {"compare",         (PyCFunction)array_compare,     METH_VARARGS,
+     compare_doc},
     {"__copy__",        (PyCFunction)array_copy,        METH_NOARGS,
      copy_doc},
     {"count",           (PyCFunction)array_count,       METH_O,
      count_doc},
     {"__deepcopy__",(PyCFunction)array_copy,            METH_O,
      copy_doc},
+    {"dot",             (PyCFunction)array_dot,         METH_O,
+     dot_doc},
     {"extend",      (PyCFunction)array_extend,          METH_O,
      extend_doc},
     {"fromfile",        (PyCFunction)array_fromfile,    METH_VARARGS,
@@ -1632,8 +2468,16 @@ static PyMethodDef array_methods[] = {
      index_doc},
     {"insert",          (PyCFunction)array_insert,      METH_VARARGS,
      insert_doc},
+    {"max",             (PyCFunction)array_max,         METH_NOARGS,
+     max_doc},
+    {"min",             (PyCFunction)array_min,         METH_NOARGS,
+     min_doc},
+    {"mul",             (PyCFunction)array_mul,         METH_O,
+     mul_doc},
     {"pop",             (PyCFunction)array_pop,         METH_VARARGS,
      pop_doc},
+    {"put",             (PyCFunction)array_put,         METH_VARARGS,
+     put_doc},
     {"read",            (PyCFunction)array_fromfile_as_read,    METH_VARARGS,
      fromfile_doc},
     {"__reduce__",      (PyCFunction)array_reduce,      METH_NOARGS,
@@ -1642,6 +2486,12 @@ static PyMethodDef array_methods[] = {
      remove_doc},
     {"reverse",         (PyCFunction)array_reverse,     METH_NOARGS,
      reverse_doc},
+    {"sub",             (PyCFunction)array_sub,         METH_O,
+     sub_doc},
+    {"sum",             (PyCFunction)array_sum,         METH_NOARGS,
+     sum_doc},
+    {"take",            (PyCFunction)array_take,        METH_O,
+     take_doc},
 /*      {"sort",        (PyCFunction)array_sort,        METH_VARARGS,
     sort_doc},*/
     {"tofile",          (PyCFunction)array_tofile,      METH_O,
@@ -1943,6 +2793,106 @@ array_buffer_getsegcount(arrayobject *self, Py_ssize_t *lenp)
     return 1;
 }
 
+/* New-style buffers are exported through a small object which holds a
+   reference to the array and counts as one export until the consumer lets
+   go of it.  The array type itself has no bf_releasebuffer, so that
+   functions parsing their arguments with "s#", "t#" or "w#" keep accepting
+   arrays as they always did. */
+
+typedef struct {
+    PyObject_HEAD
+    arrayobject *array;
+} arrayexportobject;
+
+static PyTypeObject ArrayExporttype;
+
+static int
+array_buffer_getbuf(arrayobject *self, Py_buffer *view, int flags)
+{
+    arrayexportobject *export;
+
+    if (view == NULL) {
+        PyErr_SetString(PyExc_BufferError,
+            "array_buffer_getbuf: view==NULL argument is obsolete");
+        return -1;
+    }
+
+    export = PyObject_New(arrayexportobject, &ArrayExporttype);
+    if (export == NULL)
+        return -1;
+    Py_INCREF(self);
+    export->array = self;
+
+    view->buf = (void *)self->ob_item;
+    view->obj = (PyObject *)export;
+    if (view->buf == NULL)
+        view->buf = (void *)emptybuf;
+    view->len = Py_SIZE(self) * self->ob_descr->itemsize;
+    view->readonly = 0;
+    view->ndim = 1;
+    view->itemsize = self->ob_descr->itemsize;
+    view->suboffsets = NULL;
+    view->shape = NULL;
+    if ((flags & PyBUF_ND) == PyBUF_ND)
+        view->shape = &Py_SIZE(self);
+    view->strides = NULL;
+    if ((flags & PyBUF_STRIDES) == PyBUF_STRIDES)
+        view->strides = &view->itemsize;
+    view->format = NULL;
+    view->internal = NULL;
+    if ((flags & PyBUF_FORMAT) == PyBUF_FORMAT)
+        view->format = self->ob_descr->formats;
+
+    self->ob_exports++;
+    return 0;
+}
+
+static void
+arrayexport_dealloc(arrayexportobject *self)
+{
+    self->array->ob_exports--;
+    Py_DECREF(self->array);
+    PyObject_Del(self);
+}
+
+static int
+arrayexport_getbuf(arrayexportobject *self, Py_buffer *view, int flags)
+{
+    return array_buffer_getbuf(self->array, view, flags);
+}
+
+static PyBufferProcs arrayexport_as_buffer = {
+    NULL,
+    NULL,
+    NULL,
+    NULL,
+    (getbufferproc)arrayexport_getbuf,
+    NULL
+};
+
+static PyTypeObject ArrayExporttype = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "array._export",
+    sizeof(arrayexportobject),
+    0,
+    (destructor)arrayexport_dealloc,            /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number*/
+    0,                                          /* tp_as_sequence*/
+    0,                                          /* tp_as_mapping*/
+    PyObject_HashNotImplemented,                /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    0,                                          /* tp_getattro */
+    0,                                          /* tp_setattro */
+    &arrayexport_as_buffer,                     /* tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_NEWBUFFER, /* tp_flags */
+};
+
 static PySequenceMethods array_as_sequence = {
     (lenfunc)array_length,                      /*sq_length*/
     (binaryfunc)array_concat,               /*sq_concat*/
@@ -1961,6 +2911,8 @@ static PyBufferProcs array_as_buffer = {
     (writebufferproc)array_buffer_getwritebuf,
     (segcountproc)array_buffer_getsegcount,
     NULL,
+    (getbufferproc)array_buffer_getbuf,
+    NULL
 };
 
 static PyObject *
@@ -2171,7 +3123,8 @@ static PyTypeObject Arraytype = {
     PyObject_GenericGetAttr,                    /* tp_getattro */
     0,                                          /* tp_setattro */
     &array_as_buffer,                           /* tp_as_buffer*/
-    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_WEAKREFS,  /* tp_flags */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_WEAKREFS |
+        Py_TPFLAGS_HAVE_NEWBUFFER,              /* tp_flags */
     arraytype_doc,                              /* tp_doc */
     0,                                          /* tp_traverse */
     0,                                          /* tp_clear */
@@ -2301,6 +3254,8 @@ initarray(void)
 
     Py_TYPE(&Arraytype) = &PyType_Type;
     Py_TYPE(&PyArrayIter_Type) = &PyType_Type;
+    if (PyType_Ready(&ArrayExporttype) < 0)
+        return;
     m = Py_InitModule3("array", a_methods, module_doc);
     if (m == NULL)
         return;
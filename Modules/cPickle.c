@@ -15,7 +15,7 @@ PyDoc_STRVAR(cPickle_module_documentation,
 #define WRITE_BUF_SIZE 256
 
 /* Bump this when new opcodes are added to the pickle protocol. */
-#define HIGHEST_PROTOCOL 2
+#define HIGHEST_PROTOCOL 5
 
 /*
  * Note: The UNICODE macro controls the TCHAR meaning of the win32 API. Since
@@ -85,6 +85,27 @@ PyDoc_STRVAR(cPickle_module_documentation,
 #define LONG1    '\x8a' /* push long from < 256 bytes */
 #define LONG4    '\x8b' /* push really big long */
 
+/* Protocol 3 (Python 3.0). */
+#define BINBYTES       'B' /* push bytes; counted binary string argument */
+#define SHORT_BINBYTES 'C' /*  "     "   ;    "      "       "      " < 256 bytes */
+
+/* Protocol 4 */
+#define SHORT_BINUNICODE '\x8c' /* push short string; UTF-8 length < 256 bytes */
+#define BINUNICODE8      '\x8d' /* push very long string */
+#define BINBYTES8        '\x8e' /* push very long bytes string */
+#define EMPTY_SET        '\x8f' /* push empty set on the stack */
+#define ADDITEMS         '\x90' /* modify set by adding topmost stack items */
+#define FROZENSET        '\x91' /* build frozenset from topmost stack items */
+#define NEWOBJ_EX        '\x92' /* like NEWOBJ but work with keyword only arguments */
+#define STACK_GLOBAL     '\x93' /* same as GLOBAL but using names on the stacks */
+#define MEMOIZE          '\x94' /* store top of the stack in memo */
+#define FRAME            '\x95' /* indicate the beginning of a new frame */
+
+/* Protocol 5 */
+#define BYTEARRAY8       '\x96' /* push bytearray */
+#define NEXT_BUFFER      '\x97' /* push next out-of-band buffer */
+#define READONLY_BUFFER  '\x98' /* make top of stack readonly */
+
 /* There aren't opcodes -- they're ways to pickle bools before protocol 2,
  * so that unpicklers written before bools were introduced unpickle them
  * as ints, but unpicklers after can recognize that bools were intended.
@@ -102,6 +123,16 @@ PyDoc_STRVAR(cPickle_module_documentation,
  */
 #define BATCHSIZE 1000
 
+/* Keep in synch with pickle._Framer.  From protocol 4 on, the pickler
+ * accumulates opcodes into frames of roughly FRAME_SIZE_TARGET bytes, each
+ * preceded by a FRAME opcode and an 8-byte length, so that unpicklers can
+ * read the stream in a few large chunks.  Frames smaller than FRAME_SIZE_MIN
+ * are not worth their header and are written out bare.
+ */
+#define FRAME_SIZE_TARGET (64 * 1024)
+#define FRAME_SIZE_MIN 4
+#define FRAME_HEADER_SIZE 9
+
 static char MARKv = MARK;
 
 static PyObject *PickleError;
@@ -351,6 +382,21 @@ typedef struct Picklerobject {
     PyObject *dispatch_table;
     int fast_container; /* count nested container dumps */
     PyObject *fast_memo;
+
+    /* Protocol 4 framing.  When framing is on, write_func is write_framed(),
+     * which accumulates opcodes in frame_buf (after a reserved header) and
+     * passes whole frames on to raw_write_func.
+     */
+    int framing;
+    Py_ssize_t (*raw_write_func)(struct Picklerobject *, const char *, Py_ssize_t);
+    char *frame_buf;
+    Py_ssize_t frame_len;       /* payload bytes in frame_buf */
+    Py_ssize_t frame_size;      /* allocated size of frame_buf */
+
+    /* Protocol 5: called with each PickleBuffer; a false result means the
+     * buffer is transferred out-of-band.
+     */
+    PyObject *buffer_callback;
 } Picklerobject;
 
 #ifndef PY_CPICKLE_FAST_LIMIT
@@ -379,6 +425,15 @@ typedef struct Unpicklerobject {
     Py_ssize_t buf_size;
     char *buf;
     PyObject *find_class;
+
+    /* Iterator over the out-of-band buffers for NEXT_BUFFER, or NULL. */
+    PyObject *buffers;
+
+    /* The current protocol 4 frame, when reading from a Python file-like
+     * object (see load_frame()).
+     */
+    PyObject *frame;
+    Py_ssize_t frame_pos;
 } Unpicklerobject;
 
 static PyTypeObject Unpicklertype;
@@ -521,6 +576,86 @@ write_other(Picklerobject *self, const char *s, Py_ssize_t  n)
     return n;
 }
 
+static void
+write_size64(char *out, size_t value)
+{
+    size_t i;
+
+    for (i = 0; i < sizeof(size_t); i++)
+        out[i] = (unsigned char)((value >> (8 * i)) & 0xff);
+    for (i = sizeof(size_t); i < 8; i++)
+        out[i] = 0;
+}
+
+/* Hand the frame accumulated so far to the underlying writer.  This must
+ * only be called at an opcode boundary, or right before a payload that is
+ * written outside of any frame.
+ */
+static int
+commit_frame(Picklerobject *self)
+{
+    Py_ssize_t len = self->frame_len;
+    char *frame = self->frame_buf;
+
+    if (len == 0)
+        return 0;
+    self->frame_len = 0;
+
+    if (len < FRAME_SIZE_MIN) {
+        /* Not worth a FRAME header */
+        if (self->raw_write_func(self, frame + FRAME_HEADER_SIZE, len) < 0)
+            return -1;
+        return 0;
+    }
+    frame[0] = FRAME;
+    write_size64(frame + 1, len);
+    if (self->raw_write_func(self, frame, FRAME_HEADER_SIZE + len) < 0)
+        return -1;
+    return 0;
+}
+
+static Py_ssize_t
+write_framed(Picklerobject *self, const char *s, Py_ssize_t n)
+{
+    Py_ssize_t needed;
+
+    if (s == NULL) {
+        if (commit_frame(self) < 0)
+            return -1;
+        return self->raw_write_func(self, NULL, 0);
+    }
+
+    if (n >= FRAME_SIZE_TARGET) {
+        /* Large payloads go straight to the file: end the current frame
+         * and write the data unframed, sparing a copy into frame_buf.
+         */
+        if (commit_frame(self) < 0)
+            return -1;
+        return self->raw_write_func(self, s, n);
+    }
+
+    needed = FRAME_HEADER_SIZE + self->frame_len + n;
+    if (needed > self->frame_size) {
+        Py_ssize_t size = self->frame_size;
+        char *frame;
+
+        if (size == 0)
+            size = FRAME_HEADER_SIZE + FRAME_SIZE_TARGET;
+        while (size < needed)
+            size *= 2;
+        frame = (char *)PyMem_Realloc(self->frame_buf, size);
+        if (frame == NULL) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        self->frame_buf = frame;
+        self->frame_size = size;
+    }
+    memcpy(self->frame_buf + FRAME_HEADER_SIZE + self->frame_len, s, n);
+    self->frame_len += n;
+    return n;
+}
+
 
 static Py_ssize_t
 read_file(Unpicklerobject *self, char **s, Py_ssize_t n)
@@ -726,6 +861,68 @@ readline_other(Unpicklerobject *self, char **s)
     return str_size;
 }
 
+/* While a protocol 4 frame read from a Python file-like object is being
+ * consumed, read_frame() and readline_frame() replace read_other() and
+ * readline_other(), serving data out of self->frame.  They switch back
+ * once the frame is exhausted.
+ */
+static void
+end_frame(Unpicklerobject *self)
+{
+    Py_CLEAR(self->frame);
+    self->frame_pos = 0;
+    self->read_func = read_other;
+    self->readline_func = readline_other;
+}
+
+
+static Py_ssize_t
+read_frame(Unpicklerobject *self, char **s, Py_ssize_t n)
+{
+    Py_ssize_t avail = PyString_GET_SIZE(self->frame) - self->frame_pos;
+
+    if (avail == 0) {
+        end_frame(self);
+        return self->read_func(self, s, n);
+    }
+    if (n > avail) {
+        PyErr_SetString(UnpicklingError,
+                        "pickle exhausted before end of frame");
+        return -1;
+    }
+
+    *s = PyString_AS_STRING(self->frame) + self->frame_pos;
+    self->frame_pos += n;
+    return n;
+}
+
+
+static Py_ssize_t
+readline_frame(Unpicklerobject *self, char **s)
+{
+    Py_ssize_t avail = PyString_GET_SIZE(self->frame) - self->frame_pos;
+    char *start, *nl;
+    Py_ssize_t n;
+
+    if (avail == 0) {
+        end_frame(self);
+        return self->readline_func(self, s);
+    }
+
+    start = PyString_AS_STRING(self->frame) + self->frame_pos;
+    nl = memchr(start, '\n', avail);
+    if (nl == NULL) {
+        PyErr_SetString(UnpicklingError,
+                        "pickle exhausted before end of frame");
+        return -1;
+    }
+    n = nl - start + 1;
+
+    *s = start;
+    self->frame_pos += n;
+    return n;
+}
+
 /* Copy the first n bytes from s into newly malloc'ed memory, plus a
  * trailing 0 byte.  Return a pointer to that, or NULL if out of memory.
  * The caller is responsible for free()'ing the return value.
@@ -803,6 +1000,11 @@ get(Picklerobject *self, PyObject *id)
 }
 
 
+/* From protocol 4 on, memoize with MEMOIZE rather than [LONG_]BINPUT.
+ * List-based picklers keep using PUT: Pickle_getvalue() rewrites those.
+ */
+#define USE_MEMOIZE(self) ((self)->proto >= 4 && !Pdata_Check((self)->file))
+
 static int
 put(Picklerobject *self, PyObject *ob)
 {
@@ -832,8 +1034,12 @@ put2(Picklerobject *self, PyObject *ob)
      * XXX And does "positive" really mean non-negative?
      * XXX pickle.py starts with PUT index 0, not 1.  This makes for
      * XXX gratuitous differences between the pickling modules.
+     *
+     * MEMOIZE has no argument: the unpickler uses the size of its memo as
+     * the key, so the indices have to start at 0 there.
      */
-    p++;
+    if (!USE_MEMOIZE(self))
+        p++;
 
     if (!( py_ob_id = PyLong_FromVoidPtr(ob)))
         goto finally;
@@ -864,6 +1070,10 @@ put2(Picklerobject *self, PyObject *ob)
         res=0;          /* Job well done ;) */
         goto finally;
     }
+    else if (USE_MEMOIZE(self)) {
+        c_str[0] = MEMOIZE;
+        len = 1;
+    }
     else {
         if (p < 256) {
             c_str[0] = BINPUT;
@@ -1240,6 +1450,36 @@ done:
 }
 
 
+/* Fill in c_str, which must have room for 9 bytes, with the opcode and
+ * length for a binary string of size bytes.  Return the length of that
+ * header, or -1 if the string is too large for the protocol.
+ */
+static Py_ssize_t
+binstring_header(Picklerobject *self, Py_ssize_t size, char *c_str)
+{
+    int i;
+
+    if (size < 256) {
+        c_str[0] = SHORT_BINSTRING;
+        c_str[1] = size;
+        return 2;
+    }
+    else if (size <= 0x7fffffffL) {
+        c_str[0] = BINSTRING;
+        for (i = 1; i < 5; i++)
+            c_str[i] = (int)(size >> ((i - 1) * 8));
+        return 5;
+    }
+    else if (self->proto >= 4) {
+        c_str[0] = BINBYTES8;
+        write_size64(c_str + 1, size);
+        return 9;
+    }
+    PyErr_SetString(PyExc_OverflowError,
+                    "cannot serialize a string larger than 2 GiB");
+    return -1;
+}
+
 static int
 save_string(Picklerobject *self, PyObject *args, int doput)
 {
@@ -1273,25 +1513,10 @@ save_string(Picklerobject *self, PyObject *args, int doput)
         Py_XDECREF(repr);
     }
     else {
-        int i;
-        char c_str[5];
+        char c_str[9];
 
-        if (size < 256) {
-            c_str[0] = SHORT_BINSTRING;
-            c_str[1] = size;
-            len = 2;
-        }
-        else if (size <= 0x7fffffffL) {
-            c_str[0] = BINSTRING;
-            for (i = 1; i < 5; i++)
-                c_str[i] = (int)(size >> ((i - 1) * 8));
-            len = 5;
-        }
-        else {
-            PyErr_SetString(PyExc_OverflowError,
-                            "cannot serialize a string larger than 2 GiB");
-            return -1;    /* string too large */
-        }
+        if ((len = binstring_header(self, size, c_str)) < 0)
+            return -1;
 
         if (self->write_func(self, c_str, len) < 0)
             return -1;
@@ -1445,24 +1670,36 @@ save_unicode(Picklerobject *self, PyObject *args, int doput)
     }
     else {
         int i;
-        char c_str[5];
+        char c_str[9];
 
         if (!( repr = PyUnicode_AsUTF8String(args)))
             return -1;
 
         if ((size = PyString_Size(repr)) < 0)
             goto err;
-        if (size > 0x7fffffffL) {
+
+        if (size < 256 && self->proto >= 4) {
+            c_str[0] = SHORT_BINUNICODE;
+            c_str[1] = size;
+            len = 2;
+        }
+        else if (size <= 0x7fffffffL) {
+            c_str[0] = BINUNICODE;
+            for (i = 1; i < 5; i++)
+                c_str[i] = (int)(size >> ((i - 1) * 8));
+            len = 5;
+        }
+        else if (self->proto >= 4) {
+            c_str[0] = BINUNICODE8;
+            write_size64(c_str + 1, size);
+            len = 9;
+        }
+        else {
             PyErr_SetString(PyExc_OverflowError,
                             "cannot serialize a Unicode string larger than 2 GiB");
             goto err;   /* string too large */
         }
 
-        c_str[0] = BINUNICODE;
-        for (i = 1; i < 5; i++)
-            c_str[i] = (int)(size >> ((i - 1) * 8));
-        len = 5;
-
         if (self->write_func(self, c_str, len) < 0)
             goto err;
 
@@ -2049,6 +2286,223 @@ save_dict(Picklerobject *self, PyObject *args)
 }
 
 
+static int
+save_set(Picklerobject *self, PyObject *args)
+{
+    PyObject *item;
+    Py_ssize_t set_size, ppos = 0;
+    long hash;
+    int i, res = -1;
+
+    static char empty_set = EMPTY_SET;
+    static char additems = ADDITEMS;
+
+    assert(self->proto >= 4);
+
+    if (self->fast && !fast_save_enter(self, args))
+        goto finally;
+
+    if (self->write_func(self, &empty_set, 1) < 0)
+        goto finally;
+
+    set_size = PySet_GET_SIZE(args);
+    if (set_size == 0) {
+        if (put(self, args) >= 0)
+            res = 0;
+        goto finally;
+    }
+    if (put2(self, args) < 0)
+        goto finally;
+
+    if (Py_EnterRecursiveCall(" while pickling an object"))
+        goto finally;
+
+    /* Write in batches of BATCHSIZE. */
+    do {
+        i = 0;
+        if (self->write_func(self, &MARKv, 1) < 0)
+            goto done;
+        while (_PySet_NextEntry(args, &ppos, &item, &hash)) {
+            if (save(self, item, 0) < 0)
+                goto done;
+            if (++i == BATCHSIZE)
+                break;
+        }
+        if (self->write_func(self, &additems, 1) < 0)
+            goto done;
+        if (PySet_GET_SIZE(args) != set_size) {
+            PyErr_SetString(PyExc_RuntimeError,
+                            "set changed size during iteration");
+            goto done;
+        }
+    } while (i == BATCHSIZE);
+    res = 0;
+
+  done:
+    Py_LeaveRecursiveCall();
+
+  finally:
+    if (self->fast && !fast_save_leave(self, args))
+        res = -1;
+
+    return res;
+}
+
+static int
+save_frozenset(Picklerobject *self, PyObject *args)
+{
+    PyObject *iter, *item, *py_ob_id = NULL;
+    int res = -1;
+
+    static char frozenset = FROZENSET;
+    static char pop_mark = POP_MARK;
+
+    assert(self->proto >= 4);
+
+    if (self->write_func(self, &MARKv, 1) < 0)
+        return -1;
+
+    iter = PyObject_GetIter(args);
+    if (iter == NULL)
+        return -1;
+    for (;;) {
+        item = PyIter_Next(iter);
+        if (item == NULL) {
+            if (PyErr_Occurred())
+                goto finally;
+            break;
+        }
+        if (save(self, item, 0) < 0) {
+            Py_DECREF(item);
+            goto finally;
+        }
+        Py_DECREF(item);
+    }
+
+    /* If the frozenset is in the memo now, it is recursive: throw away
+     * the items we pushed and fetch it back from the memo instead.
+     */
+    py_ob_id = PyLong_FromVoidPtr(args);
+    if (py_ob_id == NULL)
+        goto finally;
+    if (PyDict_GetItem(self->memo, py_ob_id)) {
+        if (self->write_func(self, &pop_mark, 1) < 0)
+            goto finally;
+        if (get(self, py_ob_id) >= 0)
+            res = 0;
+        goto finally;
+    }
+
+    if (self->write_func(self, &frozenset, 1) < 0)
+        goto finally;
+    if (put(self, args) >= 0)
+        res = 0;
+
+  finally:
+    Py_DECREF(iter);
+    Py_XDECREF(py_ob_id);
+    return res;
+}
+
+/* Write a binary string opcode for the size bytes at data, and memoize
+ * args as the object they unpickle to.
+ */
+static int
+save_bytes_data(Picklerobject *self, PyObject *args,
+                const char *data, Py_ssize_t size)
+{
+    char c_str[9];
+    Py_ssize_t len;
+
+    if ((len = binstring_header(self, size, c_str)) < 0)
+        return -1;
+    if (self->write_func(self, c_str, len) < 0 ||
+        self->write_func(self, data, size) < 0)
+        return -1;
+    return put(self, args);
+}
+
+/* Likewise with BYTEARRAY8, for data that unpickles to a bytearray. */
+static int
+save_bytearray_data(Picklerobject *self, PyObject *args,
+                    const char *data, Py_ssize_t size)
+{
+    char c_str[9];
+
+    assert(self->proto >= 5);
+
+    c_str[0] = BYTEARRAY8;
+    write_size64(c_str + 1, size);
+    if (self->write_func(self, c_str, 9) < 0 ||
+        self->write_func(self, data, size) < 0)
+        return -1;
+    return put(self, args);
+}
+
+static int
+save_bytearray(Picklerobject *self, PyObject *args)
+{
+    return save_bytearray_data(self, args, PyByteArray_AS_STRING(args),
+                               PyByteArray_GET_SIZE(args));
+}
+
+static int
+save_picklebuffer(Picklerobject *self, PyObject *args)
+{
+    const Py_buffer *view;
+    int in_band = 1;
+
+    static char next_buffer = NEXT_BUFFER;
+    static char readonly_buffer = READONLY_BUFFER;
+
+    if (self->proto < 5) {
+        PyErr_SetString(PicklingError,
+                        "PickleBuffer can only be pickled with "
+                        "protocol >= 5");
+        return -1;
+    }
+    view = PyPickleBuffer_GetBuffer(args);
+    if (view == NULL)
+        return -1;
+    if (!PyBuffer_IsContiguous((Py_buffer *)view, 'A')) {
+        PyErr_SetString(PicklingError,
+                        "PickleBuffer can not be pickled when pointing "
+                        "to a non-contiguous buffer");
+        return -1;
+    }
+
+    if (self->buffer_callback != NULL) {
+        PyObject *ret;
+
+        ret = PyObject_CallFunctionObjArgs(self->buffer_callback,
+                                           args, NULL);
+        if (ret == NULL)
+            return -1;
+        in_band = PyObject_IsTrue(ret);
+        Py_DECREF(ret);
+        if (in_band < 0)
+            return -1;
+    }
+
+    if (in_band) {
+        /* The memory is copied into the pickle stream. */
+        if (view->readonly)
+            return save_bytes_data(self, args, (const char *)view->buf,
+                                   view->len);
+        return save_bytearray_data(self, args, (const char *)view->buf,
+                                   view->len);
+    }
+
+    /* The buffer_callback took the buffer: only leave a placeholder. */
+    if (self->write_func(self, &next_buffer, 1) < 0)
+        return -1;
+    if (view->readonly &&
+        self->write_func(self, &readonly_buffer, 1) < 0)
+        return -1;
+    return 0;
+}
+
+
 static int
 save_inst(Picklerobject *self, PyObject *args)
 {
@@ -2200,6 +2654,7 @@ save_global(Picklerobject *self, PyObject *args, PyObject *name)
     int module_size, name_size, res = -1;
 
     static char global = GLOBAL;
+    static char stack_global = STACK_GLOBAL;
 
     if (name) {
         global_name = name;
@@ -2305,20 +2760,33 @@ save_global(Picklerobject *self, PyObject *args, PyObject *name)
     }
 
   gen_global:
-    if (self->write_func(self, &global, 1) < 0)
-        goto finally;
-
-    if (self->write_func(self, module_str, module_size) < 0)
-        goto finally;
+    if (self->proto >= 4) {
+        /* Push the names and build the global from them. */
+        if (save(self, module, 0) < 0)
+            goto finally;
 
-    if (self->write_func(self, "\n", 1) < 0)
-        goto finally;
+        if (save(self, global_name, 0) < 0)
+            goto finally;
 
-    if (self->write_func(self, name_str, name_size) < 0)
-        goto finally;
+        if (self->write_func(self, &stack_global, 1) < 0)
+            goto finally;
+    }
+    else {
+        if (self->write_func(self, &global, 1) < 0)
+            goto finally;
 
-    if (self->write_func(self, "\n", 1) < 0)
-        goto finally;
+        if (self->write_func(self, module_str, module_size) < 0)
+            goto finally;
+
+        if (self->write_func(self, "\n", 1) < 0)
+            goto finally;
+
+        if (self->write_func(self, name_str, name_size) < 0)
+            goto finally;
+
+        if (self->write_func(self, "\n", 1) < 0)
+            goto finally;
+    }
 
     if (put(self, args) < 0)
         goto finally;
@@ -2407,11 +2875,12 @@ save_reduce(Picklerobject *self, PyObject *args, PyObject *fn, PyObject *ob)
     PyObject *dictitems = Py_None;
     Py_ssize_t size;
 
-    int use_newobj = self->proto >= 2;
+    int use_newobj = 0, use_newobj_ex = 0;
 
     static char reduce = REDUCE;
     static char build = BUILD;
     static char newobj = NEWOBJ;
+    static char newobj_ex = NEWOBJ_EX;
 
     size = PyTuple_Size(args);
     if (size < 2 || size > 5) {
@@ -2458,9 +2927,10 @@ save_reduce(Picklerobject *self, PyObject *args, PyObject *fn, PyObject *ob)
     }
 
     /* Protocol 2 special case: if callable's name is __newobj__, use
-     * NEWOBJ.  This consumes a lot of code.
+     * NEWOBJ.  This consumes a lot of code.  From protocol 4 on, the same
+     * goes for __newobj_ex__ and NEWOBJ_EX.
      */
-    if (use_newobj) {
+    if (self->proto >= 2) {
         PyObject *temp = PyObject_GetAttr(callable, __name___str);
 
         if (temp == NULL) {
@@ -2468,16 +2938,58 @@ save_reduce(Picklerobject *self, PyObject *args, PyObject *fn, PyObject *ob)
                 PyErr_Clear();
             else
                 return -1;
-            use_newobj = 0;
         }
         else {
-            use_newobj = PyString_Check(temp) &&
-                         strcmp(PyString_AS_STRING(temp),
-                                "__newobj__") == 0;
+            if (PyString_Check(temp)) {
+                use_newobj = strcmp(PyString_AS_STRING(temp),
+                                    "__newobj__") == 0;
+                use_newobj_ex = self->proto >= 4 &&
+                                strcmp(PyString_AS_STRING(temp),
+                                       "__newobj_ex__") == 0;
+            }
             Py_DECREF(temp);
         }
     }
-    if (use_newobj) {
+    if (use_newobj_ex) {
+        PyObject *cls, *args, *kwargs;
+
+        /* Sanity checks. */
+        if (PyTuple_GET_SIZE(argtup) != 3) {
+            PyErr_Format(PicklingError, "length of the NEWOBJ_EX "
+                         "argument tuple must be exactly 3, not %zd",
+                         PyTuple_GET_SIZE(argtup));
+            return -1;
+        }
+
+        cls = PyTuple_GET_ITEM(argtup, 0);
+        if (!PyType_Check(cls)) {
+            PyErr_Format(PicklingError, "first item from NEWOBJ_EX "
+                         "argument tuple must be a class, not %.200s",
+                         Py_TYPE(cls)->tp_name);
+            return -1;
+        }
+        args = PyTuple_GET_ITEM(argtup, 1);
+        if (!PyTuple_Check(args)) {
+            PyErr_Format(PicklingError, "second item from NEWOBJ_EX "
+                         "argument tuple must be a tuple, not %.200s",
+                         Py_TYPE(args)->tp_name);
+            return -1;
+        }
+        kwargs = PyTuple_GET_ITEM(argtup, 2);
+        if (!PyDict_Check(kwargs)) {
+            PyErr_Format(PicklingError, "third item from NEWOBJ_EX "
+                         "argument tuple must be a dict, not %.200s",
+                         Py_TYPE(kwargs)->tp_name);
+            return -1;
+        }
+
+        if (save(self, cls, 0) < 0 ||
+            save(self, args, 0) < 0 ||
+            save(self, kwargs, 0) < 0 ||
+            self->write_func(self, &newobj_ex, 1) < 0)
+            return -1;
+    }
+    else if (use_newobj) {
         PyObject *cls;
         PyObject *newargtup;
         Py_ssize_t n, i;
@@ -2603,6 +3115,12 @@ save(Picklerobject *self, PyObject *args, int pers_save)
     int res = -1;
     int tmp;
 
+    /* Opcode boundary: a good place to end a full frame. */
+    if (self->framing && self->frame_len >= FRAME_SIZE_TARGET) {
+        if (commit_frame(self) < 0)
+            return -1;
+    }
+
     if (Py_EnterRecursiveCall(" while pickling an object"))
         return -1;
 
@@ -2691,6 +3209,10 @@ save(Picklerobject *self, PyObject *args, int pers_save)
             res = save_string(self, args, 1);
             goto finally;
         }
+        if (type == &PySet_Type && self->proto >= 4) {
+            res = save_set(self, args);
+            goto finally;
+        }
         break;
 
 #ifdef Py_USING_UNICODE
@@ -2727,6 +3249,13 @@ save(Picklerobject *self, PyObject *args, int pers_save)
         }
         break;
 
+    case 'p':
+        if (type == &PyPickleBuffer_Type) {
+            res = save_picklebuffer(self, args);
+            goto finally;
+        }
+        break;
+
     case 'i':
         if (type == &PyInstance_Type) {
             res = save_inst(self, args);
@@ -2751,6 +3280,10 @@ save(Picklerobject *self, PyObject *args, int pers_save)
             }
             goto finally;
         }
+        if (type == &PyFrozenSet_Type && self->proto >= 4) {
+            res = save_frozenset(self, args);
+            goto finally;
+        }
         break;
 
     case 'b':
@@ -2758,6 +3291,10 @@ save(Picklerobject *self, PyObject *args, int pers_save)
             res = save_global(self, args, NULL);
             goto finally;
         }
+        if (type == &PyByteArray_Type && self->proto >= 5) {
+            res = save_bytearray(self, args);
+            goto finally;
+        }
     }
 
     if (!pers_save && self->inst_pers_func) {
@@ -2857,7 +3394,13 @@ dump(Picklerobject *self, PyObject *args)
         bytes[0] = PROTO;
         assert(self->proto >= 0 && self->proto < 256);
         bytes[1] = (char)self->proto;
-        if (self->write_func(self, bytes, 2) < 0)
+        /* PROTO goes ahead of the first frame. */
+        if (self->framing) {
+            self->frame_len = 0;
+            if (self->raw_write_func(self, bytes, 2) < 0)
+                return -1;
+        }
+        else if (self->write_func(self, bytes, 2) < 0)
             return -1;
     }
 
@@ -3053,7 +3596,7 @@ static struct PyMethodDef Pickler_methods[] =
 
 
 static Picklerobject *
-newPicklerobject(PyObject *file, int proto)
+newPicklerobject(PyObject *file, int proto, PyObject *buffer_callback)
 {
     Picklerobject *self;
 
@@ -3065,6 +3608,13 @@ newPicklerobject(PyObject *file, int proto)
                      proto, HIGHEST_PROTOCOL);
         return NULL;
     }
+    if (buffer_callback == Py_None)
+        buffer_callback = NULL;
+    if (buffer_callback != NULL && proto < 5) {
+        PyErr_SetString(PyExc_ValueError,
+                        "buffer_callback needs protocol >= 5");
+        return NULL;
+    }
 
     self = PyObject_GC_New(Picklerobject, &Picklertype);
     if (self == NULL)
@@ -3083,6 +3633,13 @@ newPicklerobject(PyObject *file, int proto)
     self->fast_memo = NULL;
     self->buf_size = 0;
     self->dispatch_table = NULL;
+    self->framing = 0;
+    self->raw_write_func = NULL;
+    self->frame_buf = NULL;
+    self->frame_len = 0;
+    self->frame_size = 0;
+    Py_XINCREF(buffer_callback);
+    self->buffer_callback = buffer_callback;
 
     self->file = NULL;
     if (file)
@@ -3133,6 +3690,15 @@ newPicklerobject(PyObject *file, int proto)
         }
     }
 
+    /* List-based picklers can't frame: Pickle_getvalue() rewrites the
+     * PUTs, which would change the frame lengths.
+     */
+    if (proto >= 4 && !Pdata_Check(file)) {
+        self->framing = 1;
+        self->raw_write_func = self->write_func;
+        self->write_func = write_framed;
+    }
+
     if (PyEval_GetRestricted()) {
         /* Restricted execution, get private tables */
         PyObject *m = PyImport_ImportModule("copy_reg");
@@ -3161,8 +3727,8 @@ newPicklerobject(PyObject *file, int proto)
 static PyObject *
 get_Pickler(PyObject *self, PyObject *args, PyObject *kwds)
 {
-    static char *kwlist[] = {"file", "protocol", NULL};
-    PyObject *file = NULL;
+    static char *kwlist[] = {"file", "protocol", "buffer_callback", NULL};
+    PyObject *file = NULL, *buffer_callback = NULL;
     int proto = 0;
 
     /* XXX
@@ -3175,11 +3741,11 @@ get_Pickler(PyObject *self, PyObject *args, PyObject *kwds)
     if (!PyArg_ParseTuple(args, "|i:Pickler", &proto)) {
         PyErr_Clear();
         proto = 0;
-        if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|i:Pickler",
-                    kwlist, &file, &proto))
+        if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|iO:Pickler",
+                    kwlist, &file, &proto, &buffer_callback))
             return NULL;
     }
-    return (PyObject *)newPicklerobject(file, proto);
+    return (PyObject *)newPicklerobject(file, proto, buffer_callback);
 }
 
 
@@ -3195,7 +3761,9 @@ Pickler_dealloc(Picklerobject *self)
     Py_XDECREF(self->pers_func);
     Py_XDECREF(self->inst_pers_func);
     Py_XDECREF(self->dispatch_table);
+    Py_XDECREF(self->buffer_callback);
     PyMem_Free(self->write_buf);
+    PyMem_Free(self->frame_buf);
     Py_TYPE(self)->tp_free((PyObject *)self);
 }
 
@@ -3210,6 +3778,7 @@ Pickler_traverse(Picklerobject *self, visitproc visit, void *arg)
     Py_VISIT(self->pers_func);
     Py_VISIT(self->inst_pers_func);
     Py_VISIT(self->dispatch_table);
+    Py_VISIT(self->buffer_callback);
     return 0;
 }
 
@@ -3224,6 +3793,7 @@ Pickler_clear(Picklerobject *self)
     Py_CLEAR(self->pers_func);
     Py_CLEAR(self->inst_pers_func);
     Py_CLEAR(self->dispatch_table);
+    Py_CLEAR(self->buffer_callback);
     return 0;
 }
 
@@ -3811,6 +4381,125 @@ load_binunicode(Unpicklerobject *self)
 #endif
 
 
+/* Read an unsigned little-endian size stored in nbytes bytes, as used by
+ * the protocol 3 and later opcodes.  Return -1 if it doesn't fit in a
+ * Py_ssize_t.
+ */
+static Py_ssize_t
+calc_binsize(char *bytes, int nbytes)
+{
+    unsigned char *s = (unsigned char *)bytes;
+    size_t x = 0;
+    int i;
+
+    if (nbytes > (int)sizeof(size_t)) {
+        /* BINBYTES8 and friends can't be loaded on 32-bit boxes */
+        for (i = (int)sizeof(size_t); i < nbytes; i++) {
+            if (s[i])
+                return -1;
+        }
+        nbytes = (int)sizeof(size_t);
+    }
+    for (i = 0; i < nbytes; i++)
+        x |= (size_t)s[i] << (8 * i);
+
+    if (x > PY_SSIZE_T_MAX)
+        return -1;
+    return (Py_ssize_t)x;
+}
+
+
+/* Load SHORT_BINBYTES, BINBYTES or BINBYTES8, whose size takes nbytes. */
+static int
+load_counted_binbytes(Unpicklerobject *self, int nbytes)
+{
+    PyObject *py_string;
+    Py_ssize_t l;
+    char *s;
+
+    if (self->read_func(self, &s, nbytes) < 0)
+        return -1;
+
+    l = calc_binsize(s, nbytes);
+    if (l < 0) {
+        PyErr_Format(PyExc_OverflowError,
+                     "BINBYTES exceeds system's maximum size of %zd bytes",
+                     PY_SSIZE_T_MAX);
+        return -1;
+    }
+
+    if (self->read_func(self, &s, l) < 0)
+        return -1;
+
+    if (!( py_string = PyString_FromStringAndSize(s, l)))
+        return -1;
+
+    PDATA_PUSH(self->stack, py_string, -1);
+    return 0;
+}
+
+
+static int
+load_bytearray8(Unpicklerobject *self)
+{
+    PyObject *bytearray;
+    Py_ssize_t l;
+    char *s;
+
+    if (self->read_func(self, &s, 8) < 0)
+        return -1;
+
+    l = calc_binsize(s, 8);
+    if (l < 0) {
+        PyErr_Format(PyExc_OverflowError,
+                     "BYTEARRAY8 exceeds system's maximum size of %zd bytes",
+                     PY_SSIZE_T_MAX);
+        return -1;
+    }
+
+    if (self->read_func(self, &s, l) < 0)
+        return -1;
+
+    if (!( bytearray = PyByteArray_FromStringAndSize(s, l)))
+        return -1;
+
+    PDATA_PUSH(self->stack, bytearray, -1);
+    return 0;
+}
+
+
+#ifdef Py_USING_UNICODE
+/* Load SHORT_BINUNICODE or BINUNICODE8, whose size takes nbytes. */
+static int
+load_counted_binunicode(Unpicklerobject *self, int nbytes)
+{
+    PyObject *unicode;
+    Py_ssize_t l;
+    char *s;
+
+    if (self->read_func(self, &s, nbytes) < 0)
+        return -1;
+
+    l = calc_binsize(s, nbytes);
+    if (l < 0) {
+        PyErr_Format(PyExc_OverflowError,
+                     "BINUNICODE exceeds system's maximum size of %zd bytes",
+                     PY_SSIZE_T_MAX);
+        return -1;
+    }
+
+    if (self->read_func(self, &s, l) < 0)
+        return -1;
+
+    if (!( unicode = PyUnicode_DecodeUTF8(s, l, NULL)))
+        return -1;
+
+    PDATA_PUSH(self->stack, unicode, -1);
+    return 0;
+}
+#endif
+
+
 static int
 load_counted_tuple(Unpicklerobject *self, int len)
 {
@@ -3855,6 +4544,17 @@ load_empty_dict(Unpicklerobject *self)
 }
 
 
+static int
+load_empty_set(Unpicklerobject *self)
+{
+    PyObject *set;
+
+    if (!( set = PySet_New(NULL)))  return -1;
+    PDATA_PUSH(self->stack, set, -1);
+    return 0;
+}
+
+
 static int
 load_list(Unpicklerobject *self)
 {
@@ -3891,6 +4591,21 @@ load_dict(Unpicklerobject *self)
     return 0;
 }
 
+static int
+load_frozenset(Unpicklerobject *self)
+{
+    PyObject *items, *frozenset;
+    Py_ssize_t i;
+
+    if ((i = marker(self)) < 0) return -1;
+    if (!( items = Pdata_popTuple(self->stack, i)))  return -1;
+    frozenset = PyFrozenSet_New(items);
+    Py_DECREF(items);
+    if (!frozenset)  return -1;
+    PDATA_PUSH(self->stack, frozenset, -1);
+    return 0;
+}
+
 static PyObject *
 Instance_New(PyObject *cls, PyObject *args)
 {
@@ -4027,6 +4742,65 @@ load_newobj(Unpicklerobject *self)
     return -1;
 }
 
+static int
+load_newobj_ex(Unpicklerobject *self)
+{
+    PyObject *kwargs = NULL;
+    PyObject *args = NULL;
+    PyObject *clsraw = NULL;
+    PyTypeObject *cls;          /* clsraw cast to its true type */
+    PyObject *obj;
+
+    /* Stack is ... cls argtuple kwargs, and we want to call
+     * cls.__new__(cls, *argtuple, **kwargs).
+     */
+    PDATA_POP(self->stack, kwargs);
+    if (kwargs == NULL) goto Fail;
+    if (! PyDict_Check(kwargs)) {
+        PyErr_SetString(UnpicklingError, "NEWOBJ_EX expected a "
+                                         "keyword argument dict.");
+        goto Fail;
+    }
+
+    PDATA_POP(self->stack, args);
+    if (args == NULL) goto Fail;
+    if (! PyTuple_Check(args)) {
+        PyErr_SetString(UnpicklingError, "NEWOBJ_EX expected an arg "
+                                         "tuple.");
+        goto Fail;
+    }
+
+    PDATA_POP(self->stack, clsraw);
+    cls = (PyTypeObject *)clsraw;
+    if (cls == NULL) goto Fail;
+    if (! PyType_Check(cls)) {
+        PyErr_SetString(UnpicklingError, "NEWOBJ_EX class argument "
+                                         "isn't a type object");
+        goto Fail;
+    }
+    if (cls->tp_new == NULL) {
+        PyErr_SetString(UnpicklingError, "NEWOBJ_EX class argument "
+                                         "has NULL tp_new");
+        goto Fail;
+    }
+
+    /* Call __new__. */
+    obj = cls->tp_new(cls, args, kwargs);
+    if (obj == NULL) goto Fail;
+
+    Py_DECREF(kwargs);
+    Py_DECREF(args);
+    Py_DECREF(clsraw);
+    PDATA_PUSH(self->stack, obj, -1);
+    return 0;
+
+ Fail:
+    Py_XDECREF(kwargs);
+    Py_XDECREF(args);
+    Py_XDECREF(clsraw);
+    return -1;
+}
+
 static int
 load_global(Unpicklerobject *self)
 {
@@ -4058,6 +4832,52 @@ load_global(Unpicklerobject *self)
 }
 
 
+/* Return the str for a STACK_GLOBAL name, which may have been pickled as
+ * a unicode string (as Python 3 does).
+ */
+static PyObject *
+stack_global_name(PyObject *name)
+{
+    if (PyString_Check(name)) {
+        Py_INCREF(name);
+        return name;
+    }
+#ifdef Py_USING_UNICODE
+    if (PyUnicode_Check(name))
+        return PyUnicode_AsUTF8String(name);
+#endif
+    PyErr_SetString(UnpicklingError, "STACK_GLOBAL requires str");
+    return NULL;
+}
+
+static int
+load_stack_global(Unpicklerobject *self)
+{
+    PyObject *class = 0, *module_name = 0, *class_name = 0, *name;
+
+    PDATA_POP(self->stack, name);
+    if (!name)  return -1;
+    class_name = stack_global_name(name);
+    Py_DECREF(name);
+    if (!class_name)  return -1;
+
+    PDATA_POP(self->stack, name);
+    if (name) {
+        module_name = stack_global_name(name);
+        Py_DECREF(name);
+    }
+    if (module_name) {
+        class = find_class(module_name, class_name, self->find_class);
+        Py_DECREF(module_name);
+    }
+    Py_DECREF(class_name);
+
+    if (! class) return -1;
+    PDATA_PUSH(self->stack, class, -1);
+    return 0;
+}
+
+
 static int
 load_persid(Unpicklerobject *self)
 {
@@ -4419,6 +5239,22 @@ load_long_binput(Unpicklerobject *self)
 }
 
 
+static int
+load_memoize(Unpicklerobject *self)
+{
+    PyObject *py_key = 0, *value = 0;
+    Py_ssize_t len;
+
+    if (!( len=self->stack->length ))  return stackUnderflow();
+
+    if (!( py_key = PyInt_FromSsize_t(PyDict_Size(self->memo))))  return -1;
+    value=self->stack->data[len-1];
+    len=PyDict_SetItem(self->memo, py_key, value);
+    Py_DECREF(py_key);
+    return len;
+}
+
+
 static int
 do_append(Unpicklerobject *self, Py_ssize_t  x)
 {
@@ -4528,6 +5364,44 @@ do_setitems(Unpicklerobject *self, Py_ssize_t x)
 }
 
 
+static int
+load_additems(Unpicklerobject *self)
+{
+    PyObject *set, *items, *item, *add_func, *junk;
+    Py_ssize_t mark, len, i;
+
+    if ((mark = marker(self)) < 0) return -1;
+    len = self->stack->length;
+    if (!( len >= mark && mark > 0 ))  return stackUnderflow();
+    if (len == mark)  /* nothing to do */
+        return 0;
+
+    set = self->stack->data[mark - 1];
+
+    if (PySet_Check(set)) {
+        if (!( items = Pdata_popTuple(self->stack, mark)))  return -1;
+        i = _PySet_Update(set, items);
+        Py_DECREF(items);
+        return (int)i;
+    }
+
+    if (!( add_func = PyObject_GetAttrString(set, "add")))  return -1;
+    for (i = mark; i < len; i++) {
+        item = self->stack->data[i];
+        junk = PyObject_CallFunctionObjArgs(add_func, item, NULL);
+        if (!junk) {
+            Pdata_clear(self->stack, mark);
+            Py_DECREF(add_func);
+            return -1;
+        }
+        Py_DECREF(junk);
+    }
+    Pdata_clear(self->stack, mark);
+    Py_DECREF(add_func);
+    return 0;
+}
+
+
 static int
 load_setitem(Unpicklerobject *self)
 {
@@ -4699,6 +5573,92 @@ load_reduce(Unpicklerobject *self)
     return 0;
 }
 
+static int
+load_frame(Unpicklerobject *self)
+{
+    Py_ssize_t frame_len;
+    char *s;
+
+    if (self->read_func(self, &s, 8) < 0)
+        return -1;
+
+    frame_len = calc_binsize(s, 8);
+    if (frame_len < 0) {
+        PyErr_Format(PyExc_OverflowError,
+                     "FRAME length exceeds system's maximum of %zd bytes",
+                     PY_SSIZE_T_MAX);
+        return -1;
+    }
+
+    if (self->read_func == read_frame) {
+        PyErr_SetString(UnpicklingError,
+                        "beginning of a new frame before end of current "
+                        "frame");
+        return -1;
+    }
+
+    /* Real files and cStringIO objects are read from in place, so the
+     * frame can simply be streamed through.  A Python file-like object
+     * is asked for the whole frame at once instead of once per opcode.
+     */
+    if (self->read_func == read_other) {
+        if (read_other(self, &s, frame_len) < 0)
+            return -1;
+        Py_INCREF(self->last_string);
+        Py_XSETREF(self->frame, self->last_string);
+        self->frame_pos = 0;
+        self->read_func = read_frame;
+        self->readline_func = readline_frame;
+    }
+    return 0;
+}
+
+static int
+load_next_buffer(Unpicklerobject *self)
+{
+    PyObject *buf;
+
+    if (self->buffers == NULL) {
+        PyErr_SetString(UnpicklingError,
+                        "pickle stream refers to out-of-band data "
+                        "but no *buffers* argument was given");
+        return -1;
+    }
+    buf = PyIter_Next(self->buffers);
+    if (buf == NULL) {
+        if (!PyErr_Occurred())
+            PyErr_SetString(UnpicklingError,
+                            "not enough out-of-band buffers");
+        return -1;
+    }
+
+    PDATA_PUSH(self->stack, buf, -1);
+    return 0;
+}
+
+static int
+load_readonly_buffer(Unpicklerobject *self)
+{
+    PyObject *obj, *view;
+    Py_ssize_t len;
+
+    if (!( len=self->stack->length ))  return stackUnderflow();
+
+    obj = self->stack->data[len - 1];
+    if (!( view = PyMemoryView_FromObject(obj)))  return -1;
+    if (!PyMemoryView_GET_BUFFER(view)->readonly) {
+        /* Hand out a read-only view of the writable original */
+        PyMemoryView_GET_BUFFER(view)->readonly = 1;
+        self->stack->data[len - 1] = view;
+        Py_DECREF(obj);
+    }
+    else {
+        /* Already read-only, keep it */
+        Py_DECREF(view);
+    }
+    return 0;
+}
+
 /* Just raises an error if we don't know the protocol specified.  PROTO
  * is the first opcode for protocols >= 2.
  */
@@ -5002,6 +5962,84 @@ load(Unpicklerobject *self)
                 break;
             continue;
 
+        case SHORT_BINBYTES:
+            if (load_counted_binbytes(self, 1) < 0)
+                break;
+            continue;
+
+        case BINBYTES:
+            if (load_counted_binbytes(self, 4) < 0)
+                break;
+            continue;
+
+        case BINBYTES8:
+            if (load_counted_binbytes(self, 8) < 0)
+                break;
+            continue;
+
+        case BYTEARRAY8:
+            if (load_bytearray8(self) < 0)
+                break;
+            continue;
+
+#ifdef Py_USING_UNICODE
+        case SHORT_BINUNICODE:
+            if (load_counted_binunicode(self, 1) < 0)
+                break;
+            continue;
+
+        case BINUNICODE8:
+            if (load_counted_binunicode(self, 8) < 0)
+                break;
+            continue;
+
+#endif
+
+        case EMPTY_SET:
+            if (load_empty_set(self) < 0)
+                break;
+            continue;
+
+        case ADDITEMS:
+            if (load_additems(self) < 0)
+                break;
+            continue;
+
+        case FROZENSET:
+            if (load_frozenset(self) < 0)
+                break;
+            continue;
+
+        case NEWOBJ_EX:
+            if (load_newobj_ex(self) < 0)
+                break;
+            continue;
+
+        case STACK_GLOBAL:
+            if (load_stack_global(self) < 0)
+                break;
+            continue;
+
+        case MEMOIZE:
+            if (load_memoize(self) < 0)
+                break;
+            continue;
+
+        case FRAME:
+            if (load_frame(self) < 0)
+                break;
+            continue;
+
+        case NEXT_BUFFER:
+            if (load_next_buffer(self) < 0)
+                break;
+            continue;
+
+        case READONLY_BUFFER:
+            if (load_readonly_buffer(self) < 0)
+                break;
+            continue;
+
         case '\0':
             /* end of file */
             PyErr_SetNone(PyExc_EOFError);
@@ -5073,6 +6111,35 @@ noload_newobj(Unpicklerobject *self)
     return 0;
 }
 
+static int
+noload_newobj_ex(Unpicklerobject *self)
+{
+    if (self->stack->length < 3) return stackUnderflow();
+    Pdata_clear(self->stack, self->stack->length-3);
+    PDATA_APPEND(self->stack, Py_None, -1);
+    return 0;
+}
+
+static int
+noload_stack_global(Unpicklerobject *self)
+{
+    if (self->stack->length < 2) return stackUnderflow();
+    Pdata_clear(self->stack, self->stack->length-2);
+    PDATA_APPEND(self->stack, Py_None, -1);
+    return 0;
+}
+
+static int
+noload_frozenset(Unpicklerobject *self)
+{
+    Py_ssize_t i;
+
+    if ((i = marker(self)) < 0) return -1;
+    Pdata_clear(self->stack, i);
+    PDATA_APPEND(self->stack, Py_None, -1);
+    return 0;
+}
+
 static int
 noload_global(Unpicklerobject *self)
 {
@@ -5419,6 +6486,82 @@ noload(Unpicklerobject *self)
             if (load_bool(self, Py_False) < 0)
                 break;
             continue;
+
+        case SHORT_BINBYTES:
+            if (load_counted_binbytes(self, 1) < 0)
+                break;
+            continue;
+
+        case BINBYTES:
+            if (load_counted_binbytes(self, 4) < 0)
+                break;
+            continue;
+
+        case BINBYTES8:
+            if (load_counted_binbytes(self, 8) < 0)
+                break;
+            continue;
+
+        case BYTEARRAY8:
+            if (load_bytearray8(self) < 0)
+                break;
+            continue;
+
+#ifdef Py_USING_UNICODE
+        case SHORT_BINUNICODE:
+            if (load_counted_binunicode(self, 1) < 0)
+                break;
+            continue;
+
+        case BINUNICODE8:
+            if (load_counted_binunicode(self, 8) < 0)
+                break;
+            continue;
+
+#endif
+
+        case EMPTY_SET:
+            if (load_empty_set(self) < 0)
+                break;
+            continue;
+
+        case ADDITEMS:
+            if (noload_appends(self) < 0)
+                break;
+            continue;
+
+        case FROZENSET:
+            if (noload_frozenset(self) < 0)
+                break;
+            continue;
+
+        case NEWOBJ_EX:
+            if (noload_newobj_ex(self) < 0)
+                break;
+            continue;
+
+        case STACK_GLOBAL:
+            if (noload_stack_global(self) < 0)
+                break;
+            continue;
+
+        case MEMOIZE:
+            if (load_memoize(self) < 0)
+                break;
+            continue;
+
+        case FRAME:
+            if (load_frame(self) < 0)
+                break;
+            continue;
+
+        case NEXT_BUFFER:
+            if (load_none(self) < 0)
+                break;
+            continue;
+
+        case READONLY_BUFFER:
+            continue;
         default:
             cPickle_ErrFormat(UnpicklingError,
                               "invalid load key, '%s'.",
@@ -5472,7 +6615,7 @@ static struct PyMethodDef Unpickler_methods[] = {
 
 
 static Unpicklerobject *
-newUnpicklerobject(PyObject *f)
+newUnpicklerobject(PyObject *f, PyObject *buffers)
 {
     Unpicklerobject *self;
 
@@ -5491,10 +6634,18 @@ newUnpicklerobject(PyObject *f)
     self->read = NULL;
     self->readline = NULL;
     self->find_class = NULL;
+    self->buffers = NULL;
+    self->frame = NULL;
+    self->frame_pos = 0;
 
     if (!( self->memo = PyDict_New()))
         goto err;
 
+    if (buffers != NULL && buffers != Py_None) {
+        if (!( self->buffers = PyObject_GetIter(buffers)))
+            goto err;
+    }
+
     if (!self->stack)
         goto err;
 
@@ -5543,9 +6694,15 @@ newUnpicklerobject(PyObject *f)
 
 
 static PyObject *
-get_Unpickler(PyObject *self, PyObject *file)
+get_Unpickler(PyObject *self, PyObject *args, PyObject *kwds)
 {
-    return (PyObject *)newUnpicklerobject(file);
+    static char *kwlist[] = {"file", "buffers", NULL};
+    PyObject *file, *buffers = NULL;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O:Unpickler", kwlist,
+                                     &file, &buffers))
+        return NULL;
+    return (PyObject *)newUnpicklerobject(file, buffers);
 }
 
 
@@ -5562,6 +6719,8 @@ Unpickler_dealloc(Unpicklerobject *self)
     Py_XDECREF(self->arg);
     Py_XDECREF(self->last_string);
     Py_XDECREF(self->find_class);
+    Py_XDECREF(self->buffers);
+    Py_XDECREF(self->frame);
 
     if (self->marks) {
         free(self->marks);
@@ -5586,6 +6745,8 @@ Unpickler_traverse(Unpicklerobject *self, visitproc visit, void *arg)
     Py_VISIT(self->arg);
     Py_VISIT(self->last_string);
     Py_VISIT(self->find_class);
+    Py_VISIT(self->buffers);
+    Py_VISIT(self->frame);
     return 0;
 }
 
@@ -5601,6 +6762,8 @@ Unpickler_clear(Unpicklerobject *self)
     Py_CLEAR(self->arg);
     Py_CLEAR(self->last_string);
     Py_CLEAR(self->find_class);
+    Py_CLEAR(self->buffers);
+    Py_CLEAR(self->frame);
     return 0;
 }
 
@@ -5687,20 +6850,21 @@ Unpickler_setattr(Unpicklerobject *self, char *name, PyObject *value)
  * Module-level functions.
  */
 
-/* dump(obj, file, protocol=0). */
+/* dump(obj, file, protocol=0, buffer_callback=None). */
 static PyObject *
 cpm_dump(PyObject *self, PyObject *args, PyObject *kwds)
 {
-    static char *kwlist[] = {"obj", "file", "protocol", NULL};
-    PyObject *ob, *file, *res = NULL;
+    static char *kwlist[] = {"obj", "file", "protocol", "buffer_callback",
+                             NULL};
+    PyObject *ob, *file, *buffer_callback = NULL, *res = NULL;
     Picklerobject *pickler = 0;
     int proto = 0;
 
-    if (!( PyArg_ParseTupleAndKeywords(args, kwds, "OO|i", kwlist,
-               &ob, &file, &proto)))
+    if (!( PyArg_ParseTupleAndKeywords(args, kwds, "OO|iO", kwlist,
+               &ob, &file, &proto, &buffer_callback)))
         goto finally;
 
-    if (!( pickler = newPicklerobject(file, proto)))
+    if (!( pickler = newPicklerobject(file, proto, buffer_callback)))
         goto finally;
 
     if (dump(pickler, ob) < 0)
@@ -5716,23 +6880,23 @@ cpm_dump(PyObject *self, PyObject *args, PyObject *kwds)
 }
 
 
-/* dumps(obj, protocol=0). */
+/* dumps(obj, protocol=0, buffer_callback=None). */
 static PyObject *
 cpm_dumps(PyObject *self, PyObject *args, PyObject *kwds)
 {
-    static char *kwlist[] = {"obj", "protocol", NULL};
-    PyObject *ob, *file = 0, *res = NULL;
+    static char *kwlist[] = {"obj", "protocol", "buffer_callback", NULL};
+    PyObject *ob, *file = 0, *buffer_callback = NULL, *res = NULL;
     Picklerobject *pickler = 0;
     int proto = 0;
 
-    if (!( PyArg_ParseTupleAndKeywords(args, kwds, "O|i:dumps", kwlist,
-               &ob, &proto)))
+    if (!( PyArg_ParseTupleAndKeywords(args, kwds, "O|iO:dumps", kwlist,
+               &ob, &proto, &buffer_callback)))
         goto finally;
 
     if (!( file = PycStringIO->NewOutput(128)))
         goto finally;
 
-    if (!( pickler = newPicklerobject(file, proto)))
+    if (!( pickler = newPicklerobject(file, proto, buffer_callback)))
         goto finally;
 
     if (dump(pickler, ob) < 0)
@@ -5748,14 +6912,19 @@ cpm_dumps(PyObject *self, PyObject *args, PyObject *kwds)
 }
 
 
-/* load(fileobj). */
+/* load(fileobj, buffers=None). */
 static PyObject *
-cpm_load(PyObject *self, PyObject *ob)
+cpm_load(PyObject *self, PyObject *args, PyObject *kwds)
 {
+    static char *kwlist[] = {"file", "buffers", NULL};
     Unpicklerobject *unpickler = 0;
-    PyObject *res = NULL;
+    PyObject *ob, *buffers = NULL, *res = NULL;
 
-    if (!( unpickler = newUnpicklerobject(ob)))
+    if (!( PyArg_ParseTupleAndKeywords(args, kwds, "O|O:load", kwlist,
+               &ob, &buffers)))
+        goto finally;
+
+    if (!( unpickler = newUnpicklerobject(ob, buffers)))
         goto finally;
 
     res = load(unpickler);
@@ -5767,20 +6936,22 @@ cpm_load(PyObject *self, PyObject *ob)
 }
 
 
-/* loads(string) */
+/* loads(string, buffers=None) */
 static PyObject *
-cpm_loads(PyObject *self, PyObject *args)
+cpm_loads(PyObject *self, PyObject *args, PyObject *kwds)
 {
-    PyObject *ob, *file = 0, *res = NULL;
+    static char *kwlist[] = {"string", "buffers", NULL};
+    PyObject *ob, *file = 0, *buffers = NULL, *res = NULL;
     Unpicklerobject *unpickler = 0;
 
-    if (!( PyArg_ParseTuple(args, "S:loads", &ob)))
+    if (!( PyArg_ParseTupleAndKeywords(args, kwds, "S|O:loads", kwlist,
+               &ob, &buffers)))
         goto finally;
 
     if (!( file = PycStringIO->NewInput(ob)))
         goto finally;
 
-    if (!( unpickler = newUnpicklerobject(file)))
+    if (!( unpickler = newUnpicklerobject(file, buffers)))
         goto finally;
 
     res = load(unpickler);
@@ -5824,31 +6995,33 @@ static PyTypeObject Unpicklertype = {
 
 static struct PyMethodDef cPickle_methods[] = {
   {"dump",         (PyCFunction)cpm_dump,         METH_VARARGS | METH_KEYWORDS,
-   PyDoc_STR("dump(obj, file, protocol=0) -- "
+   PyDoc_STR("dump(obj, file, protocol=0, buffer_callback=None) -- "
    "Write an object in pickle format to the given file.\n"
    "\n"
-   "See the Pickler docstring for the meaning of optional argument proto.")
+   "See the Pickler docstring for the meaning of optional arguments.")
   },
 
   {"dumps",        (PyCFunction)cpm_dumps,        METH_VARARGS | METH_KEYWORDS,
-   PyDoc_STR("dumps(obj, protocol=0) -- "
+   PyDoc_STR("dumps(obj, protocol=0, buffer_callback=None) -- "
    "Return a string containing an object in pickle format.\n"
    "\n"
-   "See the Pickler docstring for the meaning of optional argument proto.")
+   "See the Pickler docstring for the meaning of optional arguments.")
   },
 
-  {"load",         (PyCFunction)cpm_load,         METH_O,
-   PyDoc_STR("load(file) -- Load a pickle from the given file")},
+  {"load",         (PyCFunction)cpm_load,         METH_VARARGS | METH_KEYWORDS,
+   PyDoc_STR("load(file, buffers=None) -- Load a pickle from the given file")},
 
-  {"loads",        (PyCFunction)cpm_loads,        METH_VARARGS,
-   PyDoc_STR("loads(string) -- Load a pickle from the given string")},
+  {"loads",        (PyCFunction)cpm_loads,        METH_VARARGS | METH_KEYWORDS,
+   PyDoc_STR("loads(string, buffers=None) -- "
+   "Load a pickle from the given string")},
 
   {"Pickler",      (PyCFunction)get_Pickler,      METH_VARARGS | METH_KEYWORDS,
-   PyDoc_STR("Pickler(file, protocol=0) -- Create a pickler.\n"
+   PyDoc_STR("Pickler(file, protocol=0, buffer_callback=None) -- "
+   "Create a pickler.\n"
    "\n"
    "This takes a file-like object for writing a pickle data stream.\n"
    "The optional proto argument tells the pickler to use the given\n"
-   "protocol; supported protocols are 0, 1, 2.  The default\n"
+   "protocol; supported protocols are 0 to 5.  The default\n"
    "protocol is 0, to be backwards compatible.  (Protocol 0 is the\n"
    "only protocol that can be written to a file opened in text\n"
    "mode and read back successfully.  When using a protocol higher\n"
@@ -5856,7 +7029,9 @@ static struct PyMethodDef cPickle_methods[] = {
    "pickling and unpickling.)\n"
    "\n"
    "Protocol 1 is more efficient than protocol 0; protocol 2 is\n"
-   "more efficient than protocol 1.\n"
+   "more efficient than protocol 1.  Protocol 4 adds framing, for\n"
+   "fewer and larger writes, and support for very large objects.\n"
+   "Protocol 5 adds out-of-band data for PickleBuffer objects.\n"
    "\n"
    "Specifying a negative protocol version selects the highest\n"
    "protocol version supported.  The higher the protocol used, the\n"
@@ -5865,11 +7040,19 @@ static struct PyMethodDef cPickle_methods[] = {
    "\n"
    "The file parameter must have a write() method that accepts a single\n"
    "string argument.  It can thus be an open file object, a StringIO\n"
-   "object, or any other custom object that meets this interface.\n")
+   "object, or any other custom object that meets this interface.\n"
+   "\n"
+   "If buffer_callback is given (protocol 5 only), it is called with\n"
+   "each PickleBuffer being pickled.  When it returns a false value,\n"
+   "the buffer's data is left out of the pickle stream, and has to be\n"
+   "passed to the Unpickler's buffers argument by other means.\n")
   },
 
-  {"Unpickler",    (PyCFunction)get_Unpickler,    METH_O,
-   PyDoc_STR("Unpickler(file) -- Create an unpickler.")},
+  {"Unpickler",    (PyCFunction)get_Unpickler,    METH_VARARGS | METH_KEYWORDS,
+   PyDoc_STR("Unpickler(file, buffers=None) -- Create an unpickler.\n"
+   "\n"
+   "buffers, if given, is an iterable supplying the out-of-band\n"
+   "buffers referred to by the pickle stream, in order.\n")},
 
   { NULL, NULL }
 };
@@ -6057,16 +7240,24 @@ initcPickle(void)
     if (i < 0)
         return;
 
+    Py_INCREF(&PyPickleBuffer_Type);
+    if (PyModule_AddObject(m, "PickleBuffer",
+                           (PyObject *)&PyPickleBuffer_Type) < 0)
+        return;
+
     /* These are purely informational; no code uses them. */
     /* File format version we write. */
-    format_version = PyString_FromString("2.0");
+    format_version = PyString_FromString("5.0");
     /* Format versions we can read. */
-    compatible_formats = Py_BuildValue("[sssss]",
+    compatible_formats = Py_BuildValue("[ssssssss]",
         "1.0",          /* Original protocol 0 */
         "1.1",          /* Protocol 0 + INST */
         "1.2",          /* Original protocol 1 */
         "1.3",          /* Protocol 1 + BINFLOAT */
-        "2.0");         /* Original protocol 2 */
+        "2.0",          /* Original protocol 2 */
+        "3.0",          /* Protocol 3 */
+        "4.0",          /* Protocol 4 */
+        "5.0");         /* Protocol 5 */
     PyDict_SetItemString(d, "format_version", format_version);
     PyDict_SetItemString(d, "compatible_formats", compatible_formats);
     Py_XDECREF(format_version);
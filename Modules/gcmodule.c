@@ -49,6 +49,12 @@ static struct gc_generation generations[NUM_GENERATIONS] = {
 
 PyGC_Head *_PyGC_generation0 = GEN_HEAD(0);
 
+/* Objects moved here by gc.freeze() are never examined by a collection, so
+   processes forked after the freeze don't write to their GC headers. */
+static struct gc_generation permanent_generation = {
+    {{&permanent_generation.head, &permanent_generation.head, 0}}, 0, 0
+};
+
 static int enabled = 1; /* automatic collection enabled? */
 
 /* true if we are currently running the collector */
@@ -1341,6 +1347,63 @@ gc_is_tracked(PyObject *self, PyObject *obj)
     return result;
 }
 
+PyDoc_STRVAR(gc_freeze__doc__,
+"freeze() -> None\n"
+"\n"
+"Freeze all current tracked objects and ignore them for future collections.\n"
+"\n"
+"This can be used before a fork to make the gc copy-on-write friendly.\n"
+"Note: collection before a fork may free pages for future allocation\n"
+"thereby causing copy-on-write.\n"
+);
+
+static void
+freeze_generations(void)
+{
+    int i;
+
+    for (i = 0; i < NUM_GENERATIONS; i++) {
+        gc_list_merge(GEN_HEAD(i), &permanent_generation.head);
+        generations[i].count = 0;
+    }
+}
+
+static PyObject *
+gc_freeze(PyObject *self, PyObject *noargs)
+{
+    freeze_generations();
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+PyDoc_STRVAR(gc_unfreeze__doc__,
+"unfreeze() -> None\n"
+"\n"
+"Unfreeze all objects in the permanent generation.\n"
+"\n"
+"Put all objects in the permanent generation back into oldest generation.\n"
+);
+
+static PyObject *
+gc_unfreeze(PyObject *self, PyObject *noargs)
+{
+    gc_list_merge(&permanent_generation.head, GEN_HEAD(NUM_GENERATIONS-1));
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+PyDoc_STRVAR(gc_get_freeze_count__doc__,
+"get_freeze_count() -> int\n"
+"\n"
+"Return the number of objects in the permanent generation.\n"
+);
+
+static PyObject *
+gc_get_freeze_count(PyObject *self, PyObject *noargs)
+{
+    return PyInt_FromSsize_t(gc_list_size(&permanent_generation.head));
+}
+
 
 PyDoc_STRVAR(gc__doc__,
 "This module provides access to the garbage collector for reference cycles.\n"
@@ -1357,7 +1420,10 @@ PyDoc_STRVAR(gc__doc__,
 "get_objects() -- Return a list of all objects tracked by the collector.\n"
 "is_tracked() -- Returns true if a given object is tracked.\n"
 "get_referrers() -- Return the list of objects that refer to an object.\n"
-"get_referents() -- Return the list of objects that an object refers to.\n");
+"get_referents() -- Return the list of objects that an object refers to.\n"
+"freeze() -- Freeze all tracked objects and ignore them for future collections.\n"
+"unfreeze() -- Unfreeze all objects in the permanent generation.\n"
+"get_freeze_count() -- Return the number of objects in the permanent generation.\n");
 
 static PyMethodDef GcMethods[] = {
     {"enable",             gc_enable,     METH_NOARGS,  gc_enable__doc__},
@@ -1376,6 +1442,10 @@ static PyMethodDef GcMethods[] = {
         gc_get_referrers__doc__},
     {"get_referents",  gc_get_referents, METH_VARARGS,
         gc_get_referents__doc__},
+    {"freeze",         gc_freeze,     METH_NOARGS,  gc_freeze__doc__},
+    {"unfreeze",       gc_unfreeze,   METH_NOARGS,  gc_unfreeze__doc__},
+    {"get_freeze_count", gc_get_freeze_count, METH_NOARGS,
+        gc_get_freeze_count__doc__},
     {NULL,      NULL}           /* Sentinel */
 };
 
@@ -1444,6 +1514,54 @@ PyGC_Collect(void)
     return n;
 }
 
+#ifdef Py_IMMORTAL_OBJECTS
+static int
+visit_immortalize(PyObject *op, Py_ssize_t *count)
+{
+    traverseproc traverse;
+
+    if (_Py_IsImmortal(op))
+        return 0;
+    _Py_SetImmortal(op);
+    (*count)++;
+    /* Untracked containers (e.g. tuples of constants) are in no list, so
+       their contents can only be reached through them. */
+    if (PyObject_IS_GC(op) && !IS_TRACKED(op)) {
+        traverse = Py_TYPE(op)->tp_traverse;
+        if (traverse != NULL)
+            traverse(op, (visitproc)visit_immortalize, count);
+    }
+    return 0;
+}
+
+/* Move every tracked object into the permanent generation and make it
+   immortal, along with everything it refers to, the interned strings and
+   the static singletons.  Return the number of objects made immortal. */
+Py_ssize_t
+_PyGC_ImmortalizeHeap(void)
+{
+    PyGC_Head *gc;
+    PyObject *op;
+    Py_ssize_t n = 0;
+
+    freeze_generations();
+    for (gc = permanent_generation.head.gc.gc_next;
+         gc != &permanent_generation.head;
+         gc = gc->gc.gc_next) {
+        op = FROM_GC(gc);
+        visit_immortalize(op, &n);
+        Py_TYPE(op)->tp_traverse(op, (visitproc)visit_immortalize, &n);
+    }
+    visit_immortalize(Py_None, &n);
+    visit_immortalize(Py_True, &n);
+    visit_immortalize(Py_False, &n);
+    visit_immortalize(Py_Ellipsis, &n);
+    visit_immortalize(Py_NotImplemented, &n);
+    n += _PyString_ImmortalizeInterned();
+    return n;
+}
+#endif /* Py_IMMORTAL_OBJECTS */
+
 /* for debugging */
 void
 _PyGC_Dump(PyGC_Head *g)
@@ -110,6 +110,7 @@ typedef struct {
 #endif
 
     access_mode access;
+    Py_ssize_t exports;     /* buffers exported via bf_getbuffer */
 } mmap_object;
 
 
@@ -143,6 +144,11 @@ mmap_object_dealloc(mmap_object *m_obj)
 static PyObject *
 mmap_close_method(mmap_object *self, PyObject *unused)
 {
+    if (self->exports > 0) {
+        PyErr_SetString(PyExc_BufferError, "cannot close "\
+                        "exported pointers exist");
+        return NULL;
+    }
 #ifdef MS_WINDOWS
     /* For each resource we maintain, we need to check
        the value is valid, and if so, free the resource
@@ -447,6 +453,11 @@ mmap_resize_method(mmap_object *self,
         !is_resizeable(self)) {
         return NULL;
     }
+    if (self->exports > 0) {
+        PyErr_SetString(PyExc_BufferError,
+                        "mmap can't resize with extant buffers exported.");
+        return NULL;
+    }
     if (new_size < 0 || PY_SSIZE_T_MAX - new_size < self->offset) {
         PyErr_SetString(PyExc_ValueError, "new size out of range");
         return NULL;
@@ -728,6 +739,26 @@ mmap_buffer_getcharbuffer(mmap_object *self, Py_ssize_t index, const void **ptr)
     return self->size;
 }
 
+/* The new buffer interface keeps track of the exported buffers, so that the
+   memory can't be unmapped or moved while a memoryview still refers to it. */
+
+static int
+mmap_buffer_getbuf(mmap_object *self, Py_buffer *view, int flags)
+{
+    CHECK_VALID(-1);
+    if (PyBuffer_FillInfo(view, (PyObject*)self, self->data, self->size,
+                          (self->access == ACCESS_READ), flags) < 0)
+        return -1;
+    self->exports++;
+    return 0;
+}
+
+static void
+mmap_buffer_releasebuf(mmap_object *self, Py_buffer *view)
+{
+    self->exports--;
+}
+
 static Py_ssize_t
 mmap_length(mmap_object *self)
 {
@@ -994,6 +1025,8 @@ static PyBufferProcs mmap_as_buffer = {
     (writebufferproc)mmap_buffer_getwritebuf,
     (segcountproc)mmap_buffer_getsegcount,
     (charbufferproc)mmap_buffer_getcharbuffer,
+    (getbufferproc)mmap_buffer_getbuf,
+    (releasebufferproc)mmap_buffer_releasebuf,
 };
 
 static PyObject *
@@ -1044,7 +1077,8 @@ static PyTypeObject mmap_object_type = {
     PyObject_GenericGetAttr,                    /*tp_getattro*/
     0,                                          /*tp_setattro*/
     &mmap_as_buffer,                            /*tp_as_buffer*/
-    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GETCHARBUFFER,                   /*tp_flags*/
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GETCHARBUFFER |
+        Py_TPFLAGS_HAVE_NEWBUFFER,              /*tp_flags*/
     mmap_doc,                                   /*tp_doc*/
     0,                                          /* tp_traverse */
     0,                                          /* tp_clear */
@@ -1180,6 +1214,7 @@ new_mmap_object(PyTypeObject *type, PyObject *args, PyObject *kwdict)
     m_obj = (mmap_object *)type->tp_alloc(type, 0);
     if (m_obj == NULL) {return NULL;}
     m_obj->data = NULL;
+    m_obj->exports = 0;
     m_obj->size = map_size;
     m_obj->pos = 0;
     m_obj->offset = offset;
@@ -1324,6 +1359,7 @@ new_mmap_object(PyTypeObject *type, PyObject *args, PyObject *kwdict)
     /* Set every field to an invalid marker, so we can safely
        destruct the object in the face of failure */
     m_obj->data = NULL;
+    m_obj->exports = 0;
     m_obj->file_handle = INVALID_HANDLE_VALUE;
     m_obj->map_handle = NULL;
     m_obj->tagname = NULL;
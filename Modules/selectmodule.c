@@ -736,6 +736,9 @@ static int select_have_broken_poll(void)
 typedef struct {
     PyObject_HEAD
     SOCKET epfd;                        /* epoll control file descriptor */
+    struct epoll_event *evs;            /* event buffer reused by poll() */
+    int evs_size;                       /* allocated length of evs */
+    int evs_busy;                       /* evs is in use by another thread */
 } pyEpoll_Object;
 
 static PyTypeObject pyEpoll_Type;
@@ -783,6 +786,10 @@ newPyEpoll_Object(PyTypeObject *type, int sizehint, SOCKET fd)
     if (self == NULL)
         return NULL;
 
+    self->evs = NULL;
+    self->evs_size = 0;
+    self->evs_busy = 0;
+
     if (fd == -1) {
         Py_BEGIN_ALLOW_THREADS
         self->epfd = epoll_create(sizehint);
@@ -818,6 +825,7 @@ static void
 pyepoll_dealloc(pyEpoll_Object *self)
 {
     (void)pyepoll_internal_close(self);
+    PyMem_Free(self->evs);
     Py_TYPE(self)->tp_free(self);
 }
 
@@ -990,23 +998,31 @@ PyDoc_STRVAR(pyepoll_unregister_doc,
 \n\
 fd is the target file descriptor of the operation.");
 
-static PyObject *
-pyepoll_poll(pyEpoll_Object *self, PyObject *args, PyObject *kwds)
+static void
+pyepoll_release_events(pyEpoll_Object *self, struct epoll_event *evs)
 {
-    double dtimeout = -1.;
-    int timeout;
-    int maxevents = -1;
-    int nfds, i;
-    PyObject *elist = NULL, *etuple = NULL;
-    struct epoll_event *evs = NULL;
-    static char *kwlist[] = {"timeout", "maxevents", NULL};
+    if (evs == self->evs)
+        self->evs_busy = 0;
+    else
+        PyMem_Free(evs);
+}
 
-    if (self->epfd < 0)
-        return pyepoll_err_closed();
+/* Wait for events and return their number, or -1 with an exception set.
+   On success *pevs points to the events, which must be handed back to
+   pyepoll_release_events().  The buffer is kept on the object so that a
+   busy event loop doesn't allocate one per call; a second thread polling
+   the same object concurrently gets a private buffer instead. */
+static int
+pyepoll_internal_wait(pyEpoll_Object *self, double dtimeout, int maxevents,
+                      struct epoll_event **pevs)
+{
+    int timeout;
+    int nfds;
+    struct epoll_event *evs;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|di:poll", kwlist,
-                                     &dtimeout, &maxevents)) {
-        return NULL;
+    if (self->epfd < 0) {
+        pyepoll_err_closed();
+        return -1;
     }
 
     if (dtimeout < 0) {
@@ -1015,7 +1031,7 @@ pyepoll_poll(pyEpoll_Object *self, PyObject *args, PyObject *kwds)
     else if (dtimeout * 1000.0 > INT_MAX) {
         PyErr_SetString(PyExc_OverflowError,
                         "timeout is too large");
-        return NULL;
+        return -1;
     }
     else {
         timeout = (int)(dtimeout * 1000.0);
@@ -1028,14 +1044,29 @@ pyepoll_poll(pyEpoll_Object *self, PyObject *args, PyObject *kwds)
         PyErr_Format(PyExc_ValueError,
                      "maxevents must be greater than 0, got %d",
                      maxevents);
-        return NULL;
+        return -1;
     }
 
-    evs = PyMem_New(struct epoll_event, maxevents);
-    if (evs == NULL) {
-        Py_DECREF(self);
-        PyErr_NoMemory();
-        return NULL;
+    if (self->evs_busy) {
+        evs = PyMem_New(struct epoll_event, maxevents);
+        if (evs == NULL) {
+            PyErr_NoMemory();
+            return -1;
+        }
+    }
+    else {
+        if (maxevents > self->evs_size) {
+            evs = self->evs;
+            PyMem_Resize(evs, struct epoll_event, maxevents);
+            if (evs == NULL) {
+                PyErr_NoMemory();
+                return -1;
+            }
+            self->evs = evs;
+            self->evs_size = maxevents;
+        }
+        evs = self->evs;
+        self->evs_busy = 1;
     }
 
     Py_BEGIN_ALLOW_THREADS
@@ -1043,8 +1074,31 @@ pyepoll_poll(pyEpoll_Object *self, PyObject *args, PyObject *kwds)
     Py_END_ALLOW_THREADS
     if (nfds < 0) {
         PyErr_SetFromErrno(PyExc_IOError);
-        goto error;
+        pyepoll_release_events(self, evs);
+        return -1;
     }
+    *pevs = evs;
+    return nfds;
+}
+
+static PyObject *
+pyepoll_poll(pyEpoll_Object *self, PyObject *args, PyObject *kwds)
+{
+    double dtimeout = -1.;
+    int maxevents = -1;
+    int nfds, i;
+    PyObject *elist = NULL, *etuple = NULL;
+    struct epoll_event *evs = NULL;
+    static char *kwlist[] = {"timeout", "maxevents", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|di:poll", kwlist,
+                                     &dtimeout, &maxevents)) {
+        return NULL;
+    }
+
+    nfds = pyepoll_internal_wait(self, dtimeout, maxevents, &evs);
+    if (nfds < 0)
+        return NULL;
 
     elist = PyList_New(nfds);
     if (elist == NULL) {
@@ -1061,7 +1115,7 @@ pyepoll_poll(pyEpoll_Object *self, PyObject *args, PyObject *kwds)
     }
 
     error:
-    PyMem_Free(evs);
+    pyepoll_release_events(self, evs);
     return elist;
 }
 
@@ -1072,6 +1126,90 @@ Wait for events on the epoll file descriptor for a maximum time of timeout\n\
 in seconds (as float). -1 makes poll wait indefinitely.\n\
 Up to maxevents are returned to the caller.");
 
+/* Mirror selectors.EVENT_READ and selectors.EVENT_WRITE. */
+#define SELECTOR_EVENT_READ  (1 << 0)
+#define SELECTOR_EVENT_WRITE (1 << 1)
+
+static PyObject *
+pyepoll_poll_keys(pyEpoll_Object *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *fd_to_key;
+    double dtimeout = -1.;
+    int maxevents = -1;
+    int nfds, i;
+    Py_ssize_t count = 0;
+    PyObject *elist = NULL;
+    struct epoll_event *evs = NULL;
+    static char *kwlist[] = {"fd_to_key", "timeout", "maxevents", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O!|di:_poll_keys", kwlist,
+                                     &PyDict_Type, &fd_to_key,
+                                     &dtimeout, &maxevents)) {
+        return NULL;
+    }
+
+    nfds = pyepoll_internal_wait(self, dtimeout, maxevents, &evs);
+    if (nfds < 0)
+        return NULL;
+
+    elist = PyList_New(nfds);
+    if (elist == NULL) {
+        goto error;
+    }
+
+    for (i = 0; i < nfds; i++) {
+        PyObject *fd, *key, *etuple;
+        unsigned int event = evs[i].events;
+        long events = 0, key_events;
+
+        if (event & ~EPOLLIN)
+            events |= SELECTOR_EVENT_WRITE;
+        if (event & ~EPOLLOUT)
+            events |= SELECTOR_EVENT_READ;
+
+        fd = PyInt_FromLong(evs[i].data.fd);
+        if (fd == NULL)
+            goto fail;
+        key = PyDict_GetItem(fd_to_key, fd);
+        Py_DECREF(fd);
+        if (key == NULL)
+            continue;
+        if (!PyTuple_Check(key) || PyTuple_GET_SIZE(key) < 3) {
+            PyErr_SetString(PyExc_TypeError,
+                            "fd_to_key values must be SelectorKey tuples");
+            goto fail;
+        }
+        key_events = PyInt_AsLong(PyTuple_GET_ITEM(key, 2));
+        if (key_events == -1 && PyErr_Occurred())
+            goto fail;
+
+        etuple = Py_BuildValue("(Ol)", key, events & key_events);
+        if (etuple == NULL)
+            goto fail;
+        PyList_SET_ITEM(elist, count, etuple);
+        count++;
+    }
+
+    /* Drop the unused tail of the preallocated list. */
+    if (count < nfds && PyList_SetSlice(elist, count, nfds, NULL) < 0)
+        goto fail;
+
+    error:
+    pyepoll_release_events(self, evs);
+    return elist;
+
+    fail:
+    Py_CLEAR(elist);
+    goto error;
+}
+
+PyDoc_STRVAR(pyepoll_poll_keys_doc,
+"_poll_keys(fd_to_key[, timeout=-1[, maxevents=-1]]) -> [(key, events), ...]\n\
+\n\
+Helper for selectors.EpollSelector.select(): like poll(), but translate\n\
+the ready events into selector events, look each fd up in the fd_to_key\n\
+dict and mask the events with those of its key.  Unknown fds are skipped.");
+
 static PyMethodDef pyepoll_methods[] = {
     {"fromfd",          (PyCFunction)pyepoll_fromfd,
      METH_VARARGS | METH_CLASS, pyepoll_fromfd_doc},
@@ -1087,6 +1225,8 @@ static PyMethodDef pyepoll_methods[] = {
      METH_VARARGS | METH_KEYWORDS,      pyepoll_unregister_doc},
     {"poll",            (PyCFunction)pyepoll_poll,
      METH_VARARGS | METH_KEYWORDS,      pyepoll_poll_doc},
+    {"_poll_keys",      (PyCFunction)pyepoll_poll_keys,
+     METH_VARARGS | METH_KEYWORDS,      pyepoll_poll_keys_doc},
     {NULL,      NULL},
 };
 
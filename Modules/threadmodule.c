@@ -41,22 +41,55 @@ lock_dealloc(lockobject *self)
 }
 
 static PyObject *
-lock_PyThread_acquire_lock(lockobject *self, PyObject *args)
+lock_PyThread_acquire_lock(lockobject *self, PyObject *args, PyObject *kwds)
 {
-    int i = 1;
+    static char *kwlist[] = {"blocking", "timeout", NULL};
+    int blocking = 1;
+    double timeout = -1;
+    PY_TIMEOUT_T microseconds;
+    int r;
 
-    if (!PyArg_ParseTuple(args, "|i:acquire", &i))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|id:acquire", kwlist,
+                                     &blocking, &timeout))
         return NULL;
 
-    Py_BEGIN_ALLOW_THREADS
-    i = PyThread_acquire_lock(self->lock_lock, i);
-    Py_END_ALLOW_THREADS
+    if (!blocking && timeout != -1) {
+        PyErr_SetString(PyExc_ValueError, "can't specify a timeout "
+                        "for a non-blocking call");
+        return NULL;
+    }
+    if (timeout < 0 && timeout != -1) {
+        PyErr_SetString(PyExc_ValueError, "timeout value must be "
+                        "strictly positive");
+        return NULL;
+    }
+    if (!blocking)
+        microseconds = 0;
+    else if (timeout == -1)
+        microseconds = -1;
+    else {
+        timeout *= 1e6;
+        if (timeout >= (double) PY_TIMEOUT_MAX) {
+            PyErr_SetString(PyExc_OverflowError,
+                            "timeout value is too large");
+            return NULL;
+        }
+        microseconds = (PY_TIMEOUT_T) timeout;
+    }
+
+    /* First a simple non-blocking try without releasing the GIL */
+    r = PyThread_acquire_lock_timed(self->lock_lock, 0);
+    if (!r && microseconds != 0) {
+        Py_BEGIN_ALLOW_THREADS
+        r = PyThread_acquire_lock_timed(self->lock_lock, microseconds);
+        Py_END_ALLOW_THREADS
+    }
 
-    return PyBool_FromLong((long)i);
+    return PyBool_FromLong((long)r);
 }
 
 PyDoc_STRVAR(acquire_doc,
-"acquire([wait]) -> bool\n\
+"acquire([wait[, timeout]]) -> bool\n\
 (acquire_lock() is an obsolete synonym)\n\
 \n\
 Lock the lock.  Without argument, this blocks if the lock is already\n\
@@ -64,6 +97,8 @@ locked (even by the same thread), waiting for another thread to release\n\
 the lock, and return True once the lock is acquired.\n\
 With an argument, this will only block if the argument is true,\n\
 and the return value reflects whether the lock is acquired.\n\
+If timeout is given and positive, block for at most that many seconds;\n\
+the return value is False if the lock could not be acquired in time.\n\
 The blocking operation is not interruptible.");
 
 static PyObject *
@@ -107,9 +142,9 @@ Return whether the lock is in the locked state.");
 
 static PyMethodDef lock_methods[] = {
     {"acquire_lock", (PyCFunction)lock_PyThread_acquire_lock,
-     METH_VARARGS, acquire_doc},
+     METH_VARARGS | METH_KEYWORDS, acquire_doc},
     {"acquire",      (PyCFunction)lock_PyThread_acquire_lock,
-     METH_VARARGS, acquire_doc},
+     METH_VARARGS | METH_KEYWORDS, acquire_doc},
     {"release_lock", (PyCFunction)lock_PyThread_release_lock,
      METH_NOARGS, release_doc},
     {"release",      (PyCFunction)lock_PyThread_release_lock,
@@ -119,7 +154,7 @@ static PyMethodDef lock_methods[] = {
     {"locked",       (PyCFunction)lock_locked_lock,
      METH_NOARGS, locked_doc},
     {"__enter__",    (PyCFunction)lock_PyThread_acquire_lock,
-     METH_VARARGS, acquire_doc},
+     METH_VARARGS | METH_KEYWORDS, acquire_doc},
     {"__exit__",    (PyCFunction)lock_PyThread_release_lock,
      METH_VARARGS, release_doc},
     {NULL}              /* sentinel */
@@ -903,6 +938,7 @@ PyMODINIT_FUNC
 initthread(void)
 {
     PyObject *m, *d;
+    double timeout_max;
 
     /* Initialize types: */
     if (PyType_Ready(&localdummytype) < 0)
@@ -929,6 +965,12 @@ initthread(void)
     if (PyModule_AddObject(m, "_local", (PyObject *)&localtype) < 0)
         return;
 
+    /* Round towards minus infinity */
+    timeout_max = floor(PY_TIMEOUT_MAX / 1e6);
+    if (PyModule_AddObject(m, "TIMEOUT_MAX",
+                           PyFloat_FromDouble(timeout_max)) < 0)
+        return;
+
     nb_threads = 0;
 
     str_dict = PyString_InternFromString("__dict__");
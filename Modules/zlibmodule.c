@@ -11,35 +11,28 @@
 #ifdef WITH_THREAD
 #include "pythread.h"
 
-/* #defs ripped off from _tkinter.c, even though the situation here is much
-   simpler, because we don't have to worry about waiting for Tcl
-   events!  And, since zlib itself is threadsafe, we don't need to worry
-   about re-entering zlib functions.
-
-   N.B.
-
-   Since ENTER_ZLIB and LEAVE_ZLIB only need to be called on functions
-   that modify the components of preexisting de/compress objects, it
-   could prove to be a performance gain on multiprocessor machines if
-   there was an de/compress object-specific lock.  However, for the
-   moment the ENTER_ZLIB and LEAVE_ZLIB calls are global for ALL
-   de/compress objects.
- */
-
-static PyThread_type_lock zlib_lock = NULL; /* initialized on module load */
-
-#define ENTER_ZLIB \
-        Py_BEGIN_ALLOW_THREADS \
-        PyThread_acquire_lock(zlib_lock, 1); \
-        Py_END_ALLOW_THREADS
-
-#define LEAVE_ZLIB \
-        PyThread_release_lock(zlib_lock);
+/* zlib itself is threadsafe, so we don't need to worry about re-entering
+   zlib functions.  ENTER_ZLIB and LEAVE_ZLIB only need to be called on
+   functions that modify the components of preexisting de/compress objects.
+   Each object has its own lock, so that different objects can be used from
+   different threads at the same time: the GIL is released while zlib does
+   the actual work. */
+
+#define ENTER_ZLIB(obj) \
+    do { \
+        if (!PyThread_acquire_lock((obj)->lock, 0)) { \
+            Py_BEGIN_ALLOW_THREADS \
+            PyThread_acquire_lock((obj)->lock, 1); \
+            Py_END_ALLOW_THREADS \
+        } \
+    } while (0)
+
+#define LEAVE_ZLIB(obj) PyThread_release_lock((obj)->lock)
 
 #else
 
-#define ENTER_ZLIB
-#define LEAVE_ZLIB
+#define ENTER_ZLIB(obj)
+#define LEAVE_ZLIB(obj)
 
 #endif
 
@@ -68,6 +61,9 @@ typedef struct
     PyObject *unused_data;
     PyObject *unconsumed_tail;
     int is_initialised;
+#ifdef WITH_THREAD
+    PyThread_type_lock lock;
+#endif
 } compobject;
 
 static void
@@ -100,9 +96,14 @@ zlib_error(z_stream zst, int err, char *msg)
 }
 
 PyDoc_STRVAR(compressobj__doc__,
-"compressobj([level]) -- Return a compressor object.\n"
+"compressobj([level[, method[, wbits[, memlevel[, strategy[, zdict]]]]]])\n"
+"    -- Return a compressor object.\n"
 "\n"
-"Optional arg level is the compression level, in 0-9 or -1.");
+"Optional arg level is the compression level, in 0-9 or -1.\n"
+"\n"
+"Optional arg zdict is the predefined compression dictionary - a sequence\n"
+"of bytes containing subsequences that are expected to occur frequently\n"
+"in the data that is to be compressed.");
 
 PyDoc_STRVAR(decompressobj__doc__,
 "decompressobj([wbits]) -- Return a decompressor object.\n"
@@ -117,6 +118,9 @@ newcompobject(PyTypeObject *type)
     if (self == NULL)
         return NULL;
     self->is_initialised = 0;
+#ifdef WITH_THREAD
+    self->lock = NULL;
+#endif
     self->unused_data = PyString_FromString("");
     if (self->unused_data == NULL) {
         Py_DECREF(self);
@@ -127,6 +131,14 @@ newcompobject(PyTypeObject *type)
         Py_DECREF(self);
         return NULL;
     }
+#ifdef WITH_THREAD
+    self->lock = PyThread_allocate_lock();
+    if (self->lock == NULL) {
+        Py_DECREF(self);
+        PyErr_SetString(PyExc_MemoryError, "Unable to allocate lock");
+        return NULL;
+    }
+#endif
     return self;
 }
 
@@ -204,6 +216,7 @@ static PyObject *
 PyZlib_compress(PyObject *self, PyObject *args)
 {
     PyObject *RetVal = NULL;
+    Py_buffer pinput;
     Byte *ibuf;
     Py_ssize_t ibuflen, obuflen = DEFAULTALLOC;
     int level=Z_DEFAULT_COMPRESSION;
@@ -211,8 +224,10 @@ PyZlib_compress(PyObject *self, PyObject *args)
     z_stream zst;
 
     /* require Python string object, optional 'level' arg */
-    if (!PyArg_ParseTuple(args, "s#|i:compress", &ibuf, &ibuflen, &level))
+    if (!PyArg_ParseTuple(args, "s*|i:compress", &pinput, &level))
         return NULL;
+    ibuf = pinput.buf;
+    ibuflen = pinput.len;
 
     zst.zalloc = (alloc_func)NULL;
     zst.zfree = (free_func)Z_NULL;
@@ -267,11 +282,13 @@ PyZlib_compress(PyObject *self, PyObject *args)
         if (_PyBytes_Resize(&RetVal, zst.next_out -
                             (Byte *)PyBytes_AS_STRING(RetVal)) < 0)
             goto error;
+        PyBuffer_Release(&pinput);
         return RetVal;
     }
     else
         zlib_error(zst, err, "while finishing compression");
  error:
+    PyBuffer_Release(&pinput);
     Py_XDECREF(RetVal);
     return NULL;
 }
@@ -286,6 +303,7 @@ static PyObject *
 PyZlib_decompress(PyObject *self, PyObject *args)
 {
     PyObject *RetVal = NULL;
+    Py_buffer pinput;
     Byte *ibuf;
     Py_ssize_t ibuflen;
     int err, flush;
@@ -293,9 +311,11 @@ PyZlib_decompress(PyObject *self, PyObject *args)
     Py_ssize_t r_strlen=DEFAULTALLOC;
     z_stream zst;
 
-    if (!PyArg_ParseTuple(args, "s#|in:decompress",
-                          &ibuf, &ibuflen, &wsize, &r_strlen))
+    if (!PyArg_ParseTuple(args, "s*|in:decompress",
+                          &pinput, &wsize, &r_strlen))
         return NULL;
+    ibuf = pinput.buf;
+    ibuflen = pinput.len;
 
     if (r_strlen <= 0) {
         r_strlen = 1;
@@ -370,9 +390,11 @@ PyZlib_decompress(PyObject *self, PyObject *args)
 
     _PyString_Resize(&RetVal, zst.next_out -
                         (Byte *)PyBytes_AS_STRING(RetVal));
+    PyBuffer_Release(&pinput);
     return RetVal;
 
  error:
+    PyBuffer_Release(&pinput);
     Py_XDECREF(RetVal);
     return NULL;
 }
@@ -383,14 +405,22 @@ PyZlib_compressobj(PyObject *selfptr, PyObject *args)
     compobject *self;
     int level=Z_DEFAULT_COMPRESSION, method=DEFLATED;
     int wbits=MAX_WBITS, memLevel=DEF_MEM_LEVEL, strategy=0, err;
+    Py_buffer zdict;
 
-    if (!PyArg_ParseTuple(args, "|iiiii:compressobj", &level, &method, &wbits,
-                          &memLevel, &strategy))
+    zdict.buf = NULL;
+    if (!PyArg_ParseTuple(args, "|iiiiis*:compressobj", &level, &method,
+                          &wbits, &memLevel, &strategy, &zdict))
+        return NULL;
+    if (zdict.buf != NULL && (size_t)zdict.len > UINT_MAX) {
+        PyErr_SetString(PyExc_OverflowError,
+                        "zdict length does not fit in an unsigned int");
+        PyBuffer_Release(&zdict);
         return NULL;
+    }
 
     self = newcompobject(&Comptype);
     if (self == NULL)
-        return(NULL);
+        goto done;
     self->zst.zalloc = (alloc_func)NULL;
     self->zst.zfree = (free_func)Z_NULL;
     self->zst.next_in = NULL;
@@ -399,21 +429,33 @@ PyZlib_compressobj(PyObject *selfptr, PyObject *args)
     switch (err) {
     case Z_OK:
         self->is_initialised = 1;
-        return (PyObject *)self;
+        if (zdict.buf == NULL)
+            goto done;
+        err = deflateSetDictionary(&self->zst,
+                                   zdict.buf, (unsigned int)zdict.len);
+        if (err == Z_OK)
+            goto done;
+        Py_CLEAR(self);
+        PyErr_SetString(PyExc_ValueError, "Invalid dictionary");
+        goto done;
     case Z_MEM_ERROR:
-        Py_DECREF(self);
+        Py_CLEAR(self);
         PyErr_SetString(PyExc_MemoryError,
                         "Can't allocate memory for compression object");
-        return NULL;
+        goto done;
     case Z_STREAM_ERROR:
-        Py_DECREF(self);
+        Py_CLEAR(self);
         PyErr_SetString(PyExc_ValueError, "Invalid initialization option");
-        return NULL;
+        goto done;
     default:
         zlib_error(self->zst, err, "while creating compression object");
-        Py_DECREF(self);
-        return NULL;
+        Py_CLEAR(self);
+        goto done;
     }
+ done:
+    if (zdict.buf != NULL)
+        PyBuffer_Release(&zdict);
+    return (PyObject *)self;
 }
 
 static PyObject *
@@ -459,6 +501,10 @@ Comp_dealloc(compobject *self)
         deflateEnd(&self->zst);
     Py_XDECREF(self->unused_data);
     Py_XDECREF(self->unconsumed_tail);
+#ifdef WITH_THREAD
+    if (self->lock != NULL)
+        PyThread_free_lock(self->lock);
+#endif
     PyObject_Del(self);
 }
 
@@ -469,6 +515,10 @@ Decomp_dealloc(compobject *self)
         inflateEnd(&self->zst);
     Py_XDECREF(self->unused_data);
     Py_XDECREF(self->unconsumed_tail);
+#ifdef WITH_THREAD
+    if (self->lock != NULL)
+        PyThread_free_lock(self->lock);
+#endif
     PyObject_Del(self);
 }
 
@@ -484,13 +534,16 @@ static PyObject *
 PyZlib_objcompress(compobject *self, PyObject *args)
 {
     PyObject *RetVal = NULL;
+    Py_buffer pinput;
     Py_ssize_t ibuflen, obuflen = DEFAULTALLOC;
     int err;
 
-    if (!PyArg_ParseTuple(args, "s#:compress", &self->zst.next_in, &ibuflen))
+    if (!PyArg_ParseTuple(args, "s*:compress", &pinput))
         return NULL;
+    self->zst.next_in = pinput.buf;
+    ibuflen = pinput.len;
 
-    ENTER_ZLIB
+    ENTER_ZLIB(self);
 
     do {
         arrange_input_buffer(&self->zst, &ibuflen);
@@ -521,7 +574,8 @@ PyZlib_objcompress(compobject *self, PyObject *args)
  error:
     Py_CLEAR(RetVal);
  success:
-    LEAVE_ZLIB
+    LEAVE_ZLIB(self);
+    PyBuffer_Release(&pinput);
     return RetVal;
 }
 
@@ -589,14 +643,18 @@ PyZlib_objdecompress(compobject *self, PyObject *args)
     Py_ssize_t inplen, max_length = 0;
     Py_ssize_t ibuflen, obuflen = DEFAULTALLOC, hard_limit;
     PyObject *RetVal = NULL;
+    Py_buffer pinput;
     Byte *input;
 
-    if (!PyArg_ParseTuple(args, "s#|n:decompress", &input,
-                          &inplen, &max_length))
+    if (!PyArg_ParseTuple(args, "s*|n:decompress", &pinput,
+                          &max_length))
         return NULL;
+    input = pinput.buf;
+    inplen = pinput.len;
     if (max_length < 0) {
         PyErr_SetString(PyExc_ValueError,
                         "max_length must be greater than zero");
+        PyBuffer_Release(&pinput);
         return NULL;
     } else if (max_length == 0)
         hard_limit = PY_SSIZE_T_MAX;
@@ -610,7 +668,7 @@ PyZlib_objdecompress(compobject *self, PyObject *args)
     if (max_length && obuflen > max_length)
         obuflen = max_length;
 
-    ENTER_ZLIB
+    ENTER_ZLIB(self);
 
     do {
         arrange_input_buffer(&self->zst, &ibuflen);
@@ -668,7 +726,8 @@ PyZlib_objdecompress(compobject *self, PyObject *args)
  abort:
     Py_CLEAR(RetVal);
  success:
-    LEAVE_ZLIB
+    LEAVE_ZLIB(self);
+    PyBuffer_Release(&pinput);
 
     return RetVal;
 }
@@ -698,7 +757,7 @@ PyZlib_flush(compobject *self, PyObject *args)
         return PyString_FromStringAndSize(NULL, 0);
     }
 
-    ENTER_ZLIB
+    ENTER_ZLIB(self);
 
     self->zst.avail_in = 0;
 
@@ -748,7 +807,7 @@ PyZlib_flush(compobject *self, PyObject *args)
                         (Byte *)PyBytes_AS_STRING(RetVal));
 
  error:
-    LEAVE_ZLIB
+    LEAVE_ZLIB(self);
     return RetVal;
 }
 
@@ -768,7 +827,7 @@ PyZlib_copy(compobject *self)
     /* Copy the zstream state
      * We use ENTER_ZLIB / LEAVE_ZLIB to make this thread-safe
      */
-    ENTER_ZLIB
+    ENTER_ZLIB(self);
     err = deflateCopy(&retval->zst, &self->zst);
     switch (err) {
     case Z_OK:
@@ -793,11 +852,11 @@ PyZlib_copy(compobject *self)
     /* Mark it as being initialized */
     retval->is_initialised = 1;
 
-    LEAVE_ZLIB
+    LEAVE_ZLIB(self);
     return (PyObject *)retval;
 
 error:
-    LEAVE_ZLIB
+    LEAVE_ZLIB(self);
     Py_XDECREF(retval);
     return NULL;
 }
@@ -817,7 +876,7 @@ PyZlib_uncopy(compobject *self)
     /* Copy the zstream state
      * We use ENTER_ZLIB / LEAVE_ZLIB to make this thread-safe
      */
-    ENTER_ZLIB
+    ENTER_ZLIB(self);
     err = inflateCopy(&retval->zst, &self->zst);
     switch (err) {
     case Z_OK:
@@ -842,11 +901,11 @@ PyZlib_uncopy(compobject *self)
     /* Mark it as being initialized */
     retval->is_initialised = 1;
 
-    LEAVE_ZLIB
+    LEAVE_ZLIB(self);
     return (PyObject *)retval;
 
 error:
-    LEAVE_ZLIB
+    LEAVE_ZLIB(self);
     Py_XDECREF(retval);
     return NULL;
 }
@@ -874,7 +933,7 @@ PyZlib_unflush(compobject *self, PyObject *args)
         return NULL;
     }
 
-    ENTER_ZLIB
+    ENTER_ZLIB(self);
 
     self->zst.next_in = (Byte *)PyString_AS_STRING(self->unconsumed_tail);
     ibuflen = PyString_GET_SIZE(self->unconsumed_tail);
@@ -930,7 +989,7 @@ PyZlib_unflush(compobject *self, PyObject *args)
  abort:
     Py_CLEAR(RetVal);
  success:
-    LEAVE_ZLIB
+    LEAVE_ZLIB(self);
     return RetVal;
 }
 
@@ -974,7 +1033,7 @@ Decomp_getattr(compobject *self, char *name)
 {
     PyObject * retval;
 
-    ENTER_ZLIB
+    ENTER_ZLIB(self);
 
     if (strcmp(name, "unused_data") == 0) {
         Py_INCREF(self->unused_data);
@@ -985,7 +1044,7 @@ Decomp_getattr(compobject *self, char *name)
     } else
         retval = Py_FindMethod(Decomp_methods, (PyObject *)self, name);
 
-    LEAVE_ZLIB
+    LEAVE_ZLIB(self);
 
     return retval;
 }
@@ -1000,12 +1059,15 @@ static PyObject *
 PyZlib_adler32(PyObject *self, PyObject *args)
 {
     unsigned int adler32val = 1;  /* adler32(0L, Z_NULL, 0) */
+    Py_buffer pbuf;
     Byte *buf;
     Py_ssize_t len;
     int signed_val;
 
-    if (!PyArg_ParseTuple(args, "s#|I:adler32", &buf, &len, &adler32val))
+    if (!PyArg_ParseTuple(args, "s*|I:adler32", &pbuf, &adler32val))
         return NULL;
+    buf = pbuf.buf;
+    len = pbuf.len;
 
     /* Avoid truncation of length for very large buffers. adler32() takes
        length as an unsigned int, which may be narrower than Py_ssize_t. */
@@ -1019,6 +1081,7 @@ PyZlib_adler32(PyObject *self, PyObject *args)
      * extended into a 64-bit long inside the integer object).  3.0 does the
      * right thing and returns unsigned. http://bugs.python.org/issue1202 */
     signed_val = adler32(adler32val, buf, (unsigned int)len);
+    PyBuffer_Release(&pbuf);
     return PyInt_FromLong(signed_val);
 }
 
@@ -1032,25 +1095,38 @@ static PyObject *
 PyZlib_crc32(PyObject *self, PyObject *args)
 {
     unsigned int crc32val = 0;  /* crc32(0L, Z_NULL, 0) */
+    Py_buffer pbuf;
     Byte *buf;
     Py_ssize_t len;
     int signed_val;
 
-    if (!PyArg_ParseTuple(args, "s#|I:crc32", &buf, &len, &crc32val))
+    if (!PyArg_ParseTuple(args, "s*|I:crc32", &pbuf, &crc32val))
         return NULL;
+    buf = pbuf.buf;
+    len = pbuf.len;
 
-    /* Avoid truncation of length for very large buffers. crc32() takes
-       length as an unsigned int, which may be narrower than Py_ssize_t. */
-    while ((size_t)len > UINT_MAX) {
-        crc32val = crc32(crc32val, buf, UINT_MAX);
-        buf += (size_t) UINT_MAX;
-        len -= (size_t) UINT_MAX;
+    /* Releasing the GIL for very small buffers is inefficient
+       and may lower performance */
+    if (len > 1024*5) {
+        Py_BEGIN_ALLOW_THREADS
+        /* Avoid truncation of length for very large buffers. crc32() takes
+           length as an unsigned int, which may be narrower than Py_ssize_t. */
+        while ((size_t)len > UINT_MAX) {
+            crc32val = crc32(crc32val, buf, UINT_MAX);
+            buf += (size_t) UINT_MAX;
+            len -= (size_t) UINT_MAX;
+        }
+        signed_val = crc32(crc32val, buf, (unsigned int)len);
+        Py_END_ALLOW_THREADS
+    }
+    else {
+        signed_val = crc32(crc32val, buf, (unsigned int)len);
     }
+    PyBuffer_Release(&pbuf);
     /* In Python 2.x we return a signed integer regardless of native platform
      * long size (the 32bit unsigned long is treated as 32-bit signed and sign
      * extended into a 64-bit long inside the integer object).  3.0 does the
      * right thing and returns unsigned. http://bugs.python.org/issue1202 */
-    signed_val = crc32(crc32val, buf, (unsigned int)len);
     return PyInt_FromLong(signed_val);
 }
 
@@ -1157,7 +1233,4 @@ PyInit_zlib(void)
 
     PyModule_AddStringConstant(m, "__version__", "1.0");
 
-#ifdef WITH_THREAD
-    zlib_lock = PyThread_allocate_lock();
-#endif /* WITH_THREAD */
 }
@@ -1166,15 +1166,16 @@ were copied from the old char* style string object. */
     }
 
 Py_LOCAL_INLINE(Py_ssize_t)
-bytearray_find_internal(PyByteArrayObject *self, PyObject *args, int dir)
+bytearray_find_internal(PyByteArrayObject *self, PyObject **args,
+                        Py_ssize_t nargs, int dir)
 {
     PyObject *subobj;
     Py_buffer subbuf;
     Py_ssize_t start=0, end=PY_SSIZE_T_MAX;
     Py_ssize_t res;
 
-    if (!stringlib_parse_args_finds("find/rfind/index/rindex",
-                                    args, &subobj, &start, &end))
+    if (!stringlib_parse_stack_finds("find/rfind/index/rindex",
+                                     args, nargs, &subobj, &start, &end))
         return -2;
     if (_getbuffer(subobj, &subbuf) < 0)
         return -2;
@@ -1200,9 +1201,10 @@ arguments start and end are interpreted as in slice notation.\n\
 Return -1 on failure.");
 
 static PyObject *
-bytearray_find(PyByteArrayObject *self, PyObject *args)
+bytearray_find(PyByteArrayObject *self, PyObject **args,
+               Py_ssize_t nargs)
 {
-    Py_ssize_t result = bytearray_find_internal(self, args, +1);
+    Py_ssize_t result = bytearray_find_internal(self, args, nargs, +1);
     if (result == -2)
         return NULL;
     return PyInt_FromSsize_t(result);
@@ -1216,7 +1218,8 @@ bytes B[start:end].  Optional arguments start and end are interpreted\n\
 as in slice notation.");
 
 static PyObject *
-bytearray_count(PyByteArrayObject *self, PyObject *args)
+bytearray_count(PyByteArrayObject *self, PyObject **args,
+                Py_ssize_t nargs)
 {
     PyObject *sub_obj;
     const char *str = PyByteArray_AS_STRING(self);
@@ -1224,7 +1227,8 @@ bytearray_count(PyByteArrayObject *self, PyObject *args)
     Py_buffer vsub;
     PyObject *count_obj;
 
-    if (!stringlib_parse_args_finds("count", args, &sub_obj, &start, &end))
+    if (!stringlib_parse_stack_finds("count", args, nargs,
+                                     &sub_obj, &start, &end))
         return NULL;
 
     if (_getbuffer(sub_obj, &vsub) < 0)
@@ -1246,9 +1250,10 @@ PyDoc_STRVAR(index__doc__,
 Like B.find() but raise ValueError when the subsection is not found.");
 
 static PyObject *
-bytearray_index(PyByteArrayObject *self, PyObject *args)
+bytearray_index(PyByteArrayObject *self, PyObject **args,
+                Py_ssize_t nargs)
 {
-    Py_ssize_t result = bytearray_find_internal(self, args, +1);
+    Py_ssize_t result = bytearray_find_internal(self, args, nargs, +1);
     if (result == -2)
         return NULL;
     if (result == -1) {
@@ -1270,9 +1275,10 @@ arguments start and end are interpreted as in slice notation.\n\
 Return -1 on failure.");
 
 static PyObject *
-bytearray_rfind(PyByteArrayObject *self, PyObject *args)
+bytearray_rfind(PyByteArrayObject *self, PyObject **args,
+                Py_ssize_t nargs)
 {
-    Py_ssize_t result = bytearray_find_internal(self, args, -1);
+    Py_ssize_t result = bytearray_find_internal(self, args, nargs, -1);
     if (result == -2)
         return NULL;
     return PyInt_FromSsize_t(result);
@@ -1285,9 +1291,10 @@ PyDoc_STRVAR(rindex__doc__,
 Like B.rfind() but raise ValueError when the subsection is not found.");
 
 static PyObject *
-bytearray_rindex(PyByteArrayObject *self, PyObject *args)
+bytearray_rindex(PyByteArrayObject *self, PyObject **args,
+                 Py_ssize_t nargs)
 {
-    Py_ssize_t result = bytearray_find_internal(self, args, -1);
+    Py_ssize_t result = bytearray_find_internal(self, args, nargs, -1);
     if (result == -2)
         return NULL;
     if (result == -1) {
@@ -1375,14 +1382,16 @@ With optional end, stop comparing B at that position.\n\
 prefix can also be a tuple of strings to try.");
 
 static PyObject *
-bytearray_startswith(PyByteArrayObject *self, PyObject *args)
+bytearray_startswith(PyByteArrayObject *self, PyObject **args,
+                     Py_ssize_t nargs)
 {
     Py_ssize_t start = 0;
     Py_ssize_t end = PY_SSIZE_T_MAX;
     PyObject *subobj;
     int result;
 
-    if (!stringlib_parse_args_finds("startswith", args, &subobj, &start, &end))
+    if (!stringlib_parse_stack_finds("startswith", args, nargs,
+                                     &subobj, &start, &end))
         return NULL;
     if (PyTuple_Check(subobj)) {
         Py_ssize_t i;
@@ -1414,14 +1423,16 @@ With optional end, stop comparing B at that position.\n\
 suffix can also be a tuple of strings to try.");
 
 static PyObject *
-bytearray_endswith(PyByteArrayObject *self, PyObject *args)
+bytearray_endswith(PyByteArrayObject *self, PyObject **args,
+                   Py_ssize_t nargs)
 {
     Py_ssize_t start = 0;
     Py_ssize_t end = PY_SSIZE_T_MAX;
     PyObject *subobj;
     int result;
 
-    if (!stringlib_parse_args_finds("endswith", args, &subobj, &start, &end))
+    if (!stringlib_parse_stack_finds("endswith", args, nargs,
+                                     &subobj, &start, &end))
         return NULL;
     if (PyTuple_Check(subobj)) {
         Py_ssize_t i;
@@ -2834,16 +2845,16 @@ bytearray_methods[] = {
     {"capitalize", (PyCFunction)stringlib_capitalize, METH_NOARGS,
      _Py_capitalize__doc__},
     {"center", (PyCFunction)stringlib_center, METH_VARARGS, center__doc__},
-    {"count", (PyCFunction)bytearray_count, METH_VARARGS, count__doc__},
+    {"count", (PyCFunction)bytearray_count, METH_FASTCALL, count__doc__},
     {"decode", (PyCFunction)bytearray_decode, METH_VARARGS | METH_KEYWORDS, decode_doc},
-    {"endswith", (PyCFunction)bytearray_endswith, METH_VARARGS, endswith__doc__},
+    {"endswith", (PyCFunction)bytearray_endswith, METH_FASTCALL, endswith__doc__},
     {"expandtabs", (PyCFunction)stringlib_expandtabs, METH_VARARGS,
      expandtabs__doc__},
     {"extend", (PyCFunction)bytearray_extend, METH_O, extend__doc__},
-    {"find", (PyCFunction)bytearray_find, METH_VARARGS, find__doc__},
+    {"find", (PyCFunction)bytearray_find, METH_FASTCALL, find__doc__},
     {"fromhex", (PyCFunction)bytearray_fromhex, METH_VARARGS|METH_CLASS,
      fromhex_doc},
-    {"index", (PyCFunction)bytearray_index, METH_VARARGS, index__doc__},
+    {"index", (PyCFunction)bytearray_index, METH_FASTCALL, index__doc__},
     {"insert", (PyCFunction)bytearray_insert, METH_VARARGS, insert__doc__},
     {"isalnum", (PyCFunction)stringlib_isalnum, METH_NOARGS,
      _Py_isalnum__doc__},
@@ -2868,8 +2879,8 @@ bytearray_methods[] = {
     {"remove", (PyCFunction)bytearray_remove, METH_O, remove__doc__},
     {"replace", (PyCFunction)bytearray_replace, METH_VARARGS, replace__doc__},
     {"reverse", (PyCFunction)bytearray_reverse, METH_NOARGS, reverse__doc__},
-    {"rfind", (PyCFunction)bytearray_rfind, METH_VARARGS, rfind__doc__},
-    {"rindex", (PyCFunction)bytearray_rindex, METH_VARARGS, rindex__doc__},
+    {"rfind", (PyCFunction)bytearray_rfind, METH_FASTCALL, rfind__doc__},
+    {"rindex", (PyCFunction)bytearray_rindex, METH_FASTCALL, rindex__doc__},
     {"rjust", (PyCFunction)stringlib_rjust, METH_VARARGS, rjust__doc__},
     {"rpartition", (PyCFunction)bytearray_rpartition, METH_O, rpartition__doc__},
     {"rsplit", (PyCFunction)bytearray_rsplit, METH_VARARGS, rsplit__doc__},
@@ -2877,7 +2888,7 @@ bytearray_methods[] = {
     {"split", (PyCFunction)bytearray_split, METH_VARARGS, split__doc__},
     {"splitlines", (PyCFunction)bytearray_splitlines, METH_VARARGS,
      splitlines__doc__},
-    {"startswith", (PyCFunction)bytearray_startswith, METH_VARARGS ,
+    {"startswith", (PyCFunction)bytearray_startswith, METH_FASTCALL,
      startswith__doc__},
     {"strip", (PyCFunction)bytearray_strip, METH_VARARGS, strip__doc__},
     {"swapcase", (PyCFunction)stringlib_swapcase, METH_NOARGS,
@@ -124,6 +124,7 @@ alloc_error:
     Py_XINCREF(name);
     op->cl_name = name;
     op->cl_weakreflist = NULL;
+    op->cl_cached_keys = _PyDict_NewKeysForClass();
 
     op->cl_getattr = class_lookup(op, getattrstr, &dummy);
     op->cl_setattr = class_lookup(op, setattrstr, &dummy);
@@ -197,6 +198,8 @@ class_dealloc(PyClassObject *op)
     Py_XDECREF(op->cl_getattr);
     Py_XDECREF(op->cl_setattr);
     Py_XDECREF(op->cl_delattr);
+    if (op->cl_cached_keys != NULL)
+        _PyDictKeys_DecRef(op->cl_cached_keys);
     PyObject_GC_Del(op);
 }
 
@@ -521,7 +524,7 @@ PyInstance_NewRaw(PyObject *klass, PyObject *dict)
         return NULL;
     }
     if (dict == NULL) {
-        dict = PyDict_New();
+        dict = _PyObjectDict_New(((PyClassObject *)klass)->cl_cached_keys);
         if (dict == NULL)
             return NULL;
     }
@@ -819,7 +822,8 @@ instance_setattr1(PyInstanceObject *inst, PyObject *name, PyObject *v)
         return rv;
     }
     else
-        return PyDict_SetItem(inst->in_dict, name, v);
+        return _PyObjectDict_SetItem(&inst->in_class->cl_cached_keys,
+                                     &inst->in_dict, name, v);
 }
 
 static int
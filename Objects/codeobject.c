@@ -1,5 +1,6 @@
 #include "Python.h"
 #include "code.h"
+#include "opcode.h"
 #include "structmember.h"
 
 #define NAME_CHARS \
@@ -146,10 +147,62 @@ PyCode_New28(int argcount, int kwonlyargcount,
         co->co_lnotab = lnotab;
         co->co_zombieframe = NULL;
         co->co_weakreflist = NULL;
+        co->co_opcache_map = NULL;
+        co->co_opcache = NULL;
+        co->co_opcache_flag = 0;
+        co->co_opcache_size = 0;
     }
     return co;
 }
 
+/* Number of misses an opcode cache tolerates before it's given up on */
+#define OPCACHE_MAX_FILLS 64
+
+int
+_PyCode_InitOpcache(PyCodeObject *co)
+{
+    Py_ssize_t co_size = PyString_GET_SIZE(co->co_code);
+    unsigned char *code = (unsigned char *)PyString_AS_STRING(co->co_code);
+    Py_ssize_t i;
+    int opcode, opts = 0;
+
+    co->co_opcache_map = PyMem_New(unsigned short, co_size + 1);
+    if (co->co_opcache_map == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    memset(co->co_opcache_map, 0, sizeof(unsigned short) * (co_size + 1));
+
+    for (i = 0; i < co_size; ) {
+        opcode = code[i];
+        i += HAS_ARG(opcode) ? 3 : 1;
+        if ((opcode == LOAD_GLOBAL || opcode == LOAD_ATTR) &&
+            opts < USHRT_MAX && i <= co_size) {
+            co->co_opcache_map[i] = (unsigned short)++opts;
+        }
+    }
+
+    if (opts) {
+        co->co_opcache = PyMem_New(_PyOpcache, opts);
+        if (co->co_opcache == NULL) {
+            PyMem_FREE(co->co_opcache_map);
+            co->co_opcache_map = NULL;
+            PyErr_NoMemory();
+            return -1;
+        }
+        memset(co->co_opcache, 0, sizeof(_PyOpcache) * opts);
+        for (i = 0; i < opts; i++)
+            co->co_opcache[i].optimized = OPCACHE_MAX_FILLS;
+    }
+    else {
+        /* Nothing to cache; keep an empty map so the caches aren't
+           set up again. */
+        co->co_opcache = NULL;
+    }
+    co->co_opcache_size = opts;
+    return 0;
+}
+
 PyCodeObject *
 PyCode_New(int argcount, int nlocals, int stacksize, int flags,
            PyObject *code, PyObject *consts, PyObject *names,
@@ -383,6 +436,10 @@ code_dealloc(PyCodeObject *co)
     Py_XDECREF(co->co_lnotab);
     if (co->co_zombieframe != NULL)
         PyObject_GC_Del(co->co_zombieframe);
+    if (co->co_opcache_map != NULL)
+        PyMem_FREE(co->co_opcache_map);
+    if (co->co_opcache != NULL)
+        PyMem_FREE(co->co_opcache);
     if (co->co_weakreflist != NULL)
         PyObject_ClearWeakRefs((PyObject*)co);
     PyObject_DEL(co);
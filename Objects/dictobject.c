@@ -134,20 +134,142 @@ practice, this probably won't make a lick of difference for many years (at
 which point everyone will have terabytes of RAM on 64-bit boxes).
 */
 
-/* Object used as dummy key to fill deleted entries */
-static PyObject *dummy = NULL; /* Initialized by first call to newPyDictObject() */
+/*
+The dictionary keys and hashes live in a separate PyDictKeysObject, pointed
+to by ma_keys.  The layout of a keys object is compact:
+
+    +---------------+
+    | dk_refcnt     |
+    | dk_size       |
+    | dk_lookup     |
+    | dk_usable     |
+    | dk_nentries   |
+    +---------------+
+    | dk_indices    |
+    |               |
+    +---------------+
+    | dk_entries    |
+    |               |
+    +---------------+
+
+dk_indices is the actual hash table: dk_size slots holding indices into
+dk_entries, or DKIX_EMPTY (-1) or DKIX_DUMMY (-2).  The width of each index
+depends on dk_size:
+
+* int8  for          dk_size <= 128
+* int16 for 256   <= dk_size <= 2**15
+* int32 for 2**16 <= dk_size <= 2**31
+* int64 for 2**32 <= dk_size
+
+dk_entries is a dense array of USABLE_FRACTION(dk_size) PyDictEntry
+structs, filled in insertion order; dk_nentries of them are in use.  Only
+the small index array is kept sparse, so a dict takes much less memory than
+a table of full entries at the same load factor, and iterating over it
+walks the dense entries only, in the order the keys were inserted.
+
+A dictionary can be in one of two forms.
+
+Either:
+  A combined table:
+    ma_values == NULL, dk_refcnt == 1.
+    Values are stored in the me_value field of the entries.
+Or:
+  A split table:
+    ma_values != NULL, dk_refcnt >= 1
+    Values are stored in the ma_values array, indexed like dk_entries.
+    Only exact string keys are allowed; all dicts sharing a keys object
+    must have the same set of keys (a value that is NULL in one dict may
+    be set in another).  To keep the insertion order of every dict the
+    order of the shared entries, a split dict only ever holds the values
+    of a prefix of the entries: ma_values[i] is set for i < ma_used only.
+
+The instance dictionaries of a class share the keys cached on the class
+(see _PyObjectDict_SetItem()), so each instance only pays for its values.
+A split table is transparently converted to a combined one by
+dictresize() whenever an operation would break the rules above: inserting
+a non-string key, inserting keys in another order than the shared one,
+deleting a value other than the last one, outgrowing the shared keys,
+popitem().
+
+An index slot (and its entry) is in one of four states:
+
+1. Unused.  index == DKIX_EMPTY
+   Does not hold an active (key, value) pair now and never did.  Unused can
+   transition to Active upon key insertion.  This is each slot's initial
+   state.
+
+2. Active.  index >= 0, me_key != NULL and me_value != NULL
+   Holds an active (key, value) pair.  Active can transition to Dummy or
+   Pending upon key deletion (for combined and split tables respectively).
+
+3. Dummy.  index == DKIX_DUMMY  (combined only)
+   Previously held an active (key, value) pair, but that was deleted and an
+   active pair has not yet overwritten the slot.  Dummy can transition to
+   Active upon key insertion.  Dummy slots cannot be made Unused again
+   else the probe sequence in case of collision would have no way to know
+   they were once active.  The entry the slot pointed to keeps NULL key and
+   value until the next resize compacts the entries.
+
+4. Pending. index >= 0, key != NULL, and value == NULL  (split only)
+   Not yet inserted in split-table.
+*/
 
-#ifdef Py_REF_DEBUG
-PyObject *
-_PyDict_Dummy(void)
-{
-    return dummy;
-}
+/* Lookup functions return the index of the entry for key in dk_entries, or
+   DKIX_EMPTY if the key is absent or DKIX_ERROR if an error occurred. */
+#define DKIX_EMPTY (-1)
+#define DKIX_DUMMY (-2)  /* Used internally */
+#define DKIX_ERROR (-3)
+
+typedef Py_ssize_t (*dict_lookup_func)
+(PyDictObject *mp, PyObject *key, long hash, PyObject ***value_addr,
+ Py_ssize_t *hashpos);
+
+struct _dictkeysobject {
+    Py_ssize_t dk_refcnt;
+
+    /* Size of the hash table (dk_indices).  It must be a power of 2. */
+    Py_ssize_t dk_size;
+
+    /* Function to lookup in the hash table (dk_indices). */
+    dict_lookup_func dk_lookup;
+
+    /* Number of usable entries in dk_entries. */
+    Py_ssize_t dk_usable;
+
+    /* Number of used entries in dk_entries. */
+    Py_ssize_t dk_nentries;
+
+    /* The hash table, followed by the entries.  Only the first
+       dk_size * DK_IXSIZE bytes belong to the table; the union just
+       provides the alignment and the minimal size. */
+    union {
+        int8_t as_1[8];
+        int16_t as_2[4];
+        int32_t as_4[2];
+#if SIZEOF_VOID_P > 4
+        int64_t as_8[1];
 #endif
+    } dk_indices;
+};
+
+#define DK_INDICES_SIZE sizeof(((PyDictKeysObject *)0)->dk_indices)
 
 /* forward declarations */
-static PyDictEntry *
-lookdict_string(PyDictObject *mp, PyObject *key, long hash);
+static Py_ssize_t lookdict(PyDictObject *mp, PyObject *key,
+                           long hash, PyObject ***value_addr,
+                           Py_ssize_t *hashpos);
+static Py_ssize_t lookdict_string(PyDictObject *mp, PyObject *key,
+                                  long hash, PyObject ***value_addr,
+                                  Py_ssize_t *hashpos);
+static Py_ssize_t
+lookdict_string_nodummy(PyDictObject *mp, PyObject *key,
+                        long hash, PyObject ***value_addr,
+                        Py_ssize_t *hashpos);
+static Py_ssize_t lookdict_split(PyDictObject *mp, PyObject *key,
+                                 long hash, PyObject ***value_addr,
+                                 Py_ssize_t *hashpos);
+
+static int dictresize(PyDictObject *mp, Py_ssize_t minused);
 
 #ifdef SHOW_CONVERSION_COUNTS
 static long created = 0L;
@@ -198,32 +320,156 @@ show_track(void)
 #endif
 
 
-/* Initialization macros.
-   There are two ways to create a dict:  PyDict_New() is the main C API
-   function, and the tp_new slot maps to dict_new().  In the latter case we
-   can save a little time over what PyDict_New does because it's guaranteed
-   that the PyDictObject struct is already zeroed out.
-   Everyone except dict_new() should use EMPTY_TO_MINSIZE (unless they have
-   an excellent reason not to).
-*/
+#define DK_SIZE(dk) ((dk)->dk_size)
+#if SIZEOF_VOID_P > 4
+#define DK_IXSIZE(dk)                          \
+    (DK_SIZE(dk) <= 0xff ?                     \
+        1 : DK_SIZE(dk) <= 0xffff ?            \
+            2 : DK_SIZE(dk) <= 0xffffffff ?    \
+                4 : sizeof(int64_t))
+#else
+#define DK_IXSIZE(dk)                          \
+    (DK_SIZE(dk) <= 0xff ?                     \
+        1 : DK_SIZE(dk) <= 0xffff ?            \
+            2 : sizeof(int32_t))
+#endif
+#define DK_ENTRIES(dk) \
+    ((PyDictEntry *)(&(dk)->dk_indices.as_1[DK_SIZE(dk) * DK_IXSIZE(dk)]))
+#define DK_MASK(dk) (((dk)->dk_size)-1)
+#define IS_POWER_OF_2(x) (((x) & (x-1)) == 0)
 
-#define INIT_NONZERO_DICT_SLOTS(mp) do {                                \
-    (mp)->ma_table = (mp)->ma_smalltable;                               \
-    (mp)->ma_mask = PyDict_MINSIZE - 1;                                 \
-    } while(0)
+#define DK_INCREF(dk) (++(dk)->dk_refcnt)
+#define DK_DECREF(dk) if (--(dk)->dk_refcnt == 0) free_keys_object(dk)
 
-#define EMPTY_TO_MINSIZE(mp) do {                                       \
-    memset((mp)->ma_smalltable, 0, sizeof((mp)->ma_smalltable));        \
-    (mp)->ma_used = (mp)->ma_fill = 0;                                  \
-    INIT_NONZERO_DICT_SLOTS(mp);                                        \
-    } while(0)
+/* lookup indices.  returns DKIX_EMPTY, DKIX_DUMMY, or ix >=0 */
+Py_LOCAL_INLINE(Py_ssize_t)
+dk_get_index(PyDictKeysObject *keys, Py_ssize_t i)
+{
+    Py_ssize_t s = DK_SIZE(keys);
+    Py_ssize_t ix;
+
+    if (s <= 0xff) {
+        int8_t *indices = keys->dk_indices.as_1;
+        ix = indices[i];
+    }
+    else if (s <= 0xffff) {
+        int16_t *indices = keys->dk_indices.as_2;
+        ix = indices[i];
+    }
+#if SIZEOF_VOID_P > 4
+    else if (s > 0xffffffff) {
+        int64_t *indices = keys->dk_indices.as_8;
+        ix = indices[i];
+    }
+#endif
+    else {
+        int32_t *indices = keys->dk_indices.as_4;
+        ix = indices[i];
+    }
+    assert(ix >= DKIX_DUMMY);
+    return ix;
+}
+
+/* write to indices. */
+Py_LOCAL_INLINE(void)
+dk_set_index(PyDictKeysObject *keys, Py_ssize_t i, Py_ssize_t ix)
+{
+    Py_ssize_t s = DK_SIZE(keys);
+
+    assert(ix >= DKIX_DUMMY);
+
+    if (s <= 0xff) {
+        int8_t *indices = keys->dk_indices.as_1;
+        assert(ix <= 0x7f);
+        indices[i] = (int8_t)ix;
+    }
+    else if (s <= 0xffff) {
+        int16_t *indices = keys->dk_indices.as_2;
+        assert(ix <= 0x7fff);
+        indices[i] = (int16_t)ix;
+    }
+#if SIZEOF_VOID_P > 4
+    else if (s > 0xffffffff) {
+        int64_t *indices = keys->dk_indices.as_8;
+        indices[i] = ix;
+    }
+#endif
+    else {
+        int32_t *indices = keys->dk_indices.as_4;
+        assert(ix <= 0x7fffffff);
+        indices[i] = (int32_t)ix;
+    }
+}
+
+/* USABLE_FRACTION is the maximum dictionary load.  To avoid slowing down
+ * lookups on a near-full table, we resize the table when it's two-thirds
+ * full.  This is also the number of entries allocated: the entries are
+ * dense, so unlike the index array they waste no space for the free slots
+ * of the hash table.  Since dk_usable counts the entries of deleted items
+ * as used, this guarantees there is at least one Unused index slot, which
+ * the lookup functions need to terminate failing searches.
+ */
+#define USABLE_FRACTION(n) (((n) << 1)/3)
+
+/* ESTIMATE_SIZE is the reverse of USABLE_FRACTION: the table size needed
+ * to hold n items without resizing.
+ */
+#define ESTIMATE_SIZE(n) (((n)*3+1) >> 1)
+
+/* GROWTH_RATE.  Growth rate upon hitting maximum load.
+ * The new table is sized for three times the active items, which leaves
+ * room to grow without keeping the dense entries too sparse (they are
+ * allocated for the whole usable fraction).  A dict which had many
+ * deletions shrinks back, as the size is based on the active items only.
+ */
+#define GROWTH_RATE(d) ((d)->ma_used*3)
+
+/* Address of the value slot of entry i: the ma_values array for split
+   tables, the entry itself for combined ones. */
+#define DICT_VALUE_ADDR(mp, i) \
+    ((mp)->ma_values != NULL ? &(mp)->ma_values[i] : \
+     &DK_ENTRIES((mp)->ma_keys)[i].me_value)
+
+#define ENSURE_ALLOWS_DELETIONS(d) \
+    if ((d)->ma_keys->dk_lookup == lookdict_string_nodummy) { \
+        (d)->ma_keys->dk_lookup = lookdict_string; \
+    }
+
+/* This immutable, empty PyDictKeysObject is used for PyDict_Clear()
+ * (which cannot fail and thus can do no allocation).  Cleared dicts are
+ * split tables sharing these keys; the first insertion resizes them into
+ * a fresh combined table.
+ */
+static PyDictKeysObject empty_keys_struct = {
+        2, /* dk_refcnt: the extra reference keeps it from being freed */
+        1, /* dk_size */
+        lookdict_split, /* dk_lookup */
+        0, /* dk_usable (immutable) */
+        0, /* dk_nentries */
+        {{DKIX_EMPTY, DKIX_EMPTY, DKIX_EMPTY, DKIX_EMPTY,
+          DKIX_EMPTY, DKIX_EMPTY, DKIX_EMPTY, DKIX_EMPTY}}, /* dk_indices */
+};
+
+static PyObject *empty_values[1] = { NULL };
+
+#define Py_EMPTY_KEYS &empty_keys_struct
 
-/* Dictionary reuse scheme to save calls to malloc, free, and memset */
+/* Global counter used to set ma_version_tag field of dictionary.
+ * It is incremented each time that a dictionary is created and each
+ * time that a dictionary is modified. */
+static PY_UINT64_T pydict_global_version = 0;
+
+#define DICT_NEXT_VERSION() (++pydict_global_version)
+
+/* Dictionary reuse scheme to save calls to malloc, free, and memset.
+   Keys objects of the minimum size are recycled the same way. */
 #ifndef PyDict_MAXFREELIST
 #define PyDict_MAXFREELIST 80
 #endif
 static PyDictObject *free_list[PyDict_MAXFREELIST];
 static int numfree = 0;
+static PyDictKeysObject *keys_free_list[PyDict_MAXFREELIST];
+static int numfreekeys = 0;
 
 void
 PyDict_Fini(void)
@@ -235,61 +481,204 @@ PyDict_Fini(void)
         assert(PyDict_CheckExact(op));
         PyObject_GC_Del(op);
     }
+    while (numfreekeys)
+        PyObject_FREE(keys_free_list[--numfreekeys]);
 }
 
-PyObject *
-PyDict_New(void)
+static PyDictKeysObject *
+new_keys_object(Py_ssize_t size)
 {
-    register PyDictObject *mp;
-    if (dummy == NULL) { /* Auto-initialize dummy */
-        dummy = PyString_FromString("<dummy key>");
-        if (dummy == NULL)
-            return NULL;
-#ifdef SHOW_CONVERSION_COUNTS
-        Py_AtExit(show_counts);
-#endif
-#ifdef SHOW_ALLOC_COUNT
-        Py_AtExit(show_alloc);
-#endif
-#ifdef SHOW_TRACK_COUNT
-        Py_AtExit(show_track);
+    PyDictKeysObject *dk;
+    Py_ssize_t es, usable;
+
+    assert(size >= PyDict_MINSIZE);
+    assert(IS_POWER_OF_2(size));
+
+    usable = USABLE_FRACTION(size);
+    if (size <= 0xff) {
+        es = 1;
+    }
+    else if (size <= 0xffff) {
+        es = 2;
+    }
+#if SIZEOF_VOID_P > 4
+    else if (size <= 0xffffffff) {
+        es = 4;
+    }
 #endif
+    else {
+        es = sizeof(Py_ssize_t);
+    }
+
+    if (size == PyDict_MINSIZE && numfreekeys > 0) {
+        dk = keys_free_list[--numfreekeys];
     }
+    else {
+        if (usable > (PY_SSIZE_T_MAX - (Py_ssize_t)sizeof(PyDictKeysObject) -
+                      es * size) / (Py_ssize_t)sizeof(PyDictEntry)) {
+            PyErr_NoMemory();
+            return NULL;
+        }
+        dk = PyObject_MALLOC(sizeof(PyDictKeysObject) - DK_INDICES_SIZE +
+                             es * size + sizeof(PyDictEntry) * usable);
+        if (dk == NULL) {
+            PyErr_NoMemory();
+            return NULL;
+        }
+    }
+    dk->dk_refcnt = 1;
+    dk->dk_size = size;
+    dk->dk_usable = usable;
+    dk->dk_lookup = lookdict_string_nodummy;
+    dk->dk_nentries = 0;
+    memset(&dk->dk_indices.as_1[0], 0xff, es * size);
+    memset(DK_ENTRIES(dk), 0, sizeof(PyDictEntry) * usable);
+    return dk;
+}
+
+/* Release the memory of a keys object whose entries are already cleared
+   (or whose references were transferred elsewhere). */
+static void
+free_keys_memory(PyDictKeysObject *keys)
+{
+    if (DK_SIZE(keys) == PyDict_MINSIZE && numfreekeys < PyDict_MAXFREELIST)
+        keys_free_list[numfreekeys++] = keys;
+    else
+        PyObject_FREE(keys);
+}
+
+static void
+free_keys_object(PyDictKeysObject *keys)
+{
+    PyDictEntry *entries = DK_ENTRIES(keys);
+    Py_ssize_t i, n;
+
+    assert(keys != Py_EMPTY_KEYS);
+    for (i = 0, n = keys->dk_nentries; i < n; i++) {
+        Py_XDECREF(entries[i].me_key);
+        Py_XDECREF(entries[i].me_value);
+    }
+    free_keys_memory(keys);
+}
+
+#define new_values(size) PyMem_NEW(PyObject *, size)
+#define free_values(values) PyMem_FREE(values)
+
+/* Consumes a reference to the keys object */
+static PyObject *
+new_dict(PyDictKeysObject *keys, PyObject **values)
+{
+    register PyDictObject *mp;
+
+    assert(keys != NULL);
     if (numfree) {
         mp = free_list[--numfree];
         assert (mp != NULL);
         assert (Py_TYPE(mp) == &PyDict_Type);
         _Py_NewReference((PyObject *)mp);
-        if (mp->ma_fill) {
-            EMPTY_TO_MINSIZE(mp);
-        } else {
-            /* At least set ma_table and ma_mask; these are wrong
-               if an empty but presized dict is added to freelist */
-            INIT_NONZERO_DICT_SLOTS(mp);
-        }
-        assert (mp->ma_used == 0);
-        assert (mp->ma_table == mp->ma_smalltable);
-        assert (mp->ma_mask == PyDict_MINSIZE - 1);
 #ifdef SHOW_ALLOC_COUNT
         count_reuse++;
 #endif
-    } else {
+    }
+    else {
         mp = PyObject_GC_New(PyDictObject, &PyDict_Type);
-        if (mp == NULL)
+        if (mp == NULL) {
+            DK_DECREF(keys);
+            if (values != empty_values)
+                free_values(values);
             return NULL;
-        EMPTY_TO_MINSIZE(mp);
+        }
 #ifdef SHOW_ALLOC_COUNT
         count_alloc++;
 #endif
     }
-    mp->ma_lookup = lookdict_string;
+    mp->ma_keys = keys;
+    mp->ma_values = values;
+    mp->ma_used = 0;
+    mp->ma_version_tag = DICT_NEXT_VERSION();
 #ifdef SHOW_TRACK_COUNT
     count_untracked++;
 #endif
+    return (PyObject *)mp;
+}
+
+/* Consumes a reference to the keys object */
+static PyObject *
+new_dict_with_shared_keys(PyDictKeysObject *keys)
+{
+    PyObject **values;
+    Py_ssize_t i, size;
+
+    size = USABLE_FRACTION(DK_SIZE(keys));
+    values = new_values(size);
+    if (values == NULL) {
+        DK_DECREF(keys);
+        return PyErr_NoMemory();
+    }
+    for (i = 0; i < size; i++)
+        values[i] = NULL;
+    return new_dict(keys, values);
+}
+
+PyObject *
+PyDict_New(void)
+{
+    PyDictKeysObject *keys;
+
+#if defined(SHOW_CONVERSION_COUNTS) || defined(SHOW_ALLOC_COUNT) || \
+    defined(SHOW_TRACK_COUNT)
+    static int counts_registered = 0;
+    if (!counts_registered) {
+        counts_registered = 1;
+#ifdef SHOW_CONVERSION_COUNTS
+        Py_AtExit(show_counts);
+#endif
+#ifdef SHOW_ALLOC_COUNT
+        Py_AtExit(show_alloc);
+#endif
+#ifdef SHOW_TRACK_COUNT
+        Py_AtExit(show_track);
+#endif
+    }
+#endif
+    keys = new_keys_object(PyDict_MINSIZE);
+    if (keys == NULL)
+        return NULL;
 #ifdef SHOW_CONVERSION_COUNTS
     ++created;
 #endif
-    return (PyObject *)mp;
+    return new_dict(keys, NULL);
+}
+
+/* Search index of hash table from offset of entry table */
+static Py_ssize_t
+lookdict_index(PyDictKeysObject *k, long hash, Py_ssize_t index)
+{
+    size_t i, perturb;
+    size_t mask = DK_MASK(k);
+    Py_ssize_t ix;
+
+    i = (size_t)hash & mask;
+    ix = dk_get_index(k, i);
+    if (ix == index) {
+        return i;
+    }
+    if (ix == DKIX_EMPTY) {
+        return DKIX_EMPTY;
+    }
+
+    for (perturb = hash; ; perturb >>= PERTURB_SHIFT) {
+        i = mask & ((i << 2) + i + perturb + 1);
+        ix = dk_get_index(k, i);
+        if (ix == index) {
+            return i;
+        }
+        if (ix == DKIX_EMPTY) {
+            return DKIX_EMPTY;
+        }
+    }
+    assert(0);          /* NOT REACHED */
+    return DKIX_ERROR;
 }
 
 /*
@@ -307,45 +696,74 @@ All arithmetic on hash should ignore overflow.
 contributions by Reimer Behrends, Jyrki Alakuijala, Vladimir Marangozov and
 Christian Tismer).
 
-lookdict() is general-purpose, and may return NULL if (and only if) a
+lookdict() is general-purpose, and may return DKIX_ERROR if (and only if) a
 comparison raises an exception (this was new in Python 2.5).
 lookdict_string() below is specialized to string keys, comparison of which can
-never raise an exception; that function can never return NULL.  For both, when
-the key isn't found a PyDictEntry* is returned for which the me_value field is
-NULL; this is the slot in the dict at which the key would have been found, and
-the caller can (if it wishes) add the <key, value> pair to the returned
-PyDictEntry*.
+never raise an exception; that function can never return DKIX_ERROR.
+lookdict_string_nodummy is lookdict_string() specialized for tables without
+dummy slots, and lookdict_split() is the variant used by split tables.
+
+All of them return the index of the entry holding key in dk_entries, and set
+*value_addr to the address of its value slot: the me_value field for
+combined tables, the matching ma_values item for split tables.  When the key
+isn't found DKIX_EMPTY is returned and *value_addr is set to NULL.  If
+hashpos isn't NULL, *hashpos is set to the index slot of the entry or, when
+the key isn't found, to the slot at which it would be inserted.
 */
-static PyDictEntry *
-lookdict(PyDictObject *mp, PyObject *key, register long hash)
+static Py_ssize_t
+lookdict(PyDictObject *mp, PyObject *key, register long hash,
+         PyObject ***value_addr, Py_ssize_t *hashpos)
 {
     register size_t i;
     register size_t perturb;
-    register PyDictEntry *freeslot;
-    register size_t mask = (size_t)mp->ma_mask;
-    PyDictEntry *ep0 = mp->ma_table;
-    register PyDictEntry *ep;
+    register size_t mask;
+    Py_ssize_t ix, freeslot;
+    PyDictKeysObject *dk;
+    PyDictEntry *ep0, *ep;
     register int cmp;
     PyObject *startkey;
 
+top:
+    dk = mp->ma_keys;
+    mask = DK_MASK(dk);
+    ep0 = DK_ENTRIES(dk);
     i = (size_t)hash & mask;
-    ep = &ep0[i];
-    if (ep->me_key == NULL || ep->me_key == key)
-        return ep;
 
-    if (ep->me_key == dummy)
-        freeslot = ep;
+    ix = dk_get_index(dk, i);
+    if (ix == DKIX_EMPTY) {
+        if (hashpos != NULL)
+            *hashpos = i;
+        *value_addr = NULL;
+        return DKIX_EMPTY;
+    }
+    if (ix == DKIX_DUMMY) {
+        freeslot = i;
+    }
     else {
+        ep = &ep0[ix];
+        assert(ep->me_key != NULL);
+        if (ep->me_key == key) {
+            *value_addr = &ep->me_value;
+            if (hashpos != NULL)
+                *hashpos = i;
+            return ix;
+        }
         if (ep->me_hash == hash) {
             startkey = ep->me_key;
             Py_INCREF(startkey);
             cmp = PyObject_RichCompareBool(startkey, key, Py_EQ);
             Py_DECREF(startkey);
-            if (cmp < 0)
-                return NULL;
-            if (ep0 == mp->ma_table && ep->me_key == startkey) {
-                if (cmp > 0)
-                    return ep;
+            if (cmp < 0) {
+                *value_addr = NULL;
+                return DKIX_ERROR;
+            }
+            if (dk == mp->ma_keys && ep->me_key == startkey) {
+                if (cmp > 0) {
+                    *value_addr = &ep->me_value;
+                    if (hashpos != NULL)
+                        *hashpos = i;
+                    return ix;
+                }
             }
             else {
                 /* The compare did major nasty stuff to the
@@ -353,31 +771,52 @@ lookdict(PyDictObject *mp, PyObject *key, register long hash)
                  * XXX A clever adversary could prevent this
                  * XXX from terminating.
                  */
-                return lookdict(mp, key, hash);
+                goto top;
             }
         }
-        freeslot = NULL;
+        freeslot = -1;
     }
 
-    /* In the loop, me_key == dummy is by far (factor of 100s) the
+    /* In the loop, DKIX_DUMMY is by far (factor of 100s) the
        least likely outcome, so test for that last. */
     for (perturb = hash; ; perturb >>= PERTURB_SHIFT) {
-        i = (i << 2) + i + perturb + 1;
-        ep = &ep0[i & mask];
-        if (ep->me_key == NULL)
-            return freeslot == NULL ? ep : freeslot;
-        if (ep->me_key == key)
-            return ep;
-        if (ep->me_hash == hash && ep->me_key != dummy) {
+        i = mask & ((i << 2) + i + perturb + 1);
+        ix = dk_get_index(dk, i);
+        if (ix == DKIX_EMPTY) {
+            if (hashpos != NULL)
+                *hashpos = (freeslot == -1) ? (Py_ssize_t)i : freeslot;
+            *value_addr = NULL;
+            return DKIX_EMPTY;
+        }
+        if (ix == DKIX_DUMMY) {
+            if (freeslot == -1)
+                freeslot = i;
+            continue;
+        }
+        ep = &ep0[ix];
+        assert(ep->me_key != NULL);
+        if (ep->me_key == key) {
+            if (hashpos != NULL)
+                *hashpos = i;
+            *value_addr = &ep->me_value;
+            return ix;
+        }
+        if (ep->me_hash == hash) {
             startkey = ep->me_key;
             Py_INCREF(startkey);
             cmp = PyObject_RichCompareBool(startkey, key, Py_EQ);
             Py_DECREF(startkey);
-            if (cmp < 0)
-                return NULL;
-            if (ep0 == mp->ma_table && ep->me_key == startkey) {
-                if (cmp > 0)
-                    return ep;
+            if (cmp < 0) {
+                *value_addr = NULL;
+                return DKIX_ERROR;
+            }
+            if (dk == mp->ma_keys && ep->me_key == startkey) {
+                if (cmp > 0) {
+                    if (hashpos != NULL)
+                        *hashpos = i;
+                    *value_addr = &ep->me_value;
+                    return ix;
+                }
             }
             else {
                 /* The compare did major nasty stuff to the
@@ -385,11 +824,9 @@ lookdict(PyDictObject *mp, PyObject *key, register long hash)
                  * XXX A clever adversary could prevent this
                  * XXX from terminating.
                  */
-                return lookdict(mp, key, hash);
+                goto top;
             }
         }
-        else if (ep->me_key == dummy && freeslot == NULL)
-            freeslot = ep;
     }
     assert(0);          /* NOT REACHED */
     return 0;
@@ -404,16 +841,18 @@ lookdict(PyDictObject *mp, PyObject *key, register long hash)
  *
  * This is valuable because dicts with only string keys are very common.
  */
-static PyDictEntry *
-lookdict_string(PyDictObject *mp, PyObject *key, register long hash)
+static Py_ssize_t
+lookdict_string(PyDictObject *mp, PyObject *key, register long hash,
+                PyObject ***value_addr, Py_ssize_t *hashpos)
 {
     register size_t i;
     register size_t perturb;
-    register PyDictEntry *freeslot;
-    register size_t mask = (size_t)mp->ma_mask;
-    PyDictEntry *ep0 = mp->ma_table;
+    register size_t mask = DK_MASK(mp->ma_keys);
+    Py_ssize_t ix, freeslot;
+    PyDictEntry *ep0 = DK_ENTRIES(mp->ma_keys);
     register PyDictEntry *ep;
 
+    assert(mp->ma_values == NULL);
     /* Make sure this function doesn't have to handle non-string keys,
        including subclasses of str; e.g., one reason to subclass
        strings is to override __eq__, and for speed we don't cater to
@@ -422,35 +861,153 @@ lookdict_string(PyDictObject *mp, PyObject *key, register long hash)
 #ifdef SHOW_CONVERSION_COUNTS
         ++converted;
 #endif
-        mp->ma_lookup = lookdict;
-        return lookdict(mp, key, hash);
+        mp->ma_keys->dk_lookup = lookdict;
+        return lookdict(mp, key, hash, value_addr, hashpos);
+    }
+    i = (size_t)hash & mask;
+    ix = dk_get_index(mp->ma_keys, i);
+    if (ix == DKIX_EMPTY) {
+        if (hashpos != NULL)
+            *hashpos = i;
+        *value_addr = NULL;
+        return DKIX_EMPTY;
+    }
+    if (ix == DKIX_DUMMY) {
+        freeslot = i;
     }
-    i = hash & mask;
-    ep = &ep0[i];
-    if (ep->me_key == NULL || ep->me_key == key)
-        return ep;
-    if (ep->me_key == dummy)
-        freeslot = ep;
     else {
-        if (ep->me_hash == hash && _PyString_Eq(ep->me_key, key))
-            return ep;
-        freeslot = NULL;
+        ep = &ep0[ix];
+        assert(ep->me_key != NULL);
+        if (ep->me_key == key
+            || (ep->me_hash == hash && _PyString_Eq(ep->me_key, key))) {
+            if (hashpos != NULL)
+                *hashpos = i;
+            *value_addr = &ep->me_value;
+            return ix;
+        }
+        freeslot = -1;
     }
 
-    /* In the loop, me_key == dummy is by far (factor of 100s) the
+    /* In the loop, DKIX_DUMMY is by far (factor of 100s) the
        least likely outcome, so test for that last. */
     for (perturb = hash; ; perturb >>= PERTURB_SHIFT) {
-        i = (i << 2) + i + perturb + 1;
-        ep = &ep0[i & mask];
-        if (ep->me_key == NULL)
-            return freeslot == NULL ? ep : freeslot;
+        i = mask & ((i << 2) + i + perturb + 1);
+        ix = dk_get_index(mp->ma_keys, i);
+        if (ix == DKIX_EMPTY) {
+            if (hashpos != NULL)
+                *hashpos = (freeslot == -1) ? (Py_ssize_t)i : freeslot;
+            *value_addr = NULL;
+            return DKIX_EMPTY;
+        }
+        if (ix == DKIX_DUMMY) {
+            if (freeslot == -1)
+                freeslot = i;
+            continue;
+        }
+        ep = &ep0[ix];
+        assert(ep->me_key != NULL);
         if (ep->me_key == key
-            || (ep->me_hash == hash
-            && ep->me_key != dummy
-            && _PyString_Eq(ep->me_key, key)))
-            return ep;
-        if (ep->me_key == dummy && freeslot == NULL)
-            freeslot = ep;
+            || (ep->me_hash == hash && _PyString_Eq(ep->me_key, key))) {
+            *value_addr = &ep->me_value;
+            if (hashpos != NULL)
+                *hashpos = i;
+            return ix;
+        }
+    }
+    assert(0);          /* NOT REACHED */
+    return 0;
+}
+
+/* Faster version of lookdict_string when it is known that no dummy slots
+ * will be present. */
+static Py_ssize_t
+lookdict_string_nodummy(PyDictObject *mp, PyObject *key, register long hash,
+                        PyObject ***value_addr, Py_ssize_t *hashpos)
+{
+    register size_t i;
+    register size_t perturb;
+    register size_t mask = DK_MASK(mp->ma_keys);
+    Py_ssize_t ix;
+    PyDictEntry *ep0 = DK_ENTRIES(mp->ma_keys);
+    register PyDictEntry *ep;
+
+    assert(mp->ma_values == NULL);
+    if (!PyString_CheckExact(key)) {
+#ifdef SHOW_CONVERSION_COUNTS
+        ++converted;
+#endif
+        mp->ma_keys->dk_lookup = lookdict;
+        return lookdict(mp, key, hash, value_addr, hashpos);
+    }
+    i = (size_t)hash & mask;
+    for (perturb = hash; ; perturb >>= PERTURB_SHIFT) {
+        ix = dk_get_index(mp->ma_keys, i);
+        assert (ix != DKIX_DUMMY);
+        if (ix == DKIX_EMPTY) {
+            if (hashpos != NULL)
+                *hashpos = i;
+            *value_addr = NULL;
+            return DKIX_EMPTY;
+        }
+        ep = &ep0[ix];
+        assert(ep->me_key != NULL && PyString_CheckExact(ep->me_key));
+        if (ep->me_key == key ||
+            (ep->me_hash == hash && _PyString_Eq(ep->me_key, key))) {
+            if (hashpos != NULL)
+                *hashpos = i;
+            *value_addr = &ep->me_value;
+            return ix;
+        }
+        i = mask & ((i << 2) + i + perturb + 1);
+    }
+    assert(0);          /* NOT REACHED */
+    return 0;
+}
+
+/* Version of lookdict for split tables.
+ * All split tables and only split tables use this lookup function.
+ * Split tables only contain string keys and no dummy keys,
+ * so algorithm is the same as lookdict_string_nodummy.
+ */
+static Py_ssize_t
+lookdict_split(PyDictObject *mp, PyObject *key, register long hash,
+               PyObject ***value_addr, Py_ssize_t *hashpos)
+{
+    register size_t i;
+    register size_t perturb;
+    register size_t mask = DK_MASK(mp->ma_keys);
+    Py_ssize_t ix;
+    PyDictEntry *ep0 = DK_ENTRIES(mp->ma_keys);
+    register PyDictEntry *ep;
+
+    assert(mp->ma_values != NULL);
+    if (!PyString_CheckExact(key)) {
+        ix = lookdict(mp, key, hash, value_addr, hashpos);
+        /* lookdict expects a combined-table, so fix value_addr */
+        if (ix >= 0)
+            *value_addr = &mp->ma_values[ix];
+        return ix;
+    }
+    i = (size_t)hash & mask;
+    for (perturb = hash; ; perturb >>= PERTURB_SHIFT) {
+        ix = dk_get_index(mp->ma_keys, i);
+        assert (ix != DKIX_DUMMY);
+        if (ix == DKIX_EMPTY) {
+            if (hashpos != NULL)
+                *hashpos = i;
+            *value_addr = NULL;
+            return DKIX_EMPTY;
+        }
+        ep = &ep0[ix];
+        assert(ep->me_key != NULL && PyString_CheckExact(ep->me_key));
+        if (ep->me_key == key ||
+            (ep->me_hash == hash && _PyString_Eq(ep->me_key, key))) {
+            if (hashpos != NULL)
+                *hashpos = i;
+            *value_addr = &mp->ma_values[ix];
+            return ix;
+        }
+        i = mask & ((i << 2) + i + perturb + 1);
     }
     assert(0);          /* NOT REACHED */
     return 0;
@@ -482,126 +1039,229 @@ _PyDict_MaybeUntrack(PyObject *op)
 {
     PyDictObject *mp;
     PyObject *value;
-    Py_ssize_t mask, i;
-    PyDictEntry *ep;
+    Py_ssize_t i, numentries;
+    PyDictEntry *ep0;
 
     if (!PyDict_CheckExact(op) || !_PyObject_GC_IS_TRACKED(op))
         return;
 
     mp = (PyDictObject *) op;
-    ep = mp->ma_table;
-    mask = mp->ma_mask;
-    for (i = 0; i <= mask; i++) {
-        if ((value = ep[i].me_value) == NULL)
-            continue;
-        if (_PyObject_GC_MAY_BE_TRACKED(value) ||
-            _PyObject_GC_MAY_BE_TRACKED(ep[i].me_key))
-            return;
+    ep0 = DK_ENTRIES(mp->ma_keys);
+    numentries = mp->ma_keys->dk_nentries;
+    if (_PyDict_HasSplitTable(mp)) {
+        for (i = 0; i < numentries; i++) {
+            if ((value = mp->ma_values[i]) == NULL)
+                continue;
+            if (_PyObject_GC_MAY_BE_TRACKED(value)) {
+                assert(!_PyObject_GC_MAY_BE_TRACKED(ep0[i].me_key));
+                return;
+            }
+        }
+    }
+    else {
+        for (i = 0; i < numentries; i++) {
+            if ((value = ep0[i].me_value) == NULL)
+                continue;
+            if (_PyObject_GC_MAY_BE_TRACKED(value) ||
+                _PyObject_GC_MAY_BE_TRACKED(ep0[i].me_key))
+                return;
+        }
     }
     DECREASE_TRACK_COUNT
     _PyObject_GC_UNTRACK(op);
 }
 
+/* Internal function to find slot for an item from its hash
+ * when it is known that the key is not present in the dict.
+ *
+ * The dict must be combined. */
+static void
+find_empty_slot(PyDictObject *mp, PyObject *key, long hash,
+                PyObject ***value_addr, Py_ssize_t *hashpos)
+{
+    size_t i;
+    size_t perturb;
+    size_t mask = DK_MASK(mp->ma_keys);
+    Py_ssize_t ix;
+    PyDictEntry *ep, *ep0 = DK_ENTRIES(mp->ma_keys);
+
+    assert(!_PyDict_HasSplitTable(mp));
+    assert(hashpos != NULL);
+    assert(key != NULL);
+
+    if (!PyString_CheckExact(key))
+        mp->ma_keys->dk_lookup = lookdict;
+    i = hash & mask;
+    ix = dk_get_index(mp->ma_keys, i);
+    for (perturb = hash; ix != DKIX_EMPTY; perturb >>= PERTURB_SHIFT) {
+        i = mask & ((i << 2) + i + perturb + 1);
+        ix = dk_get_index(mp->ma_keys, i);
+    }
+    ep = &ep0[mp->ma_keys->dk_nentries];
+    *hashpos = i;
+    assert(ep->me_value == NULL);
+    *value_addr = &ep->me_value;
+}
+
+static int
+insertion_resize(PyDictObject *mp)
+{
+    return dictresize(mp, GROWTH_RATE(mp));
+}
+
 /*
-Internal routine to insert a new item into the table when you have entry object.
-Used by insertdict.
+Internal routine to store an item, given the result of a lookup of key:
+the entry index ix, the index slot hashpos and the value slot value_addr.
+New keys are appended to the entries; the table grows before a new key is
+added once it reaches USABLE_FRACTION, so replacing the value of an existing
+key never resizes it.
+Eats a reference to key and one to value.
+Returns -1 if an error occurred, or 0 on success.
 */
 static int
-insertdict_by_entry(register PyDictObject *mp, PyObject *key, long hash,
-                    PyDictEntry *ep, PyObject *value)
+insertdict_slot(register PyDictObject *mp, PyObject *key, long hash,
+                PyObject *value, Py_ssize_t ix, Py_ssize_t hashpos,
+                PyObject **value_addr)
 {
     PyObject *old_value;
+    PyDictKeysObject *k;
+    PyDictEntry *ep;
 
     MAINTAIN_TRACKING(mp, key, value);
-    if (ep->me_value != NULL) {
-        old_value = ep->me_value;
-        ep->me_value = value;
-        Py_DECREF(old_value); /* which **CAN** re-enter */
-        Py_DECREF(key);
+
+    /* A split table only holds a prefix of the shared entries: when the
+       key comes in another order, it has to be converted to a combined
+       table. */
+    if (_PyDict_HasSplitTable(mp) &&
+        ((ix >= 0 && *value_addr == NULL && mp->ma_used != ix) ||
+         (ix == DKIX_EMPTY && mp->ma_used != mp->ma_keys->dk_nentries))) {
+        if (insertion_resize(mp) < 0)
+            goto Fail;
+        find_empty_slot(mp, key, hash, &value_addr, &hashpos);
+        ix = DKIX_EMPTY;
     }
-    else {
-        if (ep->me_key == NULL)
-            mp->ma_fill++;
-        else {
-            assert(ep->me_key == dummy);
-            Py_DECREF(dummy);
+
+    if (ix == DKIX_EMPTY) {
+        /* Insert into new slot. */
+        if (mp->ma_keys->dk_usable <= 0) {
+            /* Need to resize. */
+            if (insertion_resize(mp) < 0)
+                goto Fail;
+            find_empty_slot(mp, key, hash, &value_addr, &hashpos);
         }
+        k = mp->ma_keys;
+        ep = &DK_ENTRIES(k)[k->dk_nentries];
+        dk_set_index(k, hashpos, k->dk_nentries);
         ep->me_key = key;
         ep->me_hash = (Py_ssize_t)hash;
-        ep->me_value = value;
+        if (mp->ma_values) {
+            assert(mp->ma_values[k->dk_nentries] == NULL);
+            mp->ma_values[k->dk_nentries] = value;
+        }
+        else {
+            ep->me_value = value;
+        }
         mp->ma_used++;
+        mp->ma_version_tag = DICT_NEXT_VERSION();
+        k->dk_usable--;
+        k->dk_nentries++;
+        assert(k->dk_usable >= 0);
+        return 0;
+    }
+
+    mp->ma_version_tag = DICT_NEXT_VERSION();
+    old_value = *value_addr;
+    if (old_value != NULL) {
+        *value_addr = value;
+        Py_DECREF(old_value); /* which **CAN** re-enter */
+        Py_DECREF(key);
+        return 0;
     }
+
+    /* A Pending slot of a split table: the key is already there */
+    assert(_PyDict_HasSplitTable(mp));
+    assert(ix == mp->ma_used);
+    *value_addr = value;
+    mp->ma_used++;
+    Py_DECREF(key);
     return 0;
-}
 
+Fail:
+    Py_DECREF(value);
+    Py_DECREF(key);
+    return -1;
+}
 
 /*
 Internal routine to insert a new item into the table.
-Used both by the internal resize routine and by the public insert routine.
+Used by the public insert routines.
 Eats a reference to key and one to value.
 Returns -1 if an error occurred, or 0 on success.
 */
 static int
-insertdict(register PyDictObject *mp, PyObject *key, long hash, PyObject *value)
+insertdict(register PyDictObject *mp, PyObject *key, long hash,
+           PyObject *value)
 {
-    register PyDictEntry *ep;
+    PyObject **value_addr;
+    Py_ssize_t ix, hashpos;
 
-    assert(mp->ma_lookup != NULL);
-    ep = mp->ma_lookup(mp, key, hash);
-    if (ep == NULL) {
-        Py_DECREF(key);
-        Py_DECREF(value);
-        return -1;
+    if (mp->ma_values != NULL && !PyString_CheckExact(key)) {
+        if (insertion_resize(mp) < 0)
+            goto Fail;
     }
-    return insertdict_by_entry(mp, key, hash, ep, value);
+
+    ix = mp->ma_keys->dk_lookup(mp, key, hash, &value_addr, &hashpos);
+    if (ix == DKIX_ERROR)
+        goto Fail;
+    return insertdict_slot(mp, key, hash, value, ix, hashpos, value_addr);
+
+Fail:
+    Py_DECREF(value);
+    Py_DECREF(key);
+    return -1;
 }
 
 /*
-Internal routine used by dictresize() to insert an item which is
-known to be absent from the dict.  This routine also assumes that
-the dict contains no deleted entries.  Besides the performance benefit,
-using insertdict() in dictresize() is dangerous (SF bug #1456209).
-Note that no refcounts are changed by this routine; if needed, the caller
-is responsible for incref'ing `key` and `value`.
+Internal routine used by dictresize() to build a hash table from the
+entries of a combined table with no deleted entries.  The index slots
+must all be Unused.
 */
 static void
-insertdict_clean(register PyDictObject *mp, PyObject *key, long hash,
-                 PyObject *value)
+build_indices(PyDictKeysObject *keys, PyDictEntry *ep, Py_ssize_t n)
 {
-    register size_t i;
-    register size_t perturb;
-    register size_t mask = (size_t)mp->ma_mask;
-    PyDictEntry *ep0 = mp->ma_table;
-    register PyDictEntry *ep;
-
-    MAINTAIN_TRACKING(mp, key, value);
-    i = hash & mask;
-    ep = &ep0[i];
-    for (perturb = hash; ep->me_key != NULL; perturb >>= PERTURB_SHIFT) {
-        i = (i << 2) + i + perturb + 1;
-        ep = &ep0[i & mask];
+    size_t mask = (size_t)DK_SIZE(keys) - 1;
+    Py_ssize_t ix;
+
+    for (ix = 0; ix != n; ix++, ep++) {
+        size_t hash = (size_t)ep->me_hash;
+        size_t i = hash & mask;
+        size_t perturb;
+        for (perturb = hash; dk_get_index(keys, i) != DKIX_EMPTY;
+             perturb >>= PERTURB_SHIFT) {
+            i = mask & ((i << 2) + i + perturb + 1);
+        }
+        dk_set_index(keys, i, ix);
     }
-    assert(ep->me_value == NULL);
-    mp->ma_fill++;
-    ep->me_key = key;
-    ep->me_hash = (Py_ssize_t)hash;
-    ep->me_value = value;
-    mp->ma_used++;
 }
 
 /*
 Restructure the table by allocating a new table and reinserting all
 items again.  When entries have been deleted, the new table may
 actually be smaller than the old one.
+If a table is split (its keys and hashes are shared, its values are not),
+then the keys are copied (with new references) next to the values in a new
+combined table, leaving the shared keys untouched.
+After resizing a table is always combined,
+but can be resplit by make_keys_shared().
 */
 static int
 dictresize(PyDictObject *mp, Py_ssize_t minused)
 {
-    Py_ssize_t newsize;
-    PyDictEntry *oldtable, *newtable, *ep;
+    Py_ssize_t newsize, numentries;
+    PyDictKeysObject *oldkeys;
+    PyObject **oldvalues;
+    PyDictEntry *oldentries, *newentries;
     Py_ssize_t i;
-    int is_oldtable_malloced;
-    PyDictEntry small_copy[PyDict_MINSIZE];
 
     assert(minused >= 0);
 
@@ -614,67 +1274,199 @@ dictresize(PyDictObject *mp, Py_ssize_t minused)
         PyErr_NoMemory();
         return -1;
     }
-
-    /* Get space for a new table. */
-    oldtable = mp->ma_table;
-    assert(oldtable != NULL);
-    is_oldtable_malloced = oldtable != mp->ma_smalltable;
-
-    if (newsize == PyDict_MINSIZE) {
-        /* A large table is shrinking, or we can't get any smaller. */
-        newtable = mp->ma_smalltable;
-        if (newtable == oldtable) {
-            if (mp->ma_fill == mp->ma_used) {
-                /* No dummies, so no point doing anything. */
-                return 0;
+    oldkeys = mp->ma_keys;
+    oldvalues = mp->ma_values;
+    /* Allocate a new table. */
+    mp->ma_keys = new_keys_object(newsize);
+    if (mp->ma_keys == NULL) {
+        mp->ma_keys = oldkeys;
+        return -1;
+    }
+    /* New table must be large enough. */
+    assert(mp->ma_keys->dk_usable >= mp->ma_used);
+    if (oldkeys->dk_lookup == lookdict)
+        mp->ma_keys->dk_lookup = lookdict;
+
+    numentries = mp->ma_used;
+    oldentries = DK_ENTRIES(oldkeys);
+    newentries = DK_ENTRIES(mp->ma_keys);
+    if (oldvalues != NULL) {
+        /* The keys may be shared with other dicts: copy them over (the
+           values are ours), leaving the old keys object intact. */
+        Py_ssize_t j = 0;
+        for (i = 0; i < oldkeys->dk_nentries; i++) {
+            if (oldvalues[i] != NULL) {
+                PyObject *key = oldentries[i].me_key;
+                Py_INCREF(key);
+                newentries[j].me_key = key;
+                newentries[j].me_hash = oldentries[i].me_hash;
+                newentries[j].me_value = oldvalues[i];
+                j++;
             }
-            /* We're not going to resize it, but rebuild the
-               table anyway to purge old dummy entries.
-               Subtle:  This is *necessary* if fill==size,
-               as lookdict needs at least one virgin slot to
-               terminate failing searches.  If fill < size, it's
-               merely desirable, as dummies slow searches. */
-            assert(mp->ma_fill > mp->ma_used);
-            memcpy(small_copy, oldtable, sizeof(small_copy));
-            oldtable = small_copy;
         }
+        assert(j == numentries);
+        DK_DECREF(oldkeys);
+        if (oldvalues != empty_values)
+            free_values(oldvalues);
     }
     else {
-        newtable = PyMem_NEW(PyDictEntry, newsize);
-        if (newtable == NULL) {
-            PyErr_NoMemory();
-            return -1;
+        /* Move the active entries over; this is refcount-neutral. */
+        assert(oldkeys->dk_refcnt == 1);
+        if (oldkeys->dk_nentries == numentries) {
+            memcpy(newentries, oldentries, numentries * sizeof(PyDictEntry));
         }
+        else {
+            PyDictEntry *ep = oldentries;
+            for (i = 0; i < numentries; i++) {
+                while (ep->me_value == NULL)
+                    ep++;
+                newentries[i] = *ep++;
+            }
+        }
+        free_keys_memory(oldkeys);
     }
+    mp->ma_values = NULL;
 
-    /* Make the dict empty, using the new table. */
-    assert(newtable != oldtable);
-    mp->ma_table = newtable;
-    mp->ma_mask = newsize - 1;
-    memset(newtable, 0, sizeof(PyDictEntry) * newsize);
-    mp->ma_used = 0;
-    i = mp->ma_fill;
-    mp->ma_fill = 0;
+    build_indices(mp->ma_keys, newentries, numentries);
+    mp->ma_keys->dk_usable -= numentries;
+    mp->ma_keys->dk_nentries = numentries;
+    return 0;
+}
+
+/* Returns NULL if unable to split table.
+ * A NULL return does not necessarily indicate an error */
+static PyDictKeysObject *
+make_keys_shared(PyObject *op)
+{
+    Py_ssize_t i;
+    Py_ssize_t size;
+    PyDictObject *mp = (PyDictObject *)op;
 
-    /* Copy the data over; this is refcount-neutral for active entries;
-       dummy entries aren't copied over, of course */
-    for (ep = oldtable; i > 0; ep++) {
-        if (ep->me_value != NULL) {             /* active entry */
-            --i;
-            insertdict_clean(mp, ep->me_key, (long)ep->me_hash,
-                             ep->me_value);
+    if (!PyDict_CheckExact(op))
+        return NULL;
+    if (!_PyDict_HasSplitTable(mp)) {
+        PyDictEntry *ep0;
+        PyObject **values;
+        assert(mp->ma_keys->dk_refcnt == 1);
+        if (mp->ma_keys->dk_lookup == lookdict) {
+            return NULL;
         }
-        else if (ep->me_key != NULL) {          /* dummy entry */
-            --i;
-            assert(ep->me_key == dummy);
-            Py_DECREF(ep->me_key);
+        else if (mp->ma_keys->dk_lookup == lookdict_string) {
+            /* Remove dummy slots */
+            if (dictresize(mp, DK_SIZE(mp->ma_keys)))
+                return NULL;
         }
-        /* else key == value == NULL:  nothing to do */
+        assert(mp->ma_keys->dk_lookup == lookdict_string_nodummy);
+        /* Copy values into a new array */
+        ep0 = DK_ENTRIES(mp->ma_keys);
+        size = USABLE_FRACTION(DK_SIZE(mp->ma_keys));
+        values = new_values(size);
+        if (values == NULL) {
+            PyErr_SetString(PyExc_MemoryError,
+                "Not enough memory to allocate new values array");
+            return NULL;
+        }
+        for (i = 0; i < size; i++) {
+            values[i] = ep0[i].me_value;
+            ep0[i].me_value = NULL;
+        }
+        mp->ma_keys->dk_lookup = lookdict_split;
+        mp->ma_values = values;
     }
+    DK_INCREF(mp->ma_keys);
+    return mp->ma_keys;
+}
 
-    if (is_oldtable_malloced)
-        PyMem_DEL(oldtable);
-    return 0;
+
+/* Shared keys support for instance dictionaries.
+
+   Each class (new-style heap type or classic class) caches a keys object
+   which the __dict__ of its instances share, so that only a values array
+   is allocated per instance.  The cache is created empty and grown by the
+   first instance that stores attributes; once an instance dict stops
+   matching the cached keys (a new attribute forces a resize) the cache is
+   re-shared from that instance, or dropped if other dicts still use it. */
+
+PyDictKeysObject *
+_PyDict_NewKeysForClass(void)
+{
+    PyDictKeysObject *keys = new_keys_object(PyDict_MINSIZE);
+    if (keys == NULL)
+        PyErr_Clear();
+    else
+        keys->dk_lookup = lookdict_split;
+    return keys;
+}
+
+void
+_PyDictKeys_DecRef(PyDictKeysObject *keys)
+{
+    DK_DECREF(keys);
+}
+
+Py_ssize_t
+_PyDict_KeysSize(PyDictKeysObject *keys)
+{
+    return (sizeof(PyDictKeysObject) - DK_INDICES_SIZE
+            + DK_IXSIZE(keys) * DK_SIZE(keys)
+            + USABLE_FRACTION(DK_SIZE(keys)) * sizeof(PyDictEntry));
+}
+
+PyObject *
+_PyObjectDict_New(PyDictKeysObject *cached)
+{
+    if (cached == NULL)
+        return PyDict_New();
+    DK_INCREF(cached);
+    return new_dict_with_shared_keys(cached);
+}
+
+int
+_PyObjectDict_SetItem(PyDictKeysObject **cachedptr, PyObject **dictptr,
+                      PyObject *key, PyObject *value)
+{
+    PyObject *dict;
+    PyDictKeysObject *cached;
+    int res;
+
+    assert(dictptr != NULL);
+    cached = (cachedptr != NULL) ? *cachedptr : NULL;
+    dict = *dictptr;
+    if (dict == NULL) {
+        dict = _PyObjectDict_New(cached);
+        if (dict == NULL)
+            return -1;
+        *dictptr = dict;
+    }
+    Py_INCREF(dict);
+    if (value == NULL) {
+        res = PyDict_DelItem(dict, key);
+    }
+    else if (cached == NULL || !PyDict_CheckExact(dict) ||
+             ((PyDictObject *)dict)->ma_keys != cached) {
+        res = PyDict_SetItem(dict, key, value);
+    }
+    else {
+        /* Hold the cached keys across the insertion: a resize releases
+           the dict's reference to them. */
+        DK_INCREF(cached);
+        res = PyDict_SetItem(dict, key, value);
+        if (res == 0 && *cachedptr == cached &&
+            ((PyDictObject *)dict)->ma_keys != cached) {
+            /* The shared keys were outgrown.  If no other dict uses them,
+               re-share the keys of this dict; otherwise stop sharing. */
+            *cachedptr = NULL;
+            if (cached->dk_refcnt == 2) {
+                *cachedptr = make_keys_shared(dict);
+                if (*cachedptr == NULL && PyErr_Occurred())
+                    res = -1;
+            }
+            DK_DECREF(cached);
+        }
+        DK_DECREF(cached);
+    }
+    Py_DECREF(dict);
+    return res;
 }
 
 /* Create a new dictionary pre-sized to hold an estimated number of elements.
@@ -685,13 +1477,28 @@ dictresize(PyDictObject *mp, Py_ssize_t minused)
 PyObject *
 _PyDict_NewPresized(Py_ssize_t minused)
 {
-    PyObject *op = PyDict_New();
+    const Py_ssize_t max_presize = 128 * 1024;
+    Py_ssize_t newsize;
+    PyDictKeysObject *new_keys;
 
-    if (minused>5 && op != NULL && dictresize((PyDictObject *)op, minused) == -1) {
-        Py_DECREF(op);
-        return NULL;
+    /* There is no strict guarantee that the returned dict can hold minused
+       items without resizing, so a huge estimate gets a medium size dict
+       rather than a MemoryError. */
+    if (minused > USABLE_FRACTION(max_presize)) {
+        newsize = max_presize;
+    }
+    else {
+        Py_ssize_t minsize = ESTIMATE_SIZE(minused);
+        newsize = PyDict_MINSIZE;
+        while (newsize < minsize)
+            newsize <<= 1;
     }
-    return op;
+    if (newsize <= PyDict_MINSIZE)
+        return PyDict_New();
+    new_keys = new_keys_object(newsize);
+    if (new_keys == NULL)
+        return NULL;
+    return new_dict(new_keys, NULL);
 }
 
 /* Note that, for historical reasons, PyDict_GetItem() suppresses all errors
@@ -709,8 +1516,10 @@ PyDict_GetItem(PyObject *op, PyObject *key)
 {
     long hash;
     PyDictObject *mp = (PyDictObject *)op;
-    PyDictEntry *ep;
+    Py_ssize_t ix;
     PyThreadState *tstate;
+    PyObject **value_addr;
+
     if (!PyDict_Check(op))
         return NULL;
     if (!PyString_CheckExact(key) ||
@@ -733,89 +1542,185 @@ PyDict_GetItem(PyObject *op, PyObject *key)
         /* preserve the existing exception */
         PyObject *err_type, *err_value, *err_tb;
         PyErr_Fetch(&err_type, &err_value, &err_tb);
-        ep = (mp->ma_lookup)(mp, key, hash);
+        ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
         /* ignore errors */
         PyErr_Restore(err_type, err_value, err_tb);
-        if (ep == NULL)
+        if (ix < 0)
             return NULL;
     }
     else {
-        ep = (mp->ma_lookup)(mp, key, hash);
-        if (ep == NULL) {
-            PyErr_Clear();
+        ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+        if (ix < 0) {
+            if (ix == DKIX_ERROR)
+                PyErr_Clear();
+            return NULL;
+        }
+    }
+    return *value_addr;
+}
+
+/* Variant of PyDict_GetItem() that doesn't suppress exceptions.
+   This returns NULL *with* an exception set if an exception occurred.
+   It returns NULL *without* an exception set if the key wasn't present.
+*/
+PyObject *
+_PyDict_GetItemWithError(PyObject *op, PyObject *key)
+{
+    long hash;
+    PyDictObject *mp = (PyDictObject *)op;
+    Py_ssize_t ix;
+    PyObject **value_addr;
+
+    if (!PyDict_Check(op)) {
+        PyErr_BadInternalCall();
+        return NULL;
+    }
+    if (!PyString_CheckExact(key) ||
+        (hash = ((PyStringObject *) key)->ob_shash) == -1)
+    {
+        hash = PyObject_Hash(key);
+        if (hash == -1) {
+            return NULL;
+        }
+    }
+
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+    if (ix < 0) {
+        return NULL;
+    }
+    return *value_addr;
+}
+
+/* Variant of _PyDict_GetItemWithError() for callers that have already
+   computed the hash of key.  Like _PyDict_GetItemWithError(), errors
+   raised during the lookup are not suppressed.
+*/
+PyObject *
+_PyDict_GetItem_KnownHash(PyObject *op, PyObject *key, long hash)
+{
+    PyDictObject *mp = (PyDictObject *)op;
+    Py_ssize_t ix;
+    PyObject **value_addr;
+
+    if (!PyDict_Check(op)) {
+        PyErr_BadInternalCall();
+        return NULL;
+    }
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+    if (ix < 0) {
+        return NULL;
+    }
+    return *value_addr;
+}
+
+/* Fast version of global value lookup (LOAD_GLOBAL).
+ * Lookup in globals, then builtins.
+ *
+ * Raise an exception and return NULL if an error occurred (ex: computing the
+ * key hash failed, key comparison failed, ...). Return NULL if the key doesn't
+ * exist. Return the value if the key exists.
+ */
+PyObject *
+_PyDict_LoadGlobal(PyDictObject *globals, PyDictObject *builtins,
+                   PyObject *key)
+{
+    long hash;
+    Py_ssize_t ix;
+    PyObject **value_addr;
+
+    if (!PyString_CheckExact(key) ||
+        (hash = ((PyStringObject *) key)->ob_shash) == -1)
+    {
+        hash = PyObject_Hash(key);
+        if (hash == -1)
             return NULL;
-        }
     }
-    return ep->me_value;
+
+    /* namespace 1: globals */
+    ix = globals->ma_keys->dk_lookup(globals, key, hash, &value_addr, NULL);
+    if (ix == DKIX_ERROR)
+        return NULL;
+    if (ix != DKIX_EMPTY && *value_addr != NULL)
+        return *value_addr;
+
+    /* namespace 2: builtins */
+    ix = builtins->ma_keys->dk_lookup(builtins, key, hash, &value_addr, NULL);
+    if (ix < 0)
+        return NULL;
+    return *value_addr;
 }
 
-/* Variant of PyDict_GetItem() that doesn't suppress exceptions.
-   This returns NULL *with* an exception set if an exception occurred.
-   It returns NULL *without* an exception set if the key wasn't present.
-*/
-PyObject *
-_PyDict_GetItemWithError(PyObject *op, PyObject *key)
+/* Look up key, trying the entry at index hint of the entries first.
+   Return the index of the entry holding key and set *value to its
+   (borrowed) value, or return -1 and set *value to NULL if key is not
+   in the dict.  Errors raised during the lookup are cleared.  The LOAD_ATTR
+   opcode cache in ceval.c remembers these indices; since instances of a
+   class share their keys, one hint serves all of them. */
+Py_ssize_t
+_PyDict_GetItemHint(PyDictObject *mp, PyObject *key, Py_ssize_t hint,
+                    PyObject **value)
 {
     long hash;
-    PyDictObject *mp = (PyDictObject *)op;
-    PyDictEntry *ep;
-    if (!PyDict_Check(op)) {
-        PyErr_BadInternalCall();
-        return NULL;
+    Py_ssize_t ix;
+    PyObject **value_addr;
+
+    assert(PyDict_Check(mp));
+    if (hint >= 0 && hint < mp->ma_keys->dk_nentries &&
+        DK_ENTRIES(mp->ma_keys)[hint].me_key == key) {
+        value_addr = DICT_VALUE_ADDR(mp, hint);
+        if (*value_addr != NULL) {
+            *value = *value_addr;
+            return hint;
+        }
     }
+    *value = NULL;
     if (!PyString_CheckExact(key) ||
         (hash = ((PyStringObject *) key)->ob_shash) == -1)
     {
         hash = PyObject_Hash(key);
         if (hash == -1) {
-            return NULL;
+            PyErr_Clear();
+            return -1;
         }
     }
-
-    ep = (mp->ma_lookup)(mp, key, hash);
-    if (ep == NULL) {
-        return NULL;
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+    if (ix < 0) {
+        if (ix == DKIX_ERROR)
+            PyErr_Clear();
+        return -1;
     }
-    return ep->me_value;
+    if (*value_addr == NULL)
+        return -1;
+    *value = *value_addr;
+    return ix;
 }
 
-static int
-dict_set_item_by_hash_or_entry(register PyObject *op, PyObject *key,
-                               long hash, PyDictEntry *ep, PyObject *value)
+/* Return the index of the entry holding key, -1 if key is not in the dict,
+   or -2 with an exception set.  Entry indices stay valid until the dict's
+   keys object is replaced (see _PyDict_EntriesSize()); the C OrderedDict
+   uses them to find the node of a key. */
+Py_ssize_t
+_PyDict_GetEntryIndex(PyDictObject *mp, PyObject *key, long hash)
 {
-    register PyDictObject *mp;
-    register Py_ssize_t n_used;
+    Py_ssize_t ix;
+    PyObject **value_addr;
+
+    assert(PyDict_Check(mp));
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+    if (ix == DKIX_ERROR)
+        return -2;
+    if (ix == DKIX_EMPTY || *value_addr == NULL)
+        return -1;
+    return ix;
+}
 
-    mp = (PyDictObject *)op;
-    assert(mp->ma_fill <= mp->ma_mask);  /* at least one empty slot */
-    n_used = mp->ma_used;
-    Py_INCREF(value);
-    Py_INCREF(key);
-    if (ep == NULL) {
-        if (insertdict(mp, key, hash, value) != 0)
-            return -1;
-    }
-    else {
-        if (insertdict_by_entry(mp, key, hash, ep, value) != 0)
-            return -1;
-    }
-    /* If we added a key, we can safely resize.  Otherwise just return!
-     * If fill >= 2/3 size, adjust size.  Normally, this doubles or
-     * quaduples the size, but it's also possible for the dict to shrink
-     * (if ma_fill is much larger than ma_used, meaning a lot of dict
-     * keys have been * deleted).
-     *
-     * Quadrupling the size improves average dictionary sparseness
-     * (reducing collisions) at the cost of some memory and iteration
-     * speed (which loops over every possible entry).  It also halves
-     * the number of expensive resize operations in a growing dictionary.
-     *
-     * Very large dictionaries (over 50K items) use doubling instead.
-     * This may help applications with severe memory constraints.
-     */
-    if (!(mp->ma_used > n_used && mp->ma_fill*3 >= (mp->ma_mask+1)*2))
-        return 0;
-    return dictresize(mp, (mp->ma_used > 50000 ? 2 : 4) * mp->ma_used);
+/* Return the number of entries the dict's keys object can hold, an upper
+   bound for the indices returned by _PyDict_GetEntryIndex(). */
+Py_ssize_t
+_PyDict_EntriesSize(PyDictObject *mp)
+{
+    assert(PyDict_Check(mp));
+    return USABLE_FRACTION(DK_SIZE(mp->ma_keys));
 }
 
 /* CAUTION: PyDict_SetItem() must guarantee that it won't resize the
@@ -845,31 +1750,69 @@ PyDict_SetItem(register PyObject *op, PyObject *key, PyObject *value)
         if (hash == -1)
             return -1;
     }
-    return dict_set_item_by_hash_or_entry(op, key, hash, NULL, value);
+    Py_INCREF(key);
+    Py_INCREF(value);
+    return insertdict((PyDictObject *)op, key, hash, value);
+}
+
+int
+_PyDict_SetItem_KnownHash(PyObject *op, PyObject *key, PyObject *value,
+                          long hash)
+{
+    if (!PyDict_Check(op)) {
+        PyErr_BadInternalCall();
+        return -1;
+    }
+    assert(key);
+    assert(value);
+    assert(hash != -1);
+    Py_INCREF(key);
+    Py_INCREF(value);
+    return insertdict((PyDictObject *)op, key, hash, value);
 }
 
+/* Delete the item found by a lookup at entry ix and index slot hashpos.
+   A split table can only drop the value of its last entry (the others
+   would leave a hole in the prefix of the shared entries it holds), so
+   it is converted to a combined table otherwise. */
 static int
-delitem_common(PyDictObject *mp, PyDictEntry *ep)
+delitem_common(PyDictObject *mp, long hash, Py_ssize_t hashpos,
+               Py_ssize_t ix, PyObject **value_addr)
 {
     PyObject *old_value, *old_key;
+    PyDictEntry *ep;
 
-    old_key = ep->me_key;
-    Py_INCREF(dummy);
-    ep->me_key = dummy;
-    old_value = ep->me_value;
-    ep->me_value = NULL;
+    if (_PyDict_HasSplitTable(mp) && ix != mp->ma_used - 1) {
+        /* The entries keep their indices, as the split table holds the
+           values of the first ma_used ones. */
+        if (dictresize(mp, DK_SIZE(mp->ma_keys)))
+            return -1;
+        hashpos = lookdict_index(mp->ma_keys, hash, ix);
+        assert(hashpos >= 0);
+        value_addr = &DK_ENTRIES(mp->ma_keys)[ix].me_value;
+    }
+
+    old_value = *value_addr;
+    assert(old_value != NULL);
+    *value_addr = NULL;
     mp->ma_used--;
+    mp->ma_version_tag = DICT_NEXT_VERSION();
+    if (!_PyDict_HasSplitTable(mp)) {
+        ep = &DK_ENTRIES(mp->ma_keys)[ix];
+        dk_set_index(mp->ma_keys, hashpos, DKIX_DUMMY);
+        ENSURE_ALLOWS_DELETIONS(mp);
+        old_key = ep->me_key;
+        ep->me_key = NULL;
+        Py_DECREF(old_key);
+    }
     Py_DECREF(old_value);
-    Py_DECREF(old_key);
     return 0;
 }
 
 int
 PyDict_DelItem(PyObject *op, PyObject *key)
 {
-    register PyDictObject *mp;
     register long hash;
-    register PyDictEntry *ep;
 
     if (!PyDict_Check(op)) {
         PyErr_BadInternalCall();
@@ -882,16 +1825,32 @@ PyDict_DelItem(PyObject *op, PyObject *key)
         if (hash == -1)
             return -1;
     }
+    return _PyDict_DelItem_KnownHash(op, key, hash);
+}
+
+int
+_PyDict_DelItem_KnownHash(PyObject *op, PyObject *key, long hash)
+{
+    register PyDictObject *mp;
+    Py_ssize_t ix, hashpos;
+    PyObject **value_addr;
+
+    if (!PyDict_Check(op)) {
+        PyErr_BadInternalCall();
+        return -1;
+    }
+    assert(key);
+    assert(hash != -1);
     mp = (PyDictObject *)op;
-    ep = (mp->ma_lookup)(mp, key, hash);
-    if (ep == NULL)
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, &hashpos);
+    if (ix == DKIX_ERROR)
         return -1;
-    if (ep->me_value == NULL) {
+    if (ix == DKIX_EMPTY || *value_addr == NULL) {
         set_key_error(key);
         return -1;
     }
 
-    return delitem_common(mp, ep);
+    return delitem_common(mp, hash, hashpos, ix, value_addr);
 }
 
 int
@@ -900,7 +1859,8 @@ _PyDict_DelItemIf(PyObject *op, PyObject *key,
 {
     register PyDictObject *mp;
     register long hash;
-    register PyDictEntry *ep;
+    Py_ssize_t ix, hashpos;
+    PyObject **value_addr;
     int res;
 
     if (!PyDict_Check(op)) {
@@ -915,18 +1875,18 @@ _PyDict_DelItemIf(PyObject *op, PyObject *key,
             return -1;
     }
     mp = (PyDictObject *)op;
-    ep = (mp->ma_lookup)(mp, key, hash);
-    if (ep == NULL)
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, &hashpos);
+    if (ix == DKIX_ERROR)
         return -1;
-    if (ep->me_value == NULL) {
+    if (ix == DKIX_EMPTY || *value_addr == NULL) {
         set_key_error(key);
         return -1;
     }
-    res = predicate(ep->me_value);
+    res = predicate(*value_addr);
     if (res == -1)
         return -1;
     if (res > 0)
-        return delitem_common(mp, ep);
+        return delitem_common(mp, hash, hashpos, ix, value_addr);
     else
         return 0;
 }
@@ -935,25 +1895,17 @@ void
 PyDict_Clear(PyObject *op)
 {
     PyDictObject *mp;
-    PyDictEntry *ep, *table;
-    int table_is_malloced;
-    Py_ssize_t fill;
-    PyDictEntry small_copy[PyDict_MINSIZE];
-#ifdef Py_DEBUG
+    PyDictKeysObject *oldkeys;
+    PyObject **oldvalues;
     Py_ssize_t i, n;
-#endif
 
     if (!PyDict_Check(op))
         return;
     mp = (PyDictObject *)op;
-#ifdef Py_DEBUG
-    n = mp->ma_mask + 1;
-    i = 0;
-#endif
-
-    table = mp->ma_table;
-    assert(table != NULL);
-    table_is_malloced = table != mp->ma_smalltable;
+    oldkeys = mp->ma_keys;
+    oldvalues = mp->ma_values;
+    if (oldvalues == empty_values)
+        return;
 
     /* This is delicate.  During the process of clearing the dict,
      * decrefs can cause the dict to mutate.  To avoid fatal confusion
@@ -961,43 +1913,64 @@ PyDict_Clear(PyObject *op)
      * clearing the slots, and never refer to anything via mp->xxx while
      * clearing.
      */
-    fill = mp->ma_fill;
-    if (table_is_malloced)
-        EMPTY_TO_MINSIZE(mp);
-
-    else if (fill > 0) {
-        /* It's a small table with something that needs to be cleared.
-         * Afraid the only safe way is to copy the dict entries into
-         * another small table first.
-         */
-        memcpy(small_copy, table, sizeof(small_copy));
-        table = small_copy;
-        EMPTY_TO_MINSIZE(mp);
+    if (mp->ma_used > 0)
+        mp->ma_version_tag = DICT_NEXT_VERSION();
+    DK_INCREF(Py_EMPTY_KEYS);
+    mp->ma_keys = Py_EMPTY_KEYS;
+    mp->ma_values = empty_values;
+    mp->ma_used = 0;
+
+    /* ...then clear the keys and values */
+    if (oldvalues != NULL) {
+        n = oldkeys->dk_nentries;
+        for (i = 0; i < n; i++)
+            Py_CLEAR(oldvalues[i]);
+        free_values(oldvalues);
+        DK_DECREF(oldkeys);
+    }
+    else {
+        assert(oldkeys->dk_refcnt == 1);
+        DK_DECREF(oldkeys);
     }
-    /* else it's a small table that's already empty */
+}
 
-    /* Now we can finally clear things.  If C had refcounts, we could
-     * assert that the refcount on table is 1 now, i.e. that this function
-     * has unique access to it, so decref side-effects can't alter it.
-     */
-    for (ep = table; fill > 0; ++ep) {
-#ifdef Py_DEBUG
-        assert(i < n);
-        ++i;
-#endif
-        if (ep->me_key) {
-            --fill;
-            Py_DECREF(ep->me_key);
-            Py_XDECREF(ep->me_value);
+/* Returns -1 if no more items (or op is not a dict),
+ * index of item otherwise. Stores value in pvalue
+ */
+Py_LOCAL_INLINE(Py_ssize_t)
+dict_next(PyObject *op, Py_ssize_t i, PyObject **pvalue)
+{
+    Py_ssize_t n;
+    PyDictObject *mp;
+    PyObject **value_ptr = NULL;
+
+    if (!PyDict_Check(op))
+        return -1;
+    mp = (PyDictObject *)op;
+    if (i < 0)
+        return -1;
+
+    n = mp->ma_keys->dk_nentries;
+    if (mp->ma_values) {
+        for (; i < n; i++) {
+            value_ptr = &mp->ma_values[i];
+            if (*value_ptr != NULL)
+                break;
         }
-#ifdef Py_DEBUG
-        else
-            assert(ep->me_value == NULL);
-#endif
     }
-
-    if (table_is_malloced)
-        PyMem_DEL(table);
+    else {
+        PyDictEntry *ep0 = DK_ENTRIES(mp->ma_keys);
+        for (; i < n; i++) {
+            value_ptr = &ep0[i].me_value;
+            if (*value_ptr != NULL)
+                break;
+        }
+    }
+    if (i >= n)
+        return -1;
+    if (pvalue)
+        *pvalue = *value_ptr;
+    return i;
 }
 
 /*
@@ -1018,26 +1991,14 @@ PyDict_Clear(PyObject *op)
 int
 PyDict_Next(PyObject *op, Py_ssize_t *ppos, PyObject **pkey, PyObject **pvalue)
 {
-    register Py_ssize_t i;
-    register Py_ssize_t mask;
-    register PyDictEntry *ep;
-
-    if (!PyDict_Check(op))
-        return 0;
-    i = *ppos;
+    PyDictObject *mp;
+    Py_ssize_t i = dict_next(op, *ppos, pvalue);
     if (i < 0)
         return 0;
-    ep = ((PyDictObject *)op)->ma_table;
-    mask = ((PyDictObject *)op)->ma_mask;
-    while (i <= mask && ep[i].me_value == NULL)
-        i++;
+    mp = (PyDictObject *)op;
     *ppos = i+1;
-    if (i > mask)
-        return 0;
     if (pkey)
-        *pkey = ep[i].me_key;
-    if (pvalue)
-        *pvalue = ep[i].me_value;
+        *pkey = DK_ENTRIES(mp->ma_keys)[i].me_key;
     return 1;
 }
 
@@ -1045,27 +2006,15 @@ PyDict_Next(PyObject *op, Py_ssize_t *ppos, PyObject **pkey, PyObject **pvalue)
 int
 _PyDict_Next(PyObject *op, Py_ssize_t *ppos, PyObject **pkey, PyObject **pvalue, long *phash)
 {
-    register Py_ssize_t i;
-    register Py_ssize_t mask;
-    register PyDictEntry *ep;
-
-    if (!PyDict_Check(op))
-        return 0;
-    i = *ppos;
+    PyDictObject *mp;
+    Py_ssize_t i = dict_next(op, *ppos, pvalue);
     if (i < 0)
         return 0;
-    ep = ((PyDictObject *)op)->ma_table;
-    mask = ((PyDictObject *)op)->ma_mask;
-    while (i <= mask && ep[i].me_value == NULL)
-        i++;
+    mp = (PyDictObject *)op;
     *ppos = i+1;
-    if (i > mask)
-        return 0;
-    *phash = (long)(ep[i].me_hash);
+    *phash = (long)(DK_ENTRIES(mp->ma_keys)[i].me_hash);
     if (pkey)
-        *pkey = ep[i].me_key;
-    if (pvalue)
-        *pvalue = ep[i].me_value;
+        *pkey = DK_ENTRIES(mp->ma_keys)[i].me_key;
     return 1;
 }
 
@@ -1074,20 +2023,25 @@ _PyDict_Next(PyObject *op, Py_ssize_t *ppos, PyObject **pkey, PyObject **pvalue,
 static void
 dict_dealloc(register PyDictObject *mp)
 {
-    register PyDictEntry *ep;
-    Py_ssize_t fill = mp->ma_fill;
+    PyObject **values = mp->ma_values;
+    PyDictKeysObject *keys = mp->ma_keys;
+    Py_ssize_t i, n;
     /* bpo-31095: UnTrack is needed before calling any callbacks */
     PyObject_GC_UnTrack(mp);
     Py_TRASHCAN_SAFE_BEGIN(mp)
-    for (ep = mp->ma_table; fill > 0; ep++) {
-        if (ep->me_key) {
-            --fill;
-            Py_DECREF(ep->me_key);
-            Py_XDECREF(ep->me_value);
+    if (values != NULL) {
+        if (values != empty_values) {
+            for (i = 0, n = keys->dk_nentries; i < n; i++) {
+                Py_XDECREF(values[i]);
+            }
+            free_values(values);
         }
+        DK_DECREF(keys);
+    }
+    else if (keys != NULL) {
+        assert(keys->dk_refcnt == 1);
+        DK_DECREF(keys);
     }
-    if (mp->ma_table != mp->ma_smalltable)
-        PyMem_DEL(mp->ma_table);
     if (numfree < PyDict_MAXFREELIST && Py_TYPE(mp) == &PyDict_Type)
         free_list[numfree++] = mp;
     else
@@ -1098,9 +2052,10 @@ dict_dealloc(register PyDictObject *mp)
 static int
 dict_print(register PyDictObject *mp, register FILE *fp, register int flags)
 {
-    register Py_ssize_t i;
+    Py_ssize_t i;
     register Py_ssize_t any;
     int status;
+    PyObject *key, *pvalue;
 
     status = Py_ReprEnter((PyObject*)mp);
     if (status != 0) {
@@ -1116,33 +2071,33 @@ dict_print(register PyDictObject *mp, register FILE *fp, register int flags)
     fprintf(fp, "{");
     Py_END_ALLOW_THREADS
     any = 0;
-    for (i = 0; i <= mp->ma_mask; i++) {
-        PyDictEntry *ep = mp->ma_table + i;
-        PyObject *pvalue = ep->me_value;
-        if (pvalue != NULL) {
-            /* Prevent PyObject_Repr from deleting value during
-               key format */
-            Py_INCREF(pvalue);
-            if (any++ > 0) {
-                Py_BEGIN_ALLOW_THREADS
-                fprintf(fp, ", ");
-                Py_END_ALLOW_THREADS
-            }
-            if (PyObject_Print((PyObject *)ep->me_key, fp, 0)!=0) {
-                Py_DECREF(pvalue);
-                Py_ReprLeave((PyObject*)mp);
-                return -1;
-            }
+    i = 0;
+    while (PyDict_Next((PyObject *)mp, &i, &key, &pvalue)) {
+        /* Prevent PyObject_Print from deleting key or value during
+           key format */
+        Py_INCREF(key);
+        Py_INCREF(pvalue);
+        if (any++ > 0) {
             Py_BEGIN_ALLOW_THREADS
-            fprintf(fp, ": ");
+            fprintf(fp, ", ");
             Py_END_ALLOW_THREADS
-            if (PyObject_Print(pvalue, fp, 0) != 0) {
-                Py_DECREF(pvalue);
-                Py_ReprLeave((PyObject*)mp);
-                return -1;
-            }
+        }
+        if (PyObject_Print(key, fp, 0)!=0) {
+            Py_DECREF(key);
+            Py_DECREF(pvalue);
+            Py_ReprLeave((PyObject*)mp);
+            return -1;
+        }
+        Py_DECREF(key);
+        Py_BEGIN_ALLOW_THREADS
+        fprintf(fp, ": ");
+        Py_END_ALLOW_THREADS
+        if (PyObject_Print(pvalue, fp, 0) != 0) {
             Py_DECREF(pvalue);
+            Py_ReprLeave((PyObject*)mp);
+            return -1;
         }
+        Py_DECREF(pvalue);
     }
     Py_BEGIN_ALLOW_THREADS
     fprintf(fp, "}");
@@ -1241,19 +2196,19 @@ dict_subscript(PyDictObject *mp, register PyObject *key)
 {
     PyObject *v;
     long hash;
-    PyDictEntry *ep;
-    assert(mp->ma_table != NULL);
+    Py_ssize_t ix;
+    PyObject **value_addr;
+
     if (!PyString_CheckExact(key) ||
         (hash = ((PyStringObject *) key)->ob_shash) == -1) {
         hash = PyObject_Hash(key);
         if (hash == -1)
             return NULL;
     }
-    ep = (mp->ma_lookup)(mp, key, hash);
-    if (ep == NULL)
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+    if (ix == DKIX_ERROR)
         return NULL;
-    v = ep->me_value;
-    if (v == NULL) {
+    if (ix == DKIX_EMPTY || *value_addr == NULL) {
         if (!PyDict_CheckExact(mp)) {
             /* Look up __missing__ method if we're a subclass. */
             PyObject *missing, *res;
@@ -1273,8 +2228,8 @@ dict_subscript(PyDictObject *mp, register PyObject *key)
         set_key_error(key);
         return NULL;
     }
-    else
-        Py_INCREF(v);
+    v = *value_addr;
+    Py_INCREF(v);
     return v;
 }
 
@@ -1299,7 +2254,7 @@ dict_keys(register PyDictObject *mp)
     register PyObject *v;
     register Py_ssize_t i, j;
     PyDictEntry *ep;
-    Py_ssize_t mask, n;
+    Py_ssize_t size, n;
 
   again:
     n = mp->ma_used;
@@ -1313,10 +2268,10 @@ dict_keys(register PyDictObject *mp)
         Py_DECREF(v);
         goto again;
     }
-    ep = mp->ma_table;
-    mask = mp->ma_mask;
-    for (i = 0, j = 0; i <= mask; i++) {
-        if (ep[i].me_value != NULL) {
+    ep = DK_ENTRIES(mp->ma_keys);
+    size = mp->ma_keys->dk_nentries;
+    for (i = 0, j = 0; i < size; i++) {
+        if (*DICT_VALUE_ADDR(mp, i) != NULL) {
             PyObject *key = ep[i].me_key;
             Py_INCREF(key);
             PyList_SET_ITEM(v, j, key);
@@ -1332,8 +2287,7 @@ dict_values(register PyDictObject *mp)
 {
     register PyObject *v;
     register Py_ssize_t i, j;
-    PyDictEntry *ep;
-    Py_ssize_t mask, n;
+    Py_ssize_t size, n;
 
   again:
     n = mp->ma_used;
@@ -1347,11 +2301,10 @@ dict_values(register PyDictObject *mp)
         Py_DECREF(v);
         goto again;
     }
-    ep = mp->ma_table;
-    mask = mp->ma_mask;
-    for (i = 0, j = 0; i <= mask; i++) {
-        if (ep[i].me_value != NULL) {
-            PyObject *value = ep[i].me_value;
+    size = mp->ma_keys->dk_nentries;
+    for (i = 0, j = 0; i < size; i++) {
+        PyObject *value = *DICT_VALUE_ADDR(mp, i);
+        if (value != NULL) {
             Py_INCREF(value);
             PyList_SET_ITEM(v, j, value);
             j++;
@@ -1366,7 +2319,7 @@ dict_items(register PyDictObject *mp)
 {
     register PyObject *v;
     register Py_ssize_t i, j, n;
-    Py_ssize_t mask;
+    Py_ssize_t size;
     PyObject *item, *key, *value;
     PyDictEntry *ep;
 
@@ -1395,10 +2348,10 @@ dict_items(register PyDictObject *mp)
         goto again;
     }
     /* Nothing we do below makes any function calls. */
-    ep = mp->ma_table;
-    mask = mp->ma_mask;
-    for (i = 0, j = 0; i <= mask; i++) {
-        if ((value=ep[i].me_value) != NULL) {
+    ep = DK_ENTRIES(mp->ma_keys);
+    size = mp->ma_keys->dk_nentries;
+    for (i = 0, j = 0; i < size; i++) {
+        if ((value = *DICT_VALUE_ADDR(mp, i)) != NULL) {
             key = ep[i].me_key;
             item = PyList_GET_ITEM(v, j);
             Py_INCREF(key);
@@ -1437,7 +2390,7 @@ dict_fromkeys(PyObject *cls, PyObject *args)
             PyObject *key;
             long hash;
 
-            if (dictresize(mp, ((PyDictObject *)seq)->ma_used / 2 * 3)) {
+            if (dictresize(mp, ESTIMATE_SIZE(((PyDictObject *)seq)->ma_used))) {
                 Py_DECREF(d);
                 return NULL;
             }
@@ -1458,7 +2411,7 @@ dict_fromkeys(PyObject *cls, PyObject *args)
             PyObject *key;
             long hash;
 
-            if (dictresize(mp, PySet_GET_SIZE(seq) / 2 * 3)) {
+            if (dictresize(mp, ESTIMATE_SIZE(PySet_GET_SIZE(seq)))) {
                 Py_DECREF(d);
                 return NULL;
             }
@@ -1659,22 +2612,27 @@ PyDict_Merge(PyObject *a, PyObject *b, int override)
             override = 1;
         /* Do one big resize at the start, rather than
          * incrementally resizing as we insert new items.  Expect
-         * that there will be no (or few) overlapping keys.
+         * that there will be no (or few) overlapping keys.  Split
+         * tables are left alone: the keys being merged in are likely
+         * to be shared already (think copying an instance's state).
          */
-        if ((mp->ma_fill + other->ma_used)*3 >= (mp->ma_mask+1)*2) {
-           if (dictresize(mp, (mp->ma_used + other->ma_used)*2) != 0)
+        if (mp->ma_values == NULL &&
+            mp->ma_keys->dk_usable < other->ma_used) {
+           if (dictresize(mp,
+                          ESTIMATE_SIZE(mp->ma_used + other->ma_used)) != 0)
                return -1;
         }
-        for (i = 0; i <= other->ma_mask; i++) {
-            entry = &other->ma_table[i];
-            if (entry->me_value != NULL &&
+        for (i = 0; i < other->ma_keys->dk_nentries; i++) {
+            PyObject *value = *DICT_VALUE_ADDR(other, i);
+            entry = &DK_ENTRIES(other->ma_keys)[i];
+            if (value != NULL &&
                 (override ||
                  PyDict_GetItem(a, entry->me_key) == NULL)) {
                 Py_INCREF(entry->me_key);
-                Py_INCREF(entry->me_value);
+                Py_INCREF(value);
                 if (insertdict(mp, entry->me_key,
                                (long)entry->me_hash,
-                               entry->me_value) != 0)
+                               value) != 0)
                     return -1;
             }
         }
@@ -1736,11 +2694,37 @@ PyObject *
 PyDict_Copy(PyObject *o)
 {
     PyObject *copy;
+    PyDictObject *mp;
+    Py_ssize_t i, n;
 
     if (o == NULL || !PyDict_Check(o)) {
         PyErr_BadInternalCall();
         return NULL;
     }
+    mp = (PyDictObject *)o;
+    if (_PyDict_HasSplitTable(mp)) {
+        /* The copy shares the keys too */
+        PyDictObject *split_copy;
+        Py_ssize_t size = USABLE_FRACTION(DK_SIZE(mp->ma_keys));
+        PyObject **newvalues = new_values(size);
+        if (newvalues == NULL)
+            return PyErr_NoMemory();
+        DK_INCREF(mp->ma_keys);
+        split_copy = (PyDictObject *)new_dict(mp->ma_keys, newvalues);
+        if (split_copy == NULL)
+            return NULL;
+        for (i = 0, n = mp->ma_used; i < n; i++) {
+            PyObject *value = mp->ma_values[i];
+            Py_INCREF(value);
+            split_copy->ma_values[i] = value;
+        }
+        for (; i < size; i++)
+            split_copy->ma_values[i] = NULL;
+        split_copy->ma_used = mp->ma_used;
+        if (_PyObject_GC_IS_TRACKED(mp))
+            _PyObject_GC_TRACK(split_copy);
+        return (PyObject *)split_copy;
+    }
     copy = PyDict_New();
     if (copy == NULL)
         return NULL;
@@ -1806,11 +2790,11 @@ characterize(PyDictObject *a, PyDictObject *b, PyObject **pval)
     Py_ssize_t i;
     int cmp;
 
-    for (i = 0; i <= a->ma_mask; i++) {
+    for (i = 0; i < a->ma_keys->dk_nentries; i++) {
         PyObject *thiskey, *thisaval, *thisbval;
-        if (a->ma_table[i].me_value == NULL)
+        if (*DICT_VALUE_ADDR(a, i) == NULL)
             continue;
-        thiskey = a->ma_table[i].me_key;
+        thiskey = DK_ENTRIES(a->ma_keys)[i].me_key;
         Py_INCREF(thiskey);  /* keep alive across compares */
         if (akey != NULL) {
             cmp = PyObject_RichCompareBool(akey, thiskey, Py_LT);
@@ -1819,8 +2803,8 @@ characterize(PyDictObject *a, PyDictObject *b, PyObject **pval)
                 goto Fail;
             }
             if (cmp > 0 ||
-                i > a->ma_mask ||
-                a->ma_table[i].me_value == NULL)
+                i >= a->ma_keys->dk_nentries ||
+                *DICT_VALUE_ADDR(a, i) == NULL)
             {
                 /* Not the *smallest* a key; or maybe it is
                  * but the compare shrunk the dict so we can't
@@ -1834,7 +2818,7 @@ characterize(PyDictObject *a, PyDictObject *b, PyObject **pval)
         }
 
         /* Compare a[thiskey] to b[thiskey]; cmp <- true iff equal. */
-        thisaval = a->ma_table[i].me_value;
+        thisaval = *DICT_VALUE_ADDR(a, i);
         assert(thisaval);
         Py_INCREF(thisaval);   /* keep alive */
         thisbval = PyDict_GetItem((PyObject *)b, thiskey);
@@ -1934,12 +2918,12 @@ dict_equal(PyDictObject *a, PyDictObject *b)
         return 0;
 
     /* Same # of entries -- check all of 'em.  Exit early on any diff. */
-    for (i = 0; i <= a->ma_mask; i++) {
-        PyObject *aval = a->ma_table[i].me_value;
+    for (i = 0; i < a->ma_keys->dk_nentries; i++) {
+        PyObject *aval = *DICT_VALUE_ADDR(a, i);
         if (aval != NULL) {
             int cmp;
             PyObject *bval;
-            PyObject *key = a->ma_table[i].me_key;
+            PyObject *key = DK_ENTRIES(a->ma_keys)[i].me_key;
             /* temporarily bump aval's refcount to ensure it stays
                alive until we're done with it */
             Py_INCREF(aval);
@@ -1992,7 +2976,8 @@ static PyObject *
 dict_contains(register PyDictObject *mp, PyObject *key)
 {
     long hash;
-    PyDictEntry *ep;
+    Py_ssize_t ix;
+    PyObject **value_addr;
 
     if (!PyString_CheckExact(key) ||
         (hash = ((PyStringObject *) key)->ob_shash) == -1) {
@@ -2000,10 +2985,10 @@ dict_contains(register PyDictObject *mp, PyObject *key)
         if (hash == -1)
             return NULL;
     }
-    ep = (mp->ma_lookup)(mp, key, hash);
-    if (ep == NULL)
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+    if (ix == DKIX_ERROR)
         return NULL;
-    return PyBool_FromLong(ep->me_value != NULL);
+    return PyBool_FromLong(ix != DKIX_EMPTY && *value_addr != NULL);
 }
 
 static PyObject *
@@ -2016,15 +3001,16 @@ dict_has_key(register PyDictObject *mp, PyObject *key)
 }
 
 static PyObject *
-dict_get(register PyDictObject *mp, PyObject *args)
+dict_get(register PyDictObject *mp, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *key;
     PyObject *failobj = Py_None;
     PyObject *val = NULL;
     long hash;
-    PyDictEntry *ep;
+    Py_ssize_t ix;
+    PyObject **value_addr;
 
-    if (!PyArg_UnpackTuple(args, "get", 1, 2, &key, &failobj))
+    if (!_PyArg_UnpackStack(args, nargs, "get", 1, 2, &key, &failobj))
         return NULL;
 
     if (!PyString_CheckExact(key) ||
@@ -2033,27 +3019,29 @@ dict_get(register PyDictObject *mp, PyObject *args)
         if (hash == -1)
             return NULL;
     }
-    ep = (mp->ma_lookup)(mp, key, hash);
-    if (ep == NULL)
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+    if (ix == DKIX_ERROR)
         return NULL;
-    val = ep->me_value;
-    if (val == NULL)
+    if (ix == DKIX_EMPTY || *value_addr == NULL)
         val = failobj;
+    else
+        val = *value_addr;
     Py_INCREF(val);
     return val;
 }
 
 
 static PyObject *
-dict_setdefault(register PyDictObject *mp, PyObject *args)
+dict_setdefault(register PyDictObject *mp, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *key;
     PyObject *failobj = Py_None;
     PyObject *val = NULL;
     long hash;
-    PyDictEntry *ep;
+    Py_ssize_t ix, hashpos;
+    PyObject **value_addr;
 
-    if (!PyArg_UnpackTuple(args, "setdefault", 1, 2, &key, &failobj))
+    if (!_PyArg_UnpackStack(args, nargs, "setdefault", 1, 2, &key, &failobj))
         return NULL;
 
     if (!PyString_CheckExact(key) ||
@@ -2062,15 +3050,25 @@ dict_setdefault(register PyDictObject *mp, PyObject *args)
         if (hash == -1)
             return NULL;
     }
-    ep = (mp->ma_lookup)(mp, key, hash);
-    if (ep == NULL)
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, &hashpos);
+    if (ix == DKIX_ERROR)
         return NULL;
-    val = ep->me_value;
-    if (val == NULL) {
-        if (dict_set_item_by_hash_or_entry((PyObject*)mp, key, hash, ep,
-                                           failobj) == 0)
+    if (ix == DKIX_EMPTY || *value_addr == NULL) {
+        int res;
+        Py_INCREF(key);
+        Py_INCREF(failobj);
+        /* Reuse the slot found above rather than looking the key up
+           again, unless a non-string key has to unshare the keys. */
+        if (mp->ma_values != NULL && !PyString_CheckExact(key))
+            res = insertdict(mp, key, hash, failobj);
+        else
+            res = insertdict_slot(mp, key, hash, failobj, ix, hashpos,
+                                  value_addr);
+        if (res == 0)
             val = failobj;
     }
+    else
+        val = *value_addr;
     Py_XINCREF(val);
     return val;
 }
@@ -2083,15 +3081,53 @@ dict_clear(register PyDictObject *mp)
     Py_RETURN_NONE;
 }
 
+/* Remove key from the dict and return its value.  If the key is missing,
+   return a new reference to deflt, or raise KeyError if deflt is NULL.
+*/
+PyObject *
+_PyDict_Pop_KnownHash(PyObject *op, PyObject *key, long hash,
+                      PyObject *deflt)
+{
+    PyDictObject *mp = (PyDictObject *)op;
+    Py_ssize_t ix, hashpos;
+    PyObject *old_value;
+    PyObject **value_addr;
+
+    if (mp->ma_used == 0) {
+        if (deflt) {
+            Py_INCREF(deflt);
+            return deflt;
+        }
+        set_key_error(key);
+        return NULL;
+    }
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, &hashpos);
+    if (ix == DKIX_ERROR)
+        return NULL;
+    if (ix == DKIX_EMPTY || *value_addr == NULL) {
+        if (deflt) {
+            Py_INCREF(deflt);
+            return deflt;
+        }
+        set_key_error(key);
+        return NULL;
+    }
+    old_value = *value_addr;
+    Py_INCREF(old_value);
+    if (delitem_common(mp, hash, hashpos, ix, value_addr) < 0) {
+        Py_DECREF(old_value);
+        return NULL;
+    }
+    return old_value;
+}
+
 static PyObject *
-dict_pop(PyDictObject *mp, PyObject *args)
+dict_pop(PyDictObject *mp, PyObject **args, Py_ssize_t nargs)
 {
     long hash;
-    PyDictEntry *ep;
-    PyObject *old_value, *old_key;
     PyObject *key, *deflt = NULL;
 
-    if(!PyArg_UnpackTuple(args, "pop", 1, 2, &key, &deflt))
+    if(!_PyArg_UnpackStack(args, nargs, "pop", 1, 2, &key, &deflt))
         return NULL;
     if (mp->ma_used == 0) {
         if (deflt) {
@@ -2107,32 +3143,14 @@ dict_pop(PyDictObject *mp, PyObject *args)
         if (hash == -1)
             return NULL;
     }
-    ep = (mp->ma_lookup)(mp, key, hash);
-    if (ep == NULL)
-        return NULL;
-    if (ep->me_value == NULL) {
-        if (deflt) {
-            Py_INCREF(deflt);
-            return deflt;
-        }
-        set_key_error(key);
-        return NULL;
-    }
-    old_key = ep->me_key;
-    Py_INCREF(dummy);
-    ep->me_key = dummy;
-    old_value = ep->me_value;
-    ep->me_value = NULL;
-    mp->ma_used--;
-    Py_DECREF(old_key);
-    return old_value;
+    return _PyDict_Pop_KnownHash((PyObject *)mp, key, hash, deflt);
 }
 
 static PyObject *
 dict_popitem(PyDictObject *mp)
 {
-    Py_ssize_t i = 0;
-    PyDictEntry *ep;
+    Py_ssize_t i, j;
+    PyDictEntry *ep0, *ep;
     PyObject *res;
 
     /* Allocate the result tuple before checking the size.  Believe it
@@ -2153,49 +3171,68 @@ dict_popitem(PyDictObject *mp)
                         "popitem(): dictionary is empty");
         return NULL;
     }
-    /* Set ep to "the first" dict entry with a value.  We abuse the hash
-     * field of slot 0 to hold a search finger:
-     * If slot 0 has a value, use slot 0.
-     * Else slot 0 is being used to hold a search finger,
-     * and we use its hash value as the first index to look.
-     */
-    ep = &mp->ma_table[0];
-    if (ep->me_value == NULL) {
-        i = ep->me_hash;
-        /* The hash field may be a real hash value, or it may be a
-         * legit search finger, or it may be a once-legit search
-         * finger that's out of bounds now because it wrapped around
-         * or the table shrunk -- simply make sure it's in bounds now.
-         */
-        if (i > mp->ma_mask || i < 1)
-            i = 1;              /* skip slot 0 */
-        while ((ep = &mp->ma_table[i])->me_value == NULL) {
-            i++;
-            if (i > mp->ma_mask)
-                i = 1;
+    /* Convert split table to combined table */
+    if (_PyDict_HasSplitTable(mp)) {
+        if (dictresize(mp, DK_SIZE(mp->ma_keys))) {
+            Py_DECREF(res);
+            return NULL;
         }
     }
+    ENSURE_ALLOWS_DELETIONS(mp);
+
+    /* Pop the last item */
+    ep0 = DK_ENTRIES(mp->ma_keys);
+    i = mp->ma_keys->dk_nentries - 1;
+    while (i >= 0 && ep0[i].me_value == NULL) {
+        i--;
+    }
+    assert(i >= 0);
+
+    ep = &ep0[i];
+    j = lookdict_index(mp->ma_keys, ep->me_hash, i);
+    assert(j >= 0);
+    assert(dk_get_index(mp->ma_keys, j) == i);
+    dk_set_index(mp->ma_keys, j, DKIX_DUMMY);
+
     PyTuple_SET_ITEM(res, 0, ep->me_key);
     PyTuple_SET_ITEM(res, 1, ep->me_value);
-    Py_INCREF(dummy);
-    ep->me_key = dummy;
+    ep->me_key = NULL;
     ep->me_value = NULL;
+    /* We can't dk_usable++ since there is DKIX_DUMMY in indices */
+    mp->ma_keys->dk_nentries = i;
     mp->ma_used--;
-    assert(mp->ma_table[0].me_value == NULL);
-    mp->ma_table[0].me_hash = i + 1;  /* next place to start */
+    mp->ma_version_tag = DICT_NEXT_VERSION();
     return res;
 }
 
 static int
 dict_traverse(PyObject *op, visitproc visit, void *arg)
 {
-    Py_ssize_t i = 0;
-    PyObject *pk;
-    PyObject *pv;
-
-    while (PyDict_Next(op, &i, &pk, &pv)) {
-        Py_VISIT(pk);
-        Py_VISIT(pv);
+    PyDictObject *mp = (PyDictObject *)op;
+    PyDictKeysObject *keys = mp->ma_keys;
+    PyDictEntry *entries = DK_ENTRIES(keys);
+    Py_ssize_t i, n = keys->dk_nentries;
+
+    if (keys->dk_lookup == lookdict) {
+        for (i = 0; i < n; i++) {
+            if (entries[i].me_value != NULL) {
+                Py_VISIT(entries[i].me_value);
+                Py_VISIT(entries[i].me_key);
+            }
+        }
+    }
+    else {
+        /* The keys are all exact strings, which the GC doesn't track */
+        if (mp->ma_values != NULL) {
+            for (i = 0; i < n; i++) {
+                Py_VISIT(mp->ma_values[i]);
+            }
+        }
+        else {
+            for (i = 0; i < n; i++) {
+                Py_VISIT(entries[i].me_value);
+            }
+        }
     }
     return 0;
 }
@@ -2231,15 +3268,26 @@ dict_iteritems(PyDictObject *dict)
     return dictiter_new(dict, &PyDictIterItem_Type);
 }
 
-static PyObject *
-dict_sizeof(PyDictObject *mp)
+Py_ssize_t
+_PyDict_SizeOf(PyDictObject *mp)
 {
-    Py_ssize_t res;
+    Py_ssize_t size, res;
 
+    size = DK_SIZE(mp->ma_keys);
     res = _PyObject_SIZE(Py_TYPE(mp));
-    if (mp->ma_table != mp->ma_smalltable)
-        res = res + (mp->ma_mask + 1) * sizeof(PyDictEntry);
-    return PyInt_FromSsize_t(res);
+    if (mp->ma_values && mp->ma_values != empty_values)
+        res += USABLE_FRACTION(size) * sizeof(PyObject*);
+    /* If the dictionary is split, the keys portion is accounted-for
+       in the type object. */
+    if (mp->ma_keys->dk_refcnt == 1)
+        res += _PyDict_KeysSize(mp->ma_keys);
+    return res;
+}
+
+static PyObject *
+dict_sizeof(PyDictObject *mp)
+{
+    return PyInt_FromSsize_t(_PyDict_SizeOf(mp));
 }
 
 PyDoc_STRVAR(has_key__doc__,
@@ -2322,11 +3370,11 @@ static PyMethodDef mapp_methods[] = {
      sizeof__doc__},
     {"has_key",         (PyCFunction)dict_has_key,      METH_O,
      has_key__doc__},
-    {"get",         (PyCFunction)dict_get,          METH_VARARGS,
+    {"get",         (PyCFunction)dict_get,          METH_FASTCALL,
      get__doc__},
-    {"setdefault",  (PyCFunction)dict_setdefault,   METH_VARARGS,
+    {"setdefault",  (PyCFunction)dict_setdefault,   METH_FASTCALL,
      setdefault_doc__},
-    {"pop",         (PyCFunction)dict_pop,          METH_VARARGS,
+    {"pop",         (PyCFunction)dict_pop,          METH_FASTCALL,
      pop__doc__},
     {"popitem",         (PyCFunction)dict_popitem,      METH_NOARGS,
      popitem__doc__},
@@ -2365,7 +3413,8 @@ PyDict_Contains(PyObject *op, PyObject *key)
 {
     long hash;
     PyDictObject *mp = (PyDictObject *)op;
-    PyDictEntry *ep;
+    Py_ssize_t ix;
+    PyObject **value_addr;
 
     if (!PyString_CheckExact(key) ||
         (hash = ((PyStringObject *) key)->ob_shash) == -1) {
@@ -2373,8 +3422,10 @@ PyDict_Contains(PyObject *op, PyObject *key)
         if (hash == -1)
             return -1;
     }
-    ep = (mp->ma_lookup)(mp, key, hash);
-    return ep == NULL ? -1 : (ep->me_value != NULL);
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+    if (ix == DKIX_ERROR)
+        return -1;
+    return (ix != DKIX_EMPTY && *value_addr != NULL);
 }
 
 /* Internal version of PyDict_Contains used when the hash value is already known */
@@ -2382,10 +3433,13 @@ int
 _PyDict_Contains(PyObject *op, PyObject *key, long hash)
 {
     PyDictObject *mp = (PyDictObject *)op;
-    PyDictEntry *ep;
+    Py_ssize_t ix;
+    PyObject **value_addr;
 
-    ep = (mp->ma_lookup)(mp, key, hash);
-    return ep == NULL ? -1 : (ep->me_value != NULL);
+    ix = (mp->ma_keys->dk_lookup)(mp, key, hash, &value_addr, NULL);
+    if (ix == DKIX_ERROR)
+        return -1;
+    return (ix != DKIX_EMPTY && *value_addr != NULL);
 }
 
 /* Hack to implement "key in dict" */
@@ -2412,9 +3466,14 @@ dict_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
     if (self != NULL) {
         PyDictObject *d = (PyDictObject *)self;
         /* It's guaranteed that tp->alloc zeroed out the struct. */
-        assert(d->ma_table == NULL && d->ma_fill == 0 && d->ma_used == 0);
-        INIT_NONZERO_DICT_SLOTS(d);
-        d->ma_lookup = lookdict_string;
+        assert(d->ma_keys == NULL && d->ma_values == NULL &&
+               d->ma_used == 0);
+        d->ma_keys = new_keys_object(PyDict_MINSIZE);
+        if (d->ma_keys == NULL) {
+            Py_DECREF(self);
+            return NULL;
+        }
+        d->ma_version_tag = DICT_NEXT_VERSION();
         /* The object has been implicitly tracked by tp_alloc */
         if (type == &PyDict_Type)
             _PyObject_GC_UNTRACK(d);
@@ -2611,8 +3670,7 @@ static PyMethodDef dictiter_methods[] = {
 static PyObject *dictiter_iternextkey(dictiterobject *di)
 {
     PyObject *key;
-    register Py_ssize_t i, mask;
-    register PyDictEntry *ep;
+    register Py_ssize_t i;
     PyDictObject *d = di->di_dict;
 
     if (d == NULL)
@@ -2626,18 +3684,12 @@ static PyObject *dictiter_iternextkey(dictiterobject *di)
         return NULL;
     }
 
-    i = di->di_pos;
+    i = dict_next((PyObject *)d, di->di_pos, NULL);
     if (i < 0)
         goto fail;
-    ep = d->ma_table;
-    mask = d->ma_mask;
-    while (i <= mask && ep[i].me_value == NULL)
-        i++;
     di->di_pos = i+1;
-    if (i > mask)
-        goto fail;
     di->len--;
-    key = ep[i].me_key;
+    key = DK_ENTRIES(d->ma_keys)[i].me_key;
     Py_INCREF(key);
     return key;
 
@@ -2683,8 +3735,7 @@ PyTypeObject PyDictIterKey_Type = {
 static PyObject *dictiter_iternextvalue(dictiterobject *di)
 {
     PyObject *value;
-    register Py_ssize_t i, mask;
-    register PyDictEntry *ep;
+    register Py_ssize_t i;
     PyDictObject *d = di->di_dict;
 
     if (d == NULL)
@@ -2698,16 +3749,9 @@ static PyObject *dictiter_iternextvalue(dictiterobject *di)
         return NULL;
     }
 
-    i = di->di_pos;
-    mask = d->ma_mask;
-    if (i < 0 || i > mask)
+    i = dict_next((PyObject *)d, di->di_pos, &value);
+    if (i < 0)
         goto fail;
-    ep = d->ma_table;
-    while ((value=ep[i].me_value) == NULL) {
-        i++;
-        if (i > mask)
-            goto fail;
-    }
     di->di_pos = i+1;
     di->len--;
     Py_INCREF(value);
@@ -2755,8 +3799,7 @@ PyTypeObject PyDictIterValue_Type = {
 static PyObject *dictiter_iternextitem(dictiterobject *di)
 {
     PyObject *key, *value, *result;
-    register Py_ssize_t i, mask;
-    register PyDictEntry *ep;
+    register Py_ssize_t i;
     PyDictObject *d = di->di_dict;
 
     if (d == NULL)
@@ -2770,20 +3813,13 @@ static PyObject *dictiter_iternextitem(dictiterobject *di)
         return NULL;
     }
 
-    i = di->di_pos;
+    i = dict_next((PyObject *)d, di->di_pos, &value);
     if (i < 0)
         goto fail;
-    ep = d->ma_table;
-    mask = d->ma_mask;
-    while (i <= mask && ep[i].me_value == NULL)
-        i++;
     di->di_pos = i+1;
-    if (i > mask)
-        goto fail;
 
     di->len--;
-    key = ep[i].me_key;
-    value = ep[i].me_value;
+    key = DK_ENTRIES(d->ma_keys)[i].me_key;
     Py_INCREF(key);
     Py_INCREF(value);
     result = di->di_result;
@@ -2849,10 +3885,7 @@ PyTypeObject PyDictIterItem_Type = {
 
 /* The instance lay-out is the same for all three; but the type differs. */
 
-typedef struct {
-    PyObject_HEAD
-    PyDictObject *dv_dict;
-} dictviewobject;
+typedef _PyDictViewObject dictviewobject;
 
 
 static void
@@ -2880,8 +3913,8 @@ dictview_len(dictviewobject *dv)
     return len;
 }
 
-static PyObject *
-dictview_new(PyObject *dict, PyTypeObject *type)
+PyObject *
+_PyDictView_New(PyObject *dict, PyTypeObject *type)
 {
     dictviewobject *dv;
     if (dict == NULL) {
@@ -3195,7 +4228,7 @@ PyTypeObject PyDictKeys_Type = {
 static PyObject *
 dictkeys_new(PyObject *dict)
 {
-    return dictview_new(dict, &PyDictKeys_Type);
+    return _PyDictView_New(dict, &PyDictKeys_Type);
 }
 
 /*** dict_items ***/
@@ -3284,7 +4317,7 @@ PyTypeObject PyDictItems_Type = {
 static PyObject *
 dictitems_new(PyObject *dict)
 {
-    return dictview_new(dict, &PyDictItems_Type);
+    return _PyDictView_New(dict, &PyDictItems_Type);
 }
 
 /*** dict_values ***/
@@ -3349,5 +4382,5 @@ PyTypeObject PyDictValues_Type = {
 static PyObject *
 dictvalues_new(PyObject *dict)
 {
-    return dictview_new(dict, &PyDictValues_Type);
+    return _PyDictView_New(dict, &PyDictValues_Type);
 }
@@ -772,11 +772,11 @@ list_ass_item(PyListObject *a, Py_ssize_t i, PyObject *v)
 }
 
 static PyObject *
-listinsert(PyListObject *self, PyObject *args)
+listinsert(PyListObject *self, PyObject **args, Py_ssize_t nargs)
 {
     Py_ssize_t i;
     PyObject *v;
-    if (!PyArg_ParseTuple(args, "nO:insert", &i, &v))
+    if (!_PyArg_ParseStack(args, nargs, "nO:insert", &i, &v))
         return NULL;
     if (ins1(self, i, v) == 0)
         Py_RETURN_NONE;
@@ -920,13 +920,13 @@ list_inplace_concat(PyListObject *self, PyObject *other)
 }
 
 static PyObject *
-listpop(PyListObject *self, PyObject *args)
+listpop(PyListObject *self, PyObject **args, Py_ssize_t nargs)
 {
     Py_ssize_t i = -1;
     PyObject *v;
     int status;
 
-    if (!PyArg_ParseTuple(args, "|n:pop", &i))
+    if (!_PyArg_ParseStack(args, nargs, "|n:pop", &i))
         return NULL;
 
     if (Py_SIZE(self) == 0) {
@@ -2037,7 +2037,8 @@ build_cmpwrapper(PyObject *cmpfunc)
  * duplicated).
  */
 static PyObject *
-listsort(PyListObject *self, PyObject *args, PyObject *kwds)
+listsort(PyListObject *self, PyObject **args, Py_ssize_t nargs,
+         PyObject *kwnames)
 {
     MergeState ms;
     PyObject **lo, **hi;
@@ -2052,13 +2053,14 @@ listsort(PyListObject *self, PyObject *args, PyObject *kwds)
     PyObject *keyfunc = NULL;
     Py_ssize_t i;
     PyObject *key, *value, *kvpair;
-    static char *kwlist[] = {"cmp", "key", "reverse", 0};
+    static const char * const keywords[] = {"cmp", "key", "reverse", 0};
+    static _PyArg_Parser parser = {"|OOi:sort", keywords};
 
     assert(self != NULL);
     assert (PyList_Check(self));
-    if (args != NULL) {
-        if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OOi:sort",
-            kwlist, &compare, &keyfunc, &reverse))
+    if (nargs != 0 || kwnames != NULL) {
+        if (!_PyArg_ParseStackAndKeywords(args, nargs, kwnames, &parser,
+                                          &compare, &keyfunc, &reverse))
             return NULL;
     }
     if (compare == Py_None)
@@ -2215,7 +2217,7 @@ PyList_Sort(PyObject *v)
         PyErr_BadInternalCall();
         return -1;
     }
-    v = listsort((PyListObject *)v, (PyObject *)NULL, (PyObject *)NULL);
+    v = listsort((PyListObject *)v, NULL, 0, NULL);
     if (v == NULL)
         return -1;
     Py_DECREF(v);
@@ -2270,13 +2272,13 @@ PyList_AsTuple(PyObject *v)
 }
 
 static PyObject *
-listindex(PyListObject *self, PyObject *args)
+listindex(PyListObject *self, PyObject **args, Py_ssize_t nargs)
 {
     Py_ssize_t i, start=0, stop=Py_SIZE(self);
     PyObject *v, *format_tuple, *err_string;
     static PyObject *err_format = NULL;
 
-    if (!PyArg_ParseTuple(args, "O|O&O&:index", &v,
+    if (!_PyArg_ParseStack(args, nargs, "O|O&O&:index", &v,
                                 _PyEval_SliceIndexNotNone, &start,
                                 _PyEval_SliceIndexNotNone, &stop))
         return NULL;
@@ -2508,14 +2510,14 @@ static PyMethodDef list_methods[] = {
     {"__reversed__",(PyCFunction)list_reversed, METH_NOARGS, reversed_doc},
     {"__sizeof__",  (PyCFunction)list_sizeof, METH_NOARGS, sizeof_doc},
     {"append",          (PyCFunction)listappend,  METH_O, append_doc},
-    {"insert",          (PyCFunction)listinsert,  METH_VARARGS, insert_doc},
+    {"insert",          (PyCFunction)listinsert,  METH_FASTCALL, insert_doc},
     {"extend",      (PyCFunction)listextend,  METH_O, extend_doc},
-    {"pop",             (PyCFunction)listpop,     METH_VARARGS, pop_doc},
+    {"pop",             (PyCFunction)listpop,     METH_FASTCALL, pop_doc},
     {"remove",          (PyCFunction)listremove,  METH_O, remove_doc},
-    {"index",           (PyCFunction)listindex,   METH_VARARGS, index_doc},
+    {"index",           (PyCFunction)listindex,   METH_FASTCALL, index_doc},
     {"count",           (PyCFunction)listcount,   METH_O, count_doc},
     {"reverse",         (PyCFunction)listreverse, METH_NOARGS, reverse_doc},
-    {"sort",            (PyCFunction)listsort,    METH_VARARGS | METH_KEYWORDS, sort_doc},
+    {"sort",            (PyCFunction)listsort,    METH_FASTCALL | METH_KEYWORDS, sort_doc},
     {NULL,              NULL}           /* sentinel */
 };
 
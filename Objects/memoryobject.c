@@ -3,48 +3,402 @@
 
 #include "Python.h"
 
-static Py_ssize_t
-get_shape0(Py_buffer *buf)
-{
-    if (buf->shape != NULL)
-        return buf->shape[0];
-    if (buf->ndim == 0)
-        return 1;
-    PyErr_SetString(PyExc_TypeError,
-        "exported buffer does not have any shape information associated "
-        "to it");
-    return -1;
+#ifdef HAVE_C99_BOOL
+#define BOOL_TYPE _Bool
+#else
+#define BOOL_TYPE char
+#endif
+
+#define MEMORY_MAX_NDIM 64
+
+#define IS_RELEASED(mv) \
+    (((PyMemoryViewObject *)(mv))->flags & _Py_MEMORYVIEW_RELEASED)
+
+#define CHECK_RELEASED(mv) \
+    if (IS_RELEASED(mv)) { \
+        PyErr_SetString(PyExc_ValueError, \
+            "operation forbidden on released memoryview object"); \
+        return NULL; \
+    }
+
+#define CHECK_RELEASED_INT(mv) \
+    if (IS_RELEASED(mv)) { \
+        PyErr_SetString(PyExc_ValueError, \
+            "operation forbidden on released memoryview object"); \
+        return -1; \
+    }
+
+#define IS_BYTE_FORMAT(f) ((f) == 'b' || (f) == 'B' || (f) == 'c')
+
+
+/* Native single character struct formats understood by tolist() and
+   cast().  The strings are static so that views can point to them. */
+static struct {
+    char *format;
+    Py_ssize_t itemsize;
+} native_formats[] = {
+    {"c", sizeof(char)},
+    {"b", sizeof(signed char)},
+    {"B", sizeof(unsigned char)},
+    {"?", sizeof(BOOL_TYPE)},
+    {"h", sizeof(short)},
+    {"H", sizeof(unsigned short)},
+    {"i", sizeof(int)},
+    {"I", sizeof(unsigned int)},
+    {"l", sizeof(long)},
+    {"L", sizeof(unsigned long)},
+#ifdef HAVE_LONG_LONG
+    {"q", sizeof(PY_LONG_LONG)},
+    {"Q", sizeof(unsigned PY_LONG_LONG)},
+#endif
+    {"f", sizeof(float)},
+    {"d", sizeof(double)},
+    {"P", sizeof(void *)},
+    {NULL, 0}
+};
+
+/* Return the static string for fmt if it is a native single character
+   format with an optional '@' prefix, else NULL.  A NULL fmt means
+   unsigned bytes. */
+static char *
+get_native_format(const char *fmt, Py_ssize_t *itemsize)
+{
+    int i;
+
+    if (fmt == NULL)
+        fmt = "B";
+    else if (fmt[0] == '@')
+        fmt++;
+    if (fmt[0] == '\0' || fmt[1] != '\0')
+        return NULL;
+    for (i = 0; native_formats[i].format != NULL; i++) {
+        if (native_formats[i].format[0] == fmt[0]) {
+            *itemsize = native_formats[i].itemsize;
+            return native_formats[i].format;
+        }
+    }
+    return NULL;
+}
+
+/* Return the format character of a view with a native format, else 0. */
+static char
+get_native_fmtchar(Py_buffer *view)
+{
+    Py_ssize_t itemsize;
+    char *fmt = get_native_format(view->format, &itemsize);
+
+    if (fmt == NULL || itemsize != view->itemsize)
+        return '\0';
+    return fmt[0];
+}
+
+/* Unpack one item in native format fmt; the memory may be unaligned. */
+static PyObject *
+unpack_single(const char *ptr, char fmt)
+{
+    switch (fmt) {
+    case 'c':
+        return PyString_FromStringAndSize(ptr, 1);
+    case 'b':
+        return PyInt_FromLong(*(signed char *)ptr);
+    case 'B':
+        return PyInt_FromLong(*(unsigned char *)ptr);
+    case '?': {
+        BOOL_TYPE x;
+        memcpy(&x, ptr, sizeof x);
+        return PyBool_FromLong(x != 0);
+    }
+    case 'h': {
+        short x;
+        memcpy(&x, ptr, sizeof x);
+        return PyInt_FromLong(x);
+    }
+    case 'H': {
+        unsigned short x;
+        memcpy(&x, ptr, sizeof x);
+        return PyInt_FromLong(x);
+    }
+    case 'i': {
+        int x;
+        memcpy(&x, ptr, sizeof x);
+        return PyInt_FromLong(x);
+    }
+    case 'I': {
+        unsigned int x;
+        memcpy(&x, ptr, sizeof x);
+        if (x <= (unsigned int)LONG_MAX)
+            return PyInt_FromLong((long)x);
+        return PyLong_FromUnsignedLong(x);
+    }
+    case 'l': {
+        long x;
+        memcpy(&x, ptr, sizeof x);
+        return PyInt_FromLong(x);
+    }
+    case 'L': {
+        unsigned long x;
+        memcpy(&x, ptr, sizeof x);
+        if (x <= (unsigned long)LONG_MAX)
+            return PyInt_FromLong((long)x);
+        return PyLong_FromUnsignedLong(x);
+    }
+#ifdef HAVE_LONG_LONG
+    case 'q': {
+        PY_LONG_LONG x;
+        memcpy(&x, ptr, sizeof x);
+        if (x >= LONG_MIN && x <= LONG_MAX)
+            return PyInt_FromLong(Py_SAFE_DOWNCAST(x, PY_LONG_LONG, long));
+        return PyLong_FromLongLong(x);
+    }
+    case 'Q': {
+        unsigned PY_LONG_LONG x;
+        memcpy(&x, ptr, sizeof x);
+        if (x <= LONG_MAX)
+            return PyInt_FromLong(
+                Py_SAFE_DOWNCAST(x, unsigned PY_LONG_LONG, long));
+        return PyLong_FromUnsignedLongLong(x);
+    }
+#endif
+    case 'f': {
+        float x;
+        memcpy(&x, ptr, sizeof x);
+        return PyFloat_FromDouble(x);
+    }
+    case 'd': {
+        double x;
+        memcpy(&x, ptr, sizeof x);
+        return PyFloat_FromDouble(x);
+    }
+    case 'P': {
+        void *x;
+        memcpy(&x, ptr, sizeof x);
+        return PyLong_FromVoidPtr(x);
+    }
+    }
+    PyErr_Format(PyExc_NotImplementedError,
+                 "memoryview: unsupported format %c", fmt);
+    return NULL;
+}
+
+/* Make room in mview for the shape, strides and (optionally) suboffsets
+   of ndim dimensions.  One-dimensional views use the smalltable. */
+static int
+init_storage(PyMemoryViewObject *mview, int ndim, int suboffsets)
+{
+    Py_buffer *view = &mview->view;
+    Py_ssize_t *array;
+
+    view->ndim = ndim;
+    view->suboffsets = NULL;
+    if (ndim == 0) {
+        view->shape = NULL;
+        view->strides = NULL;
+        return 0;
+    }
+    if (ndim == 1 && !suboffsets) {
+        view->shape = &view->smalltable[0];
+        view->strides = &view->smalltable[1];
+        return 0;
+    }
+    array = PyMem_New(Py_ssize_t, 3 * ndim);
+    if (array == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    PyMem_Free(mview->ob_array);
+    mview->ob_array = array;
+    view->shape = array;
+    view->strides = array + ndim;
+    if (suboffsets)
+        view->suboffsets = array + 2 * ndim;
+    return 0;
+}
+
+/* Copy the geometry of src into storage owned by mview, so that it stays
+   valid whatever happens to src.  Missing strides are computed for a
+   C-contiguous layout. */
+static int
+init_geometry(PyMemoryViewObject *mview, Py_buffer *src)
+{
+    Py_buffer *view = &mview->view;
+    int k, ndim = src->ndim;
+
+    if (ndim < 0 || ndim > MEMORY_MAX_NDIM) {
+        PyErr_Format(PyExc_ValueError,
+            "memoryview: number of dimensions must not exceed %d",
+            MEMORY_MAX_NDIM);
+        return -1;
+    }
+    if (ndim > 1 && src->shape == NULL) {
+        PyErr_SetString(PyExc_TypeError,
+            "exported buffer does not have any shape information associated "
+            "to it");
+        return -1;
+    }
+    if (init_storage(mview, ndim, src->suboffsets != NULL) < 0)
+        return -1;
+    if (ndim == 0)
+        return 0;
+    if (src->shape != NULL) {
+        for (k = 0; k < ndim; k++)
+            view->shape[k] = src->shape[k];
+    }
+    else {
+        view->shape[0] = src->itemsize > 0 ? src->len / src->itemsize : 0;
+    }
+    if (src->strides != NULL) {
+        for (k = 0; k < ndim; k++)
+            view->strides[k] = src->strides[k];
+    }
+    else {
+        PyBuffer_FillContiguousStrides(ndim, view->shape, view->strides,
+                                       (int)src->itemsize, 'C');
+    }
+    if (src->suboffsets != NULL) {
+        for (k = 0; k < ndim; k++)
+            view->suboffsets[k] = src->suboffsets[k];
+    }
+    return 0;
 }
 
 static void
-dup_buffer(Py_buffer *dest, Py_buffer *src)
+init_len(Py_buffer *view)
 {
-    *dest = *src;
-    if (src->ndim == 1 && src->shape != NULL) {
-        dest->shape = &(dest->smalltable[0]);
-        dest->shape[0] = get_shape0(src);
+    Py_ssize_t len = view->itemsize;
+    int k;
+
+    for (k = 0; k < view->ndim; k++)
+        len *= view->shape[k];
+    view->len = len;
+}
+
+static PyMemoryViewObject *
+memory_alloc(void)
+{
+    PyMemoryViewObject *mview;
+
+    mview = PyObject_GC_New(PyMemoryViewObject, &PyMemoryView_Type);
+    if (mview == NULL)
+        return NULL;
+    mview->base = NULL;
+    mview->view.obj = NULL;
+    mview->exports = 0;
+    mview->hash = -1;
+    mview->flags = 0;
+    mview->ob_array = NULL;
+    return mview;
+}
+
+/* Return a new view of the same memory as self.  It takes its own buffer
+   from the exporter, so either view can be released without affecting
+   the other; the caller then adjusts the geometry of the copy. */
+static PyMemoryViewObject *
+memory_copy(PyMemoryViewObject *self)
+{
+    Py_buffer *src = &self->view;
+    PyMemoryViewObject *mview;
+    PyObject *exporter = src->obj;
+
+    if (self->flags & _Py_MEMORYVIEW_COPY)
+        /* Only self keeps the memory alive */
+        exporter = (PyObject *)self;
+
+    mview = memory_alloc();
+    if (mview == NULL)
+        return NULL;
+    if (exporter != NULL) {
+        if (PyObject_GetBuffer(exporter, &mview->view, PyBUF_FULL_RO) < 0) {
+            mview->view.obj = NULL;
+            Py_DECREF(mview);
+            return NULL;
+        }
     }
-    if (src->ndim == 1 && src->strides != NULL) {
-        dest->strides = &(dest->smalltable[1]);
-        dest->strides[0] = src->strides[0];
+    else {
+        mview->view = *src;
+    }
+    mview->view.buf = src->buf;
+    mview->view.len = src->len;
+    mview->view.readonly = src->readonly;
+    mview->view.itemsize = src->itemsize;
+    mview->view.format = src->format;
+    if (init_geometry(mview, src) < 0) {
+        Py_DECREF(mview);
+        return NULL;
     }
+    if (!(self->flags & _Py_MEMORYVIEW_COPY)) {
+        Py_XINCREF(self->base);
+        mview->base = self->base;
+    }
+    _PyObject_GC_TRACK(mview);
+    return mview;
 }
 
 static int
 memory_getbuf(PyMemoryViewObject *self, Py_buffer *view, int flags)
 {
-    int res = 0;
-    if (self->view.obj != NULL)
-        res = PyObject_GetBuffer(self->view.obj, view, flags);
-    if (view)
-        dup_buffer(view, &self->view);
-    return res;
+    Py_buffer *base = &self->view;
+
+    CHECK_RELEASED_INT(self);
+    if (view == NULL) {
+        PyErr_SetString(PyExc_BufferError,
+            "memory_getbuf: view==NULL argument is obsolete");
+        return -1;
+    }
+    if ((flags & PyBUF_WRITABLE) == PyBUF_WRITABLE && base->readonly) {
+        PyErr_SetString(PyExc_BufferError,
+                        "memoryview: underlying buffer is not writable");
+        return -1;
+    }
+    if ((flags & PyBUF_C_CONTIGUOUS) == PyBUF_C_CONTIGUOUS &&
+        !PyBuffer_IsContiguous(base, 'C')) {
+        PyErr_SetString(PyExc_BufferError,
+                        "memoryview: underlying buffer is not C-contiguous");
+        return -1;
+    }
+    if ((flags & PyBUF_F_CONTIGUOUS) == PyBUF_F_CONTIGUOUS &&
+        !PyBuffer_IsContiguous(base, 'F')) {
+        PyErr_SetString(PyExc_BufferError,
+            "memoryview: underlying buffer is not Fortran contiguous");
+        return -1;
+    }
+    if ((flags & PyBUF_ANY_CONTIGUOUS) == PyBUF_ANY_CONTIGUOUS &&
+        !PyBuffer_IsContiguous(base, 'A')) {
+        PyErr_SetString(PyExc_BufferError,
+                        "memoryview: underlying buffer is not contiguous");
+        return -1;
+    }
+    if ((flags & PyBUF_INDIRECT) != PyBUF_INDIRECT &&
+        base->suboffsets != NULL) {
+        PyErr_SetString(PyExc_BufferError,
+                        "memoryview: underlying buffer requires suboffsets");
+        return -1;
+    }
+    if ((flags & PyBUF_STRIDES) != PyBUF_STRIDES &&
+        !PyBuffer_IsContiguous(base, 'C')) {
+        PyErr_SetString(PyExc_BufferError,
+                        "memoryview: underlying buffer is not C-contiguous");
+        return -1;
+    }
+
+    *view = *base;
+    if ((flags & PyBUF_FORMAT) != PyBUF_FORMAT)
+        view->format = NULL;
+    if ((flags & PyBUF_STRIDES) != PyBUF_STRIDES)
+        view->strides = NULL;
+    if ((flags & PyBUF_ND) != PyBUF_ND) {
+        view->ndim = 1;
+        view->shape = NULL;
+    }
+    view->obj = (PyObject *)self;
+    Py_INCREF(self);
+    self->exports++;
+    return 0;
 }
 
 static void
 memory_releasebuf(PyMemoryViewObject *self, Py_buffer *view)
 {
-    PyBuffer_Release(view);
+    self->exports--;
 }
 
 PyDoc_STRVAR(memory_doc,
@@ -57,12 +411,16 @@ PyMemoryView_FromBuffer(Py_buffer *info)
 {
     PyMemoryViewObject *mview;
 
-    mview = (PyMemoryViewObject *)
-        PyObject_GC_New(PyMemoryViewObject, &PyMemoryView_Type);
+    mview = memory_alloc();
     if (mview == NULL)
         return NULL;
-    mview->base = NULL;
-    dup_buffer(&mview->view, info);
+    mview->view = *info;
+    if (init_geometry(mview, info) < 0) {
+        /* the caller still owns the buffer */
+        mview->view.obj = NULL;
+        Py_DECREF(mview);
+        return NULL;
+    }
     /* NOTE: mview->view.obj should already have been incref'ed as
        part of PyBuffer_FillInfo(). */
     _PyObject_GC_TRACK(mview);
@@ -75,6 +433,11 @@ PyMemoryView_FromObject(PyObject *base)
     PyMemoryViewObject *mview;
     Py_buffer view;
 
+    if (PyMemoryView_Check(base)) {
+        CHECK_RELEASED(base);
+        return (PyObject *)memory_copy((PyMemoryViewObject *)base);
+    }
+
     if (!PyObject_CheckBuffer(base)) {
         PyErr_SetString(PyExc_TypeError,
             "cannot make memory view because object does "
@@ -241,7 +604,7 @@ PyMemoryView_GetContiguous(PyObject *obj, int buffertype, char fort)
 {
     PyMemoryViewObject *mem;
     PyObject *bytes;
-    Py_buffer *view;
+    Py_buffer *view, orig;
     int flags;
     char *dest;
 
@@ -251,7 +614,7 @@ PyMemoryView_GetContiguous(PyObject *obj, int buffertype, char fort)
         return NULL;
     }
 
-    mem = PyObject_GC_New(PyMemoryViewObject, &PyMemoryView_Type);
+    mem = memory_alloc();
     if (mem == NULL)
         return NULL;
 
@@ -264,6 +627,12 @@ PyMemoryView_GetContiguous(PyObject *obj, int buffertype, char fort)
     }
 
     if (PyObject_GetBuffer(obj, view, flags) != 0) {
+        view->obj = NULL;
+        Py_DECREF(mem);
+        return NULL;
+    }
+    orig = *view;
+    if (init_geometry(mem, &orig) < 0) {
         Py_DECREF(mem);
         return NULL;
     }
@@ -304,9 +673,14 @@ PyMemoryView_GetContiguous(PyObject *obj, int buffertype, char fort)
             return NULL;
         }
     }
+    /* From now on the view describes the contiguous copy */
+    view->buf = dest;
+    view->suboffsets = NULL;
+    PyBuffer_FillContiguousStrides(view->ndim, view->shape, view->strides,
+                                   (int)view->itemsize, fort);
+    mem->flags |= _Py_MEMORYVIEW_COPY;
     if (buffertype == PyBUF_SHADOW) {
         /* return a shadowed memory-view object */
-        view->buf = dest;
         mem->base = PyTuple_Pack(2, obj, bytes);
         Py_DECREF(bytes);
         if (mem->base == NULL) {
@@ -315,7 +689,8 @@ PyMemoryView_GetContiguous(PyObject *obj, int buffertype, char fort)
         }
     }
     else {
-        PyBuffer_Release(view);  /* XXX ? */
+        view->obj = NULL;
+        PyBuffer_Release(&orig);
         /* steal the reference */
         mem->base = bytes;
     }
@@ -327,12 +702,14 @@ PyMemoryView_GetContiguous(PyObject *obj, int buffertype, char fort)
 static PyObject *
 memory_format_get(PyMemoryViewObject *self)
 {
-    return PyString_FromString(self->view.format);
+    CHECK_RELEASED(self);
+    return PyString_FromString(self->view.format ? self->view.format : "B");
 }
 
 static PyObject *
 memory_itemsize_get(PyMemoryViewObject *self)
 {
+    CHECK_RELEASED(self);
     return PyLong_FromSsize_t(self->view.itemsize);
 }
 
@@ -363,33 +740,82 @@ _IntTupleFromSsizet(int len, Py_ssize_t *vals)
 static PyObject *
 memory_shape_get(PyMemoryViewObject *self)
 {
+    CHECK_RELEASED(self);
     return _IntTupleFromSsizet(self->view.ndim, self->view.shape);
 }
 
 static PyObject *
 memory_strides_get(PyMemoryViewObject *self)
 {
+    CHECK_RELEASED(self);
     return _IntTupleFromSsizet(self->view.ndim, self->view.strides);
 }
 
 static PyObject *
 memory_suboffsets_get(PyMemoryViewObject *self)
 {
+    CHECK_RELEASED(self);
     return _IntTupleFromSsizet(self->view.ndim, self->view.suboffsets);
 }
 
 static PyObject *
 memory_readonly_get(PyMemoryViewObject *self)
 {
+    CHECK_RELEASED(self);
     return PyBool_FromLong(self->view.readonly);
 }
 
 static PyObject *
 memory_ndim_get(PyMemoryViewObject *self)
 {
+    CHECK_RELEASED(self);
     return PyLong_FromLong(self->view.ndim);
 }
 
+static PyObject *
+memory_nbytes_get(PyMemoryViewObject *self)
+{
+    CHECK_RELEASED(self);
+    return PyInt_FromSsize_t(self->view.len);
+}
+
+static PyObject *
+memory_obj_get(PyMemoryViewObject *self)
+{
+    PyObject *obj = self->view.obj;
+
+    CHECK_RELEASED(self);
+    /* Report the object the view was made from rather than a helper
+       the exporter may have put into the buffer */
+    if (self->base != NULL && !(self->flags & _Py_MEMORYVIEW_COPY))
+        obj = self->base;
+    if (obj == NULL)
+        obj = Py_None;
+    Py_INCREF(obj);
+    return obj;
+}
+
+static PyObject *
+memory_c_contiguous_get(PyMemoryViewObject *self)
+{
+    CHECK_RELEASED(self);
+    return PyBool_FromLong(PyBuffer_IsContiguous(&self->view, 'C'));
+}
+
+static PyObject *
+memory_f_contiguous_get(PyMemoryViewObject *self)
+{
+    CHECK_RELEASED(self);
+    return PyBool_FromLong(PyBuffer_IsContiguous(&self->view, 'F'));
+}
+
+static PyObject *
+memory_contiguous_get(PyMemoryViewObject *self)
+{
+    CHECK_RELEASED(self);
+    return PyBool_FromLong(PyBuffer_IsContiguous(&self->view, 'A'));
+}
+
 static PyGetSetDef memory_getsetlist[] ={
     {"format",          (getter)memory_format_get,      NULL, NULL},
     {"itemsize",        (getter)memory_itemsize_get,    NULL, NULL},
@@ -398,6 +824,11 @@ static PyGetSetDef memory_getsetlist[] ={
     {"suboffsets",      (getter)memory_suboffsets_get,  NULL, NULL},
     {"readonly",        (getter)memory_readonly_get,    NULL, NULL},
     {"ndim",            (getter)memory_ndim_get,        NULL, NULL},
+    {"nbytes",          (getter)memory_nbytes_get,      NULL, NULL},
+    {"obj",             (getter)memory_obj_get,         NULL, NULL},
+    {"c_contiguous",    (getter)memory_c_contiguous_get, NULL, NULL},
+    {"f_contiguous",    (getter)memory_f_contiguous_get, NULL, NULL},
+    {"contiguous",      (getter)memory_contiguous_get,  NULL, NULL},
     {NULL, NULL, NULL, NULL},
 };
 
@@ -405,66 +836,223 @@ static PyGetSetDef memory_getsetlist[] ={
 static PyObject *
 memory_tobytes(PyMemoryViewObject *self, PyObject *noargs)
 {
-    Py_buffer view;
     PyObject *res;
 
-    if (PyObject_GetBuffer((PyObject *)self, &view, PyBUF_SIMPLE) < 0)
+    CHECK_RELEASED(self);
+    res = PyBytes_FromStringAndSize(NULL, self->view.len);
+    if (res == NULL)
         return NULL;
-
-    res = PyBytes_FromStringAndSize(NULL, view.len);
-    PyBuffer_ToContiguous(PyBytes_AS_STRING(res), &view, view.len, 'C');
-    PyBuffer_Release(&view);
+    if (PyBuffer_ToContiguous(PyBytes_AS_STRING(res), &self->view,
+                              self->view.len, 'C') < 0) {
+        Py_DECREF(res);
+        return NULL;
+    }
     return res;
 }
 
-/* TODO: rewrite this function using the struct module to unpack
-   each buffer item */
-
 static PyObject *
-memory_tolist(PyMemoryViewObject *mem, PyObject *noargs)
+tolist_rec(const char *ptr, int ndim, const Py_ssize_t *shape,
+           const Py_ssize_t *strides, const Py_ssize_t *suboffsets,
+           char fmt)
 {
-    Py_buffer *view = &(mem->view);
-    Py_ssize_t i;
     PyObject *res, *item;
-    char *buf;
+    Py_ssize_t i;
 
-    if (strcmp(view->format, "B") || view->itemsize != 1) {
-        PyErr_SetString(PyExc_NotImplementedError, 
-                "tolist() only supports byte views");
-        return NULL;
-    }
-    if (view->ndim != 1) {
-        PyErr_SetString(PyExc_NotImplementedError, 
-                "tolist() only supports one-dimensional objects");
-        return NULL;
-    }
-    res = PyList_New(view->len);
+    res = PyList_New(shape[0]);
     if (res == NULL)
         return NULL;
-    buf = view->buf;
-    for (i = 0; i < view->len; i++) {
-        item = PyInt_FromLong((unsigned char) *buf);
+    for (i = 0; i < shape[0]; ptr += strides[0], i++) {
+        const char *xptr = ptr;
+        if (suboffsets != NULL && suboffsets[0] >= 0)
+            xptr = *((char **)ptr) + suboffsets[0];
+        if (ndim == 1)
+            item = unpack_single(xptr, fmt);
+        else
+            item = tolist_rec(xptr, ndim - 1, shape + 1, strides + 1,
+                              suboffsets ? suboffsets + 1 : NULL, fmt);
         if (item == NULL) {
             Py_DECREF(res);
             return NULL;
         }
         PyList_SET_ITEM(res, i, item);
-        buf++;
     }
     return res;
 }
 
-static PyMethodDef memory_methods[] = {
-    {"tobytes", (PyCFunction)memory_tobytes, METH_NOARGS, NULL},
-    {"tolist", (PyCFunction)memory_tolist, METH_NOARGS, NULL},
-    {NULL,          NULL}           /* sentinel */
-};
+static PyObject *
+memory_tolist(PyMemoryViewObject *mem, PyObject *noargs)
+{
+    Py_buffer *view = &(mem->view);
+    char fmt;
 
+    CHECK_RELEASED(mem);
+    fmt = get_native_fmtchar(view);
+    if (fmt == '\0') {
+        PyErr_Format(PyExc_NotImplementedError,
+                     "memoryview: unsupported format %s", view->format);
+        return NULL;
+    }
+    if (view->ndim == 0)
+        return unpack_single(view->buf, fmt);
+    return tolist_rec(view->buf, view->ndim, view->shape, view->strides,
+                      view->suboffsets, fmt);
+}
 
-static void
-memory_dealloc(PyMemoryViewObject *self)
+PyDoc_STRVAR(memory_toreadonly_doc,
+"toreadonly() -> memoryview\n\
+\n\
+Return a read-only view of the same memory.");
+
+static PyObject *
+memory_toreadonly(PyMemoryViewObject *self, PyObject *noargs)
+{
+    PyMemoryViewObject *res;
+
+    CHECK_RELEASED(self);
+    res = memory_copy(self);
+    if (res == NULL)
+        return NULL;
+    res->view.readonly = 1;
+    return (PyObject *)res;
+}
+
+PyDoc_STRVAR(memory_cast_doc,
+"cast(format[, shape]) -> memoryview\n\
+\n\
+Return a view of the same memory with a new native format and shape.\n\
+Either the current or the new format must be 'B', 'b' or 'c'.");
+
+static PyObject *
+memory_cast(PyMemoryViewObject *self, PyObject *args, PyObject *kwds)
 {
-    _PyObject_GC_UNTRACK(self);
+    static char *kwlist[] = {"format", "shape", NULL};
+    Py_buffer *view = &self->view;
+    PyMemoryViewObject *mview;
+    PyObject *shape = NULL;
+    char *format, *dstfmt;
+    char srcfmt;
+    Py_ssize_t itemsize, nitems;
+    int i, ndim = 1;
+
+    CHECK_RELEASED(self);
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "s|O:cast", kwlist,
+                                     &format, &shape))
+        return NULL;
+
+    if (!PyBuffer_IsContiguous(view, 'C')) {
+        PyErr_SetString(PyExc_TypeError,
+            "memoryview: casts are restricted to C-contiguous views");
+        return NULL;
+    }
+    srcfmt = get_native_fmtchar(view);
+    if (srcfmt == '\0') {
+        PyErr_SetString(PyExc_ValueError,
+            "memoryview: source format must be a native single character "
+            "format prefixed with an optional '@'");
+        return NULL;
+    }
+    dstfmt = get_native_format(format, &itemsize);
+    if (dstfmt == NULL) {
+        PyErr_SetString(PyExc_ValueError,
+            "memoryview: destination format must be a native single "
+            "character format prefixed with an optional '@'");
+        return NULL;
+    }
+    if (!IS_BYTE_FORMAT(srcfmt) && !IS_BYTE_FORMAT(dstfmt[0])) {
+        PyErr_SetString(PyExc_TypeError,
+            "memoryview: cannot cast between two non-byte formats");
+        return NULL;
+    }
+    if (view->len % itemsize) {
+        PyErr_SetString(PyExc_TypeError,
+                        "memoryview: length is not a multiple of itemsize");
+        return NULL;
+    }
+    if (shape != NULL) {
+        if (!PyList_Check(shape) && !PyTuple_Check(shape)) {
+            PyErr_SetString(PyExc_TypeError,
+                            "shape must be a list or a tuple");
+            return NULL;
+        }
+        if (PySequence_Fast_GET_SIZE(shape) > MEMORY_MAX_NDIM) {
+            PyErr_Format(PyExc_ValueError,
+                "memoryview: number of dimensions must not exceed %d",
+                MEMORY_MAX_NDIM);
+            return NULL;
+        }
+        ndim = (int)PySequence_Fast_GET_SIZE(shape);
+        if (view->ndim != 1 && ndim != 1) {
+            PyErr_SetString(PyExc_TypeError,
+                "memoryview: cast must be 1D -> ND or ND -> 1D");
+            return NULL;
+        }
+    }
+
+    mview = memory_copy(self);
+    if (mview == NULL)
+        return NULL;
+    if (init_storage(mview, ndim, 0) < 0)
+        goto error;
+    mview->view.format = dstfmt;
+    mview->view.itemsize = itemsize;
+    if (shape == NULL) {
+        mview->view.shape[0] = view->len / itemsize;
+    }
+    else {
+        nitems = 1;
+        for (i = 0; i < ndim; i++) {
+            PyObject *x = PySequence_Fast_GET_ITEM(shape, i);
+            Py_ssize_t n;
+
+            if (!PyInt_Check(x) && !PyLong_Check(x)) {
+                PyErr_SetString(PyExc_TypeError,
+                    "memoryview.cast(): elements of shape must be integers");
+                goto error;
+            }
+            n = PyNumber_AsSsize_t(x, PyExc_ValueError);
+            if (n == -1 && PyErr_Occurred())
+                goto error;
+            if (n <= 0) {
+                PyErr_SetString(PyExc_ValueError,
+                    "memoryview.cast(): elements of shape must be "
+                    "integers > 0");
+                goto error;
+            }
+            if (nitems > PY_SSIZE_T_MAX / n) {
+                PyErr_SetString(PyExc_ValueError,
+                    "memoryview.cast(): product(shape) > SSIZE_MAX");
+                goto error;
+            }
+            nitems *= n;
+            mview->view.shape[i] = n;
+        }
+        if (nitems != view->len / itemsize) {
+            PyErr_SetString(PyExc_TypeError,
+                "memoryview: product(shape) * itemsize != buffer size");
+            goto error;
+        }
+    }
+    PyBuffer_FillContiguousStrides(ndim, mview->view.shape,
+                                   mview->view.strides, (int)itemsize, 'C');
+    return (PyObject *)mview;
+
+error:
+    Py_DECREF(mview);
+    return NULL;
+}
+
+static int
+_memory_release(PyMemoryViewObject *self)
+{
+    if (self->flags & _Py_MEMORYVIEW_RELEASED)
+        return 0;
+    if (self->exports > 0) {
+        PyErr_Format(PyExc_BufferError,
+                     "memoryview has %zd exported buffer%s", self->exports,
+                     self->exports == 1 ? "" : "s");
+        return -1;
+    }
+    self->flags |= _Py_MEMORYVIEW_RELEASED;
     if (self->view.obj != NULL) {
         if (self->base && PyTuple_Check(self->base)) {
             /* Special case when first element is generic object
@@ -474,35 +1062,182 @@ memory_dealloc(PyMemoryViewObject *self)
                releasing the buffer on the first element.
             */
 
-            PyObject_CopyData(PyTuple_GET_ITEM(self->base,0),
-                              PyTuple_GET_ITEM(self->base,1));
-
-            /* The view member should have readonly == -1 in
-               this instance indicating that the memory can
-               be "locked" and was locked and will be unlocked
-               again after this call.
-            */
-            PyBuffer_Release(&(self->view));
+            if (PyObject_CopyData(PyTuple_GET_ITEM(self->base,0),
+                                  PyTuple_GET_ITEM(self->base,1)) < 0)
+                PyErr_Clear();
         }
-        else {
-            PyBuffer_Release(&(self->view));
-        }
-        Py_CLEAR(self->base);
+        PyBuffer_Release(&(self->view));
     }
+    Py_CLEAR(self->base);
+    return 0;
+}
+
+PyDoc_STRVAR(memory_release_doc,
+"release() -> None\n\
+\n\
+Release the underlying buffer exposed by the memoryview object.");
+
+static PyObject *
+memory_release(PyMemoryViewObject *self, PyObject *noargs)
+{
+    if (_memory_release(self) < 0)
+        return NULL;
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+memory_enter(PyMemoryViewObject *self, PyObject *noargs)
+{
+    CHECK_RELEASED(self);
+    Py_INCREF(self);
+    return (PyObject *)self;
+}
+
+static PyObject *
+memory_exit(PyMemoryViewObject *self, PyObject *args)
+{
+    return memory_release(self, NULL);
+}
+
+static PyMethodDef memory_methods[] = {
+    {"release", (PyCFunction)memory_release, METH_NOARGS,
+     memory_release_doc},
+    {"tobytes", (PyCFunction)memory_tobytes, METH_NOARGS, NULL},
+    {"tolist", (PyCFunction)memory_tolist, METH_NOARGS, NULL},
+    {"toreadonly", (PyCFunction)memory_toreadonly, METH_NOARGS,
+     memory_toreadonly_doc},
+    {"cast", (PyCFunction)memory_cast, METH_VARARGS | METH_KEYWORDS,
+     memory_cast_doc},
+    {"__enter__", (PyCFunction)memory_enter, METH_NOARGS, NULL},
+    {"__exit__", (PyCFunction)memory_exit, METH_VARARGS, NULL},
+    {NULL,          NULL}           /* sentinel */
+};
+
+
+static void
+memory_dealloc(PyMemoryViewObject *self)
+{
+    assert(self->exports == 0);
+    PyObject_GC_UnTrack(self);
+    (void)_memory_release(self);
+    PyMem_Free(self->ob_array);
     PyObject_GC_Del(self);
 }
 
 static PyObject *
 memory_repr(PyMemoryViewObject *self)
 {
+    if (IS_RELEASED(self))
+        return PyString_FromFormat("<released memory at %p>", self);
     return PyString_FromFormat("<memory at %p>", self);
 }
 
+static long
+memory_hash(PyMemoryViewObject *self)
+{
+    if (self->hash == -1) {
+        Py_buffer *view = &self->view;
+        PyObject *bytes;
+        char fmt;
+
+        CHECK_RELEASED_INT(self);
+        if (!view->readonly) {
+            PyErr_SetString(PyExc_ValueError,
+                            "cannot hash writable memoryview object");
+            return -1;
+        }
+        fmt = get_native_fmtchar(view);
+        if (!IS_BYTE_FORMAT(fmt)) {
+            PyErr_SetString(PyExc_ValueError,
+                "memoryview: hashing is restricted to formats 'B', 'b' "
+                "or 'c'");
+            return -1;
+        }
+        /* An unhashable exporter makes the view unhashable too */
+        if (view->obj != NULL && PyObject_Hash(view->obj) == -1)
+            return -1;
+
+        /* Equal views and strings must hash equal */
+        bytes = memory_tobytes(self, NULL);
+        if (bytes == NULL)
+            return -1;
+        self->hash = PyObject_Hash(bytes);
+        Py_DECREF(bytes);
+    }
+    return self->hash;
+}
+
 /* Sequence methods */
 static Py_ssize_t
 memory_length(PyMemoryViewObject *self)
 {
-    return get_shape0(&self->view);
+    CHECK_RELEASED_INT(self);
+    return self->view.ndim == 0 ? 1 : self->view.shape[0];
+}
+
+/* Return a pointer to item index of dimension dim, starting from ptr. */
+static char *
+lookup_dimension(Py_buffer *view, char *ptr, int dim, Py_ssize_t index)
+{
+    Py_ssize_t nitems = view->shape[dim];
+
+    if (index < 0) {
+        index += nitems;
+    }
+    if ((index < 0) || (index >= nitems)) {
+        PyErr_SetString(PyExc_IndexError,
+                        "index out of bounds");
+        return NULL;
+    }
+    ptr += view->strides[dim] * index;
+    if (view->suboffsets != NULL && view->suboffsets[dim] >= 0) {
+        ptr = *((char **)ptr) + view->suboffsets[dim];
+    }
+    return ptr;
+}
+
+/* Return a pointer to the item of a multi-dimensional view addressed by
+   the tuple of indices key. */
+static char *
+ptr_from_tuple(Py_buffer *view, PyObject *key)
+{
+    char *ptr = (char *)view->buf;
+    Py_ssize_t dim, nindices = PyTuple_GET_SIZE(key);
+
+    for (dim = 0; dim < nindices; dim++) {
+        if (PySlice_Check(PyTuple_GET_ITEM(key, dim))) {
+            PyErr_SetString(PyExc_NotImplementedError,
+                            "multi-dimensional slicing is not implemented");
+            return NULL;
+        }
+        if (!PyIndex_Check(PyTuple_GET_ITEM(key, dim))) {
+            PyErr_SetString(PyExc_TypeError,
+                            "memoryview: invalid slice key");
+            return NULL;
+        }
+    }
+    if (nindices < view->ndim) {
+        PyErr_SetString(PyExc_NotImplementedError,
+                        "sub-views are not implemented");
+        return NULL;
+    }
+    if (nindices > view->ndim) {
+        PyErr_Format(PyExc_TypeError,
+                     "cannot index %d-dimension view with %zd-element tuple",
+                     view->ndim, nindices);
+        return NULL;
+    }
+    for (dim = 0; dim < nindices; dim++) {
+        Py_ssize_t index;
+        index = PyNumber_AsSsize_t(PyTuple_GET_ITEM(key, dim),
+                                   PyExc_IndexError);
+        if (index == -1 && PyErr_Occurred())
+            return NULL;
+        ptr = lookup_dimension(view, ptr, (int)dim, index);
+        if (ptr == NULL)
+            return NULL;
+    }
+    return ptr;
 }
 
 /* Alternate version of memory_subcript that only accepts indices.
@@ -512,46 +1247,31 @@ static PyObject *
 memory_item(PyMemoryViewObject *self, Py_ssize_t result)
 {
     Py_buffer *view = &(self->view);
+    char *ptr;
 
+    CHECK_RELEASED(self);
     if (view->ndim == 0) {
         PyErr_SetString(PyExc_IndexError,
                         "invalid indexing of 0-dim memory");
         return NULL;
     }
-    if (view->ndim == 1) {
-        /* Return a bytes object */
-        char *ptr;
-        ptr = (char *)view->buf;
-        if (result < 0) {
-            result += get_shape0(view);
-        }
-        if ((result < 0) || (result >= get_shape0(view))) {
-            PyErr_SetString(PyExc_IndexError,
-                                "index out of bounds");
-            return NULL;
-        }
-        if (view->strides == NULL)
-            ptr += view->itemsize * result;
-        else
-            ptr += view->strides[0] * result;
-        if (view->suboffsets != NULL &&
-            view->suboffsets[0] >= 0) {
-            ptr = *((char **)ptr) + view->suboffsets[0];
-        }
-        return PyBytes_FromStringAndSize(ptr, view->itemsize);
-    } else {
-        /* Return a new memory-view object */
-        Py_buffer newview;
-        memset(&newview, 0, sizeof(newview));
-        /* XXX:  This needs to be fixed so it actually returns a sub-view */
-        return PyMemoryView_FromBuffer(&newview);
+    if (view->ndim != 1) {
+        PyErr_SetString(PyExc_NotImplementedError,
+                        "multi-dimensional sub-views are not implemented");
+        return NULL;
     }
+    /* Return a bytes object */
+    ptr = lookup_dimension(view, (char *)view->buf, 0, result);
+    if (ptr == NULL)
+        return NULL;
+    return PyBytes_FromStringAndSize(ptr, view->itemsize);
 }
 
 /*
   mem[obj] returns a bytes object holding the data for one element if
            obj fully indexes the memory view or another memory-view object
-           if it does not.
+           if it is a slice.  Slices select along the first dimension, with
+           any step, and share the memory of the original.
 
            0-d memory-view objects can be referenced using ... or () but
            not with anything else.
@@ -561,7 +1281,8 @@ memory_subscript(PyMemoryViewObject *self, PyObject *key)
 {
     Py_buffer *view;
     view = &(self->view);
-    
+
+    CHECK_RELEASED(self);
     if (view->ndim == 0) {
         if (key == Py_Ellipsis ||
             (PyTuple_Check(key) && PyTuple_GET_SIZE(key)==0)) {
@@ -583,41 +1304,35 @@ memory_subscript(PyMemoryViewObject *self, PyObject *key)
     }
     else if (PySlice_Check(key)) {
         Py_ssize_t start, stop, step, slicelength;
+        PyMemoryViewObject *mview;
 
         if (_PySlice_Unpack(key, &start, &stop, &step) < 0) {
             return NULL;
         }
-        slicelength = _PySlice_AdjustIndices(get_shape0(view), &start, &stop,
+        slicelength = _PySlice_AdjustIndices(view->shape[0], &start, &stop,
                                             step);
-    
-        if (step == 1 && view->ndim == 1) {
-            Py_buffer newview;
-            void *newbuf = (char *) view->buf
-                                    + start * view->itemsize;
-            int newflags = view->readonly
-                    ? PyBUF_CONTIG_RO : PyBUF_CONTIG;
-    
-            /* XXX There should be an API to create a subbuffer */
-            if (view->obj != NULL) {
-                if (PyObject_GetBuffer(view->obj, &newview, newflags) == -1)
-                    return NULL;
-            }
-            else {
-                newview = *view;
-            }
-            newview.buf = newbuf;
-            newview.len = slicelength * newview.itemsize;
-            newview.format = view->format;
-            newview.shape = &(newview.smalltable[0]);
-            newview.shape[0] = slicelength;
-            newview.strides = &(newview.itemsize);
-            return PyMemoryView_FromBuffer(&newview);
-        }
-        PyErr_SetNone(PyExc_NotImplementedError);
-        return NULL;
+
+        mview = memory_copy(self);
+        if (mview == NULL)
+            return NULL;
+        mview->view.buf = (char *)view->buf + start * view->strides[0];
+        mview->view.shape[0] = slicelength;
+        mview->view.strides[0] = view->strides[0] * step;
+        init_len(&mview->view);
+        return (PyObject *)mview;
+    }
+    else if (key == Py_Ellipsis) {
+        Py_INCREF(self);
+        return (PyObject *)self;
+    }
+    else if (PyTuple_Check(key) && view->ndim > 1) {
+        char *ptr = ptr_from_tuple(view, key);
+        if (ptr == NULL)
+            return NULL;
+        return PyBytes_FromStringAndSize(ptr, view->itemsize);
     }
     PyErr_Format(PyExc_TypeError,
-        "cannot index memory using \"%.200s\"", 
+        "cannot index memory using \"%.200s\"",
         key->ob_type->tp_name);
     return NULL;
 }
@@ -627,11 +1342,12 @@ memory_subscript(PyMemoryViewObject *self, PyObject *key)
 static int
 memory_ass_sub(PyMemoryViewObject *self, PyObject *key, PyObject *value)
 {
-    Py_ssize_t start, len, bytelen;
+    Py_ssize_t start = 0, step = 1, len, bytelen, i;
     Py_buffer srcview;
     Py_buffer *view = &(self->view);
-    char *srcbuf, *destbuf;
+    char *srcbuf, *destbuf = NULL, *tmp = NULL;
 
+    CHECK_RELEASED_INT(self);
     if (view->readonly) {
         PyErr_SetString(PyExc_TypeError,
             "cannot modify read-only memory");
@@ -642,52 +1358,52 @@ memory_ass_sub(PyMemoryViewObject *self, PyObject *key, PyObject *value)
                         "cannot delete memory");
         return -1;
     }
-    if (view->ndim != 1) {
+    if (view->ndim > 1 && PyTuple_Check(key)) {
+        destbuf = ptr_from_tuple(view, key);
+        if (destbuf == NULL)
+            return -1;
+        len = 1;
+    }
+    else if (view->ndim != 1) {
         PyErr_SetNone(PyExc_NotImplementedError);
         return -1;
     }
-    if (PyIndex_Check(key)) {
+    else if (PyIndex_Check(key)) {
         start = PyNumber_AsSsize_t(key, NULL);
         if (start == -1 && PyErr_Occurred())
             return -1;
-        if (start < 0) {
-            start += get_shape0(view);
-        }
-        if ((start < 0) || (start >= get_shape0(view))) {
-            PyErr_SetString(PyExc_IndexError,
-                            "index out of bounds");
+        destbuf = lookup_dimension(view, (char *)view->buf, 0, start);
+        if (destbuf == NULL)
             return -1;
-        }
         len = 1;
     }
     else if (PySlice_Check(key)) {
-        Py_ssize_t stop, step;
+        Py_ssize_t stop;
 
         if (_PySlice_Unpack(key, &start, &stop, &step) < 0) {
             return -1;
         }
-        len = _PySlice_AdjustIndices(get_shape0(view), &start, &stop, step);
-        if (step != 1) {
-            PyErr_SetNone(PyExc_NotImplementedError);
-            return -1;
-        }
+        len = _PySlice_AdjustIndices(view->shape[0], &start, &stop, step);
     }
     else {
         PyErr_Format(PyExc_TypeError,
-            "cannot index memory using \"%.200s\"", 
+            "cannot index memory using \"%.200s\"",
             key->ob_type->tp_name);
         return -1;
     }
-    if (PyObject_GetBuffer(value, &srcview, PyBUF_CONTIG_RO) == -1) {
+    if (PyObject_GetBuffer(value, &srcview, PyBUF_FULL_RO) == -1) {
         return -1;
     }
     /* XXX should we allow assignment of different item sizes
        as long as the byte length is the same?
        (e.g. assign 2 shorts to a 4-byte slice) */
     if (srcview.itemsize != view->itemsize) {
+        PyObject *target = view->obj ? view->obj : (PyObject *)self;
+        if (self->base != NULL && !(self->flags & _Py_MEMORYVIEW_COPY))
+            target = self->base;
         PyErr_Format(PyExc_TypeError,
-            "mismatching item sizes for \"%.200s\" and \"%.200s\"", 
-            view->obj->ob_type->tp_name, srcview.obj->ob_type->tp_name);
+            "mismatching item sizes for \"%.200s\" and \"%.200s\"",
+            Py_TYPE(target)->tp_name, Py_TYPE(value)->tp_name);
         goto _error;
     }
     bytelen = len * view->itemsize;
@@ -696,23 +1412,94 @@ memory_ass_sub(PyMemoryViewObject *self, PyObject *key, PyObject *value)
             "cannot modify size of memoryview object");
         goto _error;
     }
-    /* Do the actual copy */
-    destbuf = (char *) view->buf + start * view->itemsize;
     srcbuf = (char *) srcview.buf;
-    if (destbuf + bytelen < srcbuf || srcbuf + bytelen < destbuf)
-        /* No overlapping */
-        memcpy(destbuf, srcbuf, bytelen);
-    else
-        memmove(destbuf, srcbuf, bytelen);
+    if (!PyBuffer_IsContiguous(&srcview, 'C')) {
+        tmp = PyMem_Malloc(bytelen);
+        if (tmp == NULL) {
+            PyErr_NoMemory();
+            goto _error;
+        }
+        if (PyBuffer_ToContiguous(tmp, &srcview, bytelen, 'C') < 0)
+            goto _error;
+        srcbuf = tmp;
+    }
+    if (destbuf == NULL && (view->suboffsets != NULL ||
+                            (len > 1 &&
+                             view->strides[0] * step != view->itemsize))) {
+        /* Item by item copy into a strided slice; go through a
+           temporary copy in case the source overlaps */
+        if (tmp == NULL) {
+            tmp = PyMem_Malloc(bytelen);
+            if (tmp == NULL) {
+                PyErr_NoMemory();
+                goto _error;
+            }
+            memcpy(tmp, srcbuf, bytelen);
+            srcbuf = tmp;
+        }
+        for (i = 0; i < len; i++) {
+            destbuf = lookup_dimension(view, (char *)view->buf, 0,
+                                       start + i * step);
+            memcpy(destbuf, srcbuf + i * view->itemsize, view->itemsize);
+        }
+    }
+    else {
+        /* Do the actual copy */
+        if (destbuf == NULL)
+            destbuf = (char *)view->buf + start * view->strides[0];
+        if (destbuf + bytelen < srcbuf || srcbuf + bytelen < destbuf)
+            /* No overlapping */
+            memcpy(destbuf, srcbuf, bytelen);
+        else
+            memmove(destbuf, srcbuf, bytelen);
+    }
 
+    PyMem_Free(tmp);
     PyBuffer_Release(&srcview);
     return 0;
 
 _error:
+    PyMem_Free(tmp);
     PyBuffer_Release(&srcview);
     return -1;
 }
 
+/* Compare the memory of two buffers of the same length, whatever their
+   layout.  Returns 1 if equal, 0 if not and -1 on error. */
+static int
+buffers_equal(Py_buffer *vv, Py_buffer *ww)
+{
+    char *vbuf = vv->buf, *wbuf = ww->buf;
+    int equal = -1;
+
+    if (!PyBuffer_IsContiguous(vv, 'C')) {
+        vbuf = PyMem_Malloc(vv->len);
+        if (vbuf == NULL) {
+            PyErr_NoMemory();
+            goto done;
+        }
+        if (PyBuffer_ToContiguous(vbuf, vv, vv->len, 'C') < 0)
+            goto done;
+    }
+    if (!PyBuffer_IsContiguous(ww, 'C')) {
+        wbuf = PyMem_Malloc(ww->len);
+        if (wbuf == NULL) {
+            PyErr_NoMemory();
+            goto done;
+        }
+        if (PyBuffer_ToContiguous(wbuf, ww, ww->len, 'C') < 0)
+            goto done;
+    }
+    equal = !memcmp(vbuf, wbuf, vv->len);
+
+done:
+    if (vbuf != vv->buf)
+        PyMem_Free(vbuf);
+    if (wbuf != ww->buf)
+        PyMem_Free(wbuf);
+    return equal;
+}
+
 static PyObject *
 memory_richcompare(PyObject *v, PyObject *w, int op)
 {
@@ -724,11 +1511,17 @@ memory_richcompare(PyObject *v, PyObject *w, int op)
     ww.obj = NULL;
     if (op != Py_EQ && op != Py_NE)
         goto _notimpl;
-    if (PyObject_GetBuffer(v, &vv, PyBUF_CONTIG_RO) == -1) {
+    if ((PyMemoryView_Check(v) && IS_RELEASED(v)) ||
+        (PyMemoryView_Check(w) && IS_RELEASED(w))) {
+        /* A released view is only equal to itself */
+        equal = (v == w);
+        goto _end;
+    }
+    if (PyObject_GetBuffer(v, &vv, PyBUF_FULL_RO) == -1) {
         PyErr_Clear();
         goto _notimpl;
     }
-    if (PyObject_GetBuffer(w, &ww, PyBUF_CONTIG_RO) == -1) {
+    if (PyObject_GetBuffer(w, &ww, PyBUF_FULL_RO) == -1) {
         PyErr_Clear();
         goto _notimpl;
     }
@@ -736,7 +1529,12 @@ memory_richcompare(PyObject *v, PyObject *w, int op)
     if (vv.itemsize != ww.itemsize || vv.len != ww.len)
         goto _end;
 
-    equal = !memcmp(vv.buf, ww.buf, vv.len);
+    equal = buffers_equal(&vv, &ww);
+    if (equal < 0) {
+        PyBuffer_Release(&vv);
+        PyBuffer_Release(&ww);
+        return NULL;
+    }
 
 _end:
     PyBuffer_Release(&vv);
@@ -769,8 +1567,9 @@ memory_traverse(PyMemoryViewObject *self, visitproc visit, void *arg)
 static int
 memory_clear(PyMemoryViewObject *self)
 {
-    Py_CLEAR(self->base);
-    PyBuffer_Release(&self->view);
+    /* Views still exported by self are released with their consumers */
+    if (_memory_release(self) < 0)
+        PyErr_Clear();
     return 0;
 }
 
@@ -814,7 +1613,7 @@ PyTypeObject PyMemoryView_Type = {
     0,                                        /* tp_as_number */
     &memory_as_sequence,                      /* tp_as_sequence */
     &memory_as_mapping,                       /* tp_as_mapping */
-    0,                                        /* tp_hash */
+    (hashfunc)memory_hash,                    /* tp_hash */
     0,                                        /* tp_call */
     0,                                        /* tp_str */
     PyObject_GenericGetAttr,                  /* tp_getattro */
@@ -67,15 +67,53 @@ PyCFunction_GetFlags(PyObject *op)
     return ((PyCFunctionObject *)op) -> m_ml -> ml_flags;
 }
 
-PyObject *
-PyCFunction_Call(PyObject *func, PyObject *arg, PyObject *kw)
+/* Call the C function of ml with the keyword arguments kw moved onto the
+   end of the array of positional arguments. */
+static PyObject *
+fastcall_dict(PyMethodDef *ml, PyObject *self, PyObject **args,
+              Py_ssize_t nargs, PyObject *kw)
+{
+    PyObject *small_stack[8];
+    PyObject **stack = small_stack;
+    PyObject *kwnames, *key, *value, *result;
+    Py_ssize_t nkw = PyDict_Size(kw), pos = 0, i;
+
+    if (nargs + nkw > (Py_ssize_t)(sizeof(small_stack) /
+                                   sizeof(small_stack[0]))) {
+        stack = PyMem_New(PyObject *, nargs + nkw);
+        if (stack == NULL)
+            return PyErr_NoMemory();
+    }
+    kwnames = PyTuple_New(nkw);
+    if (kwnames == NULL) {
+        result = NULL;
+        goto done;
+    }
+    for (i = 0; i < nargs; i++)
+        stack[i] = args[i];
+    i = 0;
+    while (PyDict_Next(kw, &pos, &key, &value)) {
+        Py_INCREF(key);
+        PyTuple_SET_ITEM(kwnames, i, key);
+        stack[nargs + i] = value;
+        i++;
+    }
+    result = (*(_PyCFunctionFastWithKeywords)ml->ml_meth)(self, stack, nargs,
+                                                          kwnames);
+    Py_DECREF(kwnames);
+done:
+    if (stack != small_stack)
+        PyMem_Free(stack);
+    return result;
+}
+
+static PyObject *
+methoddef_call(PyMethodDef *ml, PyObject *self, PyObject *arg, PyObject *kw)
 {
-    PyCFunctionObject* f = (PyCFunctionObject*)func;
-    PyCFunction meth = PyCFunction_GET_FUNCTION(func);
-    PyObject *self = PyCFunction_GET_SELF(func);
+    PyCFunction meth = ml->ml_meth;
     Py_ssize_t size;
 
-    switch (PyCFunction_GET_FLAGS(func) & ~(METH_CLASS | METH_STATIC | METH_COEXIST)) {
+    switch (ml->ml_flags & ~(METH_CLASS | METH_STATIC | METH_COEXIST)) {
     case METH_VARARGS:
         if (kw == NULL || PyDict_Size(kw) == 0)
             return (*meth)(self, arg);
@@ -83,6 +121,17 @@ PyCFunction_Call(PyObject *func, PyObject *arg, PyObject *kw)
     case METH_VARARGS | METH_KEYWORDS:
     case METH_OLDARGS | METH_KEYWORDS:
         return (*(PyCFunctionWithKeywords)meth)(self, arg, kw);
+    case METH_FASTCALL:
+        if (kw == NULL || PyDict_Size(kw) == 0)
+            return (*(_PyCFunctionFast)meth)(self, &PyTuple_GET_ITEM(arg, 0),
+                                             PyTuple_GET_SIZE(arg));
+        break;
+    case METH_FASTCALL | METH_KEYWORDS:
+        if (kw == NULL || PyDict_Size(kw) == 0)
+            return (*(_PyCFunctionFastWithKeywords)meth)(
+                self, &PyTuple_GET_ITEM(arg, 0), PyTuple_GET_SIZE(arg), NULL);
+        return fastcall_dict(ml, self, &PyTuple_GET_ITEM(arg, 0),
+                             PyTuple_GET_SIZE(arg), kw);
     case METH_NOARGS:
         if (kw == NULL || PyDict_Size(kw) == 0) {
             size = PyTuple_GET_SIZE(arg);
@@ -90,7 +139,7 @@ PyCFunction_Call(PyObject *func, PyObject *arg, PyObject *kw)
                 return (*meth)(self, NULL);
             PyErr_Format(PyExc_TypeError,
                 "%.200s() takes no arguments (%zd given)",
-                f->m_ml->ml_name, size);
+                ml->ml_name, size);
             return NULL;
         }
         break;
@@ -101,7 +150,7 @@ PyCFunction_Call(PyObject *func, PyObject *arg, PyObject *kw)
                 return (*meth)(self, PyTuple_GET_ITEM(arg, 0));
             PyErr_Format(PyExc_TypeError,
                 "%.200s() takes exactly one argument (%zd given)",
-                f->m_ml->ml_name, size);
+                ml->ml_name, size);
             return NULL;
         }
         break;
@@ -121,10 +170,89 @@ PyCFunction_Call(PyObject *func, PyObject *arg, PyObject *kw)
         return NULL;
     }
     PyErr_Format(PyExc_TypeError, "%.200s() takes no keyword arguments",
-                 f->m_ml->ml_name);
+                 ml->ml_name);
     return NULL;
 }
 
+PyObject *
+PyCFunction_Call(PyObject *func, PyObject *arg, PyObject *kw)
+{
+    return methoddef_call(((PyCFunctionObject *)func)->m_ml,
+                          PyCFunction_GET_SELF(func), arg, kw);
+}
+
+/* Call the C function of ml with the nargs positional arguments in args,
+   followed by the values of the keyword arguments named in kwnames (a
+   tuple, or NULL if there are none).  The arguments are only borrowed.
+   Functions using METH_FASTCALL get the array as is; for the other calling
+   conventions, the argument tuple and keyword dict are built here. */
+PyObject *
+_PyMethodDef_RawFastCallKeywords(PyMethodDef *ml, PyObject *self,
+                                 PyObject **args, Py_ssize_t nargs,
+                                 PyObject *kwnames)
+{
+    PyCFunction meth = ml->ml_meth;
+    int flags = ml->ml_flags & ~(METH_CLASS | METH_STATIC | METH_COEXIST);
+    Py_ssize_t nkw = kwnames == NULL ? 0 : PyTuple_GET_SIZE(kwnames);
+    PyObject *argtuple, *kwdict = NULL, *result;
+    Py_ssize_t i;
+
+    if (nkw == 0) {
+        switch (flags) {
+        case METH_FASTCALL:
+            return (*(_PyCFunctionFast)meth)(self, args, nargs);
+        case METH_FASTCALL | METH_KEYWORDS:
+            return (*(_PyCFunctionFastWithKeywords)meth)(self, args, nargs,
+                                                         NULL);
+        case METH_NOARGS:
+            if (nargs == 0)
+                return (*meth)(self, NULL);
+            PyErr_Format(PyExc_TypeError,
+                "%.200s() takes no arguments (%zd given)",
+                ml->ml_name, nargs);
+            return NULL;
+        case METH_O:
+            if (nargs == 1)
+                return (*meth)(self, args[0]);
+            PyErr_Format(PyExc_TypeError,
+                "%.200s() takes exactly one argument (%zd given)",
+                ml->ml_name, nargs);
+            return NULL;
+        }
+    }
+    else if (flags == (METH_FASTCALL | METH_KEYWORDS)) {
+        return (*(_PyCFunctionFastWithKeywords)meth)(self, args, nargs,
+                                                     kwnames);
+    }
+
+    argtuple = PyTuple_New(nargs);
+    if (argtuple == NULL)
+        return NULL;
+    for (i = 0; i < nargs; i++) {
+        Py_INCREF(args[i]);
+        PyTuple_SET_ITEM(argtuple, i, args[i]);
+    }
+    if (nkw > 0) {
+        kwdict = PyDict_New();
+        if (kwdict == NULL) {
+            Py_DECREF(argtuple);
+            return NULL;
+        }
+        for (i = 0; i < nkw; i++) {
+            if (PyDict_SetItem(kwdict, PyTuple_GET_ITEM(kwnames, i),
+                               args[nargs + i]) < 0) {
+                Py_DECREF(argtuple);
+                Py_DECREF(kwdict);
+                return NULL;
+            }
+        }
+    }
+    result = methoddef_call(ml, self, argtuple, kwdict);
+    Py_DECREF(argtuple);
+    Py_XDECREF(kwdict);
+    return result;
+}
+
 /* Methods (the standard built-in methods, that is) */
 
 static void
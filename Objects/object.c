@@ -16,12 +16,9 @@ _Py_GetRefTotal(void)
 {
     PyObject *o;
     Py_ssize_t total = _Py_RefTotal;
-    /* ignore the references to the dummy object of the dicts and sets
+    /* ignore the references to the dummy object of the sets
        because they are not reliable and not useful (now that the
        hash table code is well-tested) */
-    o = _PyDict_Dummy();
-    if (o != NULL)
-        total -= o->ob_refcnt;
     o = _PySet_Dummy();
     if (o != NULL)
         total -= o->ob_refcnt;
@@ -202,6 +199,21 @@ _Py_NegativeRefcount(const char *fname, int lineno, PyObject *op)
 
 #endif /* Py_REF_DEBUG */
 
+#ifdef Py_IMMORTAL_OBJECTS
+/* Make op immortal: it is never deallocated and Py_INCREF/Py_DECREF no
+   longer write to it. */
+void
+_Py_SetImmortal(PyObject *op)
+{
+    if (_Py_IsImmortal(op))
+        return;
+#ifdef Py_REF_DEBUG
+    _Py_RefTotal -= op->ob_refcnt;
+#endif
+    op->ob_refcnt = _Py_IMMORTAL_REFCNT;
+}
+#endif /* Py_IMMORTAL_OBJECTS */
+
 void
 Py_IncRef(PyObject *o)
 {
@@ -1466,6 +1478,86 @@ PyObject_GenericGetAttr(PyObject *obj, PyObject *name)
     return _PyObject_GenericGetAttrWithDict(obj, name, NULL);
 }
 
+/* Used by LOAD_METHOD.  When PyObject_GetAttr() would bind a Python
+   function or a method descriptor found on the type to obj, store that
+   function in *method instead and return 1, so the caller can pass obj as
+   the first argument without allocating a bound method.  Otherwise store
+   what PyObject_GetAttr() would have returned and return 0. */
+int
+_PyObject_GetMethod(PyObject *obj, PyObject *name, PyObject **method)
+{
+    PyTypeObject *tp = Py_TYPE(obj);
+    PyObject *descr;
+    descrgetfunc f = NULL;
+    PyObject **dictptr, *dict;
+    PyObject *attr;
+    int meth_found = 0;
+
+    assert(*method == NULL);
+
+    if (tp->tp_getattro != PyObject_GenericGetAttr || !PyString_Check(name)) {
+        *method = PyObject_GetAttr(obj, name);
+        return 0;
+    }
+
+    if (tp->tp_dict == NULL) {
+        if (PyType_Ready(tp) < 0)
+            return 0;
+    }
+
+    descr = _PyType_Lookup(tp, name);
+    if (descr != NULL) {
+        Py_INCREF(descr);
+        if (PyFunction_Check(descr) ||
+            Py_TYPE(descr) == &PyMethodDescr_Type) {
+            meth_found = 1;
+        }
+        else if (PyType_HasFeature(descr->ob_type, Py_TPFLAGS_HAVE_CLASS)) {
+            f = descr->ob_type->tp_descr_get;
+            if (f != NULL && PyDescr_IsData(descr)) {
+                *method = f(descr, obj, (PyObject *)tp);
+                Py_DECREF(descr);
+                return 0;
+            }
+        }
+    }
+
+    dictptr = _PyObject_GetDictPtr(obj);
+    if (dictptr != NULL && (dict = *dictptr) != NULL) {
+        Py_INCREF(dict);
+        attr = PyDict_GetItem(dict, name);
+        if (attr != NULL) {
+            Py_INCREF(attr);
+            *method = attr;
+            Py_DECREF(dict);
+            Py_XDECREF(descr);
+            return 0;
+        }
+        Py_DECREF(dict);
+    }
+
+    if (meth_found) {
+        *method = descr;
+        return 1;
+    }
+
+    if (f != NULL) {
+        *method = f(descr, obj, (PyObject *)tp);
+        Py_DECREF(descr);
+        return 0;
+    }
+
+    if (descr != NULL) {
+        *method = descr;
+        return 0;
+    }
+
+    PyErr_Format(PyExc_AttributeError,
+                 "'%.50s' object has no attribute '%.400s'",
+                 tp->tp_name, PyString_AS_STRING(name));
+    return 0;
+}
+
 int
 _PyObject_GenericSetAttrWithDict(PyObject *obj, PyObject *name,
                                  PyObject *value, PyObject *dict)
@@ -1516,14 +1608,15 @@ _PyObject_GenericSetAttrWithDict(PyObject *obj, PyObject *name,
 
     if (dict == NULL) {
         dictptr = _PyObject_GetDictPtr(obj);
-        if (dictptr != NULL) {
-            dict = *dictptr;
-            if (dict == NULL && value != NULL) {
-                dict = PyDict_New();
-                if (dict == NULL)
-                    goto done;
-                *dictptr = dict;
-            }
+        if (dictptr != NULL && (*dictptr != NULL || value != NULL)) {
+            /* Instance dicts of heap types share their keys */
+            PyDictKeysObject **cachedptr = NULL;
+            if (tp->tp_flags & Py_TPFLAGS_HEAPTYPE)
+                cachedptr = &((PyHeapTypeObject *)tp)->ht_cached_keys;
+            res = _PyObjectDict_SetItem(cachedptr, dictptr, name, value);
+            if (res < 0 && PyErr_ExceptionMatches(PyExc_KeyError))
+                PyErr_SetObject(PyExc_AttributeError, name);
+            goto done;
         }
     }
     if (dict != NULL) {
@@ -2158,6 +2251,9 @@ _Py_ReadyTypes(void)
     if (PyType_Ready(&PyMemoryView_Type) < 0)
         Py_FatalError("Can't initialize memoryview type");
 
+    if (PyType_Ready(&PyPickleBuffer_Type) < 0)
+        Py_FatalError("Can't initialize PickleBuffer type");
+
     if (PyType_Ready(&PyTuple_Type) < 0)
         Py_FatalError("Can't initialize tuple type");
 
@@ -0,0 +1,267 @@
+/* PickleBuffer object implementation */
+
+#include "Python.h"
+#include "structmember.h"
+
+/* A PickleBuffer wraps an object exporting the (new-style) buffer interface
+ * so that the pickler can hand its memory to a buffer_callback instead of
+ * copying it into the pickle stream (protocol 5 out-of-band data).
+ *
+ * Only the new-style buffer interface is accepted: objects that merely
+ * provide the old bf_getreadbuffer slots give no guarantee that their memory
+ * stays put while the PickleBuffer is alive.
+ */
+
+typedef struct {
+    PyObject_HEAD
+    /* The view exported by the original object */
+    Py_buffer view;
+    PyObject *weakreflist;
+} PyPickleBufferObject;
+
+/* C API */
+
+PyObject *
+PyPickleBuffer_FromObject(PyObject *base)
+{
+    PyTypeObject *type = &PyPickleBuffer_Type;
+    PyPickleBufferObject *self;
+
+    self = (PyPickleBufferObject *) type->tp_alloc(type, 0);
+    if (self == NULL) {
+        return NULL;
+    }
+    self->view.obj = NULL;
+    self->weakreflist = NULL;
+    if (PyObject_GetBuffer(base, &self->view, PyBUF_FULL_RO) < 0) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    return (PyObject *) self;
+}
+
+const Py_buffer *
+PyPickleBuffer_GetBuffer(PyObject *obj)
+{
+    PyPickleBufferObject *self = (PyPickleBufferObject *) obj;
+
+    if (!PyPickleBuffer_Check(obj)) {
+        PyErr_Format(PyExc_TypeError,
+                     "expected PickleBuffer, %.200s found",
+                     Py_TYPE(obj)->tp_name);
+        return NULL;
+    }
+    if (self->view.obj == NULL) {
+        PyErr_SetString(PyExc_ValueError,
+                        "operation forbidden on released PickleBuffer object");
+        return NULL;
+    }
+    return &self->view;
+}
+
+int
+PyPickleBuffer_Release(PyObject *obj)
+{
+    PyPickleBufferObject *self = (PyPickleBufferObject *) obj;
+
+    if (!PyPickleBuffer_Check(obj)) {
+        PyErr_Format(PyExc_TypeError,
+                     "expected PickleBuffer, %.200s found",
+                     Py_TYPE(obj)->tp_name);
+        return -1;
+    }
+    PyBuffer_Release(&self->view);
+    return 0;
+}
+
+static PyObject *
+picklebuf_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    PyPickleBufferObject *self;
+    PyObject *base;
+
+    if (!_PyArg_NoKeywords("PickleBuffer()", kwds))
+        return NULL;
+    if (!PyArg_UnpackTuple(args, "PickleBuffer", 1, 1, &base))
+        return NULL;
+
+    self = (PyPickleBufferObject *) type->tp_alloc(type, 0);
+    if (self == NULL) {
+        return NULL;
+    }
+    self->view.obj = NULL;
+    self->weakreflist = NULL;
+    if (PyObject_GetBuffer(base, &self->view, PyBUF_FULL_RO) < 0) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    return (PyObject *) self;
+}
+
+static int
+picklebuf_traverse(PyPickleBufferObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->view.obj);
+    return 0;
+}
+
+static int
+picklebuf_clear(PyPickleBufferObject *self)
+{
+    PyBuffer_Release(&self->view);
+    return 0;
+}
+
+static void
+picklebuf_dealloc(PyPickleBufferObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    if (self->weakreflist != NULL)
+        PyObject_ClearWeakRefs((PyObject *) self);
+    PyBuffer_Release(&self->view);
+    Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+/* Buffer API */
+
+static int
+picklebuf_getbuf(PyPickleBufferObject *self, Py_buffer *view, int flags)
+{
+    if (self->view.obj == NULL) {
+        PyErr_SetString(PyExc_ValueError,
+                        "operation forbidden on released PickleBuffer object");
+        return -1;
+    }
+    return PyObject_GetBuffer(self->view.obj, view, flags);
+}
+
+static void
+picklebuf_releasebuf(PyPickleBufferObject *self, Py_buffer *view)
+{
+    /* Since our bf_getbuffer redirects to the original object, this
+     * implementation is never called.  It only exists to signal that
+     * buffers exported by PickleBuffer have non-trivial releasing
+     * behaviour.
+     */
+}
+
+static PyBufferProcs picklebuf_as_buffer = {
+    0,                                        /* bf_getreadbuffer */
+    0,                                        /* bf_getwritebuffer */
+    0,                                        /* bf_getsegcount */
+    0,                                        /* bf_getcharbuffer */
+    (getbufferproc) picklebuf_getbuf,         /* bf_getbuffer */
+    (releasebufferproc) picklebuf_releasebuf, /* bf_releasebuffer */
+};
+
+/* Methods */
+
+static PyObject *
+picklebuf_raw(PyPickleBufferObject *self, PyObject *noargs)
+{
+    Py_buffer view;
+    PyObject *m;
+
+    if (self->view.obj == NULL) {
+        PyErr_SetString(PyExc_ValueError,
+                        "operation forbidden on released PickleBuffer object");
+        return NULL;
+    }
+    if (self->view.suboffsets != NULL
+        || !PyBuffer_IsContiguous(&self->view, 'A')) {
+        PyErr_SetString(PyExc_BufferError,
+                        "cannot extract raw buffer from non-contiguous buffer");
+        return NULL;
+    }
+    if (PyObject_GetBuffer(self->view.obj, &view, PyBUF_FULL_RO) < 0) {
+        return NULL;
+    }
+    /* Present the memory as a flat sequence of unsigned bytes; the
+       memoryview copies shape and strides into its own storage. */
+    view.format = "B";
+    view.itemsize = 1;
+    view.ndim = 1;
+    view.shape = &view.len;
+    view.strides = &view.itemsize;
+    view.suboffsets = NULL;
+    m = PyMemoryView_FromBuffer(&view);
+    if (m == NULL) {
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+    return m;
+}
+
+PyDoc_STRVAR(picklebuf_raw_doc,
+"raw() -> memoryview\n\
+\n\
+Return a memoryview of the raw memory underlying this buffer.\n\
+Will raise BufferError if the buffer isn't contiguous.");
+
+static PyObject *
+picklebuf_release(PyPickleBufferObject *self, PyObject *noargs)
+{
+    PyBuffer_Release(&self->view);
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(picklebuf_release_doc,
+"release() -> None\n\
+\n\
+Release the underlying buffer exposed by the PickleBuffer object.");
+
+static PyMethodDef picklebuf_methods[] = {
+    {"raw",     (PyCFunction) picklebuf_raw,     METH_NOARGS, picklebuf_raw_doc},
+    {"release", (PyCFunction) picklebuf_release, METH_NOARGS, picklebuf_release_doc},
+    {NULL,      NULL}
+};
+
+PyDoc_STRVAR(picklebuf_doc,
+"PickleBuffer(buffer)\n\
+\n\
+Wrapper for potentially out-of-band buffers.  Objects implementing\n\
+__reduce_ex__ can return one for protocol 5 and higher, letting the\n\
+pickler pass the memory to its buffer_callback without a copy.");
+
+PyTypeObject PyPickleBuffer_Type = {
+    PyVarObject_HEAD_INIT(&PyType_Type, 0)
+    "pickle.PickleBuffer",                      /* tp_name */
+    sizeof(PyPickleBufferObject),               /* tp_basicsize */
+    0,                                          /* tp_itemsize */
+    (destructor) picklebuf_dealloc,             /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    PyObject_GenericGetAttr,                    /* tp_getattro */
+    0,                                          /* tp_setattro */
+    &picklebuf_as_buffer,                       /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC |
+        Py_TPFLAGS_HAVE_NEWBUFFER,              /* tp_flags */
+    picklebuf_doc,                              /* tp_doc */
+    (traverseproc) picklebuf_traverse,          /* tp_traverse */
+    (inquiry) picklebuf_clear,                  /* tp_clear */
+    0,                                          /* tp_richcompare */
+    offsetof(PyPickleBufferObject, weakreflist), /* tp_weaklistoffset */
+    0,                                          /* tp_iter */
+    0,                                          /* tp_iternext */
+    picklebuf_methods,                          /* tp_methods */
+    0,                                          /* tp_members */
+    0,                                          /* tp_getset */
+    0,                                          /* tp_base */
+    0,                                          /* tp_dict */
+    0,                                          /* tp_descr_get */
+    0,                                          /* tp_descr_set */
+    0,                                          /* tp_dictoffset */
+    0,                                          /* tp_init */
+    PyType_GenericAlloc,                        /* tp_alloc */
+    picklebuf_new,                              /* tp_new */
+    PyObject_GC_Del,                            /* tp_free */
+};
@@ -105,9 +105,10 @@ is ok.
 #define FORMAT_BUFFER_SIZE 50
 
 Py_LOCAL_INLINE(int)
-stringlib_parse_args_finds(const char * function_name, PyObject *args,
-                           PyObject **subobj,
-                           Py_ssize_t *start, Py_ssize_t *end)
+stringlib_parse_stack_finds(const char * function_name,
+                            PyObject **args, Py_ssize_t nargs,
+                            PyObject **subobj,
+                            Py_ssize_t *start, Py_ssize_t *end)
 {
     PyObject *tmp_subobj;
     Py_ssize_t tmp_start = 0;
@@ -119,7 +120,8 @@ stringlib_parse_args_finds(const char * function_name, PyObject *args,
     strncpy(format + len, function_name, FORMAT_BUFFER_SIZE - len - 1);
     format[FORMAT_BUFFER_SIZE - 1] = '\0';
 
-    if (!PyArg_ParseTuple(args, format, &tmp_subobj, &obj_start, &obj_end))
+    if (!_PyArg_ParseStack(args, nargs, format,
+                           &tmp_subobj, &obj_start, &obj_end))
         return 0;
 
     /* To support None in "start" and "end" arguments, meaning
@@ -143,7 +145,7 @@ stringlib_parse_args_finds(const char * function_name, PyObject *args,
 #if STRINGLIB_IS_UNICODE
 
 /*
-Wraps stringlib_parse_args_finds() and additionally ensures that the
+Wraps stringlib_parse_stack_finds() and additionally ensures that the
 first argument is a unicode object.
 
 Note that we receive a pointer to the pointer of the substring object,
@@ -153,14 +155,15 @@ after finishing using the substring, must DECREF it).
 */
 
 Py_LOCAL_INLINE(int)
-stringlib_parse_args_finds_unicode(const char * function_name, PyObject *args,
-                                   PyUnicodeObject **substring,
-                                   Py_ssize_t *start, Py_ssize_t *end)
+stringlib_parse_stack_finds_unicode(const char * function_name,
+                                    PyObject **args, Py_ssize_t nargs,
+                                    PyUnicodeObject **substring,
+                                    Py_ssize_t *start, Py_ssize_t *end)
 {
     PyObject *tmp_substring;
 
-    if(stringlib_parse_args_finds(function_name, args, &tmp_substring,
-                                  start, end)) {
+    if(stringlib_parse_stack_finds(function_name, args, nargs,
+                                   &tmp_substring, start, end)) {
         tmp_substring = PyUnicode_FromObject(tmp_substring);
         if (!tmp_substring)
             return 0;
@@ -1462,14 +1462,14 @@ whitespace string is a separator and empty strings are removed\n\
 from the result.");
 
 static PyObject *
-string_split(PyStringObject *self, PyObject *args)
+string_split(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
     Py_ssize_t len = PyString_GET_SIZE(self), n;
     Py_ssize_t maxsplit = -1;
     const char *s = PyString_AS_STRING(self), *sub;
     PyObject *subobj = Py_None;
 
-    if (!PyArg_ParseTuple(args, "|On:split", &subobj, &maxsplit))
+    if (!_PyArg_ParseStack(args, nargs, "|On:split", &subobj, &maxsplit))
         return NULL;
     if (maxsplit < 0)
         maxsplit = PY_SSIZE_T_MAX;
@@ -1561,14 +1561,14 @@ done. If sep is not specified or is None, any whitespace string\n\
 is a separator.");
 
 static PyObject *
-string_rsplit(PyStringObject *self, PyObject *args)
+string_rsplit(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
     Py_ssize_t len = PyString_GET_SIZE(self), n;
     Py_ssize_t maxsplit = -1;
     const char *s = PyString_AS_STRING(self), *sub;
     PyObject *subobj = Py_None;
 
-    if (!PyArg_ParseTuple(args, "|On:rsplit", &subobj, &maxsplit))
+    if (!_PyArg_ParseStack(args, nargs, "|On:rsplit", &subobj, &maxsplit))
         return NULL;
     if (maxsplit < 0)
         maxsplit = PY_SSIZE_T_MAX;
@@ -1716,15 +1716,16 @@ _PyString_Join(PyObject *sep, PyObject *x)
     }
 
 Py_LOCAL_INLINE(Py_ssize_t)
-string_find_internal(PyStringObject *self, PyObject *args, int dir)
+string_find_internal(PyStringObject *self, PyObject **args, Py_ssize_t nargs,
+                     int dir)
 {
     PyObject *subobj;
     const char *sub;
     Py_ssize_t sub_len;
     Py_ssize_t start=0, end=PY_SSIZE_T_MAX;
 
-    if (!stringlib_parse_args_finds("find/rfind/index/rindex",
-                                    args, &subobj, &start, &end))
+    if (!stringlib_parse_stack_finds("find/rfind/index/rindex",
+                                     args, nargs, &subobj, &start, &end))
         return -2;
 
     if (PyString_Check(subobj)) {
@@ -1762,9 +1763,9 @@ arguments start and end are interpreted as in slice notation.\n\
 Return -1 on failure.");
 
 static PyObject *
-string_find(PyStringObject *self, PyObject *args)
+string_find(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
-    Py_ssize_t result = string_find_internal(self, args, +1);
+    Py_ssize_t result = string_find_internal(self, args, nargs, +1);
     if (result == -2)
         return NULL;
     return PyInt_FromSsize_t(result);
@@ -1777,9 +1778,9 @@ PyDoc_STRVAR(index__doc__,
 Like S.find() but raise ValueError when the substring is not found.");
 
 static PyObject *
-string_index(PyStringObject *self, PyObject *args)
+string_index(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
-    Py_ssize_t result = string_find_internal(self, args, +1);
+    Py_ssize_t result = string_find_internal(self, args, nargs, +1);
     if (result == -2)
         return NULL;
     if (result == -1) {
@@ -1801,9 +1802,9 @@ arguments start and end are interpreted as in slice notation.\n\
 Return -1 on failure.");
 
 static PyObject *
-string_rfind(PyStringObject *self, PyObject *args)
+string_rfind(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
-    Py_ssize_t result = string_find_internal(self, args, -1);
+    Py_ssize_t result = string_find_internal(self, args, nargs, -1);
     if (result == -2)
         return NULL;
     return PyInt_FromSsize_t(result);
@@ -1816,9 +1817,9 @@ PyDoc_STRVAR(rindex__doc__,
 Like S.rfind() but raise ValueError when the substring is not found.");
 
 static PyObject *
-string_rindex(PyStringObject *self, PyObject *args)
+string_rindex(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
-    Py_ssize_t result = string_find_internal(self, args, -1);
+    Py_ssize_t result = string_find_internal(self, args, nargs, -1);
     if (result == -2)
         return NULL;
     if (result == -1) {
@@ -2138,14 +2139,15 @@ string S[start:end].  Optional arguments start and end are interpreted\n\
 as in slice notation.");
 
 static PyObject *
-string_count(PyStringObject *self, PyObject *args)
+string_count(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *sub_obj;
     const char *str = PyString_AS_STRING(self), *sub;
     Py_ssize_t sub_len;
     Py_ssize_t start = 0, end = PY_SSIZE_T_MAX;
 
-    if (!stringlib_parse_args_finds("count", args, &sub_obj, &start, &end))
+    if (!stringlib_parse_stack_finds("count", args, nargs,
+                                     &sub_obj, &start, &end))
         return NULL;
 
     if (PyString_Check(sub_obj)) {
@@ -2829,14 +2831,14 @@ old replaced by new.  If the optional argument count is\n\
 given, only the first count occurrences are replaced.");
 
 static PyObject *
-string_replace(PyStringObject *self, PyObject *args)
+string_replace(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
     Py_ssize_t count = -1;
     PyObject *from, *to;
     const char *from_s, *to_s;
     Py_ssize_t from_len, to_len;
 
-    if (!PyArg_ParseTuple(args, "OO|n:replace", &from, &to, &count))
+    if (!_PyArg_ParseStack(args, nargs, "OO|n:replace", &from, &to, &count))
         return NULL;
 
     if (PyString_Check(from)) {
@@ -2925,14 +2927,15 @@ With optional end, stop comparing S at that position.\n\
 prefix can also be a tuple of strings to try.");
 
 static PyObject *
-string_startswith(PyStringObject *self, PyObject *args)
+string_startswith(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
     Py_ssize_t start = 0;
     Py_ssize_t end = PY_SSIZE_T_MAX;
     PyObject *subobj;
     int result;
 
-    if (!stringlib_parse_args_finds("startswith", args, &subobj, &start, &end))
+    if (!stringlib_parse_stack_finds("startswith", args, nargs,
+                                     &subobj, &start, &end))
         return NULL;
     if (PyTuple_Check(subobj)) {
         Py_ssize_t i;
@@ -2969,14 +2972,15 @@ With optional end, stop comparing S at that position.\n\
 suffix can also be a tuple of strings to try.");
 
 static PyObject *
-string_endswith(PyStringObject *self, PyObject *args)
+string_endswith(PyStringObject *self, PyObject **args, Py_ssize_t nargs)
 {
     Py_ssize_t start = 0;
     Py_ssize_t end = PY_SSIZE_T_MAX;
     PyObject *subobj;
     int result;
 
-    if (!stringlib_parse_args_finds("endswith", args, &subobj, &start, &end))
+    if (!stringlib_parse_stack_finds("endswith", args, nargs,
+                                     &subobj, &start, &end))
         return NULL;
     if (PyTuple_Check(subobj)) {
         Py_ssize_t i;
@@ -3649,8 +3653,8 @@ string_methods[] = {
     /* Counterparts of the obsolete stropmodule functions; except
        string.maketrans(). */
     {"join", (PyCFunction)string_join, METH_O, join__doc__},
-    {"split", (PyCFunction)string_split, METH_VARARGS, split__doc__},
-    {"rsplit", (PyCFunction)string_rsplit, METH_VARARGS, rsplit__doc__},
+    {"split", (PyCFunction)string_split, METH_FASTCALL, split__doc__},
+    {"rsplit", (PyCFunction)string_rsplit, METH_FASTCALL, rsplit__doc__},
     {"lower", (PyCFunction)string_lower, METH_NOARGS, lower__doc__},
     {"upper", (PyCFunction)string_upper, METH_NOARGS, upper__doc__},
     {"islower", (PyCFunction)string_islower, METH_NOARGS, islower__doc__},
@@ -3662,20 +3666,20 @@ string_methods[] = {
     {"isalnum", (PyCFunction)string_isalnum, METH_NOARGS, isalnum__doc__},
     {"capitalize", (PyCFunction)string_capitalize, METH_NOARGS,
      capitalize__doc__},
-    {"count", (PyCFunction)string_count, METH_VARARGS, count__doc__},
-    {"endswith", (PyCFunction)string_endswith, METH_VARARGS,
+    {"count", (PyCFunction)string_count, METH_FASTCALL, count__doc__},
+    {"endswith", (PyCFunction)string_endswith, METH_FASTCALL,
      endswith__doc__},
     {"partition", (PyCFunction)string_partition, METH_O, partition__doc__},
-    {"find", (PyCFunction)string_find, METH_VARARGS, find__doc__},
-    {"index", (PyCFunction)string_index, METH_VARARGS, index__doc__},
+    {"find", (PyCFunction)string_find, METH_FASTCALL, find__doc__},
+    {"index", (PyCFunction)string_index, METH_FASTCALL, index__doc__},
     {"lstrip", (PyCFunction)string_lstrip, METH_VARARGS, lstrip__doc__},
-    {"replace", (PyCFunction)string_replace, METH_VARARGS, replace__doc__},
-    {"rfind", (PyCFunction)string_rfind, METH_VARARGS, rfind__doc__},
-    {"rindex", (PyCFunction)string_rindex, METH_VARARGS, rindex__doc__},
+    {"replace", (PyCFunction)string_replace, METH_FASTCALL, replace__doc__},
+    {"rfind", (PyCFunction)string_rfind, METH_FASTCALL, rfind__doc__},
+    {"rindex", (PyCFunction)string_rindex, METH_FASTCALL, rindex__doc__},
     {"rstrip", (PyCFunction)string_rstrip, METH_VARARGS, rstrip__doc__},
     {"rpartition", (PyCFunction)string_rpartition, METH_O,
      rpartition__doc__},
-    {"startswith", (PyCFunction)string_startswith, METH_VARARGS,
+    {"startswith", (PyCFunction)string_startswith, METH_FASTCALL,
      startswith__doc__},
     {"strip", (PyCFunction)string_strip, METH_VARARGS, strip__doc__},
     {"swapcase", (PyCFunction)string_swapcase, METH_NOARGS,
@@ -4840,6 +4844,26 @@ PyString_Fini(void)
     Py_CLEAR(nullstring);
 }
 
+#ifdef Py_IMMORTAL_OBJECTS
+/* Make all interned strings immortal; return how many weren't already. */
+Py_ssize_t
+_PyString_ImmortalizeInterned(void)
+{
+    PyObject *s, *value;
+    Py_ssize_t pos = 0, n = 0;
+
+    if (interned == NULL)
+        return 0;
+    while (PyDict_Next(interned, &pos, &s, &value)) {
+        if (!_Py_IsImmortal(s)) {
+            _Py_SetImmortal(s);
+            n++;
+        }
+    }
+    return n;
+}
+#endif /* Py_IMMORTAL_OBJECTS */
+
 void _Py_ReleaseInternedStrings(void)
 {
     PyObject *keys;
@@ -1897,8 +1897,15 @@ subtype_dict(PyObject *obj, void *context)
         return NULL;
     }
     dict = *dictptr;
-    if (dict == NULL)
-        *dictptr = dict = PyDict_New();
+    if (dict == NULL) {
+        PyTypeObject *tp = Py_TYPE(obj);
+        if (tp->tp_flags & Py_TPFLAGS_HEAPTYPE)
+            dict = _PyObjectDict_New(
+                ((PyHeapTypeObject *)tp)->ht_cached_keys);
+        else
+            dict = PyDict_New();
+        *dictptr = dict;
+    }
     Py_XINCREF(dict);
     return dict;
 }
@@ -2547,6 +2554,10 @@ type_new(PyTypeObject *metatype, PyObject *args, PyObject *kwds)
     /* Put the proper slots in place */
     fixup_slot_dispatchers(type);
 
+    /* Instance dicts share the keys cached here */
+    if (type->tp_dictoffset)
+        et->ht_cached_keys = _PyDict_NewKeysForClass();
+
     return (PyObject *)type;
 }
 
@@ -2788,6 +2799,8 @@ type_dealloc(PyTypeObject *type)
     PyObject_Free((char *)type->tp_doc);
     Py_XDECREF(et->ht_name);
     Py_XDECREF(et->ht_slots);
+    if (et->ht_cached_keys)
+        _PyDictKeys_DecRef(et->ht_cached_keys);
     Py_TYPE(type)->tp_free((PyObject *)type);
 }
 
@@ -2897,9 +2910,16 @@ type_clear(PyTypeObject *type)
 
        slots (in PyHeapTypeObject):
            A tuple of strings can't be part of a cycle.
+
+       The cached keys of instance dicts only hold strings either, but
+       they are released here so that they don't outlive the class.
     */
 
     PyType_Modified(type);
+    if (((PyHeapTypeObject *)type)->ht_cached_keys) {
+        _PyDictKeys_DecRef(((PyHeapTypeObject *)type)->ht_cached_keys);
+        ((PyHeapTypeObject *)type)->ht_cached_keys = NULL;
+    }
     if (type->tp_dict)
         PyDict_Clear(type->tp_dict);
     Py_CLEAR(type->tp_mro);
@@ -6556,15 +6556,15 @@ Unicode string S[start:end].  Optional arguments start and end are\n\
 interpreted as in slice notation.");
 
 static PyObject *
-unicode_count(PyUnicodeObject *self, PyObject *args)
+unicode_count(PyUnicodeObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyUnicodeObject *substring;
     Py_ssize_t start = 0;
     Py_ssize_t end = PY_SSIZE_T_MAX;
     PyObject *result;
 
-    if (!stringlib_parse_args_finds_unicode("count", args, &substring,
-                                            &start, &end))
+    if (!stringlib_parse_stack_finds_unicode("count", args, nargs,
+                                             &substring, &start, &end))
         return NULL;
 
     ADJUST_INDICES(start, end, self->length);
@@ -6752,15 +6752,15 @@ arguments start and end are interpreted as in slice notation.\n\
 Return -1 on failure.");
 
 static PyObject *
-unicode_find(PyUnicodeObject *self, PyObject *args)
+unicode_find(PyUnicodeObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyUnicodeObject *substring;
     Py_ssize_t start;
     Py_ssize_t end;
     Py_ssize_t result;
 
-    if (!stringlib_parse_args_finds_unicode("find", args, &substring,
-                                            &start, &end))
+    if (!stringlib_parse_stack_finds_unicode("find", args, nargs,
+                                             &substring, &start, &end))
         return NULL;
 
     result = stringlib_find_slice(
@@ -6831,15 +6831,15 @@ PyDoc_STRVAR(index__doc__,
 Like S.find() but raise ValueError when the substring is not found.");
 
 static PyObject *
-unicode_index(PyUnicodeObject *self, PyObject *args)
+unicode_index(PyUnicodeObject *self, PyObject **args, Py_ssize_t nargs)
 {
     Py_ssize_t result;
     PyUnicodeObject *substring;
     Py_ssize_t start;
     Py_ssize_t end;
 
-    if (!stringlib_parse_args_finds_unicode("index", args, &substring,
-                                            &start, &end))
+    if (!stringlib_parse_stack_finds_unicode("index", args, nargs,
+                                             &substring, &start, &end))
         return NULL;
 
     result = stringlib_find_slice(
@@ -7500,15 +7500,15 @@ arguments start and end are interpreted as in slice notation.\n\
 Return -1 on failure.");
 
 static PyObject *
-unicode_rfind(PyUnicodeObject *self, PyObject *args)
+unicode_rfind(PyUnicodeObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyUnicodeObject *substring;
     Py_ssize_t start;
     Py_ssize_t end;
     Py_ssize_t result;
 
-    if (!stringlib_parse_args_finds_unicode("rfind", args, &substring,
-                                            &start, &end))
+    if (!stringlib_parse_stack_finds_unicode("rfind", args, nargs,
+                                             &substring, &start, &end))
         return NULL;
 
     result = stringlib_rfind_slice(
@@ -7528,15 +7528,15 @@ PyDoc_STRVAR(rindex__doc__,
 Like S.rfind() but raise ValueError when the substring is not found.");
 
 static PyObject *
-unicode_rindex(PyUnicodeObject *self, PyObject *args)
+unicode_rindex(PyUnicodeObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyUnicodeObject *substring;
     Py_ssize_t start;
     Py_ssize_t end;
     Py_ssize_t result;
 
-    if (!stringlib_parse_args_finds_unicode("rindex", args, &substring,
-                                            &start, &end))
+    if (!stringlib_parse_stack_finds_unicode("rindex", args, nargs,
+                                             &substring, &start, &end))
         return NULL;
 
     result = stringlib_rfind_slice(
@@ -7907,7 +7907,7 @@ prefix can also be a tuple of strings to try.");
 
 static PyObject *
 unicode_startswith(PyUnicodeObject *self,
-                   PyObject *args)
+                   PyObject **args, Py_ssize_t nargs)
 {
     PyObject *subobj;
     PyUnicodeObject *substring;
@@ -7915,7 +7915,8 @@ unicode_startswith(PyUnicodeObject *self,
     Py_ssize_t end = PY_SSIZE_T_MAX;
     int result;
 
-    if (!stringlib_parse_args_finds("startswith", args, &subobj, &start, &end))
+    if (!stringlib_parse_stack_finds("startswith", args, nargs,
+                                     &subobj, &start, &end))
         return NULL;
     if (PyTuple_Check(subobj)) {
         Py_ssize_t i;
@@ -7956,7 +7957,7 @@ suffix can also be a tuple of strings to try.");
 
 static PyObject *
 unicode_endswith(PyUnicodeObject *self,
-                 PyObject *args)
+                 PyObject **args, Py_ssize_t nargs)
 {
     PyObject *subobj;
     PyUnicodeObject *substring;
@@ -7964,7 +7965,8 @@ unicode_endswith(PyUnicodeObject *self,
     Py_ssize_t end = PY_SSIZE_T_MAX;
     int result;
 
-    if (!stringlib_parse_args_finds("endswith", args, &subobj, &start, &end))
+    if (!stringlib_parse_stack_finds("endswith", args, nargs,
+                                     &subobj, &start, &end))
         return NULL;
     if (PyTuple_Check(subobj)) {
         Py_ssize_t i;
@@ -8065,18 +8067,18 @@ static PyMethodDef unicode_methods[] = {
     {"capitalize", (PyCFunction) unicode_capitalize, METH_NOARGS, capitalize__doc__},
     {"title", (PyCFunction) unicode_title, METH_NOARGS, title__doc__},
     {"center", (PyCFunction) unicode_center, METH_VARARGS, center__doc__},
-    {"count", (PyCFunction) unicode_count, METH_VARARGS, count__doc__},
+    {"count", (PyCFunction) unicode_count, METH_FASTCALL, count__doc__},
     {"expandtabs", (PyCFunction) unicode_expandtabs, METH_VARARGS, expandtabs__doc__},
-    {"find", (PyCFunction) unicode_find, METH_VARARGS, find__doc__},
+    {"find", (PyCFunction) unicode_find, METH_FASTCALL, find__doc__},
     {"partition", (PyCFunction) unicode_partition, METH_O, partition__doc__},
-    {"index", (PyCFunction) unicode_index, METH_VARARGS, index__doc__},
+    {"index", (PyCFunction) unicode_index, METH_FASTCALL, index__doc__},
     {"ljust", (PyCFunction) unicode_ljust, METH_VARARGS, ljust__doc__},
     {"lower", (PyCFunction) unicode_lower, METH_NOARGS, lower__doc__},
     {"lstrip", (PyCFunction) unicode_lstrip, METH_VARARGS, lstrip__doc__},
     {"decode", (PyCFunction) unicode_decode, METH_VARARGS | METH_KEYWORDS, decode__doc__},
 /*  {"maketrans", (PyCFunction) unicode_maketrans, METH_VARARGS, maketrans__doc__}, */
-    {"rfind", (PyCFunction) unicode_rfind, METH_VARARGS, rfind__doc__},
-    {"rindex", (PyCFunction) unicode_rindex, METH_VARARGS, rindex__doc__},
+    {"rfind", (PyCFunction) unicode_rfind, METH_FASTCALL, rfind__doc__},
+    {"rindex", (PyCFunction) unicode_rindex, METH_FASTCALL, rindex__doc__},
     {"rjust", (PyCFunction) unicode_rjust, METH_VARARGS, rjust__doc__},
     {"rstrip", (PyCFunction) unicode_rstrip, METH_VARARGS, rstrip__doc__},
     {"rpartition", (PyCFunction) unicode_rpartition, METH_O, rpartition__doc__},
@@ -8085,8 +8087,8 @@ static PyMethodDef unicode_methods[] = {
     {"swapcase", (PyCFunction) unicode_swapcase, METH_NOARGS, swapcase__doc__},
     {"translate", (PyCFunction) unicode_translate, METH_O, translate__doc__},
     {"upper", (PyCFunction) unicode_upper, METH_NOARGS, upper__doc__},
-    {"startswith", (PyCFunction) unicode_startswith, METH_VARARGS, startswith__doc__},
-    {"endswith", (PyCFunction) unicode_endswith, METH_VARARGS, endswith__doc__},
+    {"startswith", (PyCFunction) unicode_startswith, METH_FASTCALL, startswith__doc__},
+    {"endswith", (PyCFunction) unicode_endswith, METH_FASTCALL, endswith__doc__},
     {"islower", (PyCFunction) unicode_islower, METH_NOARGS, islower__doc__},
     {"isupper", (PyCFunction) unicode_isupper, METH_NOARGS, isupper__doc__},
     {"istitle", (PyCFunction) unicode_istitle, METH_NOARGS, istitle__doc__},
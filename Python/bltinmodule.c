@@ -1022,12 +1022,12 @@ globals and locals.  If only globals is given, locals defaults to it.");
 
 
 static PyObject *
-builtin_getattr(PyObject *self, PyObject *args)
+builtin_getattr(PyObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *v, *result, *dflt = NULL;
     PyObject *name;
 
-    if (!PyArg_UnpackTuple(args, "getattr", 2, 3, &v, &name, &dflt))
+    if (!_PyArg_UnpackStack(args, nargs, "getattr", 2, 3, &v, &name, &dflt))
         return NULL;
 #ifdef Py_USING_UNICODE
     if (PyUnicode_Check(name)) {
@@ -1078,12 +1078,12 @@ Return the dictionary containing the current scope's global variables.");
 
 
 static PyObject *
-builtin_hasattr(PyObject *self, PyObject *args)
+builtin_hasattr(PyObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *v;
     PyObject *name;
 
-    if (!PyArg_UnpackTuple(args, "hasattr", 2, 2, &v, &name))
+    if (!_PyArg_UnpackStack(args, nargs, "hasattr", 2, 2, &v, &name))
         return NULL;
 #ifdef Py_USING_UNICODE
     if (PyUnicode_Check(name)) {
@@ -1298,12 +1298,12 @@ the items of the sequence (or a list of tuples if more than one sequence).");
 
 
 static PyObject *
-builtin_next(PyObject *self, PyObject *args)
+builtin_next(PyObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *it, *res;
     PyObject *def = NULL;
 
-    if (!PyArg_UnpackTuple(args, "next", 1, 2, &it, &def))
+    if (!_PyArg_UnpackStack(args, nargs, "next", 1, 2, &it, &def))
         return NULL;
     if (!PyIter_Check(it)) {
         PyErr_Format(PyExc_TypeError,
@@ -1339,13 +1339,13 @@ is exhausted, it is returned instead of raising StopIteration.");
 
 
 static PyObject *
-builtin_setattr(PyObject *self, PyObject *args)
+builtin_setattr(PyObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *v;
     PyObject *name;
     PyObject *value;
 
-    if (!PyArg_UnpackTuple(args, "setattr", 3, 3, &v, &name, &value))
+    if (!_PyArg_UnpackStack(args, nargs, "setattr", 3, 3, &v, &name, &value))
         return NULL;
     if (PyObject_SetAttr(v, name, value) != 0)
         return NULL;
@@ -1361,12 +1361,12 @@ Set a named attribute on an object; setattr(x, 'y', v) is equivalent to\n\
 
 
 static PyObject *
-builtin_delattr(PyObject *self, PyObject *args)
+builtin_delattr(PyObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *v;
     PyObject *name;
 
-    if (!PyArg_UnpackTuple(args, "delattr", 2, 2, &v, &name))
+    if (!_PyArg_UnpackStack(args, nargs, "delattr", 2, 2, &v, &name))
         return NULL;
     if (PyObject_SetAttr(v, name, (PyObject *)NULL) != 0)
         return NULL;
@@ -2369,15 +2369,17 @@ For most object types, eval(repr(object)) == object.");
 
 
 static PyObject *
-builtin_round(PyObject *self, PyObject *args, PyObject *kwds)
+builtin_round(PyObject *self, PyObject **args, Py_ssize_t nargs,
+              PyObject *kwnames)
 {
     double x;
     PyObject *o_ndigits = NULL;
     Py_ssize_t ndigits;
-    static char *kwlist[] = {"number", "ndigits", 0};
+    static const char * const keywords[] = {"number", "ndigits", 0};
+    static _PyArg_Parser parser = {"d|O:round", keywords};
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "d|O:round",
-        kwlist, &x, &o_ndigits))
+    if (!_PyArg_ParseStackAndKeywords(args, nargs, kwnames, &parser,
+                                      &x, &o_ndigits))
         return NULL;
 
     if (o_ndigits == NULL) {
@@ -2658,13 +2660,13 @@ empty, return start.");
 
 
 static PyObject *
-builtin_isinstance(PyObject *self, PyObject *args)
+builtin_isinstance(PyObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *inst;
     PyObject *cls;
     int retval;
 
-    if (!PyArg_UnpackTuple(args, "isinstance", 2, 2, &inst, &cls))
+    if (!_PyArg_UnpackStack(args, nargs, "isinstance", 2, 2, &inst, &cls))
         return NULL;
 
     retval = PyObject_IsInstance(inst, cls);
@@ -2683,13 +2685,13 @@ isinstance(x, A) or isinstance(x, B) or ... (etc.).");
 
 
 static PyObject *
-builtin_issubclass(PyObject *self, PyObject *args)
+builtin_issubclass(PyObject *self, PyObject **args, Py_ssize_t nargs)
 {
     PyObject *derived;
     PyObject *cls;
     int retval;
 
-    if (!PyArg_UnpackTuple(args, "issubclass", 2, 2, &derived, &cls))
+    if (!_PyArg_UnpackStack(args, nargs, "issubclass", 2, 2, &derived, &cls))
         return NULL;
 
     retval = PyObject_IsSubclass(derived, cls);
@@ -2832,30 +2834,30 @@ static PyMethodDef builtin_methods[] = {
     {"cmp",             builtin_cmp,        METH_VARARGS, cmp_doc},
     {"coerce",          builtin_coerce,     METH_VARARGS, coerce_doc},
     {"compile",         (PyCFunction)builtin_compile,    METH_VARARGS | METH_KEYWORDS, compile_doc},
-    {"delattr",         builtin_delattr,    METH_VARARGS, delattr_doc},
+    {"delattr",         (PyCFunction)builtin_delattr,    METH_FASTCALL, delattr_doc},
     {"dir",             builtin_dir,        METH_VARARGS, dir_doc},
     {"divmod",          builtin_divmod,     METH_VARARGS, divmod_doc},
     {"eval",            builtin_eval,       METH_VARARGS, eval_doc},
     {"execfile",        builtin_execfile,   METH_VARARGS, execfile_doc},
     {"filter",          builtin_filter,     METH_VARARGS, filter_doc},
     {"format",          builtin_format,     METH_VARARGS, format_doc},
-    {"getattr",         builtin_getattr,    METH_VARARGS, getattr_doc},
+    {"getattr",         (PyCFunction)builtin_getattr,    METH_FASTCALL, getattr_doc},
     {"globals",         (PyCFunction)builtin_globals,    METH_NOARGS, globals_doc},
-    {"hasattr",         builtin_hasattr,    METH_VARARGS, hasattr_doc},
+    {"hasattr",         (PyCFunction)builtin_hasattr,    METH_FASTCALL, hasattr_doc},
     {"hash",            builtin_hash,       METH_O, hash_doc},
     {"hex",             builtin_hex,        METH_O, hex_doc},
     {"id",              builtin_id,         METH_O, id_doc},
     {"input",           builtin_input,      METH_VARARGS, input_doc},
     {"intern",          builtin_intern,     METH_VARARGS, intern_doc},
-    {"isinstance",  builtin_isinstance, METH_VARARGS, isinstance_doc},
-    {"issubclass",  builtin_issubclass, METH_VARARGS, issubclass_doc},
+    {"isinstance",  (PyCFunction)builtin_isinstance, METH_FASTCALL, isinstance_doc},
+    {"issubclass",  (PyCFunction)builtin_issubclass, METH_FASTCALL, issubclass_doc},
     {"iter",            builtin_iter,       METH_VARARGS, iter_doc},
     {"len",             builtin_len,        METH_O, len_doc},
     {"locals",          (PyCFunction)builtin_locals,     METH_NOARGS, locals_doc},
     {"map",             builtin_map,        METH_VARARGS, map_doc},
     {"max",             (PyCFunction)builtin_max,        METH_VARARGS | METH_KEYWORDS, max_doc},
     {"min",             (PyCFunction)builtin_min,        METH_VARARGS | METH_KEYWORDS, min_doc},
-    {"next",            builtin_next,       METH_VARARGS, next_doc},
+    {"next",            (PyCFunction)builtin_next,       METH_FASTCALL, next_doc},
     {"oct",             builtin_oct,        METH_O, oct_doc},
     {"open",            (PyCFunction)builtin_open,       METH_VARARGS | METH_KEYWORDS, open_doc},
     {"ord",             builtin_ord,        METH_O, ord_doc},
@@ -2866,8 +2868,8 @@ static PyMethodDef builtin_methods[] = {
     {"reduce",          builtin_reduce,     METH_VARARGS, reduce_doc},
     {"reload",          builtin_reload,     METH_O, reload_doc},
     {"repr",            builtin_repr,       METH_O, repr_doc},
-    {"round",           (PyCFunction)builtin_round,      METH_VARARGS | METH_KEYWORDS, round_doc},
-    {"setattr",         builtin_setattr,    METH_VARARGS, setattr_doc},
+    {"round",           (PyCFunction)builtin_round,      METH_FASTCALL | METH_KEYWORDS, round_doc},
+    {"setattr",         (PyCFunction)builtin_setattr,    METH_FASTCALL, setattr_doc},
     {"sorted",          (PyCFunction)builtin_sorted,     METH_VARARGS | METH_KEYWORDS, sorted_doc},
     {"sum",             builtin_sum,        METH_VARARGS, sum_doc},
 #ifdef Py_USING_UNICODE
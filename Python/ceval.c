@@ -228,6 +228,65 @@ PyEval_GetCallStats(PyObject *self)
 #endif
 
 
+/* This can set eval_breaker to 0 even though gil_drop_request became
+   1.  We believe this is all right because the eval loop will release
+   the GIL eventually anyway. */
+#ifdef WITH_THREAD
+#define COMPUTE_EVAL_BREAKER() \
+    (eval_breaker = gil_drop_request | pendingcalls_to_do | pending_async_exc)
+#else
+#define COMPUTE_EVAL_BREAKER() \
+    (eval_breaker = pendingcalls_to_do | pending_async_exc)
+#endif
+
+#ifdef WITH_THREAD
+
+#define SET_GIL_DROP_REQUEST() \
+    do { \
+        gil_drop_request = 1; \
+        eval_breaker = 1; \
+    } while (0)
+
+#define RESET_GIL_DROP_REQUEST() \
+    do { \
+        gil_drop_request = 0; \
+        COMPUTE_EVAL_BREAKER(); \
+    } while (0)
+
+#endif
+
+/* Pending calls are only modified under pending_lock */
+#define SIGNAL_PENDING_CALLS() \
+    do { \
+        pendingcalls_to_do = 1; \
+        eval_breaker = 1; \
+    } while (0)
+
+#define UNSIGNAL_PENDING_CALLS() \
+    do { \
+        pendingcalls_to_do = 0; \
+        COMPUTE_EVAL_BREAKER(); \
+    } while (0)
+
+#define SIGNAL_ASYNC_EXC() \
+    do { \
+        pending_async_exc = 1; \
+        eval_breaker = 1; \
+    } while (0)
+
+#define UNSIGNAL_ASYNC_EXC() \
+    do { pending_async_exc = 0; COMPUTE_EVAL_BREAKER(); } while (0)
+
+/* This single variable consolidates all requests to break out of the fast
+   path in the eval loop.  It starts set so that the first turn of the loop
+   runs Py_MakePendingCalls(), which allocates pending_lock. */
+static volatile int eval_breaker = 1;
+/* Request for running pending calls. */
+static volatile int pendingcalls_to_do = 1;
+/* Request for looking at the `async_exc' field of the current thread state.
+   Guarded by the GIL. */
+static int pending_async_exc = 0;
+
 #ifdef WITH_THREAD
 
 #ifdef HAVE_ERRNO_H
@@ -235,36 +294,42 @@ PyEval_GetCallStats(PyObject *self)
 #endif
 #include "pythread.h"
 
-static PyThread_type_lock interpreter_lock = 0; /* This is the GIL */
 static PyThread_type_lock pending_lock = 0; /* for pending calls */
 static long main_thread = 0;
+/* Request for dropping the GIL */
+static volatile int gil_drop_request = 0;
+
+#include "ceval_gil.h"
 
 int
 PyEval_ThreadsInitialized(void)
 {
-    return interpreter_lock != 0;
+    return gil_created();
 }
 
 void
 PyEval_InitThreads(void)
 {
-    if (interpreter_lock)
+    if (gil_created())
         return;
-    interpreter_lock = PyThread_allocate_lock();
-    PyThread_acquire_lock(interpreter_lock, 1);
+    create_gil();
+    take_gil(PyThreadState_GET());
     main_thread = PyThread_get_thread_ident();
+    if (!pending_lock)
+        pending_lock = PyThread_allocate_lock();
 }
 
 void
 PyEval_AcquireLock(void)
 {
-    PyThread_acquire_lock(interpreter_lock, 1);
+    take_gil(PyThreadState_GET());
 }
 
 void
 PyEval_ReleaseLock(void)
 {
-    PyThread_release_lock(interpreter_lock);
+    /* This function must succeed when the current thread state is NULL. */
+    drop_gil(_PyThreadState_Current);
 }
 
 void
@@ -273,8 +338,8 @@ PyEval_AcquireThread(PyThreadState *tstate)
     if (tstate == NULL)
         Py_FatalError("PyEval_AcquireThread: NULL new thread state");
     /* Check someone has called PyEval_InitThreads() to create the lock */
-    assert(interpreter_lock);
-    PyThread_acquire_lock(interpreter_lock, 1);
+    assert(gil_created());
+    take_gil(tstate);
     if (PyThreadState_Swap(tstate) != NULL)
         Py_FatalError(
             "PyEval_AcquireThread: non-NULL old thread state");
@@ -287,7 +352,7 @@ PyEval_ReleaseThread(PyThreadState *tstate)
         Py_FatalError("PyEval_ReleaseThread: NULL thread state");
     if (PyThreadState_Swap(NULL) != tstate)
         Py_FatalError("PyEval_ReleaseThread: wrong thread state");
-    PyThread_release_lock(interpreter_lock);
+    drop_gil(tstate);
 }
 
 /* This function is called from PyOS_AfterFork to ensure that newly
@@ -299,22 +364,21 @@ void
 PyEval_ReInitThreads(void)
 {
     PyObject *threading, *result;
-    PyThreadState *tstate;
+    PyThreadState *tstate = PyThreadState_GET();
 
-    if (!interpreter_lock)
+    if (!gil_created())
         return;
+    recreate_gil();
     /*XXX Can't use PyThread_free_lock here because it does too
       much error-checking.  Doing this cleanly would require
       adding a new function to each thread_*.h.  Instead, just
       create a new lock and waste a little bit of memory */
-    interpreter_lock = PyThread_allocate_lock();
     pending_lock = PyThread_allocate_lock();
-    PyThread_acquire_lock(interpreter_lock, 1);
+    take_gil(tstate);
     main_thread = PyThread_get_thread_ident();
 
     /* Update the threading module with the new state.
      */
-    tstate = PyThreadState_GET();
     threading = PyMapping_GetItemString(tstate->interp->modules,
                                         "threading");
     if (threading == NULL) {
@@ -329,8 +393,18 @@ PyEval_ReInitThreads(void)
         Py_DECREF(result);
     Py_DECREF(threading);
 }
+
 #endif
 
+/* This function is used to signal that async exceptions are waiting to be
+   raised, therefore it is also useful in non-threaded builds. */
+
+void
+_PyEval_SignalAsyncExc(void)
+{
+    SIGNAL_ASYNC_EXC();
+}
+
 /* Functions save_thread and restore_thread are always defined so
    dynamically loaded modules needn't be compiled separately for use
    with and without threads: */
@@ -342,8 +416,8 @@ PyEval_SaveThread(void)
     if (tstate == NULL)
         Py_FatalError("PyEval_SaveThread: NULL tstate");
 #ifdef WITH_THREAD
-    if (interpreter_lock)
-        PyThread_release_lock(interpreter_lock);
+    if (gil_created())
+        drop_gil(tstate);
 #endif
     return tstate;
 }
@@ -354,9 +428,9 @@ PyEval_RestoreThread(PyThreadState *tstate)
     if (tstate == NULL)
         Py_FatalError("PyEval_RestoreThread: NULL tstate");
 #ifdef WITH_THREAD
-    if (interpreter_lock) {
+    if (gil_created()) {
         int err = errno;
-        PyThread_acquire_lock(interpreter_lock, 1);
+        take_gil(tstate);
         errno = err;
     }
 #endif
@@ -402,7 +476,6 @@ static struct {
 } pendingcalls[NPENDINGCALLS];
 static int pendingfirst = 0;
 static int pendinglast = 0;
-static volatile int pendingcalls_to_do = 1; /* trigger initialization of lock */
 static char pendingbusy = 0;
 
 int
@@ -441,8 +514,7 @@ Py_AddPendingCall(int (*func)(void *), void *arg)
         pendinglast = j;
     }
     /* signal main loop */
-    _Py_Ticker = 0;
-    pendingcalls_to_do = 1;
+    SIGNAL_PENDING_CALLS();
     if (lock != NULL)
         PyThread_release_lock(lock);
     return result;
@@ -484,7 +556,10 @@ Py_MakePendingCalls(void)
             arg = pendingcalls[j].arg;
             pendingfirst = (j + 1) % NPENDINGCALLS;
         }
-        pendingcalls_to_do = pendingfirst != pendinglast;
+        if (pendingfirst != pendinglast)
+            SIGNAL_PENDING_CALLS();
+        else
+            UNSIGNAL_PENDING_CALLS();
         PyThread_release_lock(pending_lock);
         /* having released the lock, perform the callback */
         if (func == NULL)
@@ -529,7 +604,6 @@ static struct {
 } pendingcalls[NPENDINGCALLS];
 static volatile int pendingfirst = 0;
 static volatile int pendinglast = 0;
-static volatile int pendingcalls_to_do = 0;
 
 int
 Py_AddPendingCall(int (*func)(void *), void *arg)
@@ -550,8 +624,7 @@ Py_AddPendingCall(int (*func)(void *), void *arg)
     pendingcalls[i].arg = arg;
     pendinglast = j;
 
-    _Py_Ticker = 0;
-    pendingcalls_to_do = 1; /* Signal main loop */
+    SIGNAL_PENDING_CALLS(); /* Signal main loop */
     busy = 0;
     /* XXX End critical section */
     return 0;
@@ -564,7 +637,7 @@ Py_MakePendingCalls(void)
     if (busy)
         return 0;
     busy = 1;
-    pendingcalls_to_do = 0;
+    UNSIGNAL_PENDING_CALLS();
     for (;;) {
         int i;
         int (*func)(void *);
@@ -577,7 +650,7 @@ Py_MakePendingCalls(void)
         pendingfirst = (i + 1) % NPENDINGCALLS;
         if (func(arg) < 0) {
             busy = 0;
-            pendingcalls_to_do = 1; /* We're not done yet */
+            SIGNAL_PENDING_CALLS(); /* We're not done yet */
             return -1;
         }
     }
@@ -658,10 +731,11 @@ static int unpack_iterable(PyObject *, int, PyObject **);
    fast_next_opcode*/
 static int _Py_TracingPossible = 0;
 
-/* for manipulating the thread switch and periodic "stuff" - used to be
-   per thread, now just a pair o' globals */
+/* sys.setcheckinterval() used to drive thread switching through these;
+   threads now switch on a timer (see ceval_gil.h).  They are kept for
+   extensions and for the periodic signal checks in longobject.c. */
 int _Py_CheckInterval = 100;
-volatile int _Py_Ticker = 0; /* so that we hit a "tick" first thing */
+volatile int _Py_Ticker = 0;
 
 PyObject *
 PyEval_EvalCode(PyCodeObject *co, PyObject *globals, PyObject *locals)
@@ -675,6 +749,59 @@ PyEval_EvalCode(PyCodeObject *co, PyObject *globals, PyObject *locals)
 }
 
 
+/* Opcode caches.  Once a code object is hot, LOAD_GLOBAL and LOAD_ATTR
+   remember where they found their result (see _PyOpcache in code.h) and
+   check that it's still valid with a few compares instead of doing the
+   dict lookups and MRO walk again. */
+
+/* Remember where LOAD_ATTR found the attribute name of owner, if that
+   can be checked cheaply next time.  Only done for types using the
+   generic getattr: instance dict attributes (which includes module
+   globals) and slot and property descriptors. */
+static void
+opcache_fill_load_attr(_PyOpcache *oc, PyObject *owner, PyObject *name)
+{
+    _PyOpcache_LoadAttr *la = &oc->u.la;
+    PyTypeObject *type = Py_TYPE(owner);
+    PyObject *descr;
+
+    oc->optimized--;
+    la->type = NULL;
+    if (type->tp_getattro != PyObject_GenericGetAttr ||
+        !PyString_CheckExact(name))
+        return;
+    descr = _PyType_Lookup(type, name);
+    if (!PyType_HasFeature(type, Py_TPFLAGS_VALID_VERSION_TAG))
+        return;
+    if (descr != NULL &&
+        PyType_HasFeature(Py_TYPE(descr), Py_TPFLAGS_HAVE_CLASS) &&
+        Py_TYPE(descr)->tp_descr_set != NULL) {
+        /* A data descriptor, which overrides the instance dict */
+        if (Py_TYPE(descr) != &PyMemberDescr_Type &&
+            Py_TYPE(descr) != &PyProperty_Type)
+            return;
+        la->kind = _PyOpcache_LOAD_ATTR_DESCR;
+        la->descr = descr;
+    }
+    else {
+        PyObject *dict, *value;
+        Py_ssize_t ix;
+
+        if (type->tp_dictoffset <= 0)
+            return;
+        dict = *(PyObject **)((char *)owner + type->tp_dictoffset);
+        if (dict == NULL || !PyDict_Check(dict))
+            return;
+        ix = _PyDict_GetItemHint((PyDictObject *)dict, name, -1, &value);
+        if (ix < 0)
+            return;
+        la->kind = _PyOpcache_LOAD_ATTR_DICT;
+        la->hint = ix;
+    }
+    la->type = type;
+    la->tp_version_tag = type->tp_version_tag;
+}
+
 /* Interpreter main loop */
 
 PyObject *
@@ -743,9 +870,7 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
 
 #define DISPATCH() \
         { \
-    int _tick = _Py_Ticker - 1; \
-    _Py_Ticker = _tick; \
-    if (_tick >= 0) { \
+    if (!eval_breaker) { \
         FAST_DISPATCH(); \
     } \
     continue; \
@@ -809,6 +934,8 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
     PyObject *retval = NULL;            /* Return value */
     PyThreadState *tstate = PyThreadState_GET();
     PyCodeObject *co;
+    unsigned short *opcache_map;        /* co->co_opcache_map */
+    _PyOpcache *oc;                     /* cache of the current opcode */
 
     /* when tracing we set things up so that
 
@@ -889,6 +1016,18 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
 #define JUMPTO(x)       (next_instr = first_instr + (x))
 #define JUMPBY(x)       (next_instr += (x))
 
+/* Set oc to the cache of the instruction just decoded, or to NULL if it
+   has none or the cache was given up on. */
+#define OPCACHE_CHECK() \
+    do { \
+        oc = NULL; \
+        if (opcache_map != NULL) { \
+            int _idx = opcache_map[INSTR_OFFSET()]; \
+            if (_idx > 0 && co->co_opcache[_idx - 1].optimized > 0) \
+                oc = &co->co_opcache[_idx - 1]; \
+        } \
+    } while (0)
+
 /* OpCode prediction macros
     Some opcodes tend to come in pairs thus making it possible to
     predict the second code when the first is run.  For example,
@@ -1034,6 +1173,12 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
     }
 
     co = f->f_code;
+    if (co->co_opcache_map == NULL &&
+        ++co->co_opcache_flag >= _PyCode_OPCACHE_MIN_RUNS) {
+        if (_PyCode_InitOpcache(co) < 0)
+            goto exit_eval_frame;
+    }
+    opcache_map = co->co_opcache_map;
     names = co->co_names;
     consts = co->co_consts;
     fastlocals = f->f_localsplus;
@@ -1103,19 +1248,18 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
 
         /* Do periodic things.  Doing this every time through
            the loop would add too much overhead, so we do it
-           only every Nth instruction.  We also do it if
-           ``pendingcalls_to_do'' is set, i.e. when an asynchronous
-           event needs attention (e.g. a signal handler or
-           async I/O handler); see Py_AddPendingCall() and
-           Py_MakePendingCalls() above. */
+           only when eval_breaker is set: another thread asked for the
+           GIL, an asynchronous event needs attention (e.g. a signal
+           handler or async I/O handler; see Py_AddPendingCall() and
+           Py_MakePendingCalls() above), or an exception was sent to
+           this thread. */
 
-        if (--_Py_Ticker < 0) {
+        if (eval_breaker) {
             if (*next_instr == SETUP_FINALLY) {
                 /* Make the last opcode before
                    a try: finally: block uninterruptible. */
                 goto fast_next_opcode;
             }
-            _Py_Ticker = _Py_CheckInterval;
             tstate->tick_counter++;
 #ifdef WITH_TSC
             ticked = 1;
@@ -1125,40 +1269,31 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
                     why = WHY_EXCEPTION;
                     goto on_error;
                 }
-                if (pendingcalls_to_do)
-                    /* MakePendingCalls() didn't succeed.
-                       Force early re-execution of this
-                       "periodic" code, possibly after
-                       a thread switch */
-                    _Py_Ticker = 0;
             }
 #ifdef WITH_THREAD
-            if (interpreter_lock) {
+            if (gil_drop_request) {
                 /* Give another thread a chance */
-
                 if (PyThreadState_Swap(NULL) != tstate)
                     Py_FatalError("ceval: tstate mix-up");
-                PyThread_release_lock(interpreter_lock);
+                drop_gil(tstate);
 
                 /* Other threads may run now */
 
-                PyThread_acquire_lock(interpreter_lock, 1);
-
+                take_gil(tstate);
                 if (PyThreadState_Swap(tstate) != NULL)
                     Py_FatalError("ceval: orphan tstate");
-
-                /* Check for thread interrupts */
-
-                if (tstate->async_exc != NULL) {
-                    x = tstate->async_exc;
-                    tstate->async_exc = NULL;
-                    PyErr_SetNone(x);
-                    Py_DECREF(x);
-                    why = WHY_EXCEPTION;
-                    goto on_error;
-                }
             }
 #endif
+            /* Check for asynchronous exceptions. */
+            if (tstate->async_exc != NULL) {
+                x = tstate->async_exc;
+                tstate->async_exc = NULL;
+                UNSIGNAL_ASYNC_EXC();
+                PyErr_SetNone(x);
+                Py_DECREF(x);
+                why = WHY_EXCEPTION;
+                goto on_error;
+            }
         }
 
     fast_next_opcode:
@@ -2548,41 +2683,29 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
 
         TARGET(LOAD_GLOBAL)
         {
+            PY_UINT64_T globals_ver, builtins_ver;
+
             w = GETITEM(names, oparg);
+            globals_ver = ((PyDictObject *)f->f_globals)->ma_version_tag;
+            builtins_ver = ((PyDictObject *)f->f_builtins)->ma_version_tag;
+            OPCACHE_CHECK();
+            if (oc != NULL && oc->u.lg.globals_ver == globals_ver &&
+                oc->u.lg.builtins_ver == builtins_ver) {
+                x = oc->u.lg.ptr;
+                Py_INCREF(x);
+                PUSH(x);
+                DISPATCH();
+            }
             if (PyString_CheckExact(w)) {
-                /* Inline the PyDict_GetItem() calls.
-                   WARNING: this is an extreme speed hack.
-                   Do not try this at home. */
-                long hash = ((PyStringObject *)w)->ob_shash;
-                if (hash != -1) {
-                    PyDictObject *d;
-                    PyDictEntry *e;
-                    d = (PyDictObject *)(f->f_globals);
-                    e = d->ma_lookup(d, w, hash);
-                    if (e == NULL) {
-                        x = NULL;
-                        break;
-                    }
-                    x = e->me_value;
-                    if (x != NULL) {
-                        Py_INCREF(x);
-                        PUSH(x);
-                        DISPATCH();
-                    }
-                    d = (PyDictObject *)(f->f_builtins);
-                    e = d->ma_lookup(d, w, hash);
-                    if (e == NULL) {
-                        x = NULL;
-                        break;
-                    }
-                    x = e->me_value;
-                    if (x != NULL) {
-                        Py_INCREF(x);
-                        PUSH(x);
-                        DISPATCH();
-                    }
-                    goto load_global_error;
+                x = _PyDict_LoadGlobal((PyDictObject *)f->f_globals,
+                                       (PyDictObject *)f->f_builtins,
+                                       w);
+                if (x == NULL) {
+                    if (!PyErr_Occurred())
+                        goto load_global_error;
+                    break;
                 }
+                goto load_global_found;
             }
             /* This is the un-inlined version of the code above */
             x = PyDict_GetItem(f->f_globals, w);
@@ -2596,6 +2719,15 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
                     break;
                 }
             }
+          load_global_found:
+            if (oc != NULL) {
+                /* The versions are those from before the lookups, so
+                   the cache misses if they ran code mutating the dicts. */
+                oc->optimized--;
+                oc->u.lg.ptr = x;
+                oc->u.lg.globals_ver = globals_ver;
+                oc->u.lg.builtins_ver = builtins_ver;
+            }
             Py_INCREF(x);
             PUSH(x);
             DISPATCH();
@@ -2752,13 +2884,75 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
         {
             w = GETITEM(names, oparg);
             v = TOP();
+            OPCACHE_CHECK();
+            if (oc != NULL) {
+                _PyOpcache_LoadAttr *la = &oc->u.la;
+                PyTypeObject *type = Py_TYPE(v);
+
+                if (la->type == type &&
+                    la->tp_version_tag == type->tp_version_tag &&
+                    PyType_HasFeature(type, Py_TPFLAGS_VALID_VERSION_TAG)) {
+                    if (la->kind == _PyOpcache_LOAD_ATTR_DICT) {
+                        PyDictObject *d = *(PyDictObject **)(
+                            (char *)v + type->tp_dictoffset);
+                        PyObject *value;
+                        Py_ssize_t ix;
+                        if (d != NULL &&
+                            (ix = _PyDict_GetItemHint(d, w, la->hint,
+                                                      &value)) >= 0) {
+                            la->hint = ix;
+                            x = value;
+                            Py_INCREF(x);
+                            Py_DECREF(v);
+                            SET_TOP(x);
+                            DISPATCH();
+                        }
+                    }
+                    else {
+                        t = la->descr;
+                        Py_INCREF(t);
+                        x = Py_TYPE(t)->tp_descr_get(t, v, (PyObject *)type);
+                        Py_DECREF(t);
+                        Py_DECREF(v);
+                        SET_TOP(x);
+                        if (x != NULL) DISPATCH();
+                        break;
+                    }
+                }
+            }
             x = PyObject_GetAttr(v, w);
+            if (x != NULL && oc != NULL)
+                opcache_fill_load_attr(oc, v, w);
             Py_DECREF(v);
             SET_TOP(x);
             if (x != NULL) DISPATCH();
             break;
         }
 
+        TARGET(LOAD_METHOD)
+        {
+            /* Designed to work in tandem with CALL_METHOD. */
+            PyObject *meth = NULL;
+            w = GETITEM(names, oparg);
+            v = TOP();
+            if (_PyObject_GetMethod(v, w, &meth)) {
+                /* meth is an unbound function or method descriptor that
+                   will be called with v as its first argument; leave
+                   [meth, v] on the stack rather than a bound method. */
+                SET_TOP(meth);
+                PUSH(v);
+                DISPATCH();
+            }
+            x = meth;
+            if (x == NULL)
+                break;
+            /* x is some other attribute, leave [NULL, x]. */
+            Py_DECREF(v);
+            SET_TOP(NULL);
+            PUSH(x);
+            DISPATCH();
+        }
+
         TARGET(COMPARE_OP)
         {
             w = POP();
@@ -3289,6 +3483,39 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
             break;
         }
 
+        TARGET(CALL_METHOD)
+        {
+            /* Designed to work in tandem with LOAD_METHOD. */
+            PyObject **sp;
+            int n = (oparg & 0xff) + 2 * ((oparg >> 8) & 0xff);
+            PCALL(PCALL_ALL);
+            sp = stack_pointer;
+            if (PEEK(n + 2) == NULL) {
+                /* [NULL, callable, args...]: call as CALL_FUNCTION
+                   would and drop the NULL. */
+#ifdef WITH_TSC
+                x = call_function(&sp, oparg, &intr0, &intr1);
+#else
+                x = call_function(&sp, oparg);
+#endif
+                stack_pointer = sp;
+                STACK_SHRINK(1);
+            }
+            else {
+                /* [meth, self, args...]: self is the first positional
+                   argument. */
+#ifdef WITH_TSC
+                x = call_function(&sp, oparg + 1, &intr0, &intr1);
+#else
+                x = call_function(&sp, oparg + 1);
+#endif
+                stack_pointer = sp;
+            }
+            PUSH(x);
+            if (x != NULL) DISPATCH();
+            break;
+        }
+
         TARGET_WITH_IMPL(CALL_FUNCTION_VAR, _call_function_var_kw)
         TARGET_WITH_IMPL(CALL_FUNCTION_KW, _call_function_var_kw)
         TARGET(CALL_FUNCTION_VAR_KW)
@@ -4673,20 +4900,80 @@ PyEval_GetFuncDesc(PyObject *func)
 }
 
 static void
-err_args(PyObject *func, int flags, int nargs)
+err_args(PyMethodDef *ml, int flags, int nargs)
 {
     if (flags & METH_NOARGS)
         PyErr_Format(PyExc_TypeError,
                      "%.200s() takes no arguments (%d given)",
-                     ((PyCFunctionObject *)func)->m_ml->ml_name,
+                     ml->ml_name,
                      nargs);
     else
         PyErr_Format(PyExc_TypeError,
                      "%.200s() takes exactly one argument (%d given)",
-                     ((PyCFunctionObject *)func)->m_ml->ml_name,
+                     ml->ml_name,
                      nargs);
 }
 
+/* Whether call_function() can call the C function of the method
+   descriptor func itself, with self as the first argument. */
+static int
+is_direct_method_descr_call(PyObject *func, PyObject *self, int nk)
+{
+    int flags;
+
+    if (Py_TYPE(func) != &PyMethodDescr_Type)
+        return 0;
+    flags = ((PyMethodDescrObject *)func)->d_method->ml_flags;
+    if (nk == 0) {
+        if (!(flags & (METH_VARARGS | METH_NOARGS | METH_O | METH_FASTCALL)))
+            return 0;
+    }
+    else if (!(flags & METH_KEYWORDS) ||
+             !(flags & (METH_VARARGS | METH_FASTCALL)))
+        return 0;
+    return PyObject_TypeCheck(self, ((PyMethodDescrObject *)func)->d_type);
+}
+
+/* Call the METH_FASTCALL function of ml with the na positional arguments
+   and nk (name, value) pairs of keyword arguments that start at stack.
+   The arguments are left on the stack for the caller to pop. */
+static PyObject *
+fastcall_from_stack(PyMethodDef *ml, PyObject *self, PyObject **stack,
+                    int na, int nk)
+{
+    PyObject *small_stack[8];
+    PyObject **args = small_stack;
+    PyObject *kwnames, *x;
+    int i;
+
+    if (nk == 0)
+        return _PyMethodDef_RawFastCallKeywords(ml, self, stack, na, NULL);
+
+    kwnames = PyTuple_New(nk);
+    if (kwnames == NULL)
+        return NULL;
+    if (na + nk > (int)(sizeof(small_stack) / sizeof(small_stack[0]))) {
+        args = PyMem_New(PyObject *, na + nk);
+        if (args == NULL) {
+            Py_DECREF(kwnames);
+            return PyErr_NoMemory();
+        }
+    }
+    for (i = 0; i < na; i++)
+        args[i] = stack[i];
+    for (i = 0; i < nk; i++) {
+        PyObject *name = stack[na + 2 * i];
+        Py_INCREF(name);
+        PyTuple_SET_ITEM(kwnames, i, name);
+        args[na + i] = stack[na + 2 * i + 1];
+    }
+    x = _PyMethodDef_RawFastCallKeywords(ml, self, args, na, kwnames);
+    if (args != small_stack)
+        PyMem_Free(args);
+    Py_DECREF(kwnames);
+    return x;
+}
+
 #define C_TRACE(x, call) \
 if (tstate->use_tracing && tstate->c_profilefunc) { \
     if (call_trace(tstate->c_profilefunc, \
@@ -4736,7 +5023,8 @@ call_function(PyObject ***pp_stack, int oparg
     /* Always dispatch PyCFunction first, because these are
        presumed to be the most frequent callable object.
     */
-    if (PyCFunction_Check(func) && nk == 0) {
+    if (PyCFunction_Check(func) &&
+        (nk == 0 || PyCFunction_GET_FLAGS(func) & METH_FASTCALL)) {
         int flags = PyCFunction_GET_FLAGS(func);
         PyThreadState *tstate = PyThreadState_GET();
 
@@ -4753,10 +5041,17 @@ call_function(PyObject ***pp_stack, int oparg
                 Py_DECREF(arg);
             }
             else {
-                err_args(func, flags, na);
+                err_args(((PyCFunctionObject *)func)->m_ml, flags, na);
                 x = NULL;
             }
         }
+        else if (flags & METH_FASTCALL) {
+            PyMethodDef *ml = ((PyCFunctionObject *)func)->m_ml;
+            PyObject *self = PyCFunction_GET_SELF(func);
+            READ_TIMESTAMP(*pintr0);
+            C_TRACE(x, fastcall_from_stack(ml, self, pfunc + 1, na, nk));
+            READ_TIMESTAMP(*pintr1);
+        }
         else {
             PyObject *callargs;
             callargs = load_args(pp_stack, na);
@@ -4765,7 +5060,61 @@ call_function(PyObject ***pp_stack, int oparg
             READ_TIMESTAMP(*pintr1);
             Py_XDECREF(callargs);
         }
-    } else {
+    }
+    else if (na > 0 && is_direct_method_descr_call(func, pfunc[1], nk)) {
+        /* A method of a builtin type called with self as the first
+           argument, which is what CALL_METHOD does: call the C function
+           directly rather than through a new bound builtin method. */
+        PyMethodDef *ml = ((PyMethodDescrObject *)func)->d_method;
+        PyCFunction meth = ml->ml_meth;
+        PyObject *self = pfunc[1];
+        int flags = ml->ml_flags;
+        PyThreadState *tstate = PyThreadState_GET();
+
+        PCALL(PCALL_CFUNCTION);
+        na--;
+        /* Profilers are shown the bound method, as before. */
+        if (tstate->use_tracing && tstate->c_profilefunc)
+            func = PyCFunction_New(ml, self);
+        else
+            Py_INCREF(func);
+        if (func == NULL)
+            x = NULL;
+        else if (flags & METH_NOARGS && na == 0) {
+            C_TRACE(x, (*meth)(self, NULL));
+        }
+        else if (flags & METH_O && na == 1) {
+            PyObject *arg = EXT_POP(*pp_stack);
+            C_TRACE(x, (*meth)(self, arg));
+            Py_DECREF(arg);
+        }
+        else if (flags & METH_VARARGS) {
+            PyObject *callargs, *kwdict = NULL;
+            if (nk > 0)
+                kwdict = update_keyword_args(NULL, nk, pp_stack, func);
+            callargs = load_args(pp_stack, na);
+            if (callargs == NULL || (nk > 0 && kwdict == NULL))
+                x = NULL;
+            else if (flags & METH_KEYWORDS) {
+                C_TRACE(x, (*(PyCFunctionWithKeywords)meth)(self, callargs,
+                                                            kwdict));
+            }
+            else {
+                C_TRACE(x, (*meth)(self, callargs));
+            }
+            Py_XDECREF(callargs);
+            Py_XDECREF(kwdict);
+        }
+        else if (flags & METH_FASTCALL) {
+            C_TRACE(x, fastcall_from_stack(ml, self, pfunc + 2, na, nk));
+        }
+        else {
+            err_args(ml, flags, na);
+            x = NULL;
+        }
+        Py_XDECREF(func);
+    }
+    else {
         if (PyMethod_Check(func) && PyMethod_GET_SELF(func) != NULL) {
             /* optimize access to bound methods */
             PyObject *self = PyMethod_GET_SELF(func);
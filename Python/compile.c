@@ -907,6 +907,8 @@ opcode_stack_effect(int opcode, int oparg)
             return 1;
         case LOAD_ATTR:
             return 0;
+        case LOAD_METHOD:
+            return 1;
         case COMPARE_OP:
             return -1;
         case IMPORT_NAME:
@@ -951,6 +953,8 @@ opcode_stack_effect(int opcode, int oparg)
             return -NARGS(oparg)-1;
         case CALL_FUNCTION_VAR_KW:
             return -NARGS(oparg)-2;
+        case CALL_METHOD:
+            return -NARGS(oparg)-1;
         case MAKE_FUNCTION:
             return -NARGS(oparg) - ((oparg >> 16) & 0xffff);
         case MAKE_CLOSURE:
@@ -2964,9 +2968,40 @@ compiler_compare(struct compiler *c, expr_ty e)
     return 1;
 }
 
+/* Compile obj.meth(args) without *args or **kwargs to LOAD_METHOD and
+   CALL_METHOD, which don't create a bound method when meth is a plain
+   function or method descriptor.  Return -1 if the call has another
+   shape. */
+static int
+maybe_optimize_method_call(struct compiler *c, expr_ty e)
+{
+    Py_ssize_t argsl, kwdsl;
+    expr_ty meth = e->v.Call.func;
+    asdl_seq *args = e->v.Call.args;
+    asdl_seq *kwds = e->v.Call.keywords;
+
+    if (meth->kind != Attribute_kind || meth->v.Attribute.ctx != Load ||
+        e->v.Call.starargs != NULL || e->v.Call.kwargs != NULL)
+        return -1;
+    argsl = asdl_seq_LEN(args);
+    kwdsl = asdl_seq_LEN(kwds);
+    /* self takes up one of the 255 positional argument slots */
+    if (argsl >= 255)
+        return -1;
+    VISIT(c, expr, meth->v.Attribute.value);
+    ADDOP_NAME(c, LOAD_METHOD, meth->v.Attribute.attr, names);
+    VISIT_SEQ(c, expr, args);
+    VISIT_SEQ(c, keyword, kwds);
+    ADDOP_I(c, CALL_METHOD, argsl | (kwdsl << 8));
+    return 1;
+}
+
 static int
 compiler_call(struct compiler *c, expr_ty e)
 {
+    int ret = maybe_optimize_method_call(c, e);
+    if (ret >= 0)
+        return ret;
     VISIT(c, expr, e->v.Call.func);
     return compiler_call_helper(c, 0,
                                 e->v.Call.args,
@@ -4411,7 +4446,7 @@ makecode(struct compiler *c, struct assembler *a)
     freevars = dict_keys_inorder(c->u->u_freevars, PyTuple_Size(cellvars));
     if (!freevars)
         goto error;
-    filename = PyString_FromString(c->c_filename);
+    filename = PyString_InternFromString(c->c_filename);
     if (!filename)
         goto error;
 
@@ -28,6 +28,12 @@ PyAPI_FUNC(PyObject *) _Py_BuildValue_SizeT(const char *, ...);
 PyAPI_FUNC(int) _PyArg_VaParse_SizeT(PyObject *, char *, va_list);
 PyAPI_FUNC(int) _PyArg_VaParseTupleAndKeywords_SizeT(PyObject *, PyObject *,
                                               const char *, char **, va_list);
+PyAPI_FUNC(int) _PyArg_ParseStack_SizeT(PyObject **, Py_ssize_t,
+                                        const char *, ...);
+PyAPI_FUNC(int) _PyArg_ParseStackAndKeywords_SizeT(PyObject **, Py_ssize_t,
+                                                   PyObject *,
+                                                   struct _PyArg_Parser *,
+                                                   ...);
 #endif
 
 #define FLAG_COMPAT 1
@@ -36,6 +42,8 @@ PyAPI_FUNC(int) _PyArg_VaParseTupleAndKeywords_SizeT(PyObject *, PyObject *,
 
 /* Forward */
 static int vgetargs1(PyObject *, const char *, va_list *, int);
+static int vgetargs1_impl(PyObject *, PyObject **, Py_ssize_t, const char *,
+                          va_list *, int);
 static void seterror(int, const char *, int *, const char *, const char *);
 static char *convertitem(PyObject *, const char **, va_list *, int, int *,
                          char *, size_t, PyObject **);
@@ -48,6 +56,8 @@ static int getbuffer(PyObject *, Py_buffer *, char**);
 
 static int vgetargskeywords(PyObject *, PyObject *,
                             const char *, char **, va_list *, int);
+static int vgetargskeywordsfast(PyObject **, Py_ssize_t, PyObject *,
+                                struct _PyArg_Parser *, va_list *, int);
 static char *skipitem(const char **, va_list *, int);
 
 int
@@ -136,6 +146,33 @@ _PyArg_VaParse_SizeT(PyObject *args, char *format, va_list va)
     return vgetargs1(args, format, &lva, FLAG_SIZE_T);
 }
 
+/* Like PyArg_ParseTuple(), but for the C array of arguments passed to a
+   METH_FASTCALL function. */
+int
+_PyArg_ParseStack(PyObject **args, Py_ssize_t nargs, const char *format, ...)
+{
+    int retval;
+    va_list va;
+
+    va_start(va, format);
+    retval = vgetargs1_impl(NULL, args, nargs, format, &va, 0);
+    va_end(va);
+    return retval;
+}
+
+int
+_PyArg_ParseStack_SizeT(PyObject **args, Py_ssize_t nargs,
+                        const char *format, ...)
+{
+    int retval;
+    va_list va;
+
+    va_start(va, format);
+    retval = vgetargs1_impl(NULL, args, nargs, format, &va, FLAG_SIZE_T);
+    va_end(va);
+    return retval;
+}
+
 
 /* Handle cleanup of allocated memory in case of exception */
 
@@ -211,6 +248,28 @@ cleanreturn(int retval, PyObject *freelist)
 
 static int
 vgetargs1(PyObject *args, const char *format, va_list *p_va, int flags)
+{
+    PyObject **stack = NULL;
+    Py_ssize_t nargs = 0;
+
+    if (!(flags & FLAG_COMPAT)) {
+        assert(args != NULL);
+        if (!PyTuple_Check(args)) {
+            PyErr_SetString(PyExc_SystemError,
+                "new style getargs format but argument is not a tuple");
+            return 0;
+        }
+        stack = &PyTuple_GET_ITEM(args, 0);
+        nargs = PyTuple_GET_SIZE(args);
+    }
+    return vgetargs1_impl(args, stack, nargs, format, p_va, flags);
+}
+
+/* compat_args is only used with FLAG_COMPAT; otherwise the nargs
+   arguments are in stack. */
+static int
+vgetargs1_impl(PyObject *compat_args, PyObject **stack, Py_ssize_t nargs,
+               const char *format, va_list *p_va, int flags)
 {
     char msgbuf[256];
     int levels[32];
@@ -221,12 +280,12 @@ vgetargs1(PyObject *args, const char *format, va_list *p_va, int flags)
     int level = 0;
     int endfmt = 0;
     const char *formatsave = format;
-    Py_ssize_t i, len;
+    Py_ssize_t i;
     char *msg;
     PyObject *freelist = NULL;
     int compat = flags & FLAG_COMPAT;
 
-    assert(compat || (args != (PyObject*)NULL));
+    assert(compat || nargs == 0 || stack != NULL);
     flags = flags & ~FLAG_COMPAT;
 
     while (endfmt == 0) {
@@ -281,7 +340,7 @@ vgetargs1(PyObject *args, const char *format, va_list *p_va, int flags)
 
     if (compat) {
         if (max == 0) {
-            if (args == NULL)
+            if (compat_args == NULL)
                 return 1;
             PyOS_snprintf(msgbuf, sizeof(msgbuf),
                           "%.200s%s takes no arguments",
@@ -291,7 +350,7 @@ vgetargs1(PyObject *args, const char *format, va_list *p_va, int flags)
             return 0;
         }
         else if (min == 1 && max == 1) {
-            if (args == NULL) {
+            if (compat_args == NULL) {
                 PyOS_snprintf(msgbuf, sizeof(msgbuf),
                       "%.200s%s takes at least one argument",
                           fname==NULL ? "function" : fname,
@@ -299,7 +358,7 @@ vgetargs1(PyObject *args, const char *format, va_list *p_va, int flags)
                 PyErr_SetString(PyExc_TypeError, msgbuf);
                 return 0;
             }
-            msg = convertitem(args, &format, p_va, flags, levels,
+            msg = convertitem(compat_args, &format, p_va, flags, levels,
                               msgbuf, sizeof(msgbuf), &freelist);
             if (msg == NULL)
                 return cleanreturn(1, freelist);
@@ -313,15 +372,7 @@ vgetargs1(PyObject *args, const char *format, va_list *p_va, int flags)
         }
     }
 
-    if (!PyTuple_Check(args)) {
-        PyErr_SetString(PyExc_SystemError,
-            "new style getargs format but argument is not a tuple");
-        return 0;
-    }
-
-    len = PyTuple_GET_SIZE(args);
-
-    if (len < min || max < len) {
+    if (nargs < min || max < nargs) {
         if (message == NULL) {
             PyOS_snprintf(msgbuf, sizeof(msgbuf),
                           "%.150s%s takes %s %d argument%s "
@@ -329,20 +380,20 @@ vgetargs1(PyObject *args, const char *format, va_list *p_va, int flags)
                           fname==NULL ? "function" : fname,
                           fname==NULL ? "" : "()",
                           min==max ? "exactly"
-                          : len < min ? "at least" : "at most",
-                          len < min ? min : max,
-                          (len < min ? min : max) == 1 ? "" : "s",
-                          Py_SAFE_DOWNCAST(len, Py_ssize_t, long));
+                          : nargs < min ? "at least" : "at most",
+                          nargs < min ? min : max,
+                          (nargs < min ? min : max) == 1 ? "" : "s",
+                          Py_SAFE_DOWNCAST(nargs, Py_ssize_t, long));
             message = msgbuf;
         }
         PyErr_SetString(PyExc_TypeError, message);
         return 0;
     }
 
-    for (i = 0; i < len; i++) {
+    for (i = 0; i < nargs; i++) {
         if (*format == '|')
             format++;
-        msg = convertitem(PyTuple_GET_ITEM(args, i), &format, p_va,
+        msg = convertitem(stack[i], &format, p_va,
                           flags, levels, msgbuf,
                           sizeof(msgbuf), &freelist);
         if (msg) {
@@ -1571,6 +1622,39 @@ _PyArg_VaParseTupleAndKeywords_SizeT(PyObject *args,
     return retval;
 }
 
+/* Like PyArg_ParseTupleAndKeywords(), but for the arguments passed to a
+   METH_FASTCALL | METH_KEYWORDS function.  The format and keyword list are
+   taken from parser, which is normally static and caches the keywords as
+   interned strings on first use. */
+int
+_PyArg_ParseStackAndKeywords(PyObject **args, Py_ssize_t nargs,
+                             PyObject *kwnames,
+                             struct _PyArg_Parser *parser, ...)
+{
+    int retval;
+    va_list va;
+
+    va_start(va, parser);
+    retval = vgetargskeywordsfast(args, nargs, kwnames, parser, &va, 0);
+    va_end(va);
+    return retval;
+}
+
+int
+_PyArg_ParseStackAndKeywords_SizeT(PyObject **args, Py_ssize_t nargs,
+                                   PyObject *kwnames,
+                                   struct _PyArg_Parser *parser, ...)
+{
+    int retval;
+    va_list va;
+
+    va_start(va, parser);
+    retval = vgetargskeywordsfast(args, nargs, kwnames, parser, &va,
+                                  FLAG_SIZE_T);
+    va_end(va);
+    return retval;
+}
+
 #define IS_END_OF_FORMAT(c) (c == '\0' || c == ';' || c == ':')
 
 static int
@@ -1725,6 +1809,212 @@ vgetargskeywords(PyObject *args, PyObject *keywords, const char *format,
 }
 
 
+/* Parsers whose keywords have been cached, for _PyArg_Fini(). */
+static struct _PyArg_Parser *static_arg_parsers = NULL;
+
+static int
+parser_init(struct _PyArg_Parser *parser)
+{
+    const char *format = parser->format;
+    PyObject *kwtuple;
+    int i, len;
+
+    assert(format != NULL);
+    assert(parser->keywords != NULL);
+    if (parser->kwtuple != NULL)
+        return 1;
+
+    /* grab the function name or custom error msg first (mutually exclusive) */
+    parser->fname = strchr(format, ':');
+    if (parser->fname) {
+        parser->fname++;
+        parser->custom_msg = NULL;
+    }
+    else {
+        parser->custom_msg = strchr(format, ';');
+        if (parser->custom_msg)
+            parser->custom_msg++;
+    }
+
+    for (len = 0; parser->keywords[len]; len++)
+        continue;
+    kwtuple = PyTuple_New(len);
+    if (kwtuple == NULL)
+        return 0;
+    for (i = 0; i < len; i++) {
+        PyObject *keyword = PyString_InternFromString(parser->keywords[i]);
+        if (keyword == NULL) {
+            Py_DECREF(kwtuple);
+            return 0;
+        }
+        PyTuple_SET_ITEM(kwtuple, i, keyword);
+    }
+    parser->kwtuple = kwtuple;
+    parser->next = static_arg_parsers;
+    static_arg_parsers = parser;
+    return 1;
+}
+
+/* Return the value of the keyword argument named key, or NULL without an
+   exception set if it wasn't passed. */
+static PyObject *
+find_keyword(PyObject *kwnames, PyObject **kwstack, PyObject *key)
+{
+    Py_ssize_t i, nkw = PyTuple_GET_SIZE(kwnames);
+    int cmp;
+
+    /* Keyword names passed by the compiler are interned, like ours. */
+    for (i = 0; i < nkw; i++) {
+        if (PyTuple_GET_ITEM(kwnames, i) == key)
+            return kwstack[i];
+    }
+    for (i = 0; i < nkw; i++) {
+        cmp = PyObject_RichCompareBool(PyTuple_GET_ITEM(kwnames, i), key,
+                                       Py_EQ);
+        if (cmp > 0)
+            return kwstack[i];
+        if (cmp < 0)
+            return NULL;
+    }
+    return NULL;
+}
+
+static int
+vgetargskeywordsfast(PyObject **args, Py_ssize_t nargs, PyObject *kwnames,
+                     struct _PyArg_Parser *parser, va_list *p_va, int flags)
+{
+    char msgbuf[512];
+    int levels[32];
+    const char *format, *msg;
+    int min = INT_MAX;
+    int i, len;
+    Py_ssize_t nkeywords;
+    PyObject *freelist = NULL, *keyword, *current_arg;
+    PyObject **kwstack = args + nargs;
+
+    assert(kwnames == NULL || PyTuple_Check(kwnames));
+    assert(parser != NULL);
+    assert(p_va != NULL);
+
+    if (!parser_init(parser))
+        return 0;
+
+    len = (int)PyTuple_GET_SIZE(parser->kwtuple);
+    nkeywords = (kwnames == NULL) ? 0 : PyTuple_GET_SIZE(kwnames);
+    if (nargs + nkeywords > len) {
+        PyErr_Format(PyExc_TypeError, "%s%s takes at most %d "
+                     "argument%s (%zd given)",
+                     (parser->fname == NULL) ? "function" : parser->fname,
+                     (parser->fname == NULL) ? "" : "()",
+                     len,
+                     (len == 1) ? "" : "s",
+                     nargs + nkeywords);
+        return 0;
+    }
+
+    /* convert positional and keyword args in same loop, using the
+       keyword list to drive process */
+    format = parser->format;
+    for (i = 0; i < len; i++) {
+        keyword = PyTuple_GET_ITEM(parser->kwtuple, i);
+        if (*format == '|') {
+            min = i;
+            format++;
+        }
+        if (IS_END_OF_FORMAT(*format)) {
+            PyErr_Format(PyExc_RuntimeError,
+                         "More keyword list entries (%d) than "
+                         "format specifiers (%d)", len, i);
+            return cleanreturn(0, freelist);
+        }
+        current_arg = NULL;
+        if (nkeywords) {
+            current_arg = find_keyword(kwnames, kwstack, keyword);
+        }
+        if (current_arg) {
+            --nkeywords;
+            if (i < nargs) {
+                /* arg present in tuple and in dict */
+                PyErr_Format(PyExc_TypeError,
+                             "Argument given by name ('%s') "
+                             "and position (%d)",
+                             PyString_AS_STRING(keyword), i+1);
+                return cleanreturn(0, freelist);
+            }
+        }
+        else if (nkeywords && PyErr_Occurred())
+            return cleanreturn(0, freelist);
+        else if (i < nargs)
+            current_arg = args[i];
+
+        if (current_arg) {
+            msg = convertitem(current_arg, &format, p_va, flags,
+                levels, msgbuf, sizeof(msgbuf), &freelist);
+            if (msg) {
+                seterror(i+1, msg, levels, parser->fname,
+                         parser->custom_msg);
+                return cleanreturn(0, freelist);
+            }
+            continue;
+        }
+
+        if (i < min) {
+            PyErr_Format(PyExc_TypeError, "Required argument "
+                         "'%s' (pos %d) not found",
+                         PyString_AS_STRING(keyword), i+1);
+            return cleanreturn(0, freelist);
+        }
+        if (!nkeywords)
+            return cleanreturn(1, freelist);
+
+        /* We are into optional args, skip thru to any remaining
+         * keyword args */
+        msg = skipitem(&format, p_va, flags);
+        if (msg) {
+            PyErr_Format(PyExc_RuntimeError, "%s: '%s'", msg,
+                         format);
+            return cleanreturn(0, freelist);
+        }
+    }
+
+    if (!IS_END_OF_FORMAT(*format) && *format != '|') {
+        PyErr_Format(PyExc_RuntimeError,
+            "more argument specifiers than keyword list entries "
+            "(remaining format:'%s')", format);
+        return cleanreturn(0, freelist);
+    }
+
+    /* make sure there are no extraneous keyword arguments */
+    if (nkeywords > 0) {
+        Py_ssize_t j;
+        for (j = 0; j < PyTuple_GET_SIZE(kwnames); j++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, j);
+            int cmp = 0;
+            if (!PyString_Check(key)) {
+                PyErr_SetString(PyExc_TypeError,
+                                "keywords must be strings");
+                return cleanreturn(0, freelist);
+            }
+            for (i = 0; i < len; i++) {
+                cmp = _PyString_Eq(key,
+                                   PyTuple_GET_ITEM(parser->kwtuple, i));
+                if (cmp)
+                    break;
+            }
+            if (!cmp) {
+                PyErr_Format(PyExc_TypeError,
+                             "'%s' is an invalid keyword "
+                             "argument for this function",
+                             PyString_AS_STRING(key));
+                return cleanreturn(0, freelist);
+            }
+        }
+    }
+
+    return cleanreturn(1, freelist);
+}
+
+
 static char *
 skipitem(const char **p_format, va_list *p_va, int flags)
 {
@@ -1859,28 +2149,15 @@ err:
 }
 
 
-int
-PyArg_UnpackTuple(PyObject *args, const char *name, Py_ssize_t min, Py_ssize_t max, ...)
+static int
+unpack_stack(PyObject **args, Py_ssize_t l, const char *name,
+             Py_ssize_t min, Py_ssize_t max, va_list vargs)
 {
-    Py_ssize_t i, l;
+    Py_ssize_t i;
     PyObject **o;
-    va_list vargs;
-
-#ifdef HAVE_STDARG_PROTOTYPES
-    va_start(vargs, max);
-#else
-    va_start(vargs);
-#endif
 
     assert(min >= 0);
     assert(min <= max);
-    if (!PyTuple_Check(args)) {
-        va_end(vargs);
-        PyErr_SetString(PyExc_SystemError,
-            "PyArg_UnpackTuple() argument list is not a tuple");
-        return 0;
-    }
-    l = PyTuple_GET_SIZE(args);
     if (l < min) {
         if (name != NULL)
             PyErr_Format(
@@ -1893,7 +2170,6 @@ PyArg_UnpackTuple(PyObject *args, const char *name, Py_ssize_t min, Py_ssize_t m
                 "unpacked tuple should have %s%zd elements,"
                 " but has %zd",
                 (min == max ? "" : "at least "), min, l);
-        va_end(vargs);
         return 0;
     }
     if (l > max) {
@@ -1908,17 +2184,56 @@ PyArg_UnpackTuple(PyObject *args, const char *name, Py_ssize_t min, Py_ssize_t m
                 "unpacked tuple should have %s%zd elements,"
                 " but has %zd",
                 (min == max ? "" : "at most "), max, l);
-        va_end(vargs);
         return 0;
     }
     for (i = 0; i < l; i++) {
         o = va_arg(vargs, PyObject **);
-        *o = PyTuple_GET_ITEM(args, i);
+        *o = args[i];
     }
-    va_end(vargs);
     return 1;
 }
 
+int
+PyArg_UnpackTuple(PyObject *args, const char *name, Py_ssize_t min, Py_ssize_t max, ...)
+{
+    int retval;
+    va_list vargs;
+
+    if (!PyTuple_Check(args)) {
+        PyErr_SetString(PyExc_SystemError,
+            "PyArg_UnpackTuple() argument list is not a tuple");
+        return 0;
+    }
+#ifdef HAVE_STDARG_PROTOTYPES
+    va_start(vargs, max);
+#else
+    va_start(vargs);
+#endif
+    retval = unpack_stack(&PyTuple_GET_ITEM(args, 0), PyTuple_GET_SIZE(args),
+                          name, min, max, vargs);
+    va_end(vargs);
+    return retval;
+}
+
+/* Like PyArg_UnpackTuple(), but for the C array of arguments passed to a
+   METH_FASTCALL function. */
+int
+_PyArg_UnpackStack(PyObject **args, Py_ssize_t nargs, const char *name,
+                   Py_ssize_t min, Py_ssize_t max, ...)
+{
+    int retval;
+    va_list vargs;
+
+#ifdef HAVE_STDARG_PROTOTYPES
+    va_start(vargs, max);
+#else
+    va_start(vargs);
+#endif
+    retval = unpack_stack(args, nargs, name, min, max, vargs);
+    va_end(vargs);
+    return retval;
+}
+
 
 /* For type constructors that don't take keyword args
  *
@@ -1941,6 +2256,20 @@ _PyArg_NoKeywords(const char *funcname, PyObject *kw)
                     funcname);
     return 0;
 }
+
+void
+_PyArg_Fini(void)
+{
+    struct _PyArg_Parser *parser = static_arg_parsers, *next;
+
+    while (parser != NULL) {
+        next = parser->next;
+        Py_CLEAR(parser->kwtuple);
+        parser->next = NULL;
+        parser = next;
+    }
+    static_arg_parsers = NULL;
+}
 #ifdef __cplusplus
 };
 #endif
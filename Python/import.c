@@ -80,9 +80,11 @@ typedef unsigned short mode_t;
        Python 2.8a0  62221 (introduce matrix multiplication operator)
        Python 2.8a0  62231 (added keyword-only parameters)
        Python 2.8a0  62241 (PEP 3115 metaclass syntax)
+       Python 2.8a0  62251 (marshal format 4 with object references)
+       Python 2.8a0  62261 (LOAD_METHOD and CALL_METHOD opcodes)
 .
 */
-#define MAGIC (62241 | ((long)'\r'<<16) | ((long)'\n'<<24))
+#define MAGIC (62261 | ((long)'\r'<<16) | ((long)'\n'<<24))
 
 /* Magic word as global; note that _PyImport_Init() can change the
    value of this global to accommodate for alterations of how the
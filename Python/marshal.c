@@ -48,6 +48,15 @@
 #define TYPE_UNKNOWN            '?'
 #define TYPE_SET                '<'
 #define TYPE_FROZENSET          '>'
+/* Version 3 */
+#define TYPE_REF                'r'
+#define FLAG_REF                '\x80' /* with a type, add obj to index */
+/* Version 4 */
+#define TYPE_SHORT_STRING       'z'
+#define TYPE_SHORT_INTERNED     'Z'
+#define TYPE_ASCII              'a'
+#define TYPE_SHORT_ASCII        'A'
+#define TYPE_SMALL_TUPLE        ')'
 
 #define WFERR_OK 0
 #define WFERR_UNMARSHALLABLE 1
@@ -63,6 +72,10 @@ typedef struct {
     char *ptr;
     char *end;
     PyObject *strings; /* dict on marshal, list on unmarshal */
+    /* Objects written or read with FLAG_REF, for TYPE_REF (version 3 and
+       above): dict mapping id(obj) to its index on marshal, list on
+       unmarshal */
+    PyObject *refs;
     int version;
 } WFILE;
 
@@ -153,6 +166,17 @@ w_pstring(const char *s, Py_ssize_t n, WFILE *p)
         w_string(s, n, p);
 }
 
+static void
+w_short_pstring(const char *s, Py_ssize_t n, WFILE *p)
+{
+    w_byte(Py_SAFE_DOWNCAST(n, Py_ssize_t, unsigned char), p);
+    w_string(s, n, p);
+}
+
+#define W_TYPE(t, p) do { \
+    w_byte((t) | flag, (p)); \
+} while(0)
+
 /* We assume that Python longs are stored internally in base some power of
    2**15; for the sake of portability we'll always read and write them in base
    exactly 2**15. */
@@ -166,12 +190,12 @@ w_pstring(const char *s, Py_ssize_t n, WFILE *p)
 #define PyLong_MARSHAL_RATIO (PyLong_SHIFT / PyLong_MARSHAL_SHIFT)
 
 static void
-w_PyLong(const PyLongObject *ob, WFILE *p)
+w_PyLong(const PyLongObject *ob, char flag, WFILE *p)
 {
     Py_ssize_t i, j, n, l;
     digit d;
 
-    w_byte(TYPE_LONG, p);
+    W_TYPE(TYPE_LONG, p);
     if (Py_SIZE(ob) == 0) {
         w_long((long)0, p);
         return;
@@ -208,10 +232,59 @@ w_PyLong(const PyLongObject *ob, WFILE *p)
     } while (d != 0);
 }
 
+/* Write a TYPE_REF to v if it was already written, and return 1.  Else
+   return 0, after setting FLAG_REF in *flag if v could be met again:
+   the reader then remembers it.  Objects are identified by address,
+   which is fine since they are all kept alive by the object being
+   marshalled. */
+static int
+w_ref(PyObject *v, char *flag, WFILE *p)
+{
+    PyObject *id, *idx;
+    int ok;
+
+    if (p->refs == NULL)
+        return 0; /* not writing object references */
+
+    /* If it has only one reference, it definitely isn't shared. */
+    if (Py_REFCNT(v) == 1)
+        return 0;
+
+    id = PyLong_FromVoidPtr((void *)v);
+    if (id == NULL)
+        goto err;
+    idx = PyDict_GetItem(p->refs, id);
+    if (idx != NULL) {
+        long w = PyInt_AS_LONG(idx);
+        Py_DECREF(id);
+        w_byte(TYPE_REF, p);
+        w_long(w, p);
+        return 1;
+    }
+    if (PyDict_Size(p->refs) >= SIZE32_MAX) {
+        Py_DECREF(id);
+        p->error = WFERR_UNMARSHALLABLE;
+        return 1;
+    }
+    idx = PyInt_FromSsize_t(PyDict_Size(p->refs));
+    ok = idx != NULL && PyDict_SetItem(p->refs, id, idx) >= 0;
+    Py_DECREF(id);
+    Py_XDECREF(idx);
+    if (!ok)
+        goto err;
+    *flag |= FLAG_REF;
+    return 0;
+
+err:
+    p->error = WFERR_NOMEMORY;
+    return 1;
+}
+
 static void
 w_object(PyObject *v, WFILE *p)
 {
     Py_ssize_t i, n;
+    char flag = '\0';
 
     p->depth++;
 
@@ -236,24 +309,27 @@ w_object(PyObject *v, WFILE *p)
     else if (v == Py_True) {
         w_byte(TYPE_TRUE, p);
     }
+    else if (w_ref(v, &flag, p)) {
+        /* Written as a reference to an already marshalled object */
+    }
     else if (PyInt_CheckExact(v)) {
         long x = PyInt_AS_LONG((PyIntObject *)v);
 #if SIZEOF_LONG > 4
         long y = Py_ARITHMETIC_RIGHT_SHIFT(long, x, 31);
         if (y && y != -1) {
-            w_byte(TYPE_INT64, p);
+            W_TYPE(TYPE_INT64, p);
             w_long64(x, p);
         }
         else
 #endif
             {
-            w_byte(TYPE_INT, p);
+            W_TYPE(TYPE_INT, p);
             w_long(x, p);
         }
     }
     else if (PyLong_CheckExact(v)) {
         PyLongObject *ob = (PyLongObject *)v;
-        w_PyLong(ob, p);
+        w_PyLong(ob, flag, p);
     }
     else if (PyFloat_CheckExact(v)) {
         if (p->version > 1) {
@@ -263,7 +339,7 @@ w_object(PyObject *v, WFILE *p)
                 p->error = WFERR_UNMARSHALLABLE;
                 return;
             }
-            w_byte(TYPE_BINARY_FLOAT, p);
+            W_TYPE(TYPE_BINARY_FLOAT, p);
             w_string((char*)buf, 8, p);
         }
         else {
@@ -274,7 +350,7 @@ w_object(PyObject *v, WFILE *p)
                 return;
             }
             n = strlen(buf);
-            w_byte(TYPE_FLOAT, p);
+            W_TYPE(TYPE_FLOAT, p);
             w_byte((int)n, p);
             w_string(buf, n, p);
             PyMem_Free(buf);
@@ -289,7 +365,7 @@ w_object(PyObject *v, WFILE *p)
                 p->error = WFERR_UNMARSHALLABLE;
                 return;
             }
-            w_byte(TYPE_BINARY_COMPLEX, p);
+            W_TYPE(TYPE_BINARY_COMPLEX, p);
             w_string((char*)buf, 8, p);
             if (_PyFloat_Pack8(PyComplex_ImagAsDouble(v),
                                buf, 1) < 0) {
@@ -300,7 +376,7 @@ w_object(PyObject *v, WFILE *p)
         }
         else {
             char *buf;
-            w_byte(TYPE_COMPLEX, p);
+            W_TYPE(TYPE_COMPLEX, p);
             buf = PyOS_double_to_string(PyComplex_RealAsDouble(v),
                                         'g', 17, 0, NULL);
             if (!buf) {
@@ -325,6 +401,20 @@ w_object(PyObject *v, WFILE *p)
     }
 #endif
     else if (PyString_CheckExact(v)) {
+        if (p->version >= 3) {
+            /* Interned strings are shared through FLAG_REF */
+            int interned = PyString_CHECK_INTERNED(v);
+            n = PyString_GET_SIZE(v);
+            if (p->version >= 4 && n < 256) {
+                W_TYPE(interned ? TYPE_SHORT_INTERNED : TYPE_SHORT_STRING, p);
+                w_short_pstring(PyString_AS_STRING(v), n, p);
+            }
+            else {
+                W_TYPE(interned ? TYPE_INTERNED : TYPE_STRING, p);
+                w_pstring(PyString_AS_STRING(v), n, p);
+            }
+            goto exit;
+        }
         if (p->strings && PyString_CHECK_INTERNED(v)) {
             PyObject *o = PyDict_GetItem(p->strings, v);
             if (o) {
@@ -361,21 +451,42 @@ w_object(PyObject *v, WFILE *p)
             p->error = WFERR_UNMARSHALLABLE;
             return;
         }
-        w_byte(TYPE_UNICODE, p);
-        w_pstring(PyString_AS_STRING(utf8), PyString_GET_SIZE(utf8), p);
+        n = PyString_GET_SIZE(utf8);
+        /* The UTF-8 encoding of an ASCII string has as many bytes as
+           the string has characters. */
+        if (p->version >= 4 && n == PyUnicode_GET_SIZE(v)) {
+            if (n < 256) {
+                W_TYPE(TYPE_SHORT_ASCII, p);
+                w_short_pstring(PyString_AS_STRING(utf8), n, p);
+            }
+            else {
+                W_TYPE(TYPE_ASCII, p);
+                w_pstring(PyString_AS_STRING(utf8), n, p);
+            }
+        }
+        else {
+            W_TYPE(TYPE_UNICODE, p);
+            w_pstring(PyString_AS_STRING(utf8), n, p);
+        }
         Py_DECREF(utf8);
     }
 #endif
     else if (PyTuple_CheckExact(v)) {
-        w_byte(TYPE_TUPLE, p);
         n = PyTuple_Size(v);
-        W_SIZE(n, p);
+        if (p->version >= 4 && n < 256) {
+            W_TYPE(TYPE_SMALL_TUPLE, p);
+            w_byte((unsigned char)n, p);
+        }
+        else {
+            W_TYPE(TYPE_TUPLE, p);
+            W_SIZE(n, p);
+        }
         for (i = 0; i < n; i++) {
             w_object(PyTuple_GET_ITEM(v, i), p);
         }
     }
     else if (PyList_CheckExact(v)) {
-        w_byte(TYPE_LIST, p);
+        W_TYPE(TYPE_LIST, p);
         n = PyList_GET_SIZE(v);
         W_SIZE(n, p);
         for (i = 0; i < n; i++) {
@@ -385,7 +496,7 @@ w_object(PyObject *v, WFILE *p)
     else if (PyDict_CheckExact(v)) {
         Py_ssize_t pos;
         PyObject *key, *value;
-        w_byte(TYPE_DICT, p);
+        W_TYPE(TYPE_DICT, p);
         /* This one is NULL object terminated! */
         pos = 0;
         while (PyDict_Next(v, &pos, &key, &value)) {
@@ -398,9 +509,9 @@ w_object(PyObject *v, WFILE *p)
         PyObject *value, *it;
 
         if (PyObject_TypeCheck(v, &PySet_Type))
-            w_byte(TYPE_SET, p);
+            W_TYPE(TYPE_SET, p);
         else
-            w_byte(TYPE_FROZENSET, p);
+            W_TYPE(TYPE_FROZENSET, p);
         n = PyObject_Size(v);
         if (n == -1) {
             p->depth--;
@@ -427,7 +538,7 @@ w_object(PyObject *v, WFILE *p)
     }
     else if (PyCode_Check(v)) {
         PyCodeObject *co = (PyCodeObject *)v;
-        w_byte(TYPE_CODE, p);
+        W_TYPE(TYPE_CODE, p);
         w_long(co->co_argcount, p);
         w_long(co->co_kwonlyargcount, p);
         w_long(co->co_nlocals, p);
@@ -448,7 +559,7 @@ w_object(PyObject *v, WFILE *p)
         /* Write unknown buffer-style objects as a string */
         char *s;
         PyBufferProcs *pb = v->ob_type->tp_as_buffer;
-        w_byte(TYPE_STRING, p);
+        W_TYPE(TYPE_STRING, p);
         n = (*pb->bf_getreadbuffer)(v, 0, (void **)&s);
         w_pstring(s, n, p);
     }
@@ -472,6 +583,7 @@ PyMarshal_WriteLongToFile(long x, FILE *fp, int version)
     wf.error = WFERR_OK;
     wf.depth = 0;
     wf.strings = NULL;
+    wf.refs = NULL;
     wf.version = version;
     w_long(x, &wf);
 }
@@ -486,10 +598,12 @@ PyMarshal_WriteObjectToFile(PyObject *x, FILE *fp, int version)
     wf.end = NULL;
     wf.error = WFERR_OK;
     wf.depth = 0;
-    wf.strings = (version > 0) ? PyDict_New() : NULL;
+    wf.strings = (version > 0 && version < 3) ? PyDict_New() : NULL;
+    wf.refs = (version >= 3) ? PyDict_New() : NULL;
     wf.version = version;
     w_object(x, &wf);
     Py_XDECREF(wf.strings);
+    Py_XDECREF(wf.refs);
 }
 
 typedef WFILE RFILE; /* Same struct with different invariants */
@@ -636,6 +750,71 @@ r_PyLong(RFILE *p)
     return NULL;
 }
 
+/* Make room in the reference list for an object read with FLAG_REF whose
+   contents have to be read before it can be created (like a tuple), and
+   return its index. */
+static Py_ssize_t
+r_ref_reserve(RFILE *p)
+{
+    Py_ssize_t idx = PyList_GET_SIZE(p->refs);
+    if (idx >= SIZE32_MAX) {
+        PyErr_SetString(PyExc_ValueError,
+                        "bad marshal data (index list too large)");
+        return -1;
+    }
+    if (PyList_Append(p->refs, Py_None) < 0)
+        return -1;
+    return idx;
+}
+
+static void
+r_ref_insert(PyObject *o, Py_ssize_t idx, RFILE *p)
+{
+    if (o != NULL) {
+        PyObject *tmp = PyList_GET_ITEM(p->refs, idx);
+        Py_INCREF(o);
+        PyList_SET_ITEM(p->refs, idx, o);
+        Py_DECREF(tmp);
+    }
+}
+
+/* Read the UTF-8 (or, if ascii is true, ASCII) data of a unicode object.
+   Data from a string is decoded in place. */
+static PyObject *
+r_unicode(Py_ssize_t n, int ascii, RFILE *p)
+{
+    PyObject *v;
+    char *buffer;
+
+    if (p->fp == NULL) {
+        if (p->end - p->ptr < n) {
+            PyErr_SetString(PyExc_EOFError,
+                "EOF read where object expected");
+            return NULL;
+        }
+        if (ascii)
+            v = PyUnicode_DecodeASCII(p->ptr, n, NULL);
+        else
+            v = PyUnicode_DecodeUTF8(p->ptr, n, NULL);
+        p->ptr += n;
+        return v;
+    }
+    buffer = PyMem_NEW(char, n);
+    if (buffer == NULL)
+        return PyErr_NoMemory();
+    if (r_string(buffer, n, p) != n) {
+        PyMem_DEL(buffer);
+        PyErr_SetString(PyExc_EOFError,
+            "EOF read where object expected");
+        return NULL;
+    }
+    if (ascii)
+        v = PyUnicode_DecodeASCII(buffer, n, NULL);
+    else
+        v = PyUnicode_DecodeUTF8(buffer, n, NULL);
+    PyMem_DEL(buffer);
+    return v;
+}
 
 static PyObject *
 r_object(RFILE *p)
@@ -644,7 +823,9 @@ r_object(RFILE *p)
        an exception is set. */
     PyObject *v, *v2;
     long i, n;
-    int type = r_byte(p);
+    int code = r_byte(p);
+    int type, flag = 0;
+    Py_ssize_t idx = -1;
     PyObject *retval;
 
     p->depth++;
@@ -655,6 +836,24 @@ r_object(RFILE *p)
         return NULL;
     }
 
+    if (code == EOF)
+        type = EOF;
+    else {
+        flag = code & FLAG_REF;
+        type = code & ~FLAG_REF;
+    }
+
+    /* Mutable containers are remembered as soon as they are created, so
+       that they can contain themselves.  Other objects get a slot, filled
+       once they are built. */
+    if (flag && type != TYPE_LIST && type != TYPE_DICT && type != TYPE_SET) {
+        idx = r_ref_reserve(p);
+        if (idx < 0) {
+            p->depth--;
+            return NULL;
+        }
+    }
+
     switch (type) {
 
     case EOF:
@@ -810,13 +1009,26 @@ r_object(RFILE *p)
         }
 #endif
 
+    case TYPE_SHORT_INTERNED:
+    case TYPE_SHORT_STRING:
     case TYPE_INTERNED:
     case TYPE_STRING:
-        n = r_long(p);
-        if (n < 0 || n > SIZE32_MAX) {
-            PyErr_SetString(PyExc_ValueError, "bad marshal data (string size out of range)");
-            retval = NULL;
-            break;
+        if (type == TYPE_SHORT_INTERNED || type == TYPE_SHORT_STRING) {
+            n = r_byte(p);
+            if (n == EOF) {
+                PyErr_SetString(PyExc_EOFError,
+                    "EOF read where object expected");
+                retval = NULL;
+                break;
+            }
+        }
+        else {
+            n = r_long(p);
+            if (n < 0 || n > SIZE32_MAX) {
+                PyErr_SetString(PyExc_ValueError, "bad marshal data (string size out of range)");
+                retval = NULL;
+                break;
+            }
         }
         v = PyString_FromStringAndSize((char *)NULL, n);
         if (v == NULL) {
@@ -830,9 +1042,12 @@ r_object(RFILE *p)
             retval = NULL;
             break;
         }
-        if (type == TYPE_INTERNED) {
+        if (type == TYPE_INTERNED || type == TYPE_SHORT_INTERNED) {
             PyString_InternInPlace(&v);
-            if (PyList_Append(p->strings, v) < 0) {
+            /* Only version 1 and 2 data refers to it by TYPE_STRINGREF */
+            if (type == TYPE_INTERNED && !flag &&
+                PyList_Append(p->strings, v) < 0) {
+                Py_DECREF(v);
                 retval = NULL;
                 break;
             }
@@ -853,41 +1068,65 @@ r_object(RFILE *p)
         break;
 
 #ifdef Py_USING_UNICODE
-    case TYPE_UNICODE:
-        {
-        char *buffer;
+    case TYPE_SHORT_ASCII:
+        n = r_byte(p);
+        if (n == EOF) {
+            PyErr_SetString(PyExc_EOFError,
+                "EOF read where object expected");
+            retval = NULL;
+            break;
+        }
+        retval = r_unicode(n, 1, p);
+        break;
 
+    case TYPE_ASCII:
+    case TYPE_UNICODE:
         n = r_long(p);
         if (n < 0 || n > SIZE32_MAX) {
             PyErr_SetString(PyExc_ValueError, "bad marshal data (unicode size out of range)");
             retval = NULL;
             break;
         }
-        buffer = PyMem_NEW(char, n);
-        if (buffer == NULL) {
-            retval = PyErr_NoMemory();
+        retval = r_unicode(n, type == TYPE_ASCII, p);
+        break;
+#endif
+
+    case TYPE_REF:
+        n = r_long(p);
+        if (n < 0 || n >= PyList_GET_SIZE(p->refs)) {
+            PyErr_SetString(PyExc_ValueError, "bad marshal data (invalid reference)");
+            retval = NULL;
             break;
         }
-        if (r_string(buffer, n, p) != n) {
-            PyMem_DEL(buffer);
-            PyErr_SetString(PyExc_EOFError,
-                "EOF read where object expected");
+        v = PyList_GET_ITEM(p->refs, n);
+        if (v == Py_None) {
+            /* A reserved slot: the object is still being read */
+            PyErr_SetString(PyExc_ValueError, "bad marshal data (invalid reference)");
             retval = NULL;
             break;
         }
-        v = PyUnicode_DecodeUTF8(buffer, n, NULL);
-        PyMem_DEL(buffer);
+        Py_INCREF(v);
         retval = v;
         break;
-        }
-#endif
 
+    case TYPE_SMALL_TUPLE:
     case TYPE_TUPLE:
-        n = r_long(p);
-        if (n < 0 || n > SIZE32_MAX) {
-            PyErr_SetString(PyExc_ValueError, "bad marshal data (tuple size out of range)");
-            retval = NULL;
-            break;
+        if (type == TYPE_SMALL_TUPLE) {
+            n = r_byte(p);
+            if (n == EOF) {
+                PyErr_SetString(PyExc_EOFError,
+                    "EOF read where object expected");
+                retval = NULL;
+                break;
+            }
+        }
+        else {
+            n = r_long(p);
+            if (n < 0 || n > SIZE32_MAX) {
+                PyErr_SetString(PyExc_ValueError, "bad marshal data (tuple size out of range)");
+                retval = NULL;
+                break;
+            }
         }
         v = PyTuple_New(n);
         if (v == NULL) {
@@ -921,6 +1160,11 @@ r_object(RFILE *p)
             retval = NULL;
             break;
         }
+        if (flag && PyList_Append(p->refs, v) < 0) {
+            Py_DECREF(v);
+            retval = NULL;
+            break;
+        }
         for (i = 0; i < n; i++) {
             v2 = r_object(p);
             if ( v2 == NULL ) {
@@ -942,6 +1186,11 @@ r_object(RFILE *p)
             retval = NULL;
             break;
         }
+        if (flag && PyList_Append(p->refs, v) < 0) {
+            Py_DECREF(v);
+            retval = NULL;
+            break;
+        }
         for (;;) {
             PyObject *key, *val;
             key = r_object(p);
@@ -973,6 +1222,11 @@ r_object(RFILE *p)
             retval = NULL;
             break;
         }
+        if (flag && type == TYPE_SET && PyList_Append(p->refs, v) < 0) {
+            Py_DECREF(v);
+            retval = NULL;
+            break;
+        }
         for (i = 0; i < n; i++) {
             v2 = r_object(p);
             if ( v2 == NULL ) {
@@ -1086,10 +1340,33 @@ r_object(RFILE *p)
         break;
 
     }
+    if (idx >= 0)
+        r_ref_insert(retval, idx, p);
     p->depth--;
     return retval;
 }
 
+static int
+init_read_tables(RFILE *p)
+{
+    p->strings = PyList_New(0);
+    if (p->strings == NULL)
+        return -1;
+    p->refs = PyList_New(0);
+    if (p->refs == NULL) {
+        Py_CLEAR(p->strings);
+        return -1;
+    }
+    return 0;
+}
+
+static void
+clear_read_tables(RFILE *p)
+{
+    Py_CLEAR(p->strings);
+    Py_CLEAR(p->refs);
+}
+
 static PyObject *
 read_object(RFILE *p)
 {
@@ -1111,6 +1388,7 @@ PyMarshal_ReadShortFromFile(FILE *fp)
     assert(fp);
     rf.fp = fp;
     rf.strings = NULL;
+    rf.refs = NULL;
     rf.end = rf.ptr = NULL;
     return r_short(&rf);
 }
@@ -1121,6 +1399,7 @@ PyMarshal_ReadLongFromFile(FILE *fp)
     RFILE rf;
     rf.fp = fp;
     rf.strings = NULL;
+    rf.refs = NULL;
     rf.ptr = rf.end = NULL;
     return r_long(&rf);
 }
@@ -1177,11 +1456,12 @@ PyMarshal_ReadObjectFromFile(FILE *fp)
     RFILE rf;
     PyObject *result;
     rf.fp = fp;
-    rf.strings = PyList_New(0);
     rf.depth = 0;
     rf.ptr = rf.end = NULL;
+    if (init_read_tables(&rf) < 0)
+        return NULL;
     result = r_object(&rf);
-    Py_DECREF(rf.strings);
+    clear_read_tables(&rf);
     return result;
 }
 
@@ -1193,10 +1473,11 @@ PyMarshal_ReadObjectFromString(char *str, Py_ssize_t len)
     rf.fp = NULL;
     rf.ptr = str;
     rf.end = str + len;
-    rf.strings = PyList_New(0);
     rf.depth = 0;
+    if (init_read_tables(&rf) < 0)
+        return NULL;
     result = r_object(&rf);
-    Py_DECREF(rf.strings);
+    clear_read_tables(&rf);
     return result;
 }
 
@@ -1231,9 +1512,11 @@ PyMarshal_WriteObjectToString(PyObject *x, int version)
     wf.error = WFERR_OK;
     wf.depth = 0;
     wf.version = version;
-    wf.strings = (version > 0) ? PyDict_New() : NULL;
+    wf.strings = (version > 0 && version < 3) ? PyDict_New() : NULL;
+    wf.refs = (version >= 3) ? PyDict_New() : NULL;
     w_object(x, &wf);
     Py_XDECREF(wf.strings);
+    Py_XDECREF(wf.refs);
     if (wf.str != NULL) {
         char *base = PyString_AS_STRING((PyStringObject *)wf.str);
         if (wf.ptr - base > PY_SSIZE_T_MAX) {
@@ -1274,10 +1557,12 @@ marshal_dump(PyObject *self, PyObject *args)
     wf.ptr = wf.end = NULL;
     wf.error = WFERR_OK;
     wf.depth = 0;
-    wf.strings = (version > 0) ? PyDict_New() : 0;
+    wf.strings = (version > 0 && version < 3) ? PyDict_New() : NULL;
+    wf.refs = (version >= 3) ? PyDict_New() : NULL;
     wf.version = version;
     w_object(x, &wf);
     Py_XDECREF(wf.strings);
+    Py_XDECREF(wf.refs);
     if (wf.error != WFERR_OK) {
         set_error(wf.error);
         return NULL;
@@ -1311,10 +1596,11 @@ marshal_load(PyObject *self, PyObject *f)
         return NULL;
     }
     rf.fp = PyFile_AsFile(f);
-    rf.strings = PyList_New(0);
     rf.depth = 0;
+    if (init_read_tables(&rf) < 0)
+        return NULL;
     result = read_object(&rf);
-    Py_DECREF(rf.strings);
+    clear_read_tables(&rf);
     return result;
 }
 
@@ -1364,10 +1650,11 @@ marshal_loads(PyObject *self, PyObject *args)
     rf.fp = NULL;
     rf.ptr = s;
     rf.end = s + n;
-    rf.strings = PyList_New(0);
     rf.depth = 0;
+    if (init_read_tables(&rf) < 0)
+        return NULL;
     result = read_object(&rf);
-    Py_DECREF(rf.strings);
+    clear_read_tables(&rf);
     return result;
 }
 
@@ -1398,15 +1685,17 @@ None, integers, long integers, floating point numbers, strings, Unicode\n\
 objects, tuples, lists, sets, dictionaries, and code objects, where it\n\
 should be understood that tuples, lists and dictionaries are only\n\
 supported as long as the values contained therein are themselves\n\
-supported; and recursive lists and dictionaries should not be written\n\
-(they will cause infinite loops).\n\
+supported; and recursive lists and dictionaries can only be written\n\
+with version 3 or higher.\n\
 \n\
 Variables:\n\
 \n\
 version -- indicates the format that the module uses. Version 0 is the\n\
     historical format, version 1 (added in Python 2.4) shares interned\n\
     strings and version 2 (added in Python 2.5) uses a binary format for\n\
-    floating point numbers. (New in version 2.4)\n\
+    floating point numbers.  Version 3 shares all objects referenced more\n\
+    than once and version 4 adds compact forms for short strings, ASCII\n\
+    unicode and small tuples. (New in version 2.4)\n\
 \n\
 Functions:\n\
 \n\
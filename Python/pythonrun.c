@@ -532,6 +532,7 @@ Py_Finalize(void)
     PyMethod_Fini();
     PyFrame_Fini();
     PyCFunction_Fini();
+    _PyArg_Fini();
     PyTuple_Fini();
     PyList_Fini();
     PySet_Fini();
@@ -474,7 +474,8 @@ PyDoc_STRVAR(setcheckinterval_doc,
 "setcheckinterval(n)\n\
 \n\
 Tell the Python interpreter to check for asynchronous events every\n\
-n instructions.  This also affects how often thread switches occur."
+n instructions.  This no longer affects thread switching; see\n\
+setswitchinterval()."
 );
 
 static PyObject *
@@ -487,6 +488,47 @@ PyDoc_STRVAR(getcheckinterval_doc,
 "getcheckinterval() -> current check interval; see setcheckinterval()."
 );
 
+#ifdef WITH_THREAD
+static PyObject *
+sys_setswitchinterval(PyObject *self, PyObject *args)
+{
+    double d;
+    if (!PyArg_ParseTuple(args, "d:setswitchinterval", &d))
+        return NULL;
+    if (d <= 0.0) {
+        PyErr_SetString(PyExc_ValueError,
+                        "switch interval must be strictly positive");
+        return NULL;
+    }
+    _PyEval_SetSwitchInterval((unsigned long) (1e6 * d));
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+PyDoc_STRVAR(setswitchinterval_doc,
+"setswitchinterval(n)\n\
+\n\
+Set the ideal thread switching delay inside the Python interpreter\n\
+The actual frequency of switching threads can be lower if the\n\
+interpreter executes long sequences of uninterruptible code\n\
+(this is implementation-specific and workload-dependent).\n\
+\n\
+The parameter must represent the desired switching delay in seconds\n\
+A typical value is 0.005 (5 milliseconds)."
+);
+
+static PyObject *
+sys_getswitchinterval(PyObject *self, PyObject *args)
+{
+    return PyFloat_FromDouble(1e-6 * _PyEval_GetSwitchInterval());
+}
+
+PyDoc_STRVAR(getswitchinterval_doc,
+"getswitchinterval() -> current thread switch interval; see setswitchinterval()."
+);
+
+#endif /* WITH_THREAD */
+
 #ifdef WITH_TSC
 static PyObject *
 sys_settscdump(PyObject *self, PyObject *args)
@@ -956,6 +998,31 @@ PyDoc_STRVAR(sys_clear_type_cache__doc__,
 "_clear_type_cache() -> None\n\
 Clear the internal type lookup cache.");
 
+#ifdef Py_IMMORTAL_OBJECTS
+static PyObject *
+sys_immortalize_heap(PyObject *self, PyObject *args)
+{
+    return PyInt_FromSsize_t(_PyGC_ImmortalizeHeap());
+}
+
+PyDoc_STRVAR(sys_immortalize_heap__doc__,
+"_immortalize_heap() -> integer\n\
+Make every object currently reachable from the garbage collector immortal\n\
+and return how many objects were affected.  Immortal objects are never\n\
+deallocated and their reference counts are no longer written to, so the\n\
+memory holding them stays shared with processes forked afterwards.");
+
+static PyObject *
+sys_is_immortal(PyObject *self, PyObject *arg)
+{
+    return PyBool_FromLong(_Py_IsImmortal(arg));
+}
+
+PyDoc_STRVAR(sys_is_immortal__doc__,
+"_is_immortal(object) -> bool\n\
+Return True if the object is immortal.");
+#endif /* Py_IMMORTAL_OBJECTS */
+
 
 static PyMethodDef sys_methods[] = {
     /* Might as well keep this in alphabetic order */
@@ -995,6 +1062,11 @@ static PyMethodDef sys_methods[] = {
     {"gettotalrefcount", (PyCFunction)sys_gettotalrefcount, METH_NOARGS},
 #endif
     {"getrefcount",     (PyCFunction)sys_getrefcount, METH_O, getrefcount_doc},
+#ifdef Py_IMMORTAL_OBJECTS
+    {"_immortalize_heap", sys_immortalize_heap, METH_NOARGS,
+     sys_immortalize_heap__doc__},
+    {"_is_immortal",    sys_is_immortal, METH_O, sys_is_immortal__doc__},
+#endif
     {"getrecursionlimit", (PyCFunction)sys_getrecursionlimit, METH_NOARGS,
      getrecursionlimit_doc},
     {"getsizeof",   (PyCFunction)sys_getsizeof,
@@ -1015,6 +1087,12 @@ static PyMethodDef sys_methods[] = {
      setcheckinterval_doc},
     {"getcheckinterval",        sys_getcheckinterval, METH_NOARGS,
      getcheckinterval_doc},
+#ifdef WITH_THREAD
+    {"setswitchinterval",       sys_setswitchinterval, METH_VARARGS,
+     setswitchinterval_doc},
+    {"getswitchinterval",       sys_getswitchinterval, METH_NOARGS,
+     getswitchinterval_doc},
+#endif
 #ifdef HAVE_DLOPEN
     {"setdlopenflags", sys_setdlopenflags, METH_VARARGS,
      setdlopenflags_doc},
@@ -1194,6 +1272,7 @@ setcheckinterval() -- control how often the interpreter checks for events\n\
 setdlopenflags() -- set the flags to be used for dlopen() calls\n\
 setprofile() -- set the global profiling function\n\
 setrecursionlimit() -- set the max recursion depth for the interpreter\n\
+setswitchinterval() -- control how often the interpreter switches threads\n\
 settrace() -- set the global debug tracing function\n\
 "
 )
@@ -151,6 +151,47 @@ static size_t _pythread_stacksize = 0;
 #endif
 */
 
+/* Only platforms defining THREAD_HAVE_TIMED_LOCK in thread_<platform>.h
+   implement PyThread_acquire_lock_timed() natively.  Elsewhere it is
+   emulated by polling the lock with increasing delays, up to 50ms. */
+#ifndef THREAD_HAVE_TIMED_LOCK
+#ifdef HAVE_SYS_TIME_H
+#include <sys/time.h>
+#endif
+#ifdef HAVE_SYS_SELECT_H
+#include <sys/select.h>
+#endif
+
+int
+PyThread_acquire_lock_timed(PyThread_type_lock lock, PY_TIMEOUT_T microseconds)
+{
+    PY_TIMEOUT_T delay = 500;
+
+    if (microseconds < 0)
+        return PyThread_acquire_lock(lock, WAIT_LOCK);
+    for (;;) {
+        if (PyThread_acquire_lock(lock, NOWAIT_LOCK))
+            return 1;
+        if (microseconds <= 0)
+            return 0;
+        delay = delay * 2;
+        if (delay > microseconds)
+            delay = microseconds;
+        if (delay > 50000)
+            delay = 50000;
+        {
+#ifdef HAVE_SELECT
+            struct timeval t;
+            t.tv_sec = (long)(delay / 1000000);
+            t.tv_usec = (long)(delay % 1000000);
+            select(0, (fd_set *)0, (fd_set *)0, (fd_set *)0, &t);
+#endif
+        }
+        microseconds -= delay;
+    }
+}
+#endif
+
 /* return the current thread stack size */
 size_t
 PyThread_get_stacksize(void)
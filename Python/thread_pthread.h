@@ -11,6 +11,9 @@
 #undef destructor
 #endif
 #include <signal.h>
+#ifdef HAVE_SYS_TIME_H
+#include <sys/time.h>
+#endif
 
 /* The POSIX spec requires that use of pthread_attr_setstacksize
    be conditional on _POSIX_THREAD_ATTR_STACKSIZE being defined. */
@@ -76,12 +79,36 @@
 /* Whether or not to use semaphores directly rather than emulating them with
  * mutexes and condition variables:
  */
-#if defined(_POSIX_SEMAPHORES) && !defined(HAVE_BROKEN_POSIX_SEMAPHORES)
+#if (defined(_POSIX_SEMAPHORES) && !defined(HAVE_BROKEN_POSIX_SEMAPHORES) && \
+     defined(HAVE_SEM_TIMEDWAIT))
 #  define USE_SEMAPHORES
 #else
 #  undef USE_SEMAPHORES
 #endif
 
+/* The timed waits (sem_timedwait and pthread_cond_timedwait) take an
+ * absolute deadline, computed from the current wall clock time.
+ */
+#ifdef GETTIMEOFDAY_NO_TZ
+#define GETTIMEOFDAY(ptv) gettimeofday(ptv)
+#else
+#define GETTIMEOFDAY(ptv) gettimeofday(ptv, (struct timezone *)NULL)
+#endif
+
+#define THREAD_HAVE_TIMED_LOCK
+
+#define MICROSECONDS_TO_TIMESPEC(microseconds, ts) \
+do { \
+    struct timeval tv; \
+    GETTIMEOFDAY(&tv); \
+    tv.tv_usec += microseconds % 1000000; \
+    tv.tv_sec += microseconds / 1000000; \
+    tv.tv_sec += tv.tv_usec / 1000000; \
+    tv.tv_usec %= 1000000; \
+    ts.tv_sec = tv.tv_sec; \
+    ts.tv_nsec = tv.tv_usec * 1000; \
+} while(0)
+
 
 /* On platforms that don't use standard POSIX threads pthread_sigmask()
  * isn't present.  DEC threads uses sigprocmask() instead as do most
@@ -342,34 +369,53 @@ fix_status(int status)
 }
 
 int
-PyThread_acquire_lock(PyThread_type_lock lock, int waitflag)
+PyThread_acquire_lock_timed(PyThread_type_lock lock, PY_TIMEOUT_T microseconds)
 {
     int success;
     sem_t *thelock = (sem_t *)lock;
     int status, error = 0;
+    struct timespec ts;
 
     (void) error; /* silence unused-but-set-variable warning */
-    dprintf(("PyThread_acquire_lock(%p, %d) called\n", lock, waitflag));
+    dprintf(("PyThread_acquire_lock_timed(%p, %lld) called\n",
+             lock, (long long)microseconds));
 
+    if (microseconds > 0)
+        MICROSECONDS_TO_TIMESPEC(microseconds, ts);
     do {
-        if (waitflag)
-            status = fix_status(sem_wait(thelock));
-        else
+        if (microseconds > 0)
+            status = fix_status(sem_timedwait(thelock, &ts));
+        else if (microseconds == 0)
             status = fix_status(sem_trywait(thelock));
+        else
+            status = fix_status(sem_wait(thelock));
     } while (status == EINTR); /* Retry if interrupted by a signal */
 
-    if (waitflag) {
+    if (microseconds > 0) {
+        if (status != ETIMEDOUT)
+            CHECK_STATUS("sem_timedwait");
+    }
+    else if (microseconds == 0) {
+        if (status != EAGAIN)
+            CHECK_STATUS("sem_trywait");
+    }
+    else {
         CHECK_STATUS("sem_wait");
-    } else if (status != EAGAIN) {
-        CHECK_STATUS("sem_trywait");
     }
 
     success = (status == 0) ? 1 : 0;
 
-    dprintf(("PyThread_acquire_lock(%p, %d) -> %d\n", lock, waitflag, success));
+    dprintf(("PyThread_acquire_lock_timed(%p, %lld) -> %d\n",
+             lock, (long long)microseconds, success));
     return success;
 }
 
+int
+PyThread_acquire_lock(PyThread_type_lock lock, int waitflag)
+{
+    return PyThread_acquire_lock_timed(lock, waitflag ? -1 : 0);
+}
+
 void
 PyThread_release_lock(PyThread_type_lock lock)
 {
@@ -443,37 +489,54 @@ PyThread_free_lock(PyThread_type_lock lock)
 }
 
 int
-PyThread_acquire_lock(PyThread_type_lock lock, int waitflag)
+PyThread_acquire_lock_timed(PyThread_type_lock lock, PY_TIMEOUT_T microseconds)
 {
     int success = 0;
     pthread_lock *thelock = (pthread_lock *)lock;
     int status, error = 0;
 
-    dprintf(("PyThread_acquire_lock(%p, %d) called\n", lock, waitflag));
+    dprintf(("PyThread_acquire_lock_timed(%p, %lld) called\n",
+             lock, (long long)microseconds));
 
-    if (waitflag) {
-        status = pthread_mutex_lock( &thelock->mut );
-        CHECK_STATUS("pthread_mutex_lock[1]");
-    }
-    else {
+    if (microseconds == 0) {
         status = pthread_mutex_trylock( &thelock->mut );
         if (status != EBUSY)
             CHECK_STATUS("pthread_mutex_trylock[1]");
     }
+    else {
+        status = pthread_mutex_lock( &thelock->mut );
+        CHECK_STATUS("pthread_mutex_lock[1]");
+    }
     if (status == 0) {
-        success = thelock->locked == 0;
-
-        if ( !success && waitflag ) {
+        if (thelock->locked == 0) {
+            success = 1;
+        } else if (microseconds != 0) {
+            struct timespec ts;
+            if (microseconds > 0)
+                MICROSECONDS_TO_TIMESPEC(microseconds, ts);
             /* continue trying until we get the lock */
 
             /* mut must be locked by me -- part of the condition
              * protocol */
-            while ( thelock->locked ) {
-                status = pthread_cond_wait(&thelock->lock_released,
-                                           &thelock->mut);
-                CHECK_STATUS("pthread_cond_wait");
+            while (success == 0) {
+                if (microseconds > 0) {
+                    status = pthread_cond_timedwait(
+                        &thelock->lock_released,
+                        &thelock->mut, &ts);
+                    if (status == ETIMEDOUT)
+                        break;
+                    CHECK_STATUS("pthread_cond_timedwait");
+                }
+                else {
+                    status = pthread_cond_wait(
+                        &thelock->lock_released,
+                        &thelock->mut);
+                    CHECK_STATUS("pthread_cond_wait");
+                }
+
+                if (thelock->locked == 0)
+                    success = 1;
             }
-            success = 1;
         }
 
         if (success) thelock->locked = 1;
@@ -482,10 +545,17 @@ PyThread_acquire_lock(PyThread_type_lock lock, int waitflag)
     }
 
     if (error) success = 0;
-    dprintf(("PyThread_acquire_lock(%p, %d) -> %d\n", lock, waitflag, success));
+    dprintf(("PyThread_acquire_lock_timed(%p, %lld) -> %d\n",
+             lock, (long long)microseconds, success));
     return success;
 }
 
+int
+PyThread_acquire_lock(PyThread_type_lock lock, int waitflag)
+{
+    return PyThread_acquire_lock_timed(lock, waitflag ? -1 : 0);
+}
+
 void
 PyThread_release_lock(PyThread_type_lock lock)
 {